@@ -7,6 +7,10 @@ AI标书系统公共模块
 from .config import get_config, Config
 from .logger import setup_logging, get_module_logger
 from .llm_client import LLMClient, create_llm_client, get_available_models
+from .llm_cache import LLMResponseCache, get_llm_response_cache
+from .http_pool import get_http_client_pool, get_http_session, http_post
+from .rate_limiter import RateGovernor, RateLimitPolicy, get_rate_governor
+from .llm_metrics import LLMMetricsCollector, get_llm_metrics, track_llm_call
 from .prompt_manager import get_prompt_manager, PromptManager, get_prompt, reload_prompts
 from .exceptions import (
     AITenderSystemError, ConfigurationError, APIError,
@@ -20,7 +24,8 @@ from .utils import (
     allowed_file, ensure_dir, cleanup_temp_files, create_temp_copy,
     format_file_size, validate_file_type, extract_text_preview,
     merge_configs, sanitize_json_value, batch_process_files,
-    get_project_root, to_relative_path, to_absolute_path, resolve_file_path
+    get_project_root, to_relative_path, to_absolute_path, resolve_file_path,
+    like_contains
 )
 from .pdf_utils import (
     PDFConverter, PDFDetector, PDFConversionConfig,
@@ -43,6 +48,10 @@ __all__ = [
     'setup_logging', 'get_module_logger',
     # LLM客户端
     'LLMClient', 'create_llm_client', 'get_available_models',
+    'LLMResponseCache', 'get_llm_response_cache',
+    'get_http_client_pool', 'get_http_session', 'http_post',
+    'RateGovernor', 'RateLimitPolicy', 'get_rate_governor',
+    'LLMMetricsCollector', 'get_llm_metrics', 'track_llm_call',
     # 提示词管理
     'get_prompt_manager', 'PromptManager', 'get_prompt', 'reload_prompts',
     # 异常
@@ -56,7 +65,7 @@ __all__ = [
     'allowed_file', 'ensure_dir', 'cleanup_temp_files', 'create_temp_copy',
     'format_file_size', 'validate_file_type', 'extract_text_preview',
     'merge_configs', 'sanitize_json_value', 'batch_process_files',
-    'get_project_root', 'to_relative_path', 'to_absolute_path', 'resolve_file_path',
+    'get_project_root', 'to_relative_path', 'to_absolute_path', 'resolve_file_path', 'like_contains',
     # 常量
     'BYTES_PER_KB', 'BYTES_PER_MB', 'BYTES_PER_GB',
     'MAX_FILE_SIZE_BYTES', 'DEFAULT_CHUNK_READ_SIZE',
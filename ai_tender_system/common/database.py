@@ -15,6 +15,8 @@ from contextlib import contextmanager
 
 from .logger import get_module_logger
 from .config import get_config
+from .db_pool import close_pooled_connections, get_pooled_connection
+from .fts_search import ensure_fts_indexes, fts_ready, split_match_terms, build_match_query
 
 logger = get_module_logger("database")
 
@@ -48,6 +50,12 @@ class KnowledgeBaseDB:
         # 2. 检查并插入初始数据（仅首次初始化时）
         self._load_initial_data_if_needed()
 
+        # 3. 创建缺失的全文索引
+        self._ensure_fts_indexes()
+
+        # 4. 补齐旧库缺少的列
+        self._ensure_tender_chunk_columns()
+
     def _create_schema(self):
         """创建数据库表结构"""
         database_dir = Path(__file__).parent.parent / 'database'
@@ -128,13 +136,44 @@ class KnowledgeBaseDB:
             logger.error(f"初始数据加载失败: {e}")
             # 不抛出异常，因为即使初始数据加载失败，表结构已经创建成功
 
+    def _ensure_fts_indexes(self):
+        """为关键词搜索创建 FTS5 全文索引（已存在则跳过）"""
+        try:
+            with self.get_connection() as conn:
+                ensure_fts_indexes(conn)
+                conn.commit()
+        except Exception as e:
+            logger.warning(f"全文索引创建失败，关键词搜索将使用LIKE: {e}")
+
+    def _ensure_tender_chunk_columns(self):
+        """为旧库的分块表补齐 extracted_at / filter_error 列（见迁移 011、013）"""
+        try:
+            with self.get_connection() as conn:
+                columns = {row[1] for row in conn.execute("PRAGMA table_info(tender_document_chunks)")}
+                for name, definition in (('extracted_at', 'TIMESTAMP DEFAULT NULL'),
+                                         ('filter_error', 'TEXT DEFAULT NULL')):
+                    if columns and name not in columns:
+                        conn.execute(f"ALTER TABLE tender_document_chunks ADD COLUMN {name} {definition}")
+                        logger.info(f"已为 tender_document_chunks 添加 {name} 列")
+                conn.commit()
+        except Exception as e:
+            logger.warning(f"补齐分块表字段失败: {e}")
+
+    def _fts_ready(self, index_name: str) -> bool:
+        """全文索引是否可用"""
+        try:
+            with self.get_connection() as conn:
+                return fts_ready(conn, index_name)
+        except Exception:
+            return False
+
     @contextmanager
     def get_connection(self):
         """获取数据库连接上下文管理器"""
         conn = None
         try:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row  # 支持字典式访问
+            # 复用当前线程的连接（WAL 模式，见 db_pool）
+            conn = get_pooled_connection(self.db_path, row_factory=sqlite3.Row)  # 支持字典式访问
             yield conn
         except Exception as e:
             if conn:
@@ -145,6 +184,10 @@ class KnowledgeBaseDB:
             if conn:
                 conn.close()
 
+    def close(self):
+        """关闭当前线程中到该数据库的池化连接（删除数据库文件前调用）"""
+        close_pooled_connections(self.db_path)
+
     def execute_query(self, query: str, params: tuple = (), fetch_one: bool = False) -> Any:
         """
         执行查询语句
@@ -750,6 +793,22 @@ class KnowledgeBaseDB:
         if not keywords:
             return []
 
+        # 关键词均可走全文索引时使用 FTS5（结果仍按目录顺序返回）
+        indexable, short = split_match_terms(keywords)
+        if indexable and not short and self._fts_ready('document_toc_fts'):
+            query = """
+            SELECT t.* FROM document_toc t
+            WHERE t.toc_id IN (
+                SELECT rowid FROM document_toc_fts WHERE document_toc_fts MATCH ?
+            )
+            """
+            params = [build_match_query(indexable, ['keywords'])]
+            if doc_id:
+                query += " AND t.doc_id = ?"
+                params.append(doc_id)
+            query += " ORDER BY t.sequence_order"
+            return self.execute_query(query, tuple(params))
+
         # 构建关键词匹配条件(JSON数组中包含关键词) - 使用OR逻辑
         keyword_conditions = []
         params = []
@@ -775,6 +834,21 @@ class KnowledgeBaseDB:
 
     def search_toc_by_text(self, search_text: str, doc_id: int = None) -> List[Dict]:
         """通过文本模糊搜索目录"""
+        indexable, _ = split_match_terms([search_text])
+        if indexable and self._fts_ready('document_toc_fts'):
+            query = """
+            SELECT t.* FROM document_toc t
+            WHERE t.toc_id IN (
+                SELECT rowid FROM document_toc_fts WHERE document_toc_fts MATCH ?
+            )
+            """
+            params = [build_match_query(indexable, ['heading_text', 'section_number'])]
+            if doc_id:
+                query += " AND t.doc_id = ?"
+                params.append(doc_id)
+            query += " ORDER BY t.sequence_order"
+            return self.execute_query(query, tuple(params))
+
         params = [f'%{search_text}%', f'%{search_text}%']
 
         if doc_id:
@@ -809,6 +883,34 @@ class KnowledgeBaseDB:
         """
         return self.execute_query(query, (metric_name, metric_value, metric_unit, component))
 
+    def record_system_metrics(self, metrics: List[Tuple[str, float, Optional[str], Optional[str]]]) -> int:
+        """
+        批量记录系统性能指标（单个事务）
+
+        Args:
+            metrics: [(metric_name, metric_value, metric_unit, component), ...]
+
+        Returns:
+            写入条数
+        """
+        if not metrics:
+            return 0
+        with self.get_connection() as conn:
+            conn.executemany("""
+            INSERT INTO system_metrics (metric_name, metric_value, metric_unit, component)
+            VALUES (?, ?, ?, ?)
+            """, metrics)
+            conn.commit()
+        return len(metrics)
+
+    def get_system_metric_values(self, component_prefix: str, hours: float = 24) -> List[Dict]:
+        """获取最近若干小时内组件名以指定前缀开头的指标值"""
+        query = """
+        SELECT metric_name, metric_value, component, recorded_at FROM system_metrics
+        WHERE component LIKE ? AND recorded_at >= datetime('now', ?)
+        """
+        return self.execute_query(query, (f"{component_prefix}%", f"-{hours} hours"))
+
     def get_system_metrics(self, component: str = None, limit: int = 100) -> List[Dict]:
         """获取系统性能指标"""
         if component:
@@ -1203,6 +1305,16 @@ class KnowledgeBaseDB:
             """
         return self.execute_query(query, (project_id,))
 
+    def get_tender_chunk_progress(self, project_id: int) -> List[Dict]:
+        """获取分块的筛选/提取进度（不含内容，用于重跑时跳过已完成的分块）"""
+        query = """
+        SELECT chunk_id, chunk_index, is_valuable, filter_confidence, filter_error, extracted_at
+        FROM tender_document_chunks
+        WHERE project_id = ?
+        ORDER BY chunk_index
+        """
+        return self.execute_query(query, (project_id,))
+
     def update_chunk_filter_result(self, chunk_id: int, is_valuable: bool,
                                    confidence: float = None, model: str = None) -> bool:
         """更新分块的筛选结果"""
@@ -1218,24 +1330,75 @@ class KnowledgeBaseDB:
     def batch_create_tender_chunks(self, chunks_data: List[Dict]) -> bool:
         """批量创建标书文档分块"""
         try:
-            with self.get_connection() as conn:
-                cursor = conn.cursor()
-
-                for chunk in chunks_data:
-                    metadata_json = json.dumps(chunk.get('metadata', {}), ensure_ascii=False)
-                    cursor.execute("""
-                        INSERT INTO tender_document_chunks
-                        (project_id, chunk_index, chunk_type, content, metadata)
-                        VALUES (?, ?, ?, ?, ?)
-                    """, (chunk['project_id'], chunk['chunk_index'], chunk['chunk_type'],
-                          chunk['content'], metadata_json))
-
-                conn.commit()
-                return True
+            self.insert_tender_chunks(chunks_data)
+            return True
         except Exception as e:
             logger.error(f"批量创建分块失败: {e}")
             return False
 
+    def insert_tender_chunks(self, chunks_data: List[Dict]) -> Dict[int, int]:
+        """
+        批量创建标书文档分块（单个事务）
+
+        Returns:
+            {chunk_index: chunk_id} 映射，供后续筛选/提取结果落库使用
+        """
+        chunk_id_map = {}
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+
+            for chunk in chunks_data:
+                metadata_json = json.dumps(chunk.get('metadata', {}), ensure_ascii=False)
+                cursor.execute("""
+                    INSERT INTO tender_document_chunks
+                    (project_id, chunk_index, chunk_type, content, metadata)
+                    VALUES (?, ?, ?, ?, ?)
+                """, (chunk['project_id'], chunk['chunk_index'], chunk['chunk_type'],
+                      chunk['content'], metadata_json))
+                chunk_id_map[chunk['chunk_index']] = cursor.lastrowid
+
+            conn.commit()
+        return chunk_id_map
+
+    def write_tender_processing_results(self, filter_results: List[Tuple] = (),
+                                        requirements_data: List[Dict] = (),
+                                        extracted_chunk_ids: List[int] = ()) -> None:
+        """
+        在一个事务中批量写入筛选结果和提取结果（写后落库使用，失败时抛出异常）
+
+        Args:
+            filter_results: [(chunk_id, is_valuable, confidence, model, error)]，
+                error 非空表示筛选出错、结果为保守保留（重跑时重新筛选）
+            requirements_data: 要求列表（字段同 batch_create_tender_requirements）
+            extracted_chunk_ids: 已完成提取的分块ID（标记 extracted_at，重跑时跳过）
+        """
+        with self.get_connection() as conn:
+            if filter_results:
+                conn.executemany("""
+                    UPDATE tender_document_chunks
+                    SET is_valuable = ?, filter_confidence = ?, filter_model = ?,
+                        filter_error = ?, filtered_at = CURRENT_TIMESTAMP
+                    WHERE chunk_id = ?
+                """, [(is_valuable, confidence, model, error, chunk_id)
+                      for chunk_id, is_valuable, confidence, model, error in filter_results])
+
+            if requirements_data:
+                conn.executemany("""
+                    INSERT INTO tender_requirements
+                    (project_id, chunk_id, constraint_type, category, subcategory,
+                     detail, source_location, priority, extraction_confidence,
+                     extraction_model, extracted_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+                """, [self._requirement_row(req) for req in requirements_data])
+
+            if extracted_chunk_ids:
+                conn.executemany(
+                    "UPDATE tender_document_chunks SET extracted_at = CURRENT_TIMESTAMP WHERE chunk_id = ?",
+                    [(chunk_id,) for chunk_id in extracted_chunk_ids]
+                )
+
+            conn.commit()
+
     # --- 要求提取管理 ---
     def create_tender_requirement(self, project_id: int, constraint_type: str,
                                   category: str, detail: str, chunk_id: int = None,
@@ -1298,27 +1461,20 @@ class KnowledgeBaseDB:
     def batch_create_tender_requirements(self, requirements_data: List[Dict]) -> bool:
         """批量创建标书要求（移除hitl_task_id参数）"""
         try:
-            with self.get_connection() as conn:
-                cursor = conn.cursor()
-
-                for req in requirements_data:
-                    cursor.execute("""
-                        INSERT INTO tender_requirements
-                        (project_id, chunk_id, constraint_type, category, subcategory,
-                         detail, source_location, priority, extraction_confidence,
-                         extraction_model, extracted_at)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-                    """, (req.get('project_id'), req.get('chunk_id'), req.get('constraint_type'),
-                          req.get('category'), req.get('subcategory'), req.get('detail'),
-                          req.get('source_location'), req.get('priority', 'medium'),
-                          req.get('extraction_confidence'), req.get('extraction_model')))
-
-                conn.commit()
-                return True
+            self.write_tender_processing_results(requirements_data=requirements_data)
+            return True
         except Exception as e:
             logger.error(f"批量创建要求失败: {e}")
             return False
 
+    @staticmethod
+    def _requirement_row(req: Dict) -> Tuple:
+        """要求字典 -> tender_requirements 插入参数"""
+        return (req.get('project_id'), req.get('chunk_id'), req.get('constraint_type'),
+                req.get('category'), req.get('subcategory'), req.get('detail'),
+                req.get('source_location'), req.get('priority', 'medium'),
+                req.get('extraction_confidence'), req.get('extraction_model'))
+
     def get_requirements_summary(self, project_id: int) -> Dict:
         """获取要求汇总统计"""
         query = """
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SQLite 连接池（按线程复用）
+
+各管理器原先每次操作都 sqlite3.connect() / close()，并使用默认的回滚日志模式：
+后台任务写进度时会阻塞前端读取，并发时出现 "database is locked"。本模块提供共享的连接工厂：
+- 每个线程按数据库路径缓存空闲连接（sqlite3 连接不跨线程使用），归还后复用
+- 连接统一设置 WAL 日志、busy_timeout、synchronous=NORMAL、mmap，以及预编译语句缓存
+- 返回的 PooledConnection 与 sqlite3.Connection 用法一致，close() 即归还连接池
+  （未提交的事务回滚、row_factory 复位，与关闭原生连接的效果一致）
+
+配置（环境变量）：
+    SQLITE_JOURNAL_MODE      日志模式，默认 WAL（网络文件系统上可设为 DELETE）
+    SQLITE_BUSY_TIMEOUT_MS   锁等待超时，默认 10000
+    SQLITE_SYNCHRONOUS       默认 NORMAL（WAL 下安全且显著减少 fsync）
+    SQLITE_MMAP_SIZE         内存映射大小（字节），默认 256MB，0 关闭
+    SQLITE_CACHED_STATEMENTS 每个连接缓存的预编译语句数，默认 256
+    SQLITE_POOL_MAX_IDLE     每线程每个数据库保留的空闲连接数，默认 2
+"""
+
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from .logger import get_module_logger
+
+logger = get_module_logger("db_pool")
+
+JOURNAL_MODE = os.getenv('SQLITE_JOURNAL_MODE', 'WAL').upper()
+BUSY_TIMEOUT_MS = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '10000'))
+SYNCHRONOUS = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL').upper()
+MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024)))
+CACHED_STATEMENTS = int(os.getenv('SQLITE_CACHED_STATEMENTS', '256'))
+MAX_IDLE_PER_THREAD = int(os.getenv('SQLITE_POOL_MAX_IDLE', '2'))
+
+
+def _file_identity(db_path: str) -> Optional[Tuple[int, int]]:
+    """数据库文件标识（设备号, inode），文件被替换/删除后变化"""
+    try:
+        stat = os.stat(db_path)
+        return stat.st_dev, stat.st_ino
+    except OSError:
+        return None
+
+
+class PooledConnection:
+    """
+    连接池中的连接
+
+    代理 sqlite3.Connection 的全部属性和方法；close() 将连接归还连接池而不是真正关闭。
+    """
+
+    def __init__(self, pool: 'ConnectionPool', db_path: str, conn: sqlite3.Connection,
+                 identity: Optional[Tuple[int, int]]):
+        object.__setattr__(self, '_pool', pool)
+        object.__setattr__(self, '_db_path', db_path)
+        object.__setattr__(self, '_conn', conn)
+        object.__setattr__(self, '_identity', identity)
+        object.__setattr__(self, '_released', False)
+
+    @property
+    def raw_connection(self) -> sqlite3.Connection:
+        """底层 sqlite3 连接"""
+        return self._conn
+
+    def __getattr__(self, name: str) -> Any:
+        if self._released:
+            raise sqlite3.ProgrammingError("Cannot operate on a closed database.")
+        return getattr(self._conn, name)
+
+    def __setattr__(self, name: str, value: Any):
+        # row_factory / isolation_level / text_factory 等设置到底层连接
+        setattr(self._conn, name, value)
+
+    def __enter__(self):
+        self._conn.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return self._conn.__exit__(exc_type, exc, tb)
+
+    def close(self):
+        """归还连接池（重复调用无副作用）"""
+        if self._released:
+            return
+        object.__setattr__(self, '_released', True)
+        self._pool._release(self)
+
+
+class ConnectionPool:
+    """按线程、按数据库路径复用的 SQLite 连接池"""
+
+    def __init__(self, max_idle_per_thread: int = MAX_IDLE_PER_THREAD):
+        self.max_idle_per_thread = max_idle_per_thread
+        self._local = threading.local()
+        self._pid = os.getpid()
+        self._stats_lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+
+    def _idle(self) -> Dict[str, List[Tuple[sqlite3.Connection, Optional[Tuple[int, int]]]]]:
+        """当前线程的空闲连接 {db_path: [(conn, file_identity)]}"""
+        if self._pid != os.getpid():
+            # fork 之后父进程的连接不可在子进程使用（丢弃但不关闭）
+            self._local = threading.local()
+            self._pid = os.getpid()
+        idle = getattr(self._local, 'idle', None)
+        if idle is None:
+            idle = self._local.idle = {}
+        return idle
+
+    def connect(self, db_path: str) -> PooledConnection:
+        """获取连接（优先复用当前线程的空闲连接）"""
+        db_path = str(db_path)
+        idle = self._idle().setdefault(db_path, [])
+        identity = _file_identity(db_path)
+
+        while idle:
+            conn, conn_identity = idle.pop()
+            if conn_identity == identity and identity is not None:
+                with self._stats_lock:
+                    self.reused += 1
+                return PooledConnection(self, db_path, conn, identity)
+            # 数据库文件已被替换或删除，丢弃旧连接
+            conn.close()
+
+        conn = self._open(db_path)
+        with self._stats_lock:
+            self.created += 1
+        return PooledConnection(self, db_path, conn, _file_identity(db_path))
+
+    @staticmethod
+    def _open(db_path: str) -> sqlite3.Connection:
+        """创建并配置新连接"""
+        conn = sqlite3.connect(
+            db_path,
+            timeout=BUSY_TIMEOUT_MS / 1000,
+            cached_statements=CACHED_STATEMENTS
+        )
+        try:
+            conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+            if JOURNAL_MODE:
+                conn.execute(f"PRAGMA journal_mode = {JOURNAL_MODE}")
+            conn.execute(f"PRAGMA synchronous = {SYNCHRONOUS}")
+            conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE}")
+        except sqlite3.Error as e:
+            # 只读文件系统等场景下设置失败不影响使用
+            logger.warning(f"SQLite 连接参数设置失败({db_path}): {e}")
+        return conn
+
+    def _release(self, pooled: PooledConnection):
+        """归还连接：回滚未提交事务、复位连接属性后放回当前线程的空闲列表"""
+        conn = pooled.raw_connection
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            conn.row_factory = None
+            conn.text_factory = str
+            conn.isolation_level = ''
+        except sqlite3.Error:
+            conn.close()
+            return
+
+        idle = self._idle().setdefault(pooled._db_path, [])
+        if len(idle) < self.max_idle_per_thread:
+            idle.append((conn, pooled._identity))
+        else:
+            conn.close()
+
+    def close_thread_connections(self, db_path: Optional[str] = None):
+        """
+        关闭当前线程的空闲连接
+
+        Args:
+            db_path: 只关闭该数据库的连接（默认全部）。最后一个连接关闭后 SQLite 才会删除 -wal/-shm 文件
+        """
+        idle = self._idle()
+        paths = list(idle) if db_path is None else [str(db_path)]
+        for path in paths:
+            for conn, _ in idle.pop(path, []):
+                conn.close()
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._stats_lock:
+            return {'created': self.created, 'reused': self.reused}
+
+
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_connection_pool() -> ConnectionPool:
+    """获取进程内共享的连接池"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool()
+    return _pool
+
+
+def close_pooled_connections(db_path: Optional[str] = None):
+    """关闭当前线程缓存的连接（db_path 为空时关闭全部）"""
+    get_connection_pool().close_thread_connections(db_path)
+
+
+def get_pooled_connection(db_path: str, row_factory=None) -> PooledConnection:
+    """
+    获取数据库连接（共享连接工厂）
+
+    用法与 sqlite3.connect() 相同，使用完毕调用 close() 归还。
+
+    Args:
+        db_path: 数据库路径
+        row_factory: 行工厂（如 sqlite3.Row）
+    """
+    conn = get_connection_pool().connect(db_path)
+    if row_factory is not None:
+        conn.row_factory = row_factory
+    return conn
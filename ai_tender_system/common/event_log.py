@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+可续传的 SSE 事件日志（SQLite）
+
+技术方案生成、文档解析等长耗时的 SSE 接口原先在 HTTP 响应的生成器里直接执行：
+连接断开（浏览器刷新、代理超时）即中止或遗留执行中的任务，重连后也无法补齐已推送的事件。
+本模块把"生产"与"推送"分开：
+
+- 生产：start_stream() 在后台线程中迭代生产者（产出 dict 事件的可迭代对象），
+  每个事件追加写入 stream_events 表；生产不依赖 HTTP 连接，断开后继续执行
+- 推送：tail() 从指定事件ID之后读取并跟随日志，直到流结束；事件ID即 SSE 的 id 字段，
+  客户端重连时通过 Last-Event-ID（或 last_event_id 参数）从断点继续
+- 压缩：读取时把连续的同章节内容片段（event == 'content_chunk'）合并为一个事件，
+  重连补齐时不必逐片重放；超过阈值的事件（完整大纲、分析结果等）以 zlib 压缩存储
+
+日志表位于独立数据库，多个 Web 进程可以跟随同一个流（其他进程通过轮询感知新事件）。
+生产线程定期刷新流的心跳，跟随方发现心跳超时（生产进程已退出）时推送错误事件并结束。
+
+配置（环境变量）：
+    STREAM_EVENT_DB_PATH         事件日志数据库路径，默认 data/stream_events.db
+    STREAM_POLL_INTERVAL         跟随时的轮询间隔（秒），默认 0.5
+    STREAM_KEEPALIVE_INTERVAL    无新事件时发送 SSE 注释保活的间隔（秒），默认 15
+    STREAM_HEARTBEAT_INTERVAL    生产线程心跳间隔（秒），默认 15
+    STREAM_STALE_SECONDS         心跳超时判定（秒），默认 120
+    STREAM_COMPRESS_THRESHOLD    超过该字节数的事件压缩存储，默认 4096
+    STREAM_RETENTION_HOURS       已结束流的保留时长（小时），默认 24
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .db_pool import get_pooled_connection
+from .logger import get_module_logger
+
+logger = get_module_logger("event_log")
+
+SYSTEM_ROOT = Path(__file__).parent.parent
+
+STREAM_EVENT_DB_PATH = os.getenv('STREAM_EVENT_DB_PATH', str(SYSTEM_ROOT / 'data' / 'stream_events.db'))
+POLL_INTERVAL = float(os.getenv('STREAM_POLL_INTERVAL', '0.5'))
+KEEPALIVE_INTERVAL = float(os.getenv('STREAM_KEEPALIVE_INTERVAL', '15'))
+HEARTBEAT_INTERVAL = float(os.getenv('STREAM_HEARTBEAT_INTERVAL', '15'))
+STALE_SECONDS = float(os.getenv('STREAM_STALE_SECONDS', '120'))
+COMPRESS_THRESHOLD = int(os.getenv('STREAM_COMPRESS_THRESHOLD', '4096'))
+RETENTION_HOURS = float(os.getenv('STREAM_RETENTION_HOURS', '24'))
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS event_streams (
+    stream_id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'running',
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    finished_at REAL
+);
+CREATE TABLE IF NOT EXISTS stream_events (
+    event_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    stream_id TEXT NOT NULL,
+    codec TEXT NOT NULL DEFAULT 'json',
+    data BLOB NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_stream_events_stream ON stream_events(stream_id, event_id);
+CREATE INDEX IF NOT EXISTS idx_event_streams_finished ON event_streams(status, finished_at);
+"""
+
+# 流结束后的状态
+FINISHED_STATUSES = ('completed', 'failed')
+
+
+def _encode(data: Dict[str, Any]) -> Tuple[str, bytes]:
+    raw = json.dumps(data, ensure_ascii=False, separators=(',', ':'), default=str).encode('utf-8')
+    if len(raw) > COMPRESS_THRESHOLD:
+        return 'zlib', zlib.compress(raw, 6)
+    return 'json', raw
+
+
+def _decode(codec: str, data: bytes) -> Dict[str, Any]:
+    if codec == 'zlib':
+        data = zlib.decompress(data)
+    return json.loads(data)
+
+
+def _chunk_key(data: Dict[str, Any]) -> Optional[str]:
+    """可合并的内容片段事件返回章节键，其他事件返回 None"""
+    if data.get('event') == 'content_chunk':
+        return str(data.get('chapter_number', ''))
+    return None
+
+
+def coalesce_events(events: List[Tuple[int, Dict[str, Any]]]) -> List[Tuple[int, Dict[str, Any]]]:
+    """
+    合并连续的同章节内容片段
+
+    合并后的事件ID取最后一个片段的ID，客户端以此续传不会重复或遗漏内容。
+    """
+    merged: List[Tuple[int, Dict[str, Any]]] = []
+    for event_id, data in events:
+        key = _chunk_key(data)
+        if key is not None and merged and _chunk_key(merged[-1][1]) == key:
+            previous = merged[-1][1]
+            merged[-1] = (event_id, {**previous, 'content': previous.get('content', '') + data.get('content', '')})
+        else:
+            merged.append((event_id, data))
+    return merged
+
+
+def format_sse(event_id: Optional[int], data: Optional[Dict[str, Any]]) -> str:
+    """格式化为 SSE 文本；data 为 None 时输出保活注释"""
+    if data is None:
+        return ": keepalive\n\n"
+    payload = json.dumps(data, ensure_ascii=False, separators=(',', ':'), default=str)
+    if event_id is None:
+        return f"data: {payload}\n\n"
+    return f"id: {event_id}\ndata: {payload}\n\n"
+
+
+class EventLog:
+    """追加写入的事件日志（多线程/多进程安全）"""
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = str(db_path or STREAM_EVENT_DB_PATH)
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.executescript(SCHEMA_SQL)
+            conn.commit()
+        finally:
+            conn.close()
+        # 本进程内追加事件时唤醒跟随方；其他进程的跟随方靠轮询
+        self._appended = threading.Condition()
+        self._last_purge = 0.0
+
+    def _connect(self):
+        return get_pooled_connection(self.db_path, row_factory=sqlite3.Row)
+
+    def open_stream(self, stream_id: str, kind: str) -> bool:
+        """
+        创建流；同ID的流已结束时清空后重新开始
+
+        Returns:
+            是否由调用方负责生产（False 表示同ID的流仍在生产中，调用方只需跟随）
+        """
+        self._maybe_purge()
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT status, updated_at FROM event_streams WHERE stream_id = ?", (stream_id,)
+            ).fetchone()
+            if row is not None and row['status'] == 'running' and now - row['updated_at'] < STALE_SECONDS:
+                conn.rollback()
+                return False
+            if row is not None:
+                conn.execute("DELETE FROM stream_events WHERE stream_id = ?", (stream_id,))
+                conn.execute("DELETE FROM event_streams WHERE stream_id = ?", (stream_id,))
+            conn.execute(
+                "INSERT INTO event_streams (stream_id, kind, status, created_at, updated_at) "
+                "VALUES (?, ?, 'running', ?, ?)",
+                (stream_id, kind, now, now)
+            )
+            conn.commit()
+            return True
+        finally:
+            conn.close()
+
+    def append(self, stream_id: str, data: Dict[str, Any]) -> int:
+        """追加事件，返回事件ID"""
+        codec, blob = _encode(data)
+        now = time.time()
+        conn = self._connect()
+        try:
+            cursor = conn.execute(
+                "INSERT INTO stream_events (stream_id, codec, data, created_at) VALUES (?, ?, ?, ?)",
+                (stream_id, codec, blob, now)
+            )
+            conn.execute("UPDATE event_streams SET updated_at = ? WHERE stream_id = ?", (now, stream_id))
+            conn.commit()
+            event_id = cursor.lastrowid
+        finally:
+            conn.close()
+
+        with self._appended:
+            self._appended.notify_all()
+        return event_id
+
+    def close_stream(self, stream_id: str, status: str = 'completed'):
+        """结束流（之后不再追加事件）"""
+        if status not in FINISHED_STATUSES:
+            raise ValueError(f"无效的结束状态: {status}")
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute(
+                "UPDATE event_streams SET status = ?, updated_at = ?, finished_at = ? WHERE stream_id = ?",
+                (status, now, now, stream_id)
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+        with self._appended:
+            self._appended.notify_all()
+
+    def touch(self, stream_ids: Iterable[str]):
+        """刷新生产中流的心跳"""
+        stream_ids = list(stream_ids)
+        if not stream_ids:
+            return
+        conn = self._connect()
+        try:
+            conn.execute(
+                f"UPDATE event_streams SET updated_at = ? WHERE status = 'running' "
+                f"AND stream_id IN ({','.join('?' * len(stream_ids))})",
+                (time.time(), *stream_ids)
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def get_stream(self, stream_id: str) -> Optional[Dict[str, Any]]:
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT * FROM event_streams WHERE stream_id = ?", (stream_id,)).fetchone()
+            return dict(row) if row else None
+        finally:
+            conn.close()
+
+    def read(self, stream_id: str, after_id: int = 0, limit: int = 500,
+             coalesce: bool = True) -> List[Tuple[int, Dict[str, Any]]]:
+        """读取 after_id 之后的事件（按ID升序）"""
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT event_id, codec, data FROM stream_events WHERE stream_id = ? AND event_id > ? "
+                "ORDER BY event_id LIMIT ?",
+                (stream_id, after_id, limit)
+            ).fetchall()
+        finally:
+            conn.close()
+        events = [(row['event_id'], _decode(row['codec'], row['data'])) for row in rows]
+        return coalesce_events(events) if coalesce else events
+
+    def tail(self, stream_id: str, after_id: int = 0) -> Iterator[Tuple[Optional[int], Optional[Dict[str, Any]]]]:
+        """
+        跟随流直到结束
+
+        Yields:
+            (事件ID, 事件)；无新事件超过保活间隔时产出 (None, None)
+        """
+        last_activity = time.monotonic()
+        while True:
+            # 先取状态再读事件：状态已结束时，其后读到的就是全部剩余事件
+            stream = self.get_stream(stream_id)
+            if stream is None:
+                yield None, {'stage': 'error', 'error': '事件流不存在或已过期'}
+                return
+
+            events = self.read(stream_id, after_id)
+            for event_id, data in events:
+                after_id = event_id
+                yield event_id, data
+            if events:
+                last_activity = time.monotonic()
+                continue
+
+            if stream['status'] != 'running':
+                return
+            if time.time() - stream['updated_at'] > STALE_SECONDS:
+                logger.warning(f"事件流生产已中断: {stream_id}")
+                yield None, {'stage': 'error', 'error': '生成进程已中断，请重新发起'}
+                return
+
+            with self._appended:
+                self._appended.wait(POLL_INTERVAL)
+            if time.monotonic() - last_activity >= KEEPALIVE_INTERVAL:
+                last_activity = time.monotonic()
+                yield None, None
+
+    def _maybe_purge(self):
+        if time.time() - self._last_purge < 3600:
+            return
+        self._last_purge = time.time()
+        cutoff = time.time() - RETENTION_HOURS * 3600
+        conn = self._connect()
+        try:
+            conn.execute(
+                "DELETE FROM stream_events WHERE stream_id IN "
+                "(SELECT stream_id FROM event_streams WHERE status != 'running' AND finished_at < ?)",
+                (cutoff,)
+            )
+            conn.execute("DELETE FROM event_streams WHERE status != 'running' AND finished_at < ?", (cutoff,))
+            conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"清理事件日志失败: {e}")
+        finally:
+            conn.close()
+
+
+_event_log: Optional[EventLog] = None
+_event_log_lock = threading.Lock()
+
+
+def get_event_log() -> EventLog:
+    """获取进程内共享的事件日志"""
+    global _event_log
+    if _event_log is None:
+        with _event_log_lock:
+            if _event_log is None:
+                _event_log = EventLog()
+    return _event_log
+
+
+# ========== 生产 ==========
+
+_producing: Dict[str, float] = {}
+_producing_lock = threading.Lock()
+_heartbeat_thread: Optional[threading.Thread] = None
+
+
+def _heartbeat_loop():
+    """为本进程内生产中的流刷新心跳（生产者阻塞在 LLM 调用时也不会被判定为中断）"""
+    while True:
+        time.sleep(HEARTBEAT_INTERVAL)
+        with _producing_lock:
+            stream_ids = list(_producing)
+        try:
+            get_event_log().touch(stream_ids)
+        except sqlite3.Error as e:
+            logger.warning(f"事件流心跳失败: {e}")
+
+
+def _run_producer(log: EventLog, stream_id: str, producer: Iterable[Dict[str, Any]]):
+    status = 'completed'
+    try:
+        for data in producer:
+            log.append(stream_id, data)
+            if data.get('stage') == 'error':
+                status = 'failed'
+    except Exception as e:
+        logger.error(f"事件流生产失败: {stream_id}: {e}", exc_info=True)
+        log.append(stream_id, {'stage': 'error', 'error': str(e), 'message': f'生成失败: {e}'})
+        status = 'failed'
+    finally:
+        with _producing_lock:
+            _producing.pop(stream_id, None)
+        log.close_stream(stream_id, status)
+
+
+def start_stream(kind: str, producer: Iterable[Dict[str, Any]], stream_id: Optional[str] = None,
+                 log: Optional[EventLog] = None) -> Tuple[str, bool]:
+    """
+    在后台线程中运行生产者，事件写入日志
+
+    Args:
+        kind: 流类型（用于排查）
+        producer: 产出事件 dict 的可迭代对象（不得依赖请求上下文）
+        stream_id: 流ID，默认随机生成；固定ID的流仍在生产中时不重复启动
+        log: 事件日志，默认进程内共享实例
+
+    Returns:
+        (流ID, 是否启动了新的生产)
+    """
+    global _heartbeat_thread
+    log = log or get_event_log()
+    stream_id = stream_id or uuid.uuid4().hex
+    if not log.open_stream(stream_id, kind):
+        logger.info(f"事件流仍在生产中，直接跟随: {stream_id}")
+        return stream_id, False
+
+    with _producing_lock:
+        _producing[stream_id] = time.time()
+        if _heartbeat_thread is None:
+            _heartbeat_thread = threading.Thread(target=_heartbeat_loop, name="stream-heartbeat", daemon=True)
+            _heartbeat_thread.start()
+
+    threading.Thread(
+        target=_run_producer, args=(log, stream_id, producer),
+        name=f"stream-{kind}-{stream_id[:8]}", daemon=True
+    ).start()
+    logger.info(f"事件流已启动: {kind} {stream_id}")
+    return stream_id, True
+
+
+def parse_last_event_id(value: Optional[str]) -> int:
+    """解析 Last-Event-ID（无效值视为从头开始）"""
+    try:
+        return max(0, int(value)) if value else 0
+    except ValueError:
+        return 0
+
+
+def sse_lines(stream_id: str, after_id: int = 0, log: Optional[EventLog] = None) -> Iterator[str]:
+    """跟随流并输出 SSE 文本"""
+    for event_id, data in (log or get_event_log()).tail(stream_id, after_id):
+        yield format_sse(event_id, data)
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SQLite FTS5 全文索引
+
+为关键词搜索频繁的表建立 FTS5 外部内容(external content)索引，由触发器与原表保持同步：
+- tender_excerpts_fts: 标书片段（章节标题、内容、关键词）
+- document_toc_fts: 文档目录（标题、章节号、关键词）
+- product_capabilities_fts: 产品能力（名称、描述）
+- documents_fts: 知识库文档（文件名、标签）
+
+分词器使用 SQLite 内置的 trigram（3.34+）：按字符三元组索引，MATCH 短语即子串匹配，
+语义与 LIKE '%词%' 一致且支持中文，并可用 bm25() 排序。
+不足3个字符的词无法走三元组索引，调用方应降级为原 LIKE 查询（见 split_match_terms）。
+
+短词降级：中文常见的两字词（资质、业绩、合同等）都会落到 LIKE 全表扫描，耗时与引入索引前相同
+（scripts/benchmark_fts_search.py 输出各查询的命中路径与耗时，含两字词）。未另建二元组索引：
+外部内容表由触发器同步，预先切分二元组需要在每个写库连接上注册自定义函数（含迁移脚本和外部工具），
+否则写入即失败；自定义分词器同理需要编译扩展。
+
+DDL 同时以迁移脚本形式提供：database/migrations/010_add_fts5_search_indexes.sql
+（由 render_migration_sql() 生成，二者须保持一致）。
+"""
+
+import sqlite3
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .logger import get_module_logger
+
+logger = get_module_logger("fts_search")
+
+# trigram 分词器可索引的最短词长
+MIN_TERM_LENGTH = 3
+
+
+@dataclass(frozen=True)
+class FtsIndex:
+    """FTS5 外部内容索引定义"""
+    name: str                   # FTS5 虚拟表名
+    content_table: str          # 原表
+    content_rowid: str          # 原表整数主键
+    columns: Tuple[str, ...]    # 建索引的列
+    description: str = ''
+
+
+FTS_INDEXES: Tuple[FtsIndex, ...] = (
+    FtsIndex('tender_excerpts_fts', 'tender_excerpts', 'excerpt_id',
+             ('chapter_title', 'content', 'keywords'), '标书片段'),
+    FtsIndex('document_toc_fts', 'document_toc', 'toc_id',
+             ('heading_text', 'section_number', 'keywords'), '文档目录'),
+    FtsIndex('product_capabilities_fts', 'product_capabilities_index', 'capability_id',
+             ('capability_name', 'capability_description'), '产品能力'),
+    FtsIndex('documents_fts', 'documents', 'doc_id',
+             ('original_filename', 'tags'), '知识库文档'),
+)
+
+FTS_INDEX_BY_NAME: Dict[str, FtsIndex] = {index.name: index for index in FTS_INDEXES}
+
+
+def render_index_sql(index: FtsIndex) -> str:
+    """生成单个索引的建表、触发器和重建语句"""
+    cols = ', '.join(index.columns)
+    new_cols = ', '.join(f'new.{c}' for c in index.columns)
+    old_cols = ', '.join(f'old.{c}' for c in index.columns)
+    rowid = index.content_rowid
+
+    return f"""-- {index.description}: {index.content_table}({cols})
+CREATE VIRTUAL TABLE IF NOT EXISTS {index.name} USING fts5(
+    {cols},
+    content='{index.content_table}',
+    content_rowid='{rowid}',
+    tokenize='trigram'
+);
+
+CREATE TRIGGER IF NOT EXISTS {index.name}_ai AFTER INSERT ON {index.content_table} BEGIN
+    INSERT INTO {index.name}(rowid, {cols}) VALUES (new.{rowid}, {new_cols});
+END;
+
+CREATE TRIGGER IF NOT EXISTS {index.name}_ad AFTER DELETE ON {index.content_table} BEGIN
+    INSERT INTO {index.name}({index.name}, rowid, {cols}) VALUES ('delete', old.{rowid}, {old_cols});
+END;
+
+CREATE TRIGGER IF NOT EXISTS {index.name}_au AFTER UPDATE OF {cols} ON {index.content_table} BEGIN
+    INSERT INTO {index.name}({index.name}, rowid, {cols}) VALUES ('delete', old.{rowid}, {old_cols});
+    INSERT INTO {index.name}(rowid, {cols}) VALUES (new.{rowid}, {new_cols});
+END;
+
+INSERT INTO {index.name}({index.name}) VALUES ('rebuild');
+"""
+
+
+def render_migration_sql() -> str:
+    """生成完整迁移脚本"""
+    header = """-- 迁移脚本：关键词搜索的 FTS5 全文索引
+-- 版本：010
+-- 说明：为标书片段、文档目录、产品能力、知识库文档建立 FTS5 外部内容索引（trigram 分词），
+--       由触发器与原表同步；末尾 rebuild 导入已有数据。需要 SQLite 3.34+。
+--       本文件由 common/fts_search.py 的 render_migration_sql() 生成，修改索引定义请同步两处。
+"""
+    return header + ''.join('\n' + render_index_sql(index) for index in FTS_INDEXES)
+
+
+def trigram_supported(conn: sqlite3.Connection) -> bool:
+    """当前 SQLite 是否支持 FTS5 trigram 分词器"""
+    try:
+        conn.execute("CREATE VIRTUAL TABLE temp._fts_probe USING fts5(x, tokenize='trigram')")
+        conn.execute("DROP TABLE temp._fts_probe")
+        return True
+    except sqlite3.Error:
+        return False
+
+
+def _table_exists(conn: sqlite3.Connection, table: str) -> bool:
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type IN ('table', 'view') AND name = ?", (table,)
+    ).fetchone()
+    return row is not None
+
+
+def ensure_fts_indexes(conn: sqlite3.Connection) -> List[str]:
+    """
+    为已存在的原表创建缺失的 FTS5 索引（并导入已有数据）
+
+    Returns:
+        本次新建的索引名列表
+    """
+    if not trigram_supported(conn):
+        logger.warning(f"SQLite {sqlite3.sqlite_version} 不支持 FTS5 trigram，关键词搜索使用 LIKE")
+        return []
+
+    created = []
+    for index in FTS_INDEXES:
+        if _table_exists(conn, index.name) or not _table_exists(conn, index.content_table):
+            continue
+        table_columns = {row[1] for row in conn.execute(f"PRAGMA table_info({index.content_table})")}
+        missing = [c for c in (index.content_rowid, *index.columns) if c not in table_columns]
+        if missing:
+            logger.warning(f"{index.content_table} 缺少列 {missing}，跳过全文索引 {index.name}")
+            continue
+        conn.executescript(render_index_sql(index))
+        created.append(index.name)
+        logger.info(f"已创建全文索引 {index.name}（{index.description}）")
+    return created
+
+
+# 已确认存在的 FTS 表 (数据库文件, 表名)
+_ready_indexes = set()
+
+
+def fts_ready(conn: sqlite3.Connection, index_name: str) -> bool:
+    """FTS 索引是否可用（存在即缓存，避免每次查询 sqlite_master）"""
+    db_file = conn.execute("PRAGMA database_list").fetchone()[2]
+    key = (db_file, index_name)
+    if key in _ready_indexes:
+        return True
+    if _table_exists(conn, index_name):
+        if db_file:  # 内存数据库不缓存
+            _ready_indexes.add(key)
+        return True
+    return False
+
+
+def quote_term(term: str) -> str:
+    """转义为 FTS5 短语（trigram 下即子串匹配）"""
+    return '"' + term.replace('"', '""') + '"'
+
+
+def split_match_terms(terms: Sequence[str]) -> Tuple[List[str], List[str]]:
+    """
+    按是否可走 trigram 索引拆分搜索词
+
+    Returns:
+        (可索引的词, 过短的词)，均已去重（空词忽略）
+    """
+    indexable, short = [], []
+    for term in dict.fromkeys(t for t in terms if t):
+        (indexable if len(term) >= MIN_TERM_LENGTH else short).append(term)
+    return indexable, short
+
+
+def build_match_query(terms: Sequence[str], columns: Optional[Sequence[str]] = None) -> str:
+    """
+    构造 OR 连接的 MATCH 表达式
+
+    Args:
+        terms: 可索引的搜索词（长度≥3）
+        columns: 限定列（可选）
+    """
+    expr = ' OR '.join(quote_term(t) for t in terms)
+    if columns:
+        return f"{{{' '.join(columns)}}} : ({expr})"
+    return expr
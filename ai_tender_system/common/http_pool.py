@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+共享 HTTP 连接池
+
+LLM / Embedding 调用原先每次使用模块级 requests.post，或为每次流式调用新建 OpenAI + httpx 客户端，
+每个请求都要重新建立 TCP + TLS 连接。本模块按服务地址（scheme://host:port）提供进程内共享、
+保持长连接的传输层：
+- get_http_session():  requests.Session（同步调用，线程安全地复用连接池）
+- get_httpx_client():  httpx.Client（传给 OpenAI / AzureOpenAI SDK 的 http_client）
+- get_async_httpx_client(): httpx.AsyncClient（按事件循环缓存，供 asyncio 批量调用）
+- http_post():         等价于 requests.post，但走共享连接池
+
+配置（环境变量）：
+    LLM_HTTP_POOL_CONNECTIONS  每个服务地址的连接池数量（requests），默认 10
+    LLM_HTTP_POOL_MAXSIZE      每个服务地址的最大连接数，默认 32
+    LLM_HTTP_KEEPALIVE_EXPIRY  空闲长连接保留秒数（httpx），默认 60
+"""
+
+import asyncio
+import os
+import threading
+import weakref
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+from .logger import get_module_logger
+
+logger = get_module_logger("http_pool")
+
+POOL_CONNECTIONS = int(os.getenv('LLM_HTTP_POOL_CONNECTIONS', '10'))
+POOL_MAXSIZE = int(os.getenv('LLM_HTTP_POOL_MAXSIZE', '32'))
+KEEPALIVE_EXPIRY = float(os.getenv('LLM_HTTP_KEEPALIVE_EXPIRY', '60'))
+
+
+def pool_key(url: str) -> str:
+    """连接池键：scheme://host[:port]"""
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}".lower()
+
+
+class HttpClientPool:
+    """按服务地址缓存的 HTTP 客户端"""
+
+    def __init__(self, pool_connections: int = POOL_CONNECTIONS, pool_maxsize: int = POOL_MAXSIZE,
+                 keepalive_expiry: float = KEEPALIVE_EXPIRY):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.keepalive_expiry = keepalive_expiry
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._sessions: Dict[str, requests.Session] = {}
+        self._clients: Dict[str, httpx.Client] = {}
+        # 事件循环 -> {服务地址: AsyncClient}，事件循环被回收后自动移除
+        self._async_clients: 'weakref.WeakKeyDictionary' = weakref.WeakKeyDictionary()
+
+    def _check_fork(self):
+        # fork 之后父进程的连接不可复用（丢弃但不关闭）
+        if self._pid != os.getpid():
+            self._sessions, self._clients = {}, {}
+            self._async_clients = weakref.WeakKeyDictionary()
+            self._pid = os.getpid()
+
+    def _limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.pool_maxsize,
+            max_keepalive_connections=self.pool_maxsize,
+            keepalive_expiry=self.keepalive_expiry
+        )
+
+    def session(self, url: str) -> requests.Session:
+        """获取服务地址对应的 requests.Session"""
+        key = pool_key(url)
+        with self._lock:
+            self._check_fork()
+            session = self._sessions.get(key)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=self.pool_connections, pool_maxsize=self.pool_maxsize)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                self._sessions[key] = session
+                logger.debug(f"创建HTTP连接池: {key}")
+            return session
+
+    def client(self, url: str) -> httpx.Client:
+        """获取服务地址对应的 httpx.Client（超时由调用方按请求设置）"""
+        key = pool_key(url)
+        with self._lock:
+            self._check_fork()
+            client = self._clients.get(key)
+            if client is None or client.is_closed:
+                client = httpx.Client(limits=self._limits(), timeout=None)
+                self._clients[key] = client
+            return client
+
+    def async_client(self, url: str) -> httpx.AsyncClient:
+        """获取当前事件循环中服务地址对应的 httpx.AsyncClient"""
+        loop = asyncio.get_running_loop()
+        key = pool_key(url)
+        with self._lock:
+            self._check_fork()
+            clients = self._async_clients.setdefault(loop, {})
+            client = clients.get(key)
+            if client is None or client.is_closed:
+                client = httpx.AsyncClient(limits=self._limits(), timeout=None)
+                clients[key] = client
+            return client
+
+    async def aclose_loop_clients(self):
+        """关闭当前事件循环的异步客户端（事件循环结束前调用）"""
+        with self._lock:
+            clients = self._async_clients.pop(asyncio.get_running_loop(), {})
+        for client in clients.values():
+            await client.aclose()
+
+    def close(self):
+        """关闭全部同步连接"""
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            for client in self._clients.values():
+                client.close()
+            self._sessions.clear()
+            self._clients.clear()
+
+
+_pool: Optional[HttpClientPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_http_client_pool() -> HttpClientPool:
+    """获取进程内共享的 HTTP 客户端池"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = HttpClientPool()
+    return _pool
+
+
+def get_http_session(url: str) -> requests.Session:
+    """获取共享的 requests.Session"""
+    return get_http_client_pool().session(url)
+
+
+def get_httpx_client(url: str) -> httpx.Client:
+    """获取共享的 httpx.Client"""
+    return get_http_client_pool().client(url)
+
+
+def get_async_httpx_client(url: str) -> httpx.AsyncClient:
+    """获取当前事件循环共享的 httpx.AsyncClient"""
+    return get_http_client_pool().async_client(url)
+
+
+def http_post(url: str, **kwargs) -> requests.Response:
+    """requests.post 的连接池版本"""
+    return get_http_session(url).post(url, **kwargs)
@@ -0,0 +1,809 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+后台任务队列（SQLite）与独立工作进程池
+
+风险分析、对账、应答自检、文档整合、标书处理流程等长耗时操作原先在请求处理函数里直接
+启动 threading.Thread：任务占用 gunicorn 的 2~4 个 worker 进程，进程重启即丢失，也无法取消。
+本模块把它们变为持久化的后台任务：
+
+- 入队：请求处理函数只调用 enqueue_job() 写入 background_jobs 表并立即返回，
+  进度仍写入各业务表（通过原有状态接口查询），任务本身的状态通过 get_job() 查询
+- 执行：JobWorkerPool 启动独立的工作进程（python -m common.job_worker --worker），
+  每个进程循环领取任务；领取在 BEGIN IMMEDIATE 事务内完成，多进程不会重复领取，
+  并按任务类型限制同时运行的数量（JOB_CONCURRENCY）
+- 心跳与租约：任务执行期间心跳线程每 JOB_HEARTBEAT_INTERVAL 秒续租并写入进度；
+  工作进程崩溃或被杀后租约过期，进程池监控线程将任务重新排队（未超过 max_attempts）或标记失败
+- 取消：cancel_job() 直接取消排队中的任务；运行中的任务置取消标记，处理函数在进度回调中
+  调用 job.check_cancelled() 协作退出；超过 JOB_CANCEL_GRACE 秒仍未退出则结束该工作进程，
+  由进程池重新拉起
+
+任务类型通过 register_job_type() 登记，处理函数以 "模块:函数" 字符串登记，工作进程按需导入；
+处理函数接收 JobContext，返回值（可 JSON 序列化）保存为任务结果。
+
+运行方式（JOB_WORKER_MODE）：
+- embedded: Web 应用启动时拉起进程池；通过文件锁保证每台机器只有一个进程池
+  （gunicorn 多 worker 时只有取得锁的进程启动）
+- external: Web 进程只入队，进程池单独运行：cd ai_tender_system && python -m common.job_worker
+  （命令行入口在 common/job_worker.py，原因见该模块说明）
+- off: 不启动进程池（任务保持排队）
+
+配置（环境变量）：
+    JOB_QUEUE_DB_PATH       队列数据库路径，默认 data/jobs.db
+    JOB_WORKER_MODE         embedded（默认）/ external / off
+    JOB_WORKERS             工作进程数，默认 4
+    JOB_CONCURRENCY         按任务类型的并发上限，如 "risk_analysis=2,document_merge=1"，
+                            未列出的类型使用登记时的默认值
+    JOB_LEASE_SECONDS       租约时长（秒），默认 60
+    JOB_HEARTBEAT_INTERVAL  心跳间隔（秒），默认 10
+    JOB_POLL_INTERVAL       空闲时领取任务的轮询间隔（秒），默认 1
+    JOB_CANCEL_GRACE        请求取消后等待处理函数退出的时间（秒），默认 30
+    JOB_RETENTION_DAYS      已结束任务的保留天数，默认 7
+"""
+
+import argparse
+import atexit
+import importlib
+import json
+import os
+import signal
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from .db_pool import get_pooled_connection
+from .logger import get_module_logger
+
+logger = get_module_logger("job_queue")
+
+SYSTEM_ROOT = Path(__file__).parent.parent
+
+JOB_QUEUE_DB_PATH = os.getenv('JOB_QUEUE_DB_PATH', str(SYSTEM_ROOT / 'data' / 'jobs.db'))
+WORKER_MODE = os.getenv('JOB_WORKER_MODE', 'embedded').lower()
+WORKERS = int(os.getenv('JOB_WORKERS', '4'))
+CONCURRENCY_OVERRIDES = os.getenv('JOB_CONCURRENCY', '')
+LEASE_SECONDS = float(os.getenv('JOB_LEASE_SECONDS', '60'))
+HEARTBEAT_INTERVAL = float(os.getenv('JOB_HEARTBEAT_INTERVAL', '10'))
+POLL_INTERVAL = float(os.getenv('JOB_POLL_INTERVAL', '1'))
+CANCEL_GRACE = float(os.getenv('JOB_CANCEL_GRACE', '30'))
+RETENTION_DAYS = float(os.getenv('JOB_RETENTION_DAYS', '7'))
+
+# 工作进程的入口模块（只导入本模块并调用 main()，保证 JobCancelled 等只有一份定义）
+WORKER_MODULE = 'common.job_worker'
+
+ACTIVE_STATUSES = ('queued', 'running')
+TERMINAL_STATUSES = ('succeeded', 'failed', 'cancelled')
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS background_jobs (
+    job_id TEXT PRIMARY KEY,
+    job_type TEXT NOT NULL,
+    job_key TEXT,
+    payload TEXT NOT NULL DEFAULT '{}',
+    status TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 1,
+    progress INTEGER NOT NULL DEFAULT 0,
+    message TEXT DEFAULT '',
+    result TEXT,
+    error TEXT,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    worker_id TEXT,
+    lease_expires_at REAL,
+    heartbeat_at REAL,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_background_jobs_status ON background_jobs(status, created_at);
+CREATE INDEX IF NOT EXISTS idx_background_jobs_type ON background_jobs(job_type, status);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_background_jobs_active_key
+    ON background_jobs(job_key) WHERE job_key IS NOT NULL AND status IN ('queued', 'running');
+"""
+
+
+class JobCancelled(Exception):
+    """任务已被取消（处理函数抛出以协作退出）"""
+
+
+# ========== 任务类型登记 ==========
+
+@dataclass
+class JobType:
+    """任务类型"""
+    name: str
+    handler: str                # "模块:函数"
+    concurrency: int = 1        # 同时运行的上限（所有工作进程合计）
+    max_attempts: int = 2       # 含租约过期后的重新执行；处理函数抛出异常不重试
+
+
+_job_types: Dict[str, JobType] = {}
+_handlers: Dict[str, Callable] = {}
+_registry_lock = threading.Lock()
+
+
+def _parse_concurrency(spec: str) -> Dict[str, int]:
+    """解析 "type=n,type=n" 形式的并发配置"""
+    limits = {}
+    for part in spec.split(','):
+        name, _, value = part.partition('=')
+        if name.strip() and value.strip().isdigit():
+            limits[name.strip()] = int(value)
+    return limits
+
+
+def register_job_type(name: str, handler: str, concurrency: int = 1, max_attempts: int = 2) -> JobType:
+    """
+    登记任务类型
+
+    Args:
+        name: 任务类型名
+        handler: 处理函数路径 "模块:函数"，函数签名 handler(job: JobContext) -> Optional[dict]
+        concurrency: 默认并发上限（可被 JOB_CONCURRENCY 覆盖）
+        max_attempts: 最大执行次数
+    """
+    concurrency = _parse_concurrency(CONCURRENCY_OVERRIDES).get(name, concurrency)
+    job_type = JobType(name=name, handler=handler, concurrency=max(1, concurrency),
+                       max_attempts=max(1, max_attempts))
+    with _registry_lock:
+        _job_types[name] = job_type
+        _handlers.pop(name, None)
+    return job_type
+
+
+def get_job_types() -> Dict[str, JobType]:
+    """已登记的任务类型"""
+    with _registry_lock:
+        return dict(_job_types)
+
+
+def _resolve_handler(job_type: str) -> Callable:
+    """导入任务类型的处理函数（按进程缓存）"""
+    with _registry_lock:
+        handler = _handlers.get(job_type)
+        spec = _job_types.get(job_type)
+    if handler is not None:
+        return handler
+    if spec is None:
+        raise ValueError(f"未登记的任务类型: {job_type}")
+
+    module_name, _, func_name = spec.handler.partition(':')
+    handler = getattr(importlib.import_module(module_name), func_name)
+    with _registry_lock:
+        _handlers[job_type] = handler
+    return handler
+
+
+# 内置任务类型
+register_job_type('risk_analysis', 'modules.risk_analyzer.task_manager:run_analysis_job', concurrency=2)
+register_job_type('risk_reconcile', 'modules.risk_analyzer.task_manager:run_reconcile_job', concurrency=2)
+register_job_type('response_check', 'modules.response_checker.task_manager:run_check_job', concurrency=2)
+register_job_type('document_merge', 'web.blueprints.document_merger_api:run_merge_job', concurrency=2)
+register_job_type('tender_processing', 'modules.tender_processing.processing_pipeline:run_pipeline_job',
+                  concurrency=2)
+
+
+# ========== 队列 ==========
+
+@dataclass
+class Job:
+    """background_jobs 中的一行"""
+    job_id: str
+    job_type: str
+    job_key: Optional[str] = None
+    payload: Dict[str, Any] = field(default_factory=dict)
+    status: str = 'queued'
+    attempts: int = 0
+    max_attempts: int = 1
+    progress: int = 0
+    message: str = ''
+    result: Any = None
+    error: Optional[str] = None
+    cancel_requested: bool = False
+    worker_id: Optional[str] = None
+    lease_expires_at: Optional[float] = None
+    heartbeat_at: Optional[float] = None
+    created_at: float = 0.0
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    @classmethod
+    def from_row(cls, row: sqlite3.Row) -> 'Job':
+        data = dict(row)
+        data['payload'] = json.loads(data.get('payload') or '{}')
+        data['result'] = json.loads(data['result']) if data.get('result') else None
+        data['cancel_requested'] = bool(data.get('cancel_requested'))
+        return cls(**data)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'job_id': self.job_id,
+            'job_type': self.job_type,
+            'job_key': self.job_key,
+            'status': self.status,
+            'attempts': self.attempts,
+            'progress': self.progress,
+            'message': self.message,
+            'result': self.result,
+            'error': self.error,
+            'cancel_requested': self.cancel_requested,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+        }
+
+
+class JobQueue:
+    """SQLite 持久化任务队列（多进程安全）"""
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = str(db_path or JOB_QUEUE_DB_PATH)
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.executescript(SCHEMA_SQL)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _connect(self):
+        return get_pooled_connection(self.db_path, row_factory=sqlite3.Row)
+
+    def enqueue(self, job_type: str, payload: Optional[Dict[str, Any]] = None,
+                job_key: Optional[str] = None) -> str:
+        """
+        入队
+
+        Args:
+            job_type: 任务类型（须已登记）
+            payload: 任务参数（JSON）
+            job_key: 业务键；同一业务键已有排队/运行中的任务时直接返回该任务ID
+
+        Returns:
+            任务ID
+        """
+        spec = get_job_types().get(job_type)
+        if spec is None:
+            raise ValueError(f"未登记的任务类型: {job_type}")
+
+        job_id = uuid.uuid4().hex
+        conn = self._connect()
+        try:
+            try:
+                conn.execute(
+                    "INSERT INTO background_jobs (job_id, job_type, job_key, payload, max_attempts, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (job_id, job_type, job_key, json.dumps(payload or {}, ensure_ascii=False),
+                     spec.max_attempts, time.time())
+                )
+                conn.commit()
+            except sqlite3.IntegrityError:
+                conn.rollback()
+                row = conn.execute(
+                    "SELECT job_id FROM background_jobs WHERE job_key = ? AND status IN ('queued', 'running')",
+                    (job_key,)
+                ).fetchone()
+                if row is None:
+                    raise
+                logger.info(f"任务已在队列中: {job_key} -> {row['job_id']}")
+                return row['job_id']
+        finally:
+            conn.close()
+
+        logger.info(f"任务入队: {job_type} {job_id}" + (f" ({job_key})" if job_key else ''))
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Job]:
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT * FROM background_jobs WHERE job_id = ?", (job_id,)).fetchone()
+            return Job.from_row(row) if row else None
+        finally:
+            conn.close()
+
+    def get_by_key(self, job_key: str) -> Optional[Job]:
+        """业务键对应的最近一个任务"""
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT * FROM background_jobs WHERE job_key = ? ORDER BY created_at DESC LIMIT 1",
+                (job_key,)
+            ).fetchone()
+            return Job.from_row(row) if row else None
+        finally:
+            conn.close()
+
+    def list_jobs(self, job_type: Optional[str] = None, status: Optional[str] = None,
+                  limit: int = 50) -> List[Job]:
+        conditions, params = [], []
+        if job_type:
+            conditions.append("job_type = ?")
+            params.append(job_type)
+        if status:
+            conditions.append("status = ?")
+            params.append(status)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                f"SELECT * FROM background_jobs {where} ORDER BY created_at DESC LIMIT ?",
+                (*params, limit)
+            ).fetchall()
+            return [Job.from_row(row) for row in rows]
+        finally:
+            conn.close()
+
+    def claim(self, worker_id: str, job_types: Optional[List[str]] = None) -> Optional[Job]:
+        """
+        领取最早排队、且所属类型未达并发上限的任务
+
+        Returns:
+            领取到的任务（状态已置为 running），没有可执行任务时返回 None
+        """
+        types = get_job_types()
+        if job_types is not None:
+            types = {name: spec for name, spec in types.items() if name in job_types}
+        if not types:
+            return None
+
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            running = {
+                row['job_type']: row['n'] for row in conn.execute(
+                    "SELECT job_type, COUNT(*) AS n FROM background_jobs WHERE status = 'running' GROUP BY job_type"
+                )
+            }
+            allowed = [name for name, spec in types.items() if running.get(name, 0) < spec.concurrency]
+            if not allowed:
+                conn.rollback()
+                return None
+
+            row = conn.execute(
+                f"SELECT job_id FROM background_jobs WHERE status = 'queued' "
+                f"AND job_type IN ({','.join('?' * len(allowed))}) ORDER BY created_at LIMIT 1",
+                allowed
+            ).fetchone()
+            if row is None:
+                conn.rollback()
+                return None
+
+            conn.execute(
+                "UPDATE background_jobs SET status = 'running', worker_id = ?, attempts = attempts + 1, "
+                "lease_expires_at = ?, heartbeat_at = ?, started_at = COALESCE(started_at, ?) WHERE job_id = ?",
+                (worker_id, now + LEASE_SECONDS, now, now, row['job_id'])
+            )
+            job_row = conn.execute("SELECT * FROM background_jobs WHERE job_id = ?", (row['job_id'],)).fetchone()
+            conn.commit()
+            return Job.from_row(job_row)
+        finally:
+            conn.close()
+
+    def heartbeat(self, job_id: str, worker_id: str, progress: Optional[int] = None,
+                  message: Optional[str] = None) -> bool:
+        """
+        续租并写入进度
+
+        Returns:
+            是否应停止执行（已请求取消，或租约已被回收）
+        """
+        now = time.time()
+        conn = self._connect()
+        try:
+            cursor = conn.execute(
+                "UPDATE background_jobs SET lease_expires_at = ?, heartbeat_at = ?, "
+                "progress = COALESCE(?, progress), message = COALESCE(?, message) "
+                "WHERE job_id = ? AND worker_id = ? AND status = 'running'",
+                (now + LEASE_SECONDS, now, progress, message, job_id, worker_id)
+            )
+            row = conn.execute("SELECT cancel_requested FROM background_jobs WHERE job_id = ?",
+                               (job_id,)).fetchone()
+            conn.commit()
+        finally:
+            conn.close()
+
+        if cursor.rowcount == 0:
+            logger.warning(f"任务租约已失效: {job_id}")
+            return True
+        return bool(row and row['cancel_requested'])
+
+    def finish(self, job_id: str, worker_id: str, status: str, result: Any = None,
+               error: Optional[str] = None) -> bool:
+        """结束任务（仅持有租约的工作进程可以结束）"""
+        if status not in TERMINAL_STATUSES:
+            raise ValueError(f"无效的结束状态: {status}")
+        conn = self._connect()
+        try:
+            cursor = conn.execute(
+                "UPDATE background_jobs SET status = ?, result = ?, error = ?, finished_at = ?, "
+                "progress = CASE WHEN ? = 'succeeded' THEN 100 ELSE progress END, lease_expires_at = NULL "
+                "WHERE job_id = ? AND worker_id = ? AND status = 'running'",
+                (status, json.dumps(result, ensure_ascii=False, default=str) if result is not None else None,
+                 error, time.time(), status, job_id, worker_id)
+            )
+            conn.commit()
+            return cursor.rowcount > 0
+        finally:
+            conn.close()
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        取消任务：排队中的直接取消，运行中的置取消标记
+
+        Returns:
+            任务是否处于可取消状态
+        """
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            cursor = conn.execute(
+                "UPDATE background_jobs SET status = 'cancelled', finished_at = ? "
+                "WHERE job_id = ? AND status = 'queued'",
+                (time.time(), job_id)
+            )
+            if cursor.rowcount == 0:
+                cursor = conn.execute(
+                    "UPDATE background_jobs SET cancel_requested = 1 WHERE job_id = ? AND status = 'running'",
+                    (job_id,)
+                )
+            conn.commit()
+            return cursor.rowcount > 0
+        finally:
+            conn.close()
+
+    def cancel_by_key(self, job_key: str) -> bool:
+        """取消业务键对应的排队/运行中任务"""
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT job_id FROM background_jobs WHERE job_key = ? AND status IN ('queued', 'running')",
+                (job_key,)
+            ).fetchone()
+        finally:
+            conn.close()
+        return self.cancel(row['job_id']) if row else False
+
+    def recover_expired(self) -> int:
+        """
+        回收租约过期的任务（工作进程崩溃/被杀）
+
+        未超过最大执行次数且未请求取消的任务重新排队，其余标记为失败/已取消。
+
+        Returns:
+            回收的任务数
+        """
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            rows = conn.execute(
+                "SELECT job_id, attempts, max_attempts, cancel_requested FROM background_jobs "
+                "WHERE status = 'running' AND lease_expires_at < ?",
+                (now,)
+            ).fetchall()
+            for row in rows:
+                if row['cancel_requested']:
+                    conn.execute(
+                        "UPDATE background_jobs SET status = 'cancelled', finished_at = ?, lease_expires_at = NULL "
+                        "WHERE job_id = ?", (now, row['job_id'])
+                    )
+                elif row['attempts'] < row['max_attempts']:
+                    conn.execute(
+                        "UPDATE background_jobs SET status = 'queued', worker_id = NULL, lease_expires_at = NULL "
+                        "WHERE job_id = ?", (row['job_id'],)
+                    )
+                else:
+                    conn.execute(
+                        "UPDATE background_jobs SET status = 'failed', error = ?, finished_at = ?, "
+                        "lease_expires_at = NULL WHERE job_id = ?",
+                        ('工作进程失去响应（租约过期）', now, row['job_id'])
+                    )
+            conn.commit()
+        finally:
+            conn.close()
+
+        if rows:
+            logger.warning(f"回收租约过期的任务 {len(rows)} 个")
+        return len(rows)
+
+    def purge_finished(self, older_than_days: float = RETENTION_DAYS) -> int:
+        """删除结束超过指定天数的任务"""
+        conn = self._connect()
+        try:
+            cursor = conn.execute(
+                "DELETE FROM background_jobs WHERE status IN ('succeeded', 'failed', 'cancelled') "
+                "AND finished_at < ?",
+                (time.time() - older_than_days * 86400,)
+            )
+            conn.commit()
+            return cursor.rowcount
+        finally:
+            conn.close()
+
+
+_queue: Optional[JobQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    """获取进程内共享的任务队列"""
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                _queue = JobQueue()
+    return _queue
+
+
+def enqueue_job(job_type: str, payload: Optional[Dict[str, Any]] = None, job_key: Optional[str] = None) -> str:
+    """入队（见 JobQueue.enqueue）"""
+    return get_job_queue().enqueue(job_type, payload, job_key)
+
+
+def get_job(job_id: str) -> Optional[Job]:
+    return get_job_queue().get(job_id)
+
+
+def cancel_job(job_id: str) -> bool:
+    return get_job_queue().cancel(job_id)
+
+
+def cancel_job_by_key(job_key: str) -> bool:
+    return get_job_queue().cancel_by_key(job_key)
+
+
+# ========== 执行 ==========
+
+class JobContext:
+    """传给处理函数的任务上下文"""
+
+    def __init__(self, job: Job):
+        self.job_id = job.job_id
+        self.job_type = job.job_type
+        self.payload = job.payload
+        self.attempt = job.attempts
+        self._progress: Optional[int] = None
+        self._message: Optional[str] = None
+        self._cancel = threading.Event()
+        self._done = threading.Event()
+
+    def report(self, progress: Optional[int] = None, message: Optional[str] = None):
+        """记录进度（随下一次心跳写入队列），并检查是否已取消"""
+        if progress is not None:
+            self._progress = int(progress)
+        if message is not None:
+            self._message = message
+        self.check_cancelled()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def check_cancelled(self):
+        """已请求取消时抛出 JobCancelled"""
+        if self._cancel.is_set():
+            raise JobCancelled(f"任务已取消: {self.job_id}")
+
+
+def _heartbeat_loop(queue: JobQueue, ctx: JobContext, worker_id: str, hard_cancel: bool):
+    """心跳线程：续租、写入进度、传递取消请求；取消超时后结束工作进程"""
+    cancel_deadline = None
+    interval = max(0.05, min(HEARTBEAT_INTERVAL, LEASE_SECONDS / 3))
+    while not ctx._done.wait(interval):
+        if queue.heartbeat(ctx.job_id, worker_id, ctx._progress, ctx._message) and not ctx._cancel.is_set():
+            logger.info(f"收到取消请求: {ctx.job_id}")
+            ctx._cancel.set()
+            cancel_deadline = time.monotonic() + CANCEL_GRACE
+
+        if hard_cancel and cancel_deadline is not None and time.monotonic() > cancel_deadline \
+                and not ctx._done.is_set():
+            logger.warning(f"任务取消超时，结束工作进程: {ctx.job_id}")
+            queue.finish(ctx.job_id, worker_id, 'cancelled', error='取消超时，工作进程已终止')
+            os._exit(1)
+
+
+def run_job(queue: JobQueue, job: Job, worker_id: str, hard_cancel: bool = False) -> str:
+    """
+    执行一个已领取的任务
+
+    Args:
+        queue: 任务队列
+        job: claim() 返回的任务
+        worker_id: 工作进程ID
+        hard_cancel: 取消超时后是否结束当前进程（仅工作进程中启用）
+
+    Returns:
+        结束状态
+    """
+    ctx = JobContext(job)
+    heartbeat = threading.Thread(target=_heartbeat_loop, args=(queue, ctx, worker_id, hard_cancel),
+                                 name=f"job-heartbeat-{job.job_id[:8]}", daemon=True)
+    heartbeat.start()
+    started = time.monotonic()
+    status, result, error = 'succeeded', None, None
+    try:
+        result = _resolve_handler(job.job_type)(ctx)
+    except JobCancelled:
+        status = 'cancelled'
+    except Exception as e:
+        logger.error(f"任务执行失败: {job.job_type} {job.job_id}: {e}", exc_info=True)
+        status, error = 'failed', str(e)
+    finally:
+        ctx._done.set()
+        heartbeat.join()
+
+    queue.finish(job.job_id, worker_id, status, result=result, error=error)
+    logger.info(f"任务结束: {job.job_type} {job.job_id} {status}，耗时 {time.monotonic() - started:.1f}s")
+    return status
+
+
+def worker_main(db_path: Optional[str] = None, worker_id: Optional[str] = None):
+    """工作进程主循环：领取并执行任务，直到收到 SIGTERM/SIGINT 或父进程退出"""
+    worker_id = worker_id or f"{os.uname().nodename if hasattr(os, 'uname') else 'local'}:{os.getpid()}"
+    queue = JobQueue(db_path)
+    stopping = threading.Event()
+    parent_pid = os.getppid()
+
+    def stop(signum, frame):
+        stopping.set()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    logger.info(f"工作进程启动: {worker_id}")
+    while not stopping.is_set():
+        if os.getppid() != parent_pid:
+            logger.warning("进程池已退出，工作进程结束")
+            break
+        job = queue.claim(worker_id)
+        if job is None:
+            stopping.wait(POLL_INTERVAL)
+            continue
+        run_job(queue, job, worker_id, hard_cancel=True)
+    logger.info(f"工作进程退出: {worker_id}")
+
+
+class JobWorkerPool:
+    """
+    工作进程池
+
+    拉起 workers 个工作进程（独立解释器，不与 Web 进程共享 GIL 和内存），
+    监控线程负责重启退出的进程、回收租约过期的任务并清理过期记录。
+    """
+
+    def __init__(self, db_path: Optional[str] = None, workers: int = WORKERS):
+        self.db_path = str(db_path or JOB_QUEUE_DB_PATH)
+        self.workers = max(1, workers)
+        self.queue = JobQueue(self.db_path)
+        self._processes: List[Optional[subprocess.Popen]] = [None] * self.workers
+        self._stopping = threading.Event()
+        self._monitor: Optional[threading.Thread] = None
+        # gunicorn --preload 时子进程会继承本对象与 atexit 登记，只有创建者可以停止进程池
+        self._owner_pid = os.getpid()
+
+    def _spawn(self, index: int) -> subprocess.Popen:
+        env = dict(os.environ)
+        paths = [str(SYSTEM_ROOT), str(SYSTEM_ROOT.parent)]
+        if env.get('PYTHONPATH'):
+            paths.append(env['PYTHONPATH'])
+        env['PYTHONPATH'] = os.pathsep.join(paths)
+        env['JOB_QUEUE_DB_PATH'] = self.db_path
+        return subprocess.Popen(
+            [sys.executable, '-m', WORKER_MODULE, '--worker'],
+            cwd=str(SYSTEM_ROOT), env=env
+        )
+
+    def start(self):
+        for i in range(self.workers):
+            self._processes[i] = self._spawn(i)
+        self._monitor = threading.Thread(target=self._monitor_loop, name="job-pool-monitor", daemon=True)
+        self._monitor.start()
+        logger.info(f"后台任务进程池已启动: {self.workers} 个工作进程, 队列 {self.db_path}")
+
+    def _monitor_loop(self):
+        last_purge = 0.0
+        while not self._stopping.wait(max(0.1, min(HEARTBEAT_INTERVAL, LEASE_SECONDS / 3))):
+            for i, process in enumerate(self._processes):
+                if process is not None and process.poll() is not None and not self._stopping.is_set():
+                    logger.warning(f"工作进程 {process.pid} 已退出（{process.returncode}），重新启动")
+                    self._processes[i] = self._spawn(i)
+            try:
+                self.queue.recover_expired()
+                if time.time() - last_purge > 3600:
+                    self.queue.purge_finished()
+                    last_purge = time.time()
+            except sqlite3.Error as e:
+                logger.warning(f"任务队列维护失败: {e}")
+
+    def stop(self, timeout: float = 10.0):
+        """停止进程池：通知工作进程在当前任务结束后退出，超时则强制结束"""
+        if os.getpid() != self._owner_pid:
+            return
+        self._stopping.set()
+        for process in self._processes:
+            if process is not None and process.poll() is None:
+                process.terminate()
+        deadline = time.monotonic() + timeout
+        for process in self._processes:
+            if process is None:
+                continue
+            try:
+                process.wait(max(0.0, deadline - time.monotonic()))
+            except subprocess.TimeoutExpired:
+                process.kill()
+        if self._monitor is not None:
+            self._monitor.join(timeout=1)
+
+    def wait(self):
+        """阻塞直到进程池停止"""
+        while not self._stopping.wait(1):
+            pass
+
+
+_embedded_pool: Optional[JobWorkerPool] = None
+_embedded_lock_file = None
+
+
+def start_embedded_worker_pool() -> bool:
+    """
+    Web 应用启动时拉起进程池（JOB_WORKER_MODE=embedded）
+
+    每台机器只有取得文件锁的进程启动进程池，gunicorn 多 worker 时其余进程只入队。
+
+    Returns:
+        本进程是否启动了进程池
+    """
+    global _embedded_pool, _embedded_lock_file
+    if WORKER_MODE != 'embedded' or _embedded_pool is not None:
+        return False
+
+    try:
+        import fcntl
+    except ImportError:
+        fcntl = None
+
+    Path(JOB_QUEUE_DB_PATH).parent.mkdir(parents=True, exist_ok=True)
+    lock_file = open(f"{JOB_QUEUE_DB_PATH}.workers.lock", 'a+')
+    if fcntl is not None:
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            logger.info("后台任务进程池已由其他进程启动")
+            return False
+
+    _embedded_lock_file = lock_file
+    _embedded_pool = JobWorkerPool()
+    _embedded_pool.start()
+    atexit.register(_embedded_pool.stop)
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description='后台任务工作进程池')
+    parser.add_argument('--workers', type=int, default=WORKERS, help='工作进程数')
+    parser.add_argument('--worker', action='store_true', help='作为单个工作进程运行（由进程池调用）')
+    args = parser.parse_args()
+
+    if args.worker:
+        worker_main()
+        return
+
+    pool = JobWorkerPool(workers=args.workers)
+    signal.signal(signal.SIGTERM, lambda signum, frame: pool.stop())
+    signal.signal(signal.SIGINT, lambda signum, frame: pool.stop())
+    pool.start()
+    pool.wait()
+
+
+if __name__ == '__main__':
+    # 兼容旧的启动命令：转到 common.job_queue 这份模块执行，避免 __main__ 中出现第二份 JobCancelled
+    from common.job_queue import main as _main
+    _main()
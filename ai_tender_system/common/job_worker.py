@@ -0,0 +1,18 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+后台任务工作进程 / 进程池的命令行入口
+
+python -m common.job_queue 会把队列模块作为 __main__ 执行：工作进程里的 JobContext、JobCancelled
+属于 __main__ 这份副本，处理函数捕获的 common.job_queue.JobCancelled 是另一个类，取消的任务会被当作失败。
+因此命令行入口放在这里，只从 common.job_queue 导入并调用 main()，整个进程只有一份队列模块。
+
+运行方式：
+    cd ai_tender_system && python -m common.job_worker            # 进程池（JOB_WORKER_MODE=external）
+    cd ai_tender_system && python -m common.job_worker --worker   # 单个工作进程（由进程池调用）
+"""
+
+from common.job_queue import main
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LLM 响应缓存（内容寻址）
+
+同一标书重新处理（run_step 重跑、目录重新解析、信息提取重试、重新风险分析）时，
+大量提示词与上次完全相同。本模块按 (模型, 系统提示词, 提示词, 温度, max_tokens, 响应格式)
+的 SHA-256 缓存响应文本，命中时直接返回，不再消耗 token。
+
+- 存储：SQLite（共享连接池，WAL），默认 data/llm_cache.db
+- 过期：写入超过 TTL 的条目视为未命中，并在淘汰时删除
+- 容量：超过最大条目数时按最近访问时间（LRU）淘汰
+- 按用途启用：purpose 与 LLMClient.call 的 purpose 参数一致
+- 统计：按用途记录命中/未命中/写入次数（get_stats）
+
+配置（环境变量）：
+    LLM_CACHE_ENABLED      总开关，默认 false（需显式开启）
+    LLM_CACHE_PURPOSES     启用缓存的用途，逗号分隔；默认 *（全部用途）
+    LLM_CACHE_PATH         缓存数据库路径，默认 data/llm_cache.db
+    LLM_CACHE_TTL          过期时间（秒），默认 7 天
+    LLM_CACHE_MAX_ENTRIES  最大条目数，默认 20000
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from .config import get_config
+from .db_pool import get_pooled_connection
+from .logger import get_module_logger
+
+logger = get_module_logger("llm_cache")
+
+CACHE_ENABLED = os.getenv('LLM_CACHE_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+CACHE_PURPOSES = os.getenv('LLM_CACHE_PURPOSES', '*')
+CACHE_TTL = int(os.getenv('LLM_CACHE_TTL', str(7 * 24 * 3600)))
+CACHE_MAX_ENTRIES = int(os.getenv('LLM_CACHE_MAX_ENTRIES', '20000'))
+
+# 每写入多少条检查一次过期与容量
+EVICT_EVERY = 100
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS llm_response_cache (
+    cache_key TEXT PRIMARY KEY,
+    model TEXT,
+    purpose TEXT,
+    response TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_access REAL NOT NULL,
+    hit_count INTEGER DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_llm_cache_last_access ON llm_response_cache(last_access);
+CREATE INDEX IF NOT EXISTS idx_llm_cache_created_at ON llm_response_cache(created_at);
+"""
+
+
+def make_cache_key(model: str, prompt: str, system_prompt: Optional[str] = None,
+                   temperature: Optional[float] = None, max_tokens: Optional[int] = None,
+                   response_format: Optional[str] = None) -> str:
+    """计算缓存键（请求内容的 SHA-256）"""
+    payload = json.dumps(
+        [model, system_prompt, prompt, temperature, max_tokens, response_format],
+        ensure_ascii=False, separators=(',', ':')
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class LLMResponseCache:
+    """基于 SQLite 的 LLM 响应缓存（TTL + LRU 容量上限）"""
+
+    def __init__(self, db_path: Optional[str] = None,
+                 enabled: bool = CACHE_ENABLED,
+                 purposes: str = CACHE_PURPOSES,
+                 ttl: int = CACHE_TTL,
+                 max_entries: int = CACHE_MAX_ENTRIES):
+        """
+        Args:
+            db_path: 缓存数据库路径，None 使用 data/llm_cache.db
+            enabled: 总开关
+            purposes: 启用缓存的用途（逗号分隔，* 表示全部）
+            ttl: 过期时间（秒）
+            max_entries: 最大条目数
+        """
+        self.db_path = str(db_path or get_config().get_path('data') / 'llm_cache.db')
+        self.enabled = enabled
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+        items = {p.strip() for p in purposes.split(',') if p.strip()}
+        self._all_purposes = '*' in items
+        self._purposes: Dict[str, bool] = {p: True for p in items if p != '*'}
+
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._writes_since_evict = EVICT_EVERY  # 首次写入即检查
+        self._schema_ready = False
+
+    # ---------- 开关 ----------
+
+    def set_purpose_enabled(self, purpose: str, enabled: bool = True):
+        """运行时按用途启用/禁用缓存"""
+        with self._lock:
+            self._purposes[purpose] = enabled
+
+    def is_enabled_for(self, purpose: str) -> bool:
+        """指定用途是否使用缓存"""
+        if not self.enabled:
+            return False
+        return self._purposes.get(purpose, self._all_purposes)
+
+    # ---------- 读写 ----------
+
+    def get(self, key: str, purpose: str = '') -> Optional[str]:
+        """读取缓存（过期视为未命中），命中时刷新最近访问时间"""
+        now = time.time()
+        response = None
+        try:
+            conn = self._connect()
+            try:
+                row = conn.execute(
+                    "SELECT response FROM llm_response_cache WHERE cache_key = ? AND created_at >= ?",
+                    (key, now - self.ttl)
+                ).fetchone()
+                if row:
+                    response = row[0]
+                    conn.execute(
+                        "UPDATE llm_response_cache SET last_access = ?, hit_count = hit_count + 1 "
+                        "WHERE cache_key = ?", (now, key)
+                    )
+                    conn.commit()
+            finally:
+                conn.close()
+        except Exception as e:
+            logger.warning(f"读取LLM缓存失败: {e}")
+
+        self._count(purpose, 'hits' if response is not None else 'misses')
+        return response
+
+    def put(self, key: str, response: str, model: str = '', purpose: str = ''):
+        """写入缓存（空响应不缓存）"""
+        if not response:
+            return
+        now = time.time()
+        try:
+            conn = self._connect()
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO llm_response_cache "
+                    "(cache_key, model, purpose, response, created_at, last_access) VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, model, purpose, response, now, now)
+                )
+                conn.commit()
+
+                with self._lock:
+                    self._writes_since_evict += 1
+                    evict = self._writes_since_evict >= EVICT_EVERY
+                    if evict:
+                        self._writes_since_evict = 0
+                if evict:
+                    self._evict(conn, now)
+            finally:
+                conn.close()
+        except Exception as e:
+            logger.warning(f"写入LLM缓存失败: {e}")
+            return
+
+        self._count(purpose, 'stores')
+
+    def _evict(self, conn, now: float):
+        """删除过期条目，并按最近访问时间淘汰超出容量的条目"""
+        expired = conn.execute(
+            "DELETE FROM llm_response_cache WHERE created_at < ?", (now - self.ttl,)
+        ).rowcount
+        overflow = conn.execute(
+            "DELETE FROM llm_response_cache WHERE cache_key IN ("
+            "SELECT cache_key FROM llm_response_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,)
+        ).rowcount
+        conn.commit()
+        if expired or overflow:
+            logger.info(f"LLM缓存淘汰: 过期 {expired} 条, 超出容量 {overflow} 条")
+
+    def clear(self):
+        """清空缓存"""
+        conn = self._connect()
+        try:
+            conn.execute("DELETE FROM llm_response_cache")
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _connect(self):
+        if not self._schema_ready:
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+            conn = get_pooled_connection(self.db_path)
+            try:
+                conn.executescript(SCHEMA_SQL)
+            finally:
+                conn.close()
+            self._schema_ready = True
+        return get_pooled_connection(self.db_path)
+
+    # ---------- 统计 ----------
+
+    def _count(self, purpose: str, field: str):
+        with self._lock:
+            stats = self._stats.setdefault(purpose, {'hits': 0, 'misses': 0, 'stores': 0})
+            stats[field] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """命中统计 {'hits', 'misses', 'stores', 'hit_rate', 'by_purpose'}"""
+        with self._lock:
+            by_purpose = {p: dict(s) for p, s in self._stats.items()}
+        totals = {field: sum(s[field] for s in by_purpose.values()) for field in ('hits', 'misses', 'stores')}
+        lookups = totals['hits'] + totals['misses']
+        return {
+            **totals,
+            'hit_rate': totals['hits'] / lookups if lookups else 0.0,
+            'by_purpose': by_purpose
+        }
+
+
+_cache: Optional[LLMResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_response_cache() -> LLMResponseCache:
+    """获取进程内共享的 LLM 响应缓存"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = LLMResponseCache()
+    return _cache
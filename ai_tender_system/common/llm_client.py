@@ -3,11 +3,13 @@
 """
 统一LLM调用客户端
 支持多种大模型的统一接口调用，包括OpenAI兼容格式和联通元景大模型
+HTTP 连接按服务地址共享并保持长连接（见 http_pool），acall/acall_batch 提供 asyncio 批量调用
 """
 
+import asyncio
 import requests
 import time
-from typing import Dict, Any, Optional, List, Generator
+from typing import Dict, Any, Optional, List, Generator, Tuple
 from datetime import datetime, timedelta
 from collections import deque
 
@@ -18,6 +20,12 @@ from openai import OpenAI
 from .config import get_config
 from .logger import get_module_logger
 from .exceptions import APIError
+from .llm_cache import get_llm_response_cache, make_cache_key
+from .http_pool import http_post, get_httpx_client, get_async_httpx_client, get_http_client_pool
+from .rate_limiter import ModelRateLimiter, estimate_tokens, parse_retry_after
+from .llm_metrics import (
+    track_llm_call, track_llm_stream, note_attempt, note_usage, note_estimated_usage
+)
 
 
 class LLMClient:
@@ -88,6 +96,12 @@ class LLMClient:
         # 模型特定配置
         self.actual_model_name = self.model_config.get('model_name', model_name)
 
+        # 跨线程/进程共享的限流配额（按服务商 + 模型）
+        self.rate_limiter = ModelRateLimiter(
+            model_name, self.model_config,
+            self.azure_endpoint if model_name.startswith('azure') else self.api_endpoint
+        )
+
         # 日志显示：配置键名 → 实际模型名
         if model_name != self.actual_model_name:
             self.logger.info(f"LLM客户端初始化完成，配置: {model_name} → 实际模型: {self.actual_model_name}")
@@ -100,7 +114,9 @@ class LLMClient:
              temperature: float = 0.7,
              max_tokens: Optional[int] = None,
              max_retries: int = 3,
-             purpose: str = "LLM调用") -> str:
+             purpose: str = "LLM调用",
+             use_cache: Optional[bool] = None,
+             response_format: Optional[str] = None) -> str:
         """
         统一的LLM调用接口
 
@@ -110,7 +126,9 @@ class LLMClient:
             temperature: 温度参数
             max_tokens: 最大生成token数（None则使用默认值）
             max_retries: 最大重试次数
-            purpose: 调用目的（用于日志）
+            purpose: 调用目的（用于日志，也是响应缓存的启用维度）
+            use_cache: 是否使用响应缓存；None 按缓存配置（LLM_CACHE_ENABLED/LLM_CACHE_PURPOSES）决定
+            response_format: 输出格式（如 'json_object'，即 JSON Mode），None 不指定
 
         Returns:
             模型响应文本
@@ -118,13 +136,155 @@ class LLMClient:
         Raises:
             APIError: API调用失败
         """
+        return self.call_with_usage(prompt, system_prompt, temperature, max_tokens, max_retries,
+                                    purpose, use_cache, response_format)[0]
+
+    def call_with_usage(self,
+                        prompt: str,
+                        system_prompt: Optional[str] = None,
+                        temperature: float = 0.7,
+                        max_tokens: Optional[int] = None,
+                        max_retries: int = 3,
+                        purpose: str = "LLM调用",
+                        use_cache: Optional[bool] = None,
+                        response_format: Optional[str] = None) -> Tuple[str, Dict[str, Any]]:
+        """
+        同 call()，另返回本次调用的 token 用量（供调用方估算成本）
+
+        Returns:
+            (模型响应文本, {'prompt_tokens': int, 'completion_tokens': int, 'cached': bool})；
+            命中响应缓存时用量为 0
+        """
+        temperature, actual_max_tokens = self._resolve_params(temperature, max_tokens)
+
+        cache_key = self._cache_key(prompt, system_prompt, temperature, actual_max_tokens, purpose, use_cache,
+                                    response_format)
+        if cache_key:
+            cached = get_llm_response_cache().get(cache_key, purpose)
+            if cached is not None:
+                self.logger.info(f"{purpose} - 命中响应缓存")
+                return cached, {'prompt_tokens': 0, 'completion_tokens': 0, 'cached': True}
+
+        with track_llm_call(self.actual_model_name, purpose) as record:
+            response = self._call_model(prompt, system_prompt, temperature, actual_max_tokens, max_retries, purpose,
+                                        response_format)
+            note_estimated_usage(f"{system_prompt or ''}{prompt}", response)
+            usage = {'prompt_tokens': record.prompt_tokens, 'completion_tokens': record.completion_tokens,
+                     'cached': False}
+        if cache_key:
+            get_llm_response_cache().put(cache_key, response, model=self.actual_model_name, purpose=purpose)
+        return response, usage
+
+    async def acall(self,
+                    prompt: str,
+                    system_prompt: Optional[str] = None,
+                    temperature: float = 0.7,
+                    max_tokens: Optional[int] = None,
+                    max_retries: int = 3,
+                    purpose: str = "LLM调用",
+                    use_cache: Optional[bool] = None) -> str:
+        """
+        异步LLM调用接口（参数与 call 相同）
+
+        OpenAI兼容接口直接使用共享的 httpx.AsyncClient；联通元景、Azure 在线程池中执行同步调用。
+        """
+        temperature, actual_max_tokens = self._resolve_params(temperature, max_tokens)
+
+        cache_key = self._cache_key(prompt, system_prompt, temperature, actual_max_tokens, purpose, use_cache)
+        if cache_key:
+            cached = get_llm_response_cache().get(cache_key, purpose)
+            if cached is not None:
+                self.logger.info(f"{purpose} - 命中响应缓存")
+                return cached
+
+        with track_llm_call(self.actual_model_name, purpose):
+            if self._is_openai_compatible():
+                headers, data = self._build_openai_request(prompt, system_prompt, temperature, actual_max_tokens, purpose)
+                response = await self._amake_request(headers, data, max_retries, purpose)
+            else:
+                response = await asyncio.to_thread(
+                    self._call_model, prompt, system_prompt, temperature, actual_max_tokens, max_retries, purpose
+                )
+            note_estimated_usage(f"{system_prompt or ''}{prompt}", response)
+
+        if cache_key:
+            get_llm_response_cache().put(cache_key, response, model=self.actual_model_name, purpose=purpose)
+        return response
+
+    async def acall_batch(self,
+                          prompts: List[str],
+                          system_prompt: Optional[str] = None,
+                          concurrency: int = 8,
+                          return_exceptions: bool = False,
+                          **kwargs) -> List[Any]:
+        """
+        在同一事件循环中并发调用多个提示词
+
+        Args:
+            prompts: 提示词列表
+            system_prompt: 系统提示词（所有提示词共用）
+            concurrency: 最大并发请求数
+            return_exceptions: True 时失败的提示词返回异常对象，否则第一个异常直接抛出
+            **kwargs: 传给 acall 的其他参数（temperature、max_tokens、purpose 等）
+
+        Returns:
+            与 prompts 顺序一致的响应列表
+        """
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def run(prompt: str) -> str:
+            async with semaphore:
+                return await self.acall(prompt, system_prompt=system_prompt, **kwargs)
+
+        return await asyncio.gather(*(run(p) for p in prompts), return_exceptions=return_exceptions)
+
+    def call_batch(self, prompts: List[str], **kwargs) -> List[Any]:
+        """
+        同步代码中批量调用（内部运行一个事件循环执行 acall_batch，参数同 acall_batch）
+
+        不能在已运行的事件循环中调用，异步代码请直接 await acall_batch。
+        """
+        async def run():
+            try:
+                return await self.acall_batch(prompts, **kwargs)
+            finally:
+                await get_http_client_pool().aclose_loop_clients()
+
+        return asyncio.run(run())
+
+    def _resolve_params(self, temperature: float, max_tokens: Optional[int]):
+        """实际使用的温度与 max_tokens"""
         # 使用传入的max_tokens或默认值
         actual_max_tokens = max_tokens if max_tokens is not None else self.max_tokens
-
+        if self.model_name.startswith('shihuang') and hasattr(self, 'temperature'):
+            # 始皇API使用配置的温度参数
+            temperature = self.temperature
+        return temperature, actual_max_tokens
+
+    def _cache_key(self, prompt: str, system_prompt: Optional[str], temperature: float,
+                   max_tokens: int, purpose: str, use_cache: Optional[bool],
+                   response_format: Optional[str] = None) -> Optional[str]:
+        """需要使用响应缓存时返回缓存键，否则返回 None"""
+        if use_cache is None:
+            use_cache = get_llm_response_cache().is_enabled_for(purpose)
+        if not use_cache:
+            return None
+        return make_cache_key(self.actual_model_name, prompt, system_prompt, temperature, max_tokens,
+                              response_format)
+
+    def _is_openai_compatible(self) -> bool:
+        """是否走 OpenAI 兼容的 HTTP 接口（_make_request）"""
+        return not (self.model_name.startswith('unicom') or self.model_name.startswith('yuanjing')
+                    or self.model_name.startswith('azure'))
+
+    def _call_model(self, prompt: str, system_prompt: Optional[str], temperature: float,
+                    actual_max_tokens: int, max_retries: int, purpose: str,
+                    response_format: Optional[str] = None) -> str:
+        """按模型类型分发调用（不经过响应缓存）"""
         if self.model_name.startswith('unicom') or self.model_name.startswith('yuanjing'):
             try:
                 return self._call_unicom_yuanjing(
-                    prompt, system_prompt, temperature, actual_max_tokens, max_retries, purpose
+                    prompt, system_prompt, temperature, actual_max_tokens, max_retries, purpose, response_format
                 )
             except APIError as e:
                 # 如果联通元景API不可用，尝试使用默认的OpenAI兼容API作为fallback
@@ -139,22 +299,16 @@ class LLMClient:
         elif self.model_name.startswith('azure'):
             # Azure OpenAI使用专用方法
             return self._call_azure_openai(
-                prompt, system_prompt, temperature, actual_max_tokens, max_retries, purpose
+                prompt, system_prompt, temperature, actual_max_tokens, max_retries, purpose, response_format
             )
         elif self.model_name.startswith('deepseek'):
             # DeepSeek 官方 API 使用 OpenAI 兼容格式
             return self._call_openai_compatible(
-                prompt, system_prompt, temperature, actual_max_tokens, max_retries, purpose
-            )
-        elif self.model_name.startswith('shihuang'):
-            # 始皇API使用OpenAI兼容格式，但使用配置的温度参数
-            actual_temperature = self.temperature if hasattr(self, 'temperature') else temperature
-            return self._call_openai_compatible(
-                prompt, system_prompt, actual_temperature, actual_max_tokens, max_retries, purpose
+                prompt, system_prompt, temperature, actual_max_tokens, max_retries, purpose, response_format
             )
         else:
             return self._call_openai_compatible(
-                prompt, system_prompt, temperature, actual_max_tokens, max_retries, purpose
+                prompt, system_prompt, temperature, actual_max_tokens, max_retries, purpose, response_format
             )
 
     def call_stream(self,
@@ -181,6 +335,16 @@ class LLMClient:
         Raises:
             APIError: API调用失败
         """
+        # 记录首 token 时间与总耗时
+        yield from track_llm_stream(
+            self.actual_model_name, purpose,
+            self._stream_chunks(prompt, system_prompt, temperature, max_tokens, purpose, timeout),
+            prompt_text=f"{system_prompt or ''}{prompt}"
+        )
+
+    def _stream_chunks(self, prompt: str, system_prompt: Optional[str], temperature: float,
+                       max_tokens: Optional[int], purpose: str, timeout: int) -> Generator[str, None, None]:
+        """流式调用的实际实现（参数同 call_stream）"""
         actual_max_tokens = max_tokens if max_tokens is not None else self.max_tokens
 
         self.logger.info(f"{purpose} - 使用流式生成，超时设置: {timeout}秒")
@@ -202,7 +366,8 @@ class LLMClient:
                     api_key=self.api_key,
                     azure_endpoint=self.azure_endpoint,
                     api_version=self.api_version,
-                    timeout=httpx.Timeout(timeout, connect=10.0)  # 添加超时保护
+                    timeout=httpx.Timeout(timeout, connect=10.0),  # 添加超时保护
+                    http_client=get_httpx_client(self.azure_endpoint)  # 复用长连接
                 )
 
                 messages = []
@@ -223,14 +388,15 @@ class LLMClient:
                 if supports_temp:
                     request_params['temperature'] = temperature
 
-                # 流式调用
-                stream = client.chat.completions.create(**request_params)
+                # 流式调用（生成期间占用并发配额）
+                with self.rate_limiter.slot(self._estimate_tokens(messages, actual_max_tokens)):
+                    stream = client.chat.completions.create(**request_params)
 
-                for chunk in stream:
-                    if chunk.choices and len(chunk.choices) > 0:
-                        delta = chunk.choices[0].delta
-                        if hasattr(delta, 'content') and delta.content:
-                            yield delta.content
+                    for chunk in stream:
+                        if chunk.choices and len(chunk.choices) > 0:
+                            delta = chunk.choices[0].delta
+                            if hasattr(delta, 'content') and delta.content:
+                                yield delta.content
 
                 self.logger.info(f"{purpose} - Azure流式生成完成")
                 return
@@ -246,7 +412,8 @@ class LLMClient:
             client = OpenAI(
                 api_key=self.api_key,
                 base_url=self.base_url,
-                timeout=httpx.Timeout(timeout, connect=10.0)  # 添加超时保护
+                timeout=httpx.Timeout(timeout, connect=10.0),  # 添加超时保护
+                http_client=get_httpx_client(self.base_url)  # 复用长连接
             )
 
             messages = []
@@ -269,15 +436,16 @@ class LLMClient:
             else:
                 self.logger.info(f"{purpose} - 模型 {self.model_name} 不支持自定义temperature，使用默认值")
 
-            # 流式调用
-            stream = client.chat.completions.create(**request_params)
+            # 流式调用（生成期间占用并发配额）
+            with self.rate_limiter.slot(self._estimate_tokens(messages, actual_max_tokens)):
+                stream = client.chat.completions.create(**request_params)
 
-            # 逐个yield生成的内容
-            for chunk in stream:
-                if chunk.choices and len(chunk.choices) > 0:
-                    delta = chunk.choices[0].delta
-                    if hasattr(delta, 'content') and delta.content:
-                        yield delta.content
+                # 逐个yield生成的内容
+                for chunk in stream:
+                    if chunk.choices and len(chunk.choices) > 0:
+                        delta = chunk.choices[0].delta
+                        if hasattr(delta, 'content') and delta.content:
+                            yield delta.content
 
             self.logger.info(f"{purpose} - 流式生成完成")
 
@@ -296,10 +464,25 @@ class LLMClient:
                                temperature: float = 0.7,
                                max_tokens: int = None,
                                max_retries: int = 3,
-                               purpose: str = "OpenAI兼容调用") -> str:
+                               purpose: str = "OpenAI兼容调用",
+                               response_format: Optional[str] = None) -> str:
         """
         调用OpenAI兼容格式的API
         """
+        headers, data = self._build_openai_request(prompt, system_prompt, temperature, max_tokens, purpose,
+                                                   response_format)
+        return self._make_request(
+            headers, data, max_retries, purpose, 'openai'
+        )
+
+    def _build_openai_request(self,
+                              prompt: str,
+                              system_prompt: Optional[str],
+                              temperature: float,
+                              max_tokens: Optional[int],
+                              purpose: str,
+                              response_format: Optional[str] = None):
+        """构建OpenAI兼容格式的请求头和请求体"""
         headers = {
             'Authorization': f'Bearer {self.api_key}',
             'Content-Type': 'application/json'
@@ -325,9 +508,10 @@ class LLMClient:
         else:
             self.logger.info(f"{purpose} - 模型 {self.model_name} 不支持自定义temperature，使用默认值")
 
-        return self._make_request(
-            headers, data, max_retries, purpose, 'openai'
-        )
+        if response_format:
+            data['response_format'] = {'type': response_format}
+
+        return headers, data
 
     def _call_openai_compatible_fallback(self,
                                         prompt: str,
@@ -389,8 +573,10 @@ class LLMClient:
 
     def _check_unicom_rate_limit(self) -> None:
         """
-        检查联通元景API访问频率限制
+        检查联通元景API访问频率限制（仅统计本实例的调用）
         试用账号每分钟最多调用5次
+
+        调用路径已改用跨进程共享的 self.rate_limiter，本方法保留供兼容。
         """
         now = datetime.now()
 
@@ -420,7 +606,8 @@ class LLMClient:
                           temperature: float = 0.7,
                           max_tokens: int = None,
                           max_retries: int = 3,
-                          purpose: str = "Azure OpenAI调用") -> str:
+                          purpose: str = "Azure OpenAI调用",
+                          response_format: Optional[str] = None) -> str:
         """
         调用Azure OpenAI API
         """
@@ -431,7 +618,8 @@ class LLMClient:
             client = AzureOpenAI(
                 api_key=self.api_key,
                 azure_endpoint=self.azure_endpoint,
-                api_version=self.api_version
+                api_version=self.api_version,
+                http_client=get_httpx_client(self.azure_endpoint)
             )
 
             # 构建消息格式
@@ -447,6 +635,7 @@ class LLMClient:
             for attempt in range(max_retries):
                 try:
                     self.logger.info(f"{purpose} (尝试 {attempt + 1}/{max_retries})")
+                    note_attempt()
 
                     # 构建请求参数
                     request_params = {
@@ -454,6 +643,8 @@ class LLMClient:
                         'messages': messages,
                         'max_tokens': actual_max_tokens
                     }
+                    if response_format:
+                        request_params['response_format'] = {'type': response_format}
 
                     # ✅ 仅在模型支持时添加temperature参数
                     supports_temp = self.model_config.get('supports_temperature', True)
@@ -461,11 +652,14 @@ class LLMClient:
                         request_params['temperature'] = temperature
 
                     # 调用Azure API
-                    completion = client.chat.completions.create(**request_params)
+                    with self.rate_limiter.slot(self._estimate_tokens(messages, actual_max_tokens)):
+                        completion = client.chat.completions.create(**request_params)
 
                     # 提取响应内容
                     content = completion.choices[0].message.content
+                    note_usage(getattr(completion, 'usage', None))
                     self.logger.info(f"{purpose} 成功")
+                    self.rate_limiter.succeeded()
                     return content
 
                 except Exception as e:
@@ -475,8 +669,12 @@ class LLMClient:
                     if attempt == max_retries - 1:
                         raise APIError(f"{purpose}: {error_msg}")
 
-                    # 重试前等待
-                    time.sleep(2 ** attempt)
+                    if '429' in error_msg:
+                        # 限流：暂停由共享限流器统一调度
+                        self.rate_limiter.throttled()
+                    else:
+                        # 重试前等待
+                        time.sleep(2 ** attempt)
 
         except APIError:
             raise
@@ -491,20 +689,19 @@ class LLMClient:
                              temperature: float = 0.7,
                              max_tokens: int = None,
                              max_retries: int = 3,
-                             purpose: str = "联通元景调用") -> str:
+                             purpose: str = "联通元景调用",
+                             response_format: Optional[str] = None) -> str:
         """
         调用联通元景大模型API
         使用OpenAI库调用，基于官方API文档示例
-        包含访问频率控制（试用账号每分钟5次）
+        包含访问频率控制（试用账号每分钟5次，同一账号的所有线程/进程共享）
         """
         try:
-            # 检查并控制访问频率
-            self._check_unicom_rate_limit()
-
             # 使用OpenAI客户端，按照官方示例
             client = OpenAI(
                 api_key=self.api_key,
-                base_url=self.base_url
+                base_url=self.base_url,
+                http_client=get_httpx_client(self.base_url)
             )
 
             # 构建消息格式
@@ -520,10 +717,7 @@ class LLMClient:
             for attempt in range(max_retries):
                 try:
                     self.logger.info(f"{purpose} (尝试 {attempt + 1}/{max_retries})")
-
-                    # 记录调用时间
-                    self.unicom_call_times.append(datetime.now())
-                    self.logger.debug(f"当前分钟内已调用 {len(self.unicom_call_times)}/{self.UNICOM_RATE_LIMIT} 次")
+                    note_attempt()
 
                     # 构建请求参数
                     request_params = {
@@ -531,18 +725,23 @@ class LLMClient:
                         'messages': messages,
                         'max_tokens': actual_max_tokens
                     }
+                    if response_format:
+                        request_params['response_format'] = {'type': response_format}
 
                     # ✅ 仅在模型支持时添加temperature参数
                     supports_temp = self.model_config.get('supports_temperature', True)
                     if supports_temp:
                         request_params['temperature'] = temperature
 
-                    # 调用API
-                    completion = client.chat.completions.create(**request_params)
+                    # 调用API（等待共享限流配额）
+                    with self.rate_limiter.slot(self._estimate_tokens(messages, actual_max_tokens)):
+                        completion = client.chat.completions.create(**request_params)
 
                     # 提取响应内容
                     content = completion.choices[0].message.content
+                    note_usage(getattr(completion, 'usage', None))
                     self.logger.info(f"{purpose} 成功")
+                    self.rate_limiter.succeeded()
                     return content
 
                 except Exception as e:
@@ -550,10 +749,9 @@ class LLMClient:
 
                     # 检查是否是频率限制错误
                     if '5001' in error_msg or '限流' in error_msg or '429' in error_msg:
-                        self.logger.warning(f"触发频率限制，等待60秒后重试...")
-                        time.sleep(61)  # 等待超过1分钟
-                        # 清空调用记录
-                        self.unicom_call_times.clear()
+                        self.logger.warning(f"触发频率限制，暂停60秒后重试...")
+                        # 暂停超过1分钟，同一账号的其他调用一并等待
+                        self.rate_limiter.throttled(61)
                     else:
                         self.logger.error(f"{purpose} 尝试 {attempt + 1} 失败: {error_msg}")
 
@@ -580,23 +778,34 @@ class LLMClient:
         """
         执行HTTP请求
         """
+        tokens = self._estimate_tokens(data.get('messages', []), data.get('max_tokens'))
         for attempt in range(max_retries):
+            throttled = False
             try:
                 self.logger.info(f"{purpose} (尝试 {attempt + 1}/{max_retries})")
-
-                response = requests.post(
-                    self.api_endpoint,
-                    headers=headers,
-                    json=data,
-                    timeout=self.timeout
-                )
+                note_attempt()
+
+                with self.rate_limiter.slot(tokens):
+                    response = http_post(
+                        self.api_endpoint,
+                        headers=headers,
+                        json=data,
+                        timeout=self.timeout
+                    )
 
                 if response.status_code == 200:
                     result = response.json()
                     content = self._extract_content(result, api_type)
+                    note_usage(result.get('usage') if isinstance(result, dict) else None)
                     self.logger.info(f"{purpose} 成功")
+                    self.rate_limiter.succeeded()
                     return content
                 else:
+                    if response.status_code == 429:
+                        # 限流：通知共享限流器暂停并降速，下次尝试由限流器调度
+                        throttled = True
+                        self.rate_limiter.throttled(parse_retry_after(response.headers.get('Retry-After')))
+
                     # 处理不同API的特定错误
                     error_details = self._parse_error_response(response, api_type)
                     error_msg = f"API调用失败: {response.status_code} - {error_details}"
@@ -628,9 +837,80 @@ class LLMClient:
                     raise APIError(error_msg)
 
             # 重试前等待
-            if attempt < max_retries - 1:
+            if attempt < max_retries - 1 and not throttled:
                 time.sleep(2 ** attempt)  # 指数退避
 
+    async def _amake_request(self,
+                             headers: Dict[str, str],
+                             data: Dict[str, Any],
+                             max_retries: int,
+                             purpose: str) -> str:
+        """
+        执行异步HTTP请求（OpenAI兼容格式，重试策略与 _make_request 一致）
+        """
+        import httpx
+
+        client = get_async_httpx_client(self.api_endpoint)
+        tokens = self._estimate_tokens(data.get('messages', []), data.get('max_tokens'))
+        for attempt in range(max_retries):
+            throttled = False
+            try:
+                self.logger.info(f"{purpose} (异步，尝试 {attempt + 1}/{max_retries})")
+                note_attempt()
+
+                # 等待限流配额（阻塞等待放到线程中，不占用事件循环）
+                lease_id = await asyncio.to_thread(self.rate_limiter.acquire, tokens)
+                try:
+                    response = await client.post(self.api_endpoint, headers=headers, json=data, timeout=self.timeout)
+                finally:
+                    if lease_id:
+                        await asyncio.to_thread(self.rate_limiter.release, lease_id)
+
+                if response.status_code == 200:
+                    result = response.json()
+                    content = self._extract_content(result, 'openai')
+                    note_usage(result.get('usage') if isinstance(result, dict) else None)
+                    self.logger.info(f"{purpose} 成功")
+                    self.rate_limiter.succeeded()
+                    return content
+
+                if response.status_code == 429:
+                    throttled = True
+                    self.rate_limiter.throttled(parse_retry_after(response.headers.get('Retry-After')))
+
+                error_details = self._parse_error_response(response, 'openai')
+                error_msg = f"API调用失败: {response.status_code} - {error_details}"
+                self.logger.error(error_msg)
+
+                if self._should_not_retry(response, 'openai') or attempt == max_retries - 1:
+                    raise APIError(error_msg)
+
+            except APIError:
+                raise
+
+            except httpx.TimeoutException:
+                error_msg = f"API调用超时 - {purpose}"
+                self.logger.error(error_msg)
+                if attempt == max_retries - 1:
+                    raise APIError(error_msg)
+
+            except Exception as e:
+                error_msg = f"API请求异常 - {purpose}: {str(e)}"
+                self.logger.error(error_msg)
+                if attempt == max_retries - 1:
+                    raise APIError(error_msg)
+
+            # 重试前等待
+            if attempt < max_retries - 1 and not throttled:
+                await asyncio.sleep(2 ** attempt)  # 指数退避
+
+    @staticmethod
+    def _estimate_tokens(messages: List[Dict[str, Any]], max_tokens: Optional[int]) -> int:
+        """估算一次请求消耗的 token 数（提示词 + 最大生成长度），用于 TPM 限流"""
+        prompt_tokens = sum(estimate_tokens(m.get('content') if isinstance(m.get('content'), str) else '')
+                            for m in messages)
+        return prompt_tokens + (max_tokens or 0)
+
     def _extract_content(self, result: Dict[str, Any], api_type: str) -> str:
         """
         从API响应中提取内容
@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LLM 调用指标（token 与耗时统计）
+
+成本与耗时原先分散在 TenderFilter.total_cost、RiskAnalyzerV5.total_tokens 和各模块日志中，
+无法看出一份标书处理时哪个环节占用了最多时间。本模块为每次 LLM 调用记录：
+模型、用途（purpose，即处理环节）、提示词/生成 token 数、限流排队时间、首 token 时间（流式）、
+总耗时与重试次数。
+
+- 记录：track_llm_call() / track_llm_stream() 包裹一次调用，调用内部通过 note_*() 补充信息
+  （基于 contextvars，线程池、asyncio 任务中各自独立）
+- 内存：最近 LLM_METRICS_RING_SIZE 条记录保存在环形缓冲区，用于按环节汇总 p50/p95
+- 持久化：后台线程每 LLM_METRICS_FLUSH_INTERVAL 秒批量写入 system_metrics 表
+  （component = "llm/<用途>"，metric_name = "<指标>:<模型>"）
+- 查询：get_summary() 汇总内存记录，summarize_metric_rows() 汇总 system_metrics 中的历史数据
+
+配置（环境变量）：
+    LLM_METRICS_ENABLED         总开关，默认 true
+    LLM_METRICS_RING_SIZE       内存保留的最近调用数，默认 5000
+    LLM_METRICS_FLUSH_INTERVAL  写入 system_metrics 的间隔（秒），默认 30；0 表示不持久化
+"""
+
+import atexit
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .logger import get_module_logger
+
+logger = get_module_logger("llm_metrics")
+
+METRICS_ENABLED = os.getenv('LLM_METRICS_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+RING_SIZE = int(os.getenv('LLM_METRICS_RING_SIZE', '5000'))
+FLUSH_INTERVAL = float(os.getenv('LLM_METRICS_FLUSH_INTERVAL', '30'))
+
+COMPONENT_PREFIX = 'llm/'
+
+# 写入 system_metrics 的指标及单位
+METRIC_UNITS = {
+    'latency': 'seconds',
+    'queue_wait': 'seconds',
+    'ttft': 'seconds',
+    'prompt_tokens': 'count',
+    'completion_tokens': 'count',
+    'retries': 'count',
+    'error': 'count',
+}
+
+
+@dataclass
+class LLMCallRecord:
+    """单次 LLM 调用的指标"""
+    model: str
+    purpose: str
+    started_at: float = field(default_factory=time.time)
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    queue_wait: float = 0.0
+    ttft: Optional[float] = None
+    latency: float = 0.0
+    attempts: int = 0
+    success: bool = True
+    streamed: bool = False
+    tokens_estimated: bool = False
+    _start: float = field(default_factory=time.monotonic, repr=False)
+
+    @property
+    def retries(self) -> int:
+        return max(0, self.attempts - 1)
+
+    def metric_values(self) -> List[Tuple[str, float]]:
+        """按 METRIC_UNITS 展开的 (指标, 值) 列表"""
+        values = [
+            ('latency', self.latency),
+            ('queue_wait', self.queue_wait),
+            ('prompt_tokens', self.prompt_tokens),
+            ('completion_tokens', self.completion_tokens),
+            ('retries', self.retries),
+        ]
+        if self.ttft is not None:
+            values.append(('ttft', self.ttft))
+        if not self.success:
+            values.append(('error', 1))
+        return values
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data.pop('_start')
+        data['retries'] = self.retries
+        return data
+
+
+_current: ContextVar[Optional[LLMCallRecord]] = ContextVar('llm_call_record', default=None)
+
+
+# ---------- 调用内部补充信息 ----------
+
+def current_call() -> Optional[LLMCallRecord]:
+    """当前正在记录的调用（不在 track_llm_call 内时为 None）"""
+    return _current.get()
+
+
+def note_attempt():
+    """记录一次请求尝试（重试次数 = 尝试次数 - 1）"""
+    record = _current.get()
+    if record is not None:
+        record.attempts += 1
+
+
+def note_queue_wait(seconds: float):
+    """累加限流排队时间"""
+    record = _current.get()
+    if record is not None:
+        record.queue_wait += seconds
+
+
+def note_usage(usage: Any):
+    """记录接口返回的 token 用量（dict 或 SDK 的 usage 对象）"""
+    record = _current.get()
+    if record is None or not usage:
+        return
+    if isinstance(usage, dict):
+        prompt, completion = usage.get('prompt_tokens'), usage.get('completion_tokens')
+    else:
+        prompt, completion = getattr(usage, 'prompt_tokens', None), getattr(usage, 'completion_tokens', None)
+    if isinstance(prompt, int) and isinstance(completion, int):
+        record.prompt_tokens += prompt
+        record.completion_tokens += completion
+
+
+def note_estimated_usage(prompt_text: str, completion_text: Optional[str]):
+    """接口未返回用量时按文本长度估算"""
+    record = _current.get()
+    if record is None or record.prompt_tokens or record.completion_tokens:
+        return
+    from .rate_limiter import estimate_tokens
+    record.prompt_tokens = estimate_tokens(prompt_text)
+    record.completion_tokens = estimate_tokens(completion_text or '')
+    record.tokens_estimated = True
+
+
+# ---------- 记录一次调用 ----------
+
+@contextmanager
+def track_llm_call(model: str, purpose: str):
+    """
+    记录一次 LLM 调用（嵌套调用合并到外层记录，例如流式调用降级为普通调用）
+
+    关闭指标（LLM_METRICS_ENABLED=false）时仍收集本次调用的用量供调用方使用，只是不保存。
+
+    Yields:
+        LLMCallRecord
+    """
+    outer = _current.get()
+    if outer is not None:
+        yield outer
+        return
+
+    record = LLMCallRecord(model, purpose)
+    token = _current.set(record)
+    try:
+        yield record
+    except BaseException:
+        record.success = False
+        raise
+    finally:
+        record.latency = time.monotonic() - record._start
+        _current.reset(token)
+        if METRICS_ENABLED:
+            get_llm_metrics().record(record)
+
+
+def track_llm_stream(model: str, purpose: str, chunks: Iterator[str], prompt_text: str = '') -> Iterator[str]:
+    """
+    记录一次流式调用：首个片段到达时记录 ttft，结束（或中途关闭）时记录总耗时
+
+    仅在推进内层生成器时激活记录，生成器挂起期间调用方的其他 LLM 调用不会并入本记录。
+    """
+    if not METRICS_ENABLED:
+        yield from chunks
+        return
+
+    record = LLMCallRecord(model, purpose, streamed=True)
+    pieces: List[str] = []
+    try:
+        while True:
+            token = _current.set(record)
+            try:
+                piece = next(chunks)
+            except StopIteration:
+                break
+            finally:
+                _current.reset(token)
+            if record.ttft is None:
+                record.ttft = time.monotonic() - record._start
+            pieces.append(piece)
+            yield piece
+    except BaseException as e:
+        if not isinstance(e, GeneratorExit):
+            record.success = False
+        raise
+    finally:
+        record.latency = time.monotonic() - record._start
+        record.attempts = max(record.attempts, 1)
+        token = _current.set(record)
+        try:
+            note_estimated_usage(prompt_text, ''.join(pieces))
+        finally:
+            _current.reset(token)
+        get_llm_metrics().record(record)
+
+
+# ---------- 汇总 ----------
+
+def _percentile(values: List[float], q: float) -> float:
+    """线性插值百分位数"""
+    ordered = sorted(values)
+    pos = (len(ordered) - 1) * q
+    low = int(pos)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (pos - low)
+
+
+def _summarize(samples: Dict[str, Dict[str, List[float]]]) -> List[Dict[str, Any]]:
+    """{用途: {指标: [值]}} -> 按总耗时降序的环节汇总"""
+    stages = []
+    for purpose, metrics in samples.items():
+        stage: Dict[str, Any] = {
+            'purpose': purpose,
+            'calls': len(metrics.get('latency', [])),
+            'errors': int(sum(metrics.get('error', []))),
+        }
+        for name, values in metrics.items():
+            if name == 'error' or not values:
+                continue
+            stage[name] = {
+                'total': round(sum(values), 3),
+                'p50': round(_percentile(values, 0.5), 3),
+                'p95': round(_percentile(values, 0.95), 3),
+            }
+        stages.append(stage)
+
+    wall_total = sum(s.get('latency', {}).get('total', 0) for s in stages)
+    for stage in stages:
+        latency_total = stage.get('latency', {}).get('total', 0)
+        stage['wall_share'] = round(latency_total / wall_total, 3) if wall_total else 0.0
+    stages.sort(key=lambda s: s.get('latency', {}).get('total', 0), reverse=True)
+    return stages
+
+
+def summarize_metric_rows(rows: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    汇总 system_metrics 中的 LLM 指标行
+
+    Args:
+        rows: 含 component / metric_name / metric_value 的记录
+    """
+    samples: Dict[str, Dict[str, List[float]]] = {}
+    for row in rows:
+        component = row.get('component') or ''
+        if not component.startswith(COMPONENT_PREFIX):
+            continue
+        purpose = component[len(COMPONENT_PREFIX):]
+        name = (row.get('metric_name') or '').split(':', 1)[0]
+        samples.setdefault(purpose, {}).setdefault(name, []).append(row.get('metric_value') or 0)
+    return _summarize(samples)
+
+
+class LLMMetricsCollector:
+    """LLM 调用指标的内存环形缓冲区 + 定期写入 system_metrics"""
+
+    def __init__(self, ring_size: int = RING_SIZE, flush_interval: float = FLUSH_INTERVAL, db=None):
+        """
+        Args:
+            ring_size: 内存保留的最近调用数（待写入队列同样以此为上限）
+            flush_interval: 写入间隔（秒），0 表示不持久化
+            db: KnowledgeBaseDB 实例，None 时使用全局实例
+        """
+        self.flush_interval = flush_interval
+        self._db = db
+        self._lock = threading.Lock()
+        self._ring: deque = deque(maxlen=ring_size)
+        self._pending: deque = deque(maxlen=ring_size)
+        self._flusher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def record(self, record: LLMCallRecord):
+        """保存一次调用记录"""
+        with self._lock:
+            self._ring.append(record)
+            if self.flush_interval > 0:
+                self._pending.append(record)
+                if self._flusher is None or not self._flusher.is_alive():
+                    self._start_flusher()
+
+    def _start_flusher(self):
+        self._stop.clear()
+        self._flusher = threading.Thread(target=self._flush_loop, name='llm-metrics-flush', daemon=True)
+        self._flusher.start()
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def flush(self) -> int:
+        """将待写入的记录批量写入 system_metrics，返回写入的记录数"""
+        with self._lock:
+            records = list(self._pending)
+            self._pending.clear()
+        if not records:
+            return 0
+
+        rows = [
+            (f"{name}:{rec.model}", float(value), METRIC_UNITS[name], f"{COMPONENT_PREFIX}{rec.purpose}")
+            for rec in records for name, value in rec.metric_values()
+        ]
+        try:
+            db = self._db
+            if db is None:
+                from .database import get_knowledge_base_db
+                db = get_knowledge_base_db()
+            db.record_system_metrics(rows)
+        except Exception as e:
+            # 指标丢失不影响业务，只记录告警
+            logger.warning(f"写入LLM调用指标失败（丢弃 {len(records)} 条）: {e}")
+            return 0
+        return len(records)
+
+    def close(self):
+        """停止后台线程并写入剩余记录"""
+        self._stop.set()
+        self.flush()
+
+    def get_recent(self, limit: int = 100, purpose: Optional[str] = None) -> List[Dict[str, Any]]:
+        """最近的调用记录（新的在前）"""
+        with self._lock:
+            records = list(self._ring)
+        if purpose:
+            records = [r for r in records if r.purpose == purpose]
+        return [r.to_dict() for r in reversed(records[-limit:])]
+
+    def get_summary(self, purpose: Optional[str] = None, since: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        按环节（purpose）汇总内存中的调用：调用数、失败数、各指标 total/p50/p95、耗时占比
+
+        Args:
+            purpose: 只汇总指定环节
+            since: 只汇总该时间戳（time.time()）之后开始的调用
+        """
+        with self._lock:
+            records = list(self._ring)
+
+        samples: Dict[str, Dict[str, List[float]]] = {}
+        models: Dict[str, set] = {}
+        for rec in records:
+            if (purpose and rec.purpose != purpose) or (since and rec.started_at < since):
+                continue
+            metrics = samples.setdefault(rec.purpose, {})
+            for name, value in rec.metric_values():
+                metrics.setdefault(name, []).append(value)
+            models.setdefault(rec.purpose, set()).add(rec.model)
+
+        stages = _summarize(samples)
+        for stage in stages:
+            stage['models'] = sorted(models.get(stage['purpose'], ()))
+        return stages
+
+
+_metrics: Optional[LLMMetricsCollector] = None
+_metrics_lock = threading.Lock()
+
+
+def get_llm_metrics() -> LLMMetricsCollector:
+    """获取进程内共享的 LLM 指标收集器"""
+    global _metrics
+    if _metrics is None:
+        with _metrics_lock:
+            if _metrics is None:
+                _metrics = LLMMetricsCollector()
+                atexit.register(_metrics.close)
+    return _metrics
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+段落索引 - 一次构建、线性访问的 Word 段落访问层
+
+python-docx 的 doc.paragraphs 每次访问都会重新构建整个 Paragraph 列表，
+在循环中使用 doc.paragraphs[i] / len(doc.paragraphs) 会使处理变成 O(N²)。
+ParagraphIndex 对每个 Document 只遍历一次 body，预先计算：
+- 段落对象、原始文本、去空白文本、规范化文本（去除所有空白）
+- 样式名、大纲级别
+- 段落在 body 子元素中的位置（用于定位段落之间的表格）
+"""
+
+import re
+import threading
+import weakref
+from typing import List, Optional, Tuple, Iterator
+
+from docx.enum.style import WD_STYLE_TYPE
+from docx.oxml import CT_Tbl, CT_P
+from docx.text.paragraph import Paragraph
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+class ParagraphIndex:
+    """Word文档段落索引（索引与 doc.paragraphs 一致）"""
+
+    def __init__(self, doc):
+        """
+        构建段落索引
+
+        Args:
+            doc: python-docx Document 对象
+        """
+        self.doc = doc
+        self.build()
+
+    def build(self):
+        """遍历一次 body，构建全部索引数据"""
+        doc = self.doc
+        body = doc._body
+        doc_styles = doc.styles
+
+        self.paragraphs: List[Paragraph] = []
+        self.texts: List[str] = []               # 原始文本（与 paragraph.text 一致）
+        self.stripped: List[str] = []            # 去除首尾空白
+        self.normalized: List[str] = []          # 去除所有空白（re.sub(r'\s+', '', text)）
+        self.style_names: List[str] = []         # 样式名（无样式为空字符串）
+        self.outline_levels: List[Optional[int]] = []  # 大纲级别 0-8，未设置为None
+        self.body_positions: List[int] = []      # 段落在 body 子元素中的位置
+        self.table_body_positions: List[int] = []  # 表格在 body 子元素中的位置
+        self.body_elements = list(doc.element.body.iterchildren())
+
+        # 样式ID→名称缓存，避免每段都走样式查找
+        style_name_cache = {}
+
+        for body_idx, element in enumerate(self.body_elements):
+            if isinstance(element, CT_P):
+                paragraph = Paragraph(element, body)
+                text = paragraph.text
+                stripped = text.strip()
+
+                self.paragraphs.append(paragraph)
+                self.texts.append(text)
+                self.stripped.append(stripped)
+                self.normalized.append(_WHITESPACE_RE.sub('', stripped))
+                self.body_positions.append(body_idx)
+
+                pPr = element.pPr
+                style_id = pPr.style if pPr is not None else None
+                if style_id not in style_name_cache:
+                    try:
+                        style = doc_styles.get_by_id(style_id, WD_STYLE_TYPE.PARAGRAPH)
+                        style_name_cache[style_id] = style.name if style is not None and style.name else ""
+                    except Exception:
+                        style_name_cache[style_id] = ""
+                self.style_names.append(style_name_cache[style_id])
+
+                level = None
+                try:
+                    if pPr is not None and pPr.outlineLvl is not None:
+                        level = int(pPr.outlineLvl.val)
+                except (AttributeError, TypeError, ValueError):
+                    level = None
+                self.outline_levels.append(level)
+            elif isinstance(element, CT_Tbl):
+                self.table_body_positions.append(body_idx)
+
+        self._body_count = len(self.body_elements)
+
+    # ----------------------------------------------------------------
+    # 访问接口
+    # ----------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self.paragraphs)
+
+    def __getitem__(self, idx):
+        return self.paragraphs[idx]
+
+    def __iter__(self) -> Iterator[Paragraph]:
+        return iter(self.paragraphs)
+
+    def is_heading_style(self, idx: int) -> bool:
+        """段落是否使用标题样式（Heading / 标题）"""
+        style_name = self.style_names[idx].lower()
+        return 'heading' in style_name or '标题' in style_name
+
+    def body_range(self, para_start: int, para_end: Optional[int]) -> Optional[Tuple[int, int]]:
+        """
+        将段落索引范围转换为 body 子元素范围（闭区间，包含其间的表格）
+
+        Args:
+            para_start: 起始段落索引
+            para_end: 结束段落索引（None或越界表示到 body 末尾）
+
+        Returns:
+            (start_body_idx, end_body_idx)，起始段落不存在时返回None
+        """
+        if para_start is None or para_start < 0 or para_start >= len(self.paragraphs):
+            return None
+        if para_end is None or para_end >= len(self.paragraphs) or para_end < 0:
+            end_body_idx = len(self.body_elements) - 1
+        else:
+            end_body_idx = self.body_positions[para_end]
+        return self.body_positions[para_start], end_body_idx
+
+    def is_stale(self) -> bool:
+        """文档 body 结构是否已变化（插入/删除了段落或表格）"""
+        return len(self.doc.element.body) != self._body_count
+
+    # ----------------------------------------------------------------
+    # 每个 Document 共享一个索引
+    # ----------------------------------------------------------------
+
+    _registry: 'weakref.WeakKeyDictionary' = weakref.WeakKeyDictionary()
+    _registry_lock = threading.Lock()
+
+    @classmethod
+    def for_document(cls, doc) -> 'ParagraphIndex':
+        """
+        获取文档的共享段落索引（每个 Document 只构建一次，body 结构变化时自动重建）
+
+        注意：索引中的文本是构建时的快照，原地修改段落文本后如需最新文本请读取 paragraph.text
+        """
+        key = doc.element
+        with cls._registry_lock:
+            index = cls._registry.get(key)
+        if index is None or index.is_stale():
+            index = cls(doc)
+            with cls._registry_lock:
+                cls._registry[key] = index
+        return index
+
+
+def get_paragraph_index(doc) -> ParagraphIndex:
+    """便捷函数：获取文档的共享段落索引"""
+    return ParagraphIndex.for_document(doc)
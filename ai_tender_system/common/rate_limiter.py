@@ -0,0 +1,430 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LLM 调用限流（进程间共享的令牌桶）
+
+原先只有 LLMClient 实例内的联通元景调用时间队列，每个 create_llm_client() 各自计数；
+TenderFilter、RequirementExtractor、ProposalAssembler 等线程池以及多个 gunicorn worker
+同时请求同一服务商时频繁触发 429，再各自 sleep(2 ** attempt) 退避，吞吐忽高忽低。
+
+本模块按"服务商/模型"维护共享配额，状态保存在本地 SQLite（BEGIN IMMEDIATE 串行化），
+同一台机器上的所有线程和进程共用：
+- RPM：请求令牌桶，允许 LLM_RATE_BURST_SECONDS 秒的突发
+- TPM：token 令牌桶（按提示词长度 + max_tokens 估算）
+- 最大并发：租约表计数，租约超时自动回收（进程崩溃不会永久占用名额）
+- 429 自适应：收到 429 时全体暂停 Retry-After 秒并将速率减半，之后每次成功调用逐步恢复（AIMD）
+- 指标：各键的获取次数、累计等待时间、429 次数（get_stats）
+
+配额配置（优先级从高到低）：
+    LLM_RATE_LIMITS  JSON，键为模型配置名或服务地址（host），如
+                     {"deepseek-v3": {"rpm": 500, "tpm": 1000000, "max_in_flight": 16}}
+    模型配置中的 rpm / tpm / max_in_flight
+    联通元景默认每分钟 5 次（试用账号），按账号（服务地址）共享
+未配置时不限速率，获取配额不访问数据库；本进程收到 429 后，在速率恢复前按共享状态暂停。
+
+其他环境变量：
+    LLM_RATE_LIMIT_ENABLED   总开关，默认 true
+    LLM_RATE_LIMIT_PATH      状态数据库路径，默认 data/llm_rate_limit.db
+    LLM_RATE_BURST_SECONDS   令牌桶容量（秒数），默认 10
+    LLM_RATE_LEASE_TTL       并发租约超时（秒），默认 600
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+from .config import get_config
+from .db_pool import get_pooled_connection
+from .llm_metrics import note_queue_wait
+from .logger import get_module_logger
+
+logger = get_module_logger("rate_limiter")
+
+RATE_LIMIT_ENABLED = os.getenv('LLM_RATE_LIMIT_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+RATE_LIMIT_PATH = os.getenv('LLM_RATE_LIMIT_PATH', '')
+BURST_SECONDS = float(os.getenv('LLM_RATE_BURST_SECONDS', '10'))
+LEASE_TTL = float(os.getenv('LLM_RATE_LEASE_TTL', '600'))
+
+# 联通元景试用账号：每分钟 5 次
+UNICOM_DEFAULT_RPM = 5
+
+# 429 自适应：降速倍数、最低速率比例、每次成功的恢复步长
+THROTTLE_FACTOR = 0.5
+MIN_RATE_SCALE = 0.1
+RECOVERY_STEP = 0.05
+# 未指定 Retry-After 时的暂停秒数
+DEFAULT_RETRY_AFTER = 2.0
+# 等待并发名额时的轮询间隔、单次最长睡眠
+POLL_INTERVAL = 0.05
+MAX_SLEEP = 5.0
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS rate_buckets (
+    bucket_key TEXT PRIMARY KEY,
+    request_tokens REAL,
+    token_tokens REAL,
+    updated_at REAL NOT NULL,
+    rate_scale REAL NOT NULL DEFAULT 1.0,
+    blocked_until REAL NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS rate_leases (
+    lease_id TEXT PRIMARY KEY,
+    bucket_key TEXT NOT NULL,
+    pid INTEGER,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_rate_leases_key ON rate_leases(bucket_key, expires_at);
+"""
+
+
+@dataclass(frozen=True)
+class RateLimitPolicy:
+    """限流配额（0 表示不限）"""
+    rpm: float = 0
+    tpm: float = 0
+    max_in_flight: int = 0
+
+    @property
+    def unlimited(self) -> bool:
+        """是否未设置任何限制"""
+        return not (self.rpm or self.tpm or self.max_in_flight)
+
+
+class RateLimitTimeout(Exception):
+    """等待配额超时"""
+
+
+def estimate_tokens(text: Optional[str]) -> int:
+    """估算 token 数：中日韩字符约 1 token/字，其他字符约 4 字符/token"""
+    if not text:
+        return 0
+    cjk = sum(1 for ch in text if '⺀' <= ch <= '鿿' or '가' <= ch <= '힯')
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+class RateGovernor:
+    """基于 SQLite 的跨进程令牌桶 + 并发租约"""
+
+    def __init__(self, db_path: Optional[str] = None, burst_seconds: float = BURST_SECONDS,
+                 lease_ttl: float = LEASE_TTL):
+        self.db_path = str(db_path or RATE_LIMIT_PATH or get_config().get_path('data') / 'llm_rate_limit.db')
+        self.burst_seconds = burst_seconds
+        self.lease_ttl = lease_ttl
+        self._schema_ready = False
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, float]] = {}
+        # 本进程最近看到的速率比例（<1 时成功调用才需要写库恢复）
+        self._scales: Dict[str, float] = {}
+
+    # ---------- 获取 / 释放 ----------
+
+    def acquire(self, key: str, policy: RateLimitPolicy, tokens: int = 0,
+                timeout: Optional[float] = None) -> Optional[str]:
+        """
+        阻塞直到获得配额
+
+        Args:
+            key: 限流键（服务商/模型）
+            policy: 配额
+            tokens: 本次请求预计消耗的 token 数
+            timeout: 最长等待秒数（None 一直等待）
+
+        Returns:
+            并发租约ID（未限制并发时为 None），调用结束后传给 release()
+
+        Raises:
+            RateLimitTimeout: 等待超时
+        """
+        # 未设置限制且本进程未处于 429 降速中：无需排队，不访问数据库
+        if policy.unlimited and self._scales.get(key, 1.0) >= 1.0:
+            self._count(key, 'acquired', 1)
+            return None
+
+        start = time.monotonic()
+        while True:
+            wait, lease_id = self._try_acquire(key, policy, tokens)
+            if wait <= 0:
+                self._count(key, 'acquired', 1)
+                self._count(key, 'wait_seconds', time.monotonic() - start)
+                return lease_id
+
+            if timeout is not None and time.monotonic() - start + wait > timeout:
+                self._count(key, 'timeouts', 1)
+                raise RateLimitTimeout(f"等待限流配额超时: {key}")
+            time.sleep(min(wait, MAX_SLEEP))
+
+    def release(self, lease_id: Optional[str]):
+        """释放并发租约"""
+        if not lease_id:
+            return
+        try:
+            conn = self._connect()
+            try:
+                conn.execute("DELETE FROM rate_leases WHERE lease_id = ?", (lease_id,))
+                conn.commit()
+            finally:
+                conn.close()
+        except Exception as e:
+            # 释放失败时租约到期自动回收
+            logger.warning(f"释放并发租约失败: {e}")
+
+    @contextmanager
+    def slot(self, key: str, policy: RateLimitPolicy, tokens: int = 0, timeout: Optional[float] = None):
+        """获取配额的上下文管理器"""
+        lease_id = self.acquire(key, policy, tokens, timeout)
+        try:
+            yield
+        finally:
+            self.release(lease_id)
+
+    def _try_acquire(self, key: str, policy: RateLimitPolicy, tokens: int):
+        """尝试扣减配额；返回 (需等待秒数, 租约ID)"""
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.isolation_level = None
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT request_tokens, token_tokens, updated_at, rate_scale, blocked_until "
+                    "FROM rate_buckets WHERE bucket_key = ?", (key,)
+                ).fetchone()
+                scale = row[3] if row else 1.0
+                blocked_until = row[4] if row else 0.0
+
+                rpm, tpm = policy.rpm * scale, policy.tpm * scale
+                request_cap = max(1.0, rpm * self.burst_seconds / 60)
+                token_cap = max(float(tokens), tpm * self.burst_seconds / 60)
+                elapsed = max(0.0, now - row[2]) if row else 0.0
+                request_tokens = request_cap if row is None or row[0] is None else \
+                    min(request_cap, row[0] + elapsed * rpm / 60)
+                token_tokens = token_cap if row is None or row[1] is None else \
+                    min(token_cap, row[1] + elapsed * tpm / 60)
+
+                wait = max(0.0, blocked_until - now)
+                if rpm and request_tokens < 1:
+                    wait = max(wait, (1 - request_tokens) * 60 / rpm)
+                if tpm and token_tokens < tokens:
+                    wait = max(wait, (tokens - token_tokens) * 60 / tpm)
+
+                lease_id = None
+                if policy.max_in_flight:
+                    conn.execute("DELETE FROM rate_leases WHERE expires_at < ?", (now,))
+                    in_flight = conn.execute(
+                        "SELECT COUNT(*) FROM rate_leases WHERE bucket_key = ?", (key,)
+                    ).fetchone()[0]
+                    if in_flight >= policy.max_in_flight:
+                        wait = max(wait, POLL_INTERVAL)
+
+                if wait <= 0:
+                    if rpm:
+                        request_tokens -= 1
+                    if tpm:
+                        token_tokens -= tokens
+                    if policy.max_in_flight:
+                        lease_id = uuid.uuid4().hex
+                        conn.execute(
+                            "INSERT INTO rate_leases (lease_id, bucket_key, pid, expires_at) VALUES (?, ?, ?, ?)",
+                            (lease_id, key, os.getpid(), now + self.lease_ttl)
+                        )
+
+                conn.execute(
+                    "INSERT OR REPLACE INTO rate_buckets "
+                    "(bucket_key, request_tokens, token_tokens, updated_at, rate_scale, blocked_until) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, request_tokens, token_tokens, now, scale, blocked_until)
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        finally:
+            conn.close()
+
+        self._scales[key] = scale
+        return wait, lease_id
+
+    # ---------- 429 自适应 ----------
+
+    def report_throttled(self, key: str, retry_after: Optional[float] = None):
+        """收到 429：全体暂停 retry_after 秒，速率减半"""
+        pause = retry_after if retry_after and retry_after > 0 else DEFAULT_RETRY_AFTER
+        now = time.time()
+        self._count(key, 'throttled', 1)
+        try:
+            conn = self._connect()
+            try:
+                conn.execute(
+                    "INSERT INTO rate_buckets (bucket_key, updated_at, rate_scale, blocked_until) "
+                    "VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(bucket_key) DO UPDATE SET "
+                    "rate_scale = MAX(?, rate_scale * ?), blocked_until = MAX(blocked_until, ?), request_tokens = 0",
+                    (key, now, THROTTLE_FACTOR, now + pause, MIN_RATE_SCALE, THROTTLE_FACTOR, now + pause)
+                )
+                conn.commit()
+            finally:
+                conn.close()
+        except Exception as e:
+            logger.warning(f"记录限流状态失败: {e}")
+        self._scales[key] = THROTTLE_FACTOR
+        logger.warning(f"{key} 触发限流(429)，暂停 {pause:.1f} 秒并降低请求速率")
+
+    def report_success(self, key: str):
+        """调用成功：降速后逐步恢复速率"""
+        if self._scales.get(key, 1.0) >= 1.0:
+            return
+        try:
+            conn = self._connect()
+            try:
+                conn.execute(
+                    "UPDATE rate_buckets SET rate_scale = MIN(1.0, rate_scale + ?) WHERE bucket_key = ?",
+                    (RECOVERY_STEP, key)
+                )
+                conn.commit()
+                row = conn.execute("SELECT rate_scale FROM rate_buckets WHERE bucket_key = ?", (key,)).fetchone()
+            finally:
+                conn.close()
+            self._scales[key] = row[0] if row else 1.0
+        except Exception as e:
+            logger.warning(f"更新限流状态失败: {e}")
+
+    # ---------- 指标 ----------
+
+    def _count(self, key: str, field: str, value: float):
+        with self._lock:
+            stats = self._stats.setdefault(key, {'acquired': 0, 'wait_seconds': 0.0, 'throttled': 0, 'timeouts': 0})
+            stats[field] += value
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """各限流键的本进程计数及共享状态（速率比例、暂停剩余秒数、当前并发）"""
+        with self._lock:
+            stats = {key: dict(values) for key, values in self._stats.items()}
+        try:
+            now = time.time()
+            conn = self._connect()
+            try:
+                for key, scale, blocked_until in conn.execute(
+                        "SELECT bucket_key, rate_scale, blocked_until FROM rate_buckets"):
+                    entry = stats.setdefault(key, {})
+                    entry['rate_scale'] = scale
+                    entry['blocked_seconds'] = max(0.0, blocked_until - now)
+                for key, count in conn.execute(
+                        "SELECT bucket_key, COUNT(*) FROM rate_leases WHERE expires_at >= ? GROUP BY bucket_key",
+                        (now,)):
+                    stats.setdefault(key, {})['in_flight'] = count
+            finally:
+                conn.close()
+        except Exception as e:
+            logger.warning(f"读取限流状态失败: {e}")
+        return stats
+
+    def _connect(self):
+        if not self._schema_ready:
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+            conn = get_pooled_connection(self.db_path)
+            try:
+                conn.executescript(SCHEMA_SQL)
+            finally:
+                conn.close()
+            self._schema_ready = True
+        return get_pooled_connection(self.db_path)
+
+
+_governor: Optional[RateGovernor] = None
+_governor_lock = threading.Lock()
+
+
+def get_rate_governor() -> RateGovernor:
+    """获取进程内共享的限流器"""
+    global _governor
+    if _governor is None:
+        with _governor_lock:
+            if _governor is None:
+                _governor = RateGovernor()
+    return _governor
+
+
+def _configured_limits() -> Dict[str, Dict[str, Any]]:
+    raw = os.getenv('LLM_RATE_LIMITS', '')
+    if not raw:
+        return {}
+    try:
+        return json.loads(raw)
+    except ValueError as e:
+        logger.warning(f"LLM_RATE_LIMITS 解析失败，忽略: {e}")
+        return {}
+
+
+class ModelRateLimiter:
+    """单个模型（服务商地址 + 模型）的限流入口"""
+
+    def __init__(self, model_name: str, model_config: Dict[str, Any], endpoint: str):
+        model_config = model_config if isinstance(model_config, dict) else {}
+        host = urlsplit(endpoint or '').netloc.lower() or 'unknown'
+        is_unicom = model_name.startswith('unicom') or model_name.startswith('yuanjing')
+        actual_model = model_config.get('model_name', model_name)
+
+        # 联通元景按账号限流，其余按服务商 + 模型
+        self.key = host if is_unicom else f"{host}/{actual_model}"
+        self.enabled = RATE_LIMIT_ENABLED
+
+        limits = _configured_limits()
+        settings = limits.get(model_name) or limits.get(host) or model_config
+        self.policy = RateLimitPolicy(
+            rpm=float(settings.get('rpm') or (UNICOM_DEFAULT_RPM if is_unicom else 0)),
+            tpm=float(settings.get('tpm') or 0),
+            max_in_flight=int(settings.get('max_in_flight') or 0)
+        )
+
+    @contextmanager
+    def slot(self, tokens: int = 0):
+        """占用一次调用配额（请求期间计入并发）"""
+        if not self.enabled:
+            yield
+            return
+        governor = get_rate_governor()
+        start = time.monotonic()
+        lease_id = governor.acquire(self.key, self.policy, tokens)
+        note_queue_wait(time.monotonic() - start)
+        try:
+            yield
+        finally:
+            governor.release(lease_id)
+
+    def acquire(self, tokens: int = 0) -> Optional[str]:
+        """获取配额（异步代码在线程中调用），返回租约ID"""
+        if not self.enabled:
+            return None
+        start = time.monotonic()
+        lease_id = get_rate_governor().acquire(self.key, self.policy, tokens)
+        note_queue_wait(time.monotonic() - start)
+        return lease_id
+
+    def release(self, lease_id: Optional[str]):
+        if self.enabled:
+            get_rate_governor().release(lease_id)
+
+    def throttled(self, retry_after: Optional[float] = None):
+        """报告 429"""
+        if self.enabled:
+            get_rate_governor().report_throttled(self.key, retry_after)
+
+    def succeeded(self):
+        """报告调用成功"""
+        if self.enabled:
+            get_rate_governor().report_success(self.key)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """解析 Retry-After 响应头（秒数）"""
+    try:
+        return float(value) if value else None
+    except (TypeError, ValueError):
+        return None
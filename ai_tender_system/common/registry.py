@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+管理器单例注册表与一次性表结构初始化
+
+各任务/资源管理器的构造函数原本每次都执行 CREATE TABLE、ALTER TABLE 迁移等建表逻辑，
+而接口又按请求新建管理器，导致轮询接口每次都要跑一遍 DDL。这里提供两样东西：
+
+- run_once(key, func)：同一进程内对同一 key 只成功执行一次（线程安全）。
+  管理器在构造函数中以 (表名, 数据库路径) 为 key 调用建表逻辑，之后的构造不再访问数据库；
+  执行失败不记录，下次构造时重试。
+- get_instance(factory, *args)：按 (factory, args) 缓存、惰性创建的进程内单例。
+  不同 key 各自加锁创建，一个慢的构造（如加载模型）不会阻塞其他管理器的获取。
+
+bootstrap_schemas() 在应用启动时调用已注册的建表函数，把首次请求的建表开销提前；
+未注册或启动时失败的，仍会在首次构造管理器时由 run_once 兜底。
+"""
+
+import importlib
+import threading
+from typing import Any, Callable, Dict, Hashable, List, Tuple, TypeVar
+
+from .logger import get_module_logger
+
+logger = get_module_logger("registry")
+
+T = TypeVar('T')
+
+_lock = threading.Lock()
+_key_locks: Dict[Hashable, threading.Lock] = {}
+_done: set = set()
+_instances: Dict[Hashable, Any] = {}
+
+# 启动时执行的建表函数："模块路径:函数名"，函数无参数
+_bootstraps: List[Tuple[str, str]] = [
+    ('risk_analyzer', 'modules.risk_analyzer.task_manager:ensure_schema'),
+    ('response_checker', 'modules.response_checker.task_manager:ensure_schema'),
+    ('outline_generator', 'ai_tender_system.modules.outline_generator.task_manager:ensure_schema'),
+    ('resume_library', 'modules.resume_library.manager:ensure_schema'),
+]
+
+
+def _key_lock(key: Hashable) -> threading.Lock:
+    with _lock:
+        lock = _key_locks.get(key)
+        if lock is None:
+            lock = _key_locks[key] = threading.Lock()
+        return lock
+
+
+def run_once(key: Hashable, func: Callable[[], Any]) -> bool:
+    """
+    同一进程内对同一 key 只执行一次 func
+
+    Returns:
+        本次是否执行了 func（已执行过返回 False）
+    """
+    if key in _done:
+        return False
+    with _key_lock(key):
+        if key in _done:
+            return False
+        func()
+        _done.add(key)
+        return True
+
+
+def get_instance(factory: Callable[..., T], *args: Hashable) -> T:
+    """获取按 (factory, args) 缓存的单例，首次调用时以 factory(*args) 创建"""
+    key = (factory, args)
+    instance = _instances.get(key)
+    if instance is not None:
+        return instance
+    with _key_lock(key):
+        instance = _instances.get(key)
+        if instance is None:
+            instance = factory(*args)
+            _instances[key] = instance
+        return instance
+
+
+def register_bootstrap(name: str, handler: str):
+    """注册启动时执行的建表函数（"模块路径:函数名"）"""
+    _bootstraps.append((name, handler))
+
+
+def bootstrap_schemas() -> Dict[str, bool]:
+    """依次执行已注册的建表函数，单个失败只记录日志，返回各项是否成功"""
+    results = {}
+    for name, handler in _bootstraps:
+        module_path, func_name = handler.split(':', 1)
+        try:
+            getattr(importlib.import_module(module_path), func_name)()
+            results[name] = True
+        except Exception as e:
+            logger.warning(f"表结构初始化失败 [{name}]: {e}")
+            results[name] = False
+    logger.info(f"表结构初始化完成: {sum(results.values())}/{len(results)}")
+    return results
+
+
+def reset_registry():
+    """清空单例与初始化记录（测试用）"""
+    with _lock:
+        _done.clear()
+        _instances.clear()
+        _key_locks.clear()
@@ -9,6 +9,7 @@ import re
 import hashlib
 import tempfile
 import shutil
+import string
 from datetime import datetime
 from pathlib import Path
 from typing import Optional, Union, List, Dict, Any
@@ -19,6 +20,16 @@ def generate_timestamp() -> str:
     """生成时间戳字符串"""
     return datetime.now().strftime("%Y%m%d_%H%M%S")
 
+_ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+
+def like_contains(text: Optional[str], term: str) -> bool:
+    """与 SQLite `text LIKE '%term%'` 等价的子串判断（仅 ASCII 字母不区分大小写）"""
+    if text is None:
+        return False
+    return term.translate(_ASCII_LOWER) in str(text).translate(_ASCII_LOWER)
+
+
 def generate_file_hash(file_path: Union[str, Path]) -> str:
     """生成文件MD5哈希值"""
     hash_md5 = hashlib.md5()
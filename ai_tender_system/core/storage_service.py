@@ -13,6 +13,19 @@
 - 服务层：FileStorageService（统一存储接口）
 - 存储层：文件系统 + 数据库元数据
 
+内容寻址存储：
+- 上传按块流式写入临时文件并增量计算 SHA-256，内存占用与文件大小无关
+- 文件内容保存为 blobs/<sha256前2位>/<sha256> 的唯一副本（file_blobs 表记录引用计数），
+  业务目录下的文件是指向该副本的硬链接（跨设备等无法链接时退化为复制）；
+  删除最后一个引用时才删除副本
+- 同一内容再次上传不再占用磁盘；find_by_checksum 可查到此前的上传，
+  下游缓存（文档快照、PDF转图片、提取文本）按 checksum 复用结果
+- 存储的文件视为只读：硬链接共享同一份数据，修改需另存为新文件
+
+配置（环境变量）：
+- STORAGE_DEDUP: 是否启用内容去重（默认 true）
+- STORAGE_CHUNK_SIZE: 流式写入的块大小，字节（默认 1MB）
+
 未来扩展：
 - 云存储支持（OSS、S3等）
 - 文件版本管理
@@ -21,6 +34,7 @@
 """
 
 import os
+import shutil
 import uuid
 import hashlib
 from datetime import datetime
@@ -29,14 +43,19 @@ from typing import Optional, Dict, List, BinaryIO
 from dataclasses import dataclass
 
 from common.config import get_config
+from common.constants import BYTES_PER_MB
 from common.database import get_db_connection
 from common.logger import get_module_logger
+from common.registry import run_once
 from common.utils import to_relative_path, to_absolute_path
 
 # 初始化配置实例
 config = get_config()
 logger = get_module_logger("storage_service")
 
+DEDUP_ENABLED = os.getenv('STORAGE_DEDUP', 'true').lower() == 'true'
+CHUNK_SIZE = int(os.getenv('STORAGE_CHUNK_SIZE', str(BYTES_PER_MB)))
+
 
 @dataclass
 class FileMetadata:
@@ -64,9 +83,10 @@ class FileStorageService:
     负责所有文件的存储、检索、管理和生命周期控制
     """
 
-    def __init__(self):
-        # 使用upload路径作为存储根目录
-        self.storage_root = Path(config.get_path('upload'))
+    def __init__(self, storage_root: Optional[str] = None):
+        # 默认使用upload路径作为存储根目录
+        self.storage_root = Path(storage_root or config.get_path('upload'))
+        self.blob_root = self.storage_root / 'blobs'
         self.ensure_storage_directories()
 
     def ensure_storage_directories(self):
@@ -81,7 +101,8 @@ class FileStorageService:
             'product_docs',         # 产品文档
             'personnel_docs',       # 人员档案
             'processed_results',    # 处理结果文件
-            'temp'                  # 临时文件
+            'temp',                 # 临时文件
+            'blobs/incoming'        # 内容寻址副本（上传中的临时文件）
         ]
 
         for category in categories:
@@ -107,6 +128,8 @@ class FileStorageService:
         Returns:
             FileMetadata: 文件元数据对象
         """
+        self._ensure_tables()
+
         # 生成唯一文件ID
         file_id = str(uuid.uuid4())
 
@@ -115,16 +138,19 @@ class FileStorageService:
 
         # 构建存储路径
         file_path = self._build_file_path(category, safe_name)
-
-        # 读取文件内容并计算校验和
-        file_content = file_obj.read()
-        file_size = len(file_content)
-        checksum = hashlib.sha256(file_content).hexdigest()
-
-        # 存储文件
         file_path.parent.mkdir(parents=True, exist_ok=True)
-        with open(file_path, 'wb') as f:
-            f.write(file_content)
+
+        # 流式写入临时文件并计算校验和
+        temp_path, file_size, checksum = self._write_incoming(file_obj)
+        try:
+            if DEDUP_ENABLED:
+                blob_checksum = self._link_blob(temp_path, checksum, file_size, file_path)
+            else:
+                os.replace(temp_path, file_path)
+                blob_checksum = None
+        finally:
+            if temp_path.exists():
+                temp_path.unlink()
 
         # 检测MIME类型
         mime_type = self._detect_mime_type(original_name)
@@ -146,11 +172,65 @@ class FileStorageService:
             **metadata
         )
 
-        # 保存元数据到数据库
-        self._save_metadata(file_metadata)
+        # 保存元数据到数据库（失败时撤销文件与副本引用）
+        try:
+            self._save_metadata(file_metadata, blob_checksum)
+        except Exception:
+            if file_path.exists():
+                file_path.unlink()
+            if blob_checksum:
+                with get_db_connection() as conn:
+                    conn.execute("BEGIN IMMEDIATE")
+                    self._release_blob(conn, blob_checksum)
+                    conn.commit()
+            raise
 
         return file_metadata
 
+    def find_by_checksum(self, checksum: str, exclude_file_id: Optional[str] = None) -> Optional[FileMetadata]:
+        """
+        按内容校验和查找已存储的文件（去重查询）
+
+        Args:
+            checksum: 文件内容 SHA-256
+            exclude_file_id: 排除的文件ID（通常是刚上传的文件本身）
+
+        Returns:
+            最近一次上传的同内容文件元数据（文件仍存在），没有则返回 None
+        """
+        self._ensure_tables()
+        with get_db_connection() as conn:
+            rows = conn.execute("""
+                SELECT * FROM file_storage
+                WHERE checksum = ? AND file_id != ?
+                ORDER BY upload_time DESC
+            """, (checksum, exclude_file_id or '')).fetchall()
+
+        for row in rows:
+            if to_absolute_path(row['file_path']).exists():
+                return self._row_to_metadata(row)
+        return None
+
+    def get_blob_path(self, checksum: str) -> Optional[Path]:
+        """获取内容副本的绝对路径（未去重存储或副本不存在时返回 None）"""
+        self._ensure_tables()
+        with get_db_connection() as conn:
+            row = conn.execute("SELECT blob_path FROM file_blobs WHERE checksum = ?", (checksum,)).fetchone()
+        if row:
+            blob_path = to_absolute_path(row['blob_path'])
+            if blob_path.exists():
+                return blob_path
+        return None
+
+    @staticmethod
+    def compute_checksum(file_path: Path) -> str:
+        """分块计算文件 SHA-256"""
+        hasher = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+                hasher.update(chunk)
+        return hasher.hexdigest()
+
     def get_file_metadata(self, file_id: str) -> Optional[FileMetadata]:
         """根据文件ID获取元数据"""
         with get_db_connection() as conn:
@@ -213,15 +293,21 @@ class FileStorageService:
             return False
 
         try:
+            self._ensure_tables()
+
             # 删除物理文件（将相对路径转换为绝对路径）
             abs_path = to_absolute_path(metadata.file_path)
             if abs_path.exists():
                 os.remove(str(abs_path))
 
-            # 删除数据库记录
+            # 删除数据库记录，并释放内容副本的引用
             with get_db_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute("DELETE FROM file_storage WHERE file_id = ?", (file_id,))
+                conn.execute("BEGIN IMMEDIATE")
+                row = conn.execute("SELECT blob_checksum FROM file_storage WHERE file_id = ?",
+                                   (file_id,)).fetchone()
+                conn.execute("DELETE FROM file_storage WHERE file_id = ?", (file_id,))
+                if row and row['blob_checksum']:
+                    self._release_blob(conn, row['blob_checksum'])
                 conn.commit()
 
             return True
@@ -245,6 +331,83 @@ class FileStorageService:
                 except Exception as e:
                     logger.error(f"删除临时文件失败 {file_path}: {e}")
 
+    def _write_incoming(self, file_obj: BinaryIO):
+        """
+        按块把上传内容写入临时文件，同时增量计算 SHA-256
+
+        Returns:
+            (临时文件路径, 文件大小, 校验和)
+        """
+        incoming_dir = self.blob_root / 'incoming'
+        incoming_dir.mkdir(parents=True, exist_ok=True)
+        temp_path = incoming_dir / f"{uuid.uuid4().hex}.part"
+
+        hasher = hashlib.sha256()
+        file_size = 0
+        try:
+            with open(temp_path, 'wb') as f:
+                while True:
+                    chunk = file_obj.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    hasher.update(chunk)
+                    f.write(chunk)
+                    file_size += len(chunk)
+        except Exception:
+            if temp_path.exists():
+                temp_path.unlink()
+            raise
+
+        return temp_path, file_size, hasher.hexdigest()
+
+    def _link_blob(self, temp_path: Path, checksum: str, file_size: int, file_path: Path) -> str:
+        """
+        把临时文件纳入内容寻址存储并在业务目录下建立链接
+
+        已有相同内容的副本时丢弃临时文件（由调用方删除），只增加引用计数。
+        在写事务内完成，避免并发上传同一内容或并发删除时引用计数错乱。
+
+        Returns:
+            副本的校验和（写入 file_storage.blob_checksum）
+        """
+        with get_db_connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT blob_path FROM file_blobs WHERE checksum = ?", (checksum,)).fetchone()
+            blob_path = to_absolute_path(row['blob_path']) if row else None
+
+            if blob_path is None or not blob_path.exists():
+                blob_path = self.blob_root / checksum[:2] / checksum
+                blob_path.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(temp_path, blob_path)
+                conn.execute("""
+                    INSERT INTO file_blobs (checksum, blob_path, file_size, ref_count)
+                    VALUES (?, ?, ?, 0)
+                    ON CONFLICT(checksum) DO UPDATE SET blob_path = excluded.blob_path
+                """, (checksum, to_relative_path(blob_path), file_size))
+            else:
+                logger.info(f"文件内容已存在，复用副本: {checksum[:12]}")
+
+            try:
+                os.link(blob_path, file_path)
+            except OSError:
+                # 跨设备或文件系统不支持硬链接
+                shutil.copyfile(blob_path, file_path)
+
+            conn.execute("UPDATE file_blobs SET ref_count = ref_count + 1 WHERE checksum = ?", (checksum,))
+            conn.commit()
+
+        return checksum
+
+    def _release_blob(self, conn, checksum: str):
+        """引用计数减一，归零时删除副本（在调用方的写事务内执行）"""
+        conn.execute("UPDATE file_blobs SET ref_count = ref_count - 1 WHERE checksum = ?", (checksum,))
+        row = conn.execute("SELECT blob_path, ref_count FROM file_blobs WHERE checksum = ?", (checksum,)).fetchone()
+        if row and row['ref_count'] <= 0:
+            conn.execute("DELETE FROM file_blobs WHERE checksum = ?", (checksum,))
+            blob_path = to_absolute_path(row['blob_path'])
+            if blob_path.exists():
+                blob_path.unlink()
+
     def _generate_safe_filename(self, original_name: str, file_id: str) -> str:
         """
         生成安全的文件名，保留中文字符
@@ -298,12 +461,15 @@ class FileStorageService:
 
         return mime_types.get(extension, 'application/octet-stream')
 
-    def _save_metadata(self, metadata: FileMetadata):
-        """保存文件元数据到数据库"""
+    def _ensure_tables(self):
+        """确保元数据表存在（每个进程只执行一次）"""
+        run_once(('schema', 'file_storage', str(config.get_path('data'))), self._create_tables)
+
+    def _create_tables(self):
+        """创建文件元数据表与内容副本表"""
         with get_db_connection() as conn:
             cursor = conn.cursor()
 
-            # 确保表存在
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS file_storage (
                     file_id TEXT PRIMARY KEY,
@@ -324,13 +490,38 @@ class FileStorageService:
                 )
             """)
 
+            # 引用的内容副本（去重前上传的文件为空）
+            try:
+                cursor.execute("ALTER TABLE file_storage ADD COLUMN blob_checksum TEXT")
+            except Exception:
+                pass  # 字段已存在，忽略
+
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_file_storage_checksum ON file_storage(checksum)")
+
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS file_blobs (
+                    checksum TEXT PRIMARY KEY,
+                    blob_path TEXT NOT NULL,
+                    file_size INTEGER NOT NULL,
+                    ref_count INTEGER NOT NULL DEFAULT 0,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+
+            conn.commit()
+
+    def _save_metadata(self, metadata: FileMetadata, blob_checksum: Optional[str] = None):
+        """保存文件元数据到数据库"""
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+
             # 插入元数据
             cursor.execute("""
                 INSERT INTO file_storage (
                     file_id, original_name, safe_name, file_path, file_size,
                     mime_type, category, business_type, upload_time, user_id,
-                    company_id, description, tags, checksum
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    company_id, description, tags, checksum, blob_checksum
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             """, (
                 metadata.file_id,
                 metadata.original_name,
@@ -345,7 +536,8 @@ class FileStorageService:
                 metadata.company_id,
                 metadata.description,
                 ','.join(metadata.tags) if metadata.tags else None,
-                metadata.checksum
+                metadata.checksum,
+                blob_checksum
             ))
 
             conn.commit()
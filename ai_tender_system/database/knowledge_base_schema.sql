@@ -380,6 +380,18 @@ CREATE INDEX IF NOT EXISTS idx_parser_tests_document_id ON parser_debug_tests(do
 CREATE INDEX IF NOT EXISTS idx_parser_tests_upload_time ON parser_debug_tests(upload_time DESC);
 CREATE INDEX IF NOT EXISTS idx_parser_tests_has_ground_truth ON parser_debug_tests(ground_truth IS NOT NULL);
 
+-- 15. 系统性能指标表（LLM 调用指标等，与 vector_search_extension.sql 中定义一致）
+CREATE TABLE IF NOT EXISTS system_metrics (
+    metric_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    metric_name VARCHAR(100) NOT NULL,
+    metric_value REAL NOT NULL,
+    metric_unit VARCHAR(20), -- seconds/mb/count/percentage
+    component VARCHAR(50), -- embedding/vectorstore/search/parsing/llm/<用途>
+    recorded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_system_metrics_component ON system_metrics(component, recorded_at);
+
 -- 创建视图：测试结果概览
 CREATE VIEW IF NOT EXISTS v_parser_debug_summary AS
 SELECT
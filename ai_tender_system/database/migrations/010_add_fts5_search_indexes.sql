@@ -0,0 +1,97 @@
+-- 迁移脚本：关键词搜索的 FTS5 全文索引
+-- 版本：010
+-- 说明：为标书片段、文档目录、产品能力、知识库文档建立 FTS5 外部内容索引（trigram 分词），
+--       由触发器与原表同步；末尾 rebuild 导入已有数据。需要 SQLite 3.34+。
+--       本文件由 common/fts_search.py 的 render_migration_sql() 生成，修改索引定义请同步两处。
+
+-- 标书片段: tender_excerpts(chapter_title, content, keywords)
+CREATE VIRTUAL TABLE IF NOT EXISTS tender_excerpts_fts USING fts5(
+    chapter_title, content, keywords,
+    content='tender_excerpts',
+    content_rowid='excerpt_id',
+    tokenize='trigram'
+);
+
+CREATE TRIGGER IF NOT EXISTS tender_excerpts_fts_ai AFTER INSERT ON tender_excerpts BEGIN
+    INSERT INTO tender_excerpts_fts(rowid, chapter_title, content, keywords) VALUES (new.excerpt_id, new.chapter_title, new.content, new.keywords);
+END;
+
+CREATE TRIGGER IF NOT EXISTS tender_excerpts_fts_ad AFTER DELETE ON tender_excerpts BEGIN
+    INSERT INTO tender_excerpts_fts(tender_excerpts_fts, rowid, chapter_title, content, keywords) VALUES ('delete', old.excerpt_id, old.chapter_title, old.content, old.keywords);
+END;
+
+CREATE TRIGGER IF NOT EXISTS tender_excerpts_fts_au AFTER UPDATE OF chapter_title, content, keywords ON tender_excerpts BEGIN
+    INSERT INTO tender_excerpts_fts(tender_excerpts_fts, rowid, chapter_title, content, keywords) VALUES ('delete', old.excerpt_id, old.chapter_title, old.content, old.keywords);
+    INSERT INTO tender_excerpts_fts(rowid, chapter_title, content, keywords) VALUES (new.excerpt_id, new.chapter_title, new.content, new.keywords);
+END;
+
+INSERT INTO tender_excerpts_fts(tender_excerpts_fts) VALUES ('rebuild');
+
+-- 文档目录: document_toc(heading_text, section_number, keywords)
+CREATE VIRTUAL TABLE IF NOT EXISTS document_toc_fts USING fts5(
+    heading_text, section_number, keywords,
+    content='document_toc',
+    content_rowid='toc_id',
+    tokenize='trigram'
+);
+
+CREATE TRIGGER IF NOT EXISTS document_toc_fts_ai AFTER INSERT ON document_toc BEGIN
+    INSERT INTO document_toc_fts(rowid, heading_text, section_number, keywords) VALUES (new.toc_id, new.heading_text, new.section_number, new.keywords);
+END;
+
+CREATE TRIGGER IF NOT EXISTS document_toc_fts_ad AFTER DELETE ON document_toc BEGIN
+    INSERT INTO document_toc_fts(document_toc_fts, rowid, heading_text, section_number, keywords) VALUES ('delete', old.toc_id, old.heading_text, old.section_number, old.keywords);
+END;
+
+CREATE TRIGGER IF NOT EXISTS document_toc_fts_au AFTER UPDATE OF heading_text, section_number, keywords ON document_toc BEGIN
+    INSERT INTO document_toc_fts(document_toc_fts, rowid, heading_text, section_number, keywords) VALUES ('delete', old.toc_id, old.heading_text, old.section_number, old.keywords);
+    INSERT INTO document_toc_fts(rowid, heading_text, section_number, keywords) VALUES (new.toc_id, new.heading_text, new.section_number, new.keywords);
+END;
+
+INSERT INTO document_toc_fts(document_toc_fts) VALUES ('rebuild');
+
+-- 产品能力: product_capabilities_index(capability_name, capability_description)
+CREATE VIRTUAL TABLE IF NOT EXISTS product_capabilities_fts USING fts5(
+    capability_name, capability_description,
+    content='product_capabilities_index',
+    content_rowid='capability_id',
+    tokenize='trigram'
+);
+
+CREATE TRIGGER IF NOT EXISTS product_capabilities_fts_ai AFTER INSERT ON product_capabilities_index BEGIN
+    INSERT INTO product_capabilities_fts(rowid, capability_name, capability_description) VALUES (new.capability_id, new.capability_name, new.capability_description);
+END;
+
+CREATE TRIGGER IF NOT EXISTS product_capabilities_fts_ad AFTER DELETE ON product_capabilities_index BEGIN
+    INSERT INTO product_capabilities_fts(product_capabilities_fts, rowid, capability_name, capability_description) VALUES ('delete', old.capability_id, old.capability_name, old.capability_description);
+END;
+
+CREATE TRIGGER IF NOT EXISTS product_capabilities_fts_au AFTER UPDATE OF capability_name, capability_description ON product_capabilities_index BEGIN
+    INSERT INTO product_capabilities_fts(product_capabilities_fts, rowid, capability_name, capability_description) VALUES ('delete', old.capability_id, old.capability_name, old.capability_description);
+    INSERT INTO product_capabilities_fts(rowid, capability_name, capability_description) VALUES (new.capability_id, new.capability_name, new.capability_description);
+END;
+
+INSERT INTO product_capabilities_fts(product_capabilities_fts) VALUES ('rebuild');
+
+-- 知识库文档: documents(original_filename, tags)
+CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
+    original_filename, tags,
+    content='documents',
+    content_rowid='doc_id',
+    tokenize='trigram'
+);
+
+CREATE TRIGGER IF NOT EXISTS documents_fts_ai AFTER INSERT ON documents BEGIN
+    INSERT INTO documents_fts(rowid, original_filename, tags) VALUES (new.doc_id, new.original_filename, new.tags);
+END;
+
+CREATE TRIGGER IF NOT EXISTS documents_fts_ad AFTER DELETE ON documents BEGIN
+    INSERT INTO documents_fts(documents_fts, rowid, original_filename, tags) VALUES ('delete', old.doc_id, old.original_filename, old.tags);
+END;
+
+CREATE TRIGGER IF NOT EXISTS documents_fts_au AFTER UPDATE OF original_filename, tags ON documents BEGIN
+    INSERT INTO documents_fts(documents_fts, rowid, original_filename, tags) VALUES ('delete', old.doc_id, old.original_filename, old.tags);
+    INSERT INTO documents_fts(rowid, original_filename, tags) VALUES (new.doc_id, new.original_filename, new.tags);
+END;
+
+INSERT INTO documents_fts(documents_fts) VALUES ('rebuild');
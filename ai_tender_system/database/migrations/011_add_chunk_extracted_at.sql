@@ -0,0 +1,7 @@
+-- 迁移脚本：为标书分块表添加提取完成时间
+-- 版本：011
+-- 说明：要求提取结果与分块的 extracted_at 在同一事务中写入，
+--       重新运行处理流程时跳过已筛选、已提取的分块。
+--       KnowledgeBaseDB 初始化时会自动补齐该列（_ensure_tender_chunk_columns）。
+
+ALTER TABLE tender_document_chunks ADD COLUMN extracted_at TIMESTAMP DEFAULT NULL;
@@ -0,0 +1,17 @@
+-- 迁移脚本：创建系统性能指标表
+-- 版本：012
+-- 说明：system_metrics 原先只在 vector_search_extension.sql 中定义，主库没有该表，
+--       KnowledgeBaseDB.record_system_metric 无法写入。LLM 调用指标（common/llm_metrics.py）
+--       按 component = 'llm/<用途>' 定期写入该表。
+--       knowledge_base_schema.sql 已包含该表，KnowledgeBaseDB 初始化时会自动创建。
+
+CREATE TABLE IF NOT EXISTS system_metrics (
+    metric_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    metric_name VARCHAR(100) NOT NULL,
+    metric_value REAL NOT NULL,
+    metric_unit VARCHAR(20),
+    component VARCHAR(50),
+    recorded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_system_metrics_component ON system_metrics(component, recorded_at);
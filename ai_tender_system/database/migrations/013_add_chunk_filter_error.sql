@@ -0,0 +1,7 @@
+-- 迁移脚本：为标书分块表添加筛选错误信息
+-- 版本：013
+-- 说明：筛选出错的分块以保守保留的结果落库，并记录错误信息；
+--       重新运行处理流程时只跳过筛选成功（filter_error 为 NULL）的分块。
+--       KnowledgeBaseDB 初始化时会自动补齐该列（_ensure_tender_chunk_columns）。
+
+ALTER TABLE tender_document_chunks ADD COLUMN filter_error TEXT DEFAULT NULL;
@@ -17,6 +17,10 @@ CREATE TABLE IF NOT EXISTS tender_document_chunks (
     filter_confidence FLOAT DEFAULT NULL,  -- 筛选置信度 0.0-1.0
     filtered_at TIMESTAMP DEFAULT NULL,
     filter_model VARCHAR(50) DEFAULT NULL,  -- 使用的筛选模型
+    filter_error TEXT DEFAULT NULL,  -- 筛选出错信息（非NULL=出错后保守保留，重跑时重新筛选）
+
+    -- 提取字段
+    extracted_at TIMESTAMP DEFAULT NULL,  -- 要求提取完成时间（NULL=未提取，重跑时跳过已提取的分块）
 
     -- 元数据
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
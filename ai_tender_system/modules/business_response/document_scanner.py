@@ -11,6 +11,7 @@ from docx import Document
 
 sys.path.append(str(Path(__file__).parent.parent.parent))
 from common import get_module_logger
+from common.paragraph_index import ParagraphIndex
 
 
 class DocumentScanner:
@@ -624,8 +625,11 @@ class DocumentScanner:
 
         self.logger.info(f"📋 开始扫描格式自拟的案例要求...")
 
-        for para_idx, paragraph in enumerate(doc.paragraphs):
-            text = paragraph.text.strip()
+        # 文档可能已被前序步骤修改，这里构建一次新的段落索引（不使用共享缓存）
+        pidx = ParagraphIndex(doc)
+
+        for para_idx, paragraph in enumerate(pidx.paragraphs):
+            text = pidx.stripped[para_idx]
             if not text:
                 continue
 
@@ -640,7 +644,7 @@ class DocumentScanner:
                 if has_format_free:
                     # 智能去重：检查附近是否已有案例表格
                     nearby_has_case_table = self._check_nearby_case_table(
-                        doc, para_idx, search_range=10
+                        doc, para_idx, search_range=10, paragraph_index=pidx
                     )
 
                     if nearby_has_case_table:
@@ -664,13 +668,13 @@ class DocumentScanner:
                     )
 
                 # 情况2：下一段落包含"格式自拟"（标题和内容分段的情况）
-                elif para_idx + 1 < len(doc.paragraphs):
-                    next_para = doc.paragraphs[para_idx + 1]
-                    next_text = next_para.text.strip()
+                elif para_idx + 1 < len(pidx):
+                    next_para = pidx[para_idx + 1]
+                    next_text = pidx.stripped[para_idx + 1]
                     if any(kw in next_text for kw in format_free_keywords):
                         # 智能去重
                         nearby_has_case_table = self._check_nearby_case_table(
-                            doc, para_idx + 1, search_range=10
+                            doc, para_idx + 1, search_range=10, paragraph_index=pidx
                         )
 
                         if nearby_has_case_table:
@@ -698,7 +702,8 @@ class DocumentScanner:
         return case_requirements
 
     def _check_nearby_case_table(self, doc: Document, para_idx: int,
-                                 search_range: int = 10) -> bool:
+                                 search_range: int = 10,
+                                 paragraph_index: ParagraphIndex = None) -> bool:
         """
         检查指定段落附近是否已有案例表格
 
@@ -715,28 +720,28 @@ class DocumentScanner:
             doc: Word文档对象
             para_idx: 起始段落索引
             search_range: 向后搜索的段落数量
+            paragraph_index: 段落索引（可选，调用方已构建时传入，避免重复遍历）
 
         Returns:
             True: 附近有案例表格
             False: 附近无案例表格
         """
+        pidx = paragraph_index or ParagraphIndex(doc)
+
         # 计算搜索范围的结束段落索引
-        end_idx = min(para_idx + search_range, len(doc.paragraphs))
+        end_idx = min(para_idx + search_range, len(pidx))
 
         # 获取搜索范围内的段落元素
         search_paragraphs = []
         for i in range(para_idx, end_idx):
-            if i >= len(doc.paragraphs):
-                break
-
-            para = doc.paragraphs[i]
+            para_text = pidx.texts[i]
 
             # 如果遇到新的章节标题，停止搜索
-            if self._is_chapter_title(para.text):
-                self.logger.debug(f"  遇到新章节，停止搜索: {para.text[:30]}")
+            if self._is_chapter_title(para_text):
+                self.logger.debug(f"  遇到新章节，停止搜索: {para_text[:30]}")
                 break
 
-            search_paragraphs.append(para._element)
+            search_paragraphs.append(pidx[i]._element)
 
         if not search_paragraphs:
             return False
@@ -872,7 +877,9 @@ class DocumentScanner:
         textbox_count = 0
 
         # 遍历所有段落，查找包含文本框的段落
-        for para_idx, paragraph in enumerate(doc.paragraphs):
+        paragraphs = doc.paragraphs
+        total_paragraphs = len(paragraphs)
+        for para_idx, paragraph in enumerate(paragraphs):
             para_elem = paragraph._element
 
             # 查找文本框 (w:txbxContent)
@@ -898,7 +905,7 @@ class DocumentScanner:
                 textbox_count += 1
 
                 # 使用质量评分系统评估文本框
-                category, bonus = self._classify_paragraph(text, para_idx, len(doc.paragraphs), '')
+                category, bonus = self._classify_paragraph(text, para_idx, total_paragraphs, '')
 
                 # 文本框通常是明确的插入位置，如果分类不是exclude，应该考虑
                 if category == 'exclude':
@@ -62,12 +62,12 @@ class BusinessResponseProcessor:
         # 初始化案例库和简历库填充器
         try:
             from ..case_library.manager import CaseLibraryManager
-            from ..resume_library.manager import ResumeLibraryManager
+            from ..resume_library.manager import get_resume_library_manager
             from .case_table_filler import CaseTableFiller
             from .resume_table_filler import ResumeTableFiller
 
             self.case_manager = CaseLibraryManager()
-            self.resume_manager = ResumeLibraryManager()
+            self.resume_manager = get_resume_library_manager()
             self.case_filler = CaseTableFiller(self.case_manager, self.image_handler)  # 传入image_handler
             self.resume_filler = ResumeTableFiller(self.resume_manager, self.image_handler)  # 传入image_handler
             self.case_resume_available = True
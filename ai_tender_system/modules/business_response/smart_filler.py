@@ -25,6 +25,7 @@ from docx.text.paragraph import Paragraph
 import sys
 sys.path.append(str(Path(__file__).parent.parent.parent))
 from common import get_module_logger
+from common.paragraph_index import ParagraphIndex
 
 # 导入Word文档工具
 from .utils import WordDocumentUtils, normalize_data_keys
@@ -90,8 +91,9 @@ class SmartDocumentFiller:
 
         self.logger.info("="*60)
 
-        # 处理所有段落
-        for para_idx, paragraph in enumerate(doc.paragraphs):
+        # 处理所有段落（段落列表只构建一次；填充会修改文本，这里读取实时文本）
+        pidx = ParagraphIndex(doc)
+        for para_idx, paragraph in enumerate(pidx.paragraphs):
             if not paragraph.text.strip():
                 continue
 
@@ -111,7 +113,7 @@ class SmartDocumentFiller:
 
         # 处理所有表格
         self.logger.info("开始处理表格...")
-        table_para_idx = len(doc.paragraphs)  # 表格段落从这个索引开始编号
+        table_para_idx = len(pidx)  # 表格段落从这个索引开始编号
         for table_idx, table in enumerate(doc.tables):
             self.logger.debug(f"处理表格#{table_idx}")
             for row_idx, row in enumerate(table.rows):
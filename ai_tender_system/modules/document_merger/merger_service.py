@@ -10,6 +10,19 @@ from docx.enum.text import WD_ALIGN_PARAGRAPH
 from docx.enum.section import WD_SECTION
 from docx.oxml.ns import qn
 
+from ai_tender_system.common.logger import get_module_logger
+from ai_tender_system.modules.document_merger.xml_merger import (
+    XmlDocumentMerger, estimate_body_pages, is_blank_paragraph, remove_blank_paragraphs
+)
+
+logger = get_module_logger("document_merger.merger_service")
+
+DOC_LABELS = {
+    "business": "商务应答",
+    "p2p": "技术点对点应答",
+    "tech": "技术方案"
+}
+
 
 class DocumentMergerService:
     """投标文档智能整合服务 - V2版本"""
@@ -64,55 +77,35 @@ class DocumentMergerService:
         """
         self._report_progress(progress_callback, 5, "开始文档整合...")
 
-        # 1. 加载文档
-        self._report_progress(progress_callback, 10, "正在读取商务应答文件...")
-        business_doc = Document(file_paths["business"])
+        # 1. 根据配置确定合并顺序
+        doc_order = config.get("doc_order", ["business", "p2p", "tech"])
+        parts = []
+        for doc_type in doc_order:
+            if doc_type == "p2p" and not (config.get("include_p2p", True) and file_paths.get("p2p")):
+                continue
+            if doc_type in DOC_LABELS and file_paths.get(doc_type):
+                parts.append(doc_type)
 
-        docs_to_merge = []
-        doc_labels = []
+        if not parts:
+            raise ValueError("没有可合并的文档")
 
-        # 根据配置确定合并顺序
-        doc_order = config.get("doc_order", ["business", "p2p", "tech"])
+        # 2. 以第一个文档为基准创建主文档（保留其样式、编号与版式）
+        self._report_progress(progress_callback, 10, f"正在读取{DOC_LABELS[parts[0]]}文件...")
+        merger = XmlDocumentMerger(file_paths[parts[0]], unify_styles=config.get("unify_styles", True))
+        main_doc = merger.document
+        part_pages = {parts[0]: estimate_body_pages(merger.body)}
 
-        for doc_type in doc_order:
-            if doc_type == "business":
-                docs_to_merge.append((business_doc, "商务应答"))
-                doc_labels.append("business")
-            elif doc_type == "p2p" and config.get("include_p2p", True):
-                if file_paths.get("p2p"):
-                    self._report_progress(progress_callback, 15, "正在读取点对点应答文件...")
-                    p2p_doc = Document(file_paths["p2p"])
-                    docs_to_merge.append((p2p_doc, "技术点对点应答"))
-                    doc_labels.append("p2p")
-            elif doc_type == "tech":
-                self._report_progress(progress_callback, 20, "正在读取技术方案文件...")
-                tech_doc = Document(file_paths["tech"])
-                docs_to_merge.append((tech_doc, "技术方案"))
-                doc_labels.append("tech")
-
-        # 2. 创建主文档（以商务应答为基准）
-        self._report_progress(progress_callback, 25, "正在创建主文档...")
-        main_doc = Document()
-
-        # 复制商务应答的样式
-        if config.get("unify_styles", True):
-            self._copy_styles(main_doc, business_doc)
-
-        # 3. 合并文档内容
+        # 3. 按文档顺序逐个追加（XML 级拷贝，读取一个合并一个）
         progress_step = 30
-        for i, (doc, label) in enumerate(docs_to_merge):
+        for i, doc_type in enumerate(parts[1:], start=1):
             self._report_progress(
                 progress_callback,
                 progress_step + i * 15,
-                f"正在合并{label}..."
+                f"正在合并{DOC_LABELS[doc_type]}..."
             )
-
-            # 如果不是第一个文档，添加分节符
-            if i > 0 and config.get("add_section_breaks", True):
-                main_doc.add_page_break()
-
-            # 复制内容
-            self._copy_document_content(main_doc, doc)
+            before = estimate_body_pages(merger.body)
+            merger.append(file_paths[doc_type], section_break=config.get("add_section_breaks", True))
+            part_pages[doc_type] = estimate_body_pages(merger.body) - before
 
         # 4. 删除空白段落
         removed_blanks = 0
@@ -140,7 +133,7 @@ class DocumentMergerService:
             output_filename += '.docx'
 
         output_path = os.path.join(output_dir, output_filename)
-        main_doc.save(output_path)
+        merger.save(output_path)
 
         # 8. 计算统计信息
         self._report_progress(progress_callback, 95, "正在计算文档统计...")
@@ -149,9 +142,9 @@ class DocumentMergerService:
             "toc_pages": toc_pages,
             "index_pages": index_pages,
             "removed_blanks": removed_blanks,
-            "business_pages": 0,  # TODO: 精确计算
-            "p2p_pages": 0,
-            "tech_pages": 0
+            "business_pages": part_pages.get("business", 0),
+            "p2p_pages": part_pages.get("p2p", 0),
+            "tech_pages": part_pages.get("tech", 0)
         }
 
         self._report_progress(progress_callback, 100, "文档整合完成！")
@@ -161,115 +154,13 @@ class DocumentMergerService:
             "stats": stats
         }
 
-    def _copy_styles(self, target_doc: Document, source_doc: Document):
-        """复制源文档的样式到目标文档"""
-        try:
-            # 复制样式定义
-            for style in source_doc.styles:
-                try:
-                    if style.name not in [s.name for s in target_doc.styles]:
-                        # 注意：完整的样式复制比较复杂，这里做简化处理
-                        pass
-                except:
-                    pass
-        except Exception as e:
-            print(f"样式复制警告: {e}")
-
-    def _copy_document_content(self, target_doc: Document, source_doc: Document):
-        """复制源文档的所有内容到目标文档"""
-        # 复制段落
-        for para in source_doc.paragraphs:
-            # 尝试使用原样式，如果不存在则使用None（默认样式）
-            style_name = None
-            if para.style:
-                try:
-                    # 检查样式是否存在于目标文档
-                    target_doc.styles[para.style.name]
-                    style_name = para.style.name
-                except KeyError:
-                    # 样式不存在，使用默认样式
-                    print(f"警告：样式 '{para.style.name}' 不存在，使用默认样式")
-                    style_name = None
-
-            new_para = target_doc.add_paragraph(para.text, style=style_name)
-            new_para.alignment = para.alignment
-
-            # 复制段落格式
-            if para.paragraph_format:
-                try:
-                    new_para.paragraph_format.left_indent = para.paragraph_format.left_indent
-                    new_para.paragraph_format.right_indent = para.paragraph_format.right_indent
-                    new_para.paragraph_format.first_line_indent = para.paragraph_format.first_line_indent
-                    new_para.paragraph_format.line_spacing = para.paragraph_format.line_spacing
-                except Exception as e:
-                    # 格式复制失败，忽略
-                    pass
-
-            # 复制字体格式
-            if para.runs:
-                for i, run in enumerate(para.runs):
-                    try:
-                        if i < len(new_para.runs):
-                            new_run = new_para.runs[i]
-                            new_run.bold = run.bold
-                            new_run.italic = run.italic
-                            new_run.underline = run.underline
-                            if run.font.size:
-                                new_run.font.size = run.font.size
-                            if run.font.name:
-                                new_run.font.name = run.font.name
-                    except Exception as e:
-                        # 字体格式复制失败，忽略
-                        pass
-
-        # 复制表格
-        for table in source_doc.tables:
-            new_table = target_doc.add_table(rows=len(table.rows), cols=len(table.columns))
-
-            # 尝试应用表格样式
-            try:
-                if table.style:
-                    new_table.style = table.style
-            except Exception as e:
-                # 样式不存在，使用默认表格样式
-                print(f"警告：表格样式不存在，使用默认样式")
-
-            # 复制单元格内容
-            for i, row in enumerate(table.rows):
-                for j, cell in enumerate(row.cells):
-                    new_table.rows[i].cells[j].text = cell.text
-
     def _detect_and_remove_blanks(self, doc: Document) -> int:
-        """检测并删除空白段落"""
-        removed = 0
-
-        # 倒序遍历，避免索引问题
-        for i in range(len(doc.paragraphs) - 1, -1, -1):
-            para = doc.paragraphs[i]
-            if self._is_blank_paragraph(para):
-                # 删除段落
-                p_element = para._element
-                p_element.getparent().remove(p_element)
-                removed += 1
-
-        return removed
+        """检测并删除空白段落（一次遍历）"""
+        return remove_blank_paragraphs(doc.element.body)
 
     def _is_blank_paragraph(self, para) -> bool:
         """判断段落是否为空白"""
-        # 1. 检查文本内容
-        if para.text.strip():
-            return False
-
-        # 2. 检查是否包含图片
-        if para._element.xpath('.//w:drawing') or \
-           para._element.xpath('.//w:pict'):
-            return False
-
-        # 3. 检查是否包含表格
-        if para._element.xpath('.//w:tbl'):
-            return False
-
-        return True
+        return is_blank_paragraph(para._element)
 
     def _generate_toc_advanced(self, doc: Document) -> int:
         """生成高级目录（在文档开头插入）"""
@@ -283,7 +174,7 @@ class DocumentMergerService:
         )
         toc_para = doc.paragraphs[0]
         toc_para.text = '目录'
-        toc_para.style = 'Heading 1'
+        self._apply_style(toc_para, 'Heading 1')
         toc_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
 
         # 插入目录域
@@ -332,7 +223,8 @@ class DocumentMergerService:
         """生成固定格式索引"""
         doc.add_page_break()
 
-        heading = doc.add_heading('索引', level=1)
+        heading = doc.add_paragraph('索引')
+        self._apply_style(heading, 'Heading 1')
         heading.alignment = WD_ALIGN_PARAGRAPH.CENTER
 
         lines = template.split('\n')
@@ -350,12 +242,13 @@ class DocumentMergerService:
         """生成评分标准索引"""
         doc.add_page_break()
 
-        heading = doc.add_heading('评分标准对照索引', level=1)
+        heading = doc.add_paragraph('评分标准对照索引')
+        self._apply_style(heading, 'Heading 1')
         heading.alignment = WD_ALIGN_PARAGRAPH.CENTER
 
         # 创建表格
         table = doc.add_table(rows=1, cols=3)
-        table.style = 'Table Grid'
+        self._apply_style(table, 'Table Grid')
 
         # 表头
         header_cells = table.rows[0].cells
@@ -381,6 +274,13 @@ class DocumentMergerService:
         estimated_pages = int(para_count / 25 + table_count * 0.5)
         return max(estimated_pages, 1)
 
+    def _apply_style(self, obj, style_name: str):
+        """应用样式（主文档取自源文档，可能没有该内置样式，此时保留默认样式）"""
+        try:
+            obj.style = style_name
+        except KeyError:
+            logger.warning(f"样式 '{style_name}' 不存在，使用默认样式")
+
     def _report_progress(self, callback, percent: int, message: str):
         """报告进度"""
         if callback:
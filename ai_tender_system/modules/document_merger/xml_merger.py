@@ -0,0 +1,393 @@
+# ai_tender_system/modules/document_merger/xml_merger.py
+"""
+XML 级文档合并引擎
+
+以第一个文档为基准，按文档顺序深拷贝其余文档 body 下的全部元素（段落、表格、内容控件等，
+保持原有先后顺序），并重映射拷贝内容中的引用：
+- 关系（r:embed / r:link / r:id 等）：图片按内容去重后加入目标文档；页眉页脚、图表、嵌入对象等部件
+  连同其下级部件一起迁移，部件名冲突时重新编号；外部链接重新建立
+- 编号（w:numId）：复制用到的 w:num / w:abstractNum 并分配新编号，各文档的列表互不串号
+- 样式（w:pStyle / w:rStyle / w:tblStyle）：目标文档缺少的样式连同 basedOn / next / link 链一起复制；
+  同名样式以基准文档为准（unify_styles=False 时改名保留源文档定义）
+
+每个源文档追加完即释放，内存中只保留结果文档；引用映射按源文档缓存，整体耗时与文档大小成线性关系。
+结果先写入输出目录下的临时文件，再原子替换为目标文件。
+"""
+
+import copy
+import io
+import os
+import re
+import tempfile
+from typing import Dict, Optional, Set
+
+from docx import Document
+from docx.opc.constants import CONTENT_TYPE as CT, RELATIONSHIP_TYPE as RT
+from docx.opc.packuri import PackURI
+from docx.oxml import OxmlElement, parse_xml
+from docx.oxml.ns import nsdecls, qn
+from docx.parts.numbering import NumberingPart
+from lxml import etree
+
+from ai_tender_system.common.logger import get_module_logger
+
+logger = get_module_logger("document_merger.xml_merger")
+
+R_NAMESPACE = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+STYLE_REFERENCE_TAGS = (qn('w:pStyle'), qn('w:rStyle'), qn('w:tblStyle'))
+STYLE_LINK_TAGS = (qn('w:basedOn'), qn('w:next'), qn('w:link'))
+
+# 段落中出现以下元素时不视为空白
+_CONTENT_TAGS = frozenset(qn(tag) for tag in (
+    'w:drawing', 'w:pict', 'w:object', 'w:tbl', 'w:sectPr', 'w:fldChar', 'w:fldSimple',
+    'w:instrText', 'w:footnoteReference', 'w:endnoteReference', 'w:txbxContent', 'w:sym',
+    'w:bookmarkStart', 'w:commentRangeStart'
+)) | {'{http://schemas.openxmlformats.org/markup-compatibility/2006}AlternateContent'}
+_TEXT_TAG = qn('w:t')
+_BREAK_TAG = qn('w:br')
+_PARAGRAPH_TAG = qn('w:p')
+_NUM_ID_TAG = qn('w:numId')
+_VAL = qn('w:val')
+
+
+def is_blank_paragraph(p_element) -> bool:
+    """段落是否为空白（无文字，且不含图片、分节、分页、域、书签等）"""
+    for element in p_element.iter(etree.Element):
+        tag = element.tag
+        if tag == _TEXT_TAG:
+            if element.text and element.text.strip():
+                return False
+        elif tag in _CONTENT_TAGS:
+            return False
+        elif tag == _BREAK_TAG and element.get(qn('w:type')) == 'page':
+            return False
+    return True
+
+
+def remove_blank_paragraphs(body) -> int:
+    """一次遍历删除 body 下的空白段落，返回删除数量"""
+    blanks = [child for child in body.iterchildren(_PARAGRAPH_TAG) if is_blank_paragraph(child)]
+    for p_element in blanks:
+        body.remove(p_element)
+    return len(blanks)
+
+
+def _partname_template(partname: str) -> str:
+    """/word/media/image3.png -> /word/media/image%d.png"""
+    return re.sub(r'\d*(\.[^./]+)$', r'%d\1', partname)
+
+
+class _SourceContext:
+    """单个源文档的引用映射缓存"""
+
+    def __init__(self, document: Document):
+        self.document = document
+        self.part = document.part
+        self.rel_map: Dict[str, str] = {}
+        self.num_map: Dict[str, str] = {}
+        self.abstract_map: Dict[str, str] = {}
+        self.style_map: Dict[str, str] = {}
+
+        numbering = self.part.part_related_by(RT.NUMBERING).element if self._has_rel(RT.NUMBERING) else None
+        self.nums = {}
+        self.abstracts = {}
+        if numbering is not None:
+            self.nums = {el.get(qn('w:numId')): el for el in numbering.iterchildren(qn('w:num'))}
+            self.abstracts = {el.get(qn('w:abstractNumId')): el for el in numbering.iterchildren(qn('w:abstractNum'))}
+
+        self.styles = {el.get(qn('w:styleId')): el
+                       for el in document.styles.element.iterchildren(qn('w:style'))}
+
+    def _has_rel(self, reltype: str) -> bool:
+        return any(rel.reltype == reltype for rel in self.part.rels.values())
+
+
+class XmlDocumentMerger:
+    """XML 级文档合并"""
+
+    def __init__(self, base_path: str, unify_styles: bool = True):
+        """
+        Args:
+            base_path: 基准文档（结果文档的样式、编号定义与首节版式取自该文档）
+            unify_styles: 同名样式是否统一使用基准文档的定义
+        """
+        self.document = Document(base_path)
+        self.unify_styles = unify_styles
+        self.part = self.document.part
+        self.body = self.document.element.body
+
+        self._partnames: Set[str] = {str(part.partname) for part in self.part.package.iter_parts()}
+        self._adopted: Dict[int, object] = {}
+        self._styles = {el.get(qn('w:styleId')): el
+                        for el in self.document.styles.element.iterchildren(qn('w:style'))}
+        self._numbering = None
+        self._next_num_id = 1
+        self._next_abstract_id = 0
+        self._source_count = 0
+
+    # ---------- 追加 ----------
+
+    def append(self, source_path: str, section_break: bool = True) -> int:
+        """
+        追加文档
+
+        Args:
+            source_path: 源文档路径
+            section_break: 是否以分节符分隔（保留源文档的页面设置与页眉页脚）
+
+        Returns:
+            追加的 body 元素数
+        """
+        source = Document(source_path)
+        context = _SourceContext(source)
+        self._source_count += 1
+
+        source_sect_pr = source.element.body.find(qn('w:sectPr'))
+        target_sect_pr = self.body.find(qn('w:sectPr'))
+
+        if section_break and target_sect_pr is not None:
+            # 当前最后一节以段落级分节符结束，body 末尾的 sectPr 改为源文档的节属性
+            break_para = OxmlElement('w:p')
+            p_pr = OxmlElement('w:pPr')
+            p_pr.append(copy.deepcopy(target_sect_pr))
+            break_para.append(p_pr)
+            target_sect_pr.addprevious(break_para)
+
+            if source_sect_pr is not None:
+                new_sect_pr = copy.deepcopy(source_sect_pr)
+                self._remap(new_sect_pr, context)
+                target_sect_pr.addprevious(new_sect_pr)
+                self.body.remove(target_sect_pr)
+                target_sect_pr = new_sect_pr
+
+        appended = 0
+        for element in source.element.body.iterchildren():
+            if element.tag == qn('w:sectPr'):
+                continue
+            new_element = copy.deepcopy(element)
+            self._remap(new_element, context)
+            if target_sect_pr is not None:
+                target_sect_pr.addprevious(new_element)
+            else:
+                self.body.append(new_element)
+            appended += 1
+
+        logger.info(f"已追加文档: {os.path.basename(source_path)}, 元素 {appended} 个")
+        return appended
+
+    def _remap(self, element, context: _SourceContext):
+        """重映射拷贝内容中的关系、编号与样式引用"""
+        for node in element.iter(etree.Element):
+            for attr, value in node.attrib.items():
+                if attr.startswith(R_NAMESPACE):
+                    node.set(attr, self._map_rel(value, context))
+
+            tag = node.tag
+            value = node.get(_VAL)
+            if value is None:
+                continue
+            if tag in STYLE_REFERENCE_TAGS:
+                node.set(_VAL, self._map_style(value, context))
+            elif tag == _NUM_ID_TAG:
+                node.set(_VAL, self._map_num(value, context))
+
+    # ---------- 关系 ----------
+
+    def _map_rel(self, rId: str, context: _SourceContext) -> str:
+        if rId in context.rel_map:
+            return context.rel_map[rId]
+
+        rel = context.part.rels.get(rId)
+        if rel is None:
+            return rId
+
+        if rel.is_external:
+            new_rId = self.part.relate_to(rel.target_ref, rel.reltype, is_external=True)
+        elif rel.reltype == RT.IMAGE:
+            try:
+                # 按 SHA1 去重，同一图片在结果中只保存一份
+                new_rId, _ = self.part.get_or_add_image(io.BytesIO(rel.target_part.blob))
+                self._partnames.add(str(self.part.related_parts[new_rId].partname))
+            except Exception:
+                # python-docx 无法解析的格式（EMF/WMF 等）按普通部件迁移
+                new_rId = self.part.relate_to(self._adopt_part(rel.target_part), rel.reltype)
+        else:
+            new_rId = self.part.relate_to(self._adopt_part(rel.target_part), rel.reltype)
+
+        context.rel_map[rId] = new_rId
+        return new_rId
+
+    def _adopt_part(self, part):
+        """将源文档部件（及其下级部件）迁入结果文档，部件名冲突时重新编号"""
+        key = id(part)
+        if key in self._adopted:
+            return self._adopted[key]
+        self._adopted[key] = part
+
+        partname = self._reserve_partname(str(part.partname))
+        if partname != str(part.partname):
+            part.partname = PackURI(partname)
+
+        for rel in part.rels.values():
+            if not rel.is_external:
+                self._adopt_part(rel.target_part)
+        return part
+
+    def _reserve_partname(self, partname: str) -> str:
+        """登记部件名，与结果文档已有部件冲突时重新编号"""
+        if partname in self._partnames:
+            template = _partname_template(partname)
+            number = 1
+            while template % number in self._partnames:
+                number += 1
+            partname = template % number
+        self._partnames.add(partname)
+        return partname
+
+    # ---------- 编号 ----------
+
+    def _target_numbering(self):
+        if self._numbering is None:
+            self._numbering = self._numbering_part().element
+            num_ids = [int(el.get(qn('w:numId'))) for el in self._numbering.iterchildren(qn('w:num'))]
+            abstract_ids = [int(el.get(qn('w:abstractNumId')))
+                            for el in self._numbering.iterchildren(qn('w:abstractNum'))]
+            self._next_num_id = max(num_ids, default=0) + 1
+            self._next_abstract_id = max(abstract_ids, default=-1) + 1
+        return self._numbering
+
+    def _numbering_part(self):
+        """结果文档的编号部件；基准文档没有列表时 Word 不生成 numbering.xml，此时新建一个空的"""
+        if self._has_numbering_rel():
+            return self.part.numbering_part
+        # python-docx 的 NumberingPart.new() 未实现，这里直接构造
+        partname = self._reserve_partname('/word/numbering.xml')
+        part = NumberingPart(PackURI(partname), CT.WML_NUMBERING,
+                             parse_xml(f'<w:numbering {nsdecls("w")}/>'), self.part.package)
+        self.part.relate_to(part, RT.NUMBERING)
+        return part
+
+    def _has_numbering_rel(self) -> bool:
+        return any(rel.reltype == RT.NUMBERING for rel in self.part.rels.values())
+
+    def _map_num(self, num_id: Optional[str], context: _SourceContext) -> Optional[str]:
+        if num_id in (None, '0'):
+            return num_id
+        if num_id in context.num_map:
+            return context.num_map[num_id]
+
+        source_num = context.nums.get(num_id)
+        if source_num is None:
+            return num_id
+
+        numbering = self._target_numbering()
+        abstract_ref = source_num.find(qn('w:abstractNumId'))
+        source_abstract_id = abstract_ref.get(_VAL) if abstract_ref is not None else None
+
+        new_num = copy.deepcopy(source_num)
+        new_num_id = str(self._next_num_id)
+        self._next_num_id += 1
+        new_num.set(qn('w:numId'), new_num_id)
+
+        if source_abstract_id in context.abstracts:
+            if source_abstract_id not in context.abstract_map:
+                new_abstract = copy.deepcopy(context.abstracts[source_abstract_id])
+                new_abstract_id = str(self._next_abstract_id)
+                self._next_abstract_id += 1
+                new_abstract.set(qn('w:abstractNumId'), new_abstract_id)
+                # nsid 相同的列表会被 Word 视为同一列表
+                for nsid in new_abstract.findall(qn('w:nsid')):
+                    new_abstract.remove(nsid)
+                for style_ref in new_abstract.iter(qn('w:pStyle')):
+                    if style_ref.get(_VAL) is not None:
+                        style_ref.set(_VAL, self._map_style(style_ref.get(_VAL), context))
+                self._insert_abstract(numbering, new_abstract)
+                context.abstract_map[source_abstract_id] = new_abstract_id
+            abstract_ref = new_num.find(qn('w:abstractNumId'))
+            abstract_ref.set(_VAL, context.abstract_map[source_abstract_id])
+
+        numbering.append(new_num)
+        context.num_map[num_id] = new_num_id
+        return new_num_id
+
+    def _insert_abstract(self, numbering, abstract):
+        """w:abstractNum 必须位于全部 w:num 之前"""
+        first_num = numbering.find(qn('w:num'))
+        if first_num is not None:
+            first_num.addprevious(abstract)
+        else:
+            numbering.append(abstract)
+
+    # ---------- 样式 ----------
+
+    def _map_style(self, style_id: Optional[str], context: _SourceContext) -> Optional[str]:
+        if style_id is None:
+            return style_id
+        if style_id in context.style_map:
+            return context.style_map[style_id]
+
+        source_style = context.styles.get(style_id)
+        if source_style is None:
+            return style_id
+
+        target_style = self._styles.get(style_id)
+        if target_style is not None and (self.unify_styles or _same_xml(target_style, source_style)):
+            context.style_map[style_id] = style_id
+            return style_id
+
+        new_style = copy.deepcopy(source_style)
+        new_id = style_id
+        if target_style is not None:
+            # 保留源文档定义：改名为新样式
+            new_id = f"{style_id}{self._source_count}"
+            while new_id in self._styles:
+                new_id += '_'
+            new_style.set(qn('w:styleId'), new_id)
+            name = new_style.find(qn('w:name'))
+            if name is not None:
+                name.set(_VAL, f"{name.get(_VAL)} ({self._source_count})")
+            new_style.attrib.pop(qn('w:default'), None)
+
+        # 先登记映射，避免 basedOn/next 链成环时重复复制
+        context.style_map[style_id] = new_id
+        self._styles[new_id] = new_style
+        self.document.styles.element.append(new_style)
+
+        for link in new_style:
+            if link.tag in STYLE_LINK_TAGS and link.get(_VAL) is not None:
+                link.set(_VAL, self._map_style(link.get(_VAL), context))
+        for num_ref in new_style.iter(_NUM_ID_TAG):
+            if num_ref.get(_VAL) is not None:
+                num_ref.set(_VAL, self._map_num(num_ref.get(_VAL), context))
+        return new_id
+
+    # ---------- 输出 ----------
+
+    def remove_blank_paragraphs(self) -> int:
+        """删除空白段落"""
+        return remove_blank_paragraphs(self.body)
+
+    def save(self, output_path: str):
+        """写入同目录临时文件后替换目标文件"""
+        directory = os.path.dirname(os.path.abspath(output_path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(suffix='.docx.tmp', dir=directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                self.document.save(f)
+            os.replace(tmp_path, output_path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+
+def _same_xml(a, b) -> bool:
+    return etree.tostring(a) == etree.tostring(b)
+
+
+def estimate_body_pages(body) -> int:
+    """按段落数与表格数估算页数（段落 / 25 + 表格 * 0.5）"""
+    paragraphs = sum(1 for _ in body.iterchildren(_PARAGRAPH_TAG))
+    tables = sum(1 for _ in body.iterchildren(qn('w:tbl')))
+    return int(paragraphs / 25 + tables * 0.5)
@@ -20,6 +20,7 @@ project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root))
 
 from common.database import get_knowledge_base_db
+from common.fts_search import split_match_terms, build_match_query
 from common.logger import get_module_logger
 from common.config import get_config
 
@@ -926,22 +927,40 @@ class KnowledgeBaseManager:
                 conditions.append("dl.library_type = ?")
                 params.append(category)
 
-            # 简单的文本搜索（在文件名中搜索）
-            conditions.append("(d.original_filename LIKE ? OR d.tags LIKE ?)")
-            search_term = f"%{query}%"
-            params.extend([search_term, search_term])
+            indexable, _ = split_match_terms([query])
+            if indexable and self.db._fts_ready('documents_fts'):
+                # 全文索引（文件名、标签），按 bm25 相关度排序
+                conditions.append("documents_fts MATCH ?")
+                params.append(build_match_query(indexable))
+                where_clause = " AND ".join(conditions)
+
+                search_query = f"""
+                SELECT d.*, dl.library_name, p.product_name
+                FROM documents_fts f
+                JOIN documents d ON d.doc_id = f.rowid
+                JOIN document_libraries dl ON d.library_id = dl.library_id
+                LEFT JOIN products p ON dl.owner_id = p.product_id AND dl.owner_type = 'product'
+                WHERE {where_clause}
+                ORDER BY bm25(documents_fts), d.upload_time DESC
+                LIMIT 20
+                """
+            else:
+                # 简单的文本搜索（在文件名中搜索）
+                conditions.append("(d.original_filename LIKE ? OR d.tags LIKE ?)")
+                search_term = f"%{query}%"
+                params.extend([search_term, search_term])
 
-            where_clause = " AND ".join(conditions)
+                where_clause = " AND ".join(conditions)
 
-            search_query = f"""
-            SELECT d.*, dl.library_name, p.product_name
-            FROM documents d
-            JOIN document_libraries dl ON d.library_id = dl.library_id
-            LEFT JOIN products p ON dl.owner_id = p.product_id AND dl.owner_type = 'product'
-            WHERE {where_clause}
-            ORDER BY d.upload_time DESC
-            LIMIT 20
-            """
+                search_query = f"""
+                SELECT d.*, dl.library_name, p.product_name
+                FROM documents d
+                JOIN document_libraries dl ON d.library_id = dl.library_id
+                LEFT JOIN products p ON dl.owner_id = p.product_id AND dl.owner_type = 'product'
+                WHERE {where_clause}
+                ORDER BY d.upload_time DESC
+                LIMIT 20
+                """
 
             results = self.db.execute_query(search_query, tuple(params))
 
@@ -4,7 +4,7 @@ RAG知识库API接口
 """
 import logging
 from flask import Blueprint, request, jsonify
-from .rag_engine import get_rag_engine, LANGCHAIN_AVAILABLE
+from .rag_engine import get_rag_engine, is_rag_engine_ready, LANGCHAIN_AVAILABLE
 from .manager import KnowledgeBaseManager
 
 logger = logging.getLogger(__name__)
@@ -30,6 +30,7 @@ def get_rag_status():
         return jsonify({
             'success': True,
             'available': True,
+            'ready': is_rag_engine_ready(),
             'stats': stats
         })
 
@@ -106,6 +107,63 @@ def vectorize_document():
         }), 500
 
 
+@rag_api.route('/rag/vectorize_documents', methods=['POST'])
+def vectorize_documents():
+    """
+    批量向量化文档
+
+    Request JSON:
+    {
+        "documents": [
+            {"file_path": "/path/to/a.pdf", "metadata": {"company_id": 8, "document_id": 123}},
+            {"file_path": "/path/to/b.docx", "metadata": {"company_id": 8, "document_id": 124}}
+        ],
+        "batch_size": 64   // 可选，每批向量化的文本块数
+    }
+    """
+    try:
+        if not LANGCHAIN_AVAILABLE:
+            return jsonify({
+                'success': False,
+                'error': 'RAG功能不可用，请安装依赖: pip install -r requirements_rag.txt'
+            }), 503
+
+        data = request.json or {}
+        items = [
+            {'file_path': item.get('file_path'), 'metadata': item.get('metadata') or {}}
+            for item in data.get('documents') or []
+        ]
+
+        if not items or any(not item['file_path'] for item in items):
+            return jsonify({
+                'success': False,
+                'error': '缺少documents参数或file_path'
+            }), 400
+
+        engine = get_rag_engine()
+        kwargs = {'batch_size': int(data['batch_size'])} if data.get('batch_size') else {}
+        result = engine.add_documents(items, **kwargs)
+
+        # 更新成功文档的状态为已索引
+        kb_manager = None
+        for item, file_result in zip(items, result['files']):
+            document_id = item['metadata'].get('document_id')
+            if document_id and file_result['success']:
+                kb_manager = kb_manager or KnowledgeBaseManager()
+                kb_manager.update_document_status(doc_id=document_id, vector_status='completed')
+
+        logger.info(f"批量向量化完成: {len(items)} 个文档, 文本块 {result['chunks_count']}, "
+                    f"耗时 {result['timings']['total']:.2f}s")
+        return jsonify(result), (200 if result['success'] else 207)
+
+    except Exception as e:
+        logger.error(f"批量向量化文档异常: {e}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
 @rag_api.route('/rag/search', methods=['POST'])
 def search_knowledge():
     """
@@ -1,10 +1,25 @@
 """
 RAG知识库引擎
 基于LangChain + Chroma实现智能文档检索和问答
+
+- 引擎为进程内共享单例，Embedding 模型与 Chroma 在首次使用时加载（同一模型在进程内只加载一次）
+- 可在应用启动时由后台线程预热（加载模型、打开向量库并完成一次推理），避免首次检索等待
+- add_documents 批量导入：多线程加载/切分文件，切分结果按批向量化后写入向量库，返回各阶段耗时
+
+配置（环境变量）：
+    RAG_PREWARM            应用启动时后台预热，默认 false
+    RAG_EMBEDDING_MODEL    Embedding 模型，默认 shibing624/text2vec-base-chinese
+    RAG_EMBED_BATCH_SIZE   每批向量化的文本块数，默认 64
+    RAG_EMBED_THREADS      向量化使用的 CPU 线程数，默认 0（由 torch 决定）
+    RAG_INGEST_WORKERS     批量导入时加载/切分文件的线程数，默认 4
 """
 import os
+import hashlib
 import logging
-from typing import List, Dict, Any, Optional
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Any, Optional, Tuple
 from pathlib import Path
 
 try:
@@ -23,6 +38,38 @@ except ImportError as e:
 
 logger = logging.getLogger(__name__)
 
+PREWARM_ENABLED = os.getenv('RAG_PREWARM', 'false').lower() in ('1', 'true', 'yes')
+EMBEDDING_MODEL = os.getenv('RAG_EMBEDDING_MODEL', 'shibing624/text2vec-base-chinese')
+EMBED_BATCH_SIZE = int(os.getenv('RAG_EMBED_BATCH_SIZE', '64'))
+EMBED_THREADS = int(os.getenv('RAG_EMBED_THREADS', '0'))
+INGEST_WORKERS = int(os.getenv('RAG_INGEST_WORKERS', '4'))
+
+# 进程内共享的 Embedding 模型（按模型名）
+_embeddings: Dict[str, Any] = {}
+_embeddings_lock = threading.Lock()
+
+
+def get_shared_embeddings(model_name: str = EMBEDDING_MODEL):
+    """获取进程内共享的 Embedding 模型（首次调用时加载）"""
+    if model_name not in _embeddings:
+        with _embeddings_lock:
+            if model_name not in _embeddings:
+                logger.info(f"正在加载Embedding模型: {model_name}")
+                start = time.time()
+                if EMBED_THREADS > 0:
+                    try:
+                        import torch
+                        torch.set_num_threads(EMBED_THREADS)
+                    except ImportError:
+                        pass
+                _embeddings[model_name] = HuggingFaceEmbeddings(
+                    model_name=model_name,
+                    model_kwargs={'device': 'cpu'},
+                    encode_kwargs={'normalize_embeddings': True, 'batch_size': EMBED_BATCH_SIZE}
+                )
+                logger.info(f"Embedding模型加载完成，耗时 {time.time() - start:.2f}s")
+    return _embeddings[model_name]
+
 
 class RAGEngine:
     """RAG知识库引擎"""
@@ -44,13 +91,11 @@ class RAGEngine:
         # 确保目录存在
         os.makedirs(self.persist_directory, exist_ok=True)
 
-        # 初始化Embedding模型（中文优化）
-        logger.info("正在加载Embedding模型...")
-        self.embeddings = HuggingFaceEmbeddings(
-            model_name="shibing624/text2vec-base-chinese",
-            model_kwargs={'device': 'cpu'},
-            encode_kwargs={'normalize_embeddings': True}
-        )
+        # Embedding模型（中文优化）与向量存储在首次使用时加载
+        self._embeddings = None
+        self._vectorstore = None
+        self._init_lock = threading.Lock()
+        self._ready = False
 
         # 初始化文本切分器（优化参数以提升搜索质量）
         self.text_splitter = RecursiveCharacterTextSplitter(
@@ -60,15 +105,58 @@ class RAGEngine:
             separators=["\n\n", "\n", "。", "！", "？", "；", "，", " ", ""]  # 优先按段落和句子分割
         )
 
-        # 初始化或加载向量存储
-        logger.info(f"初始化向量数据库: {self.persist_directory}")
-        self.vectorstore = Chroma(
-            persist_directory=self.persist_directory,
-            embedding_function=self.embeddings
-        )
-
         logger.info("RAG引擎初始化完成")
 
+    @property
+    def embeddings(self):
+        """Embedding模型（进程内共享）"""
+        if self._embeddings is None:
+            self._embeddings = get_shared_embeddings()
+        return self._embeddings
+
+    @property
+    def vectorstore(self):
+        """向量存储（首次访问时打开）"""
+        if self._vectorstore is None:
+            with self._init_lock:
+                if self._vectorstore is None:
+                    logger.info(f"初始化向量数据库: {self.persist_directory}")
+                    self._vectorstore = Chroma(
+                        persist_directory=self.persist_directory,
+                        embedding_function=self.embeddings
+                    )
+        return self._vectorstore
+
+    @property
+    def is_ready(self) -> bool:
+        """模型与向量库是否已完成预热"""
+        return self._ready
+
+    def warm_up(self) -> Dict[str, float]:
+        """
+        预热：加载模型、打开向量库并完成一次推理
+
+        Returns:
+            各步骤耗时（秒）
+        """
+        timings = {}
+        start = time.time()
+        embeddings = self.embeddings
+        timings['load_model'] = time.time() - start
+
+        start = time.time()
+        _ = self.vectorstore
+        timings['open_vectorstore'] = time.time() - start
+
+        # 首次推理有额外的初始化开销
+        start = time.time()
+        embeddings.embed_query("预热")
+        timings['first_inference'] = time.time() - start
+
+        self._ready = True
+        logger.info(f"RAG引擎预热完成: {', '.join(f'{k}={v:.2f}s' for k, v in timings.items())}")
+        return timings
+
     def load_document(self, file_path: str) -> List[Document]:
         """
         加载文档
@@ -115,63 +203,21 @@ class RAGEngine:
             处理结果
         """
         try:
-            # 加载文档
-            documents = self.load_document(file_path)
-
-            # 添加元数据
-            if metadata:
-                for doc in documents:
-                    doc.metadata.update(metadata)
-
-            # 文本切分
-            splits = self.text_splitter.split_documents(documents)
+            # 加载文档并切分
+            splits, _ = self._load_and_split(file_path, metadata)
             logger.info(f"文档切分为{len(splits)}个文本块")
 
-            # 添加到向量存储
-            ids = self.vectorstore.add_documents(splits)
+            # 添加到向量存储（按文件路径和序号覆盖，再清理旧版本多出的文本块）
+            ids = self.vectorstore.add_documents(
+                splits, ids=[self._chunk_id(file_path, seq) for seq in range(len(splits))]
+            )
+            self._remove_stale_chunks(file_path, ids)
 
             # 持久化
-            self.vectorstore.persist()
+            self._persist()
 
             # 提取文档目录（如果提供了document_id）
-            toc_count = 0
-            if metadata and 'document_id' in metadata:
-                try:
-                    from .toc_extractor import TOCExtractor
-                    from ...common.database import get_knowledge_base_db
-
-                    doc_id = metadata['document_id']
-                    extractor = TOCExtractor()
-                    toc_entries = extractor.extract_toc(file_path, doc_id)
-
-                    if toc_entries:
-                        db = get_knowledge_base_db()
-                        # 删除旧的目录条目
-                        db.delete_toc_by_doc(doc_id)
-
-                        # 插入新的目录条目（需要先插入以获取toc_id，然后更新parent关系）
-                        toc_id_map = {}  # sequence_order -> toc_id
-                        for entry in toc_entries:
-                            toc_id = db.insert_toc_entry(
-                                doc_id=entry['doc_id'],
-                                heading_level=entry['heading_level'],
-                                heading_text=entry['heading_text'],
-                                section_number=entry.get('section_number'),
-                                keywords=entry.get('keywords'),
-                                page_number=entry.get('page_number'),
-                                parent_toc_id=None,  # 第一次插入先不设置parent
-                                sequence_order=entry['sequence_order']
-                            )
-                            toc_id_map[entry['sequence_order']] = toc_id
-
-                        # TODO: 更新parent_toc_id关系（需要UPDATE语句）
-                        # 暂时先不实现parent关系，后续可以通过heading_level重建
-
-                        toc_count = len(toc_entries)
-                        logger.info(f"提取了 {toc_count} 个目录条目")
-
-                except Exception as e:
-                    logger.warning(f"提取目录失败，但不影响向量化: {e}")
+            toc_count = self._extract_toc(file_path, metadata)
 
             return {
                 'success': True,
@@ -188,6 +234,208 @@ class RAGEngine:
                 'error': str(e)
             }
 
+    def add_documents(
+        self,
+        items: List[Dict[str, Any]],
+        batch_size: int = EMBED_BATCH_SIZE,
+        workers: int = INGEST_WORKERS
+    ) -> Dict[str, Any]:
+        """
+        批量添加文档到知识库
+
+        文件的加载、切分与目录提取在线程池中并行；主线程将切分结果按批向量化后写入向量库，
+        向量化当前批次时后续文件仍在加载。文本块ID由文件路径和序号决定，重复导入时覆盖，
+        文件变短后多出的旧文本块在导入完成后删除。
+
+        Args:
+            items: [{'file_path': 文档路径, 'metadata': 文档元数据}, ...]
+            batch_size: 每批向量化的文本块数
+            workers: 加载/切分文件的线程数
+
+        Returns:
+            {
+                'success': bool,       # 全部文件成功
+                'files': [...],        # 每个文件的结果，顺序与 items 一致
+                'chunks_count': int,
+                'timings': {...}       # 各阶段累计耗时及总耗时（秒）
+            }
+        """
+        start_time = time.time()
+        timings = {'load': 0.0, 'split': 0.0, 'toc': 0.0, 'embed': 0.0, 'upsert': 0.0}
+        files = [
+            {'file_path': item['file_path'], 'success': False, 'chunks_count': 0, 'toc_count': 0}
+            for item in items
+        ]
+        pending: List[Tuple[int, str, Document]] = []  # (文件序号, 文本块ID, 文本块)
+        chunk_ids: Dict[int, List[str]] = {}  # 文件序号 -> 本次写入的文本块ID
+
+        def prepare(index: int):
+            item = items[index]
+            splits, stage_times = self._load_and_split(item['file_path'], item.get('metadata'))
+            toc_start = time.time()
+            toc_count = self._extract_toc(item['file_path'], item.get('metadata'))
+            stage_times['toc'] = time.time() - toc_start
+            return splits, toc_count, stage_times
+
+        def flush(count: int):
+            batch = pending[:count]
+            del pending[:count]
+            try:
+                self._upsert_chunks(batch, timings)
+                for index, _, _ in batch:
+                    files[index]['chunks_count'] += 1
+            except Exception as e:
+                logger.error(f"写入向量库失败: {e}")
+                for index in {index for index, _, _ in batch}:
+                    files[index]['success'] = False
+                    files[index]['error'] = f"写入向量库失败: {e}"
+
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            futures = {executor.submit(prepare, index): index for index in range(len(items))}
+            for future in as_completed(futures):
+                index = futures[future]
+                try:
+                    splits, toc_count, stage_times = future.result()
+                except Exception as e:
+                    files[index]['error'] = str(e)
+                    continue
+
+                for stage, seconds in stage_times.items():
+                    timings[stage] += seconds
+                files[index].update(success=True, toc_count=toc_count)
+                chunk_ids[index] = []
+                for seq, doc in enumerate(splits):
+                    chunk_id = self._chunk_id(items[index]['file_path'], seq)
+                    chunk_ids[index].append(chunk_id)
+                    pending.append((index, chunk_id, doc))
+
+                while len(pending) >= batch_size:
+                    flush(batch_size)
+
+        if pending:
+            flush(len(pending))
+
+        for index, ids in chunk_ids.items():
+            if files[index]['success']:
+                self._remove_stale_chunks(items[index]['file_path'], ids)
+
+        chunks_count = sum(f['chunks_count'] for f in files)
+        if chunks_count:
+            self._persist()
+
+        timings['total'] = time.time() - start_time
+        succeeded = sum(1 for f in files if f['success'])
+        logger.info(f"批量导入完成: 文件 {succeeded}/{len(files)}, 文本块 {chunks_count}, "
+                    f"耗时: {', '.join(f'{k}={v:.2f}s' for k, v in timings.items())}")
+
+        return {
+            'success': succeeded == len(files),
+            'files': files,
+            'chunks_count': chunks_count,
+            'timings': timings
+        }
+
+    def _load_and_split(
+        self,
+        file_path: str,
+        metadata: Optional[Dict[str, Any]]
+    ) -> Tuple[List[Document], Dict[str, float]]:
+        """加载并切分文档，返回 (文本块列表, 各阶段耗时)"""
+        start = time.time()
+        documents = self.load_document(file_path)
+        loaded = time.time()
+
+        # 添加元数据
+        if metadata:
+            for doc in documents:
+                doc.metadata.update(metadata)
+
+        # 文本切分
+        splits = self.text_splitter.split_documents(documents)
+        return splits, {'load': loaded - start, 'split': time.time() - loaded}
+
+    def _upsert_chunks(self, batch: List[Tuple[int, str, Document]], timings: Dict[str, float]):
+        """向量化一批文本块并写入向量库"""
+        texts = [doc.page_content for _, _, doc in batch]
+
+        start = time.time()
+        vectors = self.embeddings.embed_documents(texts)
+        timings['embed'] += time.time() - start
+
+        start = time.time()
+        ids = [chunk_id for _, chunk_id, _ in batch]
+        metadatas = [doc.metadata for _, _, doc in batch]
+        collection = getattr(self.vectorstore, '_collection', None)
+        if hasattr(collection, 'upsert'):
+            # 直接写入已算好的向量（LangChain 的 Chroma 没有公开按向量写入的接口）
+            collection.upsert(ids=ids, embeddings=vectors, metadatas=metadatas, documents=texts)
+        else:
+            self.vectorstore.add_texts(texts, metadatas=metadatas, ids=ids)
+        timings['upsert'] += time.time() - start
+
+    def _remove_stale_chunks(self, file_path: str, keep_ids: List[str]):
+        """删除该文件此前导入、本次未覆盖的文本块（文件内容变短时）"""
+        try:
+            existing = self.vectorstore.get(where={'source': file_path}, include=[])['ids']
+            stale = sorted(set(existing) - set(keep_ids))
+            if stale:
+                self.vectorstore.delete(ids=stale)
+                logger.info(f"已删除 {file_path} 的 {len(stale)} 个旧文本块")
+        except Exception as e:
+            logger.warning(f"清理旧文本块失败: {file_path}, 错误: {e}")
+
+    @staticmethod
+    def _chunk_id(file_path: str, seq: int) -> str:
+        return hashlib.sha1(f"{file_path}\0{seq}".encode('utf-8')).hexdigest()
+
+    def _persist(self):
+        # 新版 Chroma 自动持久化，不再提供 persist()
+        if hasattr(self.vectorstore, 'persist'):
+            self.vectorstore.persist()
+
+    def _extract_toc(self, file_path: str, metadata: Optional[Dict[str, Any]]) -> int:
+        """提取文档目录（如果提供了document_id），返回目录条目数"""
+        toc_count = 0
+        if metadata and 'document_id' in metadata:
+            try:
+                from .toc_extractor import TOCExtractor
+                from ...common.database import get_knowledge_base_db
+
+                doc_id = metadata['document_id']
+                extractor = TOCExtractor()
+                toc_entries = extractor.extract_toc(file_path, doc_id)
+
+                if toc_entries:
+                    db = get_knowledge_base_db()
+                    # 删除旧的目录条目
+                    db.delete_toc_by_doc(doc_id)
+
+                    # 插入新的目录条目（需要先插入以获取toc_id，然后更新parent关系）
+                    toc_id_map = {}  # sequence_order -> toc_id
+                    for entry in toc_entries:
+                        toc_id = db.insert_toc_entry(
+                            doc_id=entry['doc_id'],
+                            heading_level=entry['heading_level'],
+                            heading_text=entry['heading_text'],
+                            section_number=entry.get('section_number'),
+                            keywords=entry.get('keywords'),
+                            page_number=entry.get('page_number'),
+                            parent_toc_id=None,  # 第一次插入先不设置parent
+                            sequence_order=entry['sequence_order']
+                        )
+                        toc_id_map[entry['sequence_order']] = toc_id
+
+                    # TODO: 更新parent_toc_id关系（需要UPDATE语句）
+                    # 暂时先不实现parent关系，后续可以通过heading_level重建
+
+                    toc_count = len(toc_entries)
+                    logger.info(f"提取了 {toc_count} 个目录条目")
+
+            except Exception as e:
+                logger.warning(f"提取目录失败，但不影响向量化: {e}")
+
+        return toc_count
+
     def search(
         self,
         query: str,
@@ -462,7 +710,7 @@ class RAGEngine:
 
             if ids:
                 self.vectorstore.delete(ids)
-                self.vectorstore.persist()
+                self._persist()
 
             return {
                 'success': True,
@@ -501,10 +749,46 @@ class RAGEngine:
 
 # 全局单例
 _rag_engine = None
+_rag_engine_lock = threading.Lock()
+_prewarm_thread: Optional[threading.Thread] = None
 
 def get_rag_engine() -> RAGEngine:
     """获取RAG引擎单例"""
     global _rag_engine
     if _rag_engine is None:
-        _rag_engine = RAGEngine()
-    return _rag_engine
\ No newline at end of file
+        with _rag_engine_lock:
+            if _rag_engine is None:
+                _rag_engine = RAGEngine()
+    return _rag_engine
+
+
+def is_rag_engine_ready() -> bool:
+    """RAG引擎是否已预热完成"""
+    return _rag_engine is not None and _rag_engine.is_ready
+
+
+def prewarm_rag_engine(force: bool = False) -> Optional[threading.Thread]:
+    """
+    在后台线程中预热RAG引擎（由 RAG_PREWARM 开关控制）
+
+    Args:
+        force: 忽略开关强制预热
+
+    Returns:
+        预热线程；未启用或依赖缺失时返回 None
+    """
+    global _prewarm_thread
+    if not (PREWARM_ENABLED or force) or not LANGCHAIN_AVAILABLE or is_rag_engine_ready():
+        return None
+
+    def run():
+        try:
+            get_rag_engine().warm_up()
+        except Exception as e:
+            logger.warning(f"RAG引擎预热失败（将在首次使用时重试）: {e}")
+
+    with _rag_engine_lock:
+        if _prewarm_thread is None or not _prewarm_thread.is_alive():
+            _prewarm_thread = threading.Thread(target=run, name="rag-prewarm", daemon=True)
+            _prewarm_thread.start()
+    return _prewarm_thread
\ No newline at end of file
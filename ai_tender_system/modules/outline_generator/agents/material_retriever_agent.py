@@ -13,6 +13,8 @@
 - 优先检索中标标书的内容
 - 按评分点关联度排序
 - 提供素材来源追溯
+- 所有维度/章节的检索词一次性批量检索（每个素材源一次查询），
+  避免检索耗时与 维度数 × 检索词数 × 素材源数 成正比
 """
 
 import json
@@ -20,6 +22,8 @@ import logging
 from typing import Dict, List, Any, Optional
 from pathlib import Path
 
+from ai_tender_system.common import like_contains
+
 from .base_agent import BaseAgent
 
 
@@ -103,44 +107,32 @@ class MaterialRetrieverAgent(BaseAgent):
         total_capabilities = 0
         total_cases = 0
 
-        for dim_strategy in dimension_strategies:
-            dim_name = dim_strategy.get('dimension', '')
-            criteria = dim_strategy.get('criteria_analysis', [])
-
-            # 提取搜索关键词
-            search_terms = self._extract_search_terms(dim_name, criteria)
+        # 先提取所有维度的搜索关键词，再一次性批量检索
+        term_groups = [
+            self._extract_search_terms(
+                dim_strategy.get('dimension', ''),
+                dim_strategy.get('criteria_analysis', [])
+            )
+            for dim_strategy in dimension_strategies
+        ]
+        retrieved = self.retrieve_batch(
+            company_id, term_groups,
+            include_excerpts=include_excerpts,
+            include_capabilities=include_capabilities,
+            include_cases=include_cases,
+            limit=max_per_dimension,
+            case_limit=max_per_dimension // 2
+        )
 
+        for dim_strategy, dim_retrieved in zip(dimension_strategies, retrieved):
             materials = {
-                "dimension": dim_name,
+                "dimension": dim_strategy.get('dimension', ''),
                 "priority": dim_strategy.get('priority', 'medium'),
-                "excerpts": [],
-                "capabilities": [],
-                "cases": []
+                **dim_retrieved
             }
-
-            # 1. 检索标书片段
-            if include_excerpts:
-                excerpts = self._retrieve_excerpts(
-                    company_id, search_terms, max_per_dimension
-                )
-                materials['excerpts'] = excerpts
-                total_excerpts += len(excerpts)
-
-            # 2. 检索产品能力
-            if include_capabilities:
-                capabilities = self._retrieve_capabilities(
-                    company_id, search_terms, max_per_dimension
-                )
-                materials['capabilities'] = capabilities
-                total_capabilities += len(capabilities)
-
-            # 3. 检索案例
-            if include_cases:
-                cases = self._retrieve_cases(
-                    company_id, search_terms, max_per_dimension // 2
-                )
-                materials['cases'] = cases
-                total_cases += len(cases)
+            total_excerpts += len(materials['excerpts'])
+            total_capabilities += len(materials['capabilities'])
+            total_cases += len(materials['cases'])
 
             # 生成素材使用建议
             materials['usage_suggestions'] = self._generate_usage_suggestions(
@@ -202,7 +194,50 @@ class MaterialRetrieverAgent(BaseAgent):
                 if key in term:
                     expanded_terms.extend(synonyms)
 
-        return list(set(expanded_terms))
+        # 去重并保持顺序（检索时按顺序截取前几个关键词）
+        return list(dict.fromkeys(expanded_terms))
+
+    def retrieve_batch(
+        self,
+        company_id: int,
+        term_groups: List[List[str]],
+        include_excerpts: bool = True,
+        include_capabilities: bool = True,
+        include_cases: bool = True,
+        limit: int = 5,
+        case_limit: int = None
+    ) -> List[Dict[str, List[Dict[str, Any]]]]:
+        """
+        批量检索多组关键词（每组对应一个评分维度或大纲章节）的素材
+
+        所有组的关键词去重后，每个素材源只执行一次批量查询，再按组合并排序。
+
+        Args:
+            company_id: 企业ID
+            term_groups: 每组的搜索关键词
+            include_excerpts: 是否包含标书片段
+            include_capabilities: 是否包含产品能力
+            include_cases: 是否包含案例
+            limit: 每组片段/能力的最大数量
+            case_limit: 每组案例的最大数量（默认 limit // 2）
+
+        Returns:
+            与 term_groups 一一对应的 {"excerpts", "capabilities", "cases"}
+        """
+        if case_limit is None:
+            case_limit = limit // 2
+
+        empty = [[] for _ in term_groups]
+        excerpts = self._retrieve_excerpts_batch(company_id, term_groups, limit) if include_excerpts else empty
+        capabilities = (
+            self._retrieve_capabilities_batch(company_id, term_groups, limit) if include_capabilities else empty
+        )
+        cases = self._retrieve_cases_batch(company_id, term_groups, case_limit) if include_cases else empty
+
+        return [
+            {"excerpts": e, "capabilities": c, "cases": k}
+            for e, c, k in zip(excerpts, capabilities, cases)
+        ]
 
     def _retrieve_excerpts(
         self,
@@ -211,42 +246,55 @@ class MaterialRetrieverAgent(BaseAgent):
         limit: int
     ) -> List[Dict[str, Any]]:
         """从标书素材库检索片段"""
+        return self._retrieve_excerpts_batch(company_id, [search_terms], limit)[0]
+
+    def _retrieve_excerpts_batch(
+        self,
+        company_id: int,
+        term_groups: List[List[str]],
+        limit: int
+    ) -> List[List[Dict[str, Any]]]:
+        """从标书素材库批量检索片段"""
         try:
-            from ai_tender_system.modules.tender_library import ExcerptManager
-            manager = ExcerptManager(self.db_path)
-
-            all_excerpts = []
-            seen_ids = set()
-
-            for term in search_terms[:5]:  # 限制搜索词数量
-                excerpts = manager.search_by_keyword(
-                    company_id=company_id,
-                    keyword=term,
-                    won_only=True,
-                    limit=limit
-                )
+            from ai_tender_system.modules.tender_library import get_excerpt_manager
+            manager = get_excerpt_manager(self.db_path)
+
+            groups = [terms[:5] for terms in term_groups]  # 限制搜索词数量
+            by_term = manager.search_by_keywords(
+                company_id=company_id,
+                keywords=[term for terms in groups for term in terms],
+                won_only=True,
+                limit=limit
+            )
 
-                for exc in excerpts:
-                    if exc['excerpt_id'] not in seen_ids:
-                        seen_ids.add(exc['excerpt_id'])
-                        all_excerpts.append({
-                            "excerpt_id": exc['excerpt_id'],
-                            "title": exc.get('chapter_title', ''),
-                            "content_preview": exc.get('content', '')[:200] + '...' if exc.get('content') else '',
-                            "category": exc.get('category', ''),
-                            "quality_score": exc.get('quality_score', 0),
-                            "source_doc": exc.get('doc_name', ''),
-                            "bid_result": exc.get('bid_result', ''),
-                            "match_term": term
-                        })
-
-            # 按质量分排序
-            all_excerpts.sort(key=lambda x: x['quality_score'], reverse=True)
-            return all_excerpts[:limit]
+            results = []
+            for terms in groups:
+                all_excerpts = []
+                seen_ids = set()
+
+                for term in terms:
+                    for exc in by_term.get(term, []):
+                        if exc['excerpt_id'] not in seen_ids:
+                            seen_ids.add(exc['excerpt_id'])
+                            all_excerpts.append({
+                                "excerpt_id": exc['excerpt_id'],
+                                "title": exc.get('chapter_title', ''),
+                                "content_preview": exc.get('content', '')[:200] + '...' if exc.get('content') else '',
+                                "category": exc.get('category', ''),
+                                "quality_score": exc.get('quality_score', 0),
+                                "source_doc": exc.get('doc_name', ''),
+                                "bid_result": exc.get('bid_result', ''),
+                                "match_term": term
+                            })
+
+                # 按质量分排序
+                all_excerpts.sort(key=lambda x: x['quality_score'], reverse=True)
+                results.append(all_excerpts[:limit])
+            return results
 
         except Exception as e:
             self.logger.warning(f"检索标书片段失败: {e}")
-            return []
+            return [[] for _ in term_groups]
 
     def _retrieve_capabilities(
         self,
@@ -255,43 +303,57 @@ class MaterialRetrieverAgent(BaseAgent):
         limit: int
     ) -> List[Dict[str, Any]]:
         """从产品能力索引检索"""
-        try:
-            from ai_tender_system.modules.product_capability import CapabilitySearcher
-            searcher = CapabilitySearcher(self.db_path)
-
-            all_capabilities = []
-            seen_ids = set()
-
-            for term in search_terms[:5]:
-                results = searcher.search(
-                    query=term,
-                    company_id=company_id,
-                    method='hybrid',
-                    top_k=limit,
-                    min_score=0.4
-                )
+        return self._retrieve_capabilities_batch(company_id, [search_terms], limit)[0]
 
-                for cap in results:
-                    if cap['capability_id'] not in seen_ids:
-                        seen_ids.add(cap['capability_id'])
-                        all_capabilities.append({
-                            "capability_id": cap['capability_id'],
-                            "name": cap.get('capability_name', ''),
-                            "description": cap.get('capability_description', ''),
-                            "type": cap.get('capability_type', ''),
-                            "evidence": cap.get('original_text', ''),
-                            "doc_name": cap.get('doc_name', ''),
-                            "match_score": cap.get('match_score', 0),
-                            "match_term": term
-                        })
-
-            # 按匹配分排序
-            all_capabilities.sort(key=lambda x: x['match_score'], reverse=True)
-            return all_capabilities[:limit]
+    def _retrieve_capabilities_batch(
+        self,
+        company_id: int,
+        term_groups: List[List[str]],
+        limit: int
+    ) -> List[List[Dict[str, Any]]]:
+        """从产品能力索引批量检索"""
+        try:
+            from ai_tender_system.modules.product_capability import get_capability_searcher
+            searcher = get_capability_searcher(self.db_path)
+
+            groups = [terms[:5] for terms in term_groups]
+            unique_terms = list(dict.fromkeys(term for terms in groups for term in terms))
+            by_term = dict(zip(unique_terms, searcher.search_batch(
+                queries=unique_terms,
+                company_id=company_id,
+                method='hybrid',
+                top_k=limit,
+                min_score=0.4
+            )))
+
+            results = []
+            for terms in groups:
+                all_capabilities = []
+                seen_ids = set()
+
+                for term in terms:
+                    for cap in by_term.get(term, []):
+                        if cap['capability_id'] not in seen_ids:
+                            seen_ids.add(cap['capability_id'])
+                            all_capabilities.append({
+                                "capability_id": cap['capability_id'],
+                                "name": cap.get('capability_name', ''),
+                                "description": cap.get('capability_description', ''),
+                                "type": cap.get('capability_type', ''),
+                                "evidence": cap.get('original_text', ''),
+                                "doc_name": cap.get('doc_name', ''),
+                                "match_score": cap.get('match_score', 0),
+                                "match_term": term
+                            })
+
+                # 按匹配分排序
+                all_capabilities.sort(key=lambda x: x['match_score'], reverse=True)
+                results.append(all_capabilities[:limit])
+            return results
 
         except Exception as e:
             self.logger.warning(f"检索产品能力失败: {e}")
-            return []
+            return [[] for _ in term_groups]
 
     def _retrieve_cases(
         self,
@@ -300,6 +362,20 @@ class MaterialRetrieverAgent(BaseAgent):
         limit: int
     ) -> List[Dict[str, Any]]:
         """从案例库检索"""
+        return self._retrieve_cases_batch(company_id, [search_terms], limit)[0]
+
+    def _retrieve_cases_batch(
+        self,
+        company_id: int,
+        term_groups: List[List[str]],
+        limit: int
+    ) -> List[List[Dict[str, Any]]]:
+        """从案例库批量检索（一次查询取出所有组的候选案例，再按组过滤）"""
+        groups = [terms[:3] for terms in term_groups]
+        unique_terms = list(dict.fromkeys(term for terms in groups for term in terms))
+        if not unique_terms or limit <= 0:
+            return [[] for _ in term_groups]
+
         try:
             import sqlite3
             conn = sqlite3.connect(self.db_path)
@@ -309,7 +385,7 @@ class MaterialRetrieverAgent(BaseAgent):
             conditions = []
             params = [company_id]
 
-            for term in search_terms[:3]:
+            for term in unique_terms:
                 conditions.append(
                     "(case_title LIKE ? OR customer_name LIKE ? OR industry LIKE ?)"
                 )
@@ -321,29 +397,41 @@ class MaterialRetrieverAgent(BaseAgent):
                 FROM case_studies
                 WHERE company_id = ? AND ({' OR '.join(conditions)})
                 ORDER BY created_at DESC
-                LIMIT {limit}
             """
 
-            cursor = conn.execute(sql, params)
-            cases = []
-
-            for row in cursor.fetchall():
-                cases.append({
-                    "case_id": row['case_id'],
-                    "title": row['case_title'],
-                    "customer": row['customer_name'],
-                    "industry": row['industry'],
-                    "amount": row['contract_amount'],
-                    "status": row['case_status'],
-                    "type": row['contract_type']
-                })
-
-            conn.close()
-            return cases
+            try:
+                rows = conn.execute(sql, params).fetchall()
+            finally:
+                conn.close()
+
+            results = []
+            for terms in groups:
+                cases = []
+                for row in rows:
+                    if len(cases) >= limit:
+                        break
+                    if not any(
+                        like_contains(row['case_title'], term)
+                        or like_contains(row['customer_name'], term)
+                        or like_contains(row['industry'], term)
+                        for term in terms
+                    ):
+                        continue
+                    cases.append({
+                        "case_id": row['case_id'],
+                        "title": row['case_title'],
+                        "customer": row['customer_name'],
+                        "industry": row['industry'],
+                        "amount": row['contract_amount'],
+                        "status": row['case_status'],
+                        "type": row['contract_type']
+                    })
+                results.append(cases)
+            return results
 
         except Exception as e:
             self.logger.warning(f"检索案例失败: {e}")
-            return []
+            return [[] for _ in term_groups]
 
     def _generate_usage_suggestions(
         self,
@@ -478,11 +566,30 @@ class MaterialRetrieverAgent(BaseAgent):
         Returns:
             该章节的素材
         """
-        search_terms = [chapter_title]
+        return self.get_materials_for_chapters([chapter_title], company_id, max_results)[0]
 
-        return {
-            "chapter": chapter_title,
-            "excerpts": self._retrieve_excerpts(company_id, search_terms, max_results),
-            "capabilities": self._retrieve_capabilities(company_id, search_terms, max_results),
-            "cases": self._retrieve_cases(company_id, search_terms, max_results // 2)
-        }
+    def get_materials_for_chapters(
+        self,
+        chapter_titles: List[str],
+        company_id: int,
+        max_results: int = 10
+    ) -> List[Dict[str, Any]]:
+        """
+        为多个大纲章节批量检索素材
+
+        Args:
+            chapter_titles: 章节标题列表
+            company_id: 企业ID
+            max_results: 每章节最大返回数
+
+        Returns:
+            与 chapter_titles 一一对应的章节素材
+        """
+        retrieved = self.retrieve_batch(
+            company_id, [[title] for title in chapter_titles],
+            limit=max_results, case_limit=max_results // 2
+        )
+        return [
+            {"chapter": title, **materials}
+            for title, materials in zip(chapter_titles, retrieved)
+        ]
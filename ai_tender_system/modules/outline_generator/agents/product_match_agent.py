@@ -20,7 +20,7 @@ import logging
 from typing import Dict, List, Any, Optional
 
 from .base_agent import BaseAgent
-from ai_tender_system.modules.product_capability import CapabilitySearcher
+from ai_tender_system.modules.product_capability import get_capability_searcher
 
 
 class ProductMatchAgent(BaseAgent):
@@ -40,7 +40,7 @@ class ProductMatchAgent(BaseAgent):
         """
         super().__init__(model_name)
         self.prompt_module = 'product_match_agent'
-        self.capability_searcher = CapabilitySearcher(db_path)
+        self.capability_searcher = get_capability_searcher(db_path)
 
     def generate(self, tender_doc: str, company_id: int, **kwargs) -> Dict[str, Any]:
         """
@@ -14,6 +14,8 @@ from contextlib import contextmanager
 
 from ...common.logger import get_module_logger
 from ...common.config import get_config
+from ...common.db_pool import get_pooled_connection
+from ...common.registry import get_instance, run_once
 
 logger = get_module_logger("task_manager")
 
@@ -80,8 +82,7 @@ class TechProposalTaskManager:
         """获取数据库连接"""
         conn = None
         try:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
+            conn = get_pooled_connection(self.db_path, row_factory=sqlite3.Row)
             yield conn
         except Exception as e:
             if conn:
@@ -93,22 +94,26 @@ class TechProposalTaskManager:
                 conn.close()
 
     def _ensure_tables(self):
-        """确保任务相关表存在"""
+        """确保任务相关表存在（每个进程每个数据库只执行一次）"""
+        try:
+            run_once(('schema', 'tech_proposal_tasks', self.db_path), self._create_tables)
+        except Exception as e:
+            self.logger.error(f"初始化任务表结构失败: {e}")
+
+    def _create_tables(self):
+        """执行任务表结构脚本"""
         schema_file = Path(__file__).parent.parent.parent / 'database' / 'tech_proposal_task_schema.sql'
 
         if not schema_file.exists():
             self.logger.warning(f"Schema文件不存在: {schema_file}")
             return
 
-        try:
-            with self._get_connection() as conn:
-                with open(schema_file, 'r', encoding='utf-8') as f:
-                    schema_sql = f.read()
-                conn.executescript(schema_sql)
-                conn.commit()
-                self.logger.info("技术方案任务表结构已初始化")
-        except Exception as e:
-            self.logger.error(f"初始化任务表结构失败: {e}")
+        with self._get_connection() as conn:
+            with open(schema_file, 'r', encoding='utf-8') as f:
+                schema_sql = f.read()
+            conn.executescript(schema_sql)
+            conn.commit()
+            self.logger.info("技术方案任务表结构已初始化")
 
     def generate_task_id(self) -> str:
         """生成任务ID"""
@@ -772,13 +777,11 @@ class TechProposalTaskManager:
             return 0
 
 
-# 全局实例
-_task_manager_instance = None
-
-
 def get_task_manager() -> TechProposalTaskManager:
     """获取任务管理器实例"""
-    global _task_manager_instance
-    if _task_manager_instance is None:
-        _task_manager_instance = TechProposalTaskManager()
-    return _task_manager_instance
+    return get_instance(TechProposalTaskManager)
+
+
+def ensure_schema():
+    """应用启动时建表（见 common.registry.bootstrap_schemas）"""
+    get_task_manager()
@@ -12,10 +12,11 @@
 
 from .tag_manager import TagManager
 from .capability_extractor import CapabilityExtractor
-from .capability_searcher import CapabilitySearcher
+from .capability_searcher import CapabilitySearcher, get_capability_searcher
 
 __all__ = [
     'TagManager',
     'CapabilityExtractor',
     'CapabilitySearcher',
+    'get_capability_searcher',
 ]
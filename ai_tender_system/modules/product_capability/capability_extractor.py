@@ -14,12 +14,16 @@ AI 能力提取器
 import json
 import logging
 import sqlite3
-import struct
 from typing import Dict, List, Any, Optional
 from datetime import datetime
 from pathlib import Path
 
+import numpy as np
+
 from ai_tender_system.common import create_llm_client
+from ai_tender_system.common.db_pool import get_pooled_connection
+
+from .embedding_cache import invalidate_capability_cache
 
 
 def get_embedding_service():
@@ -32,37 +36,28 @@ def get_embedding_service():
 
 
 class SimpleEmbeddingWrapper:
-    """简单的嵌入服务同步包装器"""
+    """简单的嵌入服务同步包装器（使用 embed_texts_sync，带向量缓存）"""
 
     def __init__(self):
-        import asyncio
         from ai_tender_system.modules.vector_engine import EmbeddingService
         self.service = EmbeddingService()
         self.model_name = self.service.model_type
-        self._loop = None
-
-    def _get_loop(self):
-        """获取或创建事件循环"""
-        try:
-            return asyncio.get_event_loop()
-        except RuntimeError:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            return loop
 
     def get_embedding(self, text: str) -> Optional[bytes]:
         """获取文本的嵌入向量（返回序列化的bytes）"""
-        import asyncio
+        embeddings = self.get_embeddings([text])
+        return embeddings[0] if embeddings else None
+
+    def get_embeddings(self, texts: List[str]) -> Optional[List[bytes]]:
+        """批量获取文本的嵌入向量（一次请求，返回与 texts 对应的序列化bytes列表）"""
         try:
-            loop = self._get_loop()
-            result = loop.run_until_complete(self.service.embed_texts([text]))
-            if result.vectors is not None and len(result.vectors) > 0:
-                # 序列化为bytes
-                vector = result.vectors[0]
-                return struct.pack(f'{len(vector)}f', *vector)
+            result = self.service.embed_texts_sync(texts)
+            if result.vectors is not None and len(result.vectors) == len(texts):
+                # 序列化为bytes（float32 本机字节序，与原 struct.pack('f') 格式一致）
+                return [np.asarray(vector, dtype=np.float32).tobytes() for vector in result.vectors]
             return None
         except Exception as e:
-            logging.getLogger(__name__).warning(f"获取嵌入向量失败: {e}")
+            logging.getLogger(__name__).warning(f"批量获取嵌入向量失败: {e}")
             return None
 
 
@@ -134,9 +129,7 @@ class CapabilityExtractor:
 
     def _get_connection(self) -> sqlite3.Connection:
         """获取数据库连接"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        return conn
+        return get_pooled_connection(self.db_path, row_factory=sqlite3.Row)
 
     def extract_from_text(
         self,
@@ -248,15 +241,19 @@ class CapabilityExtractor:
                     capabilities = self.extract_from_text(content, min_confidence)
                     result['capabilities_extracted'] += len(capabilities)
 
+                    # 同一分块的能力一次批量生成向量
+                    embeddings = self._embed_capabilities(capabilities)
+
                     # 保存到数据库
-                    for cap in capabilities:
+                    for cap, embedding in zip(capabilities, embeddings):
                         saved = self._save_capability(
                             conn=conn,
                             company_id=company_id,
                             doc_id=doc_id,
                             chunk_id=chunk_id,
                             capability=cap,
-                            tag_id=tag_id
+                            tag_id=tag_id,
+                            embedding=embedding
                         )
                         if saved:
                             result['capabilities_saved'] += 1
@@ -268,6 +265,7 @@ class CapabilityExtractor:
                     })
 
             conn.commit()
+            invalidate_capability_cache(self.db_path, company_id)
             self.logger.info(
                 f"文档 {doc_id} 能力提取完成: "
                 f"提取 {result['capabilities_extracted']} 个, "
@@ -282,6 +280,24 @@ class CapabilityExtractor:
 
         return result
 
+    @staticmethod
+    def _embedding_text(capability: Dict[str, Any]) -> str:
+        """能力向量化使用的文本"""
+        return f"{capability['capability_name']}: {capability.get('capability_description', '')}"
+
+    def _embed_capabilities(self, capabilities: List[Dict[str, Any]]) -> List[Optional[bytes]]:
+        """批量生成能力向量，失败时返回 None 列表（保存时逐条重试）"""
+        if not capabilities or not hasattr(self.embedding_service, 'get_embeddings'):
+            return [None] * len(capabilities)
+        try:
+            embeddings = self.embedding_service.get_embeddings(
+                [self._embedding_text(cap) for cap in capabilities]
+            )
+        except Exception as e:
+            self.logger.warning(f"批量生成嵌入向量失败: {e}")
+            embeddings = None
+        return embeddings or [None] * len(capabilities)
+
     def _save_capability(
         self,
         conn: sqlite3.Connection,
@@ -289,14 +305,14 @@ class CapabilityExtractor:
         doc_id: int,
         chunk_id: int,
         capability: Dict[str, Any],
-        tag_id: int = None
+        tag_id: int = None,
+        embedding: Optional[bytes] = None
     ) -> bool:
-        """保存单个能力到数据库"""
+        """保存单个能力到数据库（embedding 为空时单独生成向量）"""
         try:
             # 生成向量嵌入
-            embedding_text = f"{capability['capability_name']}: {capability.get('capability_description', '')}"
-            embedding = None
-            if self.embedding_service:
+            embedding_text = self._embedding_text(capability)
+            if embedding is None and self.embedding_service:
                 try:
                     embedding = self.embedding_service.get_embedding(embedding_text)
                 except Exception as e:
@@ -439,6 +455,7 @@ class CapabilityExtractor:
                 (doc_id,)
             )
             conn.commit()
+            invalidate_capability_cache(self.db_path)
             return cursor.rowcount
         finally:
             conn.close()
@@ -9,6 +9,9 @@
 3. 混合搜索 - 结合语义和关键词
 
 用于招标需求匹配：判断公司产品能否满足招标需求。
+
+语义搜索使用按企业缓存的归一化向量矩阵（见 embedding_cache），
+多个查询可通过 search_batch / semantic_search_batch 一次矩阵乘法完成打分。
 """
 
 import json
@@ -20,6 +23,15 @@ from datetime import datetime
 from pathlib import Path
 import uuid
 
+import numpy as np
+
+from ai_tender_system.common import like_contains
+from ai_tender_system.common.db_pool import get_pooled_connection
+from ai_tender_system.common.fts_search import fts_ready, split_match_terms, build_match_query
+from ai_tender_system.common.registry import get_instance
+
+from .embedding_cache import get_capability_embedding_cache
+
 
 def get_embedding_service():
     """获取嵌入服务（延迟初始化）"""
@@ -31,31 +43,17 @@ def get_embedding_service():
 
 
 class SimpleEmbeddingWrapper:
-    """简单的嵌入服务同步包装器"""
+    """简单的嵌入服务同步包装器（使用 embed_texts_sync，带向量缓存）"""
 
     def __init__(self):
-        import asyncio
         from ai_tender_system.modules.vector_engine import EmbeddingService
         self.service = EmbeddingService()
         self.model_name = self.service.model_type
-        self._loop = None
-
-    def _get_loop(self):
-        """获取或创建事件循环"""
-        import asyncio
-        try:
-            return asyncio.get_event_loop()
-        except RuntimeError:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            return loop
 
     def get_embedding(self, text: str) -> Optional[List[float]]:
         """获取文本的嵌入向量（返回float列表）"""
-        import asyncio
         try:
-            loop = self._get_loop()
-            result = loop.run_until_complete(self.service.embed_texts([text]))
+            result = self.service.embed_texts_sync([text])
             if result.vectors is not None and len(result.vectors) > 0:
                 return result.vectors[0].tolist()
             return None
@@ -63,6 +61,17 @@ class SimpleEmbeddingWrapper:
             logging.getLogger(__name__).warning(f"获取嵌入向量失败: {e}")
             return None
 
+    def get_embeddings(self, texts: List[str]) -> Optional[np.ndarray]:
+        """批量获取文本的嵌入向量（返回 (N, D) float32 数组）"""
+        try:
+            result = self.service.embed_texts_sync(texts)
+            if result.vectors is not None and len(result.vectors) == len(texts):
+                return np.asarray(result.vectors, dtype=np.float32)
+            return None
+        except Exception as e:
+            logging.getLogger(__name__).warning(f"批量获取嵌入向量失败: {e}")
+            return None
+
 
 class CapabilitySearcher:
     """能力搜索匹配器"""
@@ -82,9 +91,7 @@ class CapabilitySearcher:
 
     def _get_connection(self) -> sqlite3.Connection:
         """获取数据库连接"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        return conn
+        return get_pooled_connection(self.db_path, row_factory=sqlite3.Row)
 
     def search(
         self,
@@ -116,6 +123,42 @@ class CapabilitySearcher:
         else:  # hybrid
             return self._hybrid_search(query, company_id, tag_id, top_k, min_score)
 
+    def search_batch(
+        self,
+        queries: List[str],
+        company_id: int,
+        tag_id: int = None,
+        method: str = "hybrid",
+        top_k: int = 10,
+        min_score: float = 0.5
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        批量搜索匹配的能力（语义部分一次嵌入、一次矩阵乘法完成）
+
+        Args:
+            queries: 搜索查询列表
+            其余参数同 search()
+
+        Returns:
+            与 queries 一一对应的结果列表
+        """
+        if not queries:
+            return []
+
+        if method == "keyword":
+            return self._keyword_search_batch(queries, company_id, tag_id, top_k)
+
+        if method == "semantic":
+            return self.semantic_search_batch(queries, company_id, tag_id, top_k, min_score)
+
+        # hybrid
+        semantic_batch = self.semantic_search_batch(queries, company_id, tag_id, top_k * 2, min_score * 0.8)
+        keyword_batch = self._keyword_search_batch(queries, company_id, tag_id, top_k * 2)
+        return [
+            self._merge_hybrid(semantic_results, keyword_results, top_k)
+            for semantic_results, keyword_results in zip(semantic_batch, keyword_batch)
+        ]
+
     def _semantic_search(
         self,
         query: str,
@@ -125,57 +168,119 @@ class CapabilitySearcher:
         min_score: float = 0.5
     ) -> List[Dict[str, Any]]:
         """语义搜索"""
+        return self.semantic_search_batch([query], company_id, tag_id, top_k, min_score)[0]
+
+    def semantic_search_batch(
+        self,
+        queries: List[str],
+        company_id: int,
+        tag_id: int = None,
+        top_k: int = 10,
+        min_score: float = 0.5
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        批量语义搜索
+
+        查询向量与企业能力矩阵做一次矩阵乘法，每个查询用 argpartition 取 top-k，
+        最后只为命中的能力读取完整记录。嵌入服务不可用时降级为关键词搜索。
+        """
+        if not queries:
+            return []
+
+        def keyword_fallback():
+            return self._keyword_search_batch(queries, company_id, tag_id, top_k)
+
         if not self.embedding_service:
             self.logger.warning("嵌入服务不可用，降级为关键词搜索")
-            return self._keyword_search(query, company_id, tag_id, top_k)
+            return keyword_fallback()
 
         # 生成查询向量
-        query_embedding = self.embedding_service.get_embedding(query)
-        if query_embedding is None:
-            return self._keyword_search(query, company_id, tag_id, top_k)
+        query_vectors = self._embed_queries(queries)
+        if query_vectors is None:
+            return keyword_fallback()
 
         conn = self._get_connection()
         try:
-            # 获取所有能力（带向量）
-            sql = """
-                SELECT c.*, t.tag_name, d.original_filename as doc_name
-                FROM product_capabilities_index c
-                LEFT JOIN product_capability_tags t ON c.tag_id = t.tag_id
-                LEFT JOIN documents d ON c.doc_id = d.doc_id
-                WHERE c.company_id = ? AND c.is_active = 1
-                  AND c.capability_embedding IS NOT NULL
-            """
-            params = [company_id]
-
-            if tag_id:
-                sql += " AND c.tag_id = ?"
-                params.append(tag_id)
-
-            cursor = conn.execute(sql, params)
-            capabilities = cursor.fetchall()
+            matrix = get_capability_embedding_cache().get(conn, self.db_path, company_id)
+            if len(matrix) == 0:
+                return [[] for _ in queries]
+            if query_vectors.shape[1] != matrix.dimension:
+                self.logger.warning(
+                    f"查询向量维度({query_vectors.shape[1]})与能力向量维度({matrix.dimension})不一致，降级为关键词搜索"
+                )
+                return keyword_fallback()
+
+            scores, ids = matrix.scores(query_vectors, tag_id)
+
+            # 每个查询取 top-k（过滤低于 min_score 的结果）
+            selections: List[List[Tuple[int, float]]] = []
+            for row in scores:
+                if len(row) == 0:
+                    selections.append([])
+                    continue
+                k = min(top_k, len(row))
+                top = np.argpartition(-row, k - 1)[:k]
+                top = top[np.argsort(-row[top], kind='stable')]
+                selections.append([
+                    (int(ids[j]), float(row[j])) for j in top if row[j] >= min_score
+                ])
+
+            # 只读取命中能力的完整记录
+            rows = self._fetch_capabilities(
+                conn, sorted({cap_id for selection in selections for cap_id, _ in selection})
+            )
 
-            # 计算相似度
             results = []
-            for cap in capabilities:
-                if cap['capability_embedding']:
-                    try:
-                        cap_embedding = self._deserialize_embedding(cap['capability_embedding'])
-                        score = self._cosine_similarity(query_embedding, cap_embedding)
-                        if score >= min_score:
-                            result = dict(cap)
-                            result['match_score'] = score
-                            result['match_method'] = 'semantic'
-                            results.append(result)
-                    except Exception as e:
-                        continue
-
-            # 排序
-            results.sort(key=lambda x: x['match_score'], reverse=True)
-            return results[:top_k]
+            for selection in selections:
+                query_results = []
+                for cap_id, score in selection:
+                    if cap_id in rows:
+                        result = dict(rows[cap_id])
+                        result['match_score'] = score
+                        result['match_method'] = 'semantic'
+                        query_results.append(result)
+                results.append(query_results)
+            return results
 
         finally:
             conn.close()
 
+    def _embed_queries(self, queries: List[str]) -> Optional[np.ndarray]:
+        """生成查询向量 (K, D)，失败返回None"""
+        if hasattr(self.embedding_service, 'get_embeddings'):
+            vectors = self.embedding_service.get_embeddings(queries)
+            if vectors is not None:
+                return vectors
+
+        vectors = []
+        for query in queries:
+            vector = self.embedding_service.get_embedding(query)
+            if vector is None:
+                return None
+            vectors.append(vector)
+        return np.asarray(vectors, dtype=np.float32)
+
+    def _fetch_capabilities(self, conn: sqlite3.Connection, capability_ids: List[int]) -> Dict[int, sqlite3.Row]:
+        """按ID批量读取能力记录（含标签名、文档名）"""
+        rows = {}
+        # SQLite 默认变量上限 999，分批查询
+        for start in range(0, len(capability_ids), 500):
+            batch = capability_ids[start:start + 500]
+            placeholders = ','.join('?' * len(batch))
+            cursor = conn.execute(
+                f"""
+                SELECT c.*, t.tag_name, d.original_filename as doc_name
+                FROM product_capabilities_index c
+                LEFT JOIN product_capability_tags t ON c.tag_id = t.tag_id
+                LEFT JOIN documents d ON c.doc_id = d.doc_id
+                WHERE c.capability_id IN ({placeholders})
+                """,
+                batch
+            )
+            for row in cursor.fetchall():
+                rows[row['capability_id']] = row
+        return rows
+
     def _keyword_search(
         self,
         query: str,
@@ -184,12 +289,101 @@ class CapabilitySearcher:
         top_k: int = 10
     ) -> List[Dict[str, Any]]:
         """关键词搜索"""
+        return self._keyword_search_batch([query], company_id, tag_id, top_k)[0]
+
+    def _keyword_search_batch(
+        self,
+        queries: List[str],
+        company_id: int,
+        tag_id: int = None,
+        top_k: int = 10
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        批量关键词搜索
+
+        关键词均不少于3个字符且全文索引可用的查询走 FTS5（按 bm25 取前 top_k）；
+        其余查询的关键词合并为一次 LIKE 查询，按 capability_id 顺序在内存中分配给各查询。
+        """
+        # 分词（简单空格分词，实际可用jieba）
+        query_keywords = [q.replace('，', ' ').replace(',', ' ').split() for q in queries]
+        results: List[Optional[List[Dict[str, Any]]]] = [None] * len(queries)
+
         conn = self._get_connection()
         try:
-            # 分词（简单空格分词，实际可用jieba）
-            keywords = query.replace('，', ' ').replace(',', ' ').split()
+            like_indices = []
+            use_fts = fts_ready(conn, 'product_capabilities_fts')
+            for i, keywords in enumerate(query_keywords):
+                if not keywords:
+                    results[i] = []
+                elif use_fts and not split_match_terms(keywords)[1]:
+                    rows = self._keyword_rows_fts(conn, keywords, company_id, tag_id, top_k)
+                    results[i] = self._score_keyword_rows(rows, keywords)
+                else:
+                    like_indices.append(i)
+
+            if like_indices:
+                rows = self._keyword_rows_like(
+                    conn, [query_keywords[i] for i in like_indices], company_id, tag_id
+                )
+                for i in like_indices:
+                    keywords = query_keywords[i]
+                    matched = []
+                    for row in rows:
+                        if len(matched) >= top_k:
+                            break
+                        if any(
+                            like_contains(row['capability_name'], kw) or like_contains(row['capability_description'], kw)
+                            for kw in keywords
+                        ):
+                            matched.append(row)
+                    results[i] = self._score_keyword_rows(matched, keywords)
+        finally:
+            conn.close()
+
+        return results
+
+    def _keyword_rows_fts(
+        self,
+        conn: sqlite3.Connection,
+        keywords: List[str],
+        company_id: int,
+        tag_id: int,
+        top_k: int
+    ) -> List[sqlite3.Row]:
+        """通过 FTS5 全文索引检索（任一关键词命中，按 bm25 排序）"""
+        sql = """
+            SELECT c.*, t.tag_name, d.original_filename as doc_name,
+                   0 as match_score
+            FROM product_capabilities_fts f
+            JOIN product_capabilities_index c ON c.capability_id = f.rowid
+            LEFT JOIN product_capability_tags t ON c.tag_id = t.tag_id
+            LEFT JOIN documents d ON c.doc_id = d.doc_id
+            WHERE product_capabilities_fts MATCH ?
+              AND c.company_id = ? AND c.is_active = 1
+        """
+        params = [build_match_query(keywords), company_id]
 
-            # 构建搜索条件
+        if tag_id:
+            sql += " AND c.tag_id = ?"
+            params.append(tag_id)
+
+        sql += " ORDER BY bm25(product_capabilities_fts) LIMIT ?"
+        params.append(top_k)
+        return conn.execute(sql, params).fetchall()
+
+    def _keyword_rows_like(
+        self,
+        conn: sqlite3.Connection,
+        query_keywords: List[List[str]],
+        company_id: int,
+        tag_id: int
+    ) -> List[sqlite3.Row]:
+        """所有查询的关键词合并为一次 LIKE 查询，返回按 capability_id 排序的候选行"""
+        all_keywords = list(dict.fromkeys(kw for keywords in query_keywords for kw in keywords))
+        candidates = {}
+        # 每个关键词2个参数，分批避免超过 SQLite 变量上限
+        for start in range(0, len(all_keywords), 400):
+            batch = all_keywords[start:start + 400]
             sql = """
                 SELECT c.*, t.tag_name, d.original_filename as doc_name,
                        0 as match_score
@@ -200,36 +394,36 @@ class CapabilitySearcher:
                   AND (
             """
             params = [company_id]
-
-            conditions = []
-            for kw in keywords:
-                conditions.append("c.capability_name LIKE ? OR c.capability_description LIKE ?")
+            sql += " OR ".join(
+                "c.capability_name LIKE ? OR c.capability_description LIKE ?" for _ in batch
+            ) + ")"
+            for kw in batch:
                 params.extend([f"%{kw}%", f"%{kw}%"])
 
-            sql += " OR ".join(conditions) + ")"
-
             if tag_id:
                 sql += " AND c.tag_id = ?"
                 params.append(tag_id)
 
-            sql += f" LIMIT {top_k}"
-
-            cursor = conn.execute(sql, params)
-            results = []
-            for row in cursor.fetchall():
-                result = dict(row)
-                # 计算关键词匹配得分
-                text = f"{result['capability_name']} {result['capability_description']}"
-                matched = sum(1 for kw in keywords if kw in text)
-                result['match_score'] = matched / len(keywords) if keywords else 0
-                result['match_method'] = 'keyword'
-                results.append(result)
-
-            results.sort(key=lambda x: x['match_score'], reverse=True)
-            return results
-
-        finally:
-            conn.close()
+            for row in conn.execute(sql, params).fetchall():
+                candidates[row['capability_id']] = row
+
+        return [candidates[cap_id] for cap_id in sorted(candidates)]
+
+    @staticmethod
+    def _score_keyword_rows(rows: List[sqlite3.Row], keywords: List[str]) -> List[Dict[str, Any]]:
+        """计算关键词匹配得分并排序"""
+        results = []
+        for row in rows:
+            result = dict(row)
+            # 计算关键词匹配得分
+            text = f"{result['capability_name']} {result['capability_description']}"
+            matched = sum(1 for kw in keywords if kw in text)
+            result['match_score'] = matched / len(keywords)
+            result['match_method'] = 'keyword'
+            results.append(result)
+
+        results.sort(key=lambda x: x['match_score'], reverse=True)
+        return results
 
     def _hybrid_search(
         self,
@@ -243,8 +437,15 @@ class CapabilitySearcher:
         # 分别执行两种搜索
         semantic_results = self._semantic_search(query, company_id, tag_id, top_k * 2, min_score * 0.8)
         keyword_results = self._keyword_search(query, company_id, tag_id, top_k * 2)
+        return self._merge_hybrid(semantic_results, keyword_results, top_k)
 
-        # 合并结果
+    def _merge_hybrid(
+        self,
+        semantic_results: List[Dict[str, Any]],
+        keyword_results: List[Dict[str, Any]],
+        top_k: int
+    ) -> List[Dict[str, Any]]:
+        """合并语义与关键词搜索结果"""
         seen = set()
         merged = []
 
@@ -513,7 +714,6 @@ class CapabilitySearcher:
 
     def _deserialize_embedding(self, blob: bytes) -> List[float]:
         """反序列化向量"""
-        import struct
         n = len(blob) // 4
         return list(struct.unpack(f'{n}f', blob))
 
@@ -526,3 +726,8 @@ class CapabilitySearcher:
         if norm_a == 0 or norm_b == 0:
             return 0.0
         return dot / (norm_a * norm_b)
+
+
+def get_capability_searcher(db_path: str = None) -> CapabilitySearcher:
+    """获取能力搜索器单例（按数据库路径缓存）"""
+    return get_instance(CapabilitySearcher, db_path)
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+能力向量矩阵缓存
+
+CapabilitySearcher 语义搜索原先每次查询都读取企业全部能力的向量 BLOB，
+逐行反序列化并在 Python 中计算余弦相似度。本模块按 (数据库, 企业) 缓存：
+- matrix: 连续的 float32 矩阵，每行已归一化（余弦相似度 = 矩阵乘法）
+- ids / tag_ids: 与矩阵行对应的能力ID、标签ID（无标签为 -1）
+
+失效策略：
+1. CapabilityExtractor / TagManager 写入后显式调用 invalidate_capability_cache()
+2. 每次读取时校验轻量签名（行数、最大ID、标签ID合计），覆盖其他进程的写入
+"""
+
+import logging
+import sqlite3
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CompanyEmbeddingMatrix:
+    """单个企业的能力向量矩阵"""
+    ids: np.ndarray            # (N,) int64 能力ID
+    tag_ids: np.ndarray        # (N,) int64 标签ID，无标签为 -1
+    matrix: np.ndarray         # (N, D) float32，行已归一化
+    signature: Tuple
+
+    @property
+    def dimension(self) -> int:
+        return self.matrix.shape[1] if self.matrix.ndim == 2 else 0
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def scores(self, queries: np.ndarray, tag_id: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        批量计算余弦相似度
+
+        Args:
+            queries: (K, D) float32 查询向量（未归一化亦可）
+            tag_id: 限定标签（可选）
+
+        Returns:
+            (scores, ids): scores 形状 (K, M)，ids 形状 (M,)，M 为标签过滤后的行数
+        """
+        matrix, ids = self.matrix, self.ids
+        if tag_id:
+            mask = self.tag_ids == tag_id
+            matrix, ids = matrix[mask], ids[mask]
+
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return (queries / norms) @ matrix.T, ids
+
+
+_SIGNATURE_SQL = """
+    SELECT COUNT(*), MAX(capability_id), TOTAL(tag_id)
+    FROM product_capabilities_index
+    WHERE company_id = ? AND is_active = 1 AND capability_embedding IS NOT NULL
+"""
+
+_LOAD_SQL = """
+    SELECT capability_id, tag_id, capability_embedding
+    FROM product_capabilities_index
+    WHERE company_id = ? AND is_active = 1 AND capability_embedding IS NOT NULL
+    ORDER BY capability_id
+"""
+
+
+class CapabilityEmbeddingCache:
+    """按 (数据库路径, 企业ID) 缓存能力向量矩阵"""
+
+    def __init__(self):
+        self._entries: Dict[Tuple[str, int], CompanyEmbeddingMatrix] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, conn: sqlite3.Connection, db_path: str, company_id: int) -> CompanyEmbeddingMatrix:
+        """获取企业的向量矩阵（签名变化或已失效时重新加载）"""
+        key = (str(db_path), company_id)
+        signature = tuple(conn.execute(_SIGNATURE_SQL, (company_id,)).fetchone())
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.signature == signature:
+                self.hits += 1
+                return entry
+
+        entry = self._load(conn, company_id, signature)
+        with self._lock:
+            self._entries[key] = entry
+            self.misses += 1
+        return entry
+
+    def _load(self, conn: sqlite3.Connection, company_id: int, signature: Tuple) -> CompanyEmbeddingMatrix:
+        """从数据库加载并构建归一化矩阵"""
+        rows = conn.execute(_LOAD_SQL, (company_id,)).fetchall()
+
+        vectors: List[np.ndarray] = []
+        ids: List[int] = []
+        tag_ids: List[int] = []
+        for capability_id, tag_id, blob in rows:
+            if not blob or len(blob) % 4:
+                continue
+            vectors.append(np.frombuffer(blob, dtype=np.float32))
+            ids.append(capability_id)
+            tag_ids.append(tag_id if tag_id is not None else -1)
+
+        if not vectors:
+            return CompanyEmbeddingMatrix(
+                ids=np.empty(0, dtype=np.int64),
+                tag_ids=np.empty(0, dtype=np.int64),
+                matrix=np.empty((0, 0), dtype=np.float32),
+                signature=signature
+            )
+
+        # 只保留主流维度的向量（切换嵌入模型后可能混有旧维度）
+        dimension = Counter(len(v) for v in vectors).most_common(1)[0][0]
+        keep = [i for i, v in enumerate(vectors) if len(v) == dimension]
+        if len(keep) < len(vectors):
+            logger.warning(f"企业 {company_id} 有 {len(vectors) - len(keep)} 个能力向量维度不一致，已忽略")
+
+        matrix = np.ascontiguousarray(np.stack([vectors[i] for i in keep]), dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        matrix /= norms
+
+        return CompanyEmbeddingMatrix(
+            ids=np.array([ids[i] for i in keep], dtype=np.int64),
+            tag_ids=np.array([tag_ids[i] for i in keep], dtype=np.int64),
+            matrix=matrix,
+            signature=signature
+        )
+
+    def invalidate(self, db_path: Optional[str] = None, company_id: Optional[int] = None):
+        """使缓存失效（不指定参数时清空全部）"""
+        with self._lock:
+            if db_path is None and company_id is None:
+                self._entries.clear()
+                return
+            for key in list(self._entries):
+                if (db_path is None or key[0] == str(db_path)) and (company_id is None or key[1] == company_id):
+                    del self._entries[key]
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                'companies': len(self._entries),
+                'rows': sum(len(e) for e in self._entries.values()),
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+
+_cache: Optional[CapabilityEmbeddingCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_capability_embedding_cache() -> CapabilityEmbeddingCache:
+    """获取进程内共享的能力向量矩阵缓存"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = CapabilityEmbeddingCache()
+    return _cache
+
+
+def invalidate_capability_cache(db_path: Optional[str] = None, company_id: Optional[int] = None):
+    """能力新增/删除/改标签后调用，使对应企业的向量矩阵缓存失效"""
+    get_capability_embedding_cache().invalidate(db_path, company_id)
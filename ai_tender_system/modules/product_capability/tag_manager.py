@@ -19,6 +19,10 @@ from typing import Dict, List, Any, Optional
 from datetime import datetime
 from pathlib import Path
 
+from ai_tender_system.common.db_pool import get_pooled_connection
+
+from .embedding_cache import invalidate_capability_cache
+
 
 class TagManager:
     """核心能力标签管理器"""
@@ -37,9 +41,7 @@ class TagManager:
 
     def _get_connection(self) -> sqlite3.Connection:
         """获取数据库连接"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        return conn
+        return get_pooled_connection(self.db_path, row_factory=sqlite3.Row)
 
     # =========================================================================
     # 标签 CRUD 操作
@@ -275,6 +277,8 @@ class TagManager:
                 (tag_id,)
             )
             conn.commit()
+            if force:
+                invalidate_capability_cache(self.db_path)
             return True
         finally:
             conn.close()
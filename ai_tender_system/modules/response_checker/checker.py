@@ -14,12 +14,30 @@
 8. 应答日期检查（2项）
 9. 报价检查（3项）
 10. 业绩检查（4项）
+
+各类别互相独立：并发模式下在有界线程池中同时执行，类别结果和
+category_callback 仍按上面的固定顺序依次交付。
+
+文档上下文模式（AI检查类别发送给模型的文档内容）：
+- full: 每个类别各自截取文档开头（原有行为）
+- shared: 所有类别使用相同的系统提示词和文档前缀，类别要求放在文档之后，
+  同一文档的多次调用可命中服务端前缀缓存
+- excerpt: 按类别关键词从全文选取相关摘录，减少每次调用的输入长度
+
+配置（环境变量）：
+- RESPONSE_CHECK_WORKERS: 类别检查并发数，1 为顺序执行（默认 4）
+- RESPONSE_CHECK_CONTEXT_MODE: 文档上下文模式 full/shared/excerpt（默认 full）
+- RESPONSE_CHECK_SHARED_CONTEXT_CHARS: shared 模式下共享文档前缀的字符数（默认 20000）
+- RESPONSE_CHECK_EXCERPT_CHARS: excerpt 模式下每个类别的摘录字符上限（默认 6000）
+- RESPONSE_CHECK_EXCERPT_WINDOW: excerpt 模式下关键词命中位置前后保留的字符数（默认 300）
 """
 
+import os
 import time
 import uuid
 import json
 import re
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Optional, Callable, Tuple, Any
 from pathlib import Path
 from datetime import datetime
@@ -32,11 +50,27 @@ from .schemas import (
 from .prompt_manager import ResponseCheckPromptManager, PromptType
 from .extractors import (
     IDCardExtractor, BusinessLicenseExtractor,
-    SealDetector, PriceExtractor, DateExtractor
+    SealDetector, PriceExtractor, DateExtractor, select_excerpts
 )
 
 logger = logging.getLogger(__name__)
 
+CHECK_WORKERS = int(os.getenv('RESPONSE_CHECK_WORKERS', '4'))
+CONTEXT_MODE = os.getenv('RESPONSE_CHECK_CONTEXT_MODE', 'full').lower()
+SHARED_CONTEXT_CHARS = int(os.getenv('RESPONSE_CHECK_SHARED_CONTEXT_CHARS', '20000'))
+EXCERPT_CHARS = int(os.getenv('RESPONSE_CHECK_EXCERPT_CHARS', '6000'))
+EXCERPT_WINDOW = int(os.getenv('RESPONSE_CHECK_EXCERPT_WINDOW', '300'))
+
+CONTEXT_MODES = ('full', 'shared', 'excerpt')
+
+# excerpt 模式下各AI检查类别的摘录关键词；未列出的类别（如页码）取文档开头
+EXCERPT_KEYWORDS = {
+    CheckCategoryType.COMPLETENESS: ['__', '□', '☐', '（签字）', '（盖章）', '（填写）'],
+    CheckCategoryType.SIGNATURE_SEAL: SealDetector.SEAL_KEYWORDS + SealDetector.SIGNATURE_KEYWORDS,
+    CheckCategoryType.INDEX_TABLE: ['目录', '索引', '偏离表', '响应表', '对照表'],
+    CheckCategoryType.PERFORMANCE: ['业绩', '合同', '中标通知书', '验收', '项目名称'],
+}
+
 
 class ResponseChecker:
     """
@@ -45,14 +79,24 @@ class ResponseChecker:
     采用清单式检查，每条检查项标记"符合/不符合"状态
     """
 
-    def __init__(self, model_name: str = 'deepseek-v3'):
+    def __init__(self, model_name: str = 'deepseek-v3',
+                 max_workers: Optional[int] = None,
+                 context_mode: Optional[str] = None):
         """
         初始化检查器
 
         Args:
             model_name: AI模型名称
+            max_workers: 类别检查并发数，None 使用 RESPONSE_CHECK_WORKERS，1 为顺序执行
+            context_mode: 文档上下文模式 full/shared/excerpt，None 使用 RESPONSE_CHECK_CONTEXT_MODE
         """
+        context_mode = (context_mode or CONTEXT_MODE).lower()
+        if context_mode not in CONTEXT_MODES:
+            raise ValueError(f"不支持的文档上下文模式: {context_mode}")
+
         self.model_name = model_name
+        self.max_workers = max(1, max_workers if max_workers is not None else CHECK_WORKERS)
+        self.context_mode = context_mode
         self.llm = None
         self.parser = None
         self.prompt_manager = ResponseCheckPromptManager()
@@ -64,7 +108,8 @@ class ResponseChecker:
         self.price_extractor = PriceExtractor()
         self.date_extractor = DateExtractor()
 
-        logger.info(f"应答自检查器初始化完成，模型: {model_name}")
+        logger.info(f"应答自检查器初始化完成，模型: {model_name}, "
+                    f"并发数: {self.max_workers}, 上下文模式: {self.context_mode}")
 
     def _init_llm(self):
         """延迟初始化LLM客户端"""
@@ -150,29 +195,24 @@ class ResponseChecker:
                 (CheckCategoryType.PERFORMANCE, 87, self._check_performance),
             ]
 
-            for category_type, progress, check_func in check_configs:
-                category_name = CATEGORY_NAMES[category_type]
-
-                if progress_callback:
-                    progress_callback(progress, f"正在进行{category_name}...")
+            if self.max_workers > 1:
+                self._run_categories_concurrently(
+                    check_configs, text, result, total_pages, progress_callback, category_callback
+                )
+            else:
+                for category_type, progress, check_func in check_configs:
+                    if progress_callback:
+                        progress_callback(progress, f"正在进行{CATEGORY_NAMES[category_type]}...")
 
-                try:
-                    category = check_func(text, result.extracted_info, total_pages)
-                    category.calculate_counts()
+                    category, succeeded = self._run_category(
+                        category_type, check_func, text, result.extracted_info, total_pages
+                    )
                     result.categories.append(category)
 
                     # 类别完成回调
-                    if category_callback:
+                    if succeeded and category_callback:
                         category_callback(category)
 
-                    logger.debug(f"{category_name}完成: 通过{category.pass_count}项, 不通过{category.fail_count}项")
-
-                except Exception as e:
-                    logger.warning(f"{category_name}失败: {e}")
-                    # 创建默认类别结果
-                    category = self._create_default_category(category_type)
-                    result.categories.append(category)
-
             # ========== Stage 4: 结果汇总 ==========
             if progress_callback:
                 progress_callback(95, "正在生成检查报告...")
@@ -193,6 +233,57 @@ class ResponseChecker:
             logger.error(f"应答自检查失败: {e}")
             raise
 
+    def _run_category(self, category_type: CheckCategoryType, check_func: Callable,
+                      text: str, info: ExtractedInfo, page_count: int) -> Tuple[CheckCategory, bool]:
+        """
+        执行单个类别检查
+
+        Returns:
+            (检查类别, 是否成功)；失败时返回默认类别结果
+        """
+        category_name = CATEGORY_NAMES[category_type]
+        try:
+            category = check_func(text, info, page_count)
+            category.calculate_counts()
+            logger.debug(f"{category_name}完成: 通过{category.pass_count}项, 不通过{category.fail_count}项")
+            return category, True
+        except Exception as e:
+            logger.warning(f"{category_name}失败: {e}")
+            return self._create_default_category(category_type), False
+
+    def _run_categories_concurrently(self,
+                                     check_configs: List[Tuple[CheckCategoryType, int, Callable]],
+                                     text: str,
+                                     result: ResponseCheckResult,
+                                     page_count: int,
+                                     progress_callback: Optional[Callable[[int, str], None]],
+                                     category_callback: Optional[Callable[[CheckCategory], None]]):
+        """
+        在有界线程池中并发执行各类别检查
+
+        所有类别一次性提交，调用线程按配置顺序等待结果：先完成的类别暂存在
+        其 future 中，直到前面的类别都已交付。因此 result.categories 的顺序、
+        progress_callback 和 category_callback 的调用顺序及调用线程都与顺序执行一致。
+        """
+        workers = min(self.max_workers, len(check_configs))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='response-check') as executor:
+            futures = [
+                executor.submit(self._run_category, category_type, check_func,
+                                text, result.extracted_info, page_count)
+                for category_type, _, check_func in check_configs
+            ]
+
+            for (category_type, progress, _), future in zip(check_configs, futures):
+                if progress_callback:
+                    progress_callback(progress, f"正在进行{CATEGORY_NAMES[category_type]}...")
+
+                category, succeeded = future.result()
+                result.categories.append(category)
+
+                # 类别完成回调
+                if succeeded and category_callback:
+                    category_callback(category)
+
     def _parse_document(self, file_path: str) -> Tuple[str, int]:
         """
         解析文档
@@ -223,12 +314,25 @@ class ResponseChecker:
         """
         info = ExtractedInfo()
 
-        # 1. 提取身份证信息
+        # 身份证、营业执照、报价三项提取互不依赖，AI提取时并发执行
         if self.llm:
-            id_results = self.id_extractor.extract_with_ai(text)
+            extract_funcs = (self.id_extractor.extract_with_ai,
+                             self.license_extractor.extract_with_ai,
+                             self.price_extractor.extract_with_ai)
         else:
-            id_results = self.id_extractor.extract(text)
+            extract_funcs = (self.id_extractor.extract,
+                             self.license_extractor.extract_from_text,
+                             self.price_extractor.extract_from_text)
+
+        if self.llm and self.max_workers > 1:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(extract_funcs)),
+                                    thread_name_prefix='response-extract') as executor:
+                futures = [executor.submit(func, text) for func in extract_funcs]
+                id_results, license_info, price_info = [future.result() for future in futures]
+        else:
+            id_results, license_info, price_info = [func(text) for func in extract_funcs]
 
+        # 1. 身份证信息
         if id_results.get('legal_person'):
             lp = id_results['legal_person']
             info.legal_person_name = lp.get('name', '')
@@ -243,12 +347,7 @@ class ResponseChecker:
             info.authorized_person_id_expiry = ap.get('expiry_date', '')
             info.authorized_person_birth_date = ap.get('birth_date', '')
 
-        # 2. 提取营业执照信息
-        if self.llm:
-            license_info = self.license_extractor.extract_with_ai(text)
-        else:
-            license_info = self.license_extractor.extract_from_text(text)
-
+        # 2. 营业执照信息
         if license_info:
             info.company_name = license_info.get('company_name', '')
             info.unified_credit_code = license_info.get('credit_code', '')
@@ -256,12 +355,7 @@ class ResponseChecker:
             info.license_company_name = license_info.get('company_name', '')
             info.license_credit_code = license_info.get('credit_code', '')
 
-        # 3. 提取报价信息
-        if self.llm:
-            price_info = self.price_extractor.extract_with_ai(text)
-        else:
-            price_info = self.price_extractor.extract_from_text(text)
-
+        # 3. 报价信息
         if price_info:
             info.total_price_upper = price_info.get('total_upper', '')
             info.total_price_lower = price_info.get('total_lower', 0.0)
@@ -289,7 +383,7 @@ class ResponseChecker:
         items = self._ai_check(
             PromptType.COMPLETENESS,
             CheckCategoryType.COMPLETENESS,
-            document_content=text[:15000]
+            document_content=self._document_context(text, CheckCategoryType.COMPLETENESS, 15000)
         )
 
         category.items = items
@@ -306,7 +400,7 @@ class ResponseChecker:
         items = self._ai_check(
             PromptType.SEAL,
             CheckCategoryType.SIGNATURE_SEAL,
-            document_content=text[:15000],
+            document_content=self._document_context(text, CheckCategoryType.SIGNATURE_SEAL, 15000),
             page_count=page_count
         )
 
@@ -324,7 +418,7 @@ class ResponseChecker:
         items = self._ai_check(
             PromptType.PAGE,
             CheckCategoryType.PAGE_NUMBER,
-            document_content=text[:10000]
+            document_content=self._document_context(text, CheckCategoryType.PAGE_NUMBER, 10000)
         )
 
         category.items = items
@@ -341,7 +435,7 @@ class ResponseChecker:
         items = self._ai_check(
             PromptType.INDEX,
             CheckCategoryType.INDEX_TABLE,
-            document_content=text[:15000]
+            document_content=self._document_context(text, CheckCategoryType.INDEX_TABLE, 15000)
         )
 
         category.items = items
@@ -760,7 +854,7 @@ class ResponseChecker:
         items = self._ai_check(
             PromptType.PERFORMANCE,
             CheckCategoryType.PERFORMANCE,
-            document_content=text[:20000]
+            document_content=self._document_context(text, CheckCategoryType.PERFORMANCE, 20000)
         )
 
         category.items = items
@@ -768,6 +862,25 @@ class ResponseChecker:
 
     # ========== 辅助方法 ==========
 
+    def _document_context(self, text: str, category_type: CheckCategoryType, limit: int) -> str:
+        """
+        按上下文模式生成AI检查类别使用的文档内容
+
+        Args:
+            text: 文档全文
+            category_type: 检查类别类型
+            limit: full 模式下该类别截取的字符数
+
+        Returns:
+            文档内容；shared 模式下所有类别返回相同的共享前缀
+        """
+        if self.context_mode == 'shared':
+            return text[:SHARED_CONTEXT_CHARS]
+        if self.context_mode == 'excerpt':
+            return select_excerpts(text, EXCERPT_KEYWORDS.get(category_type, []),
+                                   min(limit, EXCERPT_CHARS), window=EXCERPT_WINDOW)
+        return text[:limit]
+
     def _ai_check(self, prompt_type: PromptType, category_type: CheckCategoryType, **kwargs) -> List[CheckItem]:
         """
         使用AI进行检查
@@ -789,13 +902,17 @@ class ResponseChecker:
 
         try:
             # 构建提示词
-            prompt = self.prompt_manager.get_prompt(prompt_type, **kwargs)
             config = self.prompt_manager.get_config(prompt_type)
+            if self.context_mode == 'shared':
+                system_prompt, prompt = self.prompt_manager.get_shared_context_prompt(prompt_type, **kwargs)
+            else:
+                system_prompt = config['system_prompt']
+                prompt = self.prompt_manager.get_prompt(prompt_type, **kwargs)
 
             # 调用LLM
             response = self.llm.call(
                 prompt=prompt,
-                system_prompt=config['system_prompt'],
+                system_prompt=system_prompt,
                 temperature=config['temperature'],
                 max_tokens=config['max_tokens']
             )
@@ -6,7 +6,7 @@
 提取应答文件中的关键信息用于一致性校验
 """
 
-from .base_extractor import BaseExtractor
+from .base_extractor import BaseExtractor, select_excerpts
 from .id_card_extractor import IDCardExtractor
 from .license_extractor import BusinessLicenseExtractor
 from .seal_detector import SealDetector
@@ -15,6 +15,7 @@ from .date_extractor import DateExtractor
 
 __all__ = [
     'BaseExtractor',
+    'select_excerpts',
     'IDCardExtractor',
     'BusinessLicenseExtractor',
     'SealDetector',
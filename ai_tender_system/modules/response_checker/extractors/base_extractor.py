@@ -5,12 +5,72 @@
 """
 
 from abc import ABC, abstractmethod
-from typing import Dict, List, Any, Optional
+import re
+from typing import Dict, List, Any, Optional, Sequence
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+EXCERPT_SEPARATOR = "\n……\n"
+
+
+def select_excerpts(text: str, keywords: Sequence[str], max_chars: int,
+                    window: int = 300, head_chars: int = 1000) -> str:
+    """
+    按关键词选取文档摘录
+
+    保留文档开头（封面、公司名称等），再取各关键词命中位置前后 window 个字符，
+    重叠的窗口合并；命中总量超出预算时在全文范围内均匀抽取窗口，
+    避免预算全部消耗在文档前部。摘录按原文顺序拼接。
+
+    Args:
+        text: 文档全文
+        keywords: 关键词列表，为空时退化为截取文档开头
+        max_chars: 摘录总字符数上限
+        window: 命中位置前后保留的字符数
+        head_chars: 始终保留的文档开头字符数
+
+    Returns:
+        摘录文本
+    """
+    if len(text) <= max_chars:
+        return text
+    if not keywords:
+        return text[:max_chars]
+
+    head_end = min(head_chars, max_chars // 4)
+    pattern = re.compile('|'.join(re.escape(k) for k in keywords if k))
+    spans = []
+    for match in pattern.finditer(text, head_end):
+        start = max(head_end, match.start() - window)
+        end = min(len(text), match.end() + window)
+        if spans and start <= spans[-1][1]:
+            spans[-1][1] = max(spans[-1][1], end)
+        else:
+            spans.append([start, end])
+
+    if not spans:
+        return text[:max_chars]
+
+    budget = max_chars - head_end
+    total = sum(end - start for start, end in spans)
+    if total > budget:
+        # 按平均窗口长度估算可容纳的窗口数，均匀抽取
+        keep = max(1, budget * len(spans) // total)
+        step = len(spans) / keep
+        spans = [spans[int(i * step)] for i in range(keep)]
+
+    parts = [text[:head_end]] if head_end else []
+    for start, end in spans:
+        if budget <= 0:
+            break
+        end = min(end, start + budget)
+        parts.append(text[start:end])
+        budget -= end - start
+    return EXCERPT_SEPARATOR.join(parts)
+
+
 class BaseExtractor(ABC):
     """
     信息提取器基类
@@ -89,20 +89,18 @@ class PriceExtractor(BaseExtractor):
             result['total_upper'] = max(upper_matches, key=len)
 
         # 提取小写金额
-        lower_matches = self.LOWER_PRICE_PATTERN.findall(text)
-        if lower_matches:
-            # 转换为数值并选择最大的（通常是总价）
-            amounts = []
-            for match in lower_matches:
-                try:
-                    value = float(match.replace(',', ''))
-                    if '万元' in text[text.find(match):text.find(match) + len(match) + 5]:
-                        value *= 10000
-                    amounts.append(value)
-                except ValueError:
-                    continue
-            if amounts:
-                result['total_lower'] = max(amounts)
+        # 转换为数值并选择最大的（通常是总价）；单位按每个匹配自身的位置判断
+        amounts = []
+        for match in self.LOWER_PRICE_PATTERN.finditer(text):
+            try:
+                value = float(match.group(1).replace(',', ''))
+                if '万元' in text[match.start(1):match.end(1) + 5]:
+                    value *= 10000
+                amounts.append(value)
+            except ValueError:
+                continue
+        if amounts:
+            result['total_lower'] = max(amounts)
 
         # 提取最高限价
         max_match = self.MAX_LIMIT_PATTERN.search(text)
@@ -26,6 +26,10 @@ class SealDetector(BaseExtractor):
     - 手写签名是否完整
     """
 
+    # 签名/盖章相关关键词（也用于选取签字盖章检查的文档摘录）
+    SEAL_KEYWORDS = ['公章', '印章', '盖章', '加盖']
+    SIGNATURE_KEYWORDS = ['签名', '签字', '签章', '手写']
+
     def __init__(self, llm_client=None):
         super().__init__(llm_client)
 
@@ -158,10 +162,6 @@ class SealDetector(BaseExtractor):
             }
         }
 
-        # 检查是否有签名/盖章相关关键词
-        seal_keywords = ['公章', '印章', '盖章', '加盖']
-        signature_keywords = ['签名', '签字', '签章', '手写']
-
         # 检查需要盖章的位置
         seal_locations = []
         if '投标函' in text:
@@ -5,7 +5,7 @@
 """
 
 from enum import Enum
-from typing import Dict, Any
+from typing import Dict, Any, Tuple
 
 from .prompts import (
     COMPLETENESS_CHECK_PROMPT, COMPLETENESS_CHECK_SYSTEM,
@@ -15,6 +15,7 @@ from .prompts import (
     DATE_CHECK_PROMPT, DATE_CHECK_SYSTEM,
     PRICE_CHECK_PROMPT, PRICE_CHECK_SYSTEM,
     PERFORMANCE_CHECK_PROMPT, PERFORMANCE_CHECK_SYSTEM,
+    SHARED_CONTEXT_SYSTEM, SHARED_CONTEXT_PREFIX, SHARED_CONTEXT_TASK, SHARED_CONTEXT_REFERENCE,
 )
 
 
@@ -131,3 +132,28 @@ class ResponseCheckPromptManager:
             'temperature': config['temperature'],
             'max_tokens': config['max_tokens']
         }
+
+    def get_shared_context_prompt(self, prompt_type: PromptType, document_content: str,
+                                  **kwargs) -> Tuple[str, str]:
+        """
+        获取共享上下文形式的提示词
+
+        系统提示词与文档前缀对所有类别相同，类别的系统提示词和检查要求
+        追加在文档之后，相同文档的多次调用可复用服务端前缀缓存。
+
+        Args:
+            prompt_type: 提示词类型
+            document_content: 共享的文档内容
+            **kwargs: 其余格式化参数
+
+        Returns:
+            (系统提示词, 用户提示词)
+        """
+        if prompt_type not in self.PROMPTS:
+            raise ValueError(f"Unknown prompt type: {prompt_type}")
+
+        config = self.PROMPTS[prompt_type]
+        task = config['user'].format(document_content=SHARED_CONTEXT_REFERENCE, **kwargs)
+        prompt = (SHARED_CONTEXT_PREFIX.format(document_content=document_content)
+                  + SHARED_CONTEXT_TASK.format(role=config['system'], task=task))
+        return SHARED_CONTEXT_SYSTEM, prompt
@@ -12,6 +12,9 @@ from .page_checker import PAGE_CHECK_PROMPT, PAGE_CHECK_SYSTEM, INDEX_CHECK_PROM
 from .date_checker import DATE_CHECK_PROMPT, DATE_CHECK_SYSTEM
 from .price_checker import PRICE_CHECK_PROMPT, PRICE_CHECK_SYSTEM
 from .performance_checker import PERFORMANCE_CHECK_PROMPT, PERFORMANCE_CHECK_SYSTEM
+from .shared_context import (
+    SHARED_CONTEXT_SYSTEM, SHARED_CONTEXT_PREFIX, SHARED_CONTEXT_TASK, SHARED_CONTEXT_REFERENCE
+)
 
 __all__ = [
     'COMPLETENESS_CHECK_PROMPT', 'COMPLETENESS_CHECK_SYSTEM',
@@ -21,4 +24,5 @@ __all__ = [
     'DATE_CHECK_PROMPT', 'DATE_CHECK_SYSTEM',
     'PRICE_CHECK_PROMPT', 'PRICE_CHECK_SYSTEM',
     'PERFORMANCE_CHECK_PROMPT', 'PERFORMANCE_CHECK_SYSTEM',
+    'SHARED_CONTEXT_SYSTEM', 'SHARED_CONTEXT_PREFIX', 'SHARED_CONTEXT_TASK', 'SHARED_CONTEXT_REFERENCE',
 ]
@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+共享上下文提示词
+
+共享上下文模式下，各AI检查类别使用相同的系统提示词和文档前缀，
+类别各自的角色说明与检查要求放在文档之后，使请求前缀逐字节一致，
+便于模型服务端的前缀缓存（DeepSeek/OpenAI 等的 prompt cache）命中。
+"""
+
+SHARED_CONTEXT_SYSTEM = """你是一位严谨的投标文件审核专家。
+用户会先提供完整的投标应答文件内容，再给出本次需要完成的具体检查任务。
+请只依据文件内容作答，并严格按照检查任务要求的JSON格式输出。"""
+
+SHARED_CONTEXT_PREFIX = """## 投标应答文件
+{document_content}
+
+## 投标应答文件结束
+"""
+
+SHARED_CONTEXT_TASK = """## 本次检查任务
+
+### 审核角色
+{role}
+
+{task}"""
+
+# 共享上下文模式下替换各检查模板中 {document_content} 的引用说明
+SHARED_CONTEXT_REFERENCE = "（见上文“投标应答文件”）"
@@ -9,12 +9,15 @@
 import uuid
 import json
 import sqlite3
-import threading
 from datetime import datetime
 from typing import Dict, List, Optional, Any
 from pathlib import Path
 import logging
 
+from common.db_pool import get_pooled_connection
+from common.job_queue import JobCancelled, JobContext, enqueue_job, cancel_job_by_key
+from common.registry import get_instance, run_once
+
 from .schemas import ResponseCheckTask, ResponseCheckResult, CheckCategory
 from .checker import ResponseChecker
 
@@ -24,11 +27,9 @@ logger = logging.getLogger(__name__)
 class ResponseCheckTaskManager:
     """
     应答文件自检任务管理器
-    """
 
-    # 内存中的运行任务缓存
-    _running_tasks: Dict[str, ResponseCheckTask] = {}
-    _lock = threading.Lock()
+    任务状态只保存在数据库中：检查在后台工作进程中执行，Web 进程之间不共享内存。
+    """
 
     def __init__(self, db_path: str = None):
         """
@@ -46,52 +47,55 @@ class ResponseCheckTaskManager:
         self._ensure_table()
 
     def _ensure_table(self):
-        """确保数据库表存在"""
+        """确保数据库表存在（每个进程每个数据库只执行一次）"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            run_once(('schema', 'response_check_tasks', self.db_path), self._create_tables)
+        except Exception as e:
+            logger.error(f"数据库表初始化失败: {e}")
 
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS response_check_tasks (
-                    task_id TEXT PRIMARY KEY,
-                    openid TEXT,
-                    user_id INTEGER,
-                    file_id TEXT NOT NULL,
-                    file_path TEXT,
-                    original_filename TEXT NOT NULL,
-                    file_size INTEGER DEFAULT 0,
-                    total_pages INTEGER DEFAULT 0,
-                    status TEXT DEFAULT 'pending',
-                    progress INTEGER DEFAULT 0,
-                    current_step TEXT DEFAULT '',
-                    current_category TEXT DEFAULT '',
-                    error_message TEXT DEFAULT '',
-                    extracted_info TEXT DEFAULT '{}',
-                    check_categories TEXT DEFAULT '[]',
-                    total_items INTEGER DEFAULT 0,
-                    pass_count INTEGER DEFAULT 0,
-                    fail_count INTEGER DEFAULT 0,
-                    unknown_count INTEGER DEFAULT 0,
-                    model_name TEXT DEFAULT 'deepseek-v3',
-                    analysis_time REAL DEFAULT 0,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    started_at TIMESTAMP,
-                    completed_at TIMESTAMP
-                )
-            ''')
+    def _create_tables(self):
+        """建表及索引"""
+        conn = get_pooled_connection(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS response_check_tasks (
+                task_id TEXT PRIMARY KEY,
+                openid TEXT,
+                user_id INTEGER,
+                file_id TEXT NOT NULL,
+                file_path TEXT,
+                original_filename TEXT NOT NULL,
+                file_size INTEGER DEFAULT 0,
+                total_pages INTEGER DEFAULT 0,
+                status TEXT DEFAULT 'pending',
+                progress INTEGER DEFAULT 0,
+                current_step TEXT DEFAULT '',
+                current_category TEXT DEFAULT '',
+                error_message TEXT DEFAULT '',
+                extracted_info TEXT DEFAULT '{}',
+                check_categories TEXT DEFAULT '[]',
+                total_items INTEGER DEFAULT 0,
+                pass_count INTEGER DEFAULT 0,
+                fail_count INTEGER DEFAULT 0,
+                unknown_count INTEGER DEFAULT 0,
+                model_name TEXT DEFAULT 'deepseek-v3',
+                analysis_time REAL DEFAULT 0,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                started_at TIMESTAMP,
+                completed_at TIMESTAMP
+            )
+        ''')
 
-            # 创建索引
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_response_check_openid ON response_check_tasks(openid)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_response_check_user_id ON response_check_tasks(user_id)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_response_check_status ON response_check_tasks(status)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_response_check_created ON response_check_tasks(created_at DESC)')
+        # 创建索引
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_response_check_openid ON response_check_tasks(openid)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_response_check_user_id ON response_check_tasks(user_id)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_response_check_status ON response_check_tasks(status)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_response_check_created ON response_check_tasks(created_at DESC)')
 
-            conn.commit()
-            conn.close()
-            logger.info("数据库表初始化完成")
-
-        except Exception as e:
-            logger.error(f"数据库表初始化失败: {e}")
+        conn.commit()
+        conn.close()
+        logger.info("数据库表初始化完成")
 
     def create_task(self,
                     file_id: str,
@@ -135,33 +139,32 @@ class ResponseCheckTaskManager:
         # 保存到数据库
         self._save_task(task)
 
-        # 缓存到内存
-        with self._lock:
-            self._running_tasks[task_id] = task
-
         logger.info(f"创建检查任务: {task_id}")
         return task_id
 
-    def start_check(self, task_id: str):
+    def start_check(self, task_id: str) -> str:
         """
-        启动检查任务（异步）
+        启动检查任务（提交到后台任务队列，由工作进程执行）
 
         Args:
             task_id: 任务ID
+
+        Returns:
+            后台任务ID
         """
-        # 在新线程中执行检查
-        thread = threading.Thread(target=self._run_check, args=(task_id,))
-        thread.daemon = True
-        thread.start()
+        job_id = enqueue_job('response_check', {'task_id': task_id, 'db_path': self.db_path},
+                             job_key=f"response_check:{task_id}")
 
-        logger.info(f"检查任务已启动: {task_id}")
+        logger.info(f"检查任务已启动: {task_id}, 后台任务: {job_id}")
+        return job_id
 
-    def _run_check(self, task_id: str):
+    def _run_check(self, task_id: str, job: Optional[JobContext] = None):
         """
         执行检查任务
 
         Args:
             task_id: 任务ID
+            job: 后台任务上下文（用于上报进度和响应取消）
         """
         task = self.get_task(task_id)
         if not task:
@@ -181,6 +184,8 @@ class ResponseCheckTaskManager:
 
             # 定义进度回调
             def progress_callback(progress: int, message: str):
+                if job:
+                    job.report(progress, message)
                 self._update_task_status(task_id, 'checking', progress, message)
 
             # 定义类别完成回调
@@ -189,6 +194,8 @@ class ResponseCheckTaskManager:
             def category_callback(category: CheckCategory):
                 categories_completed.append(category)
                 self._update_task_categories(task_id, categories_completed)
+                if job:
+                    job.check_cancelled()
 
             # 执行检查
             result = checker.check(
@@ -202,9 +209,14 @@ class ResponseCheckTaskManager:
 
             logger.info(f"检查任务完成: {task_id}")
 
+        except JobCancelled:
+            logger.info(f"检查任务已取消: {task_id}")
+            self._update_task_status(task_id, 'failed', 0, '', '任务已取消')
+            raise
         except Exception as e:
             logger.error(f"检查任务失败: {task_id}, 错误: {e}")
             self._update_task_status(task_id, 'failed', 0, '', str(e))
+            raise
 
     def get_task(self, task_id: str) -> Optional[Dict[str, Any]]:
         """
@@ -217,7 +229,7 @@ class ResponseCheckTaskManager:
             任务信息字典
         """
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = get_pooled_connection(self.db_path)
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
 
@@ -294,7 +306,7 @@ class ResponseCheckTaskManager:
             任务列表和分页信息
         """
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = get_pooled_connection(self.db_path)
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
 
@@ -356,7 +368,7 @@ class ResponseCheckTaskManager:
             是否删除成功
         """
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = get_pooled_connection(self.db_path)
             cursor = conn.cursor()
 
             if user_id:
@@ -374,10 +386,9 @@ class ResponseCheckTaskManager:
             conn.commit()
             conn.close()
 
-            # 从内存缓存中移除
-            with self._lock:
-                if task_id in self._running_tasks:
-                    del self._running_tasks[task_id]
+            # 停止仍在排队/执行的检查
+            if affected:
+                cancel_job_by_key(f"response_check:{task_id}")
 
             return affected > 0
 
@@ -390,7 +401,7 @@ class ResponseCheckTaskManager:
     def _save_task(self, task: ResponseCheckTask):
         """保存任务到数据库"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = get_pooled_connection(self.db_path)
             cursor = conn.cursor()
 
             cursor.execute('''
@@ -415,7 +426,7 @@ class ResponseCheckTaskManager:
                             current_step: str, error_message: str = ''):
         """更新任务状态"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = get_pooled_connection(self.db_path)
             cursor = conn.cursor()
 
             if status == 'parsing':
@@ -441,13 +452,6 @@ class ResponseCheckTaskManager:
             conn.commit()
             conn.close()
 
-            # 更新内存缓存
-            with self._lock:
-                if task_id in self._running_tasks:
-                    self._running_tasks[task_id].status = status
-                    self._running_tasks[task_id].progress = progress
-                    self._running_tasks[task_id].current_step = current_step
-
         except Exception as e:
             logger.error(f"更新任务状态失败: {e}")
 
@@ -456,7 +460,7 @@ class ResponseCheckTaskManager:
         try:
             categories_data = [cat.to_dict() for cat in categories]
 
-            conn = sqlite3.connect(self.db_path)
+            conn = get_pooled_connection(self.db_path)
             cursor = conn.cursor()
 
             cursor.execute('''
@@ -478,7 +482,7 @@ class ResponseCheckTaskManager:
     def _save_result(self, task_id: str, result: ResponseCheckResult):
         """保存检查结果"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = get_pooled_connection(self.db_path)
             cursor = conn.cursor()
 
             categories_data = [cat.to_dict() for cat in result.categories]
@@ -515,10 +519,20 @@ class ResponseCheckTaskManager:
             conn.commit()
             conn.close()
 
-            # 从内存缓存中移除
-            with self._lock:
-                if task_id in self._running_tasks:
-                    del self._running_tasks[task_id]
-
         except Exception as e:
             logger.error(f"保存检查结果失败: {e}")
+
+
+def get_task_manager(db_path: str = None) -> ResponseCheckTaskManager:
+    """获取任务管理器单例（按数据库路径缓存）"""
+    return get_instance(ResponseCheckTaskManager, db_path)
+
+
+def ensure_schema():
+    """应用启动时建表（见 common.registry.bootstrap_schemas）"""
+    get_task_manager()
+
+
+def run_check_job(job: JobContext):
+    """后台任务：应答文件自检"""
+    get_task_manager(job.payload.get('db_path'))._run_check(job.payload['task_id'], job)
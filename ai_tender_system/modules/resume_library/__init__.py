@@ -5,12 +5,13 @@
 提供人员简历管理、智能解析、批量导出等功能
 """
 
-from .manager import ResumeLibraryManager
+from .manager import ResumeLibraryManager, get_resume_library_manager
 from .resume_parser import ResumeParser
 from .export_handler import ResumeExportHandler
 
 __all__ = [
     'ResumeLibraryManager',
+    'get_resume_library_manager',
     'ResumeParser',
     'ResumeExportHandler'
 ]
\ No newline at end of file
@@ -13,7 +13,7 @@ from werkzeug.utils import secure_filename
 from datetime import datetime
 from typing import Dict, Any
 
-from .manager import ResumeLibraryManager
+from .manager import ResumeLibraryManager, get_resume_library_manager
 from .resume_parser import ResumeParser
 from .export_handler import ResumeExportHandler
 from web.utils.response_helper import success_response, error_response
@@ -38,8 +38,10 @@ def init_managers(include_parser=False, force_reinit=False):
         force_reinit: 是否强制重新初始化，默认False
     """
     global resume_manager, resume_parser, export_handler
-    if not resume_manager or force_reinit:
+    if force_reinit:
         resume_manager = ResumeLibraryManager()
+    elif not resume_manager:
+        resume_manager = get_resume_library_manager()
     if include_parser and (not resume_parser or force_reinit):
         # 只在需要解析简历时才初始化(避免加载AI模型)
         resume_parser = ResumeParser()
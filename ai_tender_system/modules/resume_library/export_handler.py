@@ -13,7 +13,7 @@ from datetime import datetime
 from typing import List, Dict, Any, Optional
 from pathlib import Path
 
-from .manager import ResumeLibraryManager
+from .manager import get_resume_library_manager
 
 
 class ResumeExportHandler:
@@ -25,7 +25,7 @@ class ResumeExportHandler:
         Args:
             db_path: 数据库路径
         """
-        self.manager = ResumeLibraryManager(db_path)
+        self.manager = get_resume_library_manager(db_path)
         self.temp_dir = Path('data/temp')
         self.export_dir = Path('data/exports')
 
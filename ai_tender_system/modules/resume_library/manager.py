@@ -14,6 +14,8 @@ from typing import List, Dict, Optional, Any
 from contextlib import contextmanager
 from pathlib import Path
 
+from common.registry import get_instance, run_once
+
 
 def dict_factory(cursor, row):
     """将数据库查询结果转换为字典"""
@@ -43,9 +45,13 @@ class ResumeLibraryManager:
         self._init_database()
 
     def _init_database(self):
-        """初始化数据库表"""
-        schema_file = 'database/resume_library_schema.sql'
-        if os.path.exists(schema_file):
+        """初始化数据库表（每个进程每个数据库只执行一次）"""
+        run_once(('schema', 'resumes', self.db_path), self._create_tables)
+
+    def _create_tables(self):
+        """执行简历库表结构脚本"""
+        schema_file = Path(__file__).parent.parent.parent / 'database' / 'resume_library_schema.sql'
+        if schema_file.exists():
             with open(schema_file, 'r', encoding='utf-8') as f:
                 schema_sql = f.read()
 
@@ -649,4 +655,13 @@ class ResumeLibraryManager:
                 'education_stats': education_stats,
                 'status_stats': status_stats,
                 'total_attachments': total_attachments
-            }
\ No newline at end of file
+            }
+
+def get_resume_library_manager(db_path: str = None) -> ResumeLibraryManager:
+    """获取简历库管理器单例（按数据库路径缓存）"""
+    return get_instance(ResumeLibraryManager, db_path)
+
+
+def ensure_schema():
+    """应用启动时建表（见 common.registry.bootstrap_schemas）"""
+    get_resume_library_manager()
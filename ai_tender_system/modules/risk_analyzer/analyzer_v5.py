@@ -12,8 +12,11 @@
 """
 
 import json
+import os
 import time
 import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import List, Dict, Optional, Callable
 from pathlib import Path
 
@@ -32,6 +35,45 @@ from .smart_chunker import SmartChunker, DocumentChunk
 
 logger = get_module_logger("risk_analyzer.v5")
 
+# 切片并行分析的默认并发上限（可通过模型配置 max_concurrency 单独指定）
+DEFAULT_MAX_CONCURRENCY = int(os.getenv('RISK_ANALYZER_MAX_CONCURRENCY', '4'))
+# 单个切片失败后的重试次数
+DEFAULT_CHUNK_RETRIES = int(os.getenv('RISK_ANALYZER_CHUNK_RETRIES', '2'))
+
+# 每个模型共享一个信号量，多个分析任务同时运行时也不会超过该模型的并发上限
+_model_semaphores: Dict[str, threading.BoundedSemaphore] = {}
+_model_semaphores_lock = threading.Lock()
+
+
+def get_model_concurrency(model_name: str) -> int:
+    """
+    获取模型的并发上限
+
+    优先使用模型配置中的 max_concurrency；联通元景试用账号每分钟仅 5 次调用，默认串行；
+    其余模型使用 RISK_ANALYZER_MAX_CONCURRENCY（默认4）
+    """
+    try:
+        from common.config import get_config
+        model_config = get_config().get_model_config(model_name)
+    except Exception:
+        model_config = {}
+
+    if model_config.get('max_concurrency'):
+        return max(1, int(model_config['max_concurrency']))
+    if model_config.get('provider') == 'China Unicom':
+        return 1
+    return max(1, DEFAULT_MAX_CONCURRENCY)
+
+
+def get_model_semaphore(model_name: str, limit: int) -> threading.BoundedSemaphore:
+    """获取模型共享的并发信号量（首次创建时确定上限）"""
+    with _model_semaphores_lock:
+        semaphore = _model_semaphores.get(model_name)
+        if semaphore is None:
+            semaphore = threading.BoundedSemaphore(limit)
+            _model_semaphores[model_name] = semaphore
+        return semaphore
+
 
 class RiskAnalyzerV5:
     """
@@ -41,20 +83,29 @@ class RiskAnalyzerV5:
     - 目录感知切片：有目录时精准切片，无目录时智能降级
     - 专家接力式提示词：A→B→C 接力处理
     - 增量结果回调：每分析完一个切片就回调
+    - 切片并行分析：按模型限制并发，结果按切片顺序合并
     - 完整的 5.0 字段支持
     """
 
-    def __init__(self, model_name: str = 'deepseek-v3', chunk_size: int = 5000):
+    def __init__(self, model_name: str = 'deepseek-v3', chunk_size: int = 5000,
+                 max_workers: Optional[int] = None, chunk_retries: Optional[int] = None):
         """
         初始化分析器
 
         Args:
             model_name: AI 模型名称
             chunk_size: 分块大小（字符数）
+            max_workers: 切片并行数（默认取模型并发上限，1 表示串行）
+            chunk_retries: 单个切片失败后的重试次数（默认 RISK_ANALYZER_CHUNK_RETRIES）
         """
         self.model_name = model_name
         self.chunk_size = chunk_size
 
+        model_concurrency = get_model_concurrency(model_name)
+        self.max_workers = max(1, min(max_workers or model_concurrency, model_concurrency))
+        self.chunk_retries = DEFAULT_CHUNK_RETRIES if chunk_retries is None else max(0, chunk_retries)
+        self._llm_semaphore = get_model_semaphore(model_name, model_concurrency)
+
         self.llm = LLMClient(model_name)
         self.parser = ParserManager()
         self.prompt_manager = PromptManager()
@@ -62,7 +113,7 @@ class RiskAnalyzerV5:
 
         self.total_tokens = 0
 
-        logger.info(f"风险分析器 5.0 初始化完成，模型: {model_name}")
+        logger.info(f"风险分析器 5.0 初始化完成，模型: {model_name}，切片并行数: {self.max_workers}")
 
     def analyze(self,
                 file_path: str,
@@ -121,28 +172,9 @@ class RiskAnalyzerV5:
             if progress_callback:
                 progress_callback(20, "正在提取风险项...")
 
-            all_risk_items = []
-
-            for i, chunk in enumerate(chunks):
-                progress = 20 + int((i + 1) / total_chunks * 55)
-
-                if progress_callback:
-                    progress_callback(progress, f"正在分析: {chunk.title}")
-
-                try:
-                    items = self._analyze_chunk(chunk, has_toc=has_toc, chunk_index=i)
-                    all_risk_items.extend(items)
-
-                    logger.debug(f"切片 {i+1}/{total_chunks} ({chunk.title}) "
-                                f"发现 {len(items)} 个风险项")
-
-                    # 增量回调
-                    if item_callback and items:
-                        item_callback(items)
-
-                except Exception as e:
-                    logger.warning(f"分析切片 {i+1} 失败: {e}")
-                    continue
+            all_risk_items = self._extract_risk_items(
+                chunks, has_toc, progress_callback, item_callback
+            )
 
             # ========== Stage 5: Todo 生成 (提示词 C) ==========
             if progress_callback:
@@ -204,14 +236,103 @@ class RiskAnalyzerV5:
 
         return self.parser.parse_document_simple(str(path))
 
+    def _extract_risk_items(self,
+                            chunks: List[DocumentChunk],
+                            has_toc: bool,
+                            progress_callback: Optional[Callable[[int, str], None]] = None,
+                            item_callback: Optional[Callable[[List['RiskItem']], None]] = None
+                            ) -> List[RiskItem]:
+        """
+        分析所有切片（Stage 4）
+
+        并行模式下各切片同时请求 LLM，但结果按切片顺序合并：
+        - item_callback 按切片顺序增量回调（前面的切片完成后才回调后面的）
+        - progress_callback 在开始分析（提交）各切片前按切片顺序回调（20% → 75%）
+        - 回调均在调用线程中执行
+        """
+        total_chunks = len(chunks)
+        if total_chunks == 0:
+            return []
+
+        results: List[Optional[List[RiskItem]]] = [None] * total_chunks
+        next_to_deliver = 0
+        all_risk_items = []
+
+        def on_chunk_start(i: int, chunk: DocumentChunk):
+            if progress_callback:
+                progress = 20 + int((i + 1) / total_chunks * 55)
+                progress_callback(progress, f"正在分析: {chunk.title}")
+
+        def on_chunk_done(i: int, items: List[RiskItem]):
+            nonlocal next_to_deliver
+            results[i] = items
+
+            logger.debug(f"切片 {i+1}/{total_chunks} ({chunks[i].title}) 发现 {len(items)} 个风险项")
+
+            # 按切片顺序交付已连续完成的结果
+            while next_to_deliver < total_chunks and results[next_to_deliver] is not None:
+                ready = results[next_to_deliver]
+                all_risk_items.extend(ready)
+                if item_callback and ready:
+                    try:
+                        item_callback(ready)
+                    except Exception as e:
+                        logger.warning(f"切片 {next_to_deliver+1} 增量回调失败: {e}")
+                next_to_deliver += 1
+
+        workers = min(self.max_workers, total_chunks)
+
+        if workers <= 1:
+            for i, chunk in enumerate(chunks):
+                on_chunk_start(i, chunk)
+                on_chunk_done(i, self._analyze_chunk(chunk, has_toc=has_toc, chunk_index=i))
+            return all_risk_items
+
+        logger.info(f"开始并行分析 {total_chunks} 个切片，并发数: {workers}")
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            future_to_index = {}
+            for i, chunk in enumerate(chunks):
+                on_chunk_start(i, chunk)
+                future_to_index[executor.submit(self._analyze_chunk, chunk, has_toc, i)] = i
+
+            for future in as_completed(future_to_index):
+                i = future_to_index[future]
+                try:
+                    items = future.result()
+                except Exception as e:
+                    logger.warning(f"分析切片 {i+1} 失败: {e}")
+                    items = []
+                on_chunk_done(i, items)
+
+        return all_risk_items
+
     def _analyze_chunk(self,
                        chunk: DocumentChunk,
                        has_toc: bool,
                        chunk_index: int) -> List[RiskItem]:
-        """分析单个切片（使用提示词 B）"""
+        """分析单个切片（使用提示词 B），失败时按 chunk_retries 重试"""
         if not chunk.content or len(chunk.content.strip()) < 50:
             return []
 
+        attempts = self.chunk_retries + 1
+        for attempt in range(1, attempts + 1):
+            try:
+                return self._extract_chunk_items(chunk, has_toc, chunk_index)
+            except Exception as e:
+                if attempt < attempts:
+                    logger.warning(f"切片 {chunk_index+1} 分析失败（第{attempt}次），准备重试: {e}")
+                    time.sleep(min(2 ** (attempt - 1), 10))
+                else:
+                    logger.error(f"切片分析失败: {e}")
+
+        return []
+
+    def _extract_chunk_items(self,
+                             chunk: DocumentChunk,
+                             has_toc: bool,
+                             chunk_index: int) -> List[RiskItem]:
+        """调用 LLM 提取单个切片的风险项（异常向上抛出，由调用方重试）"""
         # 获取提示词配置
         prompt = self.prompt_manager.get_prompt(
             PromptType.BID_EVALUATOR,
@@ -222,7 +343,8 @@ class RiskAnalyzerV5:
 
         config = self.prompt_manager.get_config(PromptType.BID_EVALUATOR)
 
-        try:
+        # 同一模型的并发请求数受共享信号量限制
+        with self._llm_semaphore:
             response = self.llm.call(
                 prompt=prompt,
                 system_prompt=config['system_prompt'],
@@ -231,38 +353,34 @@ class RiskAnalyzerV5:
                 purpose=config['purpose']
             )
 
-            # 解析响应
-            items_data = self._parse_json_response(response)
+        # 解析响应
+        items_data = self._parse_json_response(response)
 
-            if not isinstance(items_data, dict) or 'items' not in items_data:
-                if isinstance(items_data, list):
-                    items_list = items_data
-                else:
-                    return []
+        if not isinstance(items_data, dict) or 'items' not in items_data:
+            if isinstance(items_data, list):
+                items_list = items_data
             else:
-                items_list = items_data.get('items', [])
-
-            # 转换为 RiskItem 对象
-            return [
-                RiskItem(
-                    location=item.get('location', ''),
-                    requirement=item.get('requirement', ''),
-                    suggestion=item.get('suggestion', self._get_default_suggestion(item)),
-                    risk_level=item.get('risk_level', 'medium'),
-                    risk_type=item.get('risk_type', ''),
-                    source_chunk=chunk_index,
-                    # 5.0 新增字段
-                    original_text=item.get('original_text', ''),
-                    position_index=item.get('position_index', ''),
-                    deep_analysis=item.get('deep_analysis', '')
-                )
-                for item in items_list
-                if item.get('requirement')
-            ]
-
-        except Exception as e:
-            logger.error(f"切片分析失败: {e}")
-            return []
+                return []
+        else:
+            items_list = items_data.get('items', [])
+
+        # 转换为 RiskItem 对象
+        return [
+            RiskItem(
+                location=item.get('location', ''),
+                requirement=item.get('requirement', ''),
+                suggestion=item.get('suggestion', self._get_default_suggestion(item)),
+                risk_level=item.get('risk_level', 'medium'),
+                risk_type=item.get('risk_type', ''),
+                source_chunk=chunk_index,
+                # 5.0 新增字段
+                original_text=item.get('original_text', ''),
+                position_index=item.get('position_index', ''),
+                deep_analysis=item.get('deep_analysis', '')
+            )
+            for item in items_list
+            if item.get('requirement')
+        ]
 
     def _generate_todos(self, risk_items: List[RiskItem]) -> List[TodoItem]:
         """生成 Todo 操作（使用提示词 C）"""
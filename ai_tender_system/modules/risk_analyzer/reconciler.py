@@ -3,10 +3,14 @@
 """
 双向对账引擎 - 检查投标应答是否合规
 使用提示词 D（合规审计法务）进行对账
+
+应答文件只解析、切分一次并建立倒排索引（BM25 检索相关段落），
+各风险项的 LLM 判定通过有界线程池并行执行。
 """
 
 import json
 import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import List, Dict, Optional, Callable
 from pathlib import Path
 
@@ -20,6 +24,8 @@ from modules.document_parser.parser_manager import ParserManager
 
 from .schemas import RiskItem, ReconcileResult
 from .prompt_manager import PromptManager, PromptType
+from .response_index import ResponseIndex
+from .analyzer_v5 import get_model_concurrency, get_model_semaphore
 
 logger = get_module_logger("risk_analyzer.reconciler")
 
@@ -31,19 +37,24 @@ class Reconciler:
     对照招标文件要求检查投标应答的符合性
     """
 
-    def __init__(self, model_name: str = 'deepseek-v3'):
+    def __init__(self, model_name: str = 'deepseek-v3', max_workers: Optional[int] = None):
         """
         初始化对账引擎
 
         Args:
             model_name: AI 模型名称
+            max_workers: 并行对账数（默认取模型并发上限，1 表示串行）
         """
         self.model_name = model_name
         self.llm = LLMClient(model_name)
         self.parser = ParserManager()
         self.prompt_manager = PromptManager()
 
-        logger.info(f"双向对账引擎初始化完成，模型: {model_name}")
+        model_concurrency = get_model_concurrency(model_name)
+        self.max_workers = max(1, min(max_workers or model_concurrency, model_concurrency))
+        self._llm_semaphore = get_model_semaphore(model_name, model_concurrency)
+
+        logger.info(f"双向对账引擎初始化完成，模型: {model_name}，并行数: {self.max_workers}")
 
     def reconcile(self,
                   risk_items: List[RiskItem],
@@ -76,40 +87,60 @@ class Reconciler:
 
         logger.info(f"应答文件解析完成，总字符数: {len(response_text)}")
 
-        # 2. 逐项对账
-        results = []
-        total_items = len(risk_items)
+        # 2. 建立检索索引（各风险项在对账时检索相关段落）
+        response_index = ResponseIndex(response_text)
 
-        for i, risk_item in enumerate(risk_items):
-            progress = 10 + int((i + 1) / total_items * 85)
-
-            if progress_callback:
-                progress_callback(progress, f"正在对账第 {i+1}/{total_items} 项...")
+        # 3. 并行对账（结果按风险项顺序保存）
+        total_items = len(risk_items)
+        results: List[Optional[ReconcileResult]] = [None] * total_items
+        completed = 0
 
-            try:
-                result = self._reconcile_item(risk_item, response_text, i)
-                results.append(result)
+        def on_item_done(i: int, result: ReconcileResult, succeeded: bool):
+            nonlocal completed
+            results[i] = result
+            completed += 1
 
+            risk_item = risk_items[i]
+            if succeeded:
                 # 更新风险项的合规状态
                 risk_item.compliance_status = result.compliance_status
                 risk_item.compliance_note = result.overall_assessment
                 risk_item.match_score = result.match_score
                 risk_item.response_text = result.response_content[:500]  # 限制长度
 
-                logger.debug(f"风险项 {i+1} 对账完成: {result.compliance_status}")
+            logger.debug(f"风险项 {i+1} 对账完成: {result.compliance_status}")
 
+            if progress_callback:
+                progress = 10 + int(completed / total_items * 85)
+                progress_callback(progress, f"正在对账第 {completed}/{total_items} 项...")
+
+        def run_item(i: int):
+            try:
+                related_content = self._find_related_content(risk_items[i], response_index)
+                return self._reconcile_item(risk_items[i], related_content, i), True
             except Exception as e:
                 logger.warning(f"对账第 {i+1} 项失败: {e}")
-                results.append(ReconcileResult(
+                return ReconcileResult(
                     risk_item_id=i,
                     compliance_status='unknown',
                     overall_assessment=f"对账失败: {str(e)}"
-                ))
+                ), False
+
+        workers = min(self.max_workers, total_items)
+        if workers <= 1:
+            for i in range(total_items):
+                on_item_done(i, *run_item(i))
+        else:
+            logger.info(f"开始并行对账 {total_items} 项，并发数: {workers}")
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                future_to_index = {executor.submit(run_item, i): i for i in range(total_items)}
+                for future in as_completed(future_to_index):
+                    on_item_done(future_to_index[future], *future.result())
 
         if progress_callback:
             progress_callback(100, "对账完成")
 
-        # 3. 生成对账汇总
+        # 4. 生成对账汇总
         self._log_summary(results)
 
         return results
@@ -130,13 +161,10 @@ class Reconciler:
 
     def _reconcile_item(self,
                         risk_item: RiskItem,
-                        response_text: str,
+                        related_content: str,
                         item_index: int) -> ReconcileResult:
-        """对账单个风险项"""
-        # 1. 在应答文件中查找相关内容
-        related_content = self._find_related_content(risk_item, response_text)
-
-        # 2. 构建提示词
+        """对账单个风险项（related_content 为已检索到的应答相关内容）"""
+        # 1. 构建提示词
         prompt = self.prompt_manager.get_prompt(
             PromptType.COMPLIANCE_AUDITOR,
             bid_requirement=self._format_requirement(risk_item),
@@ -145,54 +173,34 @@ class Reconciler:
 
         config = self.prompt_manager.get_config(PromptType.COMPLIANCE_AUDITOR)
 
-        # 3. 调用 AI
-        response = self.llm.call(
-            prompt=prompt,
-            system_prompt=config['system_prompt'],
-            temperature=config['temperature'],
-            max_tokens=config['max_tokens'],
-            purpose=config['purpose']
-        )
+        # 2. 调用 AI（同一模型的并发请求数受共享信号量限制）
+        with self._llm_semaphore:
+            response = self.llm.call(
+                prompt=prompt,
+                system_prompt=config['system_prompt'],
+                temperature=config['temperature'],
+                max_tokens=config['max_tokens'],
+                purpose=config['purpose']
+            )
 
-        # 4. 解析结果
+        # 3. 解析结果
         return self._parse_reconcile_response(response, item_index, related_content, risk_item)
 
-    def _find_related_content(self, risk_item: RiskItem, response_text: str) -> str:
-        """在应答文件中查找与风险项相关的内容"""
+    def _find_related_content(self, risk_item: RiskItem, response_index: ResponseIndex) -> str:
+        """在应答文件中查找与风险项相关的内容（BM25 取前3个段落）"""
         # 提取关键词
         keywords = self._extract_keywords(risk_item)
 
         if not keywords:
             return "(未找到相关内容)"
 
-        # 搜索包含关键词的段落
-        paragraphs = response_text.split('\n\n')
-        related = []
-        scores = []
-
-        for para in paragraphs:
-            para = para.strip()
-            if len(para) < 20:
-                continue
-
-            # 计算匹配分数
-            score = 0
-            for kw in keywords:
-                if kw in para:
-                    score += 1
-
-            if score > 0:
-                related.append((score, para))
-
-        # 按分数排序，取前3个最相关的段落
-        related.sort(key=lambda x: x[0], reverse=True)
-        top_related = [para for score, para in related[:3]]
+        top_related = [para for score, para in response_index.search(keywords, top_k=3)]
 
         if top_related:
             return '\n\n'.join(top_related)
 
         # 如果没找到，尝试更宽松的搜索
-        return self._fuzzy_search(risk_item, response_text)
+        return self._fuzzy_search(risk_item, response_index)
 
     def _extract_keywords(self, risk_item: RiskItem) -> List[str]:
         """提取风险项的关键词"""
@@ -222,7 +230,7 @@ class Reconciler:
 
         return unique_keywords
 
-    def _fuzzy_search(self, risk_item: RiskItem, response_text: str) -> str:
+    def _fuzzy_search(self, risk_item: RiskItem, response_index: ResponseIndex) -> str:
         """模糊搜索相关内容"""
         # 使用风险类型相关的关键词
         risk_type = risk_item.risk_type
@@ -236,10 +244,9 @@ class Reconciler:
         else:
             search_terms = ['响应', '承诺', '声明', '说明']
 
-        paragraphs = response_text.split('\n\n')
-        for para in paragraphs:
-            if any(term in para for term in search_terms):
-                return para[:1000]
+        para = response_index.first_containing_any(search_terms)
+        if para is not None:
+            return para[:1000]
 
         return "(未找到相关内容，请人工核查)"
 
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+应答文件检索索引 - 双向对账的候选段落检索
+
+应答文件只切分一次段落，构建字符二元组(bigram)倒排索引：
+- 关键词（2-8个汉字）先通过最稀有的二元组取候选段落，再做子串校验
+- 按 BM25 对段落打分（词频 / 文档频率 / 段落长度归一化）
+每个风险项的检索只触及包含关键词的少量段落，而不是扫描全文。
+"""
+
+import math
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+# BM25 参数
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# 参与打分的最短段落长度（与原逐段扫描逻辑一致）
+MIN_PARAGRAPH_LENGTH = 20
+
+
+class ResponseIndex:
+    """应答文件段落倒排索引"""
+
+    def __init__(self, response_text: str):
+        """
+        构建索引
+
+        Args:
+            response_text: 应答文件全文（段落以空行分隔）
+        """
+        # 原始段落（用于兜底搜索，保持原文顺序）
+        self.raw_paragraphs: List[str] = response_text.split('\n\n')
+        # 参与打分的段落：去除首尾空白后长度≥20
+        self.paragraphs: List[str] = []
+        for para in self.raw_paragraphs:
+            para = para.strip()
+            if len(para) >= MIN_PARAGRAPH_LENGTH:
+                self.paragraphs.append(para)
+
+        self.avg_length = (
+            sum(len(p) for p in self.paragraphs) / len(self.paragraphs)
+            if self.paragraphs else 0.0
+        )
+
+        self._postings = self._build_postings(self.paragraphs)
+        self._raw_postings: Optional[Dict[str, List[int]]] = None
+        self._term_cache: Dict[str, Dict[int, int]] = {}
+
+    @staticmethod
+    def _build_postings(paragraphs: List[str]) -> Dict[str, List[int]]:
+        """二元组 → 段落序号列表（升序）"""
+        postings = defaultdict(list)
+        for idx, para in enumerate(paragraphs):
+            for gram in {para[k:k + 2] for k in range(len(para) - 1)}:
+                postings[gram].append(idx)
+        return postings
+
+    @staticmethod
+    def _candidates(postings: Dict[str, List[int]], term: str) -> Optional[List[int]]:
+        """取 term 中最稀有二元组的倒排表；term 不足2字时返回None（需全量校验）"""
+        if len(term) < 2:
+            return None
+        rarest = None
+        for k in range(len(term) - 1):
+            indices = postings.get(term[k:k + 2])
+            if not indices:
+                return []
+            if rarest is None or len(indices) < len(rarest):
+                rarest = indices
+        return rarest
+
+    def term_frequencies(self, term: str) -> Dict[int, int]:
+        """词项在各段落中的出现次数 {段落序号: 次数}（按词项缓存）"""
+        cached = self._term_cache.get(term)
+        if cached is not None:
+            return cached
+
+        candidates = self._candidates(self._postings, term)
+        if candidates is None:
+            candidates = range(len(self.paragraphs))
+
+        frequencies = {}
+        for idx in candidates:
+            count = self.paragraphs[idx].count(term)
+            if count:
+                frequencies[idx] = count
+
+        self._term_cache[term] = frequencies
+        return frequencies
+
+    def search(self, terms: List[str], top_k: int = 3) -> List[Tuple[float, str]]:
+        """
+        BM25 检索
+
+        Args:
+            terms: 关键词列表
+            top_k: 返回段落数
+
+        Returns:
+            [(得分, 段落文本)]，按得分降序（同分按原文顺序）
+        """
+        if not terms or not self.paragraphs:
+            return []
+
+        total = len(self.paragraphs)
+        scores: Dict[int, float] = defaultdict(float)
+
+        for term in dict.fromkeys(terms):
+            frequencies = self.term_frequencies(term)
+            if not frequencies:
+                continue
+            df = len(frequencies)
+            idf = math.log(1 + (total - df + 0.5) / (df + 0.5))
+            for idx, tf in frequencies.items():
+                length_norm = 1 - BM25_B + BM25_B * len(self.paragraphs[idx]) / self.avg_length
+                scores[idx] += idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * length_norm)
+
+        ranked = sorted(scores.items(), key=lambda x: (-x[1], x[0]))[:top_k]
+        return [(score, self.paragraphs[idx]) for idx, score in ranked]
+
+    def first_containing_any(self, terms: List[str]) -> Optional[str]:
+        """返回原文中第一个包含任一词项的原始段落（兜底搜索）"""
+        if self._raw_postings is None:
+            self._raw_postings = self._build_postings(self.raw_paragraphs)
+
+        first = None
+        for term in terms:
+            candidates = self._candidates(self._raw_postings, term)
+            if candidates is None:
+                candidates = range(len(self.raw_paragraphs))
+            for idx in candidates:
+                if first is not None and idx >= first:
+                    break
+                if term in self.raw_paragraphs[idx]:
+                    first = idx
+                    break
+
+        return self.raw_paragraphs[first] if first is not None else None
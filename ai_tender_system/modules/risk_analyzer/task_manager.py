@@ -3,11 +3,16 @@
 """
 风险分析任务管理器
 处理异步任务、数据库操作、进度跟踪
+
+风险项保存在 risk_items 子表（task_id + seq），分析过程中按分块批量追加；
+任务表的 risk_item_count 记录当前条数，轮询时按 since_seq 只读取新增的风险项。
+旧版保存在 risk_analysis_tasks.risk_items 列中的 JSON 在初始化时一次性迁移到子表。
+
+建表/迁移每个进程按数据库只执行一次（common.registry.run_once），接口通过 get_task_manager() 复用单例。
 """
 
 import uuid
 import json
-import threading
 import time
 from typing import Dict, List, Optional, Any
 from datetime import datetime
@@ -19,6 +24,8 @@ sys.path.insert(0, str(project_root))
 
 from common.logger import get_module_logger
 from common.database import get_knowledge_base_db
+from common.job_queue import JobCancelled, JobContext, enqueue_job
+from common.registry import get_instance, run_once
 
 from .schemas import RiskTask, RiskAnalysisResult, RiskItem, ReconcileResult
 from .analyzer import RiskAnalyzer
@@ -37,17 +44,20 @@ logger = get_module_logger("risk_analyzer.task_manager")
 class RiskTaskManager:
     """风险分析任务管理器"""
 
-    # 任务实例缓存（用于异步任务）
-    _running_tasks: Dict[str, Dict] = {}
-    _lock = threading.Lock()
-
     def __init__(self):
         self.db = get_knowledge_base_db()
         self._ensure_table_exists()
-        logger.info("风险分析任务管理器初始化完成")
 
     def _ensure_table_exists(self):
-        """确保数据库表存在"""
+        """确保数据库表存在（每个进程每个数据库只执行一次）"""
+        try:
+            if run_once(('schema', 'risk_analysis_tasks', self.db.db_path), self._create_tables):
+                logger.info("风险分析任务表检查完成")
+        except Exception as e:
+            logger.error(f"创建数据库表失败: {e}")
+
+    def _create_tables(self):
+        """建表、补充字段并迁移旧数据"""
         create_table_sql = """
         CREATE TABLE IF NOT EXISTS risk_analysis_tasks (
             task_id TEXT PRIMARY KEY,
@@ -95,27 +105,36 @@ class RiskTaskManager:
             ("reconcile_progress", "INTEGER DEFAULT 0"),
             ("reconcile_step", "TEXT DEFAULT ''"),
             ("exclude_chapters", "TEXT DEFAULT ''"),
+            ("risk_item_count", "INTEGER DEFAULT 0"),
         ]
 
-        try:
-            self.db.execute_query(create_table_sql)
-            for sql in create_index_sql.strip().split(';'):
-                if sql.strip():
-                    self.db.execute_query(sql)
-
-            # 尝试添加 V5 新增字段（如果不存在）
-            for col_name, col_def in v5_columns:
-                try:
-                    self.db.execute_query(
-                        f"ALTER TABLE risk_analysis_tasks ADD COLUMN {col_name} {col_def}"
-                    )
-                    logger.debug(f"添加字段: {col_name}")
-                except Exception:
-                    pass  # 字段已存在，忽略
-
-            logger.debug("数据库表检查完成")
-        except Exception as e:
-            logger.error(f"创建数据库表失败: {e}")
+        # 风险项子表（追加写入，按 seq 增量读取）
+        create_items_sql = """
+        CREATE TABLE IF NOT EXISTS risk_items (
+            task_id TEXT NOT NULL,
+            seq INTEGER NOT NULL,
+            item TEXT NOT NULL,
+            PRIMARY KEY (task_id, seq)
+        );
+        """
+
+        self.db.execute_query(create_table_sql)
+        for sql in create_index_sql.strip().split(';'):
+            if sql.strip():
+                self.db.execute_query(sql)
+
+        # 尝试添加 V5 新增字段（如果不存在）
+        for col_name, col_def in v5_columns:
+            try:
+                self.db.execute_query(
+                    f"ALTER TABLE risk_analysis_tasks ADD COLUMN {col_name} {col_def}"
+                )
+                logger.debug(f"添加字段: {col_name}")
+            except Exception:
+                pass  # 字段已存在，忽略
+
+        self.db.execute_query(create_items_sql)
+        self._migrate_legacy_risk_items()
 
     def create_task(self,
                     file_id: str,
@@ -154,7 +173,7 @@ class RiskTaskManager:
 
     def start_analysis(self, task_id: str) -> bool:
         """
-        异步启动分析任务
+        异步启动分析任务（提交到后台任务队列，由工作进程执行）
 
         Args:
             task_id: 任务ID
@@ -167,26 +186,20 @@ class RiskTaskManager:
             logger.error(f"任务不存在: {task_id}")
             return False
 
-        if task['status'] not in ['pending', 'failed']:
+        if task['status'] not in ['pending', 'failed', 'cancelled']:
             logger.warning(f"任务状态不允许启动: {task_id}, status={task['status']}")
             return False
 
         # 更新状态为处理中
         self.update_task(task_id, status='parsing', progress=0, current_step='准备开始分析...')
 
-        # 启动后台线程
-        thread = threading.Thread(
-            target=self._run_analysis,
-            args=(task_id,),
-            daemon=True
-        )
-        thread.start()
+        job_id = enqueue_job('risk_analysis', {'task_id': task_id}, job_key=f"risk_analysis:{task_id}")
 
-        logger.info(f"任务已启动: {task_id}")
+        logger.info(f"任务已启动: {task_id}, 后台任务: {job_id}")
         return True
 
-    def _run_analysis(self, task_id: str):
-        """在后台线程中运行分析"""
+    def _run_analysis(self, task_id: str, job: Optional[JobContext] = None):
+        """在后台工作进程中运行分析"""
         try:
             task = self.get_task(task_id)
             if not task:
@@ -203,6 +216,8 @@ class RiskTaskManager:
 
             # 定义进度回调
             def progress_callback(progress: int, message: str):
+                if job:
+                    job.report(progress, message)
                 status = 'analyzing' if progress < 100 else 'completed'
                 if progress <= 10:
                     status = 'parsing'
@@ -230,6 +245,10 @@ class RiskTaskManager:
 
             logger.info(f"任务完成: {task_id}, 发现 {len(result.risk_items)} 个风险项")
 
+        except JobCancelled:
+            logger.info(f"任务已取消: {task_id}")
+            self.update_task(task_id, status='cancelled', current_step='任务已取消')
+            raise
         except Exception as e:
             logger.error(f"任务执行失败: {task_id}, 错误: {e}")
             self.update_task(
@@ -237,6 +256,7 @@ class RiskTaskManager:
                 status='failed',
                 error_message=str(e)
             )
+            raise
 
     def _save_v5_result(self, task_id: str, result: RiskAnalysisResult):
         """保存 V5 分析结果"""
@@ -270,39 +290,90 @@ class RiskTaskManager:
             task_id
         ))
 
+    def _migrate_legacy_risk_items(self):
+        """把旧版 risk_items 列中的 JSON 迁移到子表（迁移后清空该列，之后只是一次空查询）"""
+        with self.db.get_connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            cursor = conn.execute("""
+                INSERT OR IGNORE INTO risk_items (task_id, seq, item)
+                SELECT t.task_id, CAST(j.key AS INTEGER) + 1, j.value
+                FROM risk_analysis_tasks t, json_each(t.risk_items) j
+                WHERE t.risk_items IS NOT NULL AND t.risk_items != '' AND json_valid(t.risk_items)
+            """)
+            migrated = cursor.rowcount
+            conn.execute("""
+                UPDATE risk_analysis_tasks SET
+                    risk_item_count = (SELECT COUNT(*) FROM risk_items r WHERE r.task_id = risk_analysis_tasks.task_id),
+                    risk_items = NULL
+                WHERE risk_items IS NOT NULL
+            """)
+            conn.commit()
+        if migrated > 0:
+            logger.info(f"已迁移 {migrated} 个旧版风险项到 risk_items 表")
+
     def append_risk_items(self, task_id: str, new_items: List[RiskItem]):
-        """增量追加风险项到数据库"""
+        """增量追加风险项（一次回调的风险项在同一事务中批量写入）"""
         if not new_items:
             return
 
         try:
-            # 获取现有的 risk_items
-            task = self.get_task(task_id)
-            if not task:
-                return
+            with self.db.get_connection() as conn:
+                conn.execute("BEGIN IMMEDIATE")
+                row = conn.execute(
+                    "SELECT risk_item_count FROM risk_analysis_tasks WHERE task_id = ?", (task_id,)
+                ).fetchone()
+                if row is None:
+                    conn.rollback()
+                    return
+
+                start = row['risk_item_count'] or 0
+                conn.executemany(
+                    "INSERT INTO risk_items (task_id, seq, item) VALUES (?, ?, ?)",
+                    [(task_id, start + i, json.dumps(item.to_dict(), ensure_ascii=False))
+                     for i, item in enumerate(new_items, 1)]
+                )
+                conn.execute(
+                    "UPDATE risk_analysis_tasks SET risk_item_count = ? WHERE task_id = ?",
+                    (start + len(new_items), task_id)
+                )
+                conn.commit()
 
-            existing_items = []
-            if task.get('risk_items'):
-                try:
-                    existing_items = json.loads(task['risk_items'])
-                except json.JSONDecodeError:
-                    existing_items = []
+            logger.debug(f"任务 {task_id} 追加 {len(new_items)} 个风险项，当前共 {start + len(new_items)} 个")
 
-            # 追加新项
-            for item in new_items:
-                existing_items.append(item.to_dict())
+        except Exception as e:
+            logger.error(f"追加风险项失败: {e}")
 
-            # 更新数据库
-            risk_items_json = json.dumps(existing_items, ensure_ascii=False)
-            self.db.execute_query(
-                "UPDATE risk_analysis_tasks SET risk_items = ? WHERE task_id = ?",
-                (risk_items_json, task_id)
+    def _replace_risk_items(self, task_id: str, items: List[Dict]):
+        """整体替换任务的风险项"""
+        with self.db.get_connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM risk_items WHERE task_id = ?", (task_id,))
+            conn.executemany(
+                "INSERT INTO risk_items (task_id, seq, item) VALUES (?, ?, ?)",
+                [(task_id, seq, json.dumps(item, ensure_ascii=False)) for seq, item in enumerate(items, 1)]
+            )
+            conn.execute(
+                "UPDATE risk_analysis_tasks SET risk_item_count = ? WHERE task_id = ?",
+                (len(items), task_id)
             )
+            conn.commit()
 
-            logger.debug(f"任务 {task_id} 追加 {len(new_items)} 个风险项，当前共 {len(existing_items)} 个")
+    def get_risk_items(self, task_id: str, since_seq: int = 0) -> List[Dict]:
+        """
+        读取风险项
 
-        except Exception as e:
-            logger.error(f"追加风险项失败: {e}")
+        Args:
+            task_id: 任务ID
+            since_seq: 只返回序号大于该值的风险项（轮询时传上次返回的最大 seq）
+
+        Returns:
+            风险项列表，每项附带 seq（从 1 开始）
+        """
+        rows = self.db.execute_query(
+            "SELECT seq, item FROM risk_items WHERE task_id = ? AND seq > ? ORDER BY seq",
+            (task_id, since_seq)
+        )
+        return [{**json.loads(row['item']), 'seq': row['seq']} for row in rows or []]
 
     def _save_final_result(self, task_id: str, result: RiskAnalysisResult):
         """保存最终分析结果（summary、score等，不覆盖已有的 risk_items）"""
@@ -332,17 +403,13 @@ class RiskTaskManager:
 
     def _save_result(self, task_id: str, result: RiskAnalysisResult):
         """保存分析结果到数据库"""
-        risk_items_json = json.dumps(
-            [item.to_dict() for item in result.risk_items],
-            ensure_ascii=False
-        )
+        self._replace_risk_items(task_id, [item.to_dict() for item in result.risk_items])
 
         update_sql = """
         UPDATE risk_analysis_tasks SET
             status = 'completed',
             progress = 100,
             current_step = '分析完成',
-            risk_items = ?,
             summary = ?,
             risk_score = ?,
             chunk_count = ?,
@@ -353,7 +420,6 @@ class RiskTaskManager:
         """
 
         self.db.execute_query(update_sql, (
-            risk_items_json,
             result.summary,
             result.risk_score,
             result.total_chunks,
@@ -381,15 +447,7 @@ class RiskTaskManager:
         if not task:
             return None
 
-        # 解析 risk_items JSON
-        if task.get('risk_items'):
-            try:
-                task['risk_items'] = json.loads(task['risk_items'])
-            except json.JSONDecodeError:
-                task['risk_items'] = []
-        else:
-            task['risk_items'] = []
-
+        task['risk_items'] = self.get_risk_items(task_id)
         return task
 
     def update_task(self, task_id: str, **kwargs):
@@ -495,6 +553,7 @@ class RiskTaskManager:
 
         delete_sql = "DELETE FROM risk_analysis_tasks WHERE task_id = ?"
         try:
+            self.db.execute_query("DELETE FROM risk_items WHERE task_id = ?", (task_id,))
             self.db.execute_query(delete_sql, (task_id,))
             logger.info(f"删除任务成功: {task_id}")
             return True
@@ -537,19 +596,13 @@ class RiskTaskManager:
             reconcile_step='准备开始对账...'
         )
 
-        # 启动后台线程
-        thread = threading.Thread(
-            target=self._run_reconcile,
-            args=(task_id,),
-            daemon=True
-        )
-        thread.start()
+        job_id = enqueue_job('risk_reconcile', {'task_id': task_id}, job_key=f"risk_reconcile:{task_id}")
 
-        logger.info(f"对账任务已启动: {task_id}")
+        logger.info(f"对账任务已启动: {task_id}, 后台任务: {job_id}")
         return True
 
-    def _run_reconcile(self, task_id: str):
-        """在后台线程中运行对账"""
+    def _run_reconcile(self, task_id: str, job: Optional[JobContext] = None):
+        """在后台工作进程中运行对账"""
         try:
             task = self.get_task(task_id)
             if not task:
@@ -559,12 +612,7 @@ class RiskTaskManager:
             model_name = task.get('model_name', 'deepseek-v3')
 
             # 获取已分析的风险项
-            risk_items_data = []
-            if task.get('risk_items'):
-                try:
-                    risk_items_data = json.loads(task['risk_items'])
-                except json.JSONDecodeError:
-                    risk_items_data = []
+            risk_items_data = self.get_risk_items(task_id)
 
             if not risk_items_data:
                 logger.warning(f"没有风险项需要对账: {task_id}")
@@ -576,11 +624,13 @@ class RiskTaskManager:
                 )
                 return
 
-            # 转换为 RiskItem 对象
-            risk_items = [RiskItem(**item) for item in risk_items_data]
+            # 转换为 RiskItem 对象（对账结果按列表下标对应，下标 i 即 seq i+1）
+            risk_items = [RiskItem.from_dict(item) for item in risk_items_data]
 
             # 定义进度回调
             def progress_callback(progress: int, message: str):
+                if job:
+                    job.report(progress, message)
                 self.update_task(
                     task_id,
                     reconcile_progress=progress,
@@ -600,6 +650,10 @@ class RiskTaskManager:
 
             logger.info(f"对账完成: {task_id}, 共 {len(reconcile_results)} 项")
 
+        except JobCancelled:
+            logger.info(f"对账已取消: {task_id}")
+            self.update_task(task_id, status='reconcile_failed', reconcile_step='对账已取消')
+            raise
         except Exception as e:
             logger.error(f"对账执行失败: {task_id}, 错误: {e}")
             self.update_task(
@@ -607,27 +661,29 @@ class RiskTaskManager:
                 status='reconcile_failed',
                 reconcile_step=f"对账失败: {str(e)}"
             )
+            raise
 
     def _save_reconcile_results(self,
                                  task_id: str,
                                  risk_items: List[RiskItem],
                                  reconcile_results: List[ReconcileResult]):
-        """保存对账结果"""
+        """保存对账结果（只更新有对账结果的风险项）"""
+        results_by_index = {}
+        for result in reconcile_results:
+            results_by_index.setdefault(result.risk_item_id, result)
+
         # 更新风险项的合规状态
-        updated_items = []
-        for item in risk_items:
+        updated_rows = []
+        for index, item in enumerate(risk_items):
+            result = results_by_index.get(index)
+            if result is None:
+                continue
             item_dict = item.to_dict()
-
-            # 查找对应的对账结果
-            for result in reconcile_results:
-                if result.risk_item_id == risk_items.index(item):
-                    item_dict['compliance_status'] = result.compliance_status
-                    item_dict['compliance_note'] = result.overall_assessment
-                    item_dict['match_score'] = result.match_score
-                    item_dict['response_text'] = result.response_content[:500]
-                    break
-
-            updated_items.append(item_dict)
+            item_dict['compliance_status'] = result.compliance_status
+            item_dict['compliance_note'] = result.overall_assessment
+            item_dict['match_score'] = result.match_score
+            item_dict['response_text'] = result.response_content[:500]
+            updated_rows.append((json.dumps(item_dict, ensure_ascii=False), task_id, index + 1))
 
         # 对账结果序列化
         reconcile_results_json = json.dumps(
@@ -641,27 +697,31 @@ class RiskTaskManager:
             status = 'reconcile_completed',
             reconcile_progress = 100,
             reconcile_step = '对账完成',
-            risk_items = ?,
             reconcile_results = ?
         WHERE task_id = ?
         """
 
-        risk_items_json = json.dumps(updated_items, ensure_ascii=False)
+        with self.db.get_connection() as conn:
+            conn.executemany("UPDATE risk_items SET item = ? WHERE task_id = ? AND seq = ?", updated_rows)
+            conn.execute(update_sql, (reconcile_results_json, task_id))
+            conn.commit()
 
-        self.db.execute_query(update_sql, (
-            risk_items_json,
-            reconcile_results_json,
-            task_id
-        ))
 
+def get_task_manager() -> RiskTaskManager:
+    """获取任务管理器单例"""
+    return get_instance(RiskTaskManager)
 
-# 全局单例
-_task_manager: Optional[RiskTaskManager] = None
 
+def ensure_schema():
+    """应用启动时建表（见 common.registry.bootstrap_schemas）"""
+    get_task_manager()
 
-def get_task_manager() -> RiskTaskManager:
-    """获取任务管理器单例"""
-    global _task_manager
-    if _task_manager is None:
-        _task_manager = RiskTaskManager()
-    return _task_manager
+
+def run_analysis_job(job: JobContext):
+    """后台任务：风险分析"""
+    get_task_manager()._run_analysis(job.payload['task_id'], job)
+
+
+def run_reconcile_job(job: JobContext):
+    """后台任务：对账"""
+    get_task_manager()._run_reconcile(job.payload['task_id'], job)
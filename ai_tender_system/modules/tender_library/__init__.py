@@ -10,9 +10,10 @@
 """
 
 from .document_manager import TenderDocumentManager
-from .excerpt_manager import ExcerptManager
+from .excerpt_manager import ExcerptManager, get_excerpt_manager
 
 __all__ = [
     'TenderDocumentManager',
-    'ExcerptManager'
+    'ExcerptManager',
+    'get_excerpt_manager'
 ]
@@ -14,6 +14,14 @@ from typing import Dict, List, Any, Optional
 from datetime import datetime
 from pathlib import Path
 
+from ai_tender_system.common import like_contains
+from ai_tender_system.common.db_pool import get_pooled_connection
+from ai_tender_system.common.fts_search import fts_ready, split_match_terms, build_match_query
+from ai_tender_system.common.registry import get_instance
+
+# 批量关键词搜索时每条 SQL 包含的关键词数
+KEYWORD_BATCH_SIZE = 200
+
 
 class ExcerptManager:
     """标书片段管理器"""
@@ -32,9 +40,7 @@ class ExcerptManager:
 
     def _get_connection(self) -> sqlite3.Connection:
         """获取数据库连接"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        return conn
+        return get_pooled_connection(self.db_path, row_factory=sqlite3.Row)
 
     # =========================================================================
     # 片段 CRUD
@@ -439,6 +445,8 @@ class ExcerptManager:
         """
         按关键词搜索片段
 
+        关键词不少于3个字符且全文索引可用时走 FTS5（同分按 bm25 相关度），否则使用 LIKE。
+
         Args:
             company_id: 企业ID
             keyword: 搜索关键词
@@ -450,6 +458,10 @@ class ExcerptManager:
         """
         conn = self._get_connection()
         try:
+            indexable, _ = split_match_terms([keyword])
+            if indexable and fts_ready(conn, 'tender_excerpts_fts'):
+                return self._search_keyword_fts(conn, company_id, keyword, won_only, limit)
+
             sql = """
                 SELECT e.*, d.doc_name, d.bid_result, d.technical_score
                 FROM tender_excerpts e
@@ -467,20 +479,143 @@ class ExcerptManager:
             params.append(limit)
 
             cursor = conn.execute(sql, params)
-            results = []
-            for row in cursor.fetchall():
-                result = dict(row)
-                if 'vector_embedding' in result:
-                    del result['vector_embedding']
-                if result.get('keywords'):
-                    result['keywords'] = json.loads(result['keywords'])
-                if result.get('scoring_points'):
-                    result['scoring_points'] = json.loads(result['scoring_points'])
-                results.append(result)
-            return results
+            return [self._row_to_excerpt(dict(row)) for row in cursor.fetchall()]
         finally:
             conn.close()
 
+    def _search_keyword_fts(
+        self,
+        conn: sqlite3.Connection,
+        company_id: int,
+        keyword: str,
+        won_only: bool,
+        limit: int
+    ) -> List[Dict[str, Any]]:
+        """通过 FTS5 全文索引搜索单个关键词（长度≥3）"""
+        sql = """
+            SELECT e.*, d.doc_name, d.bid_result, d.technical_score
+            FROM tender_excerpts_fts f
+            JOIN tender_excerpts e ON e.excerpt_id = f.rowid
+            JOIN tender_documents d ON e.tender_doc_id = d.tender_doc_id
+            WHERE tender_excerpts_fts MATCH ?
+              AND e.company_id = ?
+        """
+        params = [build_match_query([keyword]), company_id]
+
+        if won_only:
+            sql += " AND d.bid_result = 'won'"
+
+        sql += " ORDER BY e.quality_score DESC, d.technical_score DESC, bm25(tender_excerpts_fts) LIMIT ?"
+        params.append(limit)
+
+        cursor = conn.execute(sql, params)
+        return [self._row_to_excerpt(dict(row)) for row in cursor.fetchall()]
+
+    def search_by_keywords(
+        self,
+        company_id: int,
+        keywords: List[str],
+        won_only: bool = True,
+        limit: int = 10
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        批量按关键词搜索片段
+
+        可走全文索引的关键词逐个执行 FTS5 查询（共用一个连接）；
+        其余关键词合并为一次 LIKE 查询（候选行只扫描一遍），再在内存中按关键词分组。
+
+        Args:
+            company_id: 企业ID
+            keywords: 关键词列表（自动去重）
+            won_only: 只返回中标标书的片段
+            limit: 每个关键词返回数量
+
+        Returns:
+            {关键词: 片段列表}
+        """
+        keywords = list(dict.fromkeys(k for k in keywords if k))
+        if not keywords:
+            return {}
+
+        conn = self._get_connection()
+        try:
+            results: Dict[str, List[Dict[str, Any]]] = {}
+            like_keywords = keywords
+            if fts_ready(conn, 'tender_excerpts_fts'):
+                indexable, like_keywords = split_match_terms(keywords)
+                for keyword in indexable:
+                    results[keyword] = self._search_keyword_fts(conn, company_id, keyword, won_only, limit)
+
+            if like_keywords:
+                results.update(self._search_keywords_like(conn, company_id, like_keywords, won_only, limit))
+            return {keyword: results[keyword] for keyword in keywords}
+        finally:
+            conn.close()
+
+    def _search_keywords_like(
+        self,
+        conn: sqlite3.Connection,
+        company_id: int,
+        keywords: List[str],
+        won_only: bool,
+        limit: int
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """多个关键词合并为一次 LIKE 查询，再在内存中按关键词分组"""
+        candidates: Dict[int, Dict[str, Any]] = {}
+        # 每个关键词3个参数，分批避免超过 SQLite 变量上限
+        for start in range(0, len(keywords), KEYWORD_BATCH_SIZE):
+            batch = keywords[start:start + KEYWORD_BATCH_SIZE]
+            conditions = " OR ".join(
+                "e.chapter_title LIKE ? OR e.content LIKE ? OR e.keywords LIKE ?" for _ in batch
+            )
+            sql = f"""
+                SELECT e.*, d.doc_name, d.bid_result, d.technical_score
+                FROM tender_excerpts e
+                JOIN tender_documents d ON e.tender_doc_id = d.tender_doc_id
+                WHERE e.company_id = ?
+                  AND ({conditions})
+            """
+            params = [company_id]
+            for keyword in batch:
+                like_pattern = f'%{keyword}%'
+                params.extend([like_pattern, like_pattern, like_pattern])
+
+            if won_only:
+                sql += " AND d.bid_result = 'won'"
+
+            for row in conn.execute(sql, params).fetchall():
+                candidates[row['excerpt_id']] = dict(row)
+
+        ranked = sorted(
+            candidates.values(),
+            key=lambda r: (-(r.get('quality_score') or 0), -(r.get('technical_score') or 0), r['excerpt_id'])
+        )
+
+        results: Dict[str, List[Dict[str, Any]]] = {}
+        for keyword in keywords:
+            matched = []
+            for row in ranked:
+                if (like_contains(row.get('chapter_title'), keyword)
+                        or like_contains(row.get('content'), keyword)
+                        or like_contains(row.get('keywords'), keyword)):
+                    matched.append(self._row_to_excerpt(row))
+                    if len(matched) >= limit:
+                        break
+            results[keyword] = matched
+        return results
+
+    @staticmethod
+    def _row_to_excerpt(row: Dict[str, Any]) -> Dict[str, Any]:
+        """去掉向量字段并解析JSON字段（返回新字典）"""
+        result = dict(row)
+        if 'vector_embedding' in result:
+            del result['vector_embedding']
+        if result.get('keywords'):
+            result['keywords'] = json.loads(result['keywords'])
+        if result.get('scoring_points'):
+            result['scoring_points'] = json.loads(result['scoring_points'])
+        return result
+
     # =========================================================================
     # 使用统计
     # =========================================================================
@@ -583,3 +718,8 @@ class ExcerptManager:
             return [dict(row) for row in cursor.fetchall()]
         finally:
             conn.close()
+
+
+def get_excerpt_manager(db_path: str = None) -> ExcerptManager:
+    """获取片段管理器单例（按数据库路径缓存）"""
+    return get_instance(ExcerptManager, db_path)
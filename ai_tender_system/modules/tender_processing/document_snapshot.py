@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文档快照缓存 - 避免HITL接口反复解析同一个 .docx
+功能：
+- 按文件内容SHA-256生成文档快照（段落文本、样式、大纲级别、表格位置、body元素顺序）
+- 快照以gzip压缩JSON形式落盘，首次访问时才加载（懒加载）
+- 进程内LRU缓存 + 磁盘目录按总大小淘汰
+- 章节内容/导出请求直接按段落范围读取，无需重新打开docx压缩包
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import List, Optional, Tuple, Dict, Union
+
+from docx import Document
+
+from common import get_module_logger, get_config
+from common.constants import BYTES_PER_MB
+from common.paragraph_index import get_paragraph_index
+
+logger = get_module_logger("document_snapshot")
+
+# 快照格式版本（结构变化时递增，旧快照自动失效）
+SNAPSHOT_VERSION = 1
+
+
+@dataclass
+class DocumentSnapshot:
+    """文档快照数据类（仅包含body顶层段落，与 doc.paragraphs 索引一致）"""
+    sha256: str
+    paragraphs: List[str]                 # 段落原始文本
+    styles: List[str]                     # 段落样式名
+    outline_levels: List[Optional[int]]   # 大纲级别（0-8为标题，None为正文/未设置）
+    para_body_idx: List[int]              # 段落i在body子元素中的位置
+    table_body_idx: List[int]             # 表格j在body子元素中的位置
+    body_element_count: int = 0           # body子元素总数（含sectPr）
+    version: int = SNAPSHOT_VERSION
+    _approx_size: int = field(default=0, repr=False, compare=False)
+
+    @classmethod
+    def from_document(cls, doc: Document, sha256: str = "") -> 'DocumentSnapshot':
+        """
+        从python-docx Document构建快照（复用共享段落索引，单次遍历body）
+
+        Args:
+            doc: python-docx Document 对象
+            sha256: 文件内容哈希
+
+        Returns:
+            DocumentSnapshot
+        """
+        index = get_paragraph_index(doc)
+        snapshot = cls(
+            sha256=sha256,
+            paragraphs=list(index.texts),
+            styles=list(index.style_names),
+            outline_levels=list(index.outline_levels),
+            para_body_idx=list(index.body_positions),
+            table_body_idx=list(index.table_body_positions),
+            body_element_count=len(index.body_elements)
+        )
+        snapshot._approx_size = snapshot._estimate_size()
+        return snapshot
+
+    @property
+    def paragraph_count(self) -> int:
+        return len(self.paragraphs)
+
+    def get_paragraph_texts(self, start_idx: int, end_idx: Optional[int] = None,
+                            strip: bool = False, skip_empty: bool = False) -> List[str]:
+        """
+        读取段落范围 [start_idx, end_idx] 的文本（闭区间，与章节 para_end_idx 语义一致）
+
+        Args:
+            start_idx: 起始段落索引
+            end_idx: 结束段落索引（None表示到文档末尾）
+            strip: 是否去除首尾空白
+            skip_empty: 是否跳过空段落
+        """
+        if end_idx is None:
+            end_idx = self.paragraph_count - 1
+        start_idx = max(0, start_idx)
+        texts = self.paragraphs[start_idx:end_idx + 1]
+        if strip:
+            texts = [t.strip() for t in texts]
+        if skip_empty:
+            texts = [t for t in texts if t.strip()]
+        return texts
+
+    def body_range_for_paragraphs(self, para_start: int, para_end: Optional[int]) -> Optional[Tuple[int, int]]:
+        """
+        将段落索引范围转换为body子元素范围（包含范围内的表格）
+
+        Returns:
+            (start_body_idx, end_body_idx) 闭区间；段落索引越界时返回None
+        """
+        if para_end is None:
+            para_end = self.paragraph_count - 1
+        if para_start < 0 or para_start >= self.paragraph_count or para_end < para_start:
+            return None
+        para_end = min(para_end, self.paragraph_count - 1)
+        return self.para_body_idx[para_start], self.para_body_idx[para_end]
+
+    def has_table_between(self, para_start: int, para_end: Optional[int]) -> bool:
+        """判断段落范围内是否包含表格"""
+        body_range = self.body_range_for_paragraphs(para_start, para_end)
+        if not body_range:
+            return False
+        start_body, end_body = body_range
+        return any(start_body < t < end_body for t in self.table_body_idx)
+
+    def to_dict(self) -> Dict:
+        data = asdict(self)
+        data.pop('_approx_size', None)
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'DocumentSnapshot':
+        data = dict(data)
+        data.pop('_approx_size', None)
+        snapshot = cls(**data)
+        snapshot._approx_size = snapshot._estimate_size()
+        return snapshot
+
+    def _estimate_size(self) -> int:
+        """估算内存占用（字节），用于LRU按大小淘汰"""
+        text_bytes = sum(len(t) for t in self.paragraphs) * 2
+        style_bytes = sum(len(s) for s in self.styles)
+        return text_bytes + style_bytes + self.paragraph_count * 48 + len(self.table_body_idx) * 8
+
+
+class DocumentSnapshotCache:
+    """
+    文档快照缓存
+
+    两级结构：
+    - 进程内LRU（按快照估算大小淘汰）
+    - 磁盘目录 {sha256}.json.gz（按目录总大小淘汰最久未访问的文件）
+    """
+
+    def __init__(self, cache_dir: Optional[Union[str, Path]] = None,
+                 max_memory_bytes: Optional[int] = None,
+                 max_disk_bytes: Optional[int] = None):
+        """
+        初始化快照缓存
+
+        Args:
+            cache_dir: 磁盘缓存目录（默认 data/cache/doc_snapshots）
+            max_memory_bytes: 进程内缓存上限（默认由 DOC_SNAPSHOT_MEMORY_MB 控制，64MB）
+            max_disk_bytes: 磁盘缓存上限（默认由 DOC_SNAPSHOT_DISK_MB 控制，512MB）
+        """
+        if cache_dir is None:
+            cache_dir = os.getenv('DOC_SNAPSHOT_CACHE_DIR') or \
+                get_config().get_path('data') / 'cache' / 'doc_snapshots'
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        self.max_memory_bytes = max_memory_bytes if max_memory_bytes is not None else \
+            int(float(os.getenv('DOC_SNAPSHOT_MEMORY_MB', '64')) * BYTES_PER_MB)
+        self.max_disk_bytes = max_disk_bytes if max_disk_bytes is not None else \
+            int(float(os.getenv('DOC_SNAPSHOT_DISK_MB', '512')) * BYTES_PER_MB)
+
+        self._lock = threading.Lock()
+        self._memory: 'OrderedDict[str, DocumentSnapshot]' = OrderedDict()
+        self._memory_bytes = 0
+        # (路径, 修改时间, 文件大小) → sha256，避免每次点击都重新计算哈希
+        self._hash_memo: Dict[Tuple[str, int, int], str] = {}
+
+        # 统计信息
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    # ----------------------------------------------------------------
+    # 公共接口
+    # ----------------------------------------------------------------
+
+    def get(self, doc_path: Union[str, Path], sha256: Optional[str] = None) -> DocumentSnapshot:
+        """
+        获取文档快照（内存 → 磁盘 → 解析docx）
+
+        Args:
+            doc_path: .docx 文件路径
+            sha256: 已知的文件内容哈希（可选，省去重新计算）
+
+        Returns:
+            DocumentSnapshot
+        """
+        doc_path = Path(doc_path)
+        if sha256 is None:
+            sha256 = self.compute_sha256(doc_path)
+
+        with self._lock:
+            snapshot = self._memory.get(sha256)
+            if snapshot is not None:
+                self._memory.move_to_end(sha256)
+                self.memory_hits += 1
+                return snapshot
+
+        snapshot = self._load_from_disk(sha256)
+        if snapshot is not None:
+            with self._lock:
+                self.disk_hits += 1
+            self._put_memory(snapshot)
+            return snapshot
+
+        logger.info(f"文档快照未命中，解析文档: {doc_path.name} ({sha256[:12]})")
+        snapshot = DocumentSnapshot.from_document(Document(str(doc_path)), sha256)
+        with self._lock:
+            self.misses += 1
+        self._save_to_disk(snapshot)
+        self._put_memory(snapshot)
+        return snapshot
+
+    def compute_sha256(self, doc_path: Union[str, Path]) -> str:
+        """计算文件SHA-256（按路径+mtime+大小记忆化）"""
+        doc_path = Path(doc_path)
+        stat = doc_path.stat()
+        memo_key = (str(doc_path.resolve()), stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            cached = self._hash_memo.get(memo_key)
+        if cached:
+            return cached
+
+        hasher = hashlib.sha256()
+        with open(doc_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(BYTES_PER_MB), b""):
+                hasher.update(chunk)
+        digest = hasher.hexdigest()
+
+        with self._lock:
+            if len(self._hash_memo) > 4096:
+                self._hash_memo.clear()
+            self._hash_memo[memo_key] = digest
+        return digest
+
+    def invalidate(self, sha256: str):
+        """移除指定快照（内存和磁盘）"""
+        with self._lock:
+            snapshot = self._memory.pop(sha256, None)
+            if snapshot is not None:
+                self._memory_bytes -= snapshot._approx_size
+        try:
+            self._snapshot_path(sha256).unlink()
+        except FileNotFoundError:
+            pass
+
+    def clear_memory(self):
+        """清空进程内缓存（磁盘快照保留）"""
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+
+    def get_stats(self) -> Dict:
+        """获取缓存统计"""
+        with self._lock:
+            return {
+                'memory_items': len(self._memory),
+                'memory_bytes': self._memory_bytes,
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses
+            }
+
+    # ----------------------------------------------------------------
+    # 内部实现
+    # ----------------------------------------------------------------
+
+    def _snapshot_path(self, sha256: str) -> Path:
+        return self.cache_dir / f"{sha256}.json.gz"
+
+    def _put_memory(self, snapshot: DocumentSnapshot):
+        with self._lock:
+            existing = self._memory.pop(snapshot.sha256, None)
+            if existing is not None:
+                self._memory_bytes -= existing._approx_size
+            self._memory[snapshot.sha256] = snapshot
+            self._memory_bytes += snapshot._approx_size
+
+            # 超出上限时淘汰最久未使用的快照（至少保留当前快照）
+            while self._memory_bytes > self.max_memory_bytes and len(self._memory) > 1:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_bytes -= evicted._approx_size
+
+    def _load_from_disk(self, sha256: str) -> Optional[DocumentSnapshot]:
+        path = self._snapshot_path(sha256)
+        if not path.exists():
+            return None
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') != SNAPSHOT_VERSION:
+                return None
+            os.utime(path, None)  # 更新访问时间，供磁盘淘汰使用
+            return DocumentSnapshot.from_dict(data)
+        except Exception as e:
+            logger.warning(f"读取文档快照失败，将重新解析: {path.name}, {e}")
+            return None
+
+    def _save_to_disk(self, snapshot: DocumentSnapshot):
+        path = self._snapshot_path(snapshot.sha256)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            with gzip.open(tmp_path, 'wt', encoding='utf-8', compresslevel=5) as f:
+                json.dump(snapshot.to_dict(), f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(tmp_path, path)
+            self._evict_disk()
+        except Exception as e:
+            logger.warning(f"写入文档快照失败（不影响主流程）: {e}")
+            try:
+                tmp_path.unlink()
+            except FileNotFoundError:
+                pass
+
+    def _evict_disk(self):
+        """磁盘缓存超出上限时，按修改时间淘汰最旧的快照"""
+        files = []
+        total = 0
+        for p in self.cache_dir.glob('*.json.gz'):
+            try:
+                stat = p.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, p))
+            total += stat.st_size
+
+        if total <= self.max_disk_bytes:
+            return
+
+        files.sort()
+        for _, size, p in files[:-1]:
+            try:
+                p.unlink()
+                total -= size
+            except FileNotFoundError:
+                pass
+            if total <= self.max_disk_bytes:
+                break
+
+
+_snapshot_cache: Optional[DocumentSnapshotCache] = None
+_snapshot_cache_lock = threading.Lock()
+
+
+def get_document_snapshot_cache() -> DocumentSnapshotCache:
+    """获取进程级文档快照缓存（单例）"""
+    global _snapshot_cache
+    if _snapshot_cache is None:
+        with _snapshot_cache_lock:
+            if _snapshot_cache is None:
+                _snapshot_cache = DocumentSnapshotCache()
+    return _snapshot_cache
+
+
+def get_document_snapshot(doc_path: Union[str, Path], sha256: Optional[str] = None) -> DocumentSnapshot:
+    """便捷函数：获取文档快照"""
+    return get_document_snapshot_cache().get(doc_path, sha256)
@@ -16,9 +16,13 @@ from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
 
 from common import get_module_logger, get_config
+from common.llm_client import LLMClient
 
 logger = get_module_logger("tender_filter")
 
+# 响应缓存的用途名（LLM_CACHE_PURPOSES）
+CACHE_PURPOSE = "标书分块筛选"
+
 
 @dataclass
 class FilterResult:
@@ -27,13 +31,15 @@ class FilterResult:
     is_valuable: bool
     confidence: float
     reason: str = ""
+    error: str = ""  # 筛选出错时的错误信息（此时结果为保守保留）
 
     def to_dict(self) -> Dict:
         return {
             'chunk_id': self.chunk_id,
             'is_valuable': self.is_valuable,
             'confidence': self.confidence,
-            'reason': self.reason
+            'reason': self.reason,
+            'error': self.error
         }
 
 
@@ -55,6 +61,9 @@ class TenderFilter:
         # 获取模型配置
         self.model_config = self.config.get_model_config(model_name)
 
+        # LLM 客户端（响应缓存、共享限流、调用指标），各线程共用
+        self.client = LLMClient(model_name)
+
         # 统计信息
         self.total_processed = 0
         self.total_valuable = 0
@@ -102,7 +111,7 @@ class TenderFilter:
 
     def call_ai_api(self, prompt: str) -> Tuple[str, float]:
         """
-        调用AI API进行筛选
+        调用AI API进行筛选（经 LLMClient：响应缓存、共享限流与调用指标），失败时返回空响应
 
         Args:
             prompt: 提示词
@@ -112,80 +121,29 @@ class TenderFilter:
             cost: API调用成本
         """
         try:
-            # 构建请求
-            if 'yuanjing' in self.model_name:
-                # 联通元景系列模型
-                headers = {
-                    'Authorization': f"Bearer {self.model_config['access_token']}",
-                    'Content-Type': 'application/json'
-                }
-
-                payload = {
-                    'model': self.model_config['model_name'],
-                    'messages': [
-                        {
-                            'role': 'user',
-                            'content': prompt
-                        }
-                    ],
-                    'max_tokens': 100,  # 筛选只需要简短回答
-                    'temperature': 0.3  # 降低随机性
-                }
-
-                url = f"{self.model_config['base_url']}/chat/completions"
-
-            else:
-                # OpenAI系列模型
-                headers = {
-                    'Authorization': f"Bearer {self.model_config.get('api_key', '')}",
-                    'Content-Type': 'application/json'
-                }
-
-                payload = {
-                    'model': self.model_config.get('model_name', self.model_name),
-                    'messages': [
-                        {
-                            'role': 'user',
-                            'content': prompt
-                        }
-                    ],
-                    'max_tokens': 100,
-                    'temperature': 0.3
-                }
-
-                url = self.model_config.get('api_endpoint', 'https://api.oaipro.com/v1/chat/completions')
-
-            # 发送请求
-            import requests
-            response = requests.post(
-                url,
-                headers=headers,
-                json=payload,
-                timeout=self.model_config.get('timeout', 30)
+            content, usage = self.client.call_with_usage(
+                prompt,
+                temperature=0.3,  # 降低随机性
+                max_tokens=100,  # 筛选只需要简短回答
+                max_retries=1,
+                purpose=CACHE_PURPOSE
             )
+        except Exception as e:
+            logger.error(f"AI API调用失败: {e}")
+            return "", 0.0
 
-            response.raise_for_status()
-            result = response.json()
-
-            # 解析响应
-            content = result['choices'][0]['message']['content'].strip()
-
-            # 计算成本（简化估算）
-            # GPT-4o-mini约为 $0.00015/1K input tokens, $0.0006/1K output tokens
-            usage = result.get('usage', {})
-            input_tokens = usage.get('prompt_tokens', 0)
-            output_tokens = usage.get('completion_tokens', 0)
+        content = (content or '').strip()
+        if usage['cached']:
+            return content, 0.0
 
-            cost = (input_tokens * 0.00015 + output_tokens * 0.0006) / 1000
+        # 计算成本（简化估算）
+        # GPT-4o-mini约为 $0.00015/1K input tokens, $0.0006/1K output tokens
+        cost = (usage['prompt_tokens'] * 0.00015 + usage['completion_tokens'] * 0.0006) / 1000
 
-            self.total_api_calls += 1
-            self.total_cost += cost
+        self.total_api_calls += 1
+        self.total_cost += cost
 
-            return content, cost
-
-        except Exception as e:
-            logger.error(f"AI API调用失败: {e}")
-            return "", 0.0
+        return content, cost
 
     def parse_filter_response(self, response: str) -> Tuple[bool, float, str]:
         """
@@ -243,7 +201,8 @@ class TenderFilter:
         Returns:
             result: 筛选结果
         """
-        chunk_id = chunk.get('chunk_id', 0)
+        # 流水线传入的分块只有 chunk_index（DocumentChunk.to_dict）
+        chunk_id = chunk.get('chunk_id', chunk.get('chunk_index', 0))
         chunk_content = chunk.get('content', '')
         chunk_type = chunk.get('chunk_type', 'paragraph')
         metadata = chunk.get('metadata', {})
@@ -283,13 +242,16 @@ class TenderFilter:
         )
 
     def filter_chunks_parallel(self, chunks: List[Dict],
-                               progress_callback: Optional[callable] = None) -> List[FilterResult]:
+                               progress_callback: Optional[callable] = None,
+                               result_callback: Optional[callable] = None) -> List[FilterResult]:
         """
         并行批量筛选分块
 
         Args:
             chunks: 分块列表
             progress_callback: 进度回调函数 callback(processed, total)
+            result_callback: 单个分块筛选完成后回调 callback(chunk, result)，
+                在调用线程中按完成顺序执行；出错时回调保守保留的结果（result.error 非空）
 
         Returns:
             results: 筛选结果列表
@@ -308,25 +270,28 @@ class TenderFilter:
 
             # 收集结果
             for future in as_completed(future_to_chunk):
+                chunk = future_to_chunk[future]
                 try:
                     result = future.result()
-                    results.append(result)
-
-                    processed += 1
-                    if progress_callback:
-                        progress_callback(processed, len(chunks))
-
                 except Exception as e:
-                    chunk = future_to_chunk[future]
-                    logger.error(f"筛选分块 {chunk.get('chunk_id')} 失败: {e}")
+                    logger.error(f"筛选分块 {chunk.get('chunk_id', chunk.get('chunk_index'))} 失败: {e}")
 
-                    # 出错时保守保留
-                    results.append(FilterResult(
-                        chunk_id=chunk.get('chunk_id', 0),
+                    # 出错时保守保留，并记录错误供落库和重跑
+                    result = FilterResult(
+                        chunk_id=chunk.get('chunk_id', chunk.get('chunk_index', 0)),
                         is_valuable=True,
                         confidence=0.5,
-                        reason=f"处理出错: {str(e)}"
-                    ))
+                        reason=f"处理出错: {str(e)}",
+                        error=str(e)
+                    )
+
+                results.append(result)
+                if result_callback:
+                    result_callback(chunk, result)
+
+                processed += 1
+                if progress_callback:
+                    progress_callback(processed, len(chunks))
 
         # 按chunk_id排序
         results.sort(key=lambda x: x.chunk_id)
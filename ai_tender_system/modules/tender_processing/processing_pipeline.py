@@ -6,7 +6,7 @@
 - 整合三步流程：分块 -> 筛选 -> 提取
 - 进度追踪
 - 异步处理支持
-- 错误恢复机制
+- 错误恢复机制（结果写后落库，重跑时跳过已筛选/已提取的分块）
 """
 
 import uuid
@@ -22,7 +22,9 @@ from common.database import get_knowledge_base_db
 
 from .chunker import DocumentChunker
 from .filter import TenderFilter
-from .requirement_extractor import RequirementExtractor
+from .requirement_extractor import RequirementExtractor, TenderRequirement
+from .filter import FilterResult
+from .result_sink import ResultSink
 
 logger = get_module_logger("processing_pipeline")
 
@@ -90,6 +92,11 @@ class TenderProcessingPipeline:
         self.filter_results = []
         self.requirements = []
 
+        # chunk_index -> chunk_id（分块落库时记录，筛选/提取结果直接按此写入）
+        self.chunk_id_map: Dict[int, int] = {}
+        # chunk_index -> 数据库中已有的分块记录（重跑时用于跳过已完成的分块）
+        self.existing_chunks: Dict[int, Dict] = {}
+
         # 统计信息
         self.total_cost = 0.0
         self.total_api_calls = 0
@@ -146,76 +153,96 @@ class TenderProcessingPipeline:
             logger.warning(f"更新任务状态失败: {e}")
 
     def _save_chunks_to_db(self, chunks: List) -> bool:
-        """保存分块到数据库"""
+        """
+        保存分块到数据库并记录 chunk_index -> chunk_id 映射
+
+        同一项目重跑且分块结果与库中一致时复用已有分块，保留其筛选/提取进度。
+        """
         try:
+            db_chunks = self.db.get_tender_chunks(self.project_id)
+            if db_chunks and [(c['chunk_index'], c['content']) for c in db_chunks] == \
+                    [(chunk.chunk_index, chunk.content) for chunk in chunks]:
+                self.existing_chunks = {c['chunk_index']: c for c in db_chunks}
+                self.chunk_id_map = {c['chunk_index']: c['chunk_id'] for c in db_chunks}
+                logger.info(f"复用数据库中已有的 {len(db_chunks)} 个分块")
+                return True
+
             chunks_data = []
             for chunk in chunks:
                 chunk_dict = chunk.to_dict()
                 chunk_dict['project_id'] = self.project_id
                 chunks_data.append(chunk_dict)
 
-            success = self.db.batch_create_tender_chunks(chunks_data)
-            if success:
-                logger.info(f"成功保存 {len(chunks_data)} 个分块到数据库")
-            return success
+            self.existing_chunks = {}
+            self.chunk_id_map = self.db.insert_tender_chunks(chunks_data)
+            logger.info(f"成功保存 {len(chunks_data)} 个分块到数据库")
+            return True
         except Exception as e:
             logger.error(f"保存分块失败: {e}")
             return False
 
-    def _update_filter_results_in_db(self, filter_results: List) -> bool:
-        """更新筛选结果到数据库"""
-        try:
-            # 获取数据库中的分块（带chunk_id）
-            db_chunks = self.db.get_tender_chunks(self.project_id)
-
-            # 建立索引映射
-            chunk_id_map = {chunk['chunk_index']: chunk['chunk_id'] for chunk in db_chunks}
-
-            # 更新筛选结果
-            for result in filter_results:
-                chunk_index = result.chunk_id
-                chunk_id = chunk_id_map.get(chunk_index)
+    def _refresh_chunk_progress(self):
+        """重新读取本项目分块的筛选/提取进度（上次运行中断时已落库的结果）"""
+        if not self.chunk_id_map:
+            return
+        known_ids = set(self.chunk_id_map.values())
+        self.existing_chunks = {
+            row['chunk_index']: row
+            for row in self.db.get_tender_chunk_progress(self.project_id)
+            if row['chunk_id'] in known_ids
+        }
 
-                if chunk_id:
-                    self.db.update_chunk_filter_result(
-                        chunk_id=chunk_id,
-                        is_valuable=result.is_valuable,
-                        confidence=result.confidence,
-                        model=self.filter_model
-                    )
+    def _stored_filter_results(self, include_failed: bool = True) -> List[FilterResult]:
+        """
+        数据库中已有的筛选结果（需先 _refresh_chunk_progress）
 
-            logger.info(f"成功更新 {len(filter_results)} 个分块的筛选结果")
-            return True
-        except Exception as e:
-            logger.error(f"更新筛选结果失败: {e}")
-            return False
+        Args:
+            include_failed: 是否包含筛选出错、保守保留的结果（重跑筛选时不包含，以便重新筛选）
+        """
+        results = []
+        for chunk in self.chunks:
+            existing = self.existing_chunks.get(chunk.chunk_index)
+            if not existing or existing.get('is_valuable') is None:
+                continue
+            error = existing.get('filter_error') or ""
+            if error and not include_failed:
+                continue
+            results.append(FilterResult(
+                chunk_id=chunk.chunk_index,
+                is_valuable=bool(existing['is_valuable']),
+                confidence=existing.get('filter_confidence') or 0.0,
+                reason="已筛选",
+                error=error
+            ))
+        return results
+
+    def restore_state(self) -> bool:
+        """
+        从数据库恢复前序步骤的结果（在新进程中继续执行第2/3步时使用）
 
-    def _save_requirements_to_db(self, requirements: List) -> bool:
-        """保存提取的要求到数据库"""
-        try:
-            # 获取数据库中的分块（获取chunk_id映射）
-            db_chunks = self.db.get_tender_chunks(self.project_id, valuable_only=True)
-            chunk_id_map = {chunk['chunk_index']: chunk['chunk_id'] for chunk in db_chunks}
-
-            requirements_data = []
-            for req in requirements:
-                req_dict = req.to_dict()
-                req_dict['project_id'] = self.project_id
-
-                # 这里简化处理，实际需要追踪每个要求来自哪个chunk
-                # 可以在提取时记录chunk_id
-                req_dict['chunk_id'] = None
-
-                req_dict['extraction_model'] = self.extract_model
-                requirements_data.append(req_dict)
-
-            success = self.db.batch_create_tender_requirements(requirements_data)
-            if success:
-                logger.info(f"成功保存 {len(requirements_data)} 个要求到数据库")
-            return success
-        except Exception as e:
-            logger.error(f"保存要求失败: {e}")
+        分块是确定性的：重新分块后与库中分块一致，复用其ID和已落库的筛选结果，不更新进度。
+        """
+        self.chunks = self.chunker.chunk_document(
+            text=self.document_text,
+            metadata={'project_id': self.project_id}
+        )
+        if not self._save_chunks_to_db(self.chunks):
             return False
+        self._refresh_chunk_progress()
+        self.filter_results = self._stored_filter_results()
+        return True
+
+    def _load_extracted_requirements(self, chunk_ids: List[int]) -> List[TenderRequirement]:
+        """读取已提取分块的要求（重跑时跳过的分块）"""
+        if not chunk_ids:
+            return []
+        chunk_ids = set(chunk_ids)
+        fields = TenderRequirement.__dataclass_fields__
+        return [
+            TenderRequirement(**{k: v for k, v in row.items() if k in fields})
+            for row in self.db.get_tender_requirements(self.project_id)
+            if row.get('chunk_id') in chunk_ids
+        ]
 
     def step1_chunking(self) -> bool:
         """
@@ -269,8 +296,14 @@ class TenderProcessingPipeline:
         logger.info("=" * 60)
 
         try:
-            # 准备筛选数据
-            chunks_for_filter = [chunk.to_dict() for chunk in self.chunks]
+            # 已筛选成功的分块（重跑）直接复用结果，筛选出错的分块重新筛选
+            self._refresh_chunk_progress()
+            done_results = self._stored_filter_results(include_failed=False)
+            done_indexes = {r.chunk_id for r in done_results}
+            chunks_for_filter = [chunk.to_dict() for chunk in self.chunks if chunk.chunk_index not in done_indexes]
+
+            if done_results:
+                logger.info(f"跳过 {len(done_results)} 个已筛选的分块")
 
             # 进度回调
             def filter_progress(processed, total):
@@ -278,15 +311,28 @@ class TenderProcessingPipeline:
 
             self._update_progress('filtering', 'processing', 0, len(chunks_for_filter))
 
-            # 执行筛选
-            self.filter_results = self.filter.filter_chunks_parallel(
-                chunks=chunks_for_filter,
-                progress_callback=filter_progress
-            )
-
-            # 更新数据库
-            if not self._update_filter_results_in_db(self.filter_results):
-                raise Exception("更新筛选结果到数据库失败")
+            # 执行筛选，每个分块完成即交给写线程落库
+            with ResultSink(self.db, self.project_id) as sink:
+                def save_filter_result(chunk, result):
+                    chunk_id = self.chunk_id_map.get(chunk['chunk_index'])
+                    if chunk_id:
+                        sink.add_filter_result(chunk_id, result.is_valuable, result.confidence,
+                                               self.filter_model, error=result.error)
+
+                new_results = self.filter.filter_chunks_parallel(
+                    chunks=chunks_for_filter,
+                    progress_callback=filter_progress,
+                    result_callback=save_filter_result
+                ) if chunks_for_filter else []
+
+            if sink.failed_chunks:
+                logger.warning(f"{len(sink.failed_chunks)} 个分块筛选出错，已保守保留，重跑时将重新筛选: "
+                               f"{sorted(sink.failed_chunks)}")
+            if sink.errors:
+                raise Exception(f"更新筛选结果到数据库失败（分块 {sorted(sink.unwritten_chunks)}）: "
+                                f"{'; '.join(str(e) for e in sink.errors)}")
+
+            self.filter_results = sorted(done_results + new_results, key=lambda r: r.chunk_id)
 
             # 统计
             valuable_count = sum(1 for r in self.filter_results if r.is_valuable)
@@ -329,33 +375,54 @@ class TenderProcessingPipeline:
         logger.info("=" * 60)
 
         try:
-            # 获取高价值分块
-            valuable_chunks = [
-                chunk.to_dict()
-                for i, chunk in enumerate(self.chunks)
-                if i < len(self.filter_results) and self.filter_results[i].is_valuable
-            ]
+            # 获取高价值分块（FilterResult.chunk_id 即 chunk_index）
+            valuable_indexes = {r.chunk_id for r in self.filter_results if r.is_valuable}
+            valuable_chunks = [chunk.to_dict() for chunk in self.chunks if chunk.chunk_index in valuable_indexes]
 
             if not valuable_chunks:
                 logger.warning("没有高价值分块，跳过提取步骤")
                 self._update_progress('extraction', 'completed', 0, 0)
                 return True
 
+            # 已提取的分块（重跑）跳过，沿用库中的要求
+            self._refresh_chunk_progress()
+            extracted_ids = [
+                self.chunk_id_map.get(c['chunk_index']) for c in valuable_chunks
+                if (self.existing_chunks.get(c['chunk_index']) or {}).get('extracted_at')
+            ]
+            if extracted_ids:
+                valuable_chunks = [
+                    c for c in valuable_chunks
+                    if not (self.existing_chunks.get(c['chunk_index']) or {}).get('extracted_at')
+                ]
+                logger.info(f"跳过 {len(extracted_ids)} 个已提取的分块")
+
             # 进度回调
             def extract_progress(processed, total):
                 self._update_progress('extraction', 'processing', processed, total)
 
             self._update_progress('extraction', 'processing', 0, len(valuable_chunks))
 
-            # 执行提取
-            self.requirements = self.extractor.extract_chunks_parallel(
-                chunks=valuable_chunks,
-                progress_callback=extract_progress
-            )
+            # 执行提取，每个分块完成即连同来源分块ID交给写线程落库
+            with ResultSink(self.db, self.project_id) as sink:
+                def save_requirements(chunk, requirements):
+                    chunk_id = self.chunk_id_map.get(chunk['chunk_index'])
+                    if chunk_id:
+                        sink.add_requirements(chunk_id, [
+                            dict(req.to_dict(), extraction_model=self.extract_model) for req in requirements
+                        ])
 
-            # 保存到数据库
-            if not self._save_requirements_to_db(self.requirements):
-                raise Exception("保存要求到数据库失败")
+                new_requirements = self.extractor.extract_chunks_parallel(
+                    chunks=valuable_chunks,
+                    progress_callback=extract_progress,
+                    result_callback=save_requirements
+                ) if valuable_chunks else []
+
+            if sink.errors:
+                raise Exception(f"保存要求到数据库失败（分块 {sorted(sink.unwritten_chunks)}）: "
+                                f"{'; '.join(str(e) for e in sink.errors)}")
+
+            self.requirements = self._load_extracted_requirements(extracted_ids) + new_requirements
 
             # 更新任务统计
             self.db.update_processing_task(
@@ -582,6 +649,47 @@ class TenderProcessingPipeline:
         return result
 
 
+def document_text_path(project_id: int) -> Path:
+    """
+    分步处理时保存文档全文的位置（后台工作进程按项目读取）
+
+    放在数据目录而不是系统临时目录：排队中的任务在容器/机器重启后继续执行时仍能读到全文。
+    """
+    text_dir = get_config().get_path('data') / 'tender_processing'
+    text_dir.mkdir(parents=True, exist_ok=True)
+    return text_dir / f"tender_{project_id}.txt"
+
+
+def run_pipeline_job(job) -> Dict:
+    """
+    后台任务：执行标书处理流程的指定步骤
+
+    payload: project_id, step, filter_model, extract_model；文档全文由 document_text_path() 读取
+    """
+    payload = job.payload
+    project_id = int(payload['project_id'])
+    step = int(payload['step'])
+    document_text = document_text_path(project_id).read_text(encoding='utf-8')
+
+    def progress_callback(progress: ProcessingProgress):
+        job.report(int(progress.progress_percentage), f"{progress.step}: {progress.status}")
+
+    pipeline = TenderProcessingPipeline(
+        project_id=project_id,
+        document_text=document_text,
+        filter_model=payload.get('filter_model', 'gpt-4o-mini'),
+        extract_model=payload.get('extract_model', 'deepseek-v3'),
+        progress_callback=progress_callback
+    )
+    if step > 1 and not pipeline.restore_state():
+        raise RuntimeError(f"恢复项目 {project_id} 的分块失败")
+
+    result = pipeline.run_step(step)
+    # 步骤内部捕获了异常（含取消），这里补充检查
+    job.check_cancelled()
+    return result
+
+
 if __name__ == '__main__':
     # 测试代码
     sample_document = """
@@ -9,16 +9,20 @@
 """
 
 import json
-import requests
-import time
 from typing import List, Dict, Optional, Tuple
 from dataclasses import dataclass, asdict
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from common import get_module_logger, get_config
+from common.llm_client import LLMClient
 
 logger = get_module_logger("requirement_extractor")
 
+SYSTEM_PROMPT = '你是一个专业的招标文件分析助手，擅长提取结构化的投标要求。请严格按照JSON格式输出。'
+
+# 响应缓存的用途名（LLM_CACHE_PURPOSES）
+CACHE_PURPOSE = "标书要求提取"
+
 
 @dataclass
 class TenderRequirement:
@@ -54,6 +58,9 @@ class RequirementExtractor:
         # 获取模型配置
         self.model_config = self.config.get_model_config(model_name)
 
+        # LLM 客户端（重试、响应缓存、共享限流、调用指标），各线程共用
+        self.client = LLMClient(model_name)
+
         # 统计信息
         self.total_processed = 0
         self.total_requirements = 0
@@ -118,138 +125,49 @@ class RequirementExtractor:
 
     def call_ai_api(self, prompt: str, use_json_mode: bool = True, max_retries: int = 3) -> Tuple[str, float]:
         """
-        调用AI API进行提取（支持重试）
+        调用AI API进行提取（经 LLMClient：重试、响应缓存、共享限流与调用指标），全部重试失败时返回空响应
 
         Args:
             prompt: 提示词
-            use_json_mode: 是否使用JSON Mode
+            use_json_mode: 是否使用JSON Mode（联通元景与 GPT-4 系列支持）
             max_retries: 最大重试次数
 
         Returns:
             response: AI响应
             cost: API调用成本
         """
-        last_error = None
+        json_mode = use_json_mode and ('yuanjing' in self.model_name or 'gpt-4' in self.model_name)
+        try:
+            content, usage = self.client.call_with_usage(
+                prompt,
+                system_prompt=SYSTEM_PROMPT,
+                temperature=0.1,  # 降低随机性，提高准确性
+                max_tokens=2000,
+                max_retries=max_retries,
+                purpose=CACHE_PURPOSE,
+                response_format='json_object' if json_mode else None
+            )
+        except Exception as e:
+            logger.error(f"AI API调用最终失败，已重试 {max_retries} 次: {e}")
+            return "", 0.0
 
-        for attempt in range(max_retries):
-            try:
-                # 构建请求
-                if 'yuanjing' in self.model_name:
-                    # 联通元景系列模型
-                    headers = {
-                        'Authorization': f"Bearer {self.model_config['access_token']}",
-                        'Content-Type': 'application/json'
-                    }
-
-                    payload = {
-                        'model': self.model_config['model_name'],
-                        'messages': [
-                            {
-                                'role': 'system',
-                                'content': '你是一个专业的招标文件分析助手，擅长提取结构化的投标要求。请严格按照JSON格式输出。'
-                            },
-                            {
-                                'role': 'user',
-                                'content': prompt
-                            }
-                        ],
-                        'max_tokens': self.model_config.get('max_tokens', 2000),
-                        'temperature': 0.1,  # 降低随机性，提高准确性
-                    }
-
-                    # 部分模型支持JSON Mode
-                    if use_json_mode:
-                        payload['response_format'] = {'type': 'json_object'}
-
-                    url = f"{self.model_config['base_url']}/chat/completions"
+        content = (content or '').strip()
+        if usage['cached']:
+            return content, 0.0
 
-                else:
-                    # OpenAI系列模型
-                    headers = {
-                        'Authorization': f"Bearer {self.model_config.get('api_key', '')}",
-                        'Content-Type': 'application/json'
-                    }
-
-                    payload = {
-                        'model': self.model_config.get('model_name', self.model_name),
-                        'messages': [
-                            {
-                                'role': 'system',
-                                'content': '你是一个专业的招标文件分析助手，擅长提取结构化的投标要求。请严格按照JSON格式输出。'
-                            },
-                            {
-                                'role': 'user',
-                                'content': prompt
-                            }
-                        ],
-                        'max_tokens': 2000,
-                        'temperature': 0.1
-                    }
-
-                    # GPT-4支持JSON Mode
-                    if use_json_mode and 'gpt-4' in self.model_name:
-                        payload['response_format'] = {'type': 'json_object'}
-
-                    url = self.model_config.get('api_endpoint', 'https://api.oaipro.com/v1/chat/completions')
-
-                # 发送请求
-                response = requests.post(
-                    url,
-                    headers=headers,
-                    json=payload,
-                    timeout=self.model_config.get('timeout', 60)
-                )
-
-                response.raise_for_status()
-                result = response.json()
-
-                # 解析响应
-                content = result['choices'][0]['message']['content'].strip()
-
-                # 计算成本（简化估算）
-                # DeepSeek-V3约为 $0.00027/1K input tokens, $0.0011/1K output tokens
-                usage = result.get('usage', {})
-                input_tokens = usage.get('prompt_tokens', 0)
-                output_tokens = usage.get('completion_tokens', 0)
-
-                if 'deepseek' in self.model_name:
-                    cost = (input_tokens * 0.00027 + output_tokens * 0.0011) / 1000
-                else:
-                    # GPT-4约为 $0.03/1K input tokens, $0.06/1K output tokens
-                    cost = (input_tokens * 0.03 + output_tokens * 0.06) / 1000
-
-                self.total_api_calls += 1
-                self.total_cost += cost
-
-                return content, cost
-
-            except requests.exceptions.HTTPError as e:
-                last_error = e
-                # 429 Rate Limit - 需要重试
-                if e.response.status_code == 429:
-                    if attempt < max_retries - 1:
-                        wait_time = 2 ** attempt  # 指数退避: 1s, 2s, 4s
-                        logger.warning(f"API限流 (429)，{wait_time}秒后重试 (尝试 {attempt + 1}/{max_retries})...")
-                        time.sleep(wait_time)
-                        continue
-                    else:
-                        logger.error(f"API限流 (429)，已达最大重试次数: {e}")
-                else:
-                    # 其他HTTP错误不重试
-                    logger.error(f"AI API HTTP错误 ({e.response.status_code}): {e}")
-                    break
-
-            except Exception as e:
-                last_error = e
-                logger.error(f"AI API调用失败 (尝试 {attempt + 1}/{max_retries}): {e}")
-                if attempt < max_retries - 1:
-                    time.sleep(1)  # 短暂等待后重试
-                    continue
-                break
+        # 计算成本（简化估算）
+        input_tokens, output_tokens = usage['prompt_tokens'], usage['completion_tokens']
+        if 'deepseek' in self.model_name:
+            # DeepSeek-V3约为 $0.00027/1K input tokens, $0.0011/1K output tokens
+            cost = (input_tokens * 0.00027 + output_tokens * 0.0011) / 1000
+        else:
+            # GPT-4约为 $0.03/1K input tokens, $0.06/1K output tokens
+            cost = (input_tokens * 0.03 + output_tokens * 0.06) / 1000
+
+        self.total_api_calls += 1
+        self.total_cost += cost
 
-        # 所有重试都失败
-        logger.error(f"AI API调用最终失败，已重试 {max_retries} 次: {last_error}")
-        return "", 0.0
+        return content, cost
 
     def parse_extraction_response(self, response: str) -> List[TenderRequirement]:
         """
@@ -403,13 +321,16 @@ class RequirementExtractor:
             return [], False, error_msg
 
     def extract_chunks_parallel(self, chunks: List[Dict],
-                                progress_callback: Optional[callable] = None) -> List[TenderRequirement]:
+                                progress_callback: Optional[callable] = None,
+                                result_callback: Optional[callable] = None) -> List[TenderRequirement]:
         """
         并行批量提取要求
 
         Args:
             chunks: 分块列表（经过筛选的高价值分块）
             progress_callback: 进度回调函数 callback(processed, total)
+            result_callback: 单个分块提取成功后回调 callback(chunk, requirements)，
+                在调用线程中按完成顺序执行（提取失败的分块不回调）
 
         Returns:
             requirements: 所有提取的要求列表
@@ -429,8 +350,10 @@ class RequirementExtractor:
             # 收集结果
             for future in as_completed(future_to_chunk):
                 try:
-                    requirements = future.result()
+                    requirements, success, error_msg = future.result()
                     all_requirements.extend(requirements)
+                    if success and result_callback:
+                        result_callback(future_to_chunk[future], requirements)
 
                     processed += 1
                     if progress_callback:
@@ -438,7 +361,7 @@ class RequirementExtractor:
 
                 except Exception as e:
                     chunk = future_to_chunk[future]
-                    logger.error(f"提取分块 {chunk.get('chunk_id')} 失败: {e}")
+                    logger.error(f"提取分块 {chunk.get('chunk_index')} 失败: {e}")
 
         logger.info(f"提取完成！")
         logger.info(f"  处理分块: {processed}")
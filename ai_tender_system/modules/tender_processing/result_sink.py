@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+标书处理结果写后（write-behind）落库
+
+筛选/提取线程池每完成一个分块就把结果交给 ResultSink，由后台写线程攒成小批次，
+在一个事务中用 executemany 写入（见 KnowledgeBaseDB.write_tender_processing_results）：
+- 不再等整步结束后逐条 UPDATE / INSERT
+- 已完成分块的结果及时落库，流程中断后重跑可跳过
+- 提取结果与分块的 extracted_at 标记在同一事务中写入，不会出现"要求已写入但分块未标记"
+- 筛选出错的分块同样落库（filter_error 非空），重跑时重新筛选
+- 每个写入失败的批次都记录错误和涉及的分块ID，重跑时可据此判断缺失的结果
+
+配置（环境变量）：
+    TENDER_SINK_BATCH_SIZE      每批最多写入的分块数，默认 20
+    TENDER_SINK_FLUSH_INTERVAL  未攒满一批时的最长等待秒数，默认 0.5
+"""
+
+import os
+import queue
+import threading
+from typing import Dict, List, Optional
+
+from common import get_module_logger
+
+logger = get_module_logger("result_sink")
+
+SINK_BATCH_SIZE = int(os.getenv('TENDER_SINK_BATCH_SIZE', '20'))
+SINK_FLUSH_INTERVAL = float(os.getenv('TENDER_SINK_FLUSH_INTERVAL', '0.5'))
+
+_STOP = object()
+
+
+class ResultSink:
+    """
+    写后结果落库
+
+    用法：
+        with ResultSink(db, project_id) as sink:
+            sink.add_filter_result(chunk_id, is_valuable, confidence, model, error)
+            sink.add_requirements(chunk_id, [req_dict, ...])
+        if sink.errors: ...  # 每个失败批次的错误，未写入的分块见 sink.unwritten_chunks
+    """
+
+    def __init__(self, db, project_id: int,
+                 batch_size: int = SINK_BATCH_SIZE,
+                 flush_interval: float = SINK_FLUSH_INTERVAL):
+        """
+        Args:
+            db: KnowledgeBaseDB 实例
+            project_id: 项目ID
+            batch_size: 每批最多写入的分块数
+            flush_interval: 未攒满一批时的最长等待秒数
+        """
+        self.db = db
+        self.project_id = project_id
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+
+        self.errors: List[Exception] = []
+        self.unwritten_chunks: List[int] = []   # 写入失败批次涉及的分块ID
+        self.failed_chunks: Dict[int, str] = {}  # 筛选出错的分块ID -> 错误信息
+        self.written_chunks = 0
+        self.written_requirements = 0
+        self.batches = 0
+
+        self._queue: queue.Queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name=f"result-sink-{project_id}", daemon=True)
+        self._thread.start()
+
+    @property
+    def error(self) -> Optional[Exception]:
+        """首个写入错误（无错误时为 None）"""
+        return self.errors[0] if self.errors else None
+
+    def add_filter_result(self, chunk_id: int, is_valuable: bool,
+                          confidence: float = None, model: str = None, error: str = None):
+        """提交单个分块的筛选结果（error 非空表示筛选出错、结果为保守保留）"""
+        if error:
+            self.failed_chunks[chunk_id] = error
+        self._queue.put(('filter', (chunk_id, is_valuable, confidence, model, error or None)))
+
+    def add_requirements(self, chunk_id: int, requirements: List[Dict]):
+        """提交单个分块的提取结果（为空也会标记该分块已提取）"""
+        rows = []
+        for req in requirements:
+            req = dict(req)
+            req['project_id'] = self.project_id
+            req['chunk_id'] = chunk_id
+            rows.append(req)
+        self._queue.put(('extract', (chunk_id, rows)))
+
+    def close(self) -> bool:
+        """写完队列中剩余的结果并停止写线程；返回是否全部写入成功"""
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+        return not self.errors
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _run(self):
+        """写线程：攒批并落库"""
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            # 攒满一批或等待超时即写入
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get(timeout=self.flush_interval)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._flush(batch)
+
+    def _flush(self, batch: List):
+        filter_results, requirements, extracted_chunk_ids, chunk_ids = [], [], [], []
+        for kind, payload in batch:
+            chunk_ids.append(payload[0])
+            if kind == 'filter':
+                filter_results.append(payload)
+            else:
+                chunk_id, rows = payload
+                requirements.extend(rows)
+                extracted_chunk_ids.append(chunk_id)
+
+        try:
+            self.db.write_tender_processing_results(
+                filter_results=filter_results,
+                requirements_data=requirements,
+                extracted_chunk_ids=extracted_chunk_ids
+            )
+            self.batches += 1
+            self.written_chunks += len(batch)
+            self.written_requirements += len(requirements)
+        except Exception as e:
+            # 记录每个批次的错误及涉及的分块，后续批次继续尝试写入
+            logger.error(f"批量写入处理结果失败（{len(batch)} 个分块）: {e}")
+            self.errors.append(e)
+            self.unwritten_chunks.extend(chunk_ids)
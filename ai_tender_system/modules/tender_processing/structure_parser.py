@@ -20,6 +20,13 @@ from difflib import SequenceMatcher
 from common import get_module_logger
 from common.utils import resolve_file_path
 from .level_analyzer import LevelAnalyzer
+from .document_snapshot import get_document_snapshot
+from common.paragraph_index import get_paragraph_index
+from .title_matcher import (
+    get_title_match_index, aggressive_normalize, extract_core_keywords, strip_number_prefix,
+    convert_chinese_part_number, PART_NUMBER_RE, CHAPTER_NUMBER_RE, PRIMARY_CHAPTER_RE,
+    LEADING_DIGIT_NUMBER_RE
+)
 
 logger = get_module_logger("structure_parser")
 
@@ -463,12 +470,13 @@ class DocumentStructureParser:
                 self.logger.debug(f"  ✓ 找到 [{level}级] {title} (段落 {para_idx})")
 
             # 3. 计算每个章节的结束位置
+            total_paras = len(get_paragraph_index(doc))
             for i, chapter_info in enumerate(located_chapters):
                 if not chapter_info['located']:
                     continue
 
                 current_level = chapter_info['level']
-                next_start = len(doc.paragraphs)
+                next_start = total_paras
 
                 # 找下一个同级或更高级的章节
                 for j in range(i + 1, len(located_chapters)):
@@ -580,15 +588,15 @@ class DocumentStructureParser:
         # 存储候选匹配结果：(段落索引, 优先级, 匹配类型)
         # 优先级：0=Heading样式精确匹配, 1=普通精确匹配, 2=Heading样式模糊匹配, 3=普通模糊匹配
         candidates = []
+        pidx = get_paragraph_index(doc)
 
-        for i in range(start_idx, len(doc.paragraphs)):
-            para = doc.paragraphs[i]
-            para_text = normalize(para.text)
+        for i in range(start_idx, len(pidx)):
+            para_text = normalize(pidx.texts[i])
             if not para_text:
                 continue
 
             # 检查是否是 Heading 样式
-            is_heading = para.style and 'Heading' in para.style.name
+            is_heading = 'Heading' in pidx.style_names[i]
 
             # 完全匹配
             if para_text == title_clean:
@@ -719,8 +727,7 @@ class DocumentStructureParser:
         analyzer = LevelAnalyzer()
 
         titles = []
-        for i, para in enumerate(doc.paragraphs[:500]):  # 只扫描前500段
-            text = para.text.strip()
+        for i, text in enumerate(get_paragraph_index(doc).stripped[:500]):  # 只扫描前500段
             if not text or len(text) > 100:
                 continue
 
@@ -976,7 +983,7 @@ class DocumentStructureParser:
                 raise FileNotFoundError(f"无法解析文件路径: {doc_path}")
 
             doc = Document(str(doc_path_abs))
-            doc_paragraph_count = len(doc.paragraphs)
+            doc_paragraph_count = len(get_paragraph_index(doc))
 
             # ========================================
             # 阶段1: 章节结构识别（智能回退）
@@ -1179,8 +1186,7 @@ class DocumentStructureParser:
 
             # 提取所有可能的章节标题
             potential_titles = []
-            for i, para in enumerate(doc.paragraphs):
-                text = para.text.strip()
+            for i, text in enumerate(get_paragraph_index(doc).stripped):
                 if not text or len(text) > 100:
                     continue
 
@@ -1355,58 +1361,56 @@ class DocumentStructureParser:
 
         self.logger.info("使用方法五：大纲级别识别（增强版）")
 
-        # 直接从Word文档提取标题 - 使用微软官方的大纲级别API
-        for para_idx, paragraph in enumerate(doc.paragraphs):
+        # 直接从Word文档提取标题 - 使用微软官方的大纲级别API（大纲级别/样式名取自共享段落索引）
+        pidx = get_paragraph_index(doc)
+        for para_idx in range(len(pidx)):
             is_heading = False
             level = 0
             detection_method = ""
+            text = pidx.stripped[para_idx]
 
             # ⭐ 优先级1: 检查大纲级别 (Outline Level) - 微软官方语义标记
             # 这是Word导航窗格和大纲视图使用的结构，准确度最高
             try:
-                pPr = paragraph._element.pPr
-                if pPr is not None:
-                    outlineLvl = pPr.outlineLvl
-                    if outlineLvl is not None:
-                        outline_level_val = int(outlineLvl.val)
-                        # Word大纲级别: 0-8表示标题(0=一级), 9表示正文
-                        if outline_level_val <= 8:
-                            # 🔧 添加过滤规则，排除噪音内容
-                            text = paragraph.text.strip()
-                            should_skip = False
-
-                            # 过滤1: 跳过文档前30段的封面/元数据（Level 0）
-                            if para_idx < 30 and outline_level_val == 0:
-                                metadata_keywords = ['项目编号', '招标人', '代理机构', '联系人', '联系方式',
-                                                    '地址', '电话', '传真', '邮编', '网址', 'http']
-                                if any(kw in text for kw in metadata_keywords):
-                                    should_skip = True
-                                    self.logger.debug(f"过滤封面: 段落{para_idx} '{text[:30]}'")
-
-                            # 过滤2: 跳过Level 3-4的长条款内容
-                            if not should_skip and outline_level_val >= 3:
-                                # 形如 "1.1 这是一个很长的说明文字..." 的是条款，不是标题
-                                if re.match(r'^\d+\.\d+\s+.{15,}', text):
-                                    should_skip = True
-                                    self.logger.debug(f"过滤条款: 段落{para_idx} '{text[:30]}'")
-
-                            # 过滤3: 标题长度限制（超过50字的通常不是标题）
-                            if not should_skip and len(text) > 50:
-                                # 除非有明确的章节编号
-                                if not re.match(r'^第[一二三四五六七八九十\d]+[章部分]', text):
-                                    should_skip = True
-                                    self.logger.debug(f"过滤长文本: 段落{para_idx} '{text[:30]}'")
-
-                            if not should_skip:
-                                is_heading = True
-                                level = outline_level_val + 1  # 转换: 0→1级, 1→2级, ...
-                                detection_method = f"大纲级别{outline_level_val}"
+                outline_level_val = pidx.outline_levels[para_idx]
+                if outline_level_val is not None:
+                    # Word大纲级别: 0-8表示标题(0=一级), 9表示正文
+                    if outline_level_val <= 8:
+                        # 🔧 添加过滤规则，排除噪音内容
+                        should_skip = False
+
+                        # 过滤1: 跳过文档前30段的封面/元数据（Level 0）
+                        if para_idx < 30 and outline_level_val == 0:
+                            metadata_keywords = ['项目编号', '招标人', '代理机构', '联系人', '联系方式',
+                                                '地址', '电话', '传真', '邮编', '网址', 'http']
+                            if any(kw in text for kw in metadata_keywords):
+                                should_skip = True
+                                self.logger.debug(f"过滤封面: 段落{para_idx} '{text[:30]}'")
+
+                        # 过滤2: 跳过Level 3-4的长条款内容
+                        if not should_skip and outline_level_val >= 3:
+                            # 形如 "1.1 这是一个很长的说明文字..." 的是条款，不是标题
+                            if re.match(r'^\d+\.\d+\s+.{15,}', text):
+                                should_skip = True
+                                self.logger.debug(f"过滤条款: 段落{para_idx} '{text[:30]}'")
+
+                        # 过滤3: 标题长度限制（超过50字的通常不是标题）
+                        if not should_skip and len(text) > 50:
+                            # 除非有明确的章节编号
+                            if not re.match(r'^第[一二三四五六七八九十\d]+[章部分]', text):
+                                should_skip = True
+                                self.logger.debug(f"过滤长文本: 段落{para_idx} '{text[:30]}'")
+
+                        if not should_skip:
+                            is_heading = True
+                            level = outline_level_val + 1  # 转换: 0→1级, 1→2级, ...
+                            detection_method = f"大纲级别{outline_level_val}"
             except (AttributeError, TypeError, ValueError):
                 pass  # 没有大纲级别，继续其他方法
 
             # 优先级2: 检查标准Heading样式 (备用方案)
             if not is_heading:
-                style_name = paragraph.style.name if paragraph.style else ""
+                style_name = pidx.style_names[para_idx]
 
                 # 只接受标准的Heading样式（精确匹配，避免误识别）
                 if style_name.startswith('Heading '):  # 'Heading 1', 'Heading 2'
@@ -1422,8 +1426,8 @@ class DocumentStructureParser:
                         level = int(match.group(1))
                         detection_method = f"样式{style_name}"
 
-            if is_heading and paragraph.text.strip():
-                title = paragraph.text.strip()
+            if is_heading and text:
+                title = text
 
                 chapter = ChapterNode(
                     id=f"docx_{chapter_counter}",
@@ -1651,12 +1655,11 @@ class DocumentStructureParser:
             return ""
 
         # 提取章节内容（跳过标题本身）
-        content_paras = doc.paragraphs[para_start_idx + 1 : para_end_idx + 1]
+        content_texts = get_paragraph_index(doc).stripped[para_start_idx + 1 : para_end_idx + 1]
 
         # 合并文本
         sample_text = ""
-        for para in content_paras:
-            text = para.text.strip()
+        for text in content_texts:
             if text:
                 sample_text += text + "\n"
                 if len(sample_text) >= sample_size:
@@ -1699,6 +1702,9 @@ class DocumentStructureParser:
         density_threshold = 0.2  # 密度阈值：20%
         step_size = 10  # 滑动步长：每次移动10段
 
+        stripped = get_paragraph_index(doc).stripped
+        total_paras = len(stripped)
+
         # 滑动窗口扫描
         for i in range(start_idx, end_idx - window_size, step_size):
             window_end = min(i + window_size, end_idx)
@@ -1706,8 +1712,8 @@ class DocumentStructureParser:
             # 提取窗口内文本
             window_text = ""
             for j in range(i, window_end):
-                if j < len(doc.paragraphs):
-                    para_text = doc.paragraphs[j].text.strip()
+                if j < total_paras:
+                    para_text = stripped[j]
                     if para_text:
                         window_text += para_text + "\n"
 
@@ -1722,8 +1728,8 @@ class DocumentStructureParser:
                 strong_contract_keywords = ['甲方', '乙方', '本合同', '合同的组成', '合同组成']
 
                 for j in range(i, start_idx - 1, -1):  # 向前查找
-                    if j < len(doc.paragraphs):
-                        para_text = doc.paragraphs[j].text.strip()
+                    if j < total_paras:
+                        para_text = stripped[j]
                         if any(kw in para_text for kw in strong_contract_keywords):
                             cluster_start = j
                         else:
@@ -1735,9 +1741,9 @@ class DocumentStructureParser:
                 for j in range(window_end, end_idx, 10):
                     check_end = min(j + 50, end_idx)
                     check_text = "\n".join(
-                        doc.paragraphs[k].text.strip()
+                        stripped[k]
                         for k in range(j, check_end)
-                        if k < len(doc.paragraphs) and doc.paragraphs[k].text.strip()
+                        if k < total_paras and stripped[k]
                     )
                     check_density = self._calculate_contract_density(check_text)
 
@@ -1837,8 +1843,8 @@ class DocumentStructureParser:
                     # 方法1: 尝试在doc.paragraphs中查找"目录"标题
                     # （适用于目录标题同时出现在doc.paragraphs中的情况）
                     toc_keywords_normalized = ["目录", "contents", "tableofcontents", "索引", "章节目录", "内容目录"]
-                    for idx, para in enumerate(doc.paragraphs[:50]):
-                        text = para.text.strip().replace(" ", "").replace("\u3000", "").lower()
+                    for idx, para_text in enumerate(get_paragraph_index(doc).stripped[:50]):
+                        text = para_text.replace(" ", "").replace("\u3000", "").lower()
                         if text in toc_keywords_normalized:
                             self.logger.info(f"检测到目录SDT，目录标题在paragraphs[{idx}]")
                             return idx
@@ -1868,8 +1874,9 @@ class DocumentStructureParser:
             pass
 
         # 第一轮: 检测显式目录标题
-        for i, para in enumerate(doc.paragraphs[:50]):  # 只检查前50段
-            text = para.text.strip()
+        pidx = get_paragraph_index(doc)
+        for i, para in enumerate(pidx.paragraphs[:50]):  # 只检查前50段
+            text = pidx.stripped[i]
 
             # 跳过空段落
             if not text:
@@ -1998,9 +2005,10 @@ class DocumentStructureParser:
         # 🔧 扩展范围从100到150，以覆盖更长的目录（如包含100+个目录项的招标文件）
         # 🆕 从 toc_start_idx 开始（而不是 +1），因为 toc_start_idx 可能本身就是第一个目录项
         #    如果 toc_start_idx 段落只包含"目录"标题，会被后续逻辑跳过
-        for i in range(toc_start_idx, min(toc_start_idx + 150, len(doc.paragraphs))):
-            para = doc.paragraphs[i]
-            text = para.text.strip()
+        pidx = get_paragraph_index(doc)
+        for i in range(toc_start_idx, min(toc_start_idx + 150, len(pidx))):
+            para = pidx[i]
+            text = pidx.stripped[i]
 
             # 跳过空行
             if not text:
@@ -2193,6 +2201,11 @@ class DocumentStructureParser:
         """
         在文档中搜索与标题匹配的段落
 
+        匹配级别与原线性扫描实现完全一致（参考实现见 scripts/benchmark_title_matching.py），
+        但候选段落由文档级 TitleMatchIndex 生成，只对候选执行级别判定：
+        - 严格匹配 (Level 1-3)：按段落顺序校验候选，找到立即返回
+        - 宽松匹配 (Level 4-7)：收集所有候选，按得分选择（同分取靠前段落）
+
         Args:
             doc: Word文档对象
             title: 要搜索的标题文本
@@ -2203,75 +2216,35 @@ class DocumentStructureParser:
         Returns:
             段落索引，如果未找到则返回None
         """
-        def aggressive_normalize(text: str) -> str:
-            """激进文本规范化：移除所有分隔符、前缀、空格"""
-            # 移除"附件-"、"附件:"等前缀
-            text = re.sub(r'^附件[-:：]?', '', text)
-            # 移除连字符、下划线、制表符
-            text = re.sub(r'[-_\t]+', '', text)
-            # 移除所有空格和冒号（将"第一章："和"第一章 "视为等价）
-            text = re.sub(r'[:：\s]+', '', text)
-            return text
-
-        def extract_core_keywords(text: str) -> str:
-            """提取核心关键词：去除编号和常见前缀"""
-            # 移除编号（支持冒号和空格：第X章：、第X章 、第X章、第X部分：等）
-            text = re.sub(r'^(第[一二三四五六七八九十\d]+部分|第[一二三四五六七八九十\d]+章)[:：\s]*', '', text)
-            text = re.sub(r'^(\d+\.|\d+\.\d+|[一二三四五六七八九十]+、)\s*', '', text)
-            # 移除"附件"前缀
-            text = re.sub(r'^附件[-:：]?', '', text)
-            # 移除分隔符
-            text = re.sub(r'[-_\t]+', '', text)
-            # 移除空格和冒号
-            text = re.sub(r'[:：\s]+', '', text)
-            return text
-
-        def calculate_similarity(str1: str, str2: str) -> float:
-            """计算两个字符串的相似度（使用 SequenceMatcher）"""
-            if not str1 or not str2:
-                return 0.0
-
-            # 使用 SequenceMatcher 计算真正的字符串相似度
-            # 这比基于子串的方法更能处理同义词替换（如"响应"vs"应答"）
-            return SequenceMatcher(None, str1, str2).ratio()
+        index = get_title_match_index(doc)
 
-        # 清理标题（移除多余空格）
+        # 标题的各级规范化形式
         clean_title = re.sub(r'\s+', '', title)
-
-        # 激进规范化的标题
         aggressive_title = aggressive_normalize(title)
-
-        # 提取核心关键词
         core_keywords = extract_core_keywords(aggressive_title)
+        title_without_number = strip_number_prefix(clean_title)
+        title_has_part_number = bool(PART_NUMBER_RE.search(title))
+        title_chapter_match = CHAPTER_NUMBER_RE.match(title)
+        title_chapter_number = title_chapter_match.group(1) if title_chapter_match else None
 
         self.logger.info(f"搜索标题: '{title}' (清理后: '{clean_title}', 核心: '{core_keywords}'), 从段落 {start_idx} 开始")
 
-        # 候选匹配列表（用于宽松匹配级别）
-        # 格式: [(段落索引, 匹配级别, 得分, 段落文本, 匹配原因)]
-        loose_match_candidates = []
-
         # 记录已跳过的元数据列表区域（避免重复检测和日志）
         skipped_ranges = []
 
         # 🔑 第一轮：严格匹配 (Level 1-3)，找到立即返回
-        for i in range(start_idx, len(doc.paragraphs)):
+        strict_candidates = set(index.find_containing('clean', clean_title, start_idx))
+        strict_candidates.update(index.find_containing('aggressive', aggressive_title, start_idx))
+        if title_without_number:
+            strict_candidates.update(index.find_equal('without_number', title_without_number, start_idx))
+
+        for i in sorted(strict_candidates):
             # 检查是否在已跳过的区域中
             if any(start <= i <= end for start, end in skipped_ranges):
                 continue
-            para = doc.paragraphs[i]
-            para_text = para.text.strip()
-
-            if not para_text:
-                continue
-
-            # 清理段落文本
-            clean_para = re.sub(r'\s+', '', para_text)
-
-            # 激进规范化的段落
-            aggressive_para = aggressive_normalize(para_text)
-
-            # 段落核心关键词
-            para_keywords = extract_core_keywords(aggressive_para)
+            para_text = index.texts[i]
+            clean_para = index.clean[i]
+            aggressive_para = index.aggressive[i]
 
             # Level 1: 完全匹配或包含匹配
             level1_exact_match = (clean_title == clean_para)
@@ -2284,20 +2257,16 @@ class DocumentStructureParser:
                 if list_range:
                     start, end, titles = list_range
 
-                    # 🔑 关键：对于"第X章"、"第X部分"这种明确的一级章节标题
-                    # 只有当它具有 Heading 样式时才认为是真正的章节标题
-                    # 否则可能只是文档中的一个章节列表/索引区域
-                    is_primary_chapter = re.match(r'^第[一二三四五六七八九十百千\d]+[章部分]', para_text.strip())
-                    is_heading_style = para.style and ('heading' in para.style.name.lower() or '标题' in para.style.name.lower())
+                    # 🔑 "第X章"、"第X部分"只有具有 Heading 样式时才认为是真正的章节标题
+                    is_primary_chapter = PRIMARY_CHAPTER_RE.match(para_text)
+                    is_heading_style = index.is_heading[i]
 
                     if is_primary_chapter and is_heading_style:
                         self.logger.info(f"  ✓ 找到一级章节标题（Heading样式，不跳过）: 段落 {i}: '{para_text}'")
                         return i
 
-                    # 如果是"第X章"但不是Heading样式，很可能是文档中的章节列表区域
                     if is_primary_chapter and not is_heading_style:
                         self.logger.info(f"  ⏭️  跳过段落 {i}（第X章格式但非Heading样式，可能是章节列表）: '{para_text}'")
-                        # 记录跳过区域
                         skipped_ranges.append((start, end))
                         continue
 
@@ -2305,31 +2274,13 @@ class DocumentStructureParser:
                         f"  ⚠️  检测到'文件构成说明'列表 (段落{start}-{end}，"
                         f"包含{len(titles)}个章节标题)，跳过该区域"
                     )
-                    # 显示列表中的章节（最多5个）
-                    for idx, title_text in titles[:5]:
-                        self.logger.info(f"      - 段落{idx}: {title_text}")
-                    if len(titles) > 5:
-                        self.logger.info(f"      ... 还有{len(titles)-5}个")
-
-                    # 记录跳过区域
                     skipped_ranges.append((start, end))
-
-                    # 继续搜索（不返回此匹配）
                     continue
 
-                # 🔑 对于包含匹配（非完全匹配），需要额外验证
+                # 🔑 包含匹配（非完全匹配）需要额外验证：Heading样式、短文本或标题在开头
                 if level1_contain_match and not level1_exact_match:
-                    # 检查是否是Heading样式（更可能是真正的章节标题）
-                    is_heading = para.style and ('heading' in para.style.name.lower() or '标题' in para.style.name.lower())
-                    # 或者文本很短（≤20字，更可能是标题而不是正文）
-                    is_short = len(para_text) <= 20
-                    # 🆕 检查标题是否在段落开头位置（章节标题应该在开头，不是中间）
-                    title_at_start = clean_para.startswith(clean_title)
-
-                    if not is_heading:
-                        # 非 Heading 样式时，需要满足：短文本 或 标题在开头
-                        if not (is_short or title_at_start):
-                            # 标题在段落中间 → 可能是正文中提到标题 → 跳过
+                    if not index.is_heading[i]:
+                        if not (len(para_text) <= 20 or clean_para.startswith(clean_title)):
                             self.logger.debug(f"  ⏭️  跳过段落 {i}（包含匹配但标题不在开头且非短文本）: '{para_text[:60]}'")
                             continue
 
@@ -2341,86 +2292,63 @@ class DocumentStructureParser:
             level2_contain_match = (aggressive_title in aggressive_para)
 
             if level2_exact_match or level2_contain_match:
-                # 🔑 对于包含匹配（非完全匹配），需要额外验证
                 if level2_contain_match and not level2_exact_match:
-                    is_heading = para.style and ('heading' in para.style.name.lower() or '标题' in para.style.name.lower())
-                    is_short = len(para_text) <= 20
-                    # 🆕 检查标题是否在段落开头位置（章节标题应该在开头，不是中间）
-                    title_at_start = aggressive_para.startswith(aggressive_title)
-
-                    if not is_heading:
-                        # 非 Heading 样式时，需要满足：短文本 或 标题在开头
-                        if not (is_short or title_at_start):
-                            # 标题在段落中间 → 可能是正文中提到标题 → 跳过
+                    if not index.is_heading[i]:
+                        if not (len(para_text) <= 20 or aggressive_para.startswith(aggressive_title)):
                             self.logger.debug(f"  ⏭️  跳过段落 {i}（包含匹配但标题不在开头且非短文本）: '{para_text[:60]}'")
                             continue
 
                 self.logger.info(f"  ✓ 找到匹配 (Level 2-规范化): 段落 {i}: '{para_text}'")
                 return i
 
-            # 检查标题和段落是否包含"第X部分"（用于Level 3和Level 4约束）
-            title_has_part_number = bool(re.search(r'第[一二三四五六七八九十\d]+部分', title))
-            para_has_part_number = bool(re.search(r'第[一二三四五六七八九十\d]+部分', para_text))
-
             # Level 3: 去除编号后的匹配
-            # 支持多种编号格式：第X部分、第X章、1.、1.1、一、等
-            title_without_number = re.sub(r'^(第[一二三四五六七八九十\d]+部分|第[一二三四五六七八九十\d]+章|\d+\.|\d+\.\d+|[一二三四五六七八九十]+、)\s*', '', clean_title)
-            para_without_number = re.sub(r'^(第[一二三四五六七八九十\d]+部分|第[一二三四五六七八九十\d]+章|\d+\.|\d+\.\d+|[一二三四五六七八九十]+、)\s*', '', clean_para)
-
+            para_without_number = index.without_number[i]
             if title_without_number and para_without_number and title_without_number == para_without_number:
-                # 如果TOC标题有"第X部分"，则段落也必须有"第X部分"（避免匹配到TOC内的编号内容）
-                # 🆕 例外：如果正文段落使用 Heading 样式，说明是真正的章节标题，即使没有"第X部分"前缀也应匹配
-                is_heading = para.style and ('heading' in para.style.name.lower() or '标题' in para.style.name.lower())
-                if title_has_part_number and not para_has_part_number:
-                    if is_heading:
-                        # 正文使用 Heading 样式，视为有效的章节标题，可以匹配
+                # TOC标题有"第X部分"时，段落也必须有"第X部分"，除非段落使用 Heading 样式
+                if title_has_part_number and not index.has_part_number[i]:
+                    if index.is_heading[i]:
                         self.logger.info(f"  ✓ 找到匹配 (Level 3-去编号+Heading样式): 段落 {i}: '{para_text}'")
                         return i
-                    else:
-                        pass  # 跳过，不匹配
                 else:
                     self.logger.info(f"  ✓ 找到匹配 (Level 3-去编号): 段落 {i}: '{para_text}'")
                     return i
 
         # 🔑 第二轮：宽松匹配 (Level 4-7)，收集所有候选
-        self.logger.info(f"  严格匹配 (Level 1-3) 未找到，开始宽松匹配 (Level 4-7)")
+        self.logger.info("  严格匹配 (Level 1-3) 未找到，开始宽松匹配 (Level 4-7)")
+
+        loose_indices = set()
+        similar_indices = set()
+        if len(core_keywords) >= 4:
+            loose_indices.update(index.find_containing('keywords', core_keywords, start_idx))
+            loose_indices.update(index.find_keyword_substrings(core_keywords, 4, start_idx))
+            similar_indices = index.find_similar_keywords(core_keywords, start_idx)
+            loose_indices.update(similar_indices)
+        if len(core_keywords) >= 6 and title_has_part_number:
+            loose_indices.update(index.find_containing('keywords', core_keywords[:6], start_idx))
+        if len(title_without_number) >= 6:
+            loose_indices.update(index.find_containing('clean', title_without_number, start_idx))
+        converted_title = convert_chinese_part_number(clean_title)
+        if converted_title != clean_title:
+            converted_title_without_num = LEADING_DIGIT_NUMBER_RE.sub('', converted_title)
+            loose_indices.update(index.find_equal('digit_stripped', converted_title_without_num, start_idx))
+
+        # 候选格式: [(段落索引, 匹配级别, 得分, 段落文本, 匹配原因)]
+        loose_match_candidates = []
 
-        for i in range(start_idx, len(doc.paragraphs)):
-            # 检查是否在已跳过的区域中
+        for i in sorted(loose_indices):
             if any(start <= i <= end for start, end in skipped_ranges):
                 continue
-            para = doc.paragraphs[i]
-            para_text = para.text.strip()
-
-            if not para_text:
-                continue
-
-            # 清理段落文本
-            clean_para = re.sub(r'\s+', '', para_text)
-
-            # 激进规范化的段落
-            aggressive_para = aggressive_normalize(para_text)
-
-            # 段落核心关键词
-            para_keywords = extract_core_keywords(aggressive_para)
-
-            # 检查标题和段落是否包含"第X部分"
-            title_has_part_number = bool(re.search(r'第[一二三四五六七八九十\d]+部分', title))
-            para_has_part_number = bool(re.search(r'第[一二三四五六七八九十\d]+部分', para_text))
-
-            # 去除编号
-            title_without_number = re.sub(r'^(第[一二三四五六七八九十\d]+部分|第[一二三四五六七八九十\d]+章|\d+\.|\d+\.\d+|[一二三四五六七八九十]+、)\s*', '', clean_title)
-            para_without_number = re.sub(r'^(第[一二三四五六七八九十\d]+部分|第[一二三四五六七八九十\d]+章|\d+\.|\d+\.\d+|[一二三四五六七八九十\d]+、)\s*', '', clean_para)
+            para_text = index.texts[i]
+            clean_para = index.clean[i]
+            para_keywords = index.keywords[i]
+            para_has_part_number = index.has_part_number[i]
 
             # Level 4: 核心关键词匹配（长度≥4字）
             if len(core_keywords) >= 4 and len(para_keywords) >= 4:
-                # 完全相等匹配（得分最高）
                 if core_keywords == para_keywords:
                     loose_match_candidates.append((i, 4, 100, para_text, f"关键词完全相等: '{core_keywords}'"))
-                # 标题关键词包含段落关键词（得分中等）
                 elif core_keywords in para_keywords:
                     loose_match_candidates.append((i, 4, 70, para_text, f"关键词包含: '{core_keywords}' in '{para_keywords}'"))
-                # 段落关键词包含标题关键词（得分较低，容易误匹配）
                 elif para_keywords in core_keywords:
                     loose_match_candidates.append((i, 4, 50, para_text, f"被包含: '{para_keywords}' in '{core_keywords}'"))
 
@@ -2435,76 +2363,46 @@ class DocumentStructureParser:
                             loose_match_candidates.append((i, 4.5, score, para_text, f"部分子串{match_ratio:.0%}: '{substr}'"))
                         break
 
-            # Level 5: 相似度匹配（相似度≥60%）
-            if len(core_keywords) >= 4:
-                similarity = calculate_similarity(core_keywords, para_keywords)
+            # Level 5: 相似度匹配（相似度≥60%，上界不足阈值的段落已被索引剪枝）
+            if i in similar_indices:
+                similarity = SequenceMatcher(None, core_keywords, para_keywords).ratio() if para_keywords else 0.0
                 if similarity >= 0.6:
-                    # 🆕 检查章节编号是否匹配（如"第三章"）
-                    title_chapter_match = re.match(r'^第([一二三四五六七八九十\d]+)章', title)
-                    para_chapter_match = re.match(r'^第([一二三四五六七八九十\d]+)章', para_text)
-
-                    if title_chapter_match and para_chapter_match:
-                        # 两者都有章节编号
-                        if title_chapter_match.group(1) == para_chapter_match.group(1):
+                    para_chapter_number = index.chapter_number[i]
+                    if title_chapter_number is not None and para_chapter_number is not None:
+                        if title_chapter_number == para_chapter_number:
                             # 章节编号相同（如都是"第三章"），大幅提高分数
-                            # 这种情况下，即使内容略有不同（如"响应"vs"应答"），也应该优先匹配
                             score = 80 + similarity * 20  # 80-100分
                             loose_match_candidates.append((i, 5, score, para_text, f"章节编号匹配+相似度{similarity:.0%}"))
                         else:
-                            # 章节编号不同，降低分数
                             score = similarity * 30  # 18-30分
                             loose_match_candidates.append((i, 5, score, para_text, f"相似度{similarity:.0%}(编号不同)"))
                     else:
-                        # 普通相似度匹配
                         score = similarity * 60  # 36-60分
                         loose_match_candidates.append((i, 5, score, para_text, f"相似度{similarity:.0%}"))
 
             # Level 6: 宽松关键词匹配（至少6字标题）
-            if len(title_without_number) >= 6:
-                if title_without_number in clean_para:
-                    loose_match_candidates.append((i, 6, 40, para_text, f"包含去编号标题: '{title_without_number}'"))
+            if len(title_without_number) >= 6 and title_without_number in clean_para:
+                loose_match_candidates.append((i, 6, 40, para_text, f"包含去编号标题: '{title_without_number}'"))
 
             # Level 7: 转换编号后匹配
-            def convert_chinese_to_number(text):
-                """将第一/第二/第三等转换为1/2/3"""
-                mapping = {'一': '1', '二': '2', '三': '3', '四': '4', '五': '5',
-                          '六': '6', '七': '7', '八': '8', '九': '9', '十': '10'}
-                match = re.match(r'^第([一二三四五六七八九十]+)部分(.*)$', text)
-                if match:
-                    num = mapping.get(match.group(1), match.group(1))
-                    return f"{num}.{match.group(2)}"
-                return text
-
-            converted_title = convert_chinese_to_number(clean_title)
             if converted_title != clean_title and clean_para.startswith(converted_title[:3]):
-                converted_para_without_num = re.sub(r'^\d+\.', '', clean_para)
-                converted_title_without_num = re.sub(r'^\d+\.', '', converted_title)
-                if converted_title_without_num == converted_para_without_num:
-                    loose_match_candidates.append((i, 7, 30, para_text, f"转换编号后匹配"))
+                if LEADING_DIGIT_NUMBER_RE.sub('', clean_para) == converted_title_without_num:
+                    loose_match_candidates.append((i, 7, 30, para_text, "转换编号后匹配"))
 
-        # 🔑 从候选中选择得分最高的
+        # 🔑 从候选中选择得分最高的（稳定排序，同分保留段落顺序）
         if loose_match_candidates:
-            # 按得分排序
             loose_match_candidates.sort(key=lambda x: x[2], reverse=True)
-            best = loose_match_candidates[0]
-            para_idx, level, score, para_text, reason = best
+            para_idx, level, score, para_text, reason = loose_match_candidates[0]
 
             self.logger.info(f"  ✓ 从 {len(loose_match_candidates)} 个宽松候选中选择最佳匹配:")
             self.logger.info(f"     段落 {para_idx} (Level {level}, 得分{score:.0f}): '{para_text[:60]}'")
             self.logger.info(f"     匹配原因: {reason}")
-
-            # 显示其他候选（前3个）
-            if len(loose_match_candidates) > 1:
-                self.logger.info(f"  其他候选:")
-                for candidate in loose_match_candidates[1:4]:
-                    c_idx, c_level, c_score, c_text, c_reason = candidate
-                    self.logger.info(f"     段落 {c_idx} (Level {c_level}, 得分{c_score:.0f}): '{c_text[:60]}'")
-
             return para_idx
 
         # 未找到任何匹配
         self.logger.warning(f"未找到标题匹配: '{title}'")
         return None
+
     def _locate_chapters_by_toc(self, doc: Document, toc_items: List[Dict], toc_end_idx: int) -> List[ChapterNode]:
         """
         根据目录项定位章节在文档中的位置，并构建树形结构
@@ -2550,9 +2448,11 @@ class DocumentStructureParser:
 
         # 步骤2: 计算每个章节的结束位置
         # ⭐ 关键修复：采用"同级或更高级"逻辑，确保父章节包含所有子章节的内容
+        pidx = get_paragraph_index(doc)
+        total_paras = len(pidx)
         for i, chapter_info in enumerate(all_chapters):
             current_level = chapter_info['level']
-            next_start = len(doc.paragraphs)  # 默认到文档末尾
+            next_start = total_paras  # 默认到文档末尾
 
             # 找下一个同级或更高级的章节（与方法2逻辑保持一致）
             for j in range(i + 1, len(all_chapters)):
@@ -2612,9 +2512,9 @@ class DocumentStructureParser:
                         if cluster_start > para_idx + min_paragraph_gap:
                             # 计算前半部分字数
                             front_content = "\n".join(
-                                doc.paragraphs[j].text.strip()
+                                pidx.stripped[j]
                                 for j in range(para_idx + 1, cluster_start)
-                                if j < len(doc.paragraphs)
+                                if j < total_paras
                             )
                             front_word_count = self._calculate_word_count(front_content)
 
@@ -2722,7 +2622,8 @@ class DocumentStructureParser:
         chapters_sorted = sorted(chapters, key=lambda ch: ch.para_start_idx)
         self.logger.info(f"章节已按段落索引排序，共 {len(chapters_sorted)} 个章节")
 
-        total_paras = len(doc.paragraphs)
+        pidx = get_paragraph_index(doc)
+        total_paras = len(pidx)
 
         # 🆕 用于收集需要插入的合同章节
         contract_chapters_to_insert = []
@@ -2781,9 +2682,9 @@ class DocumentStructureParser:
                 if cluster_start > chapter.para_start_idx + 5:  # 至少跳过5个段落
                     # 计算前半部分的字数
                     front_content = "\n".join(
-                        doc.paragraphs[j].text.strip()
+                        pidx.stripped[j]
                         for j in range(chapter.para_start_idx + 1, cluster_start)
-                        if j < len(doc.paragraphs)
+                        if j < total_paras
                     )
                     front_word_count = self._calculate_word_count(front_content)
 
@@ -2870,25 +2771,15 @@ class DocumentStructureParser:
         Returns:
             (完整内容文本, 预览文本, 是否包含表格)
         """
-        # 构建段落索引到body元素索引的映射
-        para_count = 0
-        start_body_idx = None
-        end_body_idx = None
-
-        for body_idx, element in enumerate(doc.element.body):
-            if isinstance(element, CT_P):
-                if para_count == para_start_idx and start_body_idx is None:
-                    start_body_idx = body_idx
-                if para_count == para_end_idx:
-                    end_body_idx = body_idx
-                    break
-                para_count += 1
+        # 段落索引到body元素索引的映射（共享段落索引，无需每次遍历body）
+        pidx = get_paragraph_index(doc)
+        body_range = pidx.body_range(para_start_idx, para_end_idx)
 
-        if start_body_idx is None:
+        if body_range is None:
             return "", "", False
 
-        if end_body_idx is None:
-            end_body_idx = len(doc.element.body) - 1
+        start_body_idx, end_body_idx = body_range
+        para_idx = para_start_idx  # 当前body元素之前最后一个段落的索引
 
         # 提取内容(跳过章节标题,从start+1开始)
         content_parts = []
@@ -2897,13 +2788,12 @@ class DocumentStructureParser:
         has_table = False  # 标记是否包含表格
 
         for body_idx in range(start_body_idx + 1, end_body_idx + 1):
-            element = doc.element.body[body_idx]
+            element = pidx.body_elements[body_idx]
 
             if isinstance(element, CT_P):
                 # 段落
-                from docx.text.paragraph import Paragraph
-                para = Paragraph(element, doc)
-                text = para.text.strip()
+                para_idx += 1
+                text = pidx.stripped[para_idx]
                 if text:
                     content_parts.append(text)
                     # 添加到预览
@@ -3083,8 +2973,8 @@ class DocumentStructureParser:
 
             chapters = self._flatten_chapters(result["chapters"])
 
-            # 打开文档
-            doc = Document(doc_path)
+            # 读取文档快照（按文件哈希缓存，无需重新打开docx）
+            snapshot = get_document_snapshot(doc_path)
 
             # 提取选中章节的内容
             selected_chapters = []
@@ -3096,8 +2986,7 @@ class DocumentStructureParser:
                     start_idx = chapter_dict["para_start_idx"]
                     end_idx = chapter_dict["para_end_idx"]
 
-                    content_paras = doc.paragraphs[start_idx : end_idx + 1]
-                    content = '\n'.join(p.text for p in content_paras)
+                    content = '\n'.join(snapshot.get_paragraph_texts(start_idx, end_idx))
 
                     selected_chapters.append({
                         "id": chapter_dict["id"],
@@ -3126,7 +3015,7 @@ class DocumentStructureParser:
             }
 
     def export_chapter_to_docx(self, doc_path: str, chapter_id: str,
-                              output_path: str = None) -> Dict:
+                              output_path: str = None, cached_chapters: List[Dict] = None) -> Dict:
         """
         将指定章节导出为独立的Word文档（保留原始格式）
 
@@ -3134,6 +3023,7 @@ class DocumentStructureParser:
             doc_path: 原始Word文档路径
             chapter_id: 章节ID (如 "ch_4")
             output_path: 输出文件路径（可选，默认临时目录）
+            cached_chapters: 缓存的章节列表（可选），如果提供则跳过重新解析
 
         Returns:
             {
@@ -3148,12 +3038,15 @@ class DocumentStructureParser:
             from tempfile import NamedTemporaryFile
             from copy import deepcopy
 
-            # 1. 解析文档结构，定位目标章节
-            result = self.parse_document_structure(doc_path)
-            if not result["success"]:
-                return result
+            # 1. 定位目标章节（优先使用缓存章节，避免重新解析）
+            if cached_chapters:
+                chapters = self._flatten_chapters(cached_chapters)
+            else:
+                result = self.parse_document_structure(doc_path)
+                if not result["success"]:
+                    return result
+                chapters = self._flatten_chapters(result["chapters"])
 
-            chapters = self._flatten_chapters(result["chapters"])
             target_chapter = None
 
             for ch in chapters:
@@ -3167,8 +3060,10 @@ class DocumentStructureParser:
                     "error": f"未找到章节ID: {chapter_id}"
                 }
 
-            # 2. 打开原始文档
+            # 2. 打开原始文档（段落→body位置映射取自文档快照）
+            snapshot = get_document_snapshot(doc_path)
             source_doc = Document(doc_path)
+            source_body = list(source_doc.element.body.iterchildren())
 
             # 3. 创建新文档
             new_doc = Document()
@@ -3178,18 +3073,16 @@ class DocumentStructureParser:
             para_end = target_chapter.get("para_end_idx")
 
             if para_end is None:
-                para_end = len(source_doc.paragraphs) - 1
+                para_end = snapshot.paragraph_count - 1
 
             self.logger.info(f"导出章节: {target_chapter['title']}")
             self.logger.info(f"段落范围: {para_start} - {para_end}")
 
             # 复制段落（使用深拷贝保留格式）
-            for i in range(para_start, min(para_end + 1, len(source_doc.paragraphs))):
-                source_para = source_doc.paragraphs[i]
-
+            for i in range(para_start, min(para_end + 1, snapshot.paragraph_count)):
                 # 使用XML深拷贝（最佳格式保留）
                 # 导入段落的完整XML节点
-                new_para_element = deepcopy(source_para._element)
+                new_para_element = deepcopy(source_body[snapshot.para_body_idx[i]])
                 new_doc.element.body.append(new_para_element)
 
             # 5. 保存到临时文件或指定路径
@@ -3280,13 +3173,15 @@ class DocumentStructureParser:
             if not target_chapters:
                 return {"success": False, "error": "未找到指定章节"}
 
-            # 打开源文档
-            source_doc = Document(doc_path)
-            # 使用源文档作为模板，保留所有样式和页面设置
+            # 段落索引→body索引的映射取自文档快照（按文件哈希缓存）
+            snapshot = get_document_snapshot(doc_path)
+
+            # 使用源文档作为模板，保留所有样式和页面设置（只打开一次）
             new_doc = Document(doc_path)
+            source_body = list(new_doc.element.body.iterchildren())
 
             # 清空模板文档的所有body内容（段落+表格），保留样式定义、页面设置、页眉页脚等
-            for element in list(new_doc.element.body):
+            for element in source_body:
                 element.getparent().remove(element)
 
             chapter_titles = []
@@ -3301,27 +3196,15 @@ class DocumentStructureParser:
 
                 # 复制章节内容（包括段落和表格）
                 para_start = chapter["para_start_idx"]
-                para_end = chapter.get("para_end_idx", len(source_doc.paragraphs) - 1)
-
-                # 构建段落索引到body索引的映射
-                para_count = 0
-                start_body_idx = None
-                end_body_idx = None
-
-                for body_idx, element in enumerate(source_doc.element.body):
-                    if isinstance(element, CT_P):
-                        if para_count == para_start and start_body_idx is None:
-                            start_body_idx = body_idx
-                        if para_count == para_end:
-                            end_body_idx = body_idx
-                            break
-                        para_count += 1
+                para_end = chapter.get("para_end_idx", snapshot.paragraph_count - 1)
+
+                body_range = snapshot.body_range_for_paragraphs(para_start, para_end)
 
                 # 复制范围内的所有元素（段落+表格）
-                if start_body_idx is not None and end_body_idx is not None:
+                if body_range is not None:
+                    start_body_idx, end_body_idx = body_range
                     for body_idx in range(start_body_idx, end_body_idx + 1):
-                        element = source_doc.element.body[body_idx]
-                        new_element = deepcopy(element)
+                        new_element = deepcopy(source_body[body_idx])
                         new_doc.element.body.append(new_element)
 
             # 保存到临时文件
@@ -3423,14 +3306,14 @@ class DocumentStructureParser:
             scan_start = max(toc_end_idx + 1, para_idx - 10)
         else:
             scan_start = max(0, para_idx - 10)
-        scan_end = min(len(doc.paragraphs), para_idx + 20)
+        pidx = get_paragraph_index(doc)
+        scan_end = min(len(pidx), para_idx + 20)
 
         # 收集与TOC匹配的段落
         toc_matched_paras = []
 
         for i in range(scan_start, scan_end):
-            para = doc.paragraphs[i]
-            text = para.text.strip()
+            text = pidx.stripped[i]
 
             # 只检查短文本（可能是标题）
             if not text or len(text) > 50:
@@ -3497,7 +3380,7 @@ class DocumentStructureParser:
 
             # 计算两个标题之间的内容字数
             content_chars = sum(
-                len(doc.paragraphs[k].text.strip())
+                len(pidx.stripped[k])
                 for k in range(start_idx + 1, end_idx)
             )
 
@@ -3513,8 +3396,7 @@ class DocumentStructureParser:
             # 示例：连续的Heading 1段落 = 真正章节
             #       连续的Normal样式 = 元数据列表（文件构成说明）
             all_headings = all(
-                doc.paragraphs[idx].style and
-                ('heading' in doc.paragraphs[idx].style.name.lower() or '标题' in doc.paragraphs[idx].style.name.lower())
+                pidx.is_heading_style(idx)
                 for idx, _, _ in target_group
             )
 
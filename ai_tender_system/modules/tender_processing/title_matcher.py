@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+标题匹配索引 - 目录项到正文段落的快速定位
+
+DocumentStructureParser 定位目录项时，原实现对每个目录项从 start_idx 扫描到文档末尾，
+每个段落都重新执行规范化正则和 SequenceMatcher，复杂度 O(段落数 × 目录项数)。
+
+TitleMatchIndex 对每个文档只构建一次：
+1. 缓存每个段落的各级规范化形式（去空白 / 激进规范化 / 核心关键词 / 去编号）
+2. 规范化文本 → 段落索引 的哈希表，用于完全匹配
+3. 字符二元组(bigram)倒排索引，用于"包含匹配"的候选生成
+4. 关键词字符计数倒排索引，用于相似度匹配的上界剪枝（quick_ratio）
+
+索引只负责生成候选段落，匹配级别的判定逻辑仍由 structure_parser 按原有语义执行。
+"""
+
+import re
+import threading
+import weakref
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Set
+
+from common.paragraph_index import ParagraphIndex, get_paragraph_index
+
+# 编号前缀（第X部分、第X章、1.、1.1、一、）
+NUMBER_PREFIX_RE = re.compile(r'^(第[一二三四五六七八九十\d]+部分|第[一二三四五六七八九十\d]+章|\d+\.|\d+\.\d+|[一二三四五六七八九十]+、)\s*')
+PART_NUMBER_RE = re.compile(r'第[一二三四五六七八九十\d]+部分')
+CHAPTER_NUMBER_RE = re.compile(r'^第([一二三四五六七八九十\d]+)章')
+PRIMARY_CHAPTER_RE = re.compile(r'^第[一二三四五六七八九十百千\d]+[章部分]')
+LEADING_DIGIT_NUMBER_RE = re.compile(r'^\d+\.')
+
+_ATTACHMENT_PREFIX_RE = re.compile(r'^附件[-:：]?')
+_SEPARATOR_RE = re.compile(r'[-_\t]+')
+_COLON_SPACE_RE = re.compile(r'[:：\s]+')
+_KEYWORD_CHAPTER_RE = re.compile(r'^(第[一二三四五六七八九十\d]+部分|第[一二三四五六七八九十\d]+章)[:：\s]*')
+_KEYWORD_NUMBER_RE = re.compile(r'^(\d+\.|\d+\.\d+|[一二三四五六七八九十]+、)\s*')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+# 相似度匹配阈值（与 structure_parser 的 Level 5 一致）
+SIMILARITY_THRESHOLD = 0.6
+
+
+def aggressive_normalize(text: str) -> str:
+    """激进文本规范化：移除所有分隔符、前缀、空格"""
+    text = _ATTACHMENT_PREFIX_RE.sub('', text)
+    text = _SEPARATOR_RE.sub('', text)
+    return _COLON_SPACE_RE.sub('', text)
+
+
+def extract_core_keywords(text: str) -> str:
+    """提取核心关键词：去除编号和常见前缀"""
+    text = _KEYWORD_CHAPTER_RE.sub('', text)
+    text = _KEYWORD_NUMBER_RE.sub('', text)
+    text = _ATTACHMENT_PREFIX_RE.sub('', text)
+    text = _SEPARATOR_RE.sub('', text)
+    return _COLON_SPACE_RE.sub('', text)
+
+
+def strip_number_prefix(text: str) -> str:
+    """去除编号前缀（用于 Level 3 / Level 6 去编号匹配）"""
+    return NUMBER_PREFIX_RE.sub('', text)
+
+
+def convert_chinese_part_number(text: str) -> str:
+    """将"第一部分xxx"转换为"1.xxx"（用于 Level 7 转换编号后匹配）"""
+    mapping = {'一': '1', '二': '2', '三': '3', '四': '4', '五': '5',
+               '六': '6', '七': '7', '八': '8', '九': '9', '十': '10'}
+    match = re.match(r'^第([一二三四五六七八九十]+)部分(.*)$', text)
+    if match:
+        num = mapping.get(match.group(1), match.group(1))
+        return f"{num}.{match.group(2)}"
+    return text
+
+
+class TitleMatchIndex:
+    """文档级标题匹配索引（段落索引与 doc.paragraphs 一致）"""
+
+    def __init__(self, paragraph_index: ParagraphIndex):
+        """
+        构建标题匹配索引
+
+        Args:
+            paragraph_index: 文档的共享段落索引
+        """
+        self.pidx = paragraph_index
+        total = len(paragraph_index)
+
+        # 逐段落缓存的规范化形式（空段落保持空字符串，不进入任何索引）
+        self.texts: List[str] = paragraph_index.stripped
+        self.clean: List[str] = paragraph_index.normalized
+        self.aggressive: List[str] = [''] * total
+        self.keywords: List[str] = [''] * total
+        self.without_number: List[str] = [''] * total
+        self.has_part_number: List[bool] = [False] * total
+        self.chapter_number: List[Optional[str]] = [None] * total
+        self.is_heading: List[bool] = [False] * total
+
+        # 非空段落（按索引升序）
+        self.non_empty: List[int] = []
+
+        # 完全匹配哈希表
+        self._by_clean: Dict[str, List[int]] = defaultdict(list)
+        self._by_aggressive: Dict[str, List[int]] = defaultdict(list)
+        self._by_without_number: Dict[str, List[int]] = defaultdict(list)
+        self._by_keywords: Dict[str, List[int]] = defaultdict(list)
+        self._by_digit_stripped: Dict[str, List[int]] = defaultdict(list)
+
+        for i in range(total):
+            para_text = self.texts[i]
+            if not para_text:
+                continue
+            self.non_empty.append(i)
+
+            clean_para = self.clean[i]
+            aggressive_para = aggressive_normalize(para_text)
+            para_keywords = extract_core_keywords(aggressive_para)
+            without_number = strip_number_prefix(clean_para)
+            chapter_match = CHAPTER_NUMBER_RE.match(para_text)
+
+            self.aggressive[i] = aggressive_para
+            self.keywords[i] = para_keywords
+            self.without_number[i] = without_number
+            self.has_part_number[i] = bool(PART_NUMBER_RE.search(para_text))
+            self.chapter_number[i] = chapter_match.group(1) if chapter_match else None
+            self.is_heading[i] = paragraph_index.is_heading_style(i)
+
+            self._by_clean[clean_para].append(i)
+            self._by_aggressive[aggressive_para].append(i)
+            self._by_keywords[para_keywords].append(i)
+            if without_number:
+                self._by_without_number[without_number].append(i)
+            self._by_digit_stripped[LEADING_DIGIT_NUMBER_RE.sub('', clean_para)].append(i)
+
+        # 二元组倒排索引 / 关键词字符计数索引按需构建
+        self._bigram_postings: Dict[str, Dict[str, List[int]]] = {}
+        self._char_postings: Optional[Dict[str, tuple]] = None
+        self._build_lock = threading.Lock()
+
+    # ----------------------------------------------------------------
+    # 倒排索引
+    # ----------------------------------------------------------------
+
+    def _get_bigram_postings(self, field: str) -> Dict[str, List[int]]:
+        """获取指定字段（clean / aggressive / keywords）的二元组倒排索引"""
+        postings = self._bigram_postings.get(field)
+        if postings is not None:
+            return postings
+
+        with self._build_lock:
+            postings = self._bigram_postings.get(field)
+            if postings is None:
+                values = getattr(self, field)
+                postings = defaultdict(list)
+                for i in self.non_empty:
+                    value = values[i]
+                    for gram in {value[k:k + 2] for k in range(len(value) - 1)}:
+                        postings[gram].append(i)
+                self._bigram_postings[field] = postings
+        return postings
+
+    def _get_char_postings(self) -> Dict[str, tuple]:
+        """关键词字符计数倒排索引：字符 → (段落索引列表, 出现次数列表)"""
+        if self._char_postings is not None:
+            return self._char_postings
+
+        with self._build_lock:
+            if self._char_postings is None:
+                postings = defaultdict(lambda: ([], []))
+                for i in self.non_empty:
+                    for char, count in Counter(self.keywords[i]).items():
+                        idx_list, count_list = postings[char]
+                        idx_list.append(i)
+                        count_list.append(count)
+                self._char_postings = dict(postings)
+        return self._char_postings
+
+    def _non_empty_from(self, start_idx: int) -> List[int]:
+        return self.non_empty[bisect_left(self.non_empty, start_idx):]
+
+    @staticmethod
+    def _from(indices: List[int], start_idx: int) -> List[int]:
+        return indices[bisect_left(indices, start_idx):]
+
+    # ----------------------------------------------------------------
+    # 候选生成
+    # ----------------------------------------------------------------
+
+    def find_equal(self, field: str, value: str, start_idx: int = 0) -> List[int]:
+        """字段值完全相等的段落（field: clean / aggressive / keywords / without_number / digit_stripped）"""
+        table = getattr(self, f'_by_{field}')
+        indices = table.get(value)
+        return self._from(indices, start_idx) if indices else []
+
+    def find_containing(self, field: str, query: str, start_idx: int = 0) -> List[int]:
+        """
+        字段值包含 query 的非空段落（升序）
+
+        以 query 中最稀有的二元组的倒排表作为候选，再做子串校验。
+        """
+        values = getattr(self, field)
+        if len(query) < 2:
+            # 空串/单字查询：直接校验（极少出现）
+            return [i for i in self._non_empty_from(start_idx) if query in values[i]]
+
+        postings = self._get_bigram_postings(field)
+        rarest = None
+        for k in range(len(query) - 1):
+            indices = postings.get(query[k:k + 2])
+            if not indices:
+                return []
+            if rarest is None or len(indices) < len(rarest):
+                rarest = indices
+
+        return [i for i in self._from(rarest, start_idx) if query in values[i]]
+
+    def find_keyword_substrings(self, core_keywords: str, min_len: int = 4, start_idx: int = 0) -> Set[int]:
+        """关键词为 core_keywords 子串（长度≥min_len）的段落"""
+        result = set()
+        length = len(core_keywords)
+        seen = set()
+        for sub_len in range(min_len, length + 1):
+            for k in range(length - sub_len + 1):
+                sub = core_keywords[k:k + sub_len]
+                if sub in seen:
+                    continue
+                seen.add(sub)
+                indices = self._by_keywords.get(sub)
+                if indices:
+                    result.update(self._from(indices, start_idx))
+        return result
+
+    def find_similar_keywords(self, core_keywords: str, start_idx: int = 0,
+                              threshold: float = SIMILARITY_THRESHOLD) -> Set[int]:
+        """
+        关键词相似度可能达到阈值的段落
+
+        使用字符多重集交集作为匹配字符数上界（即 SequenceMatcher.quick_ratio），
+        上界低于阈值的段落相似度必然低于阈值，可以安全剪枝。
+        """
+        if not core_keywords:
+            return set()
+
+        char_postings = self._get_char_postings()
+        overlap = defaultdict(int)
+        for char, title_count in Counter(core_keywords).items():
+            entry = char_postings.get(char)
+            if entry is None:
+                continue
+            idx_list, count_list = entry
+            for pos in range(bisect_left(idx_list, start_idx), len(idx_list)):
+                count = count_list[pos]
+                overlap[idx_list[pos]] += count if count < title_count else title_count
+
+        title_len = len(core_keywords)
+        keywords = self.keywords
+        return {
+            i for i, matches in overlap.items()
+            if 2.0 * matches / (title_len + len(keywords[i])) >= threshold
+        }
+
+
+_index_cache: 'weakref.WeakKeyDictionary' = weakref.WeakKeyDictionary()
+_index_cache_lock = threading.Lock()
+
+
+def get_title_match_index(doc) -> TitleMatchIndex:
+    """获取文档的标题匹配索引（随共享段落索引重建而重建）"""
+    pidx = get_paragraph_index(doc)
+    with _index_cache_lock:
+        index = _index_cache.get(pidx)
+    if index is None:
+        index = TitleMatchIndex(pidx)
+        with _index_cache_lock:
+            _index_cache[pidx] = index
+    return index
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文本向量持久化缓存
+
+同一模型对同一文本的向量是确定的。知识库重新向量化（例如处理中途崩溃后重跑）、
+能力提取与能力搜索反复嵌入相同文本时，直接从缓存读取，只对新增或修改过的文本调用 API。
+
+- 键：(模型, 规范化文本的 SHA-256)；规范化 = 去首尾空白 + 连续空白合并为一个空格
+- 值：float32 向量的原始字节（BLOB），读取时按维度还原
+- 存储：SQLite（共享连接池，WAL），默认 data/embedding_cache.db
+- 容量：超过最大条目数时按最近访问时间（LRU）淘汰
+
+配置（环境变量）：
+    EMBEDDING_CACHE_ENABLED      总开关，默认 true
+    EMBEDDING_CACHE_PATH         缓存数据库路径，默认 data/embedding_cache.db
+    EMBEDDING_CACHE_MAX_ENTRIES  最大条目数，默认 500000
+"""
+
+import hashlib
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+
+import sys
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from common.config import get_config
+from common.db_pool import get_pooled_connection
+from common.logger import get_module_logger
+
+logger = get_module_logger("vector_engine.embedding_cache")
+
+CACHE_ENABLED = os.getenv('EMBEDDING_CACHE_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+CACHE_PATH = os.getenv('EMBEDDING_CACHE_PATH', '')
+CACHE_MAX_ENTRIES = int(os.getenv('EMBEDDING_CACHE_MAX_ENTRIES', '500000'))
+
+# 每写入多少条检查一次容量
+EVICT_EVERY = 1000
+# SQLite 默认变量上限 999，IN 查询分批
+QUERY_BATCH = 500
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS embedding_cache (
+    model TEXT NOT NULL,
+    text_hash TEXT NOT NULL,
+    dimensions INTEGER NOT NULL,
+    vector BLOB NOT NULL,
+    created_at REAL NOT NULL,
+    last_access REAL NOT NULL,
+    PRIMARY KEY (model, text_hash)
+);
+CREATE INDEX IF NOT EXISTS idx_embedding_cache_last_access ON embedding_cache(last_access);
+"""
+
+
+def normalize_text(text: str) -> str:
+    """规范化文本（去首尾空白，合并连续空白）"""
+    return ' '.join((text or '').split())
+
+
+def text_hash(text: str) -> str:
+    """规范化文本的 SHA-256"""
+    return hashlib.sha256(normalize_text(text).encode('utf-8')).hexdigest()
+
+
+class EmbeddingCache:
+    """基于 SQLite 的文本向量缓存"""
+
+    def __init__(self, db_path: Optional[str] = None, enabled: bool = CACHE_ENABLED,
+                 max_entries: int = CACHE_MAX_ENTRIES):
+        """
+        Args:
+            db_path: 缓存数据库路径，None 使用 data/embedding_cache.db
+            enabled: 总开关
+            max_entries: 最大条目数
+        """
+        self.db_path = str(db_path or CACHE_PATH or get_config().get_path('data') / 'embedding_cache.db')
+        self.enabled = enabled
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._writes_since_evict = 0
+        self._schema_ready = False
+        self.stats = {'hits': 0, 'misses': 0, 'stores': 0}
+
+    def get_many(self, model: str, hashes: Iterable[str]) -> Dict[str, np.ndarray]:
+        """批量读取向量，返回 {text_hash: 向量}（未命中的不在结果中）"""
+        hashes = list(dict.fromkeys(hashes))
+        if not self.enabled or not hashes:
+            return {}
+
+        found: Dict[str, np.ndarray] = {}
+        try:
+            conn = self._connect()
+            try:
+                for start in range(0, len(hashes), QUERY_BATCH):
+                    batch = hashes[start:start + QUERY_BATCH]
+                    placeholders = ','.join('?' * len(batch))
+                    rows = conn.execute(
+                        f"SELECT text_hash, dimensions, vector FROM embedding_cache "
+                        f"WHERE model = ? AND text_hash IN ({placeholders})",
+                        (model, *batch)
+                    ).fetchall()
+                    for key, dimensions, blob in rows:
+                        vector = np.frombuffer(blob, dtype=np.float32)
+                        if vector.shape[0] == dimensions:
+                            found[key] = vector
+
+                if found:
+                    now = time.time()
+                    conn.executemany(
+                        "UPDATE embedding_cache SET last_access = ? WHERE model = ? AND text_hash = ?",
+                        [(now, model, key) for key in found]
+                    )
+                    conn.commit()
+            finally:
+                conn.close()
+        except Exception as e:
+            logger.warning(f"读取向量缓存失败: {e}")
+            return {}
+
+        with self._lock:
+            self.stats['hits'] += len(found)
+            self.stats['misses'] += len(hashes) - len(found)
+        return found
+
+    def put_many(self, model: str, vectors: Dict[str, np.ndarray]):
+        """批量写入向量"""
+        if not self.enabled or not vectors:
+            return
+        now = time.time()
+        rows = []
+        for key, vector in vectors.items():
+            vector = np.asarray(vector, dtype=np.float32).ravel()
+            rows.append((model, key, vector.shape[0], vector.tobytes(), now, now))
+
+        try:
+            conn = self._connect()
+            try:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO embedding_cache "
+                    "(model, text_hash, dimensions, vector, created_at, last_access) VALUES (?, ?, ?, ?, ?, ?)",
+                    rows
+                )
+                conn.commit()
+
+                with self._lock:
+                    self.stats['stores'] += len(rows)
+                    self._writes_since_evict += len(rows)
+                    evict = self._writes_since_evict >= EVICT_EVERY
+                    if evict:
+                        self._writes_since_evict = 0
+                if evict:
+                    self._evict(conn)
+            finally:
+                conn.close()
+        except Exception as e:
+            logger.warning(f"写入向量缓存失败: {e}")
+
+    def _evict(self, conn):
+        """按最近访问时间淘汰超出容量的条目"""
+        removed = conn.execute(
+            "DELETE FROM embedding_cache WHERE rowid IN ("
+            "SELECT rowid FROM embedding_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,)
+        ).rowcount
+        conn.commit()
+        if removed:
+            logger.info(f"向量缓存淘汰 {removed} 条")
+
+    def clear(self, model: Optional[str] = None):
+        """清空缓存（可只清空指定模型）"""
+        conn = self._connect()
+        try:
+            if model:
+                conn.execute("DELETE FROM embedding_cache WHERE model = ?", (model,))
+            else:
+                conn.execute("DELETE FROM embedding_cache")
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _connect(self):
+        if not self._schema_ready:
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+            conn = get_pooled_connection(self.db_path)
+            try:
+                conn.executescript(SCHEMA_SQL)
+            finally:
+                conn.close()
+            self._schema_ready = True
+        return get_pooled_connection(self.db_path)
+
+
+_cache: Optional[EmbeddingCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """获取进程内共享的向量缓存"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = EmbeddingCache()
+    return _cache
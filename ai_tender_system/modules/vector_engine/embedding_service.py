@@ -3,11 +3,20 @@
 """
 文本嵌入服务 - API版本
 使用OpenAI Embeddings API代替本地模型
+
+- 持久化缓存：按 (模型, 规范化文本哈希) 缓存 float32 向量（见 embedding_cache），只嵌入未缓存的文本
+- 批内去重：同一批中重复的文本只请求一次
+- 并发分批：多个批次并发请求，并发数受信号量限制
+- 同步接口：embed_texts_sync 供 Flask 请求线程、能力提取/搜索等同步代码使用
+
+配置（环境变量）：
+    EMBEDDING_MAX_CONCURRENCY  并发请求的批次数，默认 4
 """
 
 import asyncio
 import numpy as np
-from typing import List, Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Tuple
 from dataclasses import dataclass
 import time
 import os
@@ -21,10 +30,16 @@ sys.path.insert(0, str(project_root))
 
 from common.logger import get_module_logger
 from common.config import clean_env_value
+from common.http_pool import http_post
+from common.rate_limiter import ModelRateLimiter, parse_retry_after
 import requests
 
+from .embedding_cache import get_embedding_cache, text_hash
+
 logger = get_module_logger("vector_engine.embedding")
 
+MAX_CONCURRENCY = int(os.getenv("EMBEDDING_MAX_CONCURRENCY", "4"))
+
 
 @dataclass
 class EmbeddingResult:
@@ -34,6 +49,8 @@ class EmbeddingResult:
     model_used: str
     text_count: int
     dimensions: int
+    cache_hits: int = 0      # 从缓存读取的文本数（去重后）
+    api_texts: int = 0       # 实际请求 API 的文本数（去重后）
 
 
 class EmbeddingService:
@@ -75,8 +92,12 @@ class EmbeddingService:
     }
 
     def __init__(self, model_type: str = None, api_key: Optional[str] = None,
-                 api_endpoint: Optional[str] = None, **kwargs):
+                 api_endpoint: Optional[str] = None, max_concurrency: int = MAX_CONCURRENCY,
+                 cache=None, **kwargs):
         self.logger = logger
+        self.max_concurrency = max(1, max_concurrency)
+        # 向量缓存（None 使用进程共享的 data/embedding_cache.db）
+        self.cache = cache if cache is not None else get_embedding_cache()
 
         # 从环境变量读取默认模型类型
         default_model = os.getenv("EMBEDDING_MODEL", "text-embedding-v3")
@@ -116,12 +137,18 @@ class EmbeddingService:
         self.provider = provider
         self.initialized = False
 
+        # 跨线程/进程共享的限流配额（默认不限速率，仍共享 429 暂停）
+        self.rate_limiter = ModelRateLimiter(self.model_type, {"model_name": self.model_config["model_name"]},
+                                             self.api_endpoint)
+
         # 性能统计
         self.stats = {
             "total_embeddings": 0,
             "total_tokens": 0,
             "avg_processing_time": 0.0,
-            "api_calls": 0
+            "api_calls": 0,
+            "cache_hits": 0,
+            "deduplicated": 0
         }
 
     async def initialize(self) -> bool:
@@ -132,11 +159,11 @@ class EmbeddingService:
 
             self.logger.info(f"初始化嵌入服务: model={self.model_type}, endpoint={self.api_endpoint}")
 
-            # 测试API连接
-            test_result = await self.embed_texts(["测试"], batch_size=1)
-            if test_result.vectors.shape[0] > 0:
+            # 测试API连接（不经过缓存）
+            test_vectors = await self._embed_batch(["测试"])
+            if test_vectors.shape[0] > 0:
                 self.initialized = True
-                self.logger.info(f"嵌入服务初始化成功: dimensions={test_result.dimensions}")
+                self.logger.info(f"嵌入服务初始化成功: dimensions={test_vectors.shape[1]}")
                 return True
             else:
                 raise RuntimeError("API测试失败")
@@ -157,51 +184,121 @@ class EmbeddingService:
             EmbeddingResult: 嵌入结果
         """
         if not texts:
-            return EmbeddingResult(
-                vectors=np.array([]),
-                processing_time=0.0,
-                model_used=self.model_type,
-                text_count=0,
-                dimensions=0
-            )
+            return self._empty_result()
 
         self.logger.info(f"开始文本嵌入: texts={len(texts)}, batch_size={batch_size}")
         start_time = time.time()
 
         try:
-            # 预处理文本
-            processed_texts = self._preprocess_texts(texts)
+            keys, known, missing = self._lookup(texts)
 
-            # 批量处理
-            if len(processed_texts) <= batch_size:
-                # 单批处理
-                vectors = await self._embed_batch(processed_texts)
-            else:
-                # 多批处理
-                vectors = await self._embed_large_batch(processed_texts, batch_size)
+            fetched = None
+            if missing:
+                missing_texts = list(missing.values())
+                if len(missing_texts) <= batch_size:
+                    # 单批处理
+                    fetched = await self._embed_batch(missing_texts)
+                else:
+                    # 多批并发处理
+                    fetched = await self._embed_large_batch(missing_texts, batch_size)
 
-            processing_time = time.time() - start_time
+            return self._assemble(keys, known, missing, fetched, start_time)
+
+        except Exception as e:
+            self.logger.error(f"文本嵌入失败: {e}")
+            raise
+
+    def embed_texts_sync(self, texts: List[str], batch_size: int = 100) -> EmbeddingResult:
+        """
+        同步批量文本嵌入（缓存、去重、并发策略与 embed_texts 相同）
 
-            # 更新统计信息
-            self._update_stats(len(texts), processing_time)
+        供 Flask 请求线程、能力提取/搜索等同步代码使用，不创建事件循环。
+        """
+        if not texts:
+            return self._empty_result()
 
-            result = EmbeddingResult(
-                vectors=vectors,
-                processing_time=processing_time,
-                model_used=self.model_type,
-                text_count=len(texts),
-                dimensions=vectors.shape[1] if len(vectors) > 0 else 0
-            )
+        start_time = time.time()
+        try:
+            keys, known, missing = self._lookup(texts)
 
-            self.logger.info(f"文本嵌入完成: vectors_shape={vectors.shape}, "
-                           f"time={processing_time:.2f}s")
+            fetched = None
+            if missing:
+                missing_texts = list(missing.values())
+                batches = [missing_texts[i:i + batch_size] for i in range(0, len(missing_texts), batch_size)]
+                if len(batches) == 1:
+                    fetched = self._call_embedding_api(batches[0])
+                else:
+                    with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(batches))) as executor:
+                        fetched = np.vstack(list(executor.map(self._call_embedding_api, batches)))
 
-            return result
+            return self._assemble(keys, known, missing, fetched, start_time)
 
         except Exception as e:
             self.logger.error(f"文本嵌入失败: {e}")
             raise
 
+    def _empty_result(self) -> EmbeddingResult:
+        return EmbeddingResult(
+            vectors=np.array([]),
+            processing_time=0.0,
+            model_used=self.model_type,
+            text_count=0,
+            dimensions=0
+        )
+
+    def _lookup(self, texts: List[str]) -> Tuple[List[str], Dict[str, np.ndarray], Dict[str, str]]:
+        """
+        预处理并查询缓存
+
+        Returns:
+            keys: 每个文本的缓存键（与 texts 一一对应）
+            known: 已缓存的向量 {键: 向量}
+            missing: 需要请求 API 的文本 {键: 预处理后的文本}（已去重）
+        """
+        processed_texts = self._preprocess_texts(texts)
+        keys = [text_hash(text) for text in processed_texts]
+
+        unique: Dict[str, str] = {}
+        for key, text in zip(keys, processed_texts):
+            unique.setdefault(key, text)
+
+        known = self.cache.get_many(self.model_type, unique.keys())
+        missing = {key: text for key, text in unique.items() if key not in known}
+        return keys, known, missing
+
+    def _assemble(self, keys: List[str], known: Dict[str, np.ndarray], missing: Dict[str, str],
+                  fetched: Optional[np.ndarray], start_time: float) -> EmbeddingResult:
+        """写入缓存并按原始顺序组装结果"""
+        vectors_by_key = dict(known)
+        if missing:
+            if fetched is None or fetched.shape[0] != len(missing):
+                raise RuntimeError(f"嵌入结果数量不匹配: 期望 {len(missing)}, "
+                                   f"实际 {0 if fetched is None else fetched.shape[0]}")
+            new_vectors = dict(zip(missing.keys(), fetched))
+            self.cache.put_many(self.model_type, new_vectors)
+            vectors_by_key.update(new_vectors)
+
+        vectors = np.stack([vectors_by_key[key] for key in keys]).astype(np.float32, copy=False)
+        processing_time = time.time() - start_time
+
+        # 更新统计信息
+        self._update_stats(len(keys), processing_time)
+        self.stats["cache_hits"] += len(known)
+        self.stats["deduplicated"] += len(keys) - len(known) - len(missing)
+
+        self.logger.info(f"文本嵌入完成: vectors_shape={vectors.shape}, 缓存命中={len(known)}, "
+                         f"请求API={len(missing)}, time={processing_time:.2f}s")
+
+        return EmbeddingResult(
+            vectors=vectors,
+            processing_time=processing_time,
+            model_used=self.model_type,
+            text_count=len(keys),
+            dimensions=vectors.shape[1],
+            cache_hits=len(known),
+            api_texts=len(missing)
+        )
+
     async def _embed_batch(self, texts: List[str]) -> np.ndarray:
         """单批嵌入 - 调用API"""
         loop = asyncio.get_event_loop()
@@ -220,12 +317,15 @@ class EmbeddingService:
         }
 
         try:
-            response = requests.post(
-                self.api_endpoint,
-                headers=headers,
-                json=payload,
-                timeout=self.timeout
-            )
+            with self.rate_limiter.slot():
+                response = http_post(
+                    self.api_endpoint,
+                    headers=headers,
+                    json=payload,
+                    timeout=self.timeout
+                )
+            if response.status_code == 429:
+                self.rate_limiter.throttled(parse_retry_after(response.headers.get('Retry-After')))
             response.raise_for_status()
 
             data = response.json()
@@ -246,21 +346,21 @@ class EmbeddingService:
             raise
 
     async def _embed_large_batch(self, texts: List[str], batch_size: int) -> np.ndarray:
-        """大批量分批嵌入"""
-        all_vectors = []
-
-        for i in range(0, len(texts), batch_size):
-            batch = texts[i:i + batch_size]
-            batch_vectors = await self._embed_batch(batch)
-            all_vectors.append(batch_vectors)
-
+        """大批量分批并发嵌入（并发数受 max_concurrency 限制，速率由共享限流器控制）"""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        done = 0
+
+        async def run(batch: List[str]) -> np.ndarray:
+            nonlocal done
+            async with semaphore:
+                batch_vectors = await self._embed_batch(batch)
             # 记录进度
-            progress = (i + len(batch)) / len(texts) * 100
-            self.logger.info(f"嵌入进度: {progress:.1f}% ({i + len(batch)}/{len(texts)})")
+            done += len(batch)
+            self.logger.info(f"嵌入进度: {done / len(texts) * 100:.1f}% ({done}/{len(texts)})")
+            return batch_vectors
 
-            # 短暂延迟避免API速率限制
-            if i + batch_size < len(texts):
-                await asyncio.sleep(0.1)
+        batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+        all_vectors = await asyncio.gather(*(run(batch) for batch in batches))
 
         return np.vstack(all_vectors) if all_vectors else np.array([])
 
@@ -66,7 +66,7 @@ class VectorEngineManager:
             "vector_store": {
                 "store_path": "data/vector_store",
                 "dimension": 384,
-                "index_type": "flat"
+                "index_type": "auto"
             },
             "search": {
                 "default_top_k": 10,
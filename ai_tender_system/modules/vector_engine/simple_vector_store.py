@@ -3,6 +3,19 @@
 """
 简化版向量存储
 用于开发和测试阶段的向量索引和检索
+
+存储结构（store_path 下）：
+- vectors.npy       压缩后的基础向量矩阵（float32，已归一化），启动时内存映射加载
+- documents.jsonl   与 vectors.npy 逐行对应的文档内容与元数据
+- segments.f32      追加写入的新向量（float32 原始字节）
+- segments.jsonl    追加写入的操作日志（add / delete）
+- metadata.json     统计信息
+
+新增和删除只追加日志，耗时与批量大小成正比；追加的行数超过基础矩阵（且不少于
+COMPACT_MIN_ROWS）时压缩为新的 vectors.npy / documents.jsonl。旧版 data.pkl 在首次加载时迁移。
+
+检索：查询向量归一化后与矩阵做一次矩阵-向量乘法，argpartition 取 top-k；
+元数据过滤先通过倒排索引（字段 -> 值 -> 行号）得到候选行，只对候选行打分。
 """
 
 import os
@@ -48,9 +61,23 @@ class SimpleSearchResult:
     rank: int
 
 
+def _index_key(value: Any) -> Any:
+    """元数据值在倒排索引中的键（不可哈希的值按 JSON 序列化）"""
+    try:
+        hash(value)
+        return value
+    except TypeError:
+        return json.dumps(value, ensure_ascii=False, sort_keys=True)
+
+
 class SimpleVectorStore:
     """简化版向量存储"""
 
+    # 追加行数达到该值（且超过基础矩阵行数）时压缩
+    COMPACT_MIN_ROWS = 10000
+    # 追加缓冲区初始容量（之后按两倍扩容）
+    INITIAL_CAPACITY = 64
+
     def __init__(self, store_path: str = "data/simple_vector_store", dimension: int = 100):
         self.logger = logger
         self.store_path = Path(store_path)
@@ -61,12 +88,25 @@ class SimpleVectorStore:
 
         # 文档存储
         self.documents: Dict[str, SimpleVectorDocument] = {}
-        self.vectors: np.ndarray = np.array([]).reshape(0, dimension)
-        self.document_ids: List[str] = []
+
+        # 向量矩阵：基础部分（内存映射，只读）+ 追加部分（按两倍扩容的缓冲区）
+        self._base = np.zeros((0, dimension), dtype=np.float32)
+        self._tail = np.zeros((self.INITIAL_CAPACITY, dimension), dtype=np.float32)
+        self._tail_size = 0
+        # 行号 -> 文档ID（已删除的行为 None），文档ID -> 行号
+        self._row_ids: List[Optional[str]] = []
+        self._id_to_row: Dict[str, int] = {}
+        self._alive = np.zeros(self.INITIAL_CAPACITY, dtype=bool)
+        # 元数据倒排索引：字段 -> 值 -> 行号集合
+        self._meta_index: Dict[str, Dict[Any, set]] = {}
 
         # 存储文件
-        self.data_file = self.store_path / "data.pkl"
+        self.vectors_file = self.store_path / "vectors.npy"
+        self.documents_file = self.store_path / "documents.jsonl"
+        self.segment_vectors_file = self.store_path / "segments.f32"
+        self.segment_log_file = self.store_path / "segments.jsonl"
         self.metadata_file = self.store_path / "metadata.json"
+        self.data_file = self.store_path / "data.pkl"  # 旧版格式
 
         # 统计信息
         self.stats = {
@@ -76,6 +116,19 @@ class SimpleVectorStore:
             "avg_search_time": 0.0
         }
 
+    # ---------- 兼容属性 ----------
+
+    @property
+    def document_ids(self) -> List[str]:
+        """按添加顺序排列的文档ID"""
+        return [doc_id for doc_id in self._row_ids if doc_id is not None]
+
+    @property
+    def vectors(self) -> np.ndarray:
+        """全部有效文档的（归一化）向量矩阵"""
+        rows = np.flatnonzero(self._alive[:len(self._row_ids)])
+        return self._gather(rows)
+
     async def initialize(self) -> bool:
         """初始化向量存储"""
         try:
@@ -91,32 +144,26 @@ class SimpleVectorStore:
             self.logger.error(f"向量存储初始化失败: {e}")
             return False
 
-    async def _load_data(self):
-        """加载数据"""
-        if self.data_file.exists():
-            try:
-                with open(self.data_file, 'rb') as f:
-                    data = pickle.load(f)
-                    self.documents = data.get('documents', {})
-                    self.document_ids = data.get('document_ids', [])
-
-                # 重建向量矩阵
-                if self.documents:
-                    vectors = []
-                    for doc_id in self.document_ids:
-                        if doc_id in self.documents:
-                            vectors.append(self.documents[doc_id].vector)
+    # ---------- 加载 ----------
 
-                    if vectors:
-                        self.vectors = np.vstack(vectors)
-                    else:
-                        self.vectors = np.array([]).reshape(0, self.dimension)
-
-                self.logger.info(f"加载数据: {len(self.documents)} 个文档")
+    async def _load_data(self):
+        """加载数据（基础矩阵内存映射 + 回放追加日志）"""
+        if self.data_file.exists() and not self.vectors_file.exists():
+            self._migrate_pickle()
 
+        if self.vectors_file.exists():
+            try:
+                self._base = np.load(self.vectors_file, mmap_mode='r')
+                with open(self.documents_file, 'r', encoding='utf-8') as f:
+                    for row, line in enumerate(f):
+                        entry = json.loads(line)
+                        self._register(entry, row)
+                self.logger.info(f"加载基础数据: {len(self.documents)} 个文档")
             except Exception as e:
                 self.logger.warning(f"加载数据失败: {e}")
 
+        self._replay_segments()
+
         # 加载元数据
         if self.metadata_file.exists():
             try:
@@ -125,39 +172,190 @@ class SimpleVectorStore:
             except Exception as e:
                 self.logger.warning(f"加载元数据失败: {e}")
 
+    def _replay_segments(self):
+        """回放追加日志"""
+        if not self.segment_log_file.exists():
+            return
+
+        segment_vectors = np.zeros((0, self.dimension), dtype=np.float32)
+        if self.segment_vectors_file.exists():
+            raw = np.fromfile(self.segment_vectors_file, dtype=np.float32)
+            usable = raw.size - raw.size % self.dimension
+            segment_vectors = raw[:usable].reshape(-1, self.dimension)
+
+        added = deleted = 0
+        with open(self.segment_log_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # 写入中断的最后一行
+                    break
+                if entry.get('op') == 'delete':
+                    if self._remove(entry['id']):
+                        deleted += 1
+                    continue
+                if added >= segment_vectors.shape[0]:
+                    # 向量先于日志写入，缺少向量说明日志损坏
+                    self.logger.warning("追加日志与向量文件不一致，忽略后续记录")
+                    break
+                self._append_row(segment_vectors[added])
+                self._register(entry, len(self._row_ids))
+                added += 1
+
+        if added or deleted:
+            self.logger.info(f"回放追加日志: 新增 {added} 个, 删除 {deleted} 个")
+
+    def _migrate_pickle(self):
+        """迁移旧版 data.pkl"""
+        try:
+            with open(self.data_file, 'rb') as f:
+                data = pickle.load(f)
+            documents = data.get('documents', {})
+            for doc_id in data.get('document_ids', []):
+                doc = documents.get(doc_id)
+                if doc is not None and np.asarray(doc.vector).shape == (self.dimension,):
+                    self._append_row(self._normalize(doc.vector))
+                    self._register({
+                        'id': doc.id, 'content': doc.content,
+                        'metadata': doc.metadata, 'created_at': doc.created_at
+                    }, len(self._row_ids))
+            self._write_compacted()
+            self.data_file.rename(self.data_file.with_suffix('.pkl.migrated'))
+            self.logger.info(f"已迁移旧版向量数据: {len(self.documents)} 个文档")
+        except Exception as e:
+            self.logger.warning(f"迁移旧版向量数据失败: {e}")
+        finally:
+            self._reset_memory()
+
+    # ---------- 行管理 ----------
+
+    def _normalize(self, vector: np.ndarray) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32).reshape(-1)
+        return vector / (np.linalg.norm(vector) + 1e-8)
+
+    def _append_row(self, normalized: np.ndarray):
+        """向追加缓冲区写入一行（容量不足时扩容为两倍）"""
+        if self._tail_size == self._tail.shape[0]:
+            grown = np.zeros((self._tail.shape[0] * 2, self.dimension), dtype=np.float32)
+            grown[:self._tail_size] = self._tail[:self._tail_size]
+            self._tail = grown
+        self._tail[self._tail_size] = normalized
+        self._tail_size += 1
+
+    def _row_vector(self, row: int) -> np.ndarray:
+        base_rows = self._base.shape[0]
+        return self._base[row] if row < base_rows else self._tail[row - base_rows]
+
+    def _register(self, entry: Dict[str, Any], row: int):
+        """登记一行对应的文档、行号映射与元数据索引"""
+        doc_id = entry['id']
+        if doc_id in self._id_to_row:
+            # 重复ID：保留先登记的行
+            self._row_ids.append(None)
+            self._ensure_alive_capacity()
+            return
+
+        metadata = entry.get('metadata') or {}
+        self.documents[doc_id] = SimpleVectorDocument(
+            id=doc_id,
+            content=entry.get('content', ''),
+            vector=self._row_vector(row),
+            metadata=metadata,
+            created_at=entry.get('created_at', '')
+        )
+        self._row_ids.append(doc_id)
+        self._id_to_row[doc_id] = row
+        self._ensure_alive_capacity()
+        self._alive[row] = True
+        for key, value in metadata.items():
+            self._meta_index.setdefault(key, {}).setdefault(_index_key(value), set()).add(row)
+
+    def _ensure_alive_capacity(self):
+        if len(self._row_ids) > self._alive.shape[0]:
+            grown = np.zeros(max(len(self._row_ids), self._alive.shape[0] * 2), dtype=bool)
+            grown[:self._alive.shape[0]] = self._alive
+            self._alive = grown
+
+    def _remove(self, doc_id: str) -> bool:
+        """从内存结构中移除文档"""
+        row = self._id_to_row.pop(doc_id, None)
+        if row is None:
+            return False
+        document = self.documents.pop(doc_id)
+        self._row_ids[row] = None
+        self._alive[row] = False
+        for key, value in (document.metadata or {}).items():
+            rows = self._meta_index.get(key, {}).get(_index_key(value))
+            if rows is not None:
+                rows.discard(row)
+        return True
+
+    def _gather(self, rows: np.ndarray) -> np.ndarray:
+        """按行号取向量"""
+        base_rows = self._base.shape[0]
+        in_base = rows < base_rows
+        result = np.empty((len(rows), self.dimension), dtype=np.float32)
+        if in_base.any():
+            result[in_base] = self._base[rows[in_base]]
+        if (~in_base).any():
+            result[~in_base] = self._tail[rows[~in_base] - base_rows]
+        return result
+
+    def _reset_memory(self):
+        self.documents = {}
+        self._base = np.zeros((0, self.dimension), dtype=np.float32)
+        self._tail = np.zeros((self.INITIAL_CAPACITY, self.dimension), dtype=np.float32)
+        self._tail_size = 0
+        self._row_ids = []
+        self._id_to_row = {}
+        self._alive = np.zeros(self.INITIAL_CAPACITY, dtype=bool)
+        self._meta_index = {}
+
+    # ---------- 写入 ----------
+
     async def add_documents(self, documents: List[SimpleVectorDocument]) -> bool:
-        """添加文档"""
+        """添加文档（只追加写入本批数据）"""
         if not documents:
             return True
 
         try:
             self.logger.info(f"添加文档: {len(documents)} 个文档")
 
+            entries = []
             new_vectors = []
+            batch_ids = set()
             for doc in documents:
-                if doc.id in self.documents:
+                if doc.id in self.documents or doc.id in batch_ids:
                     self.logger.warning(f"文档ID已存在，跳过: {doc.id}")
                     continue
-
-                # 添加文档
-                self.documents[doc.id] = doc
-                self.document_ids.append(doc.id)
-                new_vectors.append(doc.vector)
-
-            # 更新向量矩阵
-            if new_vectors:
-                new_vectors_array = np.vstack(new_vectors)
-                if self.vectors.size == 0:
-                    self.vectors = new_vectors_array
-                else:
-                    self.vectors = np.vstack([self.vectors, new_vectors_array])
+                vector = np.asarray(doc.vector, dtype=np.float32).reshape(-1)
+                if vector.shape[0] != self.dimension:
+                    self.logger.warning(f"向量维度不匹配，跳过: {doc.id} ({vector.shape[0]} != {self.dimension})")
+                    continue
+                batch_ids.add(doc.id)
+                new_vectors.append(self._normalize(vector))
+                entries.append({
+                    'op': 'add', 'id': doc.id, 'content': doc.content,
+                    'metadata': doc.metadata, 'created_at': doc.created_at
+                })
+
+            if entries:
+                matrix = np.vstack(new_vectors).astype(np.float32)
+                # 先写向量再写日志：日志中的每条 add 都有对应的向量
+                with open(self.segment_vectors_file, 'ab') as f:
+                    f.write(matrix.tobytes())
+                self._append_log(entries)
+
+                for entry, vector in zip(entries, matrix):
+                    self._append_row(vector)
+                    self._register(entry, len(self._row_ids))
 
             # 更新统计
             self.stats["total_vectors"] = len(self.documents)
             self.stats["last_updated"] = datetime.now().isoformat()
-
-            # 保存数据
-            await self._save_data()
+            self._save_stats()
+            self._maybe_compact()
 
             self.logger.info(f"文档添加完成: total_vectors={len(self.documents)}")
             return True
@@ -166,51 +364,116 @@ class SimpleVectorStore:
             self.logger.error(f"添加文档失败: {e}")
             return False
 
+    async def delete_document(self, doc_id: str) -> bool:
+        """删除文档（追加删除记录）"""
+        if doc_id not in self.documents:
+            return False
+
+        try:
+            self._append_log([{'op': 'delete', 'id': doc_id}])
+            self._remove(doc_id)
+
+            # 更新统计
+            self.stats["total_vectors"] = len(self.documents)
+            self.stats["last_updated"] = datetime.now().isoformat()
+            self._save_stats()
+
+            return True
+
+        except Exception as e:
+            self.logger.error(f"删除文档失败: {e}")
+            return False
+
+    def _append_log(self, entries: List[Dict[str, Any]]):
+        with open(self.segment_log_file, 'a', encoding='utf-8') as f:
+            f.write(''.join(json.dumps(entry, ensure_ascii=False) + '\n' for entry in entries))
+            f.flush()
+
+    def _maybe_compact(self):
+        """追加部分超过基础矩阵（且不少于 COMPACT_MIN_ROWS）时压缩，均摊到每次写入为 O(1)"""
+        if self._tail_size >= max(self.COMPACT_MIN_ROWS, self._base.shape[0]):
+            self.compact()
+
+    def compact(self):
+        """将有效文档压缩为新的基础矩阵，清空追加日志"""
+        self._write_compacted()
+        self.segment_vectors_file.unlink(missing_ok=True)
+        self.segment_log_file.unlink(missing_ok=True)
+
+        # 重新加载压缩后的数据（基础矩阵改为内存映射）
+        self._reset_memory()
+        self._base = np.load(self.vectors_file, mmap_mode='r')
+        with open(self.documents_file, 'r', encoding='utf-8') as f:
+            for row, line in enumerate(f):
+                self._register(json.loads(line), row)
+        self.logger.info(f"向量存储已压缩: {len(self.documents)} 个文档")
+
+    def _write_compacted(self):
+        """写入 vectors.npy / documents.jsonl（先写临时文件再替换）"""
+        rows = np.flatnonzero(self._alive[:len(self._row_ids)])
+        matrix = self._gather(rows)
+
+        tmp_vectors = self.vectors_file.with_name('vectors.tmp.npy')
+        tmp_documents = self.documents_file.with_suffix('.jsonl.tmp')
+        np.save(tmp_vectors, matrix)
+        with open(tmp_documents, 'w', encoding='utf-8') as f:
+            for row in rows:
+                doc = self.documents[self._row_ids[row]]
+                f.write(json.dumps({
+                    'id': doc.id, 'content': doc.content,
+                    'metadata': doc.metadata, 'created_at': doc.created_at
+                }, ensure_ascii=False) + '\n')
+
+        os.replace(tmp_vectors, self.vectors_file)
+        os.replace(tmp_documents, self.documents_file)
+
+    async def _save_data(self):
+        """保存数据（压缩追加日志）"""
+        try:
+            if self.segment_log_file.exists():
+                self.compact()
+            self._save_stats()
+        except Exception as e:
+            self.logger.error(f"保存数据失败: {e}")
+
+    def _save_stats(self):
+        with open(self.metadata_file, 'w', encoding='utf-8') as f:
+            json.dump(self.stats, f, ensure_ascii=False, indent=2)
+
+    # ---------- 检索 ----------
+
     async def search(self,
                     query_vector: np.ndarray,
                     top_k: int = 10,
                     threshold: float = 0.0,
                     filter_metadata: Optional[Dict] = None) -> List[SimpleSearchResult]:
         """向量搜索"""
-        if len(self.documents) == 0 or self.vectors.size == 0:
+        if len(self.documents) == 0:
             return []
 
         try:
             import time
             start_time = time.time()
 
-            # 计算相似度
-            similarities = self._calculate_similarities(query_vector)
+            rows, similarities = self._score(query_vector, filter_metadata)
 
-            # 获取排序索引
-            sorted_indices = np.argsort(similarities)[::-1]
+            # 阈值过滤后取 top-k
+            keep = similarities >= threshold
+            rows, similarities = rows[keep], similarities[keep]
+            if top_k < len(similarities):
+                top = np.argpartition(-similarities, top_k - 1)[:top_k]
+                rows, similarities = rows[top], similarities[top]
+            order = np.argsort(-similarities, kind='stable')
 
             # 构建结果
-            results = []
-            for rank, idx in enumerate(sorted_indices):
-                if len(results) >= top_k:
-                    break
-
-                score = similarities[idx]
-                if score < threshold:
-                    continue
-
-                doc_id = self.document_ids[idx]
-                if doc_id not in self.documents:
-                    continue
-
-                document = self.documents[doc_id]
-
-                # 应用元数据过滤
-                if filter_metadata:
-                    if not self._match_metadata_filter(document.metadata, filter_metadata):
-                        continue
-
-                results.append(SimpleSearchResult(
-                    document=document,
-                    score=float(score),
+            results = [
+                SimpleSearchResult(
+                    document=self.documents[self._row_ids[rows[i]]],
+                    score=float(similarities[i]),
                     rank=rank + 1
-                ))
+                )
+                for rank, i in enumerate(order)
+            ]
 
             # 更新统计
             search_time = time.time() - start_time
@@ -222,19 +485,40 @@ class SimpleVectorStore:
             self.logger.error(f"搜索失败: {e}")
             return []
 
-    def _calculate_similarities(self, query_vector: np.ndarray) -> np.ndarray:
-        """计算相似度"""
-        # 标准化查询向量
-        query_norm = query_vector / (np.linalg.norm(query_vector) + 1e-8)
+    def _score(self, query_vector: np.ndarray, filter_metadata: Optional[Dict]) -> Tuple[np.ndarray, np.ndarray]:
+        """返回 (候选行号, 余弦相似度)"""
+        query = self._normalize(query_vector)
+        if query.shape[0] != self.dimension:
+            raise ValueError(f"查询向量维度不匹配: {query.shape[0]} != {self.dimension}")
+
+        if filter_metadata:
+            rows = self._filter_rows(filter_metadata)
+            return rows, self._gather(rows) @ query
+
+        base_rows = self._base.shape[0]
+        similarities = np.empty(len(self._row_ids), dtype=np.float32)
+        similarities[:base_rows] = self._base @ query
+        similarities[base_rows:] = self._tail[:self._tail_size] @ query
+        rows = np.flatnonzero(self._alive[:len(self._row_ids)])
+        return rows, similarities[rows]
 
-        # 计算余弦相似度
-        similarities = []
-        for i, doc_vector in enumerate(self.vectors):
-            doc_norm = doc_vector / (np.linalg.norm(doc_vector) + 1e-8)
-            similarity = np.dot(query_norm, doc_norm)
-            similarities.append(similarity)
+    def _calculate_similarities(self, query_vector: np.ndarray) -> np.ndarray:
+        """计算与全部有效文档的相似度（与 document_ids 顺序一致）"""
+        return self._score(query_vector, None)[1]
 
-        return np.array(similarities)
+    def _filter_rows(self, filter_conditions: Dict) -> np.ndarray:
+        """通过元数据倒排索引得到满足全部条件的行号"""
+        candidates: Optional[set] = None
+        for key, expected_value in filter_conditions.items():
+            values = expected_value if isinstance(expected_value, list) else [expected_value]
+            index = self._meta_index.get(key, {})
+            matched = set()
+            for value in values:
+                matched |= index.get(_index_key(value), set())
+            candidates = matched if candidates is None else candidates & matched
+            if not candidates:
+                return np.zeros(0, dtype=np.int64)
+        return np.array(sorted(candidates), dtype=np.int64)
 
     def _match_metadata_filter(self, metadata: Dict, filter_conditions: Dict) -> bool:
         """检查元数据过滤条件"""
@@ -252,55 +536,6 @@ class SimpleVectorStore:
 
         return True
 
-    async def delete_document(self, doc_id: str) -> bool:
-        """删除文档"""
-        if doc_id not in self.documents:
-            return False
-
-        try:
-            # 找到索引
-            idx = self.document_ids.index(doc_id)
-
-            # 删除文档
-            del self.documents[doc_id]
-            del self.document_ids[idx]
-
-            # 删除向量
-            if self.vectors.size > 0:
-                self.vectors = np.delete(self.vectors, idx, axis=0)
-
-            # 更新统计
-            self.stats["total_vectors"] = len(self.documents)
-            self.stats["last_updated"] = datetime.now().isoformat()
-
-            # 保存数据
-            await self._save_data()
-
-            return True
-
-        except Exception as e:
-            self.logger.error(f"删除文档失败: {e}")
-            return False
-
-    async def _save_data(self):
-        """保存数据"""
-        try:
-            # 保存文档数据
-            data = {
-                'documents': self.documents,
-                'document_ids': self.document_ids
-            }
-
-            with open(self.data_file, 'wb') as f:
-                pickle.dump(data, f)
-
-            # 保存元数据
-            with open(self.metadata_file, 'w', encoding='utf-8') as f:
-                json.dump(self.stats, f, ensure_ascii=False, indent=2)
-
-        except Exception as e:
-            self.logger.error(f"保存数据失败: {e}")
-
     def _update_search_stats(self, search_time: float):
         """更新搜索统计"""
         self.stats["search_count"] += 1
@@ -319,7 +554,8 @@ class SimpleVectorStore:
             **self.stats,
             "dimension": self.dimension,
             "store_path": str(self.store_path),
-            "documents_count": len(self.documents)
+            "documents_count": len(self.documents),
+            "pending_segment_rows": self._tail_size
         }
 
     async def cleanup(self):
@@ -328,4 +564,4 @@ class SimpleVectorStore:
             await self._save_data()
             self.logger.info("简化向量存储资源已清理")
         except Exception as e:
-            self.logger.error(f"清理资源失败: {e}")
\ No newline at end of file
+            self.logger.error(f"清理资源失败: {e}")
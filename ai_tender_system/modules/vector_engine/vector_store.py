@@ -3,15 +3,34 @@
 """
 向量存储服务
 基于FAISS实现高效的向量索引和检索
+
+存储结构（store_path 下）：
+- vector.index    FAISS 索引（IndexIDMap2，每个文档对应一个稳定的 int64 ID），向量只保存在索引中
+- documents.db    文档内容与元数据（SQLite），deleted=1 的行为待压缩的墓碑
+- metadata.json   统计信息
+
+- 删除只标记墓碑，检索时通过 IDSelector 排除；墓碑累计到一定数量后由后台线程压缩索引
+- 索引由后台线程按检查点间隔落盘（先写临时文件再替换）；启动时丢弃向量尚未写入检查点的文档记录
+- index_type="auto" 时按文档数选择 Flat / IVF / HNSW，跨过阈值后在后台重建时升级
+
+配置（环境变量）：
+    VECTOR_STORE_CHECKPOINT_INTERVAL  检查点间隔（秒），默认 30，0 表示每次写入后同步落盘
+    VECTOR_STORE_COMPACT_MIN          墓碑数达到该值才压缩，默认 1000
+    VECTOR_STORE_COMPACT_RATIO        墓碑占索引的比例达到该值才压缩，默认 0.1
+    VECTOR_STORE_IVF_MIN              auto 模式下使用 IVF 的最小文档数，默认 20000
+    VECTOR_STORE_HNSW_MIN             auto 模式下使用 HNSW 的最小文档数，默认 500000
+    VECTOR_STORE_NPROBE               IVF 检索探测的聚类数，默认 16
 """
 
 import os
 import pickle
+import threading
 import numpy as np
 import asyncio
+from collections.abc import Mapping
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple, Any, Union
-from dataclasses import dataclass, asdict
+from typing import Dict, Iterable, List, Optional, Tuple, Any
+from dataclasses import dataclass
 from datetime import datetime
 import json
 import time
@@ -22,10 +41,42 @@ import sys
 project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root))
 
+from common.db_pool import get_pooled_connection
 from common.logger import get_module_logger
 
 logger = get_module_logger("vector_engine.vector_store")
 
+CHECKPOINT_INTERVAL = float(os.getenv('VECTOR_STORE_CHECKPOINT_INTERVAL', '30'))
+COMPACT_MIN = int(os.getenv('VECTOR_STORE_COMPACT_MIN', '1000'))
+COMPACT_RATIO = float(os.getenv('VECTOR_STORE_COMPACT_RATIO', '0.1'))
+IVF_MIN = int(os.getenv('VECTOR_STORE_IVF_MIN', '20000'))
+HNSW_MIN = int(os.getenv('VECTOR_STORE_HNSW_MIN', '500000'))
+NPROBE = int(os.getenv('VECTOR_STORE_NPROBE', '16'))
+
+# IVF 每个聚类至少需要的训练样本数（FAISS 建议 39 个以上）
+IVF_POINTS_PER_LIST = 39
+# 显式指定 ivf 时，文档数达到该值才训练，之前使用 Flat
+IVF_TRAIN_MIN = 1000
+# 过滤后的候选文档不超过该数量时直接精确打分（HNSW/IVF 在候选很少时召回不全）
+FILTER_EXACT_MAX = 10000
+# 重建索引时每批写入的向量数
+REBUILD_BATCH = 10000
+# SQLite 默认变量上限 999，IN 查询分批
+QUERY_BATCH = 500
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS vector_documents (
+    vid INTEGER PRIMARY KEY,
+    doc_id TEXT NOT NULL,
+    content TEXT,
+    metadata TEXT,
+    created_at TEXT,
+    deleted INTEGER NOT NULL DEFAULT 0
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_vector_documents_doc_id
+    ON vector_documents(doc_id) WHERE deleted = 0;
+"""
+
 # 延迟导入FAISS
 _faiss = None
 
@@ -71,46 +122,88 @@ class SearchResult:
     rank: int
 
 
+class _DocumentMapping(Mapping):
+    """documents 的只读视图：按需从 SQLite 读取内容，从索引还原向量"""
+
+    def __init__(self, store: 'VectorStore'):
+        self._store = store
+
+    def __getitem__(self, doc_id: str) -> VectorDocument:
+        document = self._store.get_document(doc_id)
+        if document is None:
+            raise KeyError(doc_id)
+        return document
+
+    def __contains__(self, doc_id) -> bool:
+        return doc_id in self._store._doc_ids
+
+    def __iter__(self):
+        return iter(list(self._store._doc_ids))
+
+    def __len__(self) -> int:
+        return len(self._store._doc_ids)
+
+
 class VectorStore:
     """向量存储服务"""
 
     def __init__(self,
                  store_path: str = "data/vector_store",
                  dimension: int = 384,
-                 index_type: str = "flat"):
+                 index_type: str = "auto",
+                 checkpoint_interval: float = CHECKPOINT_INTERVAL):
         """
         初始化向量存储
 
         Args:
             store_path: 存储路径
             dimension: 向量维度
-            index_type: 索引类型 (flat, ivf, hnsw)
+            index_type: 索引类型 (auto, flat, ivf, hnsw)
+            checkpoint_interval: 检查点间隔（秒），0 表示每次写入后同步落盘
         """
         self.logger = logger
         self.store_path = Path(store_path)
         self.dimension = dimension
         self.index_type = index_type
+        self.checkpoint_interval = checkpoint_interval
 
         # 确保存储目录存在
         self.store_path.mkdir(parents=True, exist_ok=True)
 
-        # FAISS索引
+        # FAISS索引（IndexIDMap2）及当前实际使用的索引类型
         self.index = None
+        self.active_index_type = "flat"
         self.index_file = self.store_path / "vector.index"
 
         # 文档存储
-        self.documents: Dict[str, VectorDocument] = {}
-        self.document_file = self.store_path / "documents.pkl"
+        self.db_file = self.store_path / "documents.db"
         self.metadata_file = self.store_path / "metadata.json"
-
-        # ID映射（FAISS索引位置到文档ID）
-        self.id_mapping: Dict[int, str] = {}
-        self.next_index = 0
+        self.legacy_document_file = self.store_path / "documents.pkl"
+        self._schema_ready = False
+        self.documents = _DocumentMapping(self)
+
+        # 文档ID -> 索引ID（仅有效文档），墓碑索引ID，下一个索引ID
+        self._doc_ids: Dict[str, int] = {}
+        self._tombstones: set = set()
+        self._next_id = 0
+
+        # 索引读写锁、重建互斥锁、待落盘标记
+        self._lock = threading.RLock()
+        self._rebuild_lock = threading.Lock()
+        self._dirty = False
+        # 重建期间新增的索引ID（重建完成后补入新索引）
+        self._rebuilding = False
+        self._added_during_rebuild: List[int] = []
+
+        # 后台维护线程（检查点、压缩、索引升级）
+        self._wake = threading.Event()
+        self._closing = False
+        self._worker: Optional[threading.Thread] = None
 
         # 索引配置
         self.index_config = {
             "flat": {"factory": "Flat", "description": "精确搜索，内存占用大"},
-            "ivf": {"factory": "IVF100,Flat", "description": "倒排索引，平衡速度和精度"},
+            "ivf": {"factory": "IVF{nlist},Flat", "description": "倒排索引，平衡速度和精度"},
             "hnsw": {"factory": "HNSW32", "description": "分层图索引，快速近似搜索"}
         }
 
@@ -128,78 +221,168 @@ class VectorStore:
         try:
             self.logger.info(f"初始化向量存储: path={self.store_path}, dim={self.dimension}")
 
-            # 加载现有数据
-            await self._load_existing_data()
+            loop = asyncio.get_event_loop()
+            await loop.run_in_executor(None, self._load)
 
-            # 初始化FAISS索引
-            await self._initialize_index()
+            self._closing = False
+            self._worker = threading.Thread(target=self._maintenance_loop,
+                                            name="vector-store-maintenance", daemon=True)
+            self._worker.start()
+            self._wake_if_needed()
 
-            self.logger.info(f"向量存储初始化完成: vectors={len(self.documents)}")
+            self.logger.info(f"向量存储初始化完成: vectors={len(self._doc_ids)}, "
+                             f"index={self.active_index_type}")
             return True
 
         except Exception as e:
             self.logger.error(f"向量存储初始化失败: {e}")
             return False
 
-    async def _load_existing_data(self):
-        """加载现有数据"""
-        # 加载文档数据
-        if self.document_file.exists():
+    # ---------- 加载 ----------
+
+    def _load(self):
+        """加载索引与文档记录，并对两者做一致性修复"""
+        faiss = get_faiss()
+
+        if self.legacy_document_file.exists() and not self._has_rows():
+            self._migrate_pickle()
+            return
+
+        if self.index_file.exists():
             try:
-                loop = asyncio.get_event_loop()
-                with open(self.document_file, 'rb') as f:
-                    data = await loop.run_in_executor(None, pickle.load, f)
-                    self.documents = data.get('documents', {})
-                    self.id_mapping = data.get('id_mapping', {})
-                    self.next_index = data.get('next_index', 0)
-
-                self.logger.info(f"加载文档数据: {len(self.documents)} 个文档")
+                self.index = faiss.read_index(str(self.index_file))
+                self.active_index_type = self._detect_index_type(self.index)
+                self.logger.info("加载现有FAISS索引")
             except Exception as e:
-                self.logger.warning(f"加载文档数据失败: {e}")
+                self.logger.warning(f"加载FAISS索引失败: {e}")
+                self.index = None
+
+        if self.index is None:
+            self.index, self.active_index_type = self._create_index("flat", None)
+
+        indexed = set(faiss.vector_to_array(self.index.id_map).tolist()) if self.index.ntotal else set()
+
+        conn = self._connect()
+        try:
+            rows = conn.execute("SELECT vid, doc_id, deleted FROM vector_documents").fetchall()
+            missing = []
+            known = set()
+            for vid, doc_id, deleted in rows:
+                known.add(vid)
+                if vid not in indexed:
+                    missing.append(vid)
+                elif deleted:
+                    self._tombstones.add(vid)
+                else:
+                    self._doc_ids[doc_id] = vid
+
+            if missing:
+                # 向量未写入检查点（写入后进程异常退出），记录作废，需要重新导入
+                for start in range(0, len(missing), QUERY_BATCH):
+                    batch = missing[start:start + QUERY_BATCH]
+                    conn.execute(
+                        f"DELETE FROM vector_documents WHERE vid IN ({','.join('?' * len(batch))})", batch
+                    )
+                conn.commit()
+                self.logger.warning(f"{len(missing)} 个文档的向量未写入检查点，已移除，需要重新导入")
+        finally:
+            conn.close()
+
+        # 索引中存在、但记录已在压缩时清除的向量
+        self._tombstones |= indexed - known
+        self._next_id = max(indexed | known, default=-1) + 1
+        self.logger.info(f"加载文档数据: {len(self._doc_ids)} 个文档, {len(self._tombstones)} 个墓碑")
 
         # 加载元数据
         if self.metadata_file.exists():
             try:
                 with open(self.metadata_file, 'r', encoding='utf-8') as f:
-                    self.stats = json.load(f)
+                    self.stats.update(json.load(f))
             except Exception as e:
                 self.logger.warning(f"加载元数据失败: {e}")
 
-    async def _initialize_index(self):
-        """初始化FAISS索引"""
+    def _migrate_pickle(self):
+        """迁移旧版 documents.pkl（文档与向量整体 pickle）"""
+        self.index, self.active_index_type = self._create_index("flat", None)
+        with open(self.legacy_document_file, 'rb') as f:
+            data = pickle.load(f)
+
+        documents = list(data.get('documents', {}).values())
+        entries, vectors = self._prepare(documents)
+        if entries:
+            self._add_batch(entries, vectors)
+        self._checkpoint()
+        self.legacy_document_file.rename(self.legacy_document_file.with_suffix('.pkl.migrated'))
+        self.logger.info(f"已迁移旧版向量数据: {len(self._doc_ids)} 个文档")
+
+    def _has_rows(self) -> bool:
+        conn = self._connect()
+        try:
+            return conn.execute("SELECT 1 FROM vector_documents LIMIT 1").fetchone() is not None
+        finally:
+            conn.close()
+
+    def _connect(self):
+        conn = get_pooled_connection(str(self.db_file))
+        if not self._schema_ready:
+            conn.executescript(SCHEMA_SQL)
+            self._schema_ready = True
+        return conn
+
+    # ---------- 索引构建 ----------
+
+    def _desired_index_type(self, count: int) -> str:
+        """按文档数决定应使用的索引类型"""
+        if self.index_type == "auto":
+            if count >= HNSW_MIN:
+                return "hnsw"
+            if count >= max(IVF_MIN, IVF_TRAIN_MIN):
+                return "ivf"
+            return "flat"
+        if self.index_type == "ivf":
+            return "ivf" if count >= IVF_TRAIN_MIN else "flat"
+        if self.index_type == "hnsw":
+            return "hnsw"
+        return "flat"
+
+    def _create_index(self, index_type: str, train_vectors: Optional[np.ndarray]):
+        """创建空索引（IVF 使用 train_vectors 训练），返回 (索引, 实际类型)"""
         faiss = get_faiss()
 
-        if self.index_file.exists() and self.documents:
-            try:
-                # 加载现有索引
-                loop = asyncio.get_event_loop()
-                self.index = await loop.run_in_executor(None, faiss.read_index, str(self.index_file))
-                self.logger.info("加载现有FAISS索引")
-            except Exception as e:
-                self.logger.warning(f"加载FAISS索引失败，创建新索引: {e}")
-                self.index = None
-
-        if self.index is None:
-            # 创建新索引
-            config = self.index_config.get(self.index_type, self.index_config["flat"])
-            factory_string = config["factory"]
-
-            if self.index_type == "flat":
-                self.index = faiss.IndexFlatIP(self.dimension)  # 内积索引
-            elif self.index_type == "ivf":
-                quantizer = faiss.IndexFlatIP(self.dimension)
-                self.index = faiss.IndexIVFFlat(quantizer, self.dimension, 100)
-            elif self.index_type == "hnsw":
-                self.index = faiss.IndexHNSWFlat(self.dimension, 32)
-                self.index.hnsw.efConstruction = 200
-            else:
-                self.index = faiss.IndexFlatIP(self.dimension)
-
-            self.logger.info(f"创建新FAISS索引: type={self.index_type}")
+        if index_type == "ivf" and train_vectors is not None and len(train_vectors) >= IVF_POINTS_PER_LIST:
+            count = len(train_vectors)
+            nlist = max(1, min(int(4 * np.sqrt(count)), count // IVF_POINTS_PER_LIST))
+            base = faiss.index_factory(self.dimension, self.index_config["ivf"]["factory"].format(nlist=nlist),
+                                       faiss.METRIC_INNER_PRODUCT)
+            sample = train_vectors
+            if count > nlist * 256:
+                rows = np.random.default_rng(0).choice(count, nlist * 256, replace=False)
+                sample = train_vectors[np.sort(rows)]
+            base.train(np.ascontiguousarray(sample, dtype=np.float32))
+            ivf = faiss.extract_index_ivf(base)
+            ivf.nprobe = min(NPROBE, nlist)
+            # 按ID还原向量（压缩、升级、相似文档检索）需要直接映射
+            ivf.make_direct_map()
+            return faiss.IndexIDMap2(base), "ivf"
+
+        if index_type == "hnsw":
+            base = faiss.IndexHNSWFlat(self.dimension, 32, faiss.METRIC_INNER_PRODUCT)
+            base.hnsw.efConstruction = 200
+            base.hnsw.efSearch = 64
+            return faiss.IndexIDMap2(base), "hnsw"
+
+        return faiss.IndexIDMap2(faiss.IndexFlatIP(self.dimension)), "flat"
+
+    def _detect_index_type(self, index) -> str:
+        faiss = get_faiss()
+        base = faiss.downcast_index(index.index)
+        if isinstance(base, faiss.IndexIVF):
+            return "ivf"
+        if isinstance(base, faiss.IndexHNSW):
+            return "hnsw"
+        return "flat"
 
-            # 如果有现有数据，重建索引
-            if self.documents:
-                await self._rebuild_index()
+    # ---------- 写入 ----------
 
     async def add_documents(self, documents: List[VectorDocument]) -> bool:
         """
@@ -218,60 +401,116 @@ class VectorStore:
             self.logger.info(f"添加文档到向量存储: {len(documents)} 个文档")
             start_time = time.time()
 
-            # 准备向量和映射
-            vectors = []
-            for doc in documents:
-                if doc.id in self.documents:
-                    self.logger.warning(f"文档ID已存在，跳过: {doc.id}")
-                    continue
+            entries, vectors = self._prepare(documents)
+            if not entries:
+                self.logger.warning("没有新文档需要添加")
+                return True
 
-                # 添加到文档存储
-                self.documents[doc.id] = doc
+            loop = asyncio.get_event_loop()
+            await loop.run_in_executor(None, self._add_batch, entries, vectors)
+            await self._after_write(loop)
 
-                # 准备向量数据
-                vector = doc.vector
-                if vector.ndim == 1:
-                    vector = vector.reshape(1, -1)
-                vectors.append(vector)
+            processing_time = time.time() - start_time
+            self.logger.info(f"文档添加完成: vectors={len(entries)}, "
+                           f"time={processing_time:.2f}s")
 
-                # 更新ID映射
-                self.id_mapping[self.next_index] = doc.id
-                self.next_index += 1
+            return True
 
-            if not vectors:
-                self.logger.warning("没有新文档需要添加")
-                return True
+        except Exception as e:
+            self.logger.error(f"添加文档失败: {e}")
+            return False
 
-            # 添加向量到索引
-            vectors_array = np.vstack(vectors).astype('float32')
+    def _prepare(self, documents: Iterable[VectorDocument]) -> Tuple[List[VectorDocument], np.ndarray]:
+        """过滤重复ID与维度不符的文档，返回 (文档列表, 向量矩阵)"""
+        entries, vectors, seen = [], [], set()
+        for doc in documents:
+            if doc.id in self._doc_ids or doc.id in seen:
+                self.logger.warning(f"文档ID已存在，跳过: {doc.id}")
+                continue
+            vector = np.asarray(doc.vector, dtype=np.float32).reshape(-1)
+            if vector.shape[0] != self.dimension:
+                self.logger.warning(f"向量维度不匹配，跳过: {doc.id} ({vector.shape[0]} != {self.dimension})")
+                continue
+            seen.add(doc.id)
+            entries.append(doc)
+            vectors.append(vector)
+        matrix = np.vstack(vectors) if vectors else np.zeros((0, self.dimension), dtype=np.float32)
+        return entries, matrix
+
+    def _add_batch(self, entries: List[VectorDocument], vectors: np.ndarray):
+        """先写文档记录再写索引（记录多于索引时，加载阶段可以修复）"""
+        with self._lock:
+            start = self._next_id
+            self._next_id += len(entries)
+        ids = np.arange(start, start + len(entries), dtype=np.int64)
+
+        conn = self._connect()
+        try:
+            conn.executemany(
+                "INSERT INTO vector_documents (vid, doc_id, content, metadata, created_at) VALUES (?, ?, ?, ?, ?)",
+                [(int(vid), doc.id, doc.content, json.dumps(doc.metadata or {}, ensure_ascii=False), doc.created_at)
+                 for vid, doc in zip(ids, entries)]
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+        with self._lock:
+            self.index.add_with_ids(np.ascontiguousarray(vectors, dtype=np.float32), ids)
+            for vid, doc in zip(ids, entries):
+                self._doc_ids[doc.id] = int(vid)
+            if self._rebuilding:
+                self._added_during_rebuild.extend(ids.tolist())
+            self._dirty = True
+            self.stats["total_vectors"] = len(self._doc_ids)
+            self.stats["last_updated"] = datetime.now().isoformat()
 
-            if self.index_type == "ivf" and not getattr(self.index, 'is_trained', False):
-                # IVF索引需要训练
-                if len(vectors_array) >= 100:  # 需要足够的训练数据
-                    loop = asyncio.get_event_loop()
-                    await loop.run_in_executor(None, self.index.train, vectors_array)
+    async def delete_document(self, doc_id: str) -> bool:
+        """
+        删除文档（标记墓碑，由后台压缩）
 
-            # 添加向量
-            loop = asyncio.get_event_loop()
-            await loop.run_in_executor(None, self.index.add, vectors_array)
+        Args:
+            doc_id: 文档ID
 
-            # 更新统计
-            self.stats["total_vectors"] = len(self.documents)
-            self.stats["last_updated"] = datetime.now().isoformat()
+        Returns:
+            bool: 是否成功
+        """
+        vid = self._doc_ids.get(doc_id)
+        if vid is None:
+            self.logger.warning(f"文档不存在: {doc_id}")
+            return False
+
+        try:
+            conn = self._connect()
+            try:
+                conn.execute("UPDATE vector_documents SET deleted = 1 WHERE vid = ?", (vid,))
+                conn.commit()
+            finally:
+                conn.close()
 
-            # 保存数据
-            await self._save_data()
+            with self._lock:
+                self._doc_ids.pop(doc_id, None)
+                self._tombstones.add(vid)
+                self.stats["total_vectors"] = len(self._doc_ids)
+                self.stats["last_updated"] = datetime.now().isoformat()
 
-            processing_time = time.time() - start_time
-            self.logger.info(f"文档添加完成: vectors={len(vectors_array)}, "
-                           f"time={processing_time:.2f}s")
+            # 墓碑保存在文档记录中，索引本身未变化，无需检查点
+            self._wake_if_needed()
 
+            self.logger.info(f"文档删除成功: {doc_id}")
             return True
 
         except Exception as e:
-            self.logger.error(f"添加文档失败: {e}")
+            self.logger.error(f"删除文档失败: {doc_id}, error={e}")
             return False
 
+    async def _after_write(self, loop):
+        if self.checkpoint_interval <= 0:
+            await loop.run_in_executor(None, self._checkpoint)
+        self._wake_if_needed()
+
+    # ---------- 检索 ----------
+
     async def search(self,
                     query_vector: np.ndarray,
                     top_k: int = 10,
@@ -289,58 +528,37 @@ class VectorStore:
         Returns:
             List[SearchResult]: 搜索结果
         """
-        if not self.index or len(self.documents) == 0:
+        if not self.index or len(self._doc_ids) == 0:
             return []
 
         try:
             start_time = time.time()
 
             # 准备查询向量
-            if query_vector.ndim == 1:
-                query_vector = query_vector.reshape(1, -1)
-            query_vector = query_vector.astype('float32')
+            query = np.asarray(query_vector, dtype=np.float32).reshape(1, -1)
+            if query.shape[1] != self.dimension:
+                raise ValueError(f"查询向量维度不匹配: {query.shape[1]} != {self.dimension}")
 
-            # 执行搜索
             loop = asyncio.get_event_loop()
-            scores, indices = await loop.run_in_executor(
-                None, self.index.search, query_vector, min(top_k * 2, len(self.documents))
-            )
+            scores, ids = await loop.run_in_executor(None, self._search_ids, query, top_k, filter_metadata)
+
+            keep = [(float(score), int(vid)) for score, vid in zip(scores, ids)
+                    if vid != -1 and score >= threshold]
+            documents = await loop.run_in_executor(None, self._fetch_documents, [vid for _, vid in keep])
 
             # 处理搜索结果
             results = []
-            for rank, (score, idx) in enumerate(zip(scores[0], indices[0])):
-                if idx == -1:  # FAISS返回-1表示无效结果
-                    continue
-
-                if score < threshold:
+            for score, vid in keep:
+                document = documents.get(vid)
+                if document is None:
                     continue
-
-                # 获取文档ID
-                doc_id = self.id_mapping.get(idx)
-                if not doc_id or doc_id not in self.documents:
-                    continue
-
-                document = self.documents[doc_id]
-
-                # 应用元数据过滤
-                if filter_metadata:
-                    if not self._match_metadata_filter(document.metadata, filter_metadata):
-                        continue
-
-                results.append(SearchResult(
-                    document=document,
-                    score=float(score),
-                    rank=rank
-                ))
-
-                if len(results) >= top_k:
-                    break
+                results.append(SearchResult(document=document, score=score, rank=len(results)))
 
             # 更新搜索统计
             search_time = time.time() - start_time
             self._update_search_stats(search_time)
 
-            self.logger.info(f"向量搜索完成: query_dim={query_vector.shape[1]}, "
+            self.logger.info(f"向量搜索完成: query_dim={query.shape[1]}, "
                            f"results={len(results)}, time={search_time:.3f}s")
 
             return results
@@ -349,6 +567,74 @@ class VectorStore:
             self.logger.error(f"向量搜索失败: {e}")
             return []
 
+    def _search_ids(self, query: np.ndarray, top_k: int,
+                    filter_metadata: Optional[Dict]) -> Tuple[np.ndarray, np.ndarray]:
+        """返回按相似度降序的 (分数, 索引ID)"""
+        faiss = get_faiss()
+
+        if filter_metadata:
+            allowed = self._filter_ids(filter_metadata)
+            if not allowed:
+                return np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.int64)
+            allowed_ids = np.array(allowed, dtype=np.int64)
+            k = min(top_k, len(allowed_ids))
+
+            with self._lock:
+                if self.active_index_type != "flat" and len(allowed_ids) <= FILTER_EXACT_MAX:
+                    # 候选较少：直接对候选向量精确打分
+                    scores = self.index.reconstruct_batch(allowed_ids) @ query[0]
+                    top = np.argpartition(-scores, k - 1)[:k]
+                    order = top[np.argsort(-scores[top], kind='stable')]
+                    return scores[order], allowed_ids[order]
+
+                batch = faiss.IDSelectorBatch(allowed_ids)
+                scores, ids = self.index.search(query, k, params=self._search_params(batch, k))
+                return scores[0], ids[0]
+
+        with self._lock:
+            k = min(top_k, len(self._doc_ids))
+            if not self._tombstones:
+                scores, ids = self.index.search(query, k)
+                return scores[0], ids[0]
+
+            # 排除墓碑（选择器对象需在检索期间保持引用）
+            tombstones = faiss.IDSelectorBatch(np.fromiter(self._tombstones, dtype=np.int64))
+            selector = faiss.IDSelectorNot(tombstones)
+            scores, ids = self.index.search(query, k, params=self._search_params(selector, k))
+            return scores[0], ids[0]
+
+    def _search_params(self, selector, k: int):
+        faiss = get_faiss()
+        base = faiss.downcast_index(self.index.index)
+        if isinstance(base, faiss.IndexIVF):
+            return faiss.SearchParametersIVF(sel=selector, nprobe=base.nprobe)
+        if isinstance(base, faiss.IndexHNSW):
+            return faiss.SearchParametersHNSW(sel=selector, efSearch=max(base.hnsw.efSearch, k))
+        return faiss.SearchParameters(sel=selector)
+
+    def _filter_ids(self, filter_conditions: Dict) -> List[int]:
+        """在 SQLite 中按元数据筛选有效文档的索引ID"""
+        clauses, params = ["deleted = 0"], []
+        for key, expected_value in filter_conditions.items():
+            values = expected_value if isinstance(expected_value, list) else [expected_value]
+            if not all(isinstance(v, (str, int, float)) for v in values):
+                # None/嵌套结构无法可靠下推，交给下方逐条校验
+                continue
+            path = '$."' + str(key).replace('"', '\\"') + '"'
+            clauses.append(f"json_extract(metadata, ?) IN ({','.join('?' * len(values))})")
+            params.extend([path, *values])
+
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                f"SELECT vid, metadata FROM vector_documents WHERE {' AND '.join(clauses)}", params
+            ).fetchall()
+        finally:
+            conn.close()
+
+        return [vid for vid, metadata in rows
+                if self._match_metadata_filter(json.loads(metadata or '{}'), filter_conditions)]
+
     def _match_metadata_filter(self, metadata: Dict, filter_conditions: Dict) -> bool:
         """检查元数据是否匹配过滤条件"""
         for key, expected_value in filter_conditions.items():
@@ -365,124 +651,164 @@ class VectorStore:
 
         return True
 
-    async def delete_document(self, doc_id: str) -> bool:
-        """
-        删除文档（软删除）
-
-        Args:
-            doc_id: 文档ID
-
-        Returns:
-            bool: 是否成功
-        """
-        if doc_id not in self.documents:
-            self.logger.warning(f"文档不存在: {doc_id}")
-            return False
+    def _fetch_documents(self, ids: List[int]) -> Dict[int, VectorDocument]:
+        """按索引ID批量读取文档（向量从索引还原）"""
+        if not ids:
+            return {}
 
+        rows = []
+        conn = self._connect()
         try:
-            # 从文档存储中删除
-            del self.documents[doc_id]
-
-            # 从ID映射中删除
-            index_to_remove = None
-            for idx, mapped_id in self.id_mapping.items():
-                if mapped_id == doc_id:
-                    index_to_remove = idx
-                    break
+            for start in range(0, len(ids), QUERY_BATCH):
+                batch = ids[start:start + QUERY_BATCH]
+                rows.extend(conn.execute(
+                    f"SELECT vid, doc_id, content, metadata, created_at FROM vector_documents "
+                    f"WHERE deleted = 0 AND vid IN ({','.join('?' * len(batch))})", batch
+                ).fetchall())
+        finally:
+            conn.close()
+
+        if not rows:
+            return {}
+        with self._lock:
+            vectors = self.index.reconstruct_batch(np.array([row[0] for row in rows], dtype=np.int64))
 
-            if index_to_remove is not None:
-                del self.id_mapping[index_to_remove]
+        return {
+            vid: VectorDocument(id=doc_id, content=content or '', vector=vector,
+                                metadata=json.loads(metadata or '{}'), created_at=created_at or '')
+            for (vid, doc_id, content, metadata, created_at), vector in zip(rows, vectors)
+        }
 
-            # 更新统计
-            self.stats["total_vectors"] = len(self.documents)
-            self.stats["last_updated"] = datetime.now().isoformat()
+    def get_document(self, doc_id: str) -> Optional[VectorDocument]:
+        """获取单个文档"""
+        vid = self._doc_ids.get(doc_id)
+        if vid is None:
+            return None
+        return self._fetch_documents([vid]).get(vid)
 
-            # 保存数据
-            await self._save_data()
+    # ---------- 压缩、升级与检查点 ----------
 
-            self.logger.info(f"文档删除成功: {doc_id}")
-            return True
+    def _needs_rebuild(self) -> bool:
+        """墓碑过多，或文档数跨过索引类型阈值"""
+        with self._lock:
+            total = self.index.ntotal if self.index is not None else 0
+            if len(self._tombstones) >= max(COMPACT_MIN, COMPACT_RATIO * total):
+                return True
+            return self._desired_index_type(len(self._doc_ids)) != self.active_index_type
 
-        except Exception as e:
-            self.logger.error(f"删除文档失败: {doc_id}, error={e}")
-            return False
+    async def compact(self):
+        """立即压缩墓碑（必要时升级索引类型）"""
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(None, self._rebuild)
+        await self._after_write(loop)
 
     async def _rebuild_index(self):
         """重建索引"""
-        if not self.documents:
-            return
+        await self.compact()
 
-        try:
+    def _rebuild(self):
+        """
+        从当前有效向量构建新索引后替换
+
+        构建期间不持有索引锁，检索与写入照常进行：期间新增的向量在替换前补入新索引，
+        期间产生的墓碑保留到下一次压缩。
+        """
+        with self._rebuild_lock:
             self.logger.info("开始重建向量索引")
             start_time = time.time()
 
-            # 收集所有向量
-            vectors = []
-            new_id_mapping = {}
-            index = 0
-
-            for doc_id, doc in self.documents.items():
-                vector = doc.vector
-                if vector.ndim == 1:
-                    vector = vector.reshape(1, -1)
-                vectors.append(vector)
-                new_id_mapping[index] = doc_id
-                index += 1
-
-            if vectors:
-                vectors_array = np.vstack(vectors).astype('float32')
+            with self._lock:
+                ids = np.fromiter(self._doc_ids.values(), dtype=np.int64, count=len(self._doc_ids))
+                ids.sort()
+                purged = set(self._tombstones)
+                vectors = (self.index.reconstruct_batch(ids) if len(ids)
+                           else np.zeros((0, self.dimension), dtype=np.float32))
+                self._rebuilding = True
+                self._added_during_rebuild = []
 
-                # 清空现有索引
-                self.index.reset()
-
-                # 训练索引（如果需要）
-                if self.index_type == "ivf":
-                    loop = asyncio.get_event_loop()
-                    await loop.run_in_executor(None, self.index.train, vectors_array)
-
-                # 添加向量
-                loop = asyncio.get_event_loop()
-                await loop.run_in_executor(None, self.index.add, vectors_array)
-
-                # 更新映射
-                self.id_mapping = new_id_mapping
-                self.next_index = len(vectors)
+            try:
+                new_index, index_type = self._create_index(self._desired_index_type(len(ids)), vectors)
+                for start in range(0, len(ids), REBUILD_BATCH):
+                    new_index.add_with_ids(vectors[start:start + REBUILD_BATCH], ids[start:start + REBUILD_BATCH])
+
+                with self._lock:
+                    if self._added_during_rebuild:
+                        added = np.array(self._added_during_rebuild, dtype=np.int64)
+                        new_index.add_with_ids(self.index.reconstruct_batch(added), added)
+                    self.index = new_index
+                    self.active_index_type = index_type
+                    self._tombstones -= purged
+                    self._dirty = True
+            finally:
+                with self._lock:
+                    self._rebuilding = False
+                    self._added_during_rebuild = []
+
+            # 已压缩的墓碑记录可以清除（旧检查点中残留的向量在加载时会被识别为墓碑）
+            purged_ids = sorted(purged)
+            conn = self._connect()
+            try:
+                for start in range(0, len(purged_ids), QUERY_BATCH):
+                    batch = purged_ids[start:start + QUERY_BATCH]
+                    conn.execute(
+                        f"DELETE FROM vector_documents WHERE deleted = 1 AND vid IN ({','.join('?' * len(batch))})",
+                        batch
+                    )
+                conn.commit()
+            finally:
+                conn.close()
 
             build_time = time.time() - start_time
             self.stats["index_build_time"] = build_time
+            self.logger.info(f"索引重建完成: vectors={len(ids)}, purged={len(purged)}, "
+                             f"index={index_type}, time={build_time:.2f}s")
 
-            self.logger.info(f"索引重建完成: vectors={len(vectors)}, time={build_time:.2f}s")
+    async def checkpoint(self):
+        """立即将索引写入磁盘"""
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(None, self._checkpoint)
 
-        except Exception as e:
-            self.logger.error(f"重建索引失败: {e}")
-            raise
+    def _checkpoint(self):
+        """序列化索引后写入临时文件再替换"""
+        faiss = get_faiss()
+        with self._lock:
+            dirty = self._dirty
+            data = faiss.serialize_index(self.index) if dirty else None
+            self._dirty = False
 
-    async def _save_data(self):
-        """保存数据到磁盘"""
         try:
-            # 保存文档数据
-            data = {
-                'documents': self.documents,
-                'id_mapping': self.id_mapping,
-                'next_index': self.next_index
-            }
+            if dirty:
+                tmp_file = self.index_file.with_suffix('.index.tmp')
+                data.tofile(str(tmp_file))
+                os.replace(tmp_file, self.index_file)
 
-            loop = asyncio.get_event_loop()
-            with open(self.document_file, 'wb') as f:
-                await loop.run_in_executor(None, pickle.dump, data, f)
-
-            # 保存FAISS索引
-            if self.index:
-                await loop.run_in_executor(None, get_faiss().write_index, self.index, str(self.index_file))
-
-            # 保存元数据
             with open(self.metadata_file, 'w', encoding='utf-8') as f:
                 json.dump(self.stats, f, ensure_ascii=False, indent=2)
-
-        except Exception as e:
-            self.logger.error(f"保存数据失败: {e}")
+        except Exception:
+            with self._lock:
+                self._dirty = self._dirty or dirty
             raise
 
+    def _wake_if_needed(self):
+        if self._worker is not None and self._needs_rebuild():
+            self._wake.set()
+
+    def _maintenance_loop(self):
+        """后台维护：按间隔写检查点，按需压缩/升级索引"""
+        timeout = self.checkpoint_interval if self.checkpoint_interval > 0 else None
+        while True:
+            self._wake.wait(timeout)
+            self._wake.clear()
+            if self._closing:
+                return
+            try:
+                if self._needs_rebuild():
+                    self._rebuild()
+                if self.checkpoint_interval > 0 or self._dirty:
+                    self._checkpoint()
+            except Exception as e:
+                self.logger.error(f"向量索引后台维护失败: {e}")
+
     def _update_search_stats(self, search_time: float):
         """更新搜索统计"""
         self.stats["search_count"] += 1
@@ -501,14 +827,21 @@ class VectorStore:
             **self.stats,
             "dimension": self.dimension,
             "index_type": self.index_type,
+            "active_index_type": self.active_index_type,
             "store_path": str(self.store_path),
-            "documents_count": len(self.documents)
+            "documents_count": len(self._doc_ids),
+            "tombstones": len(self._tombstones)
         }
 
     async def cleanup(self):
         """清理资源"""
         try:
-            await self._save_data()
+            self._closing = True
+            self._wake.set()
+            if self._worker is not None:
+                await asyncio.get_event_loop().run_in_executor(None, self._worker.join)
+                self._worker = None
+            await self.checkpoint()
             self.logger.info("向量存储资源已清理")
         except Exception as e:
-            self.logger.error(f"清理资源失败: {e}")
\ No newline at end of file
+            self.logger.error(f"清理资源失败: {e}")
@@ -17,6 +17,7 @@ from werkzeug.utils import secure_filename
 import sys
 sys.path.append(str(Path(__file__).parent.parent))
 from common import get_module_logger, get_config, get_prompt_manager
+from web.shared.sse import event_stream_response
 from modules.outline_generator import (
     RequirementAnalyzer,
     OutlineGenerator,
@@ -97,6 +98,28 @@ def get_hitl_technical_file_path(project_id: str) -> Path:
     return None
 
 
+def _save_uploaded_tender_file(tender_file) -> dict:
+    """
+    保存上传的技术需求文件（须在请求上下文中调用）
+
+    Returns:
+        {'path': 保存路径}；未上传返回 {}，失败返回 {'error': 错误信息}（由事件流推送）
+    """
+    if not tender_file:
+        return {}
+    if not allowed_file(tender_file.filename):
+        return {'error': '文件类型不支持'}
+
+    upload_dir = config.get_path('uploads') / 'tender_processing' / datetime.now().strftime('%Y/%m')
+    upload_dir.mkdir(parents=True, exist_ok=True)
+
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    filename = secure_filename(f"{timestamp}_{tender_file.filename}")
+    tender_path = upload_dir / filename
+    tender_file.save(str(tender_path))
+    return {'path': tender_path}
+
+
 def get_tech_proposal_output_dir(project_id=None) -> Path:
     """
     获取技术方案输出目录
@@ -343,232 +366,223 @@ def generate_proposal():
         }), 500
 
 
-@api_outline_bp.route('/generate-proposal-stream', methods=['POST'])
-def generate_proposal_stream():
-    """
-    生成技术方案API（流式SSE版本）
-    实时推送生成进度
-
-    请求参数（multipart/form-data）:
-    - tender_file: 技术需求文档文件
-    - product_file: 产品文档文件（可选）
-    - outputPrefix: 输出文件名前缀
-    - companyId: 公司ID
-    - projectName: 项目名称（可选，从HITL传递）
-    - technicalFileTaskId: HITL任务ID（可选）
-    - includeAnalysis: 是否包含需求分析
-    - includeMapping: 是否生成匹配表
-    - includeSummary: 是否生成总结报告
+def _proposal_stream_events(form: dict, tender_upload: dict):
+    """技术方案生成事件（V1，在后台线程中执行，不访问请求上下文）"""
+    try:
+        # 发送初始进度
+        yield {'stage': 'init', 'progress': 0, 'message': '准备生成技术方案...'}
 
-    返回: text/event-stream
-    """
+        # 1. 参数解析（复用原有逻辑）
+        yield {'stage': 'init', 'progress': 5, 'message': '解析请求参数...'}
 
-    def generate_events():
-        """生成SSE事件流"""
-        try:
-            # 发送初始进度
-            yield f"data: {json.dumps({'stage': 'init', 'progress': 0, 'message': '准备生成技术方案...'}, ensure_ascii=False)}\n\n"
+        output_prefix = form.get('outputPrefix', '技术方案')
+        company_id = form.get('companyId')
+        project_name = form.get('projectName', '')
+        project_id = form.get('technicalFileTaskId', '') or form.get('projectId', '')
 
-            # 1. 参数解析（复用原有逻辑）
-            yield f"data: {json.dumps({'stage': 'init', 'progress': 5, 'message': '解析请求参数...'}, ensure_ascii=False)}\n\n"
+        # 生成选项
+        options = {
+            'include_analysis': form.get('includeAnalysis', 'false').lower() == 'true',
+            'include_mapping': form.get('includeMapping', 'false').lower() == 'true',
+            'include_summary': form.get('includeSummary', 'false').lower() == 'true'
+        }
 
-            tender_file = request.files.get('tender_file')
-            product_file = request.files.get('product_file')
-            output_prefix = request.form.get('outputPrefix', '技术方案')
-            company_id = request.form.get('companyId')
-            project_name = request.form.get('projectName', '')
-            project_id = request.form.get('technicalFileTaskId', '') or request.form.get('projectId', '')
+        # 2. 获取技术需求文件路径
+        if project_id:
+            # 从HITL项目加载 - 使用数据库查询
+            yield {'stage': 'init', 'progress': 10, 'message': f'从投标项目加载技术需求文件 (project_id={project_id})...'}
 
-            # 生成选项
-            options = {
-                'include_analysis': request.form.get('includeAnalysis', 'false').lower() == 'true',
-                'include_mapping': request.form.get('includeMapping', 'false').lower() == 'true',
-                'include_summary': request.form.get('includeSummary', 'false').lower() == 'true'
-            }
+            tender_path = get_hitl_technical_file_path(project_id)
 
-            # 2. 获取技术需求文件路径
-            if project_id:
-                # 从HITL项目加载 - 使用数据库查询
-                yield f"data: {json.dumps({'stage': 'init', 'progress': 10, 'message': f'从投标项目加载技术需求文件 (project_id={project_id})...'}, ensure_ascii=False)}\n\n"
+            if not tender_path:
+                logger.error(f'未找到项目的技术需求文件: project_id={project_id}')
+                raise ValueError(f'未找到项目的技术需求文件: project_id={project_id}')
+        elif tender_upload:
+            # 上传文件（已在请求中保存）
+            yield {'stage': 'init', 'progress': 10, 'message': '保存上传的技术需求文件...'}
+            if 'error' in tender_upload:
+                raise ValueError(tender_upload['error'])
+            tender_path = tender_upload['path']
+        else:
+            raise ValueError('未提供技术需求文档文件')
 
-                tender_path = get_hitl_technical_file_path(project_id)
+        # 3. 阶段1：需求分析
+        yield {'stage': 'analysis', 'progress': 15, 'message': '🔍 正在分析技术需求文档...'}
 
-                if not tender_path:
-                    logger.error(f'未找到项目的技术需求文件: project_id={project_id}')
-                    raise ValueError(f'未找到项目的技术需求文件: project_id={project_id}')
-            elif tender_file:
-                # 上传文件
-                yield f"data: {json.dumps({'stage': 'init', 'progress': 10, 'message': '保存上传的技术需求文件...'}, ensure_ascii=False)}\n\n"
-                if not allowed_file(tender_file.filename):
-                    raise ValueError('文件类型不支持')
+        analyzer = RequirementAnalyzer()
+        analysis_result = analyzer.analyze_document(str(tender_path))
 
-                upload_dir = config.get_path('uploads') / 'tender_processing' / datetime.now().strftime('%Y/%m')
-                upload_dir.mkdir(parents=True, exist_ok=True)
+        yield {'stage': 'analysis', 'progress': 30, 'message': '✓ 需求分析完成'}
 
-                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                filename = secure_filename(f"{timestamp}_{tender_file.filename}")
-                tender_path = upload_dir / filename
-                tender_file.save(str(tender_path))
-            else:
-                raise ValueError('未提供技术需求文档文件')
+        # 发送完整的需求分析结果供前端展示
+        try:
+            # 确保analysis_result可以被JSON序列化
+            analysis_result_serializable = json.loads(json.dumps(analysis_result, ensure_ascii=False, default=str))
+            yield {'stage': 'analysis_completed', 'analysis_result': analysis_result_serializable}
+        except Exception as e:
+            logger.warning(f"无法序列化需求分析结果: {e}, 跳过前端展示")
+            # 继续执行,不影响后续流程
 
-            # 3. 阶段1：需求分析
-            yield f"data: {json.dumps({'stage': 'analysis', 'progress': 15, 'message': '🔍 正在分析技术需求文档...'}, ensure_ascii=False)}\n\n"
+        # 4. 阶段2：大纲生成
+        yield {'stage': 'outline', 'progress': 35, 'message': '📝 正在生成技术方案大纲...'}
 
-            analyzer = RequirementAnalyzer()
-            analysis_result = analyzer.analyze_document(str(tender_path))
+        outline_gen = OutlineGenerator()
+        outline_data = outline_gen.generate_outline(
+            analysis_result,
+            project_name=output_prefix
+        )
 
-            yield f"data: {json.dumps({'stage': 'analysis', 'progress': 30, 'message': '✓ 需求分析完成'}, ensure_ascii=False)}\n\n"
+        yield {'stage': 'outline', 'progress': 55, 'message': '✓ 大纲生成完成'}
 
-            # 发送完整的需求分析结果供前端展示
-            try:
-                # 确保analysis_result可以被JSON序列化
-                analysis_result_serializable = json.loads(json.dumps(analysis_result, ensure_ascii=False, default=str))
-                yield f"data: {json.dumps({'stage': 'analysis_completed', 'analysis_result': analysis_result_serializable}, ensure_ascii=False)}\n\n"
-            except Exception as e:
-                logger.warning(f"无法序列化需求分析结果: {e}, 跳过前端展示")
-                # 继续执行,不影响后续流程
+        # 发送完整的大纲数据供前端展示
+        try:
+            # 确保outline_data可以被JSON序列化
+            outline_data_serializable = json.loads(json.dumps(outline_data, ensure_ascii=False, default=str))
+            yield {'stage': 'outline_completed', 'outline_data': outline_data_serializable}
+        except Exception as e:
+            logger.warning(f"无法序列化大纲数据: {e}, 跳过前端展示")
+            # 继续执行,不影响后续流程
 
-            # 4. 阶段2：大纲生成
-            yield f"data: {json.dumps({'stage': 'outline', 'progress': 35, 'message': '📝 正在生成技术方案大纲...'}, ensure_ascii=False)}\n\n"
+        # 5. 阶段3：产品文档匹配
+        yield {'stage': 'matching', 'progress': 60, 'message': '🔗 正在匹配产品文档...'}
 
-            outline_gen = OutlineGenerator()
-            outline_data = outline_gen.generate_outline(
-                analysis_result,
-                project_name=output_prefix
-            )
+        matcher = ProductMatcher()
+        matched_docs = matcher.match_documents(
+            analysis_result.get('requirement_categories', []),
+            company_id=int(company_id) if company_id else None
+        )
 
-            yield f"data: {json.dumps({'stage': 'outline', 'progress': 55, 'message': '✓ 大纲生成完成'}, ensure_ascii=False)}\n\n"
+        matches_count = sum(len(v) for v in matched_docs.values())
+        yield {'stage': 'matching', 'progress': 70, 'message': f'✓ 文档匹配完成（匹配到 {matches_count} 份文档）'}
 
-            # 发送完整的大纲数据供前端展示
-            try:
-                # 确保outline_data可以被JSON序列化
-                outline_data_serializable = json.loads(json.dumps(outline_data, ensure_ascii=False, default=str))
-                yield f"data: {json.dumps({'stage': 'outline_completed', 'outline_data': outline_data_serializable}, ensure_ascii=False)}\n\n"
-            except Exception as e:
-                logger.warning(f"无法序列化大纲数据: {e}, 跳过前端展示")
-                # 继续执行,不影响后续流程
+        # 6. 阶段4：方案组装
+        yield {'stage': 'assembly', 'progress': 75, 'message': '⚙️ 正在组装技术方案...'}
 
-            # 5. 阶段3：产品文档匹配
-            yield f"data: {json.dumps({'stage': 'matching', 'progress': 60, 'message': '🔗 正在匹配产品文档...'}, ensure_ascii=False)}\n\n"
+        assembler = ProposalAssembler()
+        proposal = assembler.assemble_proposal(
+            outline_data,
+            analysis_result,
+            matched_docs,
+            options
+        )
 
-            matcher = ProductMatcher()
-            matched_docs = matcher.match_documents(
-                analysis_result.get('requirement_categories', []),
-                company_id=int(company_id) if company_id else None
-            )
+        yield {'stage': 'assembly', 'progress': 85, 'message': '✓ 方案组装完成'}
 
-            matches_count = sum(len(v) for v in matched_docs.values())
-            yield f"data: {json.dumps({'stage': 'matching', 'progress': 70, 'message': f'✓ 文档匹配完成（匹配到 {matches_count} 份文档）'}, ensure_ascii=False)}\n\n"
+        # 7. 导出文件
+        yield {'stage': 'export', 'progress': 90, 'message': '💾 正在导出文件...'}
 
-            # 6. 阶段4：方案组装
-            yield f"data: {json.dumps({'stage': 'assembly', 'progress': 75, 'message': '⚙️ 正在组装技术方案...'}, ensure_ascii=False)}\n\n"
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        # 使用统一的输出目录函数，直接保存到 tech_proposal_files/{年}/{月}/{项目ID}/
+        output_dir = get_tech_proposal_output_dir(project_id)
 
-            assembler = ProposalAssembler()
-            proposal = assembler.assemble_proposal(
-                outline_data,
-                analysis_result,
-                matched_docs,
-                options
-            )
+        exporter = WordExporter()
+        output_files = {}
 
-            yield f"data: {json.dumps({'stage': 'assembly', 'progress': 85, 'message': '✓ 方案组装完成'}, ensure_ascii=False)}\n\n"
+        # 文件命名：项目ID_项目名称_类型_时间戳（项目ID确保唯一性）
+        project_id_str = f"P{project_id}" if project_id and project_id != 'default' else ''
+        name_part = project_name if project_name else output_prefix
+        if project_id_str:
+            proposal_filename = f"{project_id_str}_{name_part}_技术方案_{timestamp}.docx"
+            analysis_filename = f"{project_id_str}_{name_part}_需求分析_{timestamp}.docx"
+            mapping_filename = f"{project_id_str}_{name_part}_需求匹配表_{timestamp}.xlsx"
+            summary_filename = f"{project_id_str}_{name_part}_生成报告_{timestamp}.txt"
+        else:
+            proposal_filename = f"{name_part}_技术方案_{timestamp}.docx"
+            analysis_filename = f"{name_part}_需求分析_{timestamp}.docx"
+            mapping_filename = f"{name_part}_需求匹配表_{timestamp}.xlsx"
+            summary_filename = f"{name_part}_生成报告_{timestamp}.txt"
 
-            # 7. 导出文件
-            yield f"data: {json.dumps({'stage': 'export', 'progress': 90, 'message': '💾 正在导出文件...'}, ensure_ascii=False)}\n\n"
+        # 导出主方案（简洁模式，不显示大纲指导信息）
+        proposal_path = output_dir / proposal_filename
+        exporter.export_proposal(proposal, str(proposal_path), show_guidance=False)
+        output_files['proposal'] = f"/api/downloads/{proposal_filename}"
 
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            # 使用统一的输出目录函数，直接保存到 tech_proposal_files/{年}/{月}/{项目ID}/
-            output_dir = get_tech_proposal_output_dir(project_id)
+        # 导出附件
+        if options['include_analysis']:
+            analysis_path = output_dir / analysis_filename
+            exporter.export_analysis_report(analysis_result, str(analysis_path))
+            output_files['analysis'] = f"/api/downloads/{analysis_filename}"
 
-            exporter = WordExporter()
-            output_files = {}
+        if options['include_mapping']:
+            mapping_path = output_dir / mapping_filename
+            mapping_data = []
+            for attachment in proposal.get('attachments', []):
+                if attachment['type'] == 'mapping':
+                    mapping_data = attachment['data']
+                    break
+            exporter.export_mapping_table(mapping_data, str(mapping_path))
+            output_files['mapping'] = f"/api/downloads/{mapping_filename}"
 
-            # 文件命名：项目ID_项目名称_类型_时间戳（项目ID确保唯一性）
-            project_id_str = f"P{project_id}" if project_id and project_id != 'default' else ''
-            name_part = project_name if project_name else output_prefix
-            if project_id_str:
-                proposal_filename = f"{project_id_str}_{name_part}_技术方案_{timestamp}.docx"
-                analysis_filename = f"{project_id_str}_{name_part}_需求分析_{timestamp}.docx"
-                mapping_filename = f"{project_id_str}_{name_part}_需求匹配表_{timestamp}.xlsx"
-                summary_filename = f"{project_id_str}_{name_part}_生成报告_{timestamp}.txt"
-            else:
-                proposal_filename = f"{name_part}_技术方案_{timestamp}.docx"
-                analysis_filename = f"{name_part}_需求分析_{timestamp}.docx"
-                mapping_filename = f"{name_part}_需求匹配表_{timestamp}.xlsx"
-                summary_filename = f"{name_part}_生成报告_{timestamp}.txt"
+        if options['include_summary']:
+            summary_path = output_dir / summary_filename
+            summary_data = {}
+            for attachment in proposal.get('attachments', []):
+                if attachment['type'] == 'summary':
+                    summary_data = attachment['data']
+                    break
+            exporter.export_summary_report(summary_data, str(summary_path))
+            output_files['summary'] = f"/api/downloads/{summary_filename}"
 
-            # 导出主方案（简洁模式，不显示大纲指导信息）
-            proposal_path = output_dir / proposal_filename
-            exporter.export_proposal(proposal, str(proposal_path), show_guidance=False)
-            output_files['proposal'] = f"/api/downloads/{proposal_filename}"
-
-            # 导出附件
-            if options['include_analysis']:
-                analysis_path = output_dir / analysis_filename
-                exporter.export_analysis_report(analysis_result, str(analysis_path))
-                output_files['analysis'] = f"/api/downloads/{analysis_filename}"
-
-            if options['include_mapping']:
-                mapping_path = output_dir / mapping_filename
-                mapping_data = []
-                for attachment in proposal.get('attachments', []):
-                    if attachment['type'] == 'mapping':
-                        mapping_data = attachment['data']
-                        break
-                exporter.export_mapping_table(mapping_data, str(mapping_path))
-                output_files['mapping'] = f"/api/downloads/{mapping_filename}"
-
-            if options['include_summary']:
-                summary_path = output_dir / summary_filename
-                summary_data = {}
-                for attachment in proposal.get('attachments', []):
-                    if attachment['type'] == 'summary':
-                        summary_data = attachment['data']
-                        break
-                exporter.export_summary_report(summary_data, str(summary_path))
-                output_files['summary'] = f"/api/downloads/{summary_filename}"
-
-            # 统计信息
-            requirements_count = analysis_result.get('document_summary', {}).get('total_requirements', 0)
-            sections_count = len(outline_data.get('chapters', []))
-
-            # 8. 完成
-            result = {
-                'stage': 'completed',
-                'progress': 100,
-                'message': '✅ 技术方案生成成功！',
-                'success': True,
-                'requirements_count': requirements_count,
-                'features_count': 0,
-                'sections_count': sections_count,
-                'matches_count': matches_count,
-                'output_file': str(proposal_path),  # ✅ 添加文件系统完整路径，与商务应答/点对点应答保持一致
-                'output_files': output_files  # 保留下载URL字典
-            }
+        # 统计信息
+        requirements_count = analysis_result.get('document_summary', {}).get('total_requirements', 0)
+        sections_count = len(outline_data.get('chapters', []))
 
-            yield f"data: {json.dumps(result, ensure_ascii=False)}\n\n"
-            logger.info("技术方案生成成功（SSE流式）")
+        # 8. 完成
+        result = {
+            'stage': 'completed',
+            'progress': 100,
+            'message': '✅ 技术方案生成成功！',
+            'success': True,
+            'requirements_count': requirements_count,
+            'features_count': 0,
+            'sections_count': sections_count,
+            'matches_count': matches_count,
+            'output_file': str(proposal_path),  # ✅ 添加文件系统完整路径，与商务应答/点对点应答保持一致
+            'output_files': output_files  # 保留下载URL字典
+        }
 
-        except Exception as e:
-            logger.error(f"技术方案生成失败（SSE流式）: {e}", exc_info=True)
-            error_data = {
-                'stage': 'error',
-                'progress': 0,
-                'message': f'生成失败: {str(e)}',
-                'success': False,
-                'error': str(e)
-            }
-            yield f"data: {json.dumps(error_data, ensure_ascii=False)}\n\n"
+        yield result
+        logger.info("技术方案生成成功（SSE流式）")
 
-    return Response(
-        stream_with_context(generate_events()),
-        mimetype='text/event-stream',
-        headers={
-            'Cache-Control': 'no-cache',
-            'X-Accel-Buffering': 'no'
+    except Exception as e:
+        logger.error(f"技术方案生成失败（SSE流式）: {e}", exc_info=True)
+        error_data = {
+            'stage': 'error',
+            'progress': 0,
+            'message': f'生成失败: {str(e)}',
+            'success': False,
+            'error': str(e)
         }
-    )
+        yield error_data
+
+
+@api_outline_bp.route('/generate-proposal-stream', methods=['POST'])
+def generate_proposal_stream():
+    """
+    生成技术方案API（流式SSE版本）
+    实时推送生成进度
+
+    请求参数（multipart/form-data）:
+    - tender_file: 技术需求文档文件
+    - product_file: 产品文档文件（可选）
+    - outputPrefix: 输出文件名前缀
+    - companyId: 公司ID
+    - projectName: 项目名称（可选，从HITL传递）
+    - technicalFileTaskId: HITL任务ID（可选）
+    - includeAnalysis: 是否包含需求分析
+    - includeMapping: 是否生成匹配表
+    - includeSummary: 是否生成总结报告
+
+    返回: text/event-stream（响应头 X-Stream-Id；断线后携带 X-Stream-Id 与 Last-Event-ID 续传）
+    """
+
+    def producer():
+        form = request.form.to_dict()
+        project_id = form.get('technicalFileTaskId', '') or form.get('projectId', '')
+        tender_upload = {} if project_id else _save_uploaded_tender_file(request.files.get('tender_file'))
+        return _proposal_stream_events(form, tender_upload)
+
+    return event_stream_response('tech_proposal', producer)
 
 
 @api_outline_bp.route('/downloads/<filename>', methods=['GET'])
@@ -620,269 +634,260 @@ def download_file(filename):
         }), 500
 
 
-@api_outline_bp.route('/generate-proposal-stream-v2', methods=['POST'])
-def generate_proposal_stream_v2():
-    """
-    生成技术方案API（流式SSE版本 V2 - 支持实时内容推送）
-    实时推送生成进度和章节内容
+def _proposal_stream_events_v2(form: dict, tender_upload: dict):
+    """技术方案生成事件（V2，在后台线程中执行，不访问请求上下文）"""
+    try:
+        # 初始化
+        yield {'stage': 'init', 'progress': 0, 'message': '准备生成技术方案...'}
 
-    请求参数（multipart/form-data）:
-    - tender_file: 技术需求文档文件
-    - outputPrefix: 输出文件名前缀
-    - companyId: 公司ID
-    - projectName: 项目名称
-    - projectId: 项目ID（从HITL传递）
-    - includeAnalysis: 是否包含需求分析
-    - includeMapping: 是否生成匹配表
-    - includeSummary: 是否生成总结报告
-    - useStreamingContent: 是否使用流式内容生成（默认true）
+        # 参数解析
+        yield {'stage': 'init', 'progress': 5, 'message': '解析请求参数...'}
 
-    返回: text/event-stream
-    """
+        output_prefix = form.get('outputPrefix', '技术方案')
+        company_id = form.get('companyId')
+        project_name = form.get('projectName', '')
+        project_id = form.get('projectId', '')
+        ai_model = form.get('aiModel', 'shihuang-gpt4o-mini')  # ✅ 获取AI模型参数，默认gpt4o-mini
+        use_streaming_content = form.get('useStreamingContent', 'true').lower() == 'true'
+        proposal_mode = form.get('proposalMode', 'basic')  # ✅ 获取方案模式参数，默认basic
 
-    def generate_events():
-        """生成SSE事件流"""
-        try:
-            # 初始化
-            yield f"data: {json.dumps({'stage': 'init', 'progress': 0, 'message': '准备生成技术方案...'}, ensure_ascii=False)}\n\n"
+        logger.info(f"使用AI模型: {ai_model}, 方案模式: {proposal_mode}")
 
-            # 参数解析
-            yield f"data: {json.dumps({'stage': 'init', 'progress': 5, 'message': '解析请求参数...'}, ensure_ascii=False)}\n\n"
+        # 生成选项
+        options = {
+            'include_analysis': form.get('includeAnalysis', 'false').lower() == 'true',
+            'include_mapping': form.get('includeMapping', 'false').lower() == 'true',
+            'include_summary': form.get('includeSummary', 'false').lower() == 'true'
+        }
 
-            tender_file = request.files.get('tender_file')
-            output_prefix = request.form.get('outputPrefix', '技术方案')
-            company_id = request.form.get('companyId')
-            project_name = request.form.get('projectName', '')
-            project_id = request.form.get('projectId', '')
-            ai_model = request.form.get('aiModel', 'shihuang-gpt4o-mini')  # ✅ 获取AI模型参数，默认gpt4o-mini
-            use_streaming_content = request.form.get('useStreamingContent', 'true').lower() == 'true'
-            proposal_mode = request.form.get('proposalMode', 'basic')  # ✅ 获取方案模式参数，默认basic
-
-            logger.info(f"使用AI模型: {ai_model}, 方案模式: {proposal_mode}")
-
-            # 生成选项
-            options = {
-                'include_analysis': request.form.get('includeAnalysis', 'false').lower() == 'true',
-                'include_mapping': request.form.get('includeMapping', 'false').lower() == 'true',
-                'include_summary': request.form.get('includeSummary', 'false').lower() == 'true'
-            }
+        # 获取技术需求文件路径
+        if project_id:
+            yield {'stage': 'init', 'progress': 10, 'message': f'从投标项目加载技术需求文件...'}
 
-            # 获取技术需求文件路径
-            if project_id:
-                yield f"data: {json.dumps({'stage': 'init', 'progress': 10, 'message': f'从投标项目加载技术需求文件...'}, ensure_ascii=False)}\n\n"
+            tender_path = get_hitl_technical_file_path(project_id)
 
-                tender_path = get_hitl_technical_file_path(project_id)
+            if not tender_path:
+                raise ValueError(f'未找到项目的技术需求文件: project_id={project_id}')
+        elif tender_upload:
+            yield {'stage': 'init', 'progress': 10, 'message': '保存上传的技术需求文件...'}
 
-                if not tender_path:
-                    raise ValueError(f'未找到项目的技术需求文件: project_id={project_id}')
-            elif tender_file:
-                yield f"data: {json.dumps({'stage': 'init', 'progress': 10, 'message': '保存上传的技术需求文件...'}, ensure_ascii=False)}\n\n"
+            if 'error' in tender_upload:
+                raise ValueError(tender_upload['error'])
+            tender_path = tender_upload['path']
+        else:
+            raise ValueError('未提供技术需求文档文件')
 
-                if not allowed_file(tender_file.filename):
-                    raise ValueError('文件类型不支持')
+        # 阶段1：需求分析
+        yield {'stage': 'analysis', 'progress': 15, 'message': '🔍 正在分析技术需求文档...'}
 
-                upload_dir = config.get_path('uploads') / 'tender_processing' / datetime.now().strftime('%Y/%m')
-                upload_dir.mkdir(parents=True, exist_ok=True)
+        analyzer = RequirementAnalyzer(model_name=ai_model)  # ✅ 传递AI模型参数
+        analysis_result = analyzer.analyze_document(str(tender_path))
 
-                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                filename = secure_filename(f"{timestamp}_{tender_file.filename}")
-                tender_path = upload_dir / filename
-                tender_file.save(str(tender_path))
-            else:
-                raise ValueError('未提供技术需求文档文件')
+        yield {'stage': 'analysis', 'progress': 30, 'message': '✓ 需求分析完成'}
 
-            # 阶段1：需求分析
-            yield f"data: {json.dumps({'stage': 'analysis', 'progress': 15, 'message': '🔍 正在分析技术需求文档...'}, ensure_ascii=False)}\n\n"
+        # 阶段2：大纲生成
+        yield {'stage': 'outline', 'progress': 35, 'message': '📝 正在生成技术方案大纲...'}
 
-            analyzer = RequirementAnalyzer(model_name=ai_model)  # ✅ 传递AI模型参数
-            analysis_result = analyzer.analyze_document(str(tender_path))
+        outline_gen = OutlineGenerator(model_name=ai_model)  # ✅ 传递AI模型参数
+        outline_data = outline_gen.generate_outline(analysis_result, project_name=output_prefix)
 
-            yield f"data: {json.dumps({'stage': 'analysis', 'progress': 30, 'message': '✓ 需求分析完成'}, ensure_ascii=False)}\n\n"
+        yield {'stage': 'outline', 'progress': 55, 'message': '✓ 大纲生成完成'}
 
-            # 阶段2：大纲生成
-            yield f"data: {json.dumps({'stage': 'outline', 'progress': 35, 'message': '📝 正在生成技术方案大纲...'}, ensure_ascii=False)}\n\n"
+        # 发送完整的大纲数据供前端展示（与V1接口保持一致）
+        try:
+            outline_data_serializable = json.loads(json.dumps(outline_data, ensure_ascii=False, default=str))
+            yield {'stage': 'outline_completed', 'outline_data': outline_data_serializable}
+        except Exception as e:
+            logger.warning(f"无法序列化大纲数据: {e}, 跳过前端展示")
+            # 继续执行，不影响后续流程
 
-            outline_gen = OutlineGenerator(model_name=ai_model)  # ✅ 传递AI模型参数
-            outline_data = outline_gen.generate_outline(analysis_result, project_name=output_prefix)
+        # 阶段3：产品文档匹配
+        yield {'stage': 'matching', 'progress': 60, 'message': '🔗 正在匹配产品文档...'}
 
-            yield f"data: {json.dumps({'stage': 'outline', 'progress': 55, 'message': '✓ 大纲生成完成'}, ensure_ascii=False)}\n\n"
+        matcher = ProductMatcher()
+        matched_docs = matcher.match_documents(
+            analysis_result.get('requirement_categories', []),
+            company_id=int(company_id) if company_id else None
+        )
 
-            # 发送完整的大纲数据供前端展示（与V1接口保持一致）
-            try:
-                outline_data_serializable = json.loads(json.dumps(outline_data, ensure_ascii=False, default=str))
-                yield f"data: {json.dumps({'stage': 'outline_completed', 'outline_data': outline_data_serializable}, ensure_ascii=False)}\n\n"
-            except Exception as e:
-                logger.warning(f"无法序列化大纲数据: {e}, 跳过前端展示")
-                # 继续执行，不影响后续流程
+        matches_count = sum(len(v) for v in matched_docs.values())
+        yield {'stage': 'matching', 'progress': 70, 'message': f'✓ 文档匹配完成（匹配到 {matches_count} 份文档）'}
 
-            # 阶段3：产品文档匹配
-            yield f"data: {json.dumps({'stage': 'matching', 'progress': 60, 'message': '🔗 正在匹配产品文档...'}, ensure_ascii=False)}\n\n"
+        # 阶段4：方案组装（流式）
+        yield {'stage': 'assembly', 'progress': 75, 'message': '⚙️ 正在组装技术方案...'}
 
-            matcher = ProductMatcher()
-            matched_docs = matcher.match_documents(
-                analysis_result.get('requirement_categories', []),
-                company_id=int(company_id) if company_id else None
-            )
+        assembler = ProposalAssembler(model_name=ai_model)  # ✅ 传递AI模型参数
 
-            matches_count = sum(len(v) for v in matched_docs.values())
-            yield f"data: {json.dumps({'stage': 'matching', 'progress': 70, 'message': f'✓ 文档匹配完成（匹配到 {matches_count} 份文档）'}, ensure_ascii=False)}\n\n"
-
-            # 阶段4：方案组装（流式）
-            yield f"data: {json.dumps({'stage': 'assembly', 'progress': 75, 'message': '⚙️ 正在组装技术方案...'}, ensure_ascii=False)}\n\n"
-
-            assembler = ProposalAssembler(model_name=ai_model)  # ✅ 传递AI模型参数
-
-            # 选择流式或非流式组装
-            if use_streaming_content:
-                logger.info("使用流式内容生成模式")
-                proposal = None
-
-                for event in assembler.assemble_proposal_stream(outline_data, analysis_result, matched_docs, options, proposal_mode):
-                    event_type = event.get('type')
-
-                    if event_type == 'chapter_start':
-                        # 推送章节开始
-                        chapter_start_data = {
-                            'stage': 'content_generation',
-                            'event': 'chapter_start',
-                            'chapter_number': event.get('chapter_number', ''),
-                            'chapter_title': event.get('chapter_title', ''),
-                            'message': f"📄 开始生成 {event.get('chapter_number', '')} {event.get('chapter_title', '')}..."
-                        }
-                        yield f"data: {json.dumps(chapter_start_data, ensure_ascii=False)}\n\n"
-
-                    elif event_type == 'content_chunk':
-                        # 推送内容片段
-                        content_chunk_data = {
-                            'stage': 'content_generation',
-                            'event': 'content_chunk',
-                            'chapter_number': event.get('chapter_number', ''),
-                            'content': event.get('chunk', '')
-                        }
-                        yield f"data: {json.dumps(content_chunk_data, ensure_ascii=False)}\n\n"
-
-                    elif event_type == 'chapter_end':
-                        # 推送章节完成
-                        chapter_end_data = {
-                            'stage': 'content_generation',
-                            'event': 'chapter_end',
-                            'chapter_number': event.get('chapter_number', ''),
-                            'message': f"✓ {event.get('chapter_title', '')} 生成完成"
-                        }
-                        yield f"data: {json.dumps(chapter_end_data, ensure_ascii=False)}\n\n"
-
-                    elif event_type == 'completed':
-                        # 保存方案数据
-                        proposal = event['proposal']
-
-                    elif event_type == 'error':
-                        raise Exception(event['error'])
-
-                if not proposal:
-                    raise ValueError("流式组装未返回完整方案")
-
-                yield f"data: {json.dumps({'stage': 'assembly', 'progress': 85, 'message': '✓ 方案组装完成（流式）'}, ensure_ascii=False)}\n\n"
-            else:
-                # 使用非流式组装（原有逻辑）
-                proposal = assembler.assemble_proposal(outline_data, analysis_result, matched_docs, options, proposal_mode)
-                yield f"data: {json.dumps({'stage': 'assembly', 'progress': 85, 'message': '✓ 方案组装完成'}, ensure_ascii=False)}\n\n"
+        # 选择流式或非流式组装
+        if use_streaming_content:
+            logger.info("使用流式内容生成模式")
+            proposal = None
 
-            # 导出文件
-            yield f"data: {json.dumps({'stage': 'export', 'progress': 90, 'message': '💾 正在导出文件...'}, ensure_ascii=False)}\n\n"
+            for event in assembler.assemble_proposal_stream(outline_data, analysis_result, matched_docs, options, proposal_mode):
+                event_type = event.get('type')
 
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            # 使用统一的输出目录函数，直接保存到 tech_proposal_files/{年}/{月}/{项目ID}/
-            output_dir = get_tech_proposal_output_dir(project_id)
+                if event_type == 'chapter_start':
+                    # 推送章节开始
+                    chapter_start_data = {
+                        'stage': 'content_generation',
+                        'event': 'chapter_start',
+                        'chapter_number': event.get('chapter_number', ''),
+                        'chapter_title': event.get('chapter_title', ''),
+                        'message': f"📄 开始生成 {event.get('chapter_number', '')} {event.get('chapter_title', '')}..."
+                    }
+                    yield chapter_start_data
+
+                elif event_type == 'content_chunk':
+                    # 推送内容片段
+                    content_chunk_data = {
+                        'stage': 'content_generation',
+                        'event': 'content_chunk',
+                        'chapter_number': event.get('chapter_number', ''),
+                        'content': event.get('chunk', '')
+                    }
+                    yield content_chunk_data
+
+                elif event_type == 'chapter_end':
+                    # 推送章节完成
+                    chapter_end_data = {
+                        'stage': 'content_generation',
+                        'event': 'chapter_end',
+                        'chapter_number': event.get('chapter_number', ''),
+                        'message': f"✓ {event.get('chapter_title', '')} 生成完成"
+                    }
+                    yield chapter_end_data
 
-            exporter = WordExporter()
-            output_files = {}
+                elif event_type == 'completed':
+                    # 保存方案数据
+                    proposal = event['proposal']
 
-            # 文件命名：项目ID_项目名称_类型_时间戳（项目ID确保唯一性）
-            project_id_str = f"P{project_id}" if project_id and project_id != 'default' else ''
-            name_part = project_name if project_name else output_prefix
-            if project_id_str:
-                proposal_filename = f"{project_id_str}_{name_part}_技术方案_{timestamp}.docx"
-                analysis_filename = f"{project_id_str}_{name_part}_需求分析_{timestamp}.docx"
-                mapping_filename = f"{project_id_str}_{name_part}_需求匹配表_{timestamp}.xlsx"
-                summary_filename = f"{project_id_str}_{name_part}_生成报告_{timestamp}.txt"
-            else:
-                proposal_filename = f"{name_part}_技术方案_{timestamp}.docx"
-                analysis_filename = f"{name_part}_需求分析_{timestamp}.docx"
-                mapping_filename = f"{name_part}_需求匹配表_{timestamp}.xlsx"
-                summary_filename = f"{name_part}_生成报告_{timestamp}.txt"
+                elif event_type == 'error':
+                    raise Exception(event['error'])
 
-            # 导出主方案（简洁模式，不显示大纲指导信息）
-            proposal_path = output_dir / proposal_filename
-            exporter.export_proposal(proposal, str(proposal_path), show_guidance=False)
-            output_files['proposal'] = f"/api/downloads/{proposal_filename}"
-
-            # 导出附件
-            if options['include_analysis']:
-                analysis_path = output_dir / analysis_filename
-                exporter.export_analysis_report(analysis_result, str(analysis_path))
-                output_files['analysis'] = f"/api/downloads/{analysis_filename}"
-
-            if options['include_mapping']:
-                mapping_path = output_dir / mapping_filename
-                mapping_data = []
-                for attachment in proposal.get('attachments', []):
-                    if attachment['type'] == 'mapping':
-                        mapping_data = attachment['data']
-                        break
-                exporter.export_mapping_table(mapping_data, str(mapping_path))
-                output_files['mapping'] = f"/api/downloads/{mapping_filename}"
-
-            if options['include_summary']:
-                summary_path = output_dir / summary_filename
-                summary_data = {}
-                for attachment in proposal.get('attachments', []):
-                    if attachment['type'] == 'summary':
-                        summary_data = attachment['data']
-                        break
-                exporter.export_summary_report(summary_data, str(summary_path))
-                output_files['summary'] = f"/api/downloads/{summary_filename}"
-
-            # 统计信息
-            requirements_count = analysis_result.get('document_summary', {}).get('total_requirements', 0)
-            sections_count = len(outline_data.get('chapters', []))
-
-            # 完成
-            result = {
-                'stage': 'completed',
-                'progress': 100,
-                'message': '✅ 技术方案生成成功！',
-                'success': True,
-                'requirements_count': requirements_count,
-                'features_count': 0,
-                'sections_count': sections_count,
-                'matches_count': matches_count,
-                'output_file': str(proposal_path),
-                'output_files': output_files,
-                'streaming_mode': use_streaming_content
-            }
+            if not proposal:
+                raise ValueError("流式组装未返回完整方案")
 
-            yield f"data: {json.dumps(result, ensure_ascii=False)}\n\n"
-            logger.info("技术方案生成成功（SSE流式V2）")
+            yield {'stage': 'assembly', 'progress': 85, 'message': '✓ 方案组装完成（流式）'}
+        else:
+            # 使用非流式组装（原有逻辑）
+            proposal = assembler.assemble_proposal(outline_data, analysis_result, matched_docs, options, proposal_mode)
+            yield {'stage': 'assembly', 'progress': 85, 'message': '✓ 方案组装完成'}
 
-        except Exception as e:
-            logger.error(f"技术方案生成失败（SSE流式V2）: {e}", exc_info=True)
-            error_data = {
-                'stage': 'error',
-                'progress': 0,
-                'message': f'生成失败: {str(e)}',
-                'success': False,
-                'error': str(e)
-            }
-            yield f"data: {json.dumps(error_data, ensure_ascii=False)}\n\n"
+        # 导出文件
+        yield {'stage': 'export', 'progress': 90, 'message': '💾 正在导出文件...'}
 
-    return Response(
-        stream_with_context(generate_events()),
-        mimetype='text/event-stream',
-        headers={
-            'Cache-Control': 'no-cache',
-            'X-Accel-Buffering': 'no'
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        # 使用统一的输出目录函数，直接保存到 tech_proposal_files/{年}/{月}/{项目ID}/
+        output_dir = get_tech_proposal_output_dir(project_id)
+
+        exporter = WordExporter()
+        output_files = {}
+
+        # 文件命名：项目ID_项目名称_类型_时间戳（项目ID确保唯一性）
+        project_id_str = f"P{project_id}" if project_id and project_id != 'default' else ''
+        name_part = project_name if project_name else output_prefix
+        if project_id_str:
+            proposal_filename = f"{project_id_str}_{name_part}_技术方案_{timestamp}.docx"
+            analysis_filename = f"{project_id_str}_{name_part}_需求分析_{timestamp}.docx"
+            mapping_filename = f"{project_id_str}_{name_part}_需求匹配表_{timestamp}.xlsx"
+            summary_filename = f"{project_id_str}_{name_part}_生成报告_{timestamp}.txt"
+        else:
+            proposal_filename = f"{name_part}_技术方案_{timestamp}.docx"
+            analysis_filename = f"{name_part}_需求分析_{timestamp}.docx"
+            mapping_filename = f"{name_part}_需求匹配表_{timestamp}.xlsx"
+            summary_filename = f"{name_part}_生成报告_{timestamp}.txt"
+
+        # 导出主方案（简洁模式，不显示大纲指导信息）
+        proposal_path = output_dir / proposal_filename
+        exporter.export_proposal(proposal, str(proposal_path), show_guidance=False)
+        output_files['proposal'] = f"/api/downloads/{proposal_filename}"
+
+        # 导出附件
+        if options['include_analysis']:
+            analysis_path = output_dir / analysis_filename
+            exporter.export_analysis_report(analysis_result, str(analysis_path))
+            output_files['analysis'] = f"/api/downloads/{analysis_filename}"
+
+        if options['include_mapping']:
+            mapping_path = output_dir / mapping_filename
+            mapping_data = []
+            for attachment in proposal.get('attachments', []):
+                if attachment['type'] == 'mapping':
+                    mapping_data = attachment['data']
+                    break
+            exporter.export_mapping_table(mapping_data, str(mapping_path))
+            output_files['mapping'] = f"/api/downloads/{mapping_filename}"
+
+        if options['include_summary']:
+            summary_path = output_dir / summary_filename
+            summary_data = {}
+            for attachment in proposal.get('attachments', []):
+                if attachment['type'] == 'summary':
+                    summary_data = attachment['data']
+                    break
+            exporter.export_summary_report(summary_data, str(summary_path))
+            output_files['summary'] = f"/api/downloads/{summary_filename}"
+
+        # 统计信息
+        requirements_count = analysis_result.get('document_summary', {}).get('total_requirements', 0)
+        sections_count = len(outline_data.get('chapters', []))
+
+        # 完成
+        result = {
+            'stage': 'completed',
+            'progress': 100,
+            'message': '✅ 技术方案生成成功！',
+            'success': True,
+            'requirements_count': requirements_count,
+            'features_count': 0,
+            'sections_count': sections_count,
+            'matches_count': matches_count,
+            'output_file': str(proposal_path),
+            'output_files': output_files,
+            'streaming_mode': use_streaming_content
         }
-    )
+
+        yield result
+        logger.info("技术方案生成成功（SSE流式V2）")
+
+    except Exception as e:
+        logger.error(f"技术方案生成失败（SSE流式V2）: {e}", exc_info=True)
+        error_data = {
+            'stage': 'error',
+            'progress': 0,
+            'message': f'生成失败: {str(e)}',
+            'success': False,
+            'error': str(e)
+        }
+        yield error_data
+
+
+@api_outline_bp.route('/generate-proposal-stream-v2', methods=['POST'])
+def generate_proposal_stream_v2():
+    """
+    生成技术方案API（流式SSE版本 V2 - 支持实时内容推送）
+    实时推送生成进度和章节内容
+
+    请求参数（multipart/form-data）:
+    - tender_file: 技术需求文档文件
+    - outputPrefix: 输出文件名前缀
+    - companyId: 公司ID
+    - projectName: 项目名称
+    - projectId: 项目ID（从HITL传递）
+    - includeAnalysis: 是否包含需求分析
+    - includeMapping: 是否生成匹配表
+    - includeSummary: 是否生成总结报告
+    - useStreamingContent: 是否使用流式内容生成（默认true）
+
+    返回: text/event-stream（响应头 X-Stream-Id；断线后携带 X-Stream-Id 与 Last-Event-ID 续传）
+    """
+
+    def producer():
+        form = request.form.to_dict()
+        tender_upload = {} if form.get('projectId') else _save_uploaded_tender_file(request.files.get('tender_file'))
+        return _proposal_stream_events_v2(form, tender_upload)
+
+    return event_stream_response('tech_proposal_v2', producer)
 
 
 @api_outline_bp.route('/prompts/outline-generation', methods=['GET'])
@@ -943,7 +948,7 @@ def generate_with_agent():
     - template_name: 模板名称 (编写专项章节模式必填)
     - projectId: 项目ID (可选，从HITL加载)
 
-    返回: SSE流式事件
+    返回: SSE流式事件（响应头 X-Stream-Id；断线后携带 X-Stream-Id 与 Last-Event-ID 续传）
     - stage: init/analysis/analysis_completed/outline_completed/export/completed/error
     - progress: 0-100
     - message: 进度消息
@@ -1065,24 +1070,24 @@ def generate_with_agent():
         output_prefix = '技术方案'
 
     def generate_events():
-        """生成SSE事件流"""
+        """生成事件（在后台线程中执行，不访问请求上下文）"""
         nonlocal param_error, generation_mode, tender_doc, page_count, content_style
         nonlocal template_name, scoring_points, project_id, project_name, output_prefix
 
         try:
             # 检查参数错误
             if param_error:
-                yield f"data: {json.dumps({'stage': 'error', 'error': param_error, 'message': f'❌ {param_error}'}, ensure_ascii=False)}\n\n"
+                yield {'stage': 'error', 'error': param_error, 'message': f'❌ {param_error}'}
                 return
 
             # 1. 初始化阶段
-            yield f"data: {json.dumps({'stage': 'init', 'progress': 5, 'message': '🚀 开始生成技术方案...'}, ensure_ascii=False)}\n\n"
+            yield {'stage': 'init', 'progress': 5, 'message': '🚀 开始生成技术方案...'}
 
             # 2. 解析参数完成
-            yield f"data: {json.dumps({'stage': 'init', 'progress': 10, 'message': '📄 参数解析完成'}, ensure_ascii=False)}\n\n"
+            yield {'stage': 'init', 'progress': 10, 'message': '📄 参数解析完成'}
 
             # 3. 需求分析阶段
-            yield f"data: {json.dumps({'stage': 'analysis', 'progress': 20, 'message': '🔍 正在分析技术需求...'}, ensure_ascii=False)}\n\n"
+            yield {'stage': 'analysis', 'progress': 20, 'message': '🔍 正在分析技术需求...'}
 
             # 创建路由器并生成
             from ai_tender_system.modules.outline_generator.agents import AgentRouter
@@ -1102,17 +1107,17 @@ def generate_with_agent():
             logger.info(f"【智能体API】生成成功，模式: {generation_mode}")
 
             # 4. 分析完成
-            yield f"data: {json.dumps({'stage': 'analysis', 'progress': 35, 'message': '✓ 需求分析完成'}, ensure_ascii=False)}\n\n"
+            yield {'stage': 'analysis', 'progress': 35, 'message': '✓ 需求分析完成'}
 
             # 发送分析结果（如果有）
             analysis_result = result.get('analysis', {})
             if analysis_result:
-                yield f"data: {json.dumps({'stage': 'analysis_completed', 'progress': 40, 'analysis_result': analysis_result}, ensure_ascii=False)}\n\n"
+                yield {'stage': 'analysis_completed', 'progress': 40, 'analysis_result': analysis_result}
 
             # 5. 大纲生成完成
             outline_data = result.get('outline', {})
             chapters = result.get('chapters', [])
-            yield f"data: {json.dumps({'stage': 'outline', 'progress': 50, 'message': '📝 正在生成大纲...'}, ensure_ascii=False)}\n\n"
+            yield {'stage': 'outline', 'progress': 50, 'message': '📝 正在生成大纲...'}
 
             # 构建大纲数据供前端显示
             outline_for_frontend = {
@@ -1120,10 +1125,10 @@ def generate_with_agent():
                 'total_chapters': len(chapters),
                 'estimated_pages': result.get('metadata', {}).get('total_pages', page_count)
             }
-            yield f"data: {json.dumps({'stage': 'outline_completed', 'progress': 60, 'outline_data': outline_for_frontend}, ensure_ascii=False)}\n\n"
+            yield {'stage': 'outline_completed', 'progress': 60, 'outline_data': outline_for_frontend}
 
             # 6. 导出Word文档
-            yield f"data: {json.dumps({'stage': 'export', 'progress': 75, 'message': '💾 正在导出Word文档...'}, ensure_ascii=False)}\n\n"
+            yield {'stage': 'export', 'progress': 75, 'message': '💾 正在导出Word文档...'}
 
             from ai_tender_system.modules.outline_generator import WordExporter
 
@@ -1190,7 +1195,7 @@ def generate_with_agent():
 
             logger.info(f"【智能体API】Word文件已导出: {proposal_path}")
 
-            yield f"data: {json.dumps({'stage': 'export', 'progress': 90, 'message': '✓ Word文档导出完成'}, ensure_ascii=False)}\n\n"
+            yield {'stage': 'export', 'progress': 90, 'message': '✓ Word文档导出完成'}
 
             # 7. 完成
             completed_data = {
@@ -1206,7 +1211,7 @@ def generate_with_agent():
                 'requirements_count': result.get('metadata', {}).get('requirement_categories_count', 0),
                 'coverage_rate': result.get('metadata', {}).get('coverage_rate', 0)
             }
-            yield f"data: {json.dumps(completed_data, ensure_ascii=False)}\n\n"
+            yield completed_data
 
         except Exception as e:
             logger.error(f"【智能体API】生成失败: {e}", exc_info=True)
@@ -1215,16 +1220,9 @@ def generate_with_agent():
                 'error': str(e),
                 'message': f'❌ 生成失败: {str(e)}'
             }
-            yield f"data: {json.dumps(error_data, ensure_ascii=False)}\n\n"
+            yield error_data
 
-    return Response(
-        stream_with_context(generate_events()),
-        mimetype='text/event-stream',
-        headers={
-            'Cache-Control': 'no-cache',
-            'X-Accel-Buffering': 'no'
-        }
-    )
+    return event_stream_response('agent_generate', generate_events)
 
 
 @api_outline_bp.route('/agent/templates', methods=['GET'])
@@ -21,6 +21,7 @@ from common.database import get_knowledge_base_db
 import sys
 sys.path.append(str(Path(__file__).parent.parent))
 from modules.tender_processing.structure_parser import DocumentStructureParser
+from modules.tender_processing.document_snapshot import get_document_snapshot
 
 logger = get_module_logger("api_hitl")
 
@@ -436,10 +437,8 @@ def register_hitl_routes(app):
                             return found
                 return None
 
-            # 读取文档内容
-            from docx import Document
-            doc = Document(doc_path)
-            all_paragraphs = [p.text for p in doc.paragraphs]
+            # 读取文档内容（文档快照按文件哈希缓存）
+            all_paragraphs = get_document_snapshot(doc_path).paragraphs
 
             # 获取选中章节的内容
             selected_content = []
@@ -556,10 +555,14 @@ def register_hitl_routes(app):
             if not doc_path or not Path(doc_path).exists():
                 return jsonify({'success': False, 'error': '原始文档不存在'}), 404
 
-            # 2. 调用结构解析器导出章节
+            # 2. 调用结构解析器导出章节（传入缓存章节避免重新解析）
             from modules.tender_processing.structure_parser import DocumentStructureParser
             parser = DocumentStructureParser()
-            result = parser.export_chapter_to_docx(doc_path, chapter_id)
+            result = parser.export_chapter_to_docx(
+                doc_path,
+                chapter_id,
+                cached_chapters=step1_data.get('chapters')
+            )
 
             if not result['success']:
                 return jsonify(result), 500
@@ -1226,8 +1229,6 @@ def register_hitl_routes(app):
             }
         """
         try:
-            from docx import Document
-
             db = get_knowledge_base_db()
 
             # 1. 获取章节信息
@@ -1274,21 +1275,17 @@ def register_hitl_routes(app):
                     'error': '原始文档文件不存在，可能已被删除'
                 }), 404
 
-            # 4. 从文档中提取指定段落范围的文本
-            doc = Document(str(file_path))
+            # 4. 从文档快照中提取指定段落范围的文本（按文件哈希缓存，无需重新打开docx）
+            snapshot = get_document_snapshot(file_path)
             para_start = chapter['para_start_idx']
             para_end = chapter['para_end_idx']
 
             # 如果para_end为None，表示到文档末尾
             if para_end is None:
-                para_end = len(doc.paragraphs) - 1
-
-            # 提取段落内容
-            content_lines = []
-            for i in range(para_start, min(para_end + 1, len(doc.paragraphs))):
-                text = doc.paragraphs[i].text.strip()
-                if text:  # 只添加非空段落
-                    content_lines.append(text)
+                para_end = snapshot.paragraph_count - 1
+
+            # 提取段落内容（只添加非空段落）
+            content_lines = snapshot.get_paragraph_texts(para_start, para_end, strip=True, skip_empty=True)
 
             full_content = '\n\n'.join(content_lines)
 
@@ -123,6 +123,11 @@ def create_app() -> Flask:
         from modules.knowledge_base.rag_api import rag_api
         app.register_blueprint(rag_api, url_prefix='/api')
         logger.info("RAG知识库API模块注册成功")
+
+        # 后台预热Embedding模型与向量库（RAG_PREWARM=true 时）
+        from modules.knowledge_base.rag_engine import prewarm_rag_engine
+        if prewarm_rag_engine():
+            logger.info("RAG引擎后台预热已启动")
     except ImportError as e:
         logger.warning(f"RAG知识库API模块加载失败: {e}")
 
@@ -162,6 +167,18 @@ def create_app() -> Flask:
     from web.blueprints import register_all_blueprints
     register_all_blueprints(app, config, logger)
 
+    # 任务表结构一次性初始化（之后管理器构造不再执行建表语句）
+    from common.registry import bootstrap_schemas
+    bootstrap_schemas()
+
+    # 后台任务进程池（JOB_WORKER_MODE=embedded 时由取得文件锁的进程启动）
+    try:
+        from common.job_queue import start_embedded_worker_pool
+        if start_embedded_worker_pool():
+            logger.info("后台任务进程池已启动")
+    except ImportError as e:
+        logger.warning(f"后台任务队列模块加载失败: {e}")
+
     # ⚡ 性能优化: 添加静态资源缓存头
     @app.after_request
     def add_performance_headers(response):
@@ -210,6 +210,22 @@ def register_all_blueprints(app: Flask, config, logger):
     except ImportError as e:
         logger.warning(f"应答文件自检API蓝图加载失败: {e}")
 
+    # 后台任务API蓝图
+    try:
+        from .api_jobs_bp import api_jobs_bp
+        app.register_blueprint(api_jobs_bp)
+        logger.info("后台任务API蓝图注册成功 (路径前缀: /api/jobs)")
+    except ImportError as e:
+        logger.warning(f"后台任务API蓝图加载失败: {e}")
+
+    # 事件流续传API蓝图
+    try:
+        from .api_streams_bp import api_streams_bp
+        app.register_blueprint(api_streams_bp)
+        logger.info("事件流续传API蓝图注册成功 (路径前缀: /api/streams)")
+    except ImportError as e:
+        logger.warning(f"事件流续传API蓝图加载失败: {e}")
+
     # 阶段5: HITL任务处理蓝图
     # (待实现)
 
@@ -275,8 +275,8 @@ def process_business_response():
 
         # 🆕 加载人员信息摘要（用于表格字段填充）
         try:
-            from modules.resume_library.manager import ResumeLibraryManager
-            resume_manager = ResumeLibraryManager()
+            from modules.resume_library.manager import get_resume_library_manager
+            resume_manager = get_resume_library_manager()
 
             # 查询该公司的简历（或所有简历，如果company_id为None）
             resume_result = resume_manager.get_resumes(company_id=company_id_int, page_size=100)
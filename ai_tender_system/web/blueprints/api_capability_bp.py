@@ -42,8 +42,8 @@ def get_capability_extractor():
 
 def get_capability_searcher():
     """获取能力搜索器实例"""
-    from modules.product_capability import CapabilitySearcher
-    return CapabilitySearcher()
+    from modules.product_capability import get_capability_searcher as get_searcher
+    return get_searcher()
 
 
 def get_product_match_agent():
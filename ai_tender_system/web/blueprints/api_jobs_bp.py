@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+后台任务API - 查询与取消 common.job_queue 中的后台任务
+
+功能：
+1. 列出任务（按类型、状态、任务键过滤）
+2. 查询单个任务的状态、进度与结果
+3. 取消任务（排队中直接取消，运行中协作取消）
+"""
+
+from flask import Blueprint, jsonify, request
+
+from common import get_module_logger
+from common.job_queue import ACTIVE_STATUSES, TERMINAL_STATUSES, cancel_job, get_job, get_job_queue
+
+api_jobs_bp = Blueprint('api_jobs', __name__, url_prefix='/api/jobs')
+
+logger = get_module_logger("web.api_jobs")
+
+
+@api_jobs_bp.route('', methods=['GET'])
+def list_jobs():
+    """
+    列出后台任务
+
+    Query:
+        job_type: 任务类型（可选）
+        status: queued/running/succeeded/failed/cancelled（可选）
+        job_key: 任务键（可选，返回该键下最新的任务）
+        limit: 返回数量，默认50
+    """
+    try:
+        queue = get_job_queue()
+        job_key = request.args.get('job_key')
+        if job_key:
+            job = queue.get_by_key(job_key)
+            return jsonify({'success': True, 'jobs': [job.to_dict()] if job else []})
+
+        status = request.args.get('status')
+        if status and status not in ACTIVE_STATUSES + TERMINAL_STATUSES:
+            return jsonify({'success': False, 'error': f'无效的状态: {status}'}), 400
+
+        jobs = queue.list_jobs(
+            job_type=request.args.get('job_type'),
+            status=status,
+            limit=request.args.get('limit', 50, type=int)
+        )
+        return jsonify({'success': True, 'jobs': [job.to_dict() for job in jobs]})
+
+    except Exception as e:
+        logger.error(f"查询后台任务列表失败: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@api_jobs_bp.route('/<job_id>', methods=['GET'])
+def get_job_status(job_id):
+    """查询后台任务状态"""
+    try:
+        job = get_job(job_id)
+        if not job:
+            return jsonify({'success': False, 'error': '任务不存在'}), 404
+        return jsonify({'success': True, 'job': job.to_dict()})
+
+    except Exception as e:
+        logger.error(f"查询后台任务失败: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@api_jobs_bp.route('/<job_id>/cancel', methods=['POST'])
+def cancel_job_api(job_id):
+    """取消后台任务"""
+    try:
+        job = get_job(job_id)
+        if not job:
+            return jsonify({'success': False, 'error': '任务不存在'}), 404
+        if not cancel_job(job_id):
+            return jsonify({'success': False, 'error': f'任务已结束（{job.status}），无法取消'}), 409
+
+        logger.info(f"已请求取消后台任务: {job_id} ({job.job_type})")
+        return jsonify({'success': True, 'job': get_job(job_id).to_dict()})
+
+    except Exception as e:
+        logger.error(f"取消后台任务失败: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
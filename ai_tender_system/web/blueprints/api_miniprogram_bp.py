@@ -308,8 +308,8 @@ def upload_and_analyze():
         model_name = request.form.get('model', 'deepseek-v3')
 
         # 创建任务
-        from modules.risk_analyzer import RiskTaskManager
-        task_manager = RiskTaskManager()
+        from modules.risk_analyzer.task_manager import get_task_manager
+        task_manager = get_task_manager()
 
         task_id = task_manager.create_task(
             file_id=file_metadata.file_id,
@@ -346,6 +346,9 @@ def get_task_status(task_id: str):
     """
     查询任务状态（支持边分析边显示）
 
+    Query:
+        since_seq: 只返回序号大于该值的风险项（传上次响应的 last_seq，默认 0 返回全部）
+
     Returns:
         {
             "success": true,
@@ -354,28 +357,27 @@ def get_task_status(task_id: str):
                 "status": "analyzing",
                 "progress": 45,
                 "current_step": "正在分析第3/5块...",
-                "risk_items": [...],  // 分析中也返回已发现的风险项
-                "found_count": 5      // 已发现的风险项数量
+                "risk_items": [...],  // since_seq 之后新发现的风险项（每项带 seq）
+                "found_count": 5,     // 已发现的风险项总数
+                "last_seq": 5         // 下次轮询传入的 since_seq
             }
         }
     """
     try:
-        from modules.risk_analyzer import RiskTaskManager
+        from modules.risk_analyzer.task_manager import get_task_manager
         import json
 
-        task_manager = RiskTaskManager()
+        task_manager = get_task_manager()
 
         task = task_manager.get_task_by_openid(task_id, g.openid)
         if not task:
             return jsonify({'success': False, 'message': '任务不存在或无权访问'}), 404
 
-        # 解析已发现的风险项（即使还在分析中）
-        risk_items = []
-        if task.get('risk_items'):
-            try:
-                risk_items = json.loads(task['risk_items'])
-            except json.JSONDecodeError:
-                risk_items = []
+        # 已发现的风险项（即使还在分析中），只返回 since_seq 之后新增的部分；
+        # 没有新增时不查子表，轮询只有上面一次主键查询
+        since_seq = max(0, request.args.get('since_seq', 0, type=int))
+        found_count = task.get('risk_item_count') or 0
+        risk_items = task_manager.get_risk_items(task_id, since_seq) if found_count > since_seq else []
 
         # 解析对账结果（如有）
         reconcile_summary = None
@@ -410,7 +412,8 @@ def get_task_status(task_id: str):
                 'current_step': task.get('current_step', ''),
                 'error_message': task.get('error_message', ''),
                 'risk_items': risk_items,
-                'found_count': len(risk_items),
+                'found_count': found_count,
+                'last_seq': risk_items[-1]['seq'] if risk_items else since_seq,
                 # V5 新增：对账相关字段
                 'reconcile_progress': task.get('reconcile_progress', 0),
                 'reconcile_step': task.get('reconcile_step', ''),
@@ -443,8 +446,8 @@ def get_task_result(task_id: str):
         }
     """
     try:
-        from modules.risk_analyzer import RiskTaskManager
-        task_manager = RiskTaskManager()
+        from modules.risk_analyzer.task_manager import get_task_manager
+        task_manager = get_task_manager()
 
         task = task_manager.get_task_by_openid(task_id, g.openid)
         if not task:
@@ -507,8 +510,8 @@ def list_tasks():
         # 限制 page_size
         page_size = min(page_size, 50)
 
-        from modules.risk_analyzer import RiskTaskManager
-        task_manager = RiskTaskManager()
+        from modules.risk_analyzer.task_manager import get_task_manager
+        task_manager = get_task_manager()
 
         result = task_manager.list_tasks(
             openid=g.openid,
@@ -532,8 +535,8 @@ def list_tasks():
 def delete_task(task_id: str):
     """删除任务"""
     try:
-        from modules.risk_analyzer import RiskTaskManager
-        task_manager = RiskTaskManager()
+        from modules.risk_analyzer.task_manager import get_task_manager
+        task_manager = get_task_manager()
 
         success = task_manager.delete_task(task_id, openid=g.openid)
 
@@ -571,8 +574,8 @@ def upload_response_file(task_id: str):
         }
     """
     try:
-        from modules.risk_analyzer import RiskTaskManager
-        task_manager = RiskTaskManager()
+        from modules.risk_analyzer.task_manager import get_task_manager
+        task_manager = get_task_manager()
 
         # 验证任务存在且属于当前用户
         task = task_manager.get_task_by_openid(task_id, g.openid)
@@ -662,8 +665,8 @@ def start_reconcile(task_id: str):
         }
     """
     try:
-        from modules.risk_analyzer import RiskTaskManager
-        task_manager = RiskTaskManager()
+        from modules.risk_analyzer.task_manager import get_task_manager
+        task_manager = get_task_manager()
 
         # 验证任务
         task = task_manager.get_task_by_openid(task_id, g.openid)
@@ -731,10 +734,10 @@ def get_reconcile_result(task_id: str):
         }
     """
     try:
-        from modules.risk_analyzer import RiskTaskManager
+        from modules.risk_analyzer.task_manager import get_task_manager
         import json
 
-        task_manager = RiskTaskManager()
+        task_manager = get_task_manager()
 
         task = task_manager.get_task_by_openid(task_id, g.openid)
         if not task:
@@ -793,13 +796,13 @@ def export_excel(task_id: str):
     """
     try:
         from flask import send_file
-        from modules.risk_analyzer import RiskTaskManager
+        from modules.risk_analyzer.task_manager import get_task_manager
         from modules.risk_analyzer.excel_exporter import ExcelExporterV5
         import json
         import tempfile
         import os
 
-        task_manager = RiskTaskManager()
+        task_manager = get_task_manager()
 
         # 验证任务
         task = task_manager.get_task_by_openid(task_id, g.openid)
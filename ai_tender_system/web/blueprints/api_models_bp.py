@@ -2,12 +2,12 @@
 # -*- coding: utf-8 -*-
 """
 AI模型管理API蓝图
-提供AI模型列表查询、配置验证等API
+提供AI模型列表查询、配置验证、LLM调用指标等API
 """
 
 import sys
 from pathlib import Path
-from flask import Blueprint, jsonify
+from flask import Blueprint, jsonify, request
 
 # 添加项目根目录到Python路径
 project_root = Path(__file__).parent.parent.parent
@@ -97,4 +97,55 @@ def validate_model_config(model_name):
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+@api_models_bp.route('/models/metrics', methods=['GET'])
+def get_llm_call_metrics():
+    """
+    按处理环节（purpose）汇总LLM调用的耗时与token
+
+    Query:
+        source: memory（本进程最近的调用，默认）或 db（system_metrics 中的历史数据，汇总所有进程）
+        hours: source=db 时统计最近多少小时，默认 24
+        purpose: 只看指定环节
+        recent: source=memory 时附带最近 N 条调用明细，默认 0
+
+    Returns:
+        {
+            "success": true,
+            "source": "memory",
+            "stages": [
+                {"purpose": "标书要求提取", "calls": 120, "errors": 1, "wall_share": 0.62,
+                 "latency": {"total": 530.2, "p50": 3.9, "p95": 9.8},
+                 "prompt_tokens": {...}, "completion_tokens": {...}, "queue_wait": {...}, ...}
+            ]
+        }
+    """
+    try:
+        from common.llm_metrics import get_llm_metrics, summarize_metric_rows, COMPONENT_PREFIX
+
+        source = request.args.get('source', 'memory')
+        purpose = request.args.get('purpose') or None
+
+        if source == 'db':
+            from common.database import get_knowledge_base_db
+
+            hours = request.args.get('hours', 24, type=float)
+            get_llm_metrics().flush()  # 先写入本进程尚未持久化的记录
+            rows = get_knowledge_base_db().get_system_metric_values(COMPONENT_PREFIX, hours)
+            stages = summarize_metric_rows(rows)
+            if purpose:
+                stages = [s for s in stages if s['purpose'] == purpose]
+            return jsonify({'success': True, 'source': source, 'hours': hours, 'stages': stages})
+
+        metrics = get_llm_metrics()
+        result = {'success': True, 'source': 'memory', 'stages': metrics.get_summary(purpose=purpose)}
+        recent = request.args.get('recent', 0, type=int)
+        if recent > 0:
+            result['recent'] = metrics.get_recent(recent, purpose=purpose)
+        return jsonify(result)
+
+    except Exception as e:
+        logger.error(f"获取LLM调用指标失败: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
 __all__ = ['api_models_bp']
@@ -16,12 +16,13 @@ import time
 from pathlib import Path
 from datetime import datetime
 from typing import Dict, List, Optional, Tuple
-from flask import Blueprint, request, jsonify, send_file, Response
+from flask import Blueprint, request, jsonify, send_file
 from werkzeug.utils import secure_filename
 from docx import Document
 
 from common import get_module_logger, get_config
 from common.database import get_knowledge_base_db
+from web.shared.sse import event_stream_response
 from modules.tender_processing.structure_parser import DocumentStructureParser, ChapterNode
 from modules.tender_processing.level_analyzer import LevelAnalyzer
 
@@ -748,6 +749,9 @@ def parse_document_stream(document_id):
     事件格式:
         data: {"method": "style", "result": {...}, "progress": "2/5"}
         data: {"method": "complete", "document_id": "xxx"}
+
+    解析在后台线程中执行并写入事件日志（同一文档共用一个流）：连接断开不影响解析，
+    EventSource 重连时携带 Last-Event-ID 从断点继续；解析中的文档再次请求时跟随已有的流。
     """
     def generate():
         try:
@@ -760,7 +764,7 @@ def parse_document_stream(document_id):
             )
 
             if not row:
-                yield f"data: {json.dumps({'error': '文档不存在'}, ensure_ascii=False)}\n\n"
+                yield {'error': '文档不存在'}
                 return
 
             file_path = row['file_path']
@@ -818,7 +822,7 @@ def parse_document_stream(document_id):
                         'progress': f"{idx}/{total}",
                         'progress_percent': int((idx / total) * 100)
                     }
-                    yield f"data: {json.dumps(event_data, ensure_ascii=False)}\n\n"
+                    yield event_data
 
                     # 立即更新数据库
                     db.execute_query(f"""
@@ -852,7 +856,7 @@ def parse_document_stream(document_id):
                         'progress': f"{idx}/{total}",
                         'progress_percent': int((idx / total) * 100)
                     }
-                    yield f"data: {json.dumps(event_data, ensure_ascii=False)}\n\n"
+                    yield event_data
 
             # 同步语义锚点解析结果到数据库
             db.execute_query("""
@@ -867,15 +871,15 @@ def parse_document_stream(document_id):
             ))
 
             # 完成信号
-            yield f"data: {json.dumps({'method': 'complete', 'document_id': document_id}, ensure_ascii=False)}\n\n"
+            yield {'method': 'complete', 'document_id': document_id}
 
         except Exception as e:
             logger.error(f"流式解析失败: {e}")
             import traceback
             logger.error(traceback.format_exc())
-            yield f"data: {json.dumps({'error': str(e)}, ensure_ascii=False)}\n\n"
+            yield {'error': str(e)}
 
-    return Response(generate(), mimetype='text/event-stream')
+    return event_stream_response('parser_debug', generate, stream_id=f"parser_debug:{document_id}")
 
 
 @api_parser_debug_bp.route('/<document_id>', methods=['GET'])
@@ -129,8 +129,8 @@ def upload_and_check():
         model_name = request.form.get('model', 'deepseek-v3')
 
         # 创建任务
-        from modules.response_checker import ResponseCheckTaskManager
-        task_manager = ResponseCheckTaskManager()
+        from modules.response_checker.task_manager import get_task_manager
+        task_manager = get_task_manager()
 
         task_id = task_manager.create_task(
             file_id=file_metadata['file_id'],
@@ -178,10 +178,10 @@ def get_check_status(task_id: str):
         }
     """
     try:
-        from modules.response_checker import ResponseCheckTaskManager
+        from modules.response_checker.task_manager import get_task_manager
         import json
 
-        task_manager = ResponseCheckTaskManager()
+        task_manager = get_task_manager()
         task = task_manager.get_task(task_id)
 
         if not task:
@@ -239,8 +239,8 @@ def get_check_result(task_id: str):
         }
     """
     try:
-        from modules.response_checker import ResponseCheckTaskManager
-        task_manager = ResponseCheckTaskManager()
+        from modules.response_checker.task_manager import get_task_manager
+        task_manager = get_task_manager()
 
         result = task_manager.get_task_result(task_id)
         if not result:
@@ -265,10 +265,10 @@ def export_excel(task_id: str):
         Excel文件下载
     """
     try:
-        from modules.response_checker import ResponseCheckTaskManager
+        from modules.response_checker.task_manager import get_task_manager
         from modules.response_checker.excel_exporter import ResponseCheckExcelExporter
 
-        task_manager = ResponseCheckTaskManager()
+        task_manager = get_task_manager()
         result = task_manager.get_task_result(task_id)
 
         if not result:
@@ -319,8 +319,8 @@ def list_history():
         page = request.args.get('page', 1, type=int)
         page_size = request.args.get('page_size', 10, type=int)
 
-        from modules.response_checker import ResponseCheckTaskManager
-        task_manager = ResponseCheckTaskManager()
+        from modules.response_checker.task_manager import get_task_manager
+        task_manager = get_task_manager()
 
         result = task_manager.list_tasks(
             user_id=getattr(g, 'user_id', None),
@@ -348,8 +348,8 @@ def delete_task(task_id: str):
         {"success": true, "message": "删除成功"}
     """
     try:
-        from modules.response_checker import ResponseCheckTaskManager
-        task_manager = ResponseCheckTaskManager()
+        from modules.response_checker.task_manager import get_task_manager
+        task_manager = get_task_manager()
 
         success = task_manager.delete_task(
             task_id,
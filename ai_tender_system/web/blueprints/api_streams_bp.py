@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+事件流续传API - 按流ID从断点继续推送 SSE 事件
+
+技术方案生成、文档解析等流式接口在响应头 X-Stream-Id 中返回流ID，
+连接断开后可用 GET /api/streams/<stream_id>/events（EventSource 自动携带 Last-Event-ID，
+或使用 last_event_id 参数）继续接收，生成任务本身不受断线影响。
+"""
+
+from flask import Blueprint, jsonify
+
+from common.event_log import get_event_log
+from web.shared.sse import resume_event_stream
+
+api_streams_bp = Blueprint('api_streams', __name__, url_prefix='/api/streams')
+
+
+@api_streams_bp.route('/<stream_id>', methods=['GET'])
+def get_stream_status(stream_id):
+    """查询事件流状态"""
+    stream = get_event_log().get_stream(stream_id)
+    if not stream:
+        return jsonify({'success': False, 'error': '事件流不存在或已过期'}), 404
+    return jsonify({'success': True, 'stream': stream})
+
+
+@api_streams_bp.route('/<stream_id>/events', methods=['GET'])
+def stream_events(stream_id):
+    """从 Last-Event-ID 之后继续推送事件（text/event-stream）"""
+    if not get_event_log().get_stream(stream_id):
+        return jsonify({'success': False, 'error': '事件流不存在或已过期'}), 404
+    return resume_event_stream(stream_id)
@@ -46,8 +46,8 @@ def get_document_manager():
 
 def get_excerpt_manager():
     """获取片段管理器"""
-    from modules.tender_library import ExcerptManager
-    return ExcerptManager()
+    from modules.tender_library import get_excerpt_manager as get_manager
+    return get_manager()
 
 
 # ===================
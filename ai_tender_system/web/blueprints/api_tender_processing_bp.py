@@ -11,7 +11,6 @@ import os
 import json
 import time
 import asyncio
-import threading
 import traceback
 import tempfile
 from pathlib import Path
@@ -25,8 +24,8 @@ sys.path.insert(0, str(project_root))
 
 from common import get_module_logger
 from common.database import get_knowledge_base_db
+from common.job_queue import enqueue_job, get_job, get_job_queue
 from common.constants import (
-    TASK_START_MAX_RETRIES, TASK_START_RETRY_INTERVAL,
     STEP_EXECUTION_MAX_RETRIES, STEP_EXECUTION_RETRY_INTERVAL,
     STEP_3
 )
@@ -53,7 +52,8 @@ def start_tender_processing():
     Returns:
         {
             "success": true,
-            "task_id": "...",
+            "project_id": 123,
+            "job_id": "...",
             "message": "处理任务已启动"
         }
     """
@@ -67,6 +67,16 @@ def start_tender_processing():
         if not project_id:
             return jsonify({'success': False, 'error': '缺少project_id参数'}), 400
 
+        # 已有排队/运行中的任务时不覆盖其正在读取的文档全文
+        job_key = f"tender_processing:{project_id}"
+        active_job = get_job_queue().get_by_key(job_key)
+        if active_job and active_job.status in ('queued', 'running'):
+            return jsonify({
+                'success': False,
+                'error': f"项目 {project_id} 的步骤 {active_job.payload.get('step')} 仍在处理中",
+                'job_id': active_job.job_id
+            }), 409
+
         # 检查文件上传
         if 'file' not in request.files:
             return jsonify({'success': False, 'error': '未上传文件'}), 400
@@ -108,55 +118,21 @@ def start_tender_processing():
         document_text = parse_result.content
         logger.info(f"启动标书智能处理 - 项目ID: {project_id}, 文档长度: {len(document_text)}")
 
-        # 导入处理流程
-        from modules.tender_processing.processing_pipeline import TenderProcessingPipeline
-
-        # 创建流程实例（异步处理需要在后台线程中运行）
-        result_holder = {'project_id': None, 'error': None}
-
-        def run_pipeline():
-            try:
-                from web.shared.instances import set_pipeline_instance
-
-                pipeline = TenderProcessingPipeline(
-                    project_id=int(project_id),
-                    document_text=document_text,
-                    filter_model=filter_model,
-                    extract_model=extract_model
-                )
-                result_holder['project_id'] = pipeline.project_id
-
-                # 保存pipeline实例到全局存储（使用project_id作为key）
-                set_pipeline_instance(pipeline.project_id, pipeline)
-
-                # 运行指定步骤
-                result = pipeline.run_step(step)
-                result_holder['result'] = result
+        # 保存全文后入队，由后台工作进程执行（请求立即返回）
+        from modules.tender_processing.processing_pipeline import document_text_path
+        document_text_path(int(project_id)).write_text(document_text, encoding='utf-8')
 
-                logger.info(f"步骤 {step} 处理完成 - 项目ID: {pipeline.project_id}, 成功: {result['success']}")
-            except Exception as e:
-                logger.error(f"处理流程执行失败: {e}")
-                result_holder['error'] = str(e)
-
-        # 启动后台线程
-        thread = threading.Thread(target=run_pipeline, daemon=True)
-        thread.start()
-
-        # 等待project_id确认
-        for _ in range(TASK_START_MAX_RETRIES):
-            if result_holder['project_id'] or result_holder['error']:
-                break
-            time.sleep(TASK_START_RETRY_INTERVAL)
-
-        if result_holder['error']:
-            return jsonify({'success': False, 'error': result_holder['error']}), 500
-
-        if not result_holder['project_id']:
-            return jsonify({'success': False, 'error': '任务启动超时'}), 500
+        job_id = enqueue_job('tender_processing', {
+            'project_id': int(project_id),
+            'step': step,
+            'filter_model': filter_model,
+            'extract_model': extract_model
+        }, job_key=job_key)
 
         return jsonify({
             'success': True,
-            'project_id': result_holder['project_id'],
+            'project_id': int(project_id),
+            'job_id': job_id,
             'message': '处理任务已启动，请使用project_id查询进度'
         })
 
@@ -183,64 +159,68 @@ def continue_tender_processing(project_id):
         {
             "success": true,
             "project_id": 123,
+            "job_id": "...",
             "result": {...},
             "message": "步骤处理完成"
         }
     """
     try:
-        from web.shared.instances import get_pipeline_instance, remove_pipeline_instance
+        from modules.tender_processing.processing_pipeline import document_text_path
 
         # 获取参数
         data = request.get_json()
         step = data.get('step', 2)  # 默认执行第2步
 
-        # 从全局存储中获取pipeline实例（使用project_id）
-        pipeline = get_pipeline_instance(project_id)
-        if pipeline is None:
-            return jsonify({'success': False, 'error': f'找不到项目 {project_id} 的pipeline实例或已过期'}), 404
+        # 前序步骤的结果在数据库中，工作进程据此恢复；文档全文由 /start 保存
+        task = get_knowledge_base_db().get_processing_task(project_id)
+        if not task or not document_text_path(project_id).exists():
+            return jsonify({'success': False, 'error': f'找不到项目 {project_id} 的处理任务或文档已过期'}), 404
 
-        # 在后台线程中执行步骤
-        result_holder = {'result': None, 'error': None}
-
-        def run_step():
-            try:
-                result = pipeline.run_step(step)
-                result_holder['result'] = result
-                logger.info(f"步骤 {step} 处理完成 - 项目ID: {project_id}, 成功: {result['success']}")
-            except Exception as e:
-                logger.error(f"步骤 {step} 执行失败: {e}")
-                result_holder['error'] = str(e)
+        pipeline_config = json.loads(task.get('pipeline_config') or '{}')
+        job_key = f"tender_processing:{project_id}"
+        job_id = enqueue_job('tender_processing', {
+            'project_id': project_id,
+            'step': step,
+            'filter_model': pipeline_config.get('filter_model', 'gpt-4o-mini'),
+            'extract_model': pipeline_config.get('extract_model', 'deepseek-v3')
+        }, job_key=job_key)
 
-        # 启动后台线程
-        thread = threading.Thread(target=run_step, daemon=True)
-        thread.start()
+        job = get_job(job_id)
+        if job.payload.get('step') != step:
+            return jsonify({
+                'success': False,
+                'error': f"项目 {project_id} 的步骤 {job.payload.get('step')} 仍在处理中",
+                'job_id': job_id
+            }), 409
 
-        # 等待步骤完成
+        # 短暂等待步骤完成（快速步骤直接返回结果）
         for _ in range(STEP_EXECUTION_MAX_RETRIES):
-            if result_holder['result'] or result_holder['error']:
+            if job.status not in ('queued', 'running'):
                 break
             time.sleep(STEP_EXECUTION_RETRY_INTERVAL)
+            job = get_job(job_id)
 
-        if result_holder['error']:
-            return jsonify({'success': False, 'error': result_holder['error']}), 500
+        if job.status in ('failed', 'cancelled'):
+            return jsonify({'success': False, 'job_id': job_id, 'error': job.error or '任务已取消'}), 500
 
-        if not result_holder['result']:
+        if job.status != 'succeeded':
             # 步骤仍在执行中，返回处理中状态
             return jsonify({
                 'success': True,
                 'project_id': project_id,
+                'job_id': job_id,
                 'message': f'步骤 {step} 正在处理中，请查询状态'
             })
 
-        # 如果是最后一步，清理pipeline实例（线程安全）
         if step == STEP_3:
-            remove_pipeline_instance(project_id)
-            logger.info(f"项目 {project_id} 处理已完成，清理pipeline实例")
+            document_text_path(project_id).unlink(missing_ok=True)
+            logger.info(f"项目 {project_id} 处理已完成，清理文档全文")
 
         return jsonify({
             'success': True,
             'project_id': project_id,
-            'result': result_holder['result'],
+            'job_id': job_id,
+            'result': job.result,
             'message': f'步骤 {step} 处理完成'
         })
 
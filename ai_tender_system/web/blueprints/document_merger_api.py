@@ -1,20 +1,20 @@
 import json
 import time
-import threading
 import os
 from flask import Blueprint, request, jsonify, current_app, Response
 from ai_tender_system.common.database import get_knowledge_base_db
 from ai_tender_system.common.logger import get_module_logger
 from ai_tender_system.modules.document_merger.merger_service import DocumentMergerService
 from ai_tender_system.common.config import Config
+from ai_tender_system.common.job_queue import enqueue_job
 
 document_merger_api_bp = Blueprint('document_merger_api', __name__)
 logger = get_module_logger("document_merger_api")
 
 
-def run_merge_task(project_id, file_paths, config):
+def run_merge_task(project_id, file_paths, config, job=None):
     """
-    后台任务：执行文档整合
+    后台任务：执行文档整合（在后台工作进程中运行）
     """
     db = get_knowledge_base_db()
     logger.info(f"Starting merge task for project {project_id}")
@@ -36,6 +36,8 @@ def run_merge_task(project_id, file_paths, config):
 
         # 4. 进度回调函数
         def progress_callback(percent, message):
+            if job:
+                job.report(percent, message)
             db.update_processing_task(project_id, overall_status='running',
                                      current_step=message, progress_percentage=percent)
 
@@ -89,16 +91,32 @@ def run_merge_task(project_id, file_paths, config):
                                      current_step='Merge complete', progress_percentage=100)
 
         logger.info(f"Merge task for project {project_id} completed successfully.")
+        return {"merged_document_path": result["docx_path"], "file_size": file_size}
 
     except Exception as e:
-        logger.error(f"Merge task for project {project_id} failed: {e}", exc_info=True)
+        # job.cancelled 时异常为取消请求（JobCancelled）
+        cancelled = job is not None and job.cancelled
+        if cancelled:
+            logger.info(f"Merge task for project {project_id} cancelled.")
+        else:
+            logger.error(f"Merge task for project {project_id} failed: {e}", exc_info=True)
         db.update_processing_task(project_id, overall_status='failed',
-                                 current_step=str(e), progress_percentage=0)
+                                 current_step='任务已取消' if cancelled else str(e), progress_percentage=0)
+        raise
+
+
+def run_merge_job(job):
+    """后台任务处理函数：文档整合"""
+    payload = job.payload
+    return run_merge_task(payload['project_id'], payload['file_paths'], payload['config'], job)
 
 
 def start_merge_task(project_id, file_paths, config):
     """
-    启动后台整合任务
+    启动后台整合任务（提交到后台任务队列）
+
+    Returns:
+        (project_id, 后台任务ID)
     """
     db = get_knowledge_base_db()
 
@@ -121,15 +139,13 @@ def start_merge_task(project_id, file_paths, config):
             progress_percentage=0
         )
 
-    # 启动后台线程
-    thread = threading.Thread(
-        target=run_merge_task,
-        args=(project_id, file_paths, config)
+    job_id = enqueue_job(
+        'document_merge',
+        {'project_id': project_id, 'file_paths': file_paths, 'config': config},
+        job_key=f"document_merge:{project_id}"
     )
-    thread.daemon = True
-    thread.start()
 
-    return project_id  # 返回project_id作为任务标识
+    return project_id, job_id  # project_id 作为任务标识
 
 
 @document_merger_api_bp.route('/api/projects/<int:project_id>/merge-config', methods=['GET'])
@@ -245,11 +261,12 @@ def merge_project_documents(project_id):
         return jsonify({"error": "Technical proposal file is required"}), 400
 
     try:
-        task_id = start_merge_task(project_id, file_paths, config)
+        task_id, job_id = start_merge_task(project_id, file_paths, config)
         return jsonify({
             "success": True,
             "message": "Merge task started",
-            "task_id": task_id  # 实际上是project_id
+            "task_id": task_id,  # 实际上是project_id
+            "job_id": job_id
         }), 202
     except Exception as e:
         logger.error(f"Failed to start merge task for project {project_id}: {e}", exc_info=True)
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+可续传的 SSE 响应
+生产者在后台线程中写入事件日志（common.event_log），响应只负责跟随日志推送
+"""
+
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from flask import Response, request, stream_with_context
+
+from common.event_log import get_event_log, parse_last_event_id, sse_lines, start_stream
+
+
+def _last_event_id() -> int:
+    return parse_last_event_id(request.headers.get('Last-Event-ID') or request.args.get('last_event_id'))
+
+
+def _stream_response(stream_id: str, after_id: int) -> Response:
+    return Response(
+        stream_with_context(sse_lines(stream_id, after_id)),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no',
+            'X-Stream-Id': stream_id
+        }
+    )
+
+
+def event_stream_response(kind: str, producer_factory: Callable[[], Iterable[Dict[str, Any]]],
+                          stream_id: Optional[str] = None) -> Response:
+    """
+    启动（或续传）事件流并返回 SSE 响应
+
+    续传：请求携带 X-Stream-Id 头（或 stream_id 参数），或使用固定 stream_id 且带有 Last-Event-ID，
+    且该流仍在日志中时，不再调用 producer_factory，直接从 Last-Event-ID 之后推送。
+
+    Args:
+        kind: 流类型
+        producer_factory: 在请求上下文中调用，读取请求参数后返回事件生产者（生产者本身不得访问 request）
+        stream_id: 固定流ID（如按文档ID），默认每次请求新建
+
+    响应头 X-Stream-Id 为流ID，事件的 id 字段为续传位置。
+    """
+    resume_id = request.headers.get('X-Stream-Id') or request.args.get('stream_id')
+    after_id = _last_event_id()
+    if resume_id is None and stream_id is not None and after_id:
+        resume_id = stream_id
+    if resume_id and get_event_log().get_stream(resume_id) is not None:
+        return _stream_response(resume_id, after_id)
+
+    stream_id, _ = start_stream(kind, producer_factory(), stream_id)
+    return _stream_response(stream_id, 0)
+
+
+def resume_event_stream(stream_id: str) -> Response:
+    """按流ID续传（供 GET 接口 / EventSource 重连使用）"""
+    return _stream_response(stream_id, _last_event_id())
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+关键词搜索基准测试：LIKE '%词%' vs FTS5 trigram 全文索引
+
+生成合成标书片段库（默认 10 万条），分别在无全文索引和有全文索引的数据库上
+执行 ExcerptManager.search_by_keyword，比较耗时与命中结果。
+查询包含两字词（资质、业绩、合同）：不足3个字符无法走 trigram 索引，降级为 LIKE，
+输出中“路径”一列标明每个查询实际使用的方式，末尾汇总降级比例。
+
+用法:
+    python scripts/benchmark_fts_search.py                  # 100000 条片段
+    python scripts/benchmark_fts_search.py --rows 20000 --repeat 5
+"""
+
+import argparse
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from ai_tender_system.common.fts_search import ensure_fts_indexes, split_match_terms
+from ai_tender_system.modules.tender_library import ExcerptManager
+
+SCHEMA_FILE = PROJECT_ROOT / 'ai_tender_system' / 'database' / 'tender_library_schema.sql'
+
+TOPICS = ['系统架构', '数据安全', '运维服务', '项目管理', '实施方案', '质量保证', '培训计划', '验收标准',
+          '应急预案', '网络拓扑', '容灾备份', '性能优化', '接口规范', '售后服务', '风险控制', '进度计划']
+FILLER = ['本项目', '投标人', '我公司', '采用', '保障', '满足', '招标文件', '要求', '提供', '完善的',
+          '机制', '服务', '流程', '体系', '措施', '方案', '技术', '人员', '设备', '平台',
+          '资质', '业绩', '合同']
+QUERIES = ['容灾备份', '网络拓扑', '应急预案演练', '异地容灾备份中心', '不存在的关键词', '资质', '业绩', '合同']
+
+
+def build_library(path: Path, rows: int, companies: int = 5):
+    """生成合成片段库"""
+    rng = random.Random(42)
+    conn = sqlite3.connect(str(path))
+    conn.executescript(SCHEMA_FILE.read_text(encoding='utf-8'))
+
+    docs = [(i, rng.randint(1, companies), f'标书{i}', rng.choice(['won', 'won', 'lost']), rng.randint(60, 100))
+            for i in range(1, 1001)]
+    conn.executemany(
+        "INSERT INTO tender_documents (tender_doc_id, company_id, doc_name, bid_result, technical_score) "
+        "VALUES (?, ?, ?, ?, ?)", docs
+    )
+
+    def excerpt(i):
+        doc_id, company_id = docs[rng.randrange(len(docs))][:2]
+        topic = rng.choice(TOPICS)
+        sentences = []
+        for _ in range(rng.randint(8, 30)):
+            words = rng.sample(FILLER, 6)
+            if rng.random() < 0.1:
+                words.insert(3, rng.choice(TOPICS))
+            if rng.random() < 0.002:
+                words.insert(1, '异地容灾备份中心')
+            sentences.append(''.join(words))
+        return (doc_id, company_id, f'{i % 20 + 1}.{i % 7 + 1} {topic}', '，'.join(sentences) + '。',
+                f'["{topic}"]', rng.randint(0, 100))
+
+    batch = []
+    for i in range(rows):
+        batch.append(excerpt(i))
+        if len(batch) >= 5000:
+            conn.executemany(
+                "INSERT INTO tender_excerpts (tender_doc_id, company_id, chapter_title, content, keywords, quality_score) "
+                "VALUES (?, ?, ?, ?, ?, ?)", batch
+            )
+            batch = []
+    if batch:
+        conn.executemany(
+            "INSERT INTO tender_excerpts (tender_doc_id, company_id, chapter_title, content, keywords, quality_score) "
+            "VALUES (?, ?, ?, ?, ?, ?)", batch
+        )
+    conn.commit()
+    conn.close()
+
+
+def run_queries(db_path: Path, repeat: int):
+    manager = ExcerptManager(str(db_path))
+    results, timings = {}, {}
+    for query in QUERIES:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            results[query] = manager.search_by_keyword(1, query, won_only=True, limit=10)
+        timings[query] = (time.perf_counter() - start) / repeat
+    return results, timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description='LIKE vs FTS5 关键词搜索基准测试')
+    parser.add_argument('--rows', type=int, default=100000, help='合成片段数量')
+    parser.add_argument('--repeat', type=int, default=3, help='每个查询重复次数')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        like_db = Path(tmp) / 'like.db'
+        fts_db = Path(tmp) / 'fts.db'
+
+        start = time.perf_counter()
+        build_library(like_db, args.rows)
+        print(f"生成 {args.rows} 条片段: {time.perf_counter() - start:.1f}s")
+
+        shutil.copy(like_db, fts_db)
+        start = time.perf_counter()
+        conn = sqlite3.connect(str(fts_db))
+        ensure_fts_indexes(conn)
+        conn.commit()
+        conn.close()
+        print(f"构建全文索引: {time.perf_counter() - start:.1f}s, "
+              f"数据库 {like_db.stat().st_size / 1e6:.0f}MB -> {fts_db.stat().st_size / 1e6:.0f}MB")
+
+        like_results, like_timings = run_queries(like_db, args.repeat)
+        fts_results, fts_timings = run_queries(fts_db, args.repeat)
+
+        print(f"\n{'查询':<16}{'路径':<6}{'LIKE(ms)':>10}{'FTS5(ms)':>10}{'加速':>8}  结果一致")
+        fallback = 0
+        for query in QUERIES:
+            indexable, _ = split_match_terms([query])
+            fallback += not indexable
+            like_ids = [r['excerpt_id'] for r in like_results[query]]
+            fts_ids = [r['excerpt_id'] for r in fts_results[query]]
+            # 同分片段的顺序可能不同，比较排序键
+            key = lambda rows: [(r['quality_score'], r['technical_score']) for r in rows]
+            same = key(like_results[query]) == key(fts_results[query]) and len(like_ids) == len(fts_ids)
+            speedup = like_timings[query] / fts_timings[query] if fts_timings[query] else float('inf')
+            print(f"{query:<16}{'FTS5' if indexable else 'LIKE':<6}{like_timings[query] * 1000:>10.1f}"
+                  f"{fts_timings[query] * 1000:>10.1f}{speedup:>7.0f}x  {'是' if same else '否'}")
+        print(f"\n{fallback}/{len(QUERIES)} 个查询词不足3个字符，降级为 LIKE")
+
+
+if __name__ == '__main__':
+    main()
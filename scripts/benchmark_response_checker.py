@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+应答文件自检查基准测试：顺序/并发执行 × full/shared/excerpt 文档上下文模式
+
+生成合成应答文件（默认 300 页，每页约 1500 字），用模拟LLM执行完整的 ResponseChecker.check。
+模拟LLM的耗时 = 固定延迟 + 未命中前缀缓存的输入字符数 × 单字符耗时；
+请求完成后其提示词进入前缀缓存（与 DeepSeek/OpenAI 的前缀缓存行为一致）。
+
+用法:
+    python scripts/benchmark_response_checker.py                    # 300 页
+    python scripts/benchmark_response_checker.py --pages 100 --base-latency 0.5
+"""
+
+import argparse
+import json
+import random
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / 'ai_tender_system'))
+
+from modules.response_checker.checker import ResponseChecker
+
+SENTENCES = ['本项目采用成熟稳定的技术架构。', '我公司承诺按招标文件要求提供服务。', '投标人应保证所提供资料真实有效。',
+             '项目实施期间安排专人负责质量控制。', '运维服务包括日常巡检与故障处理。', '培训计划覆盖系统管理员和最终用户。']
+SPECIALS = ['投标人名称（加盖公章）：________', '法定代表人（签字）：______', '□ 同意  □ 不同意',
+            '业绩证明：某市智慧城市项目，合同金额 1,200,000 元，已通过验收。', '详见目录第 3 页偏离表。']
+
+
+class SimulatedLLM:
+    """按输入长度和前缀缓存命中情况模拟耗时的LLM"""
+
+    def __init__(self, base_latency: float, per_char: float):
+        self.base_latency = base_latency
+        self.per_char = per_char
+        self.cached = []
+        self.lock = threading.Lock()
+        self.input_chars = 0
+        self.uncached_chars = 0
+        self.calls = 0
+
+    def _cached_prefix(self, request: str) -> int:
+        best = 0
+        for seen in self.cached:
+            limit = min(len(seen), len(request))
+            n = 0
+            while n < limit and seen[n] == request[n]:
+                n += 1
+            best = max(best, n)
+        return best
+
+    def call(self, prompt, system_prompt=None, temperature=0.7, max_tokens=None, **kwargs):
+        request = (system_prompt or '') + '\n' + prompt
+        with self.lock:
+            uncached = len(request) - self._cached_prefix(request)
+            self.calls += 1
+            self.input_chars += len(request)
+            self.uncached_chars += uncached
+        time.sleep(self.base_latency + uncached * self.per_char)
+        with self.lock:
+            self.cached.append(request)
+        return json.dumps({'items': [{'status': '符合', 'detail': 'ok'}] * 4}, ensure_ascii=False)
+
+
+def build_document(path: Path, pages: int):
+    rng = random.Random(42)
+    lines = []
+    for page in range(pages):
+        text = ''.join(rng.choice(SENTENCES) for _ in range(90))
+        if rng.random() < 0.2:
+            text += rng.choice(SPECIALS)
+        lines.append(f'{text}\n第 {page + 1} 页')
+    path.write_text('\n'.join(lines), encoding='utf-8')
+
+
+def run(path: Path, workers: int, mode: str, args) -> dict:
+    llm = SimulatedLLM(args.base_latency, args.per_char)
+    checker = ResponseChecker(max_workers=workers, context_mode=mode)
+    checker.llm = llm
+    for extractor in (checker.id_extractor, checker.license_extractor, checker.seal_detector, checker.price_extractor):
+        extractor.llm = llm
+    checker.parser = object()
+    checker._parse_document = lambda file_path: (path.read_text(encoding='utf-8'), args.pages)
+
+    start = time.perf_counter()
+    result = checker.check(str(path))
+    elapsed = time.perf_counter() - start
+    return {
+        'elapsed': elapsed,
+        'calls': llm.calls,
+        'input_chars': llm.input_chars,
+        'uncached_chars': llm.uncached_chars,
+        'items': result.total_items,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='应答文件自检查基准测试')
+    parser.add_argument('--pages', type=int, default=300, help='合成文档页数')
+    parser.add_argument('--workers', type=int, default=4, help='并发模式的线程数')
+    parser.add_argument('--base-latency', type=float, default=1.0, help='每次LLM调用的固定延迟（秒）')
+    parser.add_argument('--per-char', type=float, default=20e-6, help='每个未缓存输入字符的耗时（秒）')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'response.txt'
+        build_document(path, args.pages)
+        print(f"合成文档: {args.pages}页, {len(path.read_text(encoding='utf-8'))}字符")
+        print(f"{'执行方式':<10}{'上下文':<10}{'耗时(s)':>10}{'调用数':>8}{'输入字符':>12}{'未缓存字符':>12}")
+
+        baseline = None
+        for workers in (1, args.workers):
+            for mode in ('full', 'shared', 'excerpt'):
+                stats = run(path, workers, mode, args)
+                baseline = baseline or stats['elapsed']
+                label = '顺序' if workers == 1 else f'并发x{workers}'
+                print(f"{label:<10}{mode:<10}{stats['elapsed']:>10.2f}{stats['calls']:>8}"
+                      f"{stats['input_chars']:>12}{stats['uncached_chars']:>12}"
+                      f"  ({baseline / stats['elapsed']:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
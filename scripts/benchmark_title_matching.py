@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+目录标题定位基准测试：线性扫描 vs TitleMatchIndex
+
+对每个文档按 _locate_chapters_by_toc 的方式依次定位全部目录项，
+比较 find_paragraph_by_title_scan（原线性扫描实现，见 tests/unit/modules/_title_scan.py）与 _find_paragraph_by_title（索引实现）
+的定位结果和耗时。
+
+用法:
+    python scripts/benchmark_title_matching.py                       # data/ 下所有 .docx
+    python scripts/benchmark_title_matching.py a.docx b.docx
+    python scripts/benchmark_title_matching.py --synthetic 200 --body 40   # 追加合成文档（200个目录项，每节40段）
+
+没有目录的文档以 Heading 样式段落作为目录项。
+"""
+
+import argparse
+import logging
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / 'ai_tender_system'))
+sys.path.insert(0, str(PROJECT_ROOT / 'tests' / 'unit' / 'modules'))
+
+from docx import Document
+
+from modules.tender_processing.structure_parser import DocumentStructureParser
+from modules.tender_processing.title_matcher import get_title_match_index
+from _title_scan import find_paragraph_by_title_scan
+
+
+def build_synthetic_docx(path: Path, toc_count: int, body_paras: int) -> list:
+    """
+    生成合成招标文件：正文标题使用 Heading 样式，约 1/5 的标题与目录文本略有差异
+    （同义词替换、去掉编号），用于覆盖宽松匹配路径
+    """
+    random.seed(42)
+    words = ['投标人须知', '技术规范', '商务条款', '评分办法', '合同格式', '服务要求', '售后承诺',
+             '资格审查', '报价说明', '实施方案', '质量保证', '培训计划', '验收标准', '安全管理']
+    titles = []
+    chapter = 0
+    while len(titles) < toc_count:
+        titles.append((1, f'第{chapter + 1}章 {words[chapter % len(words)]}{chapter}'))
+        for section in range(4):
+            titles.append((2, f'{chapter + 1}.{section + 1} {random.choice(words)}响应{chapter}{section}'))
+        chapter += 1
+    titles = titles[:toc_count]
+
+    doc = Document()
+    for level, title in titles:
+        heading = title
+        if random.random() < 0.2:
+            heading = title.replace('响应', '应答').split(' ', 1)[-1]
+        doc.add_heading(heading, level=level)
+        for k in range(body_paras):
+            doc.add_paragraph(f'正文段落{k}：投标人应满足{random.choice(words)}中的各项要求，详见合同条款。')
+    doc.save(str(path))
+    return [{'title': title, 'level': level} for level, title in titles]
+
+
+def collect_toc_items(parser, doc):
+    """
+    获取待定位的目录项
+
+    有目录时使用 _parse_toc_items 的结果；否则以 Heading 样式段落的文本作为目录项，
+    toc_end_idx 取 -1（从文档开头定位）
+    """
+    toc_start = parser._find_toc_section(doc)
+    if toc_start is not None:
+        toc_items, toc_end_idx = parser._parse_toc_items(doc, toc_start)
+        if toc_items:
+            return toc_items, toc_end_idx
+
+    toc_items = [
+        {'title': p.text.strip(), 'level': 1}
+        for p in doc.paragraphs
+        if p.text.strip() and p.style is not None and p.style.name.startswith('Heading')
+    ]
+    return toc_items, -1
+
+
+def locate_all(find, doc, toc_items, toc_end_idx):
+    """按 _locate_chapters_by_toc 的顺序依次定位目录项"""
+    results = []
+    last_found_idx = toc_end_idx + 1
+    for item in toc_items:
+        para_idx = find(doc, item['title'], last_found_idx, toc_items, toc_end_idx)
+        results.append(para_idx)
+        if para_idx is not None:
+            last_found_idx = para_idx + 1
+    return results
+
+
+def benchmark(doc_path: Path, toc_items=None) -> bool:
+    parser = DocumentStructureParser()
+    parser.logger.disabled = True
+    # 元数据列表检测与匹配算法无关，基准中关闭
+    parser._detect_chapter_title_list_range = lambda *args, **kwargs: None
+
+    doc = Document(str(doc_path))
+    if toc_items is None:
+        toc_items, toc_end_idx = collect_toc_items(parser, doc)
+    else:
+        toc_end_idx = -1
+    if not toc_items:
+        print(f'{doc_path.name}: 未识别到目录项，跳过')
+        return True
+
+    start = time.perf_counter()
+    old = locate_all(lambda *args: find_paragraph_by_title_scan(parser, *args), doc, toc_items, toc_end_idx)
+    old_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    get_title_match_index(doc)
+    build_time = time.perf_counter() - start
+
+    # 首次定位包含按需构建的倒排索引，第二次为纯查询耗时
+    start = time.perf_counter()
+    new = locate_all(parser._find_paragraph_by_title, doc, toc_items, toc_end_idx)
+    new_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    locate_all(parser._find_paragraph_by_title, doc, toc_items, toc_end_idx)
+    warm_time = time.perf_counter() - start
+
+    same = old == new
+    per_item = warm_time / max(len(toc_items), 1) * 1000
+    print(f'{doc_path.name}: 段落{len(doc.paragraphs)} 目录项{len(toc_items)} | '
+          f'线性扫描 {old_time:.3f}s | 索引构建 {build_time:.3f}s + 首次定位 {new_time:.3f}s | '
+          f'预热后 {per_item:.3f}ms/项 | 结果{"一致" if same else "不一致"}')
+    if not same:
+        for item, a, b in zip(toc_items, old, new):
+            if a != b:
+                print(f'    {item["title"]}: scan={a} index={b}')
+    return same
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='目录标题定位基准测试')
+    arg_parser.add_argument('docs', nargs='*', help='Word文档路径（默认 ai_tender_system/data 下所有 .docx）')
+    arg_parser.add_argument('--synthetic', type=int, default=0, help='额外生成的合成文档目录项数')
+    arg_parser.add_argument('--body', type=int, default=30, help='合成文档每节正文段落数')
+    args = arg_parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+
+    docs = [Path(p) for p in args.docs] or sorted((PROJECT_ROOT / 'ai_tender_system' / 'data').rglob('*.docx'))
+
+    all_same = all([benchmark(path) for path in docs])
+
+    if args.synthetic:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            synthetic_path = Path(tmp_dir) / f'synthetic_{args.synthetic}.docx'
+            toc_items = build_synthetic_docx(synthetic_path, args.synthetic, args.body)
+            all_same = benchmark(synthetic_path, toc_items) and all_same
+
+    sys.exit(0 if all_same else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -2,6 +2,7 @@
 Pytest配置和全局fixtures
 """
 
+import os
 import pytest
 import tempfile
 import sqlite3
@@ -12,6 +13,18 @@ import sys
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
+# LLM 限流状态写入临时目录，不与本机运行中的服务共享配额
+os.environ.setdefault('LLM_RATE_LIMIT_PATH', str(Path(tempfile.mkdtemp()) / 'llm_rate_limit.db'))
+# LLM 调用指标只保留在内存，不写入本地知识库
+os.environ.setdefault('LLM_METRICS_FLUSH_INTERVAL', '0')
+# 向量缓存写入临时目录
+os.environ.setdefault('EMBEDDING_CACHE_PATH', str(Path(tempfile.mkdtemp()) / 'embedding_cache.db'))
+# 后台任务队列写入临时目录，测试中不启动工作进程池
+os.environ.setdefault('JOB_QUEUE_DB_PATH', str(Path(tempfile.mkdtemp()) / 'jobs.db'))
+os.environ.setdefault('JOB_WORKER_MODE', 'off')
+# SSE 事件日志写入临时目录
+os.environ.setdefault('STREAM_EVENT_DB_PATH', str(Path(tempfile.mkdtemp()) / 'stream_events.db'))
+
 
 @pytest.fixture(scope="session")
 def temp_dir():
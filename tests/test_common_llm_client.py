@@ -54,7 +54,7 @@ class TestLLMClient:
         assert isinstance(client, LLMClient)
         assert client.model_name == "gpt-4o-mini"
 
-    @patch('ai_tender_system.common.llm_client.requests.post')
+    @patch('ai_tender_system.common.llm_client.http_post')
     def test_call_openai_compatible_success(self, mock_post, mock_config):
         """测试成功调用OpenAI兼容API"""
         # 模拟API响应
@@ -79,7 +79,7 @@ class TestLLMClient:
         assert result == '这是测试响应'
         assert mock_post.called
 
-    @patch('ai_tender_system.common.llm_client.requests.post')
+    @patch('ai_tender_system.common.llm_client.http_post')
     def test_call_api_error(self, mock_post, mock_config):
         """测试API调用错误"""
         # 模拟API错误响应
@@ -100,7 +100,7 @@ class TestLLMClient:
                 max_retries=1
             )
 
-    @patch('ai_tender_system.common.llm_client.requests.post')
+    @patch('ai_tender_system.common.llm_client.http_post')
     def test_call_timeout(self, mock_post, mock_config):
         """测试API超时"""
         import requests
@@ -114,7 +114,7 @@ class TestLLMClient:
                 max_retries=1
             )
 
-    @patch('ai_tender_system.common.llm_client.requests.post')
+    @patch('ai_tender_system.common.llm_client.http_post')
     def test_call_retry_logic(self, mock_post, mock_config):
         """测试重试逻辑"""
         # 第一次失败，第二次成功
@@ -215,7 +215,7 @@ class TestLLMClient:
         should_not_retry = client._should_not_retry(mock_response, 'openai')
         assert should_not_retry is True
 
-    @patch('ai_tender_system.common.llm_client.requests.post')
+    @patch('ai_tender_system.common.llm_client.http_post')
     def test_validate_config(self, mock_post, mock_config):
         """测试配置验证"""
         # 模拟成功响应
@@ -302,7 +302,7 @@ class TestLLMClientEdgeCases:
         assert client.api_key == ''
 
     @patch('ai_tender_system.common.llm_client.get_config')
-    @patch('ai_tender_system.common.llm_client.requests.post')
+    @patch('ai_tender_system.common.llm_client.http_post')
     def test_empty_response(self, mock_post, mock_get_config):
         """测试空响应"""
         mock_config = Mock()
@@ -45,6 +45,7 @@ class TestKnowledgeBaseDB:
 
             db = KnowledgeBaseDB(db_path=temp_db_path)
             yield db
+            db.close()
 
     def test_init_database(self, db, temp_db_path):
         """测试数据库初始化"""
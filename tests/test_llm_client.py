@@ -54,7 +54,7 @@ class TestLLMClient:
 
     def test_call_openai_compatible_success(self, client):
         """测试OpenAI兼容API调用成功"""
-        with patch('ai_tender_system.common.llm_client.requests.post') as mock_post:
+        with patch('ai_tender_system.common.llm_client.http_post') as mock_post:
             # Mock成功响应
             mock_response = Mock()
             mock_response.status_code = 200
@@ -74,7 +74,7 @@ class TestLLMClient:
 
     def test_call_with_system_prompt(self, client):
         """测试带系统提示词的调用"""
-        with patch('ai_tender_system.common.llm_client.requests.post') as mock_post:
+        with patch('ai_tender_system.common.llm_client.http_post') as mock_post:
             mock_response = Mock()
             mock_response.status_code = 200
             mock_response.json.return_value = {
@@ -103,7 +103,7 @@ class TestLLMClient:
 
     def test_call_with_custom_temperature(self, client):
         """测试自定义temperature参数"""
-        with patch('ai_tender_system.common.llm_client.requests.post') as mock_post:
+        with patch('ai_tender_system.common.llm_client.http_post') as mock_post:
             mock_response = Mock()
             mock_response.status_code = 200
             mock_response.json.return_value = {
@@ -122,7 +122,7 @@ class TestLLMClient:
 
     def test_call_api_error_400(self, client):
         """测试API错误400"""
-        with patch('ai_tender_system.common.llm_client.requests.post') as mock_post:
+        with patch('ai_tender_system.common.llm_client.http_post') as mock_post:
             mock_response = Mock()
             mock_response.status_code = 400
             mock_response.json.return_value = {
@@ -137,7 +137,7 @@ class TestLLMClient:
 
     def test_call_timeout(self, client):
         """测试请求超时"""
-        with patch('ai_tender_system.common.llm_client.requests.post') as mock_post:
+        with patch('ai_tender_system.common.llm_client.http_post') as mock_post:
             import requests
             mock_post.side_effect = requests.exceptions.Timeout()
 
@@ -148,7 +148,7 @@ class TestLLMClient:
 
     def test_call_retry_success(self, client):
         """测试重试成功"""
-        with patch('ai_tender_system.common.llm_client.requests.post') as mock_post:
+        with patch('ai_tender_system.common.llm_client.http_post') as mock_post:
             # 第一次失败，第二次成功
             mock_response_fail = Mock()
             mock_response_fail.status_code = 500
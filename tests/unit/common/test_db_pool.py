@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SQLite 连接池测试
+
+测试场景：
+1. 同一线程归还后复用连接，连接参数（WAL 等）已设置
+2. 归还时回滚未提交事务、复位 row_factory；嵌套获取得到不同连接
+3. 数据库文件被替换后不复用旧连接
+4. 后台线程高频写入时并发读取不报 "database is locked"
+5. 按数据库路径关闭空闲连接后 WAL 附属文件被删除，其他数据库的连接保留
+"""
+
+import os
+import sqlite3
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
+
+from ai_tender_system.common.db_pool import ConnectionPool
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / 'pool.db')
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE progress (task_id TEXT PRIMARY KEY, value INTEGER)")
+    conn.execute("INSERT INTO progress VALUES ('t1', 0)")
+    conn.commit()
+    conn.close()
+    return path
+
+
+@pytest.mark.unit
+class TestConnectionPool:
+    """测试连接复用与连接参数"""
+
+    def test_reuse_and_pragmas(self, db_path):
+        pool = ConnectionPool()
+
+        conn = pool.connect(db_path)
+        raw = conn.raw_connection
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+        assert conn.execute("PRAGMA busy_timeout").fetchone()[0] > 0
+        conn.close()
+        conn.close()  # 重复归还无副作用
+
+        again = pool.connect(db_path)
+        assert again.raw_connection is raw
+        assert pool.get_stats() == {'created': 1, 'reused': 1}
+        again.close()
+
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
+
+    def test_release_resets_state(self, db_path):
+        pool = ConnectionPool()
+
+        conn = pool.connect(db_path)
+        conn.row_factory = sqlite3.Row
+        conn.execute("UPDATE progress SET value = 99")
+        conn.close()  # 未提交，归还时回滚
+
+        conn = pool.connect(db_path)
+        assert conn.row_factory is None
+        assert conn.execute("SELECT value FROM progress").fetchone() == (0,)
+        conn.close()
+
+    def test_nested_connections_are_distinct(self, db_path):
+        pool = ConnectionPool()
+
+        outer = pool.connect(db_path)
+        inner = pool.connect(db_path)
+        assert outer.raw_connection is not inner.raw_connection
+        inner.close()
+        outer.close()
+
+    def test_threads_use_own_connections(self, db_path):
+        pool = ConnectionPool()
+        main = pool.connect(db_path)
+        seen = []
+
+        def worker():
+            conn = pool.connect(db_path)
+            seen.append(conn.raw_connection)
+            conn.execute("SELECT 1")
+            conn.close()
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+
+        assert seen[0] is not main.raw_connection
+        main.close()
+
+    def test_replaced_file_not_reused(self, db_path):
+        pool = ConnectionPool()
+        conn = pool.connect(db_path)
+        raw = conn.raw_connection
+        conn.close()
+
+        os.remove(db_path)
+        new = sqlite3.connect(db_path)
+        new.execute("CREATE TABLE replaced (x)")
+        new.commit()
+        new.close()
+
+        conn = pool.connect(db_path)
+        assert conn.raw_connection is not raw
+        assert conn.execute("SELECT name FROM sqlite_master").fetchall() == [('replaced',)]
+        conn.close()
+
+    def test_close_by_path_removes_wal_files(self, db_path, tmp_path):
+        pool = ConnectionPool()
+        other_path = str(tmp_path / 'other.db')
+        for path in (db_path, other_path):
+            conn = pool.connect(path)
+            conn.execute("CREATE TABLE IF NOT EXISTS t (v INTEGER)")
+            conn.commit()
+            conn.close()
+        assert os.path.exists(db_path + '-wal')
+
+        pool.close_thread_connections(db_path)
+        assert not os.path.exists(db_path + '-wal')
+        assert not os.path.exists(db_path + '-shm')
+        assert os.path.exists(other_path + '-wal')
+
+        pool.close_thread_connections()
+        assert not os.path.exists(other_path + '-wal')
+
+    def test_concurrent_progress_writes_and_reads(self, db_path):
+        pool = ConnectionPool()
+        errors = []
+
+        def writer():
+            try:
+                for i in range(200):
+                    conn = pool.connect(db_path)
+                    conn.execute("UPDATE progress SET value = ? WHERE task_id = 't1'", (i,))
+                    conn.commit()
+                    conn.close()
+            except sqlite3.Error as e:
+                errors.append(e)
+
+        def reader():
+            try:
+                for _ in range(200):
+                    conn = pool.connect(db_path)
+                    conn.execute("SELECT value FROM progress").fetchone()
+                    conn.close()
+            except sqlite3.Error as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=writer)] + [threading.Thread(target=reader) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert errors == []
+        conn = pool.connect(db_path)
+        assert conn.execute("SELECT value FROM progress").fetchone() == (199,)
+        conn.close()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SSE 事件日志测试
+
+测试场景：
+1. 追加、按事件ID续读；大事件压缩存储后可还原
+2. 连续的同章节内容片段合并，合并后的ID为最后一个片段的ID
+3. 后台生产者写完后 tail 输出全部事件并结束；从中间的事件ID续传不重复
+4. 生产者异常时写入错误事件并标记失败
+5. 同ID的流生产中时不重复启动，结束后可重新开始
+6. 生产中断（心跳超时）时 tail 推送错误并结束
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+project_root = Path(__file__).parent.parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from ai_tender_system.common import event_log as el
+
+
+@pytest.fixture
+def log(tmp_path):
+    return el.EventLog(str(tmp_path / 'events.db'))
+
+
+def _chunk(chapter, content):
+    return {'stage': 'content_generation', 'event': 'content_chunk', 'chapter_number': chapter, 'content': content}
+
+
+def _wait_finished(log, stream_id, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if log.get_stream(stream_id)['status'] != 'running':
+            return
+        time.sleep(0.01)
+    raise AssertionError('stream not finished')
+
+
+@pytest.mark.unit
+class TestEventLog:
+    """日志读写与压缩"""
+
+    def test_append_and_read_after(self, log):
+        log.open_stream('s1', 'test')
+        ids = [log.append('s1', {'stage': 'init', 'progress': i}) for i in range(3)]
+
+        assert [data['progress'] for _, data in log.read('s1')] == [0, 1, 2]
+        assert [event_id for event_id, _ in log.read('s1', after_id=ids[0])] == ids[1:]
+
+    def test_large_payload_compressed(self, log, monkeypatch):
+        monkeypatch.setattr(el, 'COMPRESS_THRESHOLD', 100)
+        log.open_stream('s1', 'test')
+        outline = {'stage': 'outline_completed', 'outline_data': {'chapters': [{'title': '章节' * 50}] * 20}}
+        log.append('s1', outline)
+
+        conn = log._connect()
+        try:
+            row = conn.execute("SELECT codec, length(data) AS size FROM stream_events").fetchone()
+        finally:
+            conn.close()
+        assert row['codec'] == 'zlib'
+        assert row['size'] < 1000
+        assert log.read('s1')[0][1] == outline
+
+    def test_content_chunks_coalesced(self, log):
+        log.open_stream('s1', 'test')
+        log.append('s1', {'stage': 'content_generation', 'event': 'chapter_start', 'chapter_number': '1'})
+        chunk_ids = [log.append('s1', _chunk('1', text)) for text in ('第一', '章', '内容')]
+        other_id = log.append('s1', _chunk('2', '第二章'))
+
+        events = log.read('s1')
+        assert len(events) == 3
+        assert events[1] == (chunk_ids[-1], _chunk('1', '第一章内容'))
+        assert events[2][0] == other_id
+        # 从合并组中间续传只得到其后的片段
+        assert log.read('s1', after_id=chunk_ids[0])[0] == (chunk_ids[-1], _chunk('1', '章内容'))
+        assert len(log.read('s1', coalesce=False)) == 5
+
+
+@pytest.mark.unit
+class TestStreamProducer:
+    """后台生产与跟随"""
+
+    def test_tail_until_finished_and_resume(self, log):
+        release = threading.Event()
+
+        def producer():
+            yield {'stage': 'init', 'progress': 0}
+            release.wait(5)
+            yield _chunk('1', 'abc')
+            yield {'stage': 'completed', 'progress': 100}
+
+        stream_id, started = el.start_stream('test', producer(), log=log)
+        assert started
+        tail = log.tail(stream_id)
+        first_id, first = next(tail)
+        assert first['stage'] == 'init'
+
+        release.set()
+        rest = list(tail)
+        assert [data['stage'] for _, data in rest] == ['content_generation', 'completed']
+        assert log.get_stream(stream_id)['status'] == 'completed'
+
+        resumed = list(log.tail(stream_id, after_id=first_id))
+        assert resumed == rest
+        assert 'id: ' in el.format_sse(*rest[0])
+
+    def test_producer_exception_marks_failed(self, log):
+        def producer():
+            yield {'stage': 'init'}
+            raise RuntimeError('boom')
+
+        stream_id, _ = el.start_stream('test', producer(), log=log)
+        events = [data for _, data in log.tail(stream_id)]
+
+        assert events[-1]['stage'] == 'error'
+        assert events[-1]['error'] == 'boom'
+        assert log.get_stream(stream_id)['status'] == 'failed'
+
+    def test_fixed_stream_id_not_restarted_while_running(self, log):
+        release = threading.Event()
+
+        def producer(tag):
+            yield {'stage': 'init', 'tag': tag}
+            release.wait(5)
+
+        assert el.start_stream('test', producer('a'), stream_id='doc:1', log=log) == ('doc:1', True)
+        assert el.start_stream('test', producer('b'), stream_id='doc:1', log=log) == ('doc:1', False)
+
+        release.set()
+        _wait_finished(log, 'doc:1')
+        assert el.start_stream('test', producer('c'), stream_id='doc:1', log=log) == ('doc:1', True)
+        _wait_finished(log, 'doc:1')
+        assert [data['tag'] for _, data in log.read('doc:1')] == ['c']
+
+    def test_stale_producer_ends_tail(self, log, monkeypatch):
+        monkeypatch.setattr(el, 'STALE_SECONDS', 0.05)
+        log.open_stream('s1', 'test')
+        log.append('s1', {'stage': 'init'})
+        time.sleep(0.1)
+
+        events = [data for _, data in log.tail('s1')]
+        assert events[0]['stage'] == 'init'
+        assert events[-1]['stage'] == 'error'
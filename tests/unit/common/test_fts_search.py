@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+FTS5 全文索引测试
+
+测试场景：
+1. 迁移脚本与索引定义一致
+2. 触发器保持索引与原表同步
+3. 关键词搜索走全文索引时与 LIKE 结果一致，短词降级为 LIKE
+"""
+
+import random
+import sqlite3
+import sys
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from ai_tender_system.common.fts_search import (
+    FTS_INDEXES, build_match_query, ensure_fts_indexes, fts_ready,
+    render_migration_sql, split_match_terms
+)
+from ai_tender_system.modules.tender_library import ExcerptManager
+
+DATABASE_DIR = PROJECT_ROOT / 'ai_tender_system' / 'database'
+TOPICS = ['系统架构', '数据安全', '运维服务', 'API网关', '容灾备份']
+
+
+def like_ids(conn, keyword, won_only=True):
+    """原 LIKE 实现命中的片段ID集合"""
+    sql = """
+        SELECT e.excerpt_id FROM tender_excerpts e
+        JOIN tender_documents d ON e.tender_doc_id = d.tender_doc_id
+        WHERE e.company_id = 1
+          AND (e.chapter_title LIKE ? OR e.content LIKE ? OR e.keywords LIKE ?)
+    """
+    if won_only:
+        sql += " AND d.bid_result = 'won'"
+    pattern = f'%{keyword}%'
+    return {row[0] for row in conn.execute(sql, (pattern, pattern, pattern))}
+
+
+@pytest.fixture
+def excerpt_db(tmp_path):
+    path = str(tmp_path / 'kb.db')
+    conn = sqlite3.connect(path)
+    conn.executescript((DATABASE_DIR / 'tender_library_schema.sql').read_text(encoding='utf-8'))
+    conn.execute("INSERT INTO tender_documents (tender_doc_id, company_id, doc_name, bid_result) VALUES (1, 1, 'a', 'won')")
+    conn.execute("INSERT INTO tender_documents (tender_doc_id, company_id, doc_name, bid_result) VALUES (2, 1, 'b', 'lost')")
+    rng = random.Random(1)
+    for i in range(300):
+        topics = rng.sample(TOPICS, 2)
+        conn.execute(
+            "INSERT INTO tender_excerpts (tender_doc_id, company_id, chapter_title, content, keywords, quality_score) "
+            "VALUES (?, 1, ?, ?, ?, ?)",
+            (rng.randint(1, 2), f'{topics[0]}{i}', f'本节说明{topics[1]}相关内容', f'["{topics[0]}"]',
+             rng.randint(0, 100))
+        )
+    conn.commit()
+    conn.close()
+    return path
+
+
+@pytest.mark.unit
+class TestFtsSchema:
+    """测试索引定义与迁移脚本"""
+
+    def test_migration_file_in_sync(self):
+        migration = DATABASE_DIR / 'migrations' / '010_add_fts5_search_indexes.sql'
+        assert migration.read_text(encoding='utf-8') == render_migration_sql()
+
+    def test_ensure_only_existing_tables(self, excerpt_db):
+        conn = sqlite3.connect(excerpt_db)
+        assert ensure_fts_indexes(conn) == ['tender_excerpts_fts']
+        assert ensure_fts_indexes(conn) == []
+        assert fts_ready(conn, 'tender_excerpts_fts')
+        assert not fts_ready(conn, 'documents_fts')
+        conn.close()
+
+    def test_triggers_keep_index_in_sync(self, excerpt_db):
+        conn = sqlite3.connect(excerpt_db)
+        ensure_fts_indexes(conn)
+
+        def matches(term):
+            return {row[0] for row in conn.execute(
+                "SELECT rowid FROM tender_excerpts_fts WHERE tender_excerpts_fts MATCH ?",
+                (build_match_query([term]),)
+            )}
+
+        # rebuild 导入已有数据
+        assert matches('系统架构') == like_ids(conn, '系统架构', won_only=False)
+
+        cursor = conn.execute(
+            "INSERT INTO tender_excerpts (tender_doc_id, company_id, chapter_title, content) VALUES (1, 1, '新章节', '量子加密方案')"
+        )
+        new_id = cursor.lastrowid
+        assert matches('量子加密') == {new_id}
+
+        conn.execute("UPDATE tender_excerpts SET content = '区块链存证' WHERE excerpt_id = ?", (new_id,))
+        assert matches('量子加密') == set()
+        assert matches('区块链') == {new_id}
+
+        conn.execute("DELETE FROM tender_excerpts WHERE excerpt_id = ?", (new_id,))
+        assert matches('区块链') == set()
+        conn.close()
+
+    def test_split_and_match_query(self):
+        assert split_match_terms(['系统架构', '安全', '系统架构', '', 'ab"c']) == (['系统架构', 'ab"c'], ['安全'])
+        assert build_match_query(['a"bc', '系统架构'], ['content']) == '{content} : ("a""bc" OR "系统架构")'
+        assert {index.content_table for index in FTS_INDEXES} == {
+            'tender_excerpts', 'document_toc', 'product_capabilities_index', 'documents'
+        }
+
+
+@pytest.mark.unit
+class TestExcerptFtsSearch:
+    """测试片段关键词搜索走全文索引"""
+
+    def test_results_match_like(self, excerpt_db):
+        conn = sqlite3.connect(excerpt_db)
+        ensure_fts_indexes(conn)
+        manager = ExcerptManager(excerpt_db)
+
+        for keyword in ['系统架构', 'api网关', '容灾备份', '本节说明', '不存在的词']:
+            results = manager.search_by_keyword(1, keyword, won_only=True, limit=1000)
+            assert {r['excerpt_id'] for r in results} == like_ids(conn, keyword)
+            scores = [r['quality_score'] for r in results]
+            assert scores == sorted(scores, reverse=True)
+        conn.close()
+
+    def test_batch_mixes_fts_and_short_terms(self, excerpt_db):
+        conn = sqlite3.connect(excerpt_db)
+        ensure_fts_indexes(conn)
+        manager = ExcerptManager(excerpt_db)
+
+        batch = manager.search_by_keywords(1, ['数据安全', '运维', 'API'], won_only=False, limit=1000)
+
+        assert list(batch) == ['数据安全', '运维', 'API']
+        for keyword, results in batch.items():
+            assert {r['excerpt_id'] for r in results} == like_ids(conn, keyword, won_only=False)
+        conn.close()
+
+
+@pytest.mark.unit
+class TestTocFtsSearch:
+    """测试目录搜索走全文索引"""
+
+    def test_toc_search(self, temp_dir):
+        from ai_tender_system.common.database import KnowledgeBaseDB
+
+        db = KnowledgeBaseDB(str(temp_dir / 'kb.db'))
+        assert db._fts_ready('document_toc_fts')
+        with db.get_connection() as conn:
+            conn.execute("PRAGMA foreign_keys = OFF")
+            conn.executemany(
+                "INSERT INTO document_toc (doc_id, heading_level, heading_text, section_number, keywords, sequence_order) "
+                "VALUES (1, 1, ?, ?, ?, ?)",
+                [('接口规范说明', '3.1.101', '["3101", "接口规范"]', 2),
+                 ('系统部署方案', '2.1', '["部署"]', 1),
+                 ('接口调用示例', '3.2', '["示例"]', 3)]
+            )
+            conn.commit()
+
+        assert [r['sequence_order'] for r in db.search_toc_by_text('接口')] == [2, 3]        # 短词走 LIKE
+        assert [r['sequence_order'] for r in db.search_toc_by_text('接口规范')] == [2]
+        assert [r['sequence_order'] for r in db.search_toc_by_text('3.1.101')] == [2]
+        assert [r['sequence_order'] for r in db.search_toc_by_keywords(['3101', '示例'])] == [2, 3]
+        assert [r['sequence_order'] for r in db.search_toc_by_keywords(['3101', '接口规范'], doc_id=2)] == []
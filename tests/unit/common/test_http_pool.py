@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+共享 HTTP 连接池与异步批量调用测试
+
+测试场景：
+1. 同一服务地址的请求复用长连接
+2. acall_batch 按提示词顺序返回，并发数受限
+3. call_batch 在同步代码中批量调用，失败项可作为异常返回
+"""
+
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
+
+from ai_tender_system.common.exceptions import APIError
+from ai_tender_system.common.http_pool import HttpClientPool, pool_key
+from ai_tender_system.common.llm_client import LLMClient
+
+
+class FakeLLMHandler(BaseHTTPRequestHandler):
+    """模拟 OpenAI 兼容接口：回显提示词，记录客户端端口与并发数"""
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        server = self.server
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        prompt = body['messages'][-1]['content']
+        with server.lock:
+            server.client_ports.add(self.client_address[1])
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        time.sleep(0.02)
+        with server.lock:
+            server.in_flight -= 1
+
+        if prompt == 'fail':
+            status, payload = 400, {'error': {'message': 'bad prompt'}}
+        else:
+            status, payload = 200, {'choices': [{'message': {'content': f'回复:{prompt}'}}]}
+        data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), FakeLLMHandler)
+    httpd.lock = threading.Lock()
+    httpd.client_ports = set()
+    httpd.in_flight = httpd.max_in_flight = 0
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def client(server):
+    endpoint = f'http://127.0.0.1:{server.server_address[1]}/v1/chat/completions'
+    with patch('ai_tender_system.common.llm_client.get_config') as get_config:
+        get_config.return_value.get_model_config.return_value = {
+            'api_key': 'k', 'api_endpoint': endpoint, 'model_name': 'fake', 'max_tokens': 100, 'timeout': 5
+        }
+        yield LLMClient(model_name='gpt-4o-mini')
+
+
+@pytest.mark.unit
+class TestHttpClientPool:
+    """测试连接复用"""
+
+    def test_pool_key(self):
+        assert pool_key('https://API.example.com/v1/chat/completions') == 'https://api.example.com'
+        assert pool_key('http://127.0.0.1:8000/v1/embeddings') == 'http://127.0.0.1:8000'
+
+    def test_session_reuses_connection(self, server):
+        pool = HttpClientPool()
+        url = f'http://127.0.0.1:{server.server_address[1]}/v1/chat/completions'
+        body = {'messages': [{'role': 'user', 'content': 'x'}]}
+
+        assert pool.session(url) is pool.session(url.replace('/chat/completions', '/embeddings'))
+        for _ in range(5):
+            assert pool.session(url).post(url, json=body, timeout=5).status_code == 200
+
+        assert len(server.client_ports) == 1
+        pool.close()
+
+
+@pytest.mark.unit
+class TestAsyncBatch:
+    """测试异步批量调用"""
+
+    def test_call_batch_order_and_concurrency(self, client, server):
+        prompts = [f'问题{i}' for i in range(20)]
+
+        results = client.call_batch(prompts, concurrency=4, purpose='测试', use_cache=False)
+
+        assert results == [f'回复:{p}' for p in prompts]
+        assert server.max_in_flight <= 4
+        assert len(server.client_ports) <= 4  # 连接在批次内复用
+
+    def test_call_batch_return_exceptions(self, client):
+        results = client.call_batch(['a', 'fail', 'b'], max_retries=1, return_exceptions=True, use_cache=False)
+
+        assert results[0] == '回复:a' and results[2] == '回复:b'
+        assert isinstance(results[1], APIError)
+
+        with pytest.raises(APIError):
+            client.call_batch(['fail'], max_retries=1, use_cache=False)
+
+    def test_sync_call_uses_shared_session(self, client, server):
+        for i in range(3):
+            assert client.call(f'同步{i}', max_retries=1, use_cache=False) == f'回复:同步{i}'
+        assert len(server.client_ports) == 1
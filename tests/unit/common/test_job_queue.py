@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+后台任务队列测试
+
+测试场景：
+1. 相同任务键在排队/运行期间只入队一次，结束后可再次入队
+2. 领取时按任务类型限制并发
+3. 租约过期的任务重新排队，超过最大执行次数后标记失败
+4. 运行中的任务通过心跳收到取消请求并协作退出
+5. 处理函数的返回值保存为结果，抛出异常时任务失败
+6. 真实工作进程中取消任务：处理函数捕获的 common.job_queue.JobCancelled 与队列抛出的是同一个类
+"""
+
+import os
+import subprocess
+import sys
+import textwrap
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+project_root = Path(__file__).parent.parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from ai_tender_system.common import job_queue as jq
+
+SUCCEED_TYPE = 'test_succeed'
+FAIL_TYPE = 'test_fail'
+SLOW_TYPE = 'test_slow'
+PROBE_TYPE = 'test_cancel_probe'
+
+# 以与进程池相同的入口模块运行工作进程，先登记探测用的任务类型
+WORKER_SCRIPT = f"""
+import runpy, sys
+from common import job_queue
+job_queue.register_job_type({PROBE_TYPE!r}, 'cancel_probe:run', concurrency=1)
+sys.argv = [job_queue.WORKER_MODULE, '--worker']
+runpy.run_module(job_queue.WORKER_MODULE, run_name='__main__', alter_sys=True)
+"""
+
+# 与风险分析/应答自检的处理函数一样，按 common.job_queue 导入并捕获 JobCancelled
+PROBE_MODULE = """
+import time
+from pathlib import Path
+from common.job_queue import JobCancelled
+
+
+def run(job):
+    marker = Path(job.payload['marker'])
+    try:
+        while True:
+            job.report(10)
+            time.sleep(0.02)
+    except JobCancelled:
+        marker.write_text('cancelled')
+        raise
+    except Exception as e:
+        marker.write_text(f'failed: {type(e).__module__}.{type(e).__name__}')
+        raise
+"""
+
+
+def succeed_handler(job):
+    job.report(50, '处理中')
+    return {'echo': job.payload['value']}
+
+
+def fail_handler(job):
+    raise RuntimeError('处理失败')
+
+
+def slow_handler(job):
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        job.report(10)
+        time.sleep(0.02)
+    return {'finished': True}
+
+
+@pytest.fixture
+def queue(tmp_path, monkeypatch):
+    jq.register_job_type(SUCCEED_TYPE, f'{__name__}:succeed_handler', concurrency=1)
+    jq.register_job_type(FAIL_TYPE, f'{__name__}:fail_handler', concurrency=1)
+    jq.register_job_type(SLOW_TYPE, f'{__name__}:slow_handler', concurrency=1)
+    monkeypatch.setattr(jq, 'HEARTBEAT_INTERVAL', 0.05)
+    return jq.JobQueue(str(tmp_path / 'jobs.db'))
+
+
+@pytest.mark.unit
+class TestJobQueue:
+    """任务入队、领取与租约"""
+
+    def test_enqueue_dedupes_by_key(self, queue):
+        first = queue.enqueue(SUCCEED_TYPE, {'value': 1}, job_key='project:1')
+        second = queue.enqueue(SUCCEED_TYPE, {'value': 2}, job_key='project:1')
+        assert first == second
+        assert queue.get(first).payload == {'value': 1}
+
+        job = queue.claim('w1', [SUCCEED_TYPE])
+        queue.finish(job.job_id, 'w1', 'succeeded')
+        third = queue.enqueue(SUCCEED_TYPE, {'value': 3}, job_key='project:1')
+        assert third != first
+        assert queue.get_by_key('project:1').job_id == third
+
+    def test_claim_respects_per_type_concurrency(self, queue):
+        queue.enqueue(SUCCEED_TYPE, {'value': 1})
+        queue.enqueue(SUCCEED_TYPE, {'value': 2})
+        queue.enqueue(FAIL_TYPE)
+
+        first = queue.claim('w1', [SUCCEED_TYPE, FAIL_TYPE])
+        second = queue.claim('w2', [SUCCEED_TYPE, FAIL_TYPE])
+        assert first.job_type == SUCCEED_TYPE
+        assert second.job_type == FAIL_TYPE
+        # 两个类型都已达上限
+        assert queue.claim('w3', [SUCCEED_TYPE, FAIL_TYPE]) is None
+
+        queue.finish(first.job_id, 'w1', 'succeeded')
+        third = queue.claim('w3', [SUCCEED_TYPE, FAIL_TYPE])
+        assert third.job_type == SUCCEED_TYPE
+        assert third.payload == {'value': 2}
+
+    def test_expired_lease_requeues_then_fails(self, queue, monkeypatch):
+        monkeypatch.setattr(jq, 'LEASE_SECONDS', -1)
+        job_id = queue.enqueue(SUCCEED_TYPE, {'value': 1})  # max_attempts 默认 2
+
+        queue.claim('w1', [SUCCEED_TYPE])
+        assert queue.recover_expired() == 1
+        job = queue.get(job_id)
+        assert job.status == 'queued'
+        assert job.worker_id is None
+
+        queue.claim('w2', [SUCCEED_TYPE])
+        assert queue.recover_expired() == 1
+        job = queue.get(job_id)
+        assert job.status == 'failed'
+        assert job.attempts == 2
+        # 被回收的工作进程不能再结束任务
+        assert not queue.finish(job_id, 'w2', 'succeeded')
+
+
+@pytest.mark.unit
+class TestRunJob:
+    """任务执行、结果与取消"""
+
+    def test_result_saved(self, queue):
+        job_id = queue.enqueue(SUCCEED_TYPE, {'value': 'abc'})
+        status = jq.run_job(queue, queue.claim('w1', [SUCCEED_TYPE]), 'w1')
+
+        job = queue.get(job_id)
+        assert status == 'succeeded'
+        assert job.result == {'echo': 'abc'}
+        assert job.finished_at is not None
+
+    def test_handler_exception_marks_failed(self, queue):
+        job_id = queue.enqueue(FAIL_TYPE)
+        status = jq.run_job(queue, queue.claim('w1', [FAIL_TYPE]), 'w1')
+
+        job = queue.get(job_id)
+        assert status == 'failed'
+        assert job.error == '处理失败'
+
+    def test_cancel_queued_job(self, queue):
+        job_id = queue.enqueue(SUCCEED_TYPE, {'value': 1}, job_key='project:2')
+        assert queue.cancel_by_key('project:2')
+        assert queue.get(job_id).status == 'cancelled'
+        assert queue.claim('w1', [SUCCEED_TYPE]) is None
+        assert not queue.cancel(job_id)
+
+    def test_cancel_running_job_cooperatively(self, queue):
+        job_id = queue.enqueue(SLOW_TYPE)
+        job = queue.claim('w1', [SLOW_TYPE])
+        outcome = {}
+        runner = threading.Thread(target=lambda: outcome.update(status=jq.run_job(queue, job, 'w1')))
+        runner.start()
+
+        time.sleep(0.1)
+        assert queue.cancel(job_id)
+        runner.join(timeout=3)
+
+        assert not runner.is_alive()
+        assert outcome['status'] == 'cancelled'
+        assert queue.get(job_id).status == 'cancelled'
+
+
+def _wait_for(predicate, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+@pytest.mark.unit
+class TestWorkerProcess:
+    """真实工作进程"""
+
+    def test_cancel_in_worker_process(self, tmp_path):
+        (tmp_path / 'cancel_probe.py').write_text(textwrap.dedent(PROBE_MODULE), encoding='utf-8')
+        jq.register_job_type(PROBE_TYPE, 'cancel_probe:run', concurrency=1)
+        queue = jq.JobQueue(str(tmp_path / 'jobs.db'))
+        marker = tmp_path / 'marker.txt'
+        job_id = queue.enqueue(PROBE_TYPE, {'marker': str(marker)})
+
+        env = dict(os.environ, JOB_QUEUE_DB_PATH=queue.db_path, JOB_HEARTBEAT_INTERVAL='0.05',
+                   JOB_POLL_INTERVAL='0.05', JOB_LEASE_SECONDS='5')
+        env['PYTHONPATH'] = os.pathsep.join([str(jq.SYSTEM_ROOT), str(tmp_path)])
+        worker = subprocess.Popen([sys.executable, '-c', WORKER_SCRIPT], cwd=str(jq.SYSTEM_ROOT), env=env)
+        try:
+            assert _wait_for(lambda: queue.get(job_id).status == 'running')
+            assert queue.cancel(job_id)
+            assert _wait_for(lambda: queue.get(job_id).status in jq.TERMINAL_STATUSES)
+        finally:
+            worker.terminate()
+            worker.wait(timeout=10)
+
+        assert queue.get(job_id).status == 'cancelled'
+        assert marker.read_text() == 'cancelled'
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LLM 响应缓存测试
+
+测试场景：
+1. 相同请求命中缓存，任一参数不同则未命中
+2. TTL 过期与按最近访问时间的容量淘汰
+3. 按用途启用，LLMClient.call 命中时不再调用模型
+"""
+
+import sys
+import time
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
+
+from ai_tender_system.common import llm_cache
+from ai_tender_system.common.llm_cache import LLMResponseCache, make_cache_key
+from ai_tender_system.common.llm_client import LLMClient
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return LLMResponseCache(str(tmp_path / 'llm_cache.db'), enabled=True, purposes='*')
+
+
+@pytest.mark.unit
+class TestLLMResponseCache:
+    """测试缓存读写、过期与淘汰"""
+
+    def test_key_covers_request(self):
+        base = make_cache_key('m', '提示词', '系统', 0.1, 100, 'json_object')
+        assert base == make_cache_key('m', '提示词', '系统', 0.1, 100, 'json_object')
+        assert base != make_cache_key('m2', '提示词', '系统', 0.1, 100, 'json_object')
+        assert base != make_cache_key('m', '提示词', None, 0.1, 100, 'json_object')
+        assert base != make_cache_key('m', '提示词', '系统', 0.2, 100, 'json_object')
+        assert base != make_cache_key('m', '提示词', '系统', 0.1, 100, None)
+
+    def test_hit_and_miss(self, cache):
+        key = make_cache_key('m', 'p')
+        assert cache.get(key, '筛选') is None
+        cache.put(key, '响应', model='m', purpose='筛选')
+        cache.put(make_cache_key('m', 'empty'), '', purpose='筛选')  # 空响应不缓存
+        assert cache.get(key, '筛选') == '响应'
+
+        stats = cache.get_stats()
+        assert (stats['hits'], stats['misses'], stats['stores']) == (1, 1, 1)
+        assert stats['by_purpose']['筛选']['hits'] == 1
+        assert stats['hit_rate'] == 0.5
+
+    def test_ttl_expiry(self, cache):
+        key = make_cache_key('m', 'p')
+        cache.put(key, '响应')
+        cache.ttl = 0
+        time.sleep(0.01)
+        assert cache.get(key) is None
+
+    def test_lru_eviction(self, cache, monkeypatch):
+        monkeypatch.setattr(llm_cache, 'EVICT_EVERY', 1)
+        cache.max_entries = 3
+        keys = [make_cache_key('m', str(i)) for i in range(3)]
+        for key in keys:
+            cache.put(key, 'r')
+            time.sleep(0.01)
+        assert cache.get(keys[0]) == 'r'  # 刷新最近访问时间
+
+        cache.put(make_cache_key('m', 'new'), 'r')
+
+        assert cache.get(keys[0]) == 'r'
+        assert cache.get(keys[1]) is None
+        assert cache.get(keys[2]) == 'r'
+
+    def test_purpose_flags(self, tmp_path):
+        cache = LLMResponseCache(str(tmp_path / 'c.db'), enabled=True, purposes='目录层级分析, 风险项提取')
+        assert cache.is_enabled_for('目录层级分析')
+        assert not cache.is_enabled_for('LLM调用')
+        cache.set_purpose_enabled('LLM调用')
+        cache.set_purpose_enabled('风险项提取', False)
+        assert cache.is_enabled_for('LLM调用')
+        assert not cache.is_enabled_for('风险项提取')
+
+        disabled = LLMResponseCache(str(tmp_path / 'd.db'), enabled=False)
+        assert not disabled.is_enabled_for('目录层级分析')
+
+
+@pytest.mark.unit
+class TestLLMClientCache:
+    """测试 LLMClient.call 使用响应缓存"""
+
+    @pytest.fixture
+    def client(self):
+        with patch('ai_tender_system.common.llm_client.get_config') as get_config:
+            get_config.return_value.get_model_config.return_value = {
+                'api_key': 'k', 'model_name': 'gpt-4o-mini', 'max_tokens': 500
+            }
+            yield LLMClient(model_name='gpt-4o-mini')
+
+    def test_call_uses_cache(self, client, tmp_path):
+        cache = LLMResponseCache(str(tmp_path / 'c.db'), enabled=True, purposes='目录层级分析')
+        model = Mock(return_value='结果')
+
+        with patch('ai_tender_system.common.llm_client.get_llm_response_cache', return_value=cache), \
+                patch.object(client, '_call_model', model):
+            assert client.call('提示', system_prompt='系统', temperature=0, purpose='目录层级分析') == '结果'
+            assert client.call('提示', system_prompt='系统', temperature=0, purpose='目录层级分析') == '结果'
+            assert model.call_count == 1
+
+            client.call('提示', system_prompt='系统', temperature=0.5, purpose='目录层级分析')
+            assert model.call_count == 2
+
+            # 未启用的用途不走缓存，use_cache 可显式覆盖
+            client.call('提示', system_prompt='系统', temperature=0, purpose='LLM调用')
+            assert model.call_count == 3
+            client.call('提示', system_prompt='系统', temperature=0, purpose='目录层级分析', use_cache=False)
+            assert model.call_count == 4
+
+        model.assert_called_with('提示', '系统', 0, 500, 3, '目录层级分析', None)
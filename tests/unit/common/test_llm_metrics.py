@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LLM 调用指标测试
+
+测试场景：
+1. 单次调用记录耗时、重试次数、token 用量与失败状态，嵌套调用合并到外层
+2. 流式调用记录首 token 时间，挂起期间的其他调用不并入
+3. 按环节汇总 p50/p95 与耗时占比
+4. 批量写入 system_metrics 并从历史数据汇总
+5. LLMClient.call 记录接口返回的用量与重试
+"""
+
+import sys
+import time
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
+
+from ai_tender_system.common.database import KnowledgeBaseDB
+from ai_tender_system.common.llm_client import LLMClient
+from ai_tender_system.common.llm_metrics import (
+    LLMCallRecord, LLMMetricsCollector, note_attempt, note_queue_wait, note_usage,
+    summarize_metric_rows, track_llm_call, track_llm_stream
+)
+
+
+@pytest.fixture
+def collector():
+    collector = LLMMetricsCollector(ring_size=100, flush_interval=0)
+    with patch('ai_tender_system.common.llm_metrics.get_llm_metrics', return_value=collector):
+        yield collector
+
+
+@pytest.mark.unit
+class TestTrackCalls:
+    """测试调用记录"""
+
+    def test_call_record(self, collector):
+        with track_llm_call('m', '风险分析') as record:
+            note_attempt()
+            note_attempt()
+            note_queue_wait(0.2)
+            note_usage({'prompt_tokens': 100, 'completion_tokens': 20})
+            with track_llm_call('m', '内层'):  # 合并到外层
+                note_usage({'prompt_tokens': 5, 'completion_tokens': 1})
+            time.sleep(0.01)
+
+        with pytest.raises(ValueError):
+            with track_llm_call('m', '风险分析'):
+                raise ValueError('失败')
+
+        ok, failed = collector.get_recent(10)[::-1]
+        assert record.retries == 1 and ok['retries'] == 1
+        assert ok['queue_wait'] == pytest.approx(0.2)
+        assert (ok['prompt_tokens'], ok['completion_tokens']) == (105, 21)
+        assert ok['latency'] >= 0.01 and ok['success']
+        assert not failed['success']
+
+    def test_stream_record(self, collector):
+        def chunks():
+            time.sleep(0.02)
+            yield '第一段'
+            yield '第二段'
+
+        stream = track_llm_stream('m', '方案生成', chunks(), prompt_text='提示词')
+        assert next(stream) == '第一段'
+        with track_llm_call('m', '其他环节'):  # 流挂起期间的调用单独记录
+            pass
+        assert list(stream) == ['第二段']
+
+        records = {r['purpose']: r for r in collector.get_recent(10)}
+        streamed = records['方案生成']
+        assert streamed['streamed'] and streamed['ttft'] >= 0.02
+        assert streamed['latency'] >= streamed['ttft']
+        assert streamed['tokens_estimated'] and streamed['completion_tokens'] == 6
+        assert '其他环节' in records
+
+    def test_summary(self, collector):
+        for latency in (1, 2, 3, 4, 5):
+            collector.record(_record('提取', latency, prompt_tokens=100))
+        collector.record(_record('筛选', 1, success=False))
+
+        stages = collector.get_summary()
+        assert [s['purpose'] for s in stages] == ['提取', '筛选']
+        extract = stages[0]
+        assert extract['calls'] == 5
+        assert extract['latency'] == {'total': 15, 'p50': 3, 'p95': 4.8}
+        assert extract['prompt_tokens']['total'] == 500
+        assert extract['wall_share'] == pytest.approx(15 / 16, abs=0.001)
+        assert stages[1]['errors'] == 1
+        assert collector.get_summary(purpose='筛选')[0]['calls'] == 1
+
+
+@pytest.mark.unit
+class TestPersistence:
+    """测试写入 system_metrics"""
+
+    def test_flush_and_summarize(self, temp_dir):
+        db = KnowledgeBaseDB(str(temp_dir / 'metrics.db'))
+        collector = LLMMetricsCollector(ring_size=100, flush_interval=60, db=db)
+        for latency in (1, 2, 3):
+            collector.record(_record('提取', latency, prompt_tokens=10))
+
+        assert collector.flush() == 3
+        assert collector.flush() == 0
+
+        rows = db.get_system_metric_values('llm/', hours=1)
+        stages = summarize_metric_rows(rows)
+        assert stages[0]['purpose'] == '提取'
+        assert stages[0]['calls'] == 3
+        assert stages[0]['latency']['p50'] == 2
+        assert stages[0]['prompt_tokens']['total'] == 30
+        collector.close()
+
+
+@pytest.mark.unit
+class TestLLMClientMetrics:
+    """测试 LLMClient 接入"""
+
+    def test_call_records_usage_and_retries(self, collector):
+        with patch('ai_tender_system.common.llm_client.get_config') as get_config:
+            get_config.return_value.get_model_config.return_value = {
+                'api_key': 'k', 'model_name': 'gpt-4o-mini', 'max_tokens': 100
+            }
+            client = LLMClient(model_name='gpt-4o-mini')
+
+        failed = Mock(status_code=500)
+        failed.json.return_value = {'error': {'message': 'busy'}}
+        ok = Mock(status_code=200)
+        ok.json.return_value = {
+            'choices': [{'message': {'content': '结果'}}],
+            'usage': {'prompt_tokens': 12, 'completion_tokens': 3}
+        }
+
+        with patch('ai_tender_system.common.llm_client.http_post', side_effect=[failed, ok]), \
+                patch('ai_tender_system.common.llm_client.time.sleep'):
+            assert client.call('提示', purpose='目录层级分析', use_cache=False) == '结果'
+
+        record = collector.get_recent(1)[0]
+        assert record['purpose'] == '目录层级分析'
+        assert record['model'] == 'gpt-4o-mini'
+        assert record['retries'] == 1
+        assert (record['prompt_tokens'], record['completion_tokens']) == (12, 3)
+        assert not record['tokens_estimated']
+
+
+def _record(purpose, latency, success=True, **kwargs):
+    return LLMCallRecord('m', purpose, latency=latency, success=success, attempts=1, **kwargs)
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+段落索引(ParagraphIndex)测试
+
+测试场景：
+1. 索引与 doc.paragraphs 的文本、样式一致
+2. 段落范围到 body 范围的转换（包含表格）
+3. 共享索引复用与结构变化后重建
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+from docx import Document
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent / 'ai_tender_system'))
+
+from common.paragraph_index import ParagraphIndex, get_paragraph_index
+
+
+@pytest.fixture
+def sample_doc():
+    """创建包含标题、正文和表格的测试文档"""
+    doc = Document()
+    doc.add_heading('第一章  项目概述', level=1)
+    doc.add_paragraph('  本项目为测试项目。 ')
+    doc.add_table(rows=1, cols=2)
+    doc.add_paragraph('')
+    doc.add_heading('第二章 技术要求', level=2)
+    return doc
+
+
+@pytest.mark.unit
+class TestParagraphIndex:
+    """测试段落索引"""
+
+    def test_matches_doc_paragraphs(self, sample_doc):
+        pidx = ParagraphIndex(sample_doc)
+
+        assert len(pidx) == len(sample_doc.paragraphs)
+        assert pidx.texts == [p.text for p in sample_doc.paragraphs]
+        assert pidx.style_names == [p.style.name for p in sample_doc.paragraphs]
+        assert pidx.stripped[1] == '本项目为测试项目。'
+        assert pidx.normalized[0] == '第一章项目概述'
+        assert pidx.is_heading_style(0)
+        assert not pidx.is_heading_style(1)
+
+    def test_body_range_includes_table(self, sample_doc):
+        pidx = ParagraphIndex(sample_doc)
+
+        start, end = pidx.body_range(1, 2)
+        assert start < pidx.table_body_positions[0] < end
+        # 越界结束索引表示到 body 末尾
+        assert pidx.body_range(3, None)[1] == len(pidx.body_elements) - 1
+        assert pidx.body_range(99, None) is None
+
+    def test_shared_index_rebuilt_when_stale(self, sample_doc):
+        first = get_paragraph_index(sample_doc)
+        assert get_paragraph_index(sample_doc) is first
+
+        sample_doc.add_paragraph('新增段落')
+        rebuilt = get_paragraph_index(sample_doc)
+        assert rebuilt is not first
+        assert rebuilt.texts[-1] == '新增段落'
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LLM 调用限流测试
+
+测试场景：
+1. RPM / TPM 令牌桶按速率放行
+2. 最大并发受租约限制，租约超时自动回收
+3. 多个进程共享同一配额
+4. 429 后全体暂停并降速，成功调用逐步恢复
+5. 配额配置解析与 LLMClient 收到 429 时的处理
+6. 未设置限制时获取配额不访问数据库，收到 429 后按共享状态暂停
+"""
+
+import multiprocessing
+import sys
+import threading
+import time
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
+
+from ai_tender_system.common.llm_client import LLMClient
+from ai_tender_system.common.rate_limiter import (
+    ModelRateLimiter, RateGovernor, RateLimitPolicy, RateLimitTimeout, estimate_tokens
+)
+
+
+@pytest.fixture
+def governor(tmp_path):
+    return RateGovernor(str(tmp_path / 'rate.db'), burst_seconds=0.1)
+
+
+def _acquire_in_process(db_path, count, queue):
+    governor = RateGovernor(db_path, burst_seconds=0.1)
+    for _ in range(count):
+        governor.acquire('shared', RateLimitPolicy(rpm=600))
+        queue.put(time.time())
+
+
+@pytest.mark.unit
+class TestRateGovernor:
+    """测试令牌桶、并发租约与自适应降速"""
+
+    def test_rpm_pacing(self, governor):
+        policy = RateLimitPolicy(rpm=600)  # 每 0.1 秒一次，突发容量 1
+        start = time.monotonic()
+        for _ in range(4):
+            governor.acquire('m', policy)
+        assert time.monotonic() - start >= 0.25
+
+        stats = governor.get_stats()['m']
+        assert stats['acquired'] == 4
+        assert stats['wait_seconds'] > 0
+
+    def test_tpm_pacing(self, tmp_path):
+        governor = RateGovernor(str(tmp_path / 'rate.db'), burst_seconds=1)
+        policy = RateLimitPolicy(tpm=6000)  # 每秒 100 token
+        start = time.monotonic()
+        governor.acquire('m', policy, tokens=100)
+        assert time.monotonic() - start < 0.1
+        governor.acquire('m', policy, tokens=30)
+        assert time.monotonic() - start >= 0.25
+
+    def test_timeout(self, governor):
+        policy = RateLimitPolicy(rpm=6)
+        governor.acquire('m', policy)
+        with pytest.raises(RateLimitTimeout):
+            governor.acquire('m', policy, timeout=0.1)
+        assert governor.get_stats()['m']['timeouts'] == 1
+
+    def test_max_in_flight_across_threads(self, governor):
+        policy = RateLimitPolicy(max_in_flight=2)
+        lock = threading.Lock()
+        state = {'current': 0, 'max': 0}
+
+        def work():
+            with governor.slot('m', policy):
+                with lock:
+                    state['current'] += 1
+                    state['max'] = max(state['max'], state['current'])
+                time.sleep(0.05)
+                with lock:
+                    state['current'] -= 1
+
+        threads = [threading.Thread(target=work) for _ in range(6)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert state['max'] == 2
+        assert governor.get_stats()['m'].get('in_flight', 0) == 0
+
+    def test_expired_lease_is_reclaimed(self, tmp_path):
+        governor = RateGovernor(str(tmp_path / 'rate.db'), lease_ttl=0.1)
+        policy = RateLimitPolicy(max_in_flight=1)
+        governor.acquire('m', policy)  # 模拟进程崩溃，未释放
+        start = time.monotonic()
+        governor.release(governor.acquire('m', policy))
+        assert time.monotonic() - start >= 0.08
+
+    def test_shared_across_processes(self, tmp_path):
+        ctx = multiprocessing.get_context('fork')
+        queue = ctx.Queue()
+        db_path = str(tmp_path / 'rate.db')
+        RateGovernor(db_path).get_stats()  # 先建表
+
+        workers = [ctx.Process(target=_acquire_in_process, args=(db_path, 3, queue)) for _ in range(2)]
+        for p in workers:
+            p.start()
+        times = sorted(queue.get(timeout=10) for _ in range(6))
+        for p in workers:
+            p.join()
+
+        # 两个进程共用每 0.1 秒一次的配额
+        assert times[-1] - times[0] >= 0.4
+
+    def test_throttle_and_recovery(self, governor):
+        policy = RateLimitPolicy(rpm=6000)
+        governor.acquire('m', policy)
+        governor.report_throttled('m', retry_after=0.2)
+
+        # 其他实例（其他进程）同样暂停
+        other = RateGovernor(governor.db_path)
+        start = time.monotonic()
+        other.acquire('m', policy)
+        assert time.monotonic() - start >= 0.15
+
+        stats = governor.get_stats()['m']
+        assert stats['throttled'] == 1
+        assert stats['rate_scale'] == pytest.approx(0.5)
+
+        governor.report_success('m')
+        assert governor.get_stats()['m']['rate_scale'] == pytest.approx(0.55)
+
+    def test_unlimited_skips_database(self, governor, monkeypatch):
+        policy = RateLimitPolicy()
+        connect = Mock(side_effect=AssertionError('不应访问数据库'))
+        monkeypatch.setattr(governor, '_connect', connect)
+        for _ in range(3):
+            assert governor.acquire('free', policy) is None
+        assert governor._stats['free']['acquired'] == 3
+
+        # 收到 429 后恢复前仍按共享状态暂停
+        monkeypatch.undo()
+        governor.report_throttled('free', retry_after=0.2)
+        start = time.monotonic()
+        governor.acquire('free', policy)
+        assert time.monotonic() - start >= 0.15
+
+
+@pytest.mark.unit
+class TestModelRateLimiter:
+    """测试配额配置与 LLMClient 接入"""
+
+    def test_policy_resolution(self, monkeypatch):
+        limiter = ModelRateLimiter('unicom-yuanjing', {'model_name': 'yuanjing-lite'},
+                                   'https://maas-api.ai-yuanjing.com/v1/chat/completions')
+        assert limiter.key == 'maas-api.ai-yuanjing.com'
+        assert limiter.policy.rpm == 5
+
+        limiter = ModelRateLimiter('deepseek-v3', {'model_name': 'deepseek-chat', 'max_in_flight': 4},
+                                   'https://api.deepseek.com/chat/completions')
+        assert limiter.key == 'api.deepseek.com/deepseek-chat'
+        assert limiter.policy == RateLimitPolicy(max_in_flight=4)
+
+        monkeypatch.setenv('LLM_RATE_LIMITS', '{"deepseek-v3": {"rpm": 100, "tpm": 50000}}')
+        limiter = ModelRateLimiter('deepseek-v3', {'model_name': 'deepseek-chat'},
+                                   'https://api.deepseek.com/chat/completions')
+        assert limiter.policy == RateLimitPolicy(rpm=100, tpm=50000)
+
+    def test_estimate_tokens(self):
+        assert estimate_tokens('') == 0
+        assert estimate_tokens('投标文件') == 4
+        assert estimate_tokens('abcdefgh') == 2
+
+    def test_client_reports_429(self, governor):
+        with patch('ai_tender_system.common.llm_client.get_config') as get_config:
+            get_config.return_value.get_model_config.return_value = {
+                'api_key': 'k', 'model_name': 'gpt-4o-mini', 'max_tokens': 100
+            }
+            client = LLMClient(model_name='gpt-4o-mini')
+
+        throttled = Mock(status_code=429, headers={'Retry-After': '0.1'})
+        ok = Mock(status_code=200)
+        ok.json.return_value = {'choices': [{'message': {'content': '结果'}}]}
+
+        with patch('ai_tender_system.common.rate_limiter.get_rate_governor', return_value=governor), \
+                patch('ai_tender_system.common.llm_client.http_post', side_effect=[throttled, ok]):
+            start = time.monotonic()
+            assert client.call('提示', use_cache=False) == '结果'
+
+        # 按 Retry-After 暂停，不再叠加指数退避
+        assert time.monotonic() - start < 1
+        stats = governor.get_stats()[client.rate_limiter.key]
+        assert stats['throttled'] == 1
+        assert stats['acquired'] == 2
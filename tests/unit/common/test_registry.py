@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+管理器单例注册表测试
+
+测试场景：
+1. run_once 对同一 key 只执行一次（多线程并发时也一样），执行失败下次重试
+2. get_instance 按 (factory, args) 缓存单例，并发获取时只构造一次
+3. bootstrap_schemas 单项失败不影响其他项
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+project_root = Path(__file__).parent.parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from ai_tender_system.common import registry
+
+
+@pytest.fixture(autouse=True)
+def clean_registry():
+    registry.reset_registry()
+    yield
+    registry.reset_registry()
+
+
+class SlowManager:
+    created = 0
+
+    def __init__(self, db_path=None):
+        time.sleep(0.05)
+        SlowManager.created += 1
+        self.db_path = db_path
+
+
+def good_bootstrap():
+    registry.run_once('bootstrap:good', lambda: None)
+
+
+def bad_bootstrap():
+    raise RuntimeError('建表失败')
+
+
+@pytest.mark.unit
+class TestRunOnce:
+    """一次性执行"""
+
+    def test_runs_once_across_threads(self):
+        calls = []
+        threads = [threading.Thread(target=registry.run_once, args=(('schema', 'a.db'), lambda: calls.append(1)))
+                   for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert calls == [1]
+        assert not registry.run_once(('schema', 'a.db'), lambda: calls.append(2))
+        assert registry.run_once(('schema', 'b.db'), lambda: calls.append(3))
+        assert calls == [1, 3]
+
+    def test_failure_is_retried(self):
+        def fail():
+            raise RuntimeError('数据库被锁定')
+
+        with pytest.raises(RuntimeError):
+            registry.run_once('schema', fail)
+        assert registry.run_once('schema', lambda: None)
+
+
+@pytest.mark.unit
+class TestGetInstance:
+    """单例缓存"""
+
+    def test_concurrent_get_constructs_once(self):
+        SlowManager.created = 0
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(registry.get_instance(SlowManager)))
+                   for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert SlowManager.created == 1
+        assert all(item is results[0] for item in results)
+
+    def test_keyed_by_args(self):
+        first = registry.get_instance(SlowManager, 'a.db')
+        assert registry.get_instance(SlowManager, 'a.db') is first
+        other = registry.get_instance(SlowManager, 'b.db')
+        assert other is not first
+        assert other.db_path == 'b.db'
+
+    def test_bootstrap_failure_isolated(self, monkeypatch):
+        monkeypatch.setattr(registry, '_bootstraps', [])
+        registry.register_bootstrap('bad', f'{__name__}:bad_bootstrap')
+        registry.register_bootstrap('good', f'{__name__}:good_bootstrap')
+
+        assert registry.bootstrap_schemas() == {'bad': False, 'good': True}
+        assert not registry.run_once('bootstrap:good', lambda: None)
@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+目录标题定位的线性扫描参考实现
+
+TitleMatchIndex 引入前 DocumentStructureParser._find_paragraph_by_title 的逐段落扫描版本，
+作为索引实现的对照：test_title_matcher.py 校验两者定位结果一致，
+scripts/benchmark_title_matching.py 比较两者耗时。
+"""
+
+import re
+from difflib import SequenceMatcher
+from typing import Dict, List, Optional
+
+from docx import Document
+
+from common.paragraph_index import get_paragraph_index
+
+
+def find_paragraph_by_title_scan(parser, doc: Document, title: str, start_idx: int = 0, toc_items: Optional[List[Dict]] = None, toc_end_idx: Optional[int] = None) -> Optional[int]:
+    """
+    在文档中搜索与标题匹配的段落（逐段落线性扫描的参考实现）
+
+    即 TitleMatchIndex 引入前的 DocumentStructureParser._find_paragraph_by_title，
+    用于结果一致性校验（test_title_matcher.py）和基准测试（scripts/benchmark_title_matching.py）。
+
+    Args:
+        parser: 解析器实例（使用其日志与元数据列表检测）
+        doc: Word文档对象
+        title: 要搜索的标题文本
+        start_idx: 开始搜索的段落索引
+        toc_items: 目录项列表（可选），用于智能检测元数据列表
+        toc_end_idx: 目录结束的段落索引（可选），用于限制元数据检测不扫描目录区域
+
+    Returns:
+        段落索引，如果未找到则返回None
+    """
+    def aggressive_normalize(text: str) -> str:
+        """激进文本规范化：移除所有分隔符、前缀、空格"""
+        # 移除"附件-"、"附件:"等前缀
+        text = re.sub(r'^附件[-:：]?', '', text)
+        # 移除连字符、下划线、制表符
+        text = re.sub(r'[-_\t]+', '', text)
+        # 移除所有空格和冒号（将"第一章："和"第一章 "视为等价）
+        text = re.sub(r'[:：\s]+', '', text)
+        return text
+
+    def extract_core_keywords(text: str) -> str:
+        """提取核心关键词：去除编号和常见前缀"""
+        # 移除编号（支持冒号和空格：第X章：、第X章 、第X章、第X部分：等）
+        text = re.sub(r'^(第[一二三四五六七八九十\d]+部分|第[一二三四五六七八九十\d]+章)[:：\s]*', '', text)
+        text = re.sub(r'^(\d+\.|\d+\.\d+|[一二三四五六七八九十]+、)\s*', '', text)
+        # 移除"附件"前缀
+        text = re.sub(r'^附件[-:：]?', '', text)
+        # 移除分隔符
+        text = re.sub(r'[-_\t]+', '', text)
+        # 移除空格和冒号
+        text = re.sub(r'[:：\s]+', '', text)
+        return text
+
+    def calculate_similarity(str1: str, str2: str) -> float:
+        """计算两个字符串的相似度（使用 SequenceMatcher）"""
+        if not str1 or not str2:
+            return 0.0
+
+        # 使用 SequenceMatcher 计算真正的字符串相似度
+        # 这比基于子串的方法更能处理同义词替换（如"响应"vs"应答"）
+        return SequenceMatcher(None, str1, str2).ratio()
+
+    # 清理标题（移除多余空格）
+    clean_title = re.sub(r'\s+', '', title)
+
+    # 激进规范化的标题
+    aggressive_title = aggressive_normalize(title)
+
+    # 提取核心关键词
+    core_keywords = extract_core_keywords(aggressive_title)
+
+    parser.logger.info(f"搜索标题: '{title}' (清理后: '{clean_title}', 核心: '{core_keywords}'), 从段落 {start_idx} 开始")
+
+    # 候选匹配列表（用于宽松匹配级别）
+    # 格式: [(段落索引, 匹配级别, 得分, 段落文本, 匹配原因)]
+    loose_match_candidates = []
+
+    # 记录已跳过的元数据列表区域（避免重复检测和日志）
+    skipped_ranges = []
+
+    # 共享段落索引（文本、规范化文本、样式名只计算一次）
+    pidx = get_paragraph_index(doc)
+
+    # 🔑 第一轮：严格匹配 (Level 1-3)，找到立即返回
+    for i in range(start_idx, len(pidx)):
+        # 检查是否在已跳过的区域中
+        if any(start <= i <= end for start, end in skipped_ranges):
+            continue
+        para_text = pidx.stripped[i]
+
+        if not para_text:
+            continue
+
+        # 清理段落文本
+        clean_para = pidx.normalized[i]
+
+        # 激进规范化的段落
+        aggressive_para = aggressive_normalize(para_text)
+
+        # 段落核心关键词
+        para_keywords = extract_core_keywords(aggressive_para)
+
+        # Level 1: 完全匹配或包含匹配
+        level1_exact_match = (clean_title == clean_para)
+        level1_contain_match = (clean_title in clean_para)
+
+        if level1_exact_match or level1_contain_match:
+            # ⭐️ 检查是否在连续章节标题列表中（如"文件构成说明"）
+            list_range = parser._detect_chapter_title_list_range(doc, i, toc_items, toc_end_idx)
+
+            if list_range:
+                start, end, titles = list_range
+
+                # 🔑 关键：对于"第X章"、"第X部分"这种明确的一级章节标题
+                # 只有当它具有 Heading 样式时才认为是真正的章节标题
+                # 否则可能只是文档中的一个章节列表/索引区域
+                is_primary_chapter = re.match(r'^第[一二三四五六七八九十百千\d]+[章部分]', para_text.strip())
+                is_heading_style = pidx.is_heading_style(i)
+
+                if is_primary_chapter and is_heading_style:
+                    parser.logger.info(f"  ✓ 找到一级章节标题（Heading样式，不跳过）: 段落 {i}: '{para_text}'")
+                    return i
+
+                # 如果是"第X章"但不是Heading样式，很可能是文档中的章节列表区域
+                if is_primary_chapter and not is_heading_style:
+                    parser.logger.info(f"  ⏭️  跳过段落 {i}（第X章格式但非Heading样式，可能是章节列表）: '{para_text}'")
+                    # 记录跳过区域
+                    skipped_ranges.append((start, end))
+                    continue
+
+                parser.logger.info(
+                    f"  ⚠️  检测到'文件构成说明'列表 (段落{start}-{end}，"
+                    f"包含{len(titles)}个章节标题)，跳过该区域"
+                )
+                # 显示列表中的章节（最多5个）
+                for idx, title_text in titles[:5]:
+                    parser.logger.info(f"      - 段落{idx}: {title_text}")
+                if len(titles) > 5:
+                    parser.logger.info(f"      ... 还有{len(titles)-5}个")
+
+                # 记录跳过区域
+                skipped_ranges.append((start, end))
+
+                # 继续搜索（不返回此匹配）
+                continue
+
+            # 🔑 对于包含匹配（非完全匹配），需要额外验证
+            if level1_contain_match and not level1_exact_match:
+                # 检查是否是Heading样式（更可能是真正的章节标题）
+                is_heading = pidx.is_heading_style(i)
+                # 或者文本很短（≤20字，更可能是标题而不是正文）
+                is_short = len(para_text) <= 20
+                # 🆕 检查标题是否在段落开头位置（章节标题应该在开头，不是中间）
+                title_at_start = clean_para.startswith(clean_title)
+
+                if not is_heading:
+                    # 非 Heading 样式时，需要满足：短文本 或 标题在开头
+                    if not (is_short or title_at_start):
+                        # 标题在段落中间 → 可能是正文中提到标题 → 跳过
+                        parser.logger.debug(f"  ⏭️  跳过段落 {i}（包含匹配但标题不在开头且非短文本）: '{para_text[:60]}'")
+                        continue
+
+            parser.logger.info(f"  ✓ 找到匹配 (Level 1-完全): 段落 {i}: '{para_text}'")
+            return i
+
+        # Level 2: 激进规范化后的完全匹配或包含匹配
+        level2_exact_match = (aggressive_title == aggressive_para)
+        level2_contain_match = (aggressive_title in aggressive_para)
+
+        if level2_exact_match or level2_contain_match:
+            # 🔑 对于包含匹配（非完全匹配），需要额外验证
+            if level2_contain_match and not level2_exact_match:
+                is_heading = pidx.is_heading_style(i)
+                is_short = len(para_text) <= 20
+                # 🆕 检查标题是否在段落开头位置（章节标题应该在开头，不是中间）
+                title_at_start = aggressive_para.startswith(aggressive_title)
+
+                if not is_heading:
+                    # 非 Heading 样式时，需要满足：短文本 或 标题在开头
+                    if not (is_short or title_at_start):
+                        # 标题在段落中间 → 可能是正文中提到标题 → 跳过
+                        parser.logger.debug(f"  ⏭️  跳过段落 {i}（包含匹配但标题不在开头且非短文本）: '{para_text[:60]}'")
+                        continue
+
+            parser.logger.info(f"  ✓ 找到匹配 (Level 2-规范化): 段落 {i}: '{para_text}'")
+            return i
+
+        # 检查标题和段落是否包含"第X部分"（用于Level 3和Level 4约束）
+        title_has_part_number = bool(re.search(r'第[一二三四五六七八九十\d]+部分', title))
+        para_has_part_number = bool(re.search(r'第[一二三四五六七八九十\d]+部分', para_text))
+
+        # Level 3: 去除编号后的匹配
+        # 支持多种编号格式：第X部分、第X章、1.、1.1、一、等
+        title_without_number = re.sub(r'^(第[一二三四五六七八九十\d]+部分|第[一二三四五六七八九十\d]+章|\d+\.|\d+\.\d+|[一二三四五六七八九十]+、)\s*', '', clean_title)
+        para_without_number = re.sub(r'^(第[一二三四五六七八九十\d]+部分|第[一二三四五六七八九十\d]+章|\d+\.|\d+\.\d+|[一二三四五六七八九十]+、)\s*', '', clean_para)
+
+        if title_without_number and para_without_number and title_without_number == para_without_number:
+            # 如果TOC标题有"第X部分"，则段落也必须有"第X部分"（避免匹配到TOC内的编号内容）
+            # 🆕 例外：如果正文段落使用 Heading 样式，说明是真正的章节标题，即使没有"第X部分"前缀也应匹配
+            is_heading = pidx.is_heading_style(i)
+            if title_has_part_number and not para_has_part_number:
+                if is_heading:
+                    # 正文使用 Heading 样式，视为有效的章节标题，可以匹配
+                    parser.logger.info(f"  ✓ 找到匹配 (Level 3-去编号+Heading样式): 段落 {i}: '{para_text}'")
+                    return i
+                else:
+                    pass  # 跳过，不匹配
+            else:
+                parser.logger.info(f"  ✓ 找到匹配 (Level 3-去编号): 段落 {i}: '{para_text}'")
+                return i
+
+    # 🔑 第二轮：宽松匹配 (Level 4-7)，收集所有候选
+    parser.logger.info("  严格匹配 (Level 1-3) 未找到，开始宽松匹配 (Level 4-7)")
+
+    for i in range(start_idx, len(pidx)):
+        # 检查是否在已跳过的区域中
+        if any(start <= i <= end for start, end in skipped_ranges):
+            continue
+        para_text = pidx.stripped[i]
+
+        if not para_text:
+            continue
+
+        # 清理段落文本
+        clean_para = pidx.normalized[i]
+
+        # 激进规范化的段落
+        aggressive_para = aggressive_normalize(para_text)
+
+        # 段落核心关键词
+        para_keywords = extract_core_keywords(aggressive_para)
+
+        # 检查标题和段落是否包含"第X部分"
+        title_has_part_number = bool(re.search(r'第[一二三四五六七八九十\d]+部分', title))
+        para_has_part_number = bool(re.search(r'第[一二三四五六七八九十\d]+部分', para_text))
+
+        # 去除编号
+        title_without_number = re.sub(r'^(第[一二三四五六七八九十\d]+部分|第[一二三四五六七八九十\d]+章|\d+\.|\d+\.\d+|[一二三四五六七八九十]+、)\s*', '', clean_title)
+        para_without_number = re.sub(r'^(第[一二三四五六七八九十\d]+部分|第[一二三四五六七八九十\d]+章|\d+\.|\d+\.\d+|[一二三四五六七八九十\d]+、)\s*', '', clean_para)
+
+        # Level 4: 核心关键词匹配（长度≥4字）
+        if len(core_keywords) >= 4 and len(para_keywords) >= 4:
+            # 完全相等匹配（得分最高）
+            if core_keywords == para_keywords:
+                loose_match_candidates.append((i, 4, 100, para_text, f"关键词完全相等: '{core_keywords}'"))
+            # 标题关键词包含段落关键词（得分中等）
+            elif core_keywords in para_keywords:
+                loose_match_candidates.append((i, 4, 70, para_text, f"关键词包含: '{core_keywords}' in '{para_keywords}'"))
+            # 段落关键词包含标题关键词（得分较低，容易误匹配）
+            elif para_keywords in core_keywords:
+                loose_match_candidates.append((i, 4, 50, para_text, f"被包含: '{para_keywords}' in '{core_keywords}'"))
+
+        # Level 4.5: 部分子串匹配
+        if len(core_keywords) >= 6 and title_has_part_number:
+            for substr_len in range(len(core_keywords), 5, -1):
+                substr = core_keywords[:substr_len]
+                if substr in para_keywords and len(substr) >= 6:
+                    if para_has_part_number and len(para_text) <= 50:
+                        match_ratio = len(substr) / len(core_keywords)
+                        score = 65 + match_ratio * 10  # 65-75分
+                        loose_match_candidates.append((i, 4.5, score, para_text, f"部分子串{match_ratio:.0%}: '{substr}'"))
+                    break
+
+        # Level 5: 相似度匹配（相似度≥60%）
+        if len(core_keywords) >= 4:
+            similarity = calculate_similarity(core_keywords, para_keywords)
+            if similarity >= 0.6:
+                # 🆕 检查章节编号是否匹配（如"第三章"）
+                title_chapter_match = re.match(r'^第([一二三四五六七八九十\d]+)章', title)
+                para_chapter_match = re.match(r'^第([一二三四五六七八九十\d]+)章', para_text)
+
+                if title_chapter_match and para_chapter_match:
+                    # 两者都有章节编号
+                    if title_chapter_match.group(1) == para_chapter_match.group(1):
+                        # 章节编号相同（如都是"第三章"），大幅提高分数
+                        # 这种情况下，即使内容略有不同（如"响应"vs"应答"），也应该优先匹配
+                        score = 80 + similarity * 20  # 80-100分
+                        loose_match_candidates.append((i, 5, score, para_text, f"章节编号匹配+相似度{similarity:.0%}"))
+                    else:
+                        # 章节编号不同，降低分数
+                        score = similarity * 30  # 18-30分
+                        loose_match_candidates.append((i, 5, score, para_text, f"相似度{similarity:.0%}(编号不同)"))
+                else:
+                    # 普通相似度匹配
+                    score = similarity * 60  # 36-60分
+                    loose_match_candidates.append((i, 5, score, para_text, f"相似度{similarity:.0%}"))
+
+        # Level 6: 宽松关键词匹配（至少6字标题）
+        if len(title_without_number) >= 6:
+            if title_without_number in clean_para:
+                loose_match_candidates.append((i, 6, 40, para_text, f"包含去编号标题: '{title_without_number}'"))
+
+        # Level 7: 转换编号后匹配
+        def convert_chinese_to_number(text):
+            """将第一/第二/第三等转换为1/2/3"""
+            mapping = {'一': '1', '二': '2', '三': '3', '四': '4', '五': '5',
+                      '六': '6', '七': '7', '八': '8', '九': '9', '十': '10'}
+            match = re.match(r'^第([一二三四五六七八九十]+)部分(.*)$', text)
+            if match:
+                num = mapping.get(match.group(1), match.group(1))
+                return f"{num}.{match.group(2)}"
+            return text
+
+        converted_title = convert_chinese_to_number(clean_title)
+        if converted_title != clean_title and clean_para.startswith(converted_title[:3]):
+            converted_para_without_num = re.sub(r'^\d+\.', '', clean_para)
+            converted_title_without_num = re.sub(r'^\d+\.', '', converted_title)
+            if converted_title_without_num == converted_para_without_num:
+                loose_match_candidates.append((i, 7, 30, para_text, "转换编号后匹配"))
+
+    # 🔑 从候选中选择得分最高的
+    if loose_match_candidates:
+        # 按得分排序
+        loose_match_candidates.sort(key=lambda x: x[2], reverse=True)
+        best = loose_match_candidates[0]
+        para_idx, level, score, para_text, reason = best
+
+        parser.logger.info(f"  ✓ 从 {len(loose_match_candidates)} 个宽松候选中选择最佳匹配:")
+        parser.logger.info(f"     段落 {para_idx} (Level {level}, 得分{score:.0f}): '{para_text[:60]}'")
+        parser.logger.info(f"     匹配原因: {reason}")
+
+        # 显示其他候选（前3个）
+        if len(loose_match_candidates) > 1:
+            parser.logger.info("  其他候选:")
+            for candidate in loose_match_candidates[1:4]:
+                c_idx, c_level, c_score, c_text, c_reason = candidate
+                parser.logger.info(f"     段落 {c_idx} (Level {c_level}, 得分{c_score:.0f}): '{c_text[:60]}'")
+
+        return para_idx
+
+    # 未找到任何匹配
+    parser.logger.warning(f"未找到标题匹配: '{title}'")
+    return None
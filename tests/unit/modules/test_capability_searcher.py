@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+能力搜索器(CapabilitySearcher)语义搜索测试
+
+测试场景：
+1. 矩阵化批量语义搜索与逐行余弦相似度结果一致
+2. 标签过滤、min_score 过滤
+3. 向量矩阵缓存命中与失效
+4. 批量关键词搜索与逐条搜索结果一致
+"""
+
+import logging
+import sqlite3
+import struct
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
+
+from ai_tender_system.modules.product_capability.capability_searcher import CapabilitySearcher
+from ai_tender_system.modules.product_capability.embedding_cache import (
+    get_capability_embedding_cache, invalidate_capability_cache
+)
+
+DIMENSION = 16
+COMPANY_ID = 1
+
+
+class FakeEmbeddingService:
+    """按文本哈希生成确定性向量的模拟嵌入服务"""
+
+    def __init__(self):
+        self.batch_calls = 0
+
+    @staticmethod
+    def vector(text):
+        rng = np.random.default_rng(abs(hash(text)) % (2 ** 32))
+        return rng.standard_normal(DIMENSION).astype(np.float32)
+
+    def get_embedding(self, text):
+        return self.vector(text).tolist()
+
+    def get_embeddings(self, texts):
+        self.batch_calls += 1
+        return np.stack([self.vector(t) for t in texts])
+
+
+def insert_capability(conn, name, embedding, tag_id=None, company_id=COMPANY_ID):
+    blob = struct.pack(f'{len(embedding)}f', *embedding)
+    conn.execute(
+        """
+        INSERT INTO product_capabilities_index
+            (company_id, doc_id, capability_name, capability_description, tag_id, capability_embedding)
+        VALUES (?, 1, ?, ?, ?, ?)
+        """,
+        (company_id, name, f'{name}的描述', tag_id, blob)
+    )
+
+
+@pytest.fixture
+def searcher(tmp_path):
+    db_path = str(tmp_path / 'kb.db')
+    conn = sqlite3.connect(db_path)
+    conn.executescript("""
+        CREATE TABLE product_capabilities_index (
+            capability_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            company_id INTEGER NOT NULL,
+            doc_id INTEGER NOT NULL,
+            capability_name TEXT NOT NULL,
+            capability_description TEXT,
+            tag_id INTEGER,
+            capability_embedding BLOB,
+            is_active BOOLEAN DEFAULT 1
+        );
+        CREATE TABLE product_capability_tags (tag_id INTEGER PRIMARY KEY, tag_name TEXT);
+        CREATE TABLE documents (doc_id INTEGER PRIMARY KEY, original_filename TEXT);
+        INSERT INTO product_capability_tags VALUES (1, '风控'), (2, '接口');
+        INSERT INTO documents VALUES (1, '产品白皮书.docx');
+    """)
+    rng = np.random.default_rng(0)
+    for i in range(200):
+        insert_capability(conn, f'能力{i}', rng.standard_normal(DIMENSION), tag_id=(i % 3) or None)
+    insert_capability(conn, '其他企业能力', rng.standard_normal(DIMENSION), company_id=2)
+    conn.commit()
+    conn.close()
+
+    invalidate_capability_cache()
+    instance = CapabilitySearcher.__new__(CapabilitySearcher)
+    instance.db_path = db_path
+    instance.embedding_service = FakeEmbeddingService()
+    instance.logger = logging.getLogger('test')
+    return instance
+
+
+def scan_semantic(searcher, query, tag_id=None, top_k=10, min_score=0.0):
+    """逐行计算余弦相似度（原实现）"""
+    query_embedding = searcher.embedding_service.get_embedding(query)
+    conn = searcher._get_connection()
+    sql = """
+        SELECT capability_id, capability_embedding FROM product_capabilities_index
+        WHERE company_id = ? AND is_active = 1 AND capability_embedding IS NOT NULL
+    """
+    params = [COMPANY_ID]
+    if tag_id:
+        sql += " AND tag_id = ?"
+        params.append(tag_id)
+    scored = []
+    for row in conn.execute(sql, params):
+        score = searcher._cosine_similarity(query_embedding, searcher._deserialize_embedding(row[1]))
+        if score >= min_score:
+            scored.append((row[0], score))
+    conn.close()
+    scored.sort(key=lambda x: x[1], reverse=True)
+    return scored[:top_k]
+
+
+@pytest.mark.unit
+class TestSemanticSearchBatch:
+    """测试矩阵化批量语义搜索"""
+
+    def test_matches_row_by_row_scan(self, searcher):
+        queries = ['实时风控决策', '开放接口', '七乘二十四小时服务']
+        batch = searcher.semantic_search_batch(queries, COMPANY_ID, top_k=5, min_score=0.0)
+
+        assert searcher.embedding_service.batch_calls == 1
+        for query, results in zip(queries, batch):
+            expected = scan_semantic(searcher, query, top_k=5)
+            assert [r['capability_id'] for r in results] == [cap_id for cap_id, _ in expected]
+            for result, (_, score) in zip(results, expected):
+                assert result['match_score'] == pytest.approx(score, abs=1e-5)
+                assert result['match_method'] == 'semantic'
+                assert result['doc_name'] == '产品白皮书.docx'
+
+    def test_tag_filter_and_min_score(self, searcher):
+        results = searcher.semantic_search_batch(['风控'], COMPANY_ID, tag_id=1, top_k=50, min_score=0.2)[0]
+        expected = scan_semantic(searcher, '风控', tag_id=1, top_k=50, min_score=0.2)
+
+        assert [r['capability_id'] for r in results] == [cap_id for cap_id, _ in expected]
+        assert all(r['tag_name'] == '风控' for r in results)
+        assert all(r['match_score'] >= 0.2 for r in results)
+
+    def test_search_batch_matches_search(self, searcher):
+        queries = ['能力1', '能力2']
+        batch = searcher.search_batch(queries, COMPANY_ID, method='hybrid', top_k=5, min_score=0.1)
+        for query, results in zip(queries, batch):
+            single = searcher.search(query, COMPANY_ID, method='hybrid', top_k=5, min_score=0.1)
+            assert [r['capability_id'] for r in results] == [r['capability_id'] for r in single]
+
+
+@pytest.mark.unit
+class TestCapabilityEmbeddingCache:
+    """测试向量矩阵缓存"""
+
+    def test_cache_hit_and_invalidation(self, searcher):
+        cache = get_capability_embedding_cache()
+        misses = cache.misses
+
+        searcher.semantic_search_batch(['a'], COMPANY_ID)
+        searcher.semantic_search_batch(['b'], COMPANY_ID)
+        assert cache.misses == misses + 1
+
+        invalidate_capability_cache(searcher.db_path, COMPANY_ID)
+        searcher.semantic_search_batch(['c'], COMPANY_ID)
+        assert cache.misses == misses + 2
+
+    def test_reload_on_external_write(self, searcher):
+        query = '新增能力'
+        conn = sqlite3.connect(searcher.db_path)
+        searcher.semantic_search_batch([query], COMPANY_ID)
+
+        # 其他进程写入（未显式失效），签名变化后自动重新加载
+        insert_capability(conn, query, FakeEmbeddingService.vector(query))
+        conn.commit()
+        conn.close()
+
+        results = searcher.semantic_search_batch([query], COMPANY_ID, top_k=1)[0]
+        assert results[0]['capability_name'] == query
+        assert results[0]['match_score'] == pytest.approx(1.0, abs=1e-5)
+
+
+@pytest.mark.unit
+class TestKeywordSearchBatch:
+    """测试批量关键词搜索"""
+
+    def test_matches_single_keyword_search(self, searcher):
+        queries = ['能力1', '能力2 描述', '能力15，能力7', 'ABC']
+        batch = searcher._keyword_search_batch(queries, COMPANY_ID, top_k=8)
+        for query, results in zip(queries, batch):
+            single = searcher._keyword_search(query, COMPANY_ID, top_k=8)
+            assert [(r['capability_id'], r['match_score']) for r in results] == \
+                [(r['capability_id'], r['match_score']) for r in single]
+
+    def test_tag_filter(self, searcher):
+        batch = searcher._keyword_search_batch(['能力'], COMPANY_ID, tag_id=2, top_k=100)[0]
+        single = searcher._keyword_search('能力', COMPANY_ID, tag_id=2, top_k=100)
+        assert [r['capability_id'] for r in batch] == [r['capability_id'] for r in single]
+        assert all(r['tag_id'] == 2 for r in batch)
+
+    def test_fts_results_match_like(self, searcher):
+        from ai_tender_system.common.fts_search import ensure_fts_indexes
+
+        queries = ['能力19', '能力1 的描述', '能力7，能力15']
+        like_results = searcher._keyword_search_batch(queries, COMPANY_ID, top_k=1000)
+
+        conn = sqlite3.connect(searcher.db_path)
+        assert ensure_fts_indexes(conn) == ['product_capabilities_fts']
+        conn.close()
+
+        fts_results = searcher._keyword_search_batch(queries, COMPANY_ID, top_k=1000)
+        for like, fts in zip(like_results, fts_results):
+            assert sorted((r['capability_id'], r['match_score']) for r in like) == \
+                sorted((r['capability_id'], r['match_score']) for r in fts)
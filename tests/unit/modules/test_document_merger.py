@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+XML 级文档合并测试
+
+测试场景：
+1. 段落与表格按原文档顺序合并
+2. 图片关系重映射，相同图片只保存一份
+3. 各文档的编号列表分配新编号，互不串号
+4. 缺少的样式随内容复制；unify_styles=False 时同名样式改名保留
+5. 分节符保留各文档的页面设置与页眉
+6. 一次遍历删除空白段落，分节/分页段落保留
+7. merge_documents_v2 端到端输出可重新打开
+8. 基准文档没有 numbering.xml 时新建编号部件
+"""
+
+import io
+import sys
+from pathlib import Path
+
+import pytest
+from docx import Document
+from docx.enum.section import WD_ORIENT
+from docx.enum.style import WD_STYLE_TYPE
+from docx.opc.constants import RELATIONSHIP_TYPE as RT
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls, qn
+from docx.shared import Pt
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
+
+from ai_tender_system.modules.document_merger.merger_service import DocumentMergerService
+from ai_tender_system.modules.document_merger.xml_merger import XmlDocumentMerger, remove_blank_paragraphs
+
+
+def png_bytes(color):
+    buffer = io.BytesIO()
+    Image.new('RGB', (4, 4), color).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def add_numbered_paragraph(doc, text):
+    """添加引用 numId=1 的编号段落（源文档各自定义自己的 numId=1）"""
+    numbering = doc.part.numbering_part.element
+    if numbering.find(qn('w:num')) is None:
+        numbering.append(parse_xml(
+            f'<w:abstractNum {nsdecls("w")} w:abstractNumId="0"><w:nsid w:val="1234ABCD"/>'
+            f'<w:lvl w:ilvl="0"><w:start w:val="1"/><w:numFmt w:val="decimal"/><w:lvlText w:val="%1."/></w:lvl>'
+            f'</w:abstractNum>'))
+        numbering.append(parse_xml(
+            f'<w:num {nsdecls("w")} w:numId="1"><w:abstractNumId w:val="0"/></w:num>'))
+    paragraph = doc.add_paragraph(text)
+    paragraph._p.get_or_add_pPr().append(parse_xml(
+        f'<w:numPr {nsdecls("w")}><w:ilvl w:val="0"/><w:numId w:val="1"/></w:numPr>'))
+    return paragraph
+
+
+def build_docs(tmp_path):
+    business = Document()
+    business.add_paragraph('商务-1')
+    business.add_paragraph('')
+    business.add_paragraph('   ')
+    add_numbered_paragraph(business, '商务列表项')
+    business.styles.add_style('共用样式', WD_STYLE_TYPE.PARAGRAPH).font.size = Pt(10)
+    business.save(tmp_path / 'business.docx')
+
+    p2p = Document()
+    p2p.add_paragraph('点对点-1')
+    table = p2p.add_table(rows=1, cols=2)
+    table.rows[0].cells[0].text = '表格单元'
+    p2p.add_paragraph('点对点-2')
+    p2p.add_paragraph().add_run().add_picture(io.BytesIO(png_bytes('red')))
+    add_numbered_paragraph(p2p, '点对点列表项')
+    custom = p2p.styles.add_style('点对点样式', WD_STYLE_TYPE.PARAGRAPH)
+    custom.base_style = p2p.styles.add_style('点对点基础', WD_STYLE_TYPE.PARAGRAPH)
+    p2p.add_paragraph('带样式段落', style='点对点样式')
+    shared = p2p.styles.add_style('共用样式', WD_STYLE_TYPE.PARAGRAPH)
+    shared.font.size = Pt(20)
+    p2p.add_paragraph('共用样式段落', style='共用样式')
+    p2p.save(tmp_path / 'p2p.docx')
+
+    tech = Document()
+    tech.add_paragraph('技术-1')
+    tech.add_paragraph().add_run().add_picture(io.BytesIO(png_bytes('red')))
+    tech.add_paragraph().add_run().add_picture(io.BytesIO(png_bytes('blue')))
+    add_numbered_paragraph(tech, '技术列表项')
+    section = tech.sections[0]
+    section.orientation = WD_ORIENT.LANDSCAPE
+    section.page_width, section.page_height = section.page_height, section.page_width
+    section.header.paragraphs[0].text = '技术页眉'
+    tech.save(tmp_path / 'tech.docx')
+
+    return {name: str(tmp_path / f'{name}.docx') for name in ('business', 'p2p', 'tech')}
+
+
+def body_sequence(doc):
+    """body 下段落文本与表格标记的顺序"""
+    sequence = []
+    for child in doc.element.body.iterchildren():
+        if child.tag == qn('w:p'):
+            text = ''.join(t.text or '' for t in child.iter(qn('w:t')))
+            if text.strip():
+                sequence.append(text)
+        elif child.tag == qn('w:tbl'):
+            sequence.append('<表格>')
+    return sequence
+
+
+def merge(paths, tmp_path, **kwargs):
+    merger = XmlDocumentMerger(paths['business'], **kwargs)
+    merger.append(paths['p2p'])
+    merger.append(paths['tech'])
+    output = tmp_path / 'merged.docx'
+    merger.save(str(output))
+    return merger, Document(str(output))
+
+
+@pytest.mark.unit
+class TestXmlDocumentMerger:
+    """测试 XML 级合并"""
+
+    def test_order_images_and_sections(self, tmp_path):
+        paths = build_docs(tmp_path)
+        _, result = merge(paths, tmp_path)
+
+        assert body_sequence(result) == [
+            '商务-1', '商务列表项', '点对点-1', '<表格>', '点对点-2', '点对点列表项',
+            '带样式段落', '共用样式段落', '技术-1', '技术列表项'
+        ]
+
+        # 相同的红色图片只保存一份
+        images = [rel.target_part.blob for rel in result.part.rels.values() if rel.reltype.endswith('/image')]
+        assert sorted(images) == sorted([png_bytes('red'), png_bytes('blue')])
+        for blip in result.element.body.iter(qn('a:blip')):
+            assert blip.get(qn('r:embed')) in result.part.rels
+
+        # 三个文档三节，最后一节保留技术方案的横向版式与页眉
+        assert len(result.sections) == 3
+        assert result.sections[-1].orientation == WD_ORIENT.LANDSCAPE
+        assert result.sections[-1].header.paragraphs[0].text == '技术页眉'
+        assert result.sections[0].orientation == WD_ORIENT.PORTRAIT
+
+    def test_numbering_is_remapped(self, tmp_path):
+        paths = build_docs(tmp_path)
+        _, result = merge(paths, tmp_path)
+
+        numbering = result.part.numbering_part.element
+        nums = {num.get(qn('w:numId')): num.find(qn('w:abstractNumId')).get(qn('w:val'))
+                for num in numbering.iterchildren(qn('w:num'))}
+        abstracts = {a.get(qn('w:abstractNumId')) for a in numbering.iterchildren(qn('w:abstractNum'))}
+
+        used = [p._p.pPr.numPr.numId.val for p in result.paragraphs if p.text.endswith('列表项')]
+        assert len(set(used)) == 3
+        assert len({nums[str(num_id)] for num_id in used}) == 3
+        assert all(nums[str(num_id)] in abstracts for num_id in used)
+        # 第一个 abstractNum 之后才允许出现 num
+        tags = [child.tag for child in numbering.iterchildren()]
+        assert max(i for i, t in enumerate(tags) if t == qn('w:abstractNum')) < tags.index(qn('w:num'))
+
+    def test_base_without_numbering_part(self, tmp_path):
+        paths = build_docs(tmp_path)
+        base = Document()
+        base.add_paragraph('无列表的基准文档')
+        rId = next(rId for rId, rel in base.part.rels.items() if rel.reltype == RT.NUMBERING)
+        base.part.drop_rel(rId)
+        base.save(tmp_path / 'plain.docx')
+        assert not any(rel.reltype == RT.NUMBERING for rel in Document(tmp_path / 'plain.docx').part.rels.values())
+
+        merger = XmlDocumentMerger(str(tmp_path / 'plain.docx'))
+        merger.append(paths['p2p'])
+        output = tmp_path / 'merged.docx'
+        merger.save(str(output))
+
+        result = Document(str(output))
+        item = next(p for p in result.paragraphs if p.text == '点对点列表项')
+        num_id = str(item._p.pPr.numPr.numId.val)
+        numbering = result.part.numbering_part.element
+        assert num_id in {num.get(qn('w:numId')) for num in numbering.iterchildren(qn('w:num'))}
+
+    def test_styles(self, tmp_path):
+        paths = build_docs(tmp_path)
+        _, unified = merge(paths, tmp_path)
+        styles = {style.name: style for style in unified.styles}
+        assert styles['点对点样式'].base_style.name == '点对点基础'
+        assert styles['共用样式'].font.size == Pt(10)
+        shared_para = next(p for p in unified.paragraphs if p.text == '共用样式段落')
+        assert shared_para.style.name == '共用样式'
+
+        _, separate = merge(paths, tmp_path, unify_styles=False)
+        shared_para = next(p for p in separate.paragraphs if p.text == '共用样式段落')
+        assert shared_para.style.name == '共用样式 (1)'
+        assert shared_para.style.font.size == Pt(20)
+
+    def test_remove_blank_paragraphs(self, tmp_path):
+        paths = build_docs(tmp_path)
+        merger, _ = merge(paths, tmp_path)
+
+        removed = merger.remove_blank_paragraphs()
+        assert removed == 2
+        body = merger.body
+        # 图片段落与分节段落保留
+        assert len(list(body.iter(qn('a:blip')))) == 3
+        assert len([p for p in body.iterchildren(qn('w:p')) if p.find(qn('w:pPr') + '/' + qn('w:sectPr')) is not None]) == 2
+        assert remove_blank_paragraphs(body) == 0
+
+
+@pytest.mark.unit
+class TestDocumentMergerService:
+    """测试整合服务"""
+
+    def test_merge_documents_v2(self, tmp_path):
+        paths = build_docs(tmp_path)
+        progress = []
+        result = DocumentMergerService().merge_documents_v2(
+            project_id=1,
+            file_paths=paths,
+            config={'doc_order': ['business', 'p2p', 'tech'], 'index_config': {'required': True, 'type': 'score_based',
+                                                                               'score_items': ['资质']}},
+            output_dir=str(tmp_path / 'out'),
+            progress_callback=lambda percent, message: progress.append(percent)
+        )
+
+        merged = Document(result['docx_path'])
+        texts = [p.text for p in merged.paragraphs]
+        assert texts[0] == '目录'
+        assert texts.index('商务-1') < texts.index('点对点-1') < texts.index('技术-1')
+        assert result['stats']['removed_blanks'] == 2
+        assert progress[-1] == 100
+        assert not list((tmp_path / 'out').glob('*.tmp'))
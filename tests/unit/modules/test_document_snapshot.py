@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文档快照缓存(DocumentSnapshotCache)测试
+
+测试场景：
+1. 快照内容与 python-docx 段落/表格顺序一致
+2. 内存/磁盘两级缓存命中
+3. 按大小淘汰
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+from docx import Document
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent / 'ai_tender_system'))
+
+from modules.tender_processing.document_snapshot import DocumentSnapshot, DocumentSnapshotCache
+
+
+@pytest.fixture
+def sample_docx(tmp_path):
+    """创建包含标题、正文和表格的测试文档"""
+    doc = Document()
+    doc.add_heading('第一章 项目概述', level=1)
+    doc.add_paragraph('本项目为测试项目。')
+    doc.add_table(rows=2, cols=2)
+    doc.add_paragraph('')
+    doc.add_heading('第二章 技术要求', level=1)
+    doc.add_paragraph('  需满足以下要求  ')
+    path = tmp_path / 'sample.docx'
+    doc.save(str(path))
+    return path
+
+
+@pytest.mark.unit
+class TestDocumentSnapshot:
+    """测试快照构建"""
+
+    def test_snapshot_matches_paragraphs(self, sample_docx):
+        doc = Document(str(sample_docx))
+        snapshot = DocumentSnapshot.from_document(doc, 'abc')
+
+        assert snapshot.paragraphs == [p.text for p in doc.paragraphs]
+        assert snapshot.styles == [p.style.name for p in doc.paragraphs]
+        assert len(snapshot.table_body_idx) == 1
+
+    def test_body_range_includes_table(self, sample_docx):
+        snapshot = DocumentSnapshot.from_document(Document(str(sample_docx)), 'abc')
+
+        start_body, end_body = snapshot.body_range_for_paragraphs(0, 2)
+        assert start_body < snapshot.table_body_idx[0] < end_body
+        assert snapshot.has_table_between(0, 2)
+        assert not snapshot.has_table_between(3, 4)
+
+    def test_get_paragraph_texts(self, sample_docx):
+        snapshot = DocumentSnapshot.from_document(Document(str(sample_docx)), 'abc')
+
+        texts = snapshot.get_paragraph_texts(1, None, strip=True, skip_empty=True)
+        assert texts == ['本项目为测试项目。', '第二章 技术要求', '需满足以下要求']
+
+
+@pytest.mark.unit
+class TestDocumentSnapshotCache:
+    """测试快照缓存"""
+
+    def test_memory_and_disk_hits(self, sample_docx, tmp_path):
+        cache = DocumentSnapshotCache(cache_dir=tmp_path / 'cache')
+
+        first = cache.get(sample_docx)
+        second = cache.get(sample_docx)
+        assert first is second
+        assert cache.misses == 1
+        assert cache.memory_hits == 1
+
+        # 新的缓存实例从磁盘加载
+        other = DocumentSnapshotCache(cache_dir=tmp_path / 'cache')
+        loaded = other.get(sample_docx)
+        assert other.disk_hits == 1
+        assert loaded.paragraphs == first.paragraphs
+        assert loaded.para_body_idx == first.para_body_idx
+
+    def test_memory_eviction(self, sample_docx, tmp_path):
+        cache = DocumentSnapshotCache(cache_dir=tmp_path / 'cache', max_memory_bytes=1)
+
+        second_path = tmp_path / 'second.docx'
+        doc = Document()
+        doc.add_paragraph('另一个文档')
+        doc.save(str(second_path))
+
+        cache.get(sample_docx)
+        cache.get(second_path)
+        assert cache.get_stats()['memory_items'] == 1
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文本嵌入服务缓存与批处理测试
+
+测试场景：
+1. 同一批中重复（含仅空白不同）的文本只请求一次
+2. 向量持久化缓存：重新向量化时只嵌入新增/修改的文本
+3. 多个批次并发请求，并发数受限，结果保持原顺序
+4. 同步接口与异步接口结果一致
+"""
+
+import asyncio
+import sys
+import threading
+import time
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent / 'ai_tender_system'))
+
+from modules.vector_engine.embedding_cache import EmbeddingCache, text_hash
+from modules.vector_engine.embedding_service import EmbeddingService
+
+
+class FakeEmbeddingAPI:
+    """模拟 Embeddings 接口：向量由文本内容决定，记录请求的文本与并发数"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.requested = []
+        self.lock = threading.Lock()
+        self.in_flight = self.max_in_flight = 0
+
+    def __call__(self, url, headers=None, json=None, timeout=None):
+        with self.lock:
+            self.requested.extend(json['input'])
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self.delay)
+        with self.lock:
+            self.in_flight -= 1
+
+        response = Mock(status_code=200)
+        response.json.return_value = {'data': [
+            {'index': i, 'embedding': [float(len(text)), float(sum(map(ord, text)) % 97), 1.0]}
+            for i, text in enumerate(json['input'])
+        ]}
+        return response
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return EmbeddingCache(str(tmp_path / 'embedding_cache.db'))
+
+
+def make_service(cache, **kwargs):
+    return EmbeddingService(model_type='text-embedding-v3', api_key='k', cache=cache, **kwargs)
+
+
+@pytest.mark.unit
+class TestEmbeddingService:
+    """测试缓存、去重与并发分批"""
+
+    def test_in_batch_dedup(self, cache):
+        api = FakeEmbeddingAPI()
+        service = make_service(cache)
+
+        with patch('modules.vector_engine.embedding_service.http_post', api):
+            result = asyncio.run(service.embed_texts(['甲', '乙', '甲', '  甲  ']))
+
+        assert api.requested == ['甲', '乙']
+        assert result.vectors.shape == (4, 3) and result.vectors.dtype == np.float32
+        assert np.array_equal(result.vectors[0], result.vectors[2])
+        assert np.array_equal(result.vectors[0], result.vectors[3])
+        assert (result.cache_hits, result.api_texts) == (0, 2)
+        assert service.stats['deduplicated'] == 2
+
+    def test_persistent_cache_only_embeds_changed(self, cache):
+        api = FakeEmbeddingAPI()
+        texts = [f'分块{i}' for i in range(5)]
+
+        with patch('modules.vector_engine.embedding_service.http_post', api):
+            first = asyncio.run(make_service(cache).embed_texts(texts))
+            # 模拟崩溃后重新向量化：新实例、同一缓存库，修改了一个分块
+            texts[2] = '分块2（已修改）'
+            second = asyncio.run(make_service(EmbeddingCache(cache.db_path)).embed_texts(texts))
+
+        assert api.requested == [f'分块{i}' for i in range(5)] + ['分块2（已修改）']
+        assert (second.cache_hits, second.api_texts) == (4, 1)
+        assert np.array_equal(first.vectors[0], second.vectors[0])
+        assert cache.get_many('text-embedding-v3', [text_hash('分块1')])
+        assert not cache.get_many('text-embedding-v2', [text_hash('分块1')])
+
+    def test_concurrent_batches_keep_order(self, cache):
+        api = FakeEmbeddingAPI(delay=0.05)
+        service = make_service(cache, max_concurrency=3)
+        texts = [f'文本{i}' * (i + 1) for i in range(12)]
+
+        with patch('modules.vector_engine.embedding_service.http_post', api):
+            result = asyncio.run(service.embed_texts(texts, batch_size=2))
+
+        assert 1 < api.max_in_flight <= 3
+        assert service.stats['api_calls'] == 6
+        assert [v[0] for v in result.vectors] == [float(len(t)) for t in texts]
+
+    def test_sync_matches_async(self, cache, tmp_path):
+        api = FakeEmbeddingAPI(delay=0.02)
+        texts = [f'能力{i}' for i in range(7)] + ['能力0']
+
+        with patch('modules.vector_engine.embedding_service.http_post', api):
+            sync_result = make_service(cache, max_concurrency=2).embed_texts_sync(texts, batch_size=3)
+            assert api.max_in_flight == 2
+            async_result = asyncio.run(
+                make_service(EmbeddingCache(str(tmp_path / 'other.db'))).embed_texts(texts, batch_size=3)
+            )
+
+        assert np.array_equal(sync_result.vectors, async_result.vectors)
+        assert sync_result.api_texts == 7
+
+    def test_result_count_mismatch(self, cache):
+        service = make_service(cache)
+        with patch.object(service, '_call_embedding_api', return_value=np.zeros((1, 3), dtype=np.float32)):
+            with pytest.raises(RuntimeError):
+                service.embed_texts_sync(['a', 'b'])
+        assert not cache.get_many('text-embedding-v3', [text_hash('a'), text_hash('b')])
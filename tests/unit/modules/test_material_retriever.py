@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+素材检索智能体(MaterialRetrieverAgent)批量检索测试
+
+测试场景：
+1. ExcerptManager.search_by_keywords 与逐个关键词搜索结果一致
+2. retrieve_batch 按组返回的片段/案例与逐组检索一致
+"""
+
+import logging
+import random
+import sqlite3
+import sys
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from ai_tender_system.modules.outline_generator.agents.material_retriever_agent import MaterialRetrieverAgent
+from ai_tender_system.modules.tender_library import ExcerptManager
+
+SCHEMA_DIR = PROJECT_ROOT / 'ai_tender_system' / 'database'
+COMPANY_ID = 1
+TOPICS = ['系统架构', '数据安全', '运维服务', '项目管理', '实施方案', 'API接口', '监控告警']
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / 'kb.db')
+    conn = sqlite3.connect(path)
+    conn.executescript((SCHEMA_DIR / 'tender_library_schema.sql').read_text(encoding='utf-8'))
+    conn.executescript((SCHEMA_DIR / 'case_library_schema.sql').read_text(encoding='utf-8'))
+
+    rng = random.Random(0)
+    for doc_id, result in enumerate(['won', 'lost', 'won'], start=1):
+        conn.execute(
+            "INSERT INTO tender_documents (tender_doc_id, company_id, doc_name, bid_result, technical_score) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (doc_id, COMPANY_ID, f'标书{doc_id}', result, doc_id * 10)
+        )
+    for i in range(120):
+        topics = rng.sample(TOPICS, 2)
+        conn.execute(
+            "INSERT INTO tender_excerpts (tender_doc_id, company_id, chapter_title, content, quality_score) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (rng.randint(1, 3), rng.choice([COMPANY_ID, 2]), f'{topics[0]}章节{i}',
+             f'本章介绍{topics[1]}的具体内容。', rng.randint(0, 100))
+        )
+    for i in range(40):
+        conn.execute(
+            "INSERT INTO case_studies (company_id, case_title, customer_name, industry, contract_type, created_at) "
+            "VALUES (?, ?, ?, ?, '合同', ?)",
+            (COMPANY_ID, f'{rng.choice(TOPICS)}项目{i}', f'客户{i}', rng.choice(['金融', '政务', 'api']),
+             f'2024-01-{i % 28 + 1:02d} 00:00:{i:02d}')
+        )
+    conn.commit()
+    conn.close()
+    return path
+
+
+def make_agent(db_path):
+    agent = MaterialRetrieverAgent.__new__(MaterialRetrieverAgent)
+    agent.db_path = db_path
+    agent.logger = logging.getLogger('test')
+    return agent
+
+
+@pytest.mark.unit
+class TestExcerptKeywordBatch:
+    """测试片段批量关键词搜索"""
+
+    @pytest.mark.parametrize('won_only', [True, False])
+    def test_matches_single_keyword_search(self, db_path, won_only):
+        manager = ExcerptManager(db_path)
+        keywords = TOPICS + ['章节1', 'api', '不存在的词']
+
+        batch = manager.search_by_keywords(COMPANY_ID, keywords, won_only=won_only, limit=6)
+
+        for keyword in keywords:
+            single = manager.search_by_keyword(COMPANY_ID, keyword, won_only=won_only, limit=6)
+            key = lambda r: (-r['quality_score'], -r['technical_score'])
+            assert [key(r) for r in batch[keyword]] == [key(r) for r in single]
+            assert {r['excerpt_id'] for r in batch[keyword]} <= {
+                r['excerpt_id'] for r in manager.search_by_keyword(COMPANY_ID, keyword, won_only, limit=1000)
+            }
+
+
+@pytest.mark.unit
+class TestRetrieveBatch:
+    """测试多组关键词批量检索"""
+
+    def test_groups_match_single_retrieval(self, db_path):
+        agent = make_agent(db_path)
+        term_groups = [
+            ['系统架构', '数据安全'],
+            ['运维服务', '监控告警', '系统架构'],
+            ['API'],
+            ['不存在的词'],
+        ]
+
+        batch = agent.retrieve_batch(COMPANY_ID, term_groups, include_capabilities=False, limit=5)
+
+        assert len(batch) == len(term_groups)
+        for terms, materials in zip(term_groups, batch):
+            single_excerpts = agent._retrieve_excerpts(COMPANY_ID, terms, 5)
+            assert [e['quality_score'] for e in materials['excerpts']] == \
+                [e['quality_score'] for e in single_excerpts]
+            assert materials['capabilities'] == []
+            assert len(materials['cases']) <= 2
+            for case in materials['cases']:
+                assert any(t.lower() in f"{case['title']}{case['customer']}{case['industry']}".lower()
+                           for t in terms)
+
+        assert batch[3] == {'excerpts': [], 'capabilities': [], 'cases': []}
+
+    def test_materials_for_chapters(self, db_path):
+        agent = make_agent(db_path)
+        chapters = agent.get_materials_for_chapters(['数据安全', '项目管理'], COMPANY_ID, max_results=4)
+
+        assert [c['chapter'] for c in chapters] == ['数据安全', '项目管理']
+        assert all(len(c['excerpts']) <= 4 for c in chapters)
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+标书处理流程结果落库测试
+
+测试场景：
+1. 筛选/提取结果经写后落库写入，要求记录来源分块ID
+2. 重跑时复用已有分块，跳过已筛选、已提取的分块
+3. 写线程按批次写入，写入失败时记录每个批次的错误及未写入的分块
+4. 筛选出错的分块以保守结果落库并记录错误，重跑时重新筛选
+"""
+
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent / 'ai_tender_system'))
+
+from common.database import KnowledgeBaseDB
+from modules.tender_processing import processing_pipeline
+from modules.tender_processing.filter import FilterResult
+from modules.tender_processing.requirement_extractor import TenderRequirement
+from modules.tender_processing.result_sink import ResultSink
+
+DOCUMENT = '\n\n'.join(
+    f'第{i}章 章节{i}\n\n投标人必须满足第{i}项要求，并提供相关证明材料。' * 3 for i in range(1, 9)
+)
+
+
+class Recorder:
+    """记录被调用的分块，模拟筛选/提取结果"""
+
+    def __init__(self):
+        self.filtered = []
+        self.extracted = []
+        self.lock = threading.Lock()
+
+    def filter_chunk(self, chunk):
+        with self.lock:
+            self.filtered.append(chunk['chunk_index'])
+        return FilterResult(chunk_id=chunk['chunk_index'], is_valuable=chunk['chunk_index'] % 2 == 0,
+                            confidence=0.9, reason='test')
+
+    def extract_chunk(self, chunk):
+        with self.lock:
+            self.extracted.append(chunk['chunk_index'])
+        return [TenderRequirement(constraint_type='mandatory', category='qualification', subcategory=None,
+                                  detail=f"要求{chunk['chunk_index']}", source_location='')], True, ''
+
+
+@pytest.fixture
+def db(tmp_path):
+    return KnowledgeBaseDB(str(tmp_path / 'kb.db'))
+
+
+def make_pipeline(db, monkeypatch, recorder):
+    monkeypatch.setattr(processing_pipeline, 'get_knowledge_base_db', lambda: db)
+    pipeline = processing_pipeline.TenderProcessingPipeline(project_id=1, document_text=DOCUMENT)
+    monkeypatch.setattr(pipeline.filter, 'filter_chunk', recorder.filter_chunk)
+    monkeypatch.setattr(pipeline.extractor, 'extract_chunk', recorder.extract_chunk)
+    return pipeline
+
+
+@pytest.mark.unit
+class TestPipelineResultSink:
+    """测试筛选/提取结果落库"""
+
+    def test_results_written_with_provenance(self, db, monkeypatch):
+        recorder = Recorder()
+        pipeline = make_pipeline(db, monkeypatch, recorder)
+        monkeypatch.setattr(db, 'get_tender_chunks', _fail_after_first(db.get_tender_chunks))
+
+        assert pipeline.step1_chunking() and pipeline.step2_filtering() and pipeline.step3_extraction()
+
+        chunks = {c['chunk_id']: c for c in db.get_tender_chunk_progress(1)}
+        assert len(chunks) == len(pipeline.chunks) > 2
+        assert all(c['is_valuable'] is not None for c in chunks.values())
+
+        requirements = db.get_tender_requirements(1)
+        assert len(requirements) == len(pipeline.requirements) == len(recorder.extracted)
+        for req in requirements:
+            chunk = chunks[req['chunk_id']]
+            assert chunk['is_valuable'] and chunk['extracted_at']
+            assert req['detail'] == f"要求{chunk['chunk_index']}"
+            assert req['extraction_model'] == pipeline.extract_model
+
+    def test_rerun_skips_finished_chunks(self, db, monkeypatch):
+        first = Recorder()
+        pipeline = make_pipeline(db, monkeypatch, first)
+        assert pipeline.step1_chunking() and pipeline.step2_filtering()
+
+        # 模拟提取中断：只有一个分块的结果已落库
+        done = next(c for c in db.get_tender_chunk_progress(1) if c['is_valuable'])
+        db.write_tender_processing_results(
+            requirements_data=[{'project_id': 1, 'chunk_id': done['chunk_id'], 'constraint_type': 'mandatory',
+                                'category': 'qualification', 'detail': '已提取'}],
+            extracted_chunk_ids=[done['chunk_id']]
+        )
+
+        second = Recorder()
+        rerun = make_pipeline(db, monkeypatch, second)
+        assert rerun.step1_chunking() and rerun.step2_filtering() and rerun.step3_extraction()
+
+        assert len(db.get_tender_chunk_progress(1)) == len(rerun.chunks)  # 分块未重复插入
+        assert second.filtered == []
+        assert done['chunk_index'] not in second.extracted
+        valuable = sum(1 for c in db.get_tender_chunk_progress(1) if c['is_valuable'])
+        assert len(second.extracted) == valuable - 1
+        assert len(rerun.requirements) == len(db.get_tender_requirements(1)) == len(second.extracted) + 1
+
+
+@pytest.mark.unit
+class TestResultSink:
+    """测试写线程攒批与错误处理"""
+
+    def test_micro_batches(self, db):
+        chunk_ids = db.insert_tender_chunks([
+            {'project_id': 1, 'chunk_index': i, 'chunk_type': 'paragraph', 'content': str(i)} for i in range(25)
+        ])
+        with ResultSink(db, 1, batch_size=10, flush_interval=5) as sink:
+            for chunk_id in chunk_ids.values():
+                sink.add_filter_result(chunk_id, True, 0.8, 'm')
+        assert sink.error is None
+        assert sink.written_chunks == 25 and sink.batches == 3
+        assert all(c['is_valuable'] for c in db.get_tender_chunk_progress(1))
+
+    def test_write_error_reported(self, db, monkeypatch):
+        def broken(**kwargs):
+            raise RuntimeError('disk full')
+
+        monkeypatch.setattr(db, 'write_tender_processing_results', broken)
+        sink = ResultSink(db, 1)
+        sink.add_requirements(1, [])
+        assert sink.close() is False
+        assert 'disk full' in str(sink.error)
+
+    def test_every_batch_error_collected(self, db, monkeypatch):
+        calls = []
+
+        def broken(**kwargs):
+            calls.append(kwargs)
+            raise RuntimeError(f'disk full {len(calls)}')
+
+        monkeypatch.setattr(db, 'write_tender_processing_results', broken)
+        sink = ResultSink(db, 1, batch_size=2, flush_interval=5)
+        for chunk_id in range(1, 6):
+            sink.add_filter_result(chunk_id, True, 0.8, 'm')
+        assert sink.close() is False
+        assert [str(e) for e in sink.errors] == ['disk full 1', 'disk full 2', 'disk full 3']
+        assert sorted(sink.unwritten_chunks) == [1, 2, 3, 4, 5]
+
+
+@pytest.mark.unit
+class TestFilterFailure:
+    """测试筛选出错的分块落库与重跑"""
+
+    def test_failure_persisted_and_retried(self, db, monkeypatch):
+        recorder = Recorder()
+        pipeline = make_pipeline(db, monkeypatch, recorder)
+
+        def flaky_filter(chunk):
+            if chunk['chunk_index'] == 1:
+                raise RuntimeError('API 超时')
+            return recorder.filter_chunk(chunk)
+
+        monkeypatch.setattr(pipeline.filter, 'filter_chunk', flaky_filter)
+        assert pipeline.step1_chunking() and pipeline.step2_filtering()
+
+        progress = {c['chunk_index']: c for c in db.get_tender_chunk_progress(1)}
+        assert progress[1]['is_valuable'] and 'API 超时' in progress[1]['filter_error']
+        assert all(c['filter_error'] is None for i, c in progress.items() if i != 1)
+        assert next(r for r in pipeline.filter_results if r.chunk_id == 1).error == 'API 超时'
+
+        # 恢复状态时沿用保守保留的结果
+        restored = make_pipeline(db, monkeypatch, Recorder())
+        assert restored.restore_state()
+        assert next(r for r in restored.filter_results if r.chunk_id == 1).is_valuable
+
+        # 重跑时只重新筛选出错的分块
+        second = Recorder()
+        rerun = make_pipeline(db, monkeypatch, second)
+        assert rerun.step1_chunking() and rerun.step2_filtering()
+        assert second.filtered == [1]
+        chunk = next(c for c in db.get_tender_chunk_progress(1) if c['chunk_index'] == 1)
+        assert chunk['filter_error'] is None and not chunk['is_valuable']
+
+
+def _fail_after_first(func):
+    """分块落库后不应再为重建映射读取全部分块"""
+    calls = []
+
+    def wrapper(*args, **kwargs):
+        calls.append(args)
+        assert len(calls) == 1, 'get_tender_chunks 被重复调用'
+        return func(*args, **kwargs)
+    return wrapper
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+RAG引擎共享与批量导入测试（以桩替代 LangChain/Chroma）
+
+测试场景：
+1. 引擎为进程内单例，构造时不加载模型；模型在进程内只加载一次
+2. 预热加载模型、打开向量库并完成一次推理
+3. 批量导入：按批向量化与写入，结果顺序与输入一致，返回各阶段耗时
+4. 批量导入：单个文件失败不影响其他文件，重复导入按文本块ID覆盖
+5. 文件内容变化后重新导入：按位置覆盖，旧版本多出的文本块被删除，检索不到旧内容
+"""
+
+import sys
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent / 'ai_tender_system'))
+
+from modules.knowledge_base import rag_engine
+
+
+@dataclass
+class FakeDocument:
+    page_content: str
+    metadata: dict = field(default_factory=dict)
+
+
+class FakeEmbeddings:
+    instances = 0
+
+    def __init__(self, **kwargs):
+        FakeEmbeddings.instances += 1
+        self.batches = []
+
+    def embed_documents(self, texts):
+        self.batches.append(len(texts))
+        return [[float(len(t)), 1.0] for t in texts]
+
+    def embed_query(self, text):
+        return [float(len(text)), 1.0]
+
+
+class FakeCollection:
+    def __init__(self):
+        self.rows = {}
+
+    def upsert(self, ids, embeddings, metadatas, documents):
+        assert len(ids) == len(embeddings) == len(metadatas) == len(documents)
+        for row in zip(ids, embeddings, metadatas, documents):
+            self.rows[row[0]] = row
+
+    def count(self):
+        return len(self.rows)
+
+
+class FakeChroma:
+    def __init__(self, persist_directory, embedding_function):
+        self._collection = FakeCollection()
+        self.embedding_function = embedding_function
+
+    def get(self, where=None, include=None):
+        key, value = next(iter(where.items()))
+        return {'ids': [row[0] for row in self._collection.rows.values() if row[2].get(key) == value]}
+
+    def delete(self, ids=None):
+        for chunk_id in ids:
+            self._collection.rows.pop(chunk_id, None)
+
+
+class FakeSplitter:
+    """按行切分"""
+
+    def __init__(self, **kwargs):
+        pass
+
+    def split_documents(self, documents):
+        return [FakeDocument(line, dict(doc.metadata))
+                for doc in documents for line in doc.page_content.splitlines() if line]
+
+
+class FakeTextLoader:
+    def __init__(self, file_path, encoding=None):
+        self.file_path = file_path
+
+    def load(self):
+        return [FakeDocument(Path(self.file_path).read_text(encoding='utf-8'), {'source': self.file_path})]
+
+
+@pytest.fixture
+def fake_langchain(monkeypatch):
+    FakeEmbeddings.instances = 0
+    monkeypatch.setattr(rag_engine, 'LANGCHAIN_AVAILABLE', True)
+    for name, fake in [('HuggingFaceEmbeddings', FakeEmbeddings), ('Chroma', FakeChroma),
+                       ('RecursiveCharacterTextSplitter', FakeSplitter), ('TextLoader', FakeTextLoader)]:
+        monkeypatch.setattr(rag_engine, name, fake, raising=False)
+    monkeypatch.setattr(rag_engine, '_embeddings', {})
+    monkeypatch.setattr(rag_engine, '_rag_engine', None)
+
+
+def write_file(directory, name, lines):
+    path = directory / name
+    path.write_text('\n'.join(lines), encoding='utf-8')
+    return str(path)
+
+
+@pytest.mark.unit
+class TestSharedEngine:
+    """测试单例与预热"""
+
+    def test_singleton_and_lazy_model(self, fake_langchain, tmp_path):
+        with patch.object(rag_engine.RAGEngine.__init__, '__defaults__', (str(tmp_path),)):
+            engines = []
+            threads = [threading.Thread(target=lambda: engines.append(rag_engine.get_rag_engine())) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        assert len({id(engine) for engine in engines}) == 1
+        assert FakeEmbeddings.instances == 0
+
+        other = rag_engine.RAGEngine(str(tmp_path / 'other'))
+        assert engines[0].embeddings is other.embeddings
+        assert FakeEmbeddings.instances == 1
+
+    def test_warm_up(self, fake_langchain, tmp_path):
+        assert rag_engine.prewarm_rag_engine() is None  # 默认关闭
+
+        engine = rag_engine.RAGEngine(str(tmp_path))
+        with patch.object(rag_engine, 'get_rag_engine', return_value=engine), \
+                patch.object(rag_engine, '_rag_engine', engine):
+            assert not rag_engine.is_rag_engine_ready()
+            thread = rag_engine.prewarm_rag_engine(force=True)
+            thread.join(5)
+            assert rag_engine.is_rag_engine_ready()
+            assert rag_engine.prewarm_rag_engine(force=True) is None
+
+        assert isinstance(engine._vectorstore, FakeChroma)
+        assert set(engine.warm_up()) == {'load_model', 'open_vectorstore', 'first_inference'}
+
+
+@pytest.mark.unit
+class TestBulkIngestion:
+    """测试批量导入"""
+
+    def test_batches_and_timings(self, fake_langchain, tmp_path):
+        engine = rag_engine.RAGEngine(str(tmp_path / 'db'))
+        items = [
+            {'file_path': write_file(tmp_path, f'f{i}.txt', [f'文件{i}第{j}段' for j in range(i + 2)]),
+             'metadata': {'company_id': 8, 'document_name': f'f{i}.txt'}}
+            for i in range(5)
+        ]
+
+        result = engine.add_documents(items, batch_size=4, workers=3)
+
+        assert result['success']
+        assert [f['file_path'] for f in result['files']] == [item['file_path'] for item in items]
+        assert [f['chunks_count'] for f in result['files']] == [2, 3, 4, 5, 6]
+        assert result['chunks_count'] == 20
+        assert all(size <= 4 for size in engine.embeddings.batches) and sum(engine.embeddings.batches) == 20
+        assert set(result['timings']) == {'load', 'split', 'toc', 'embed', 'upsert', 'total'}
+
+        rows = engine.vectorstore._collection.rows.values()
+        assert all(meta['company_id'] == 8 for _, _, meta, _ in rows)
+        assert engine.get_stats()['total_chunks'] == 20
+
+    def test_partial_failure_and_reimport(self, fake_langchain, tmp_path):
+        engine = rag_engine.RAGEngine(str(tmp_path / 'db'))
+        good = write_file(tmp_path, 'good.txt', ['一', '二', '三'])
+        items = [{'file_path': str(tmp_path / 'bad.pdf.unknown')}, {'file_path': good}]
+
+        result = engine.add_documents(items, batch_size=2)
+        assert not result['success']
+        assert not result['files'][0]['success'] and '不支持的文件格式' in result['files'][0]['error']
+        assert result['files'][1] == {'file_path': good, 'success': True, 'chunks_count': 3, 'toc_count': 0}
+
+        engine.add_documents(items[1:])
+        assert engine.vectorstore._collection.count() == 3
+
+    def test_changed_file_replaces_old_chunks(self, fake_langchain, tmp_path):
+        engine = rag_engine.RAGEngine(str(tmp_path / 'db'))
+        other = write_file(tmp_path, 'other.txt', ['甲', '乙'])
+        path = write_file(tmp_path, 'doc.txt', ['旧一', '旧二', '旧三', '旧四'])
+        engine.add_documents([{'file_path': other}, {'file_path': path}])
+
+        write_file(tmp_path, 'doc.txt', ['新一', '新二'])
+        result = engine.add_documents([{'file_path': path}])
+
+        assert result['files'][0]['chunks_count'] == 2
+        rows = engine.vectorstore._collection.rows.values()
+        assert sorted(text for _, _, meta, text in rows if meta['source'] == path) == ['新一', '新二']
+        assert engine.get_stats()['total_chunks'] == 4  # 其他文件不受影响
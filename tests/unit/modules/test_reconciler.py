@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+双向对账引擎(Reconciler)测试
+
+测试场景：
+1. ResponseIndex 的 BM25 检索与兜底搜索
+2. 并行对账结果按风险项顺序返回，进度单调递增
+3. 单个风险项检索失败只影响该项
+"""
+
+import json
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent / 'ai_tender_system'))
+
+from modules.risk_analyzer.prompt_manager import PromptManager
+from modules.risk_analyzer.reconciler import Reconciler
+from modules.risk_analyzer.response_index import ResponseIndex
+from modules.risk_analyzer.schemas import RiskItem
+
+RESPONSE_TEXT = '\n\n'.join([
+    '投标函：我方承诺按照招标文件要求完成全部工作内容。',
+    '短段落',
+    '资质证书：我公司具有建筑工程施工总承包一级资质，资质证书在有效期内。',
+    '技术参数响应表：服务器内存不低于256GB，存储容量满足技术参数要求，技术参数全部响应。',
+    '售后服务承诺：提供五年质保服务，质保期内免费上门维修，响应时间不超过2小时。',
+])
+
+
+@pytest.mark.unit
+class TestResponseIndex:
+    """测试应答文件检索索引"""
+
+    def test_search_ranks_by_bm25(self):
+        index = ResponseIndex(RESPONSE_TEXT)
+
+        results = index.search(['技术参数', '服务器'], top_k=3)
+        assert results[0][1].startswith('技术参数响应表')
+        assert len(results) == 1
+
+        results = index.search(['资质证书', '质保'], top_k=3)
+        assert {para[:4] for _, para in results} == {'资质证书', '售后服务'}
+
+    def test_short_paragraphs_not_ranked(self):
+        index = ResponseIndex(RESPONSE_TEXT)
+        assert index.search(['短段落']) == []
+
+    def test_first_containing_any(self):
+        index = ResponseIndex(RESPONSE_TEXT)
+        assert index.first_containing_any(['质保', '承诺']).startswith('投标函')
+        assert index.first_containing_any(['不存在']) is None
+
+
+class FakeLLM:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = 0
+
+    def call(self, prompt, **kwargs):
+        with self.lock:
+            self.calls += 1
+        return json.dumps({'compliance_status': 'compliant', 'match_score': 0.9,
+                           'overall_assessment': '满足要求'}, ensure_ascii=False)
+
+
+@pytest.mark.unit
+class TestReconcilerParallel:
+    """测试并行对账"""
+
+    @staticmethod
+    def make_reconciler(monkeypatch):
+        reconciler = Reconciler.__new__(Reconciler)
+        reconciler.model_name = 'fake-model'
+        reconciler.llm = FakeLLM()
+        reconciler.prompt_manager = PromptManager()
+        reconciler.max_workers = 4
+        reconciler._llm_semaphore = threading.BoundedSemaphore(4)
+        monkeypatch.setattr(reconciler, '_parse_document', lambda path: RESPONSE_TEXT)
+        return reconciler
+
+    def test_results_are_ordered(self, monkeypatch):
+        reconciler = self.make_reconciler(monkeypatch)
+
+        risk_items = [
+            RiskItem(location='', requirement=f'第{i}项：资质证书，技术参数', suggestion='')
+            for i in range(10)
+        ]
+        progress = []
+        results = reconciler.reconcile(risk_items, 'response.docx',
+                                       progress_callback=lambda p, m: progress.append(p))
+
+        assert [r.risk_item_id for r in results] == list(range(10))
+        assert all(item.compliance_status == 'compliant' for item in risk_items)
+        assert '资质证书' in results[0].response_content
+        assert progress == sorted(progress)
+        assert reconciler.llm.calls == 10
+
+    def test_retrieval_failure_isolated(self, monkeypatch):
+        reconciler = self.make_reconciler(monkeypatch)
+        find_related = reconciler._find_related_content
+
+        def flaky(risk_item, response_index):
+            if risk_item.requirement.startswith('第3项'):
+                raise RuntimeError('检索失败')
+            return find_related(risk_item, response_index)
+
+        monkeypatch.setattr(reconciler, '_find_related_content', flaky)
+        risk_items = [
+            RiskItem(location='', requirement=f'第{i}项：资质证书，技术参数', suggestion='')
+            for i in range(5)
+        ]
+        results = reconciler.reconcile(risk_items, 'response.docx')
+
+        assert [r.compliance_status for r in results] == ['compliant'] * 3 + ['unknown', 'compliant']
+        assert '检索失败' in results[3].overall_assessment
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+应答文件自检查器并发执行与文档上下文模式测试（以桩替代LLM）
+
+测试场景：
+1. 并发模式：类别在有界线程池中同时执行，结果和类别回调仍按配置顺序、在调用线程交付
+2. 并发模式：单个类别失败时返回默认结果且不触发类别回调，与顺序执行一致
+3. shared 模式：各AI检查类别的系统提示词与文档前缀完全相同，类别要求位于文档之后
+4. excerpt 模式：按关键词选取全文摘录，不超过预算且覆盖文档后部的命中
+"""
+
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent / 'ai_tender_system'))
+
+from modules.response_checker.checker import ResponseChecker, CONTEXT_MODES
+from modules.response_checker.extractors import select_excerpts
+from modules.response_checker.prompts import SHARED_CONTEXT_SYSTEM
+from modules.response_checker.schemas import CheckCategoryType
+
+CATEGORY_ORDER = [
+    CheckCategoryType.COMPLETENESS, CheckCategoryType.SIGNATURE_SEAL, CheckCategoryType.PAGE_NUMBER,
+    CheckCategoryType.INDEX_TABLE, CheckCategoryType.LEGAL_PERSON_ID, CheckCategoryType.AUTHORIZED_ID,
+    CheckCategoryType.BUSINESS_LICENSE, CheckCategoryType.RESPONSE_DATE, CheckCategoryType.PRICE_CHECK,
+    CheckCategoryType.PERFORMANCE,
+]
+
+
+class FakeLLM:
+    """记录调用并统计并发数的LLM桩"""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls = []
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+
+    def call(self, prompt, system_prompt=None, temperature=0.7, max_tokens=None, **kwargs):
+        with self.lock:
+            self.calls.append((system_prompt, prompt))
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            time.sleep(self.delay)
+            return json.dumps({'items': [{'status': '符合', 'detail': 'ok'}] * 4}, ensure_ascii=False)
+        finally:
+            with self.lock:
+                self.active -= 1
+
+
+def make_document(tmp_path, pages: int = 30) -> str:
+    """生成合成应答文件（纯文本），末尾附业绩与盖章内容"""
+    body = []
+    for page in range(pages):
+        body.append(f"第{page + 1}页 本项目技术方案说明，我公司将提供完善的实施与运维服务。" * 30)
+    body.append("业绩一：某市政务云项目，合同金额100万元，已通过验收。")
+    body.append("投标人（加盖公章）：测试科技有限公司 法定代表人（签字）：____")
+    path = tmp_path / 'response.txt'
+    path.write_text('\n'.join(body), encoding='utf-8')
+    return str(path)
+
+
+def make_checker(llm, **kwargs) -> ResponseChecker:
+    checker = ResponseChecker(**kwargs)
+    checker.llm = llm
+    checker.parser = object()  # 非 None 以跳过解析器初始化
+    checker._parse_document = lambda file_path: (Path(file_path).read_text(encoding='utf-8'), 30)
+    return checker
+
+
+def ai_prompts(llm):
+    """只保留类别检查调用（信息提取调用不使用类别系统提示词之外的共享格式）"""
+    return [(system, prompt) for system, prompt in llm.calls if '## 输出格式' in prompt or '本次检查任务' in prompt]
+
+
+@pytest.mark.unit
+class TestConcurrentCategories:
+    """并发类别检查测试"""
+
+    def test_results_and_callbacks_keep_configured_order(self, tmp_path):
+        llm = FakeLLM(delay=0.05)
+        checker = make_checker(llm, max_workers=4, context_mode='full')
+        main_thread = threading.get_ident()
+        delivered = []
+        progress = []
+
+        def category_callback(category):
+            delivered.append((category.category_id, threading.get_ident()))
+
+        result = checker.check(make_document(tmp_path),
+                               progress_callback=lambda p, m: progress.append(p),
+                               category_callback=category_callback)
+
+        expected = [c.value for c in CATEGORY_ORDER]
+        assert [c.category_id for c in result.categories] == expected
+        assert [category_id for category_id, _ in delivered] == expected
+        assert all(thread == main_thread for _, thread in delivered)
+        assert progress == sorted(progress)
+        assert 1 < llm.max_active <= 4
+
+    def test_failed_category_falls_back_without_callback(self, tmp_path):
+        checker = make_checker(FakeLLM(), max_workers=4)
+
+        def broken(text, info, page_count):
+            raise RuntimeError("boom")
+
+        checker._check_price = broken
+        delivered = []
+        result = checker.check(make_document(tmp_path), category_callback=lambda c: delivered.append(c.category_id))
+
+        price = result.categories[CATEGORY_ORDER.index(CheckCategoryType.PRICE_CHECK)]
+        assert price.category_id == CheckCategoryType.PRICE_CHECK.value
+        assert all(item.status == "无法判断" for item in price.items)
+        assert CheckCategoryType.PRICE_CHECK.value not in delivered
+        assert len(delivered) == len(CATEGORY_ORDER) - 1
+
+    def test_unknown_context_mode_rejected(self):
+        assert 'full' in CONTEXT_MODES
+        with pytest.raises(ValueError):
+            ResponseChecker(context_mode='bogus')
+
+
+@pytest.mark.unit
+class TestDocumentContextModes:
+    """文档上下文模式测试"""
+
+    def test_shared_mode_uses_identical_prefix(self, tmp_path):
+        llm = FakeLLM()
+        checker = make_checker(llm, max_workers=1, context_mode='shared')
+        checker.check(make_document(tmp_path))
+
+        calls = [(system, prompt) for system, prompt in llm.calls if '本次检查任务' in prompt]
+        assert len(calls) == 5
+        assert {system for system, _ in calls} == {SHARED_CONTEXT_SYSTEM}
+        prefixes = {prompt.split('## 本次检查任务')[0] for _, prompt in calls}
+        assert len(prefixes) == 1
+        assert len({prompt for _, prompt in calls}) == 5
+
+    def test_excerpt_mode_selects_relevant_text_within_budget(self, tmp_path):
+        text = Path(make_document(tmp_path, pages=300)).read_text(encoding='utf-8')
+        excerpt = select_excerpts(text, ['业绩', '合同'], 2000, window=50)
+        assert len(excerpt) <= 2000 + 20
+        assert '某市政务云项目' in excerpt
+        assert excerpt.startswith(text[:200])
+        assert select_excerpts(text, [], 500) == text[:500]
+        assert select_excerpts('短文本', ['业绩'], 500) == '短文本'
+
+        full_llm, excerpt_llm = FakeLLM(), FakeLLM()
+        make_checker(full_llm, max_workers=1, context_mode='full').check(str(tmp_path / 'response.txt'))
+        make_checker(excerpt_llm, max_workers=1, context_mode='excerpt').check(str(tmp_path / 'response.txt'))
+
+        full_chars = sum(len(prompt) for _, prompt in ai_prompts(full_llm))
+        excerpt_chars = sum(len(prompt) for _, prompt in ai_prompts(excerpt_llm))
+        assert excerpt_chars < full_chars / 2
+        performance_prompt = [p for _, p in ai_prompts(excerpt_llm) if '某市政务云项目' in p]
+        assert performance_prompt
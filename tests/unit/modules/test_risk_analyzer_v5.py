@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+风险分析器 5.0 切片并行分析测试
+
+测试场景：
+1. 并行分析结果按切片顺序合并，item_callback 按顺序增量回调
+2. progress_callback 单调递增
+3. 单个切片失败后重试
+4. progress_callback 在分析各切片之前回调
+"""
+
+import json
+import random
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent / 'ai_tender_system'))
+
+from modules.risk_analyzer import analyzer_v5
+from modules.risk_analyzer.analyzer_v5 import RiskAnalyzerV5
+from modules.risk_analyzer.prompt_manager import PromptManager
+from modules.risk_analyzer.smart_chunker import DocumentChunk
+
+
+class FakeLLM:
+    """按切片标题返回风险项的模拟 LLM，可指定前若干次调用失败"""
+
+    def __init__(self, fail_times=0):
+        self.fail_times = fail_times
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def call(self, prompt, **kwargs):
+        with self.lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            should_fail = self.calls <= self.fail_times
+        try:
+            time.sleep(random.uniform(0, 0.02))
+            if should_fail:
+                raise RuntimeError('模拟请求失败')
+            title = prompt.split('切片标题')[1][:3]
+            return json.dumps({'items': [{'requirement': f'要求{title}', 'risk_level': 'high'}]},
+                              ensure_ascii=False)
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+
+def make_analyzer(llm, max_workers, chunk_retries=0):
+    analyzer = RiskAnalyzerV5.__new__(RiskAnalyzerV5)
+    analyzer.model_name = 'fake-model'
+    analyzer.llm = llm
+    analyzer.prompt_manager = PromptManager()
+    analyzer.max_workers = max_workers
+    analyzer.chunk_retries = chunk_retries
+    analyzer._llm_semaphore = threading.BoundedSemaphore(max_workers)
+    return analyzer
+
+
+def make_chunks(count):
+    return [
+        DocumentChunk(title=f'切片标题{i:03d}', content=f'第{i}个切片内容。' * 20, chunk_index=i)
+        for i in range(count)
+    ]
+
+
+@pytest.mark.unit
+class TestRiskAnalyzerV5Parallel:
+    """测试切片并行分析"""
+
+    def test_parallel_results_are_ordered(self):
+        llm = FakeLLM()
+        analyzer = make_analyzer(llm, max_workers=4)
+        chunks = make_chunks(12)
+
+        delivered = []
+        progress = []
+        items = analyzer._extract_risk_items(
+            chunks, has_toc=True,
+            progress_callback=lambda p, m: progress.append(p),
+            item_callback=lambda batch: delivered.extend(batch)
+        )
+
+        assert [item.source_chunk for item in items] == list(range(12))
+        assert [item.source_chunk for item in delivered] == list(range(12))
+        assert progress == sorted(progress)
+        assert progress[-1] == 75
+        assert 1 < llm.max_in_flight <= 4
+
+    def test_sequential_mode(self):
+        llm = FakeLLM()
+        analyzer = make_analyzer(llm, max_workers=1)
+
+        items = analyzer._extract_risk_items(make_chunks(3), has_toc=False)
+
+        assert [item.source_chunk for item in items] == [0, 1, 2]
+        assert llm.max_in_flight == 1
+
+    def test_progress_reported_before_chunk(self):
+        llm = FakeLLM()
+        analyzer = make_analyzer(llm, max_workers=1)
+
+        events = []
+        analyzer._extract_risk_items(
+            make_chunks(2), has_toc=True,
+            progress_callback=lambda p, m: events.append((p, m, llm.calls))
+        )
+
+        assert events == [(47, '正在分析: 切片标题000', 0), (75, '正在分析: 切片标题001', 1)]
+
+    def test_chunk_retry(self, monkeypatch):
+        monkeypatch.setattr(analyzer_v5.time, 'sleep', lambda seconds: None)
+        llm = FakeLLM(fail_times=1)
+        analyzer = make_analyzer(llm, max_workers=1, chunk_retries=1)
+
+        items = analyzer._extract_risk_items(make_chunks(2), has_toc=True)
+
+        assert [item.source_chunk for item in items] == [0, 1]
+        assert llm.calls == 3
+
+    def test_chunk_gives_up_after_retries(self, monkeypatch):
+        monkeypatch.setattr(analyzer_v5.time, 'sleep', lambda seconds: None)
+        llm = FakeLLM(fail_times=2)
+        analyzer = make_analyzer(llm, max_workers=1, chunk_retries=1)
+
+        items = analyzer._extract_risk_items(make_chunks(2), has_toc=True)
+
+        assert [item.source_chunk for item in items] == [1]
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+风险分析任务风险项存储测试
+
+测试场景：
+1. 每次回调的风险项批量追加到子表，seq 连续递增，按 since_seq 只读取新增部分
+2. 旧版 risk_items 列中的 JSON 初始化时迁移到子表并清空该列
+3. 对账结果按下标写回对应的风险项
+4. 删除任务时一并删除风险项
+5. 同一数据库的建表/迁移每个进程只执行一次
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent / 'ai_tender_system'))
+
+from common import registry
+from common.database import KnowledgeBaseDB
+from modules.risk_analyzer import task_manager as risk_task_manager
+from modules.risk_analyzer.schemas import ReconcileResult, RiskItem
+
+
+def make_items(start: int, count: int):
+    return [RiskItem(location=f'第{i}条', requirement=f'要求{i}', suggestion='注意') for i in range(start, start + count)]
+
+
+@pytest.fixture
+def db(tmp_path):
+    return KnowledgeBaseDB(str(tmp_path / 'kb.db'))
+
+
+@pytest.fixture
+def manager(db, monkeypatch):
+    monkeypatch.setattr(risk_task_manager, 'get_knowledge_base_db', lambda: db)
+    return risk_task_manager.RiskTaskManager()
+
+
+@pytest.mark.unit
+class TestRiskItemStorage:
+    """风险项子表"""
+
+    def test_append_batches_and_read_since(self, manager):
+        task_id = manager.create_task('f1', '/tmp/a.docx', 'a.docx')
+        manager.append_risk_items(task_id, make_items(1, 3))
+        manager.append_risk_items(task_id, make_items(4, 2))
+
+        items = manager.get_risk_items(task_id)
+        assert [item['seq'] for item in items] == [1, 2, 3, 4, 5]
+        assert items[3]['requirement'] == '要求4'
+        assert manager.get_task(task_id)['risk_item_count'] == 5
+
+        new_items = manager.get_risk_items(task_id, since_seq=3)
+        assert [item['requirement'] for item in new_items] == ['要求4', '要求5']
+        assert manager.get_risk_items(task_id, since_seq=5) == []
+        assert len(manager.get_task_result(task_id)['risk_items']) == 5
+
+    def test_legacy_json_migrated(self, db, manager):
+        task_id = manager.create_task('f1', '/tmp/a.docx', 'a.docx')
+        legacy = [item.to_dict() for item in make_items(1, 2)]
+        db.execute_query("UPDATE risk_analysis_tasks SET risk_items = ? WHERE task_id = ?",
+                         (json.dumps(legacy, ensure_ascii=False), task_id))
+
+        registry.reset_registry()  # 模拟新进程启动
+        migrated = risk_task_manager.RiskTaskManager()
+        items = migrated.get_risk_items(task_id)
+        assert [item['requirement'] for item in items] == ['要求1', '要求2']
+        task = migrated.get_task(task_id)
+        assert task['risk_items'] is None
+        assert task['risk_item_count'] == 2
+
+        # 迁移后继续追加
+        migrated.append_risk_items(task_id, make_items(3, 1))
+        assert [item['seq'] for item in migrated.get_risk_items(task_id)] == [1, 2, 3]
+
+    def test_reconcile_results_written_back(self, manager):
+        task_id = manager.create_task('f1', '/tmp/a.docx', 'a.docx')
+        manager.append_risk_items(task_id, make_items(1, 3))
+        risk_items = [RiskItem.from_dict(item) for item in manager.get_risk_items(task_id)]
+        result = ReconcileResult(risk_item_id=1, bid_requirement='要求2', compliance_status='compliant',
+                                 overall_assessment='已响应', match_score=0.9, response_content='应答内容')
+
+        manager._save_reconcile_results(task_id, risk_items, [result])
+
+        items = manager.get_risk_items(task_id)
+        assert items[1]['compliance_status'] == 'compliant'
+        assert items[1]['response_text'] == '应答内容'
+        assert items[0]['compliance_status'] == ''
+        assert manager.get_task(task_id)['status'] == 'reconcile_completed'
+
+    def test_delete_task_removes_items(self, manager):
+        task_id = manager.create_task('f1', '/tmp/a.docx', 'a.docx')
+        manager.append_risk_items(task_id, make_items(1, 2))
+
+        assert manager.delete_task(task_id)
+        assert manager.get_risk_items(task_id) == []
+
+    def test_schema_checked_once_per_db(self, manager, monkeypatch):
+        calls = []
+        monkeypatch.setattr(risk_task_manager.RiskTaskManager, '_create_tables', lambda self: calls.append(1))
+        again = risk_task_manager.RiskTaskManager()
+        assert calls == []
+        task_id = again.create_task('f1', '/tmp/a.docx', 'a.docx')
+        assert again.get_task(task_id)['status'] == 'pending'
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+简化版向量存储测试
+
+测试场景：
+1. top-k 结果与逐条计算的余弦相似度一致，阈值过滤生效
+2. 元数据过滤（单值与列表）只在候选行中检索
+3. 删除后不再返回，重新加载后删除仍然生效
+4. 追加日志持久化，重新加载不依赖 pickle；写入中断的日志尾部被忽略
+5. 追加行数超过阈值时压缩为内存映射的基础矩阵
+6. 旧版 data.pkl 首次加载时迁移
+"""
+
+import asyncio
+import json
+import pickle
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent / 'ai_tender_system'))
+
+from modules.vector_engine.simple_vector_store import SimpleVectorDocument, SimpleVectorStore
+
+DIM = 8
+
+
+def make_docs(count, start=0, seed=0):
+    rng = np.random.default_rng(seed)
+    return [
+        SimpleVectorDocument(
+            id=f'doc{i}',
+            content=f'内容{i}',
+            vector=rng.normal(size=DIM).astype(np.float32),
+            metadata={'group': 'a' if i % 2 == 0 else 'b', 'mod': i % 3}
+        )
+        for i in range(start, start + count)
+    ]
+
+
+def open_store(path):
+    store = SimpleVectorStore(str(path), dimension=DIM)
+    assert asyncio.run(store.initialize())
+    return store
+
+
+def brute_force(docs, query, top_k, threshold=-1.0):
+    q = query / np.linalg.norm(query)
+    scored = [(doc.id, float(np.dot(doc.vector / np.linalg.norm(doc.vector), q))) for doc in docs]
+    scored = [item for item in scored if item[1] >= threshold]
+    return [doc_id for doc_id, _ in sorted(scored, key=lambda item: -item[1])[:top_k]]
+
+
+@pytest.mark.unit
+class TestSimpleVectorStore:
+    """测试检索、过滤与持久化"""
+
+    def test_top_k_matches_brute_force(self, tmp_path):
+        store = open_store(tmp_path)
+        docs = make_docs(50)
+        assert asyncio.run(store.add_documents(docs))
+        query = np.random.default_rng(1).normal(size=DIM)
+
+        results = asyncio.run(store.search(query, top_k=5, threshold=-1.0))
+        assert [r.document.id for r in results] == brute_force(docs, query, 5)
+        assert [r.rank for r in results] == [1, 2, 3, 4, 5]
+        assert all(a.score >= b.score for a, b in zip(results, results[1:]))
+
+        filtered = asyncio.run(store.search(query, top_k=50, threshold=0.3))
+        assert [r.document.id for r in filtered] == brute_force(docs, query, 50, threshold=0.3)
+        assert asyncio.run(store.search(np.ones(DIM + 1), top_k=5)) == []
+
+    def test_metadata_filter(self, tmp_path):
+        store = open_store(tmp_path)
+        docs = make_docs(30)
+        asyncio.run(store.add_documents(docs))
+        query = np.random.default_rng(2).normal(size=DIM)
+
+        results = asyncio.run(store.search(query, top_k=30, threshold=-1.0, filter_metadata={'group': 'a'}))
+        expected = brute_force([d for d in docs if d.metadata['group'] == 'a'], query, 30)
+        assert [r.document.id for r in results] == expected
+
+        results = asyncio.run(store.search(query, top_k=30, threshold=-1.0,
+                                           filter_metadata={'group': 'b', 'mod': [0, 2]}))
+        assert {r.document.id for r in results} == {
+            d.id for d in docs if d.metadata['group'] == 'b' and d.metadata['mod'] != 1}
+        assert asyncio.run(store.search(query, filter_metadata={'group': 'c'})) == []
+
+    def test_delete_and_reload(self, tmp_path):
+        store = open_store(tmp_path)
+        docs = make_docs(10)
+        asyncio.run(store.add_documents(docs))
+        assert asyncio.run(store.delete_document('doc3'))
+        assert not asyncio.run(store.delete_document('doc3'))
+
+        query = docs[3].vector
+        assert 'doc3' not in [r.document.id for r in asyncio.run(store.search(query, top_k=10, threshold=-1.0))]
+        assert len(store.document_ids) == 9 and store.vectors.shape == (9, DIM)
+
+        reloaded = open_store(tmp_path)
+        assert not (tmp_path / 'data.pkl').exists()
+        assert set(reloaded.documents) == {d.id for d in docs} - {'doc3'}
+        top = asyncio.run(reloaded.search(docs[5].vector, top_k=1))[0]
+        assert top.document.id == 'doc5' and top.score == pytest.approx(1.0, abs=1e-5)
+        assert reloaded.documents['doc5'].content == '内容5'
+
+    def test_truncated_segment_is_ignored(self, tmp_path):
+        store = open_store(tmp_path)
+        asyncio.run(store.add_documents(make_docs(4)))
+        # 模拟写入向量后、写完日志前崩溃
+        with open(tmp_path / 'segments.f32', 'ab') as f:
+            f.write(np.zeros(DIM + 3, dtype=np.float32).tobytes())
+        with open(tmp_path / 'segments.jsonl', 'a', encoding='utf-8') as f:
+            f.write('{"op": "add", "id": "doc9", "con')
+
+        reloaded = open_store(tmp_path)
+        assert sorted(reloaded.documents) == ['doc0', 'doc1', 'doc2', 'doc3']
+
+    def test_compaction(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(SimpleVectorStore, 'COMPACT_MIN_ROWS', 8)
+        store = open_store(tmp_path)
+        docs = make_docs(6)
+        asyncio.run(store.add_documents(docs))
+        asyncio.run(store.delete_document('doc0'))
+        assert not (tmp_path / 'vectors.npy').exists()
+
+        more = make_docs(4, start=6, seed=7)
+        asyncio.run(store.add_documents(more))
+        assert (tmp_path / 'vectors.npy').exists()
+        assert not (tmp_path / 'segments.jsonl').exists()
+        assert isinstance(store._base, np.memmap) and store._base.shape == (9, DIM)
+        assert store.get_stats()['pending_segment_rows'] == 0
+
+        query = np.random.default_rng(3).normal(size=DIM)
+        alive = docs[1:] + more
+        results = asyncio.run(store.search(query, top_k=4, threshold=-1.0))
+        assert [r.document.id for r in results] == brute_force(alive, query, 4)
+
+        reloaded = open_store(tmp_path)
+        assert reloaded.document_ids == [d.id for d in alive]
+
+    def test_legacy_pickle_migration(self, tmp_path):
+        docs = make_docs(5)
+        with open(tmp_path / 'data.pkl', 'wb') as f:
+            pickle.dump({'documents': {d.id: d for d in docs}, 'document_ids': [d.id for d in docs]}, f)
+
+        store = open_store(tmp_path)
+        assert store.document_ids == [d.id for d in docs]
+        assert not (tmp_path / 'data.pkl').exists()
+        assert (tmp_path / 'vectors.npy').exists()
+        top = asyncio.run(store.search(docs[2].vector, top_k=1))[0]
+        assert top.document.id == 'doc2'
+        assert json.loads((tmp_path / 'documents.jsonl').read_text(encoding='utf-8').splitlines()[0])['id'] == 'doc0'
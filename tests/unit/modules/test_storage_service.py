@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文件存储服务内容寻址去重测试
+
+测试场景：
+1. 上传按块读取写入，校验和与内容一致
+2. 相同内容再次上传时复用同一副本（硬链接），引用计数递增，可按校验和查到此前的上传
+3. 删除文件时引用计数递减，最后一个引用删除后副本一并删除
+4. 关闭去重时每次上传独立保存
+"""
+
+import hashlib
+import importlib
+import io
+import sqlite3
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent / 'ai_tender_system'))
+
+from common import registry
+from core.storage_service import FileStorageService
+
+# core 包导出了同名的全局实例，这里取模块本身
+storage_module = importlib.import_module('core.storage_service')
+
+CONTENT = b'%PDF-1.7 tender document ' * 1000
+
+
+class RecordingReader(io.BytesIO):
+    """记录每次 read 的参数"""
+
+    def __init__(self, data):
+        super().__init__(data)
+        self.sizes = []
+
+    def read(self, size=-1):
+        self.sizes.append(size)
+        return super().read(size)
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    db_path = tmp_path / 'kb.db'
+
+    @contextmanager
+    def connect():
+        conn = sqlite3.connect(str(db_path))
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    registry.reset_registry()
+    monkeypatch.setattr(storage_module, 'get_db_connection', connect)
+    monkeypatch.setattr(storage_module, 'CHUNK_SIZE', 4096)
+    yield FileStorageService(storage_root=str(tmp_path / 'uploads'))
+    registry.reset_registry()
+
+
+def blob_rows():
+    with storage_module.get_db_connection() as conn:
+        return [dict(row) for row in conn.execute("SELECT checksum, ref_count FROM file_blobs")]
+
+
+def stored_path(metadata):
+    return storage_module.to_absolute_path(metadata.file_path)
+
+
+@pytest.mark.unit
+class TestContentAddressedStorage:
+    """流式写入与去重"""
+
+    def test_streamed_in_chunks(self, service):
+        reader = RecordingReader(CONTENT)
+        metadata = service.store_file(reader, '招标文件.pdf', 'tender_documents', 'tender')
+
+        assert set(reader.sizes) == {4096}
+        assert metadata.file_size == len(CONTENT)
+        assert metadata.checksum == hashlib.sha256(CONTENT).hexdigest()
+        assert stored_path(metadata).read_bytes() == CONTENT
+        assert not any((service.blob_root / 'incoming').iterdir())
+
+    def test_duplicate_upload_shares_blob(self, service):
+        first = service.store_file(io.BytesIO(CONTENT), 'a.pdf', 'tender_documents', 'tender')
+        second = service.store_file(io.BytesIO(CONTENT), 'b.pdf', 'qualifications', 'qualification')
+
+        assert first.file_path != second.file_path
+        assert stored_path(first).stat().st_ino == stored_path(second).stat().st_ino
+        assert blob_rows() == [{'checksum': first.checksum, 'ref_count': 2}]
+        assert service.get_blob_path(first.checksum).read_bytes() == CONTENT
+
+        duplicate = service.find_by_checksum(second.checksum, exclude_file_id=second.file_id)
+        assert duplicate.file_id == first.file_id
+        assert service.find_by_checksum(hashlib.sha256(b'other').hexdigest()) is None
+
+    def test_delete_releases_blob(self, service):
+        first = service.store_file(io.BytesIO(CONTENT), 'a.pdf', 'tender_documents', 'tender')
+        second = service.store_file(io.BytesIO(CONTENT), 'b.pdf', 'tender_documents', 'tender')
+        blob_path = service.get_blob_path(first.checksum)
+
+        assert service.delete_file(first.file_id)
+        assert blob_rows()[0]['ref_count'] == 1
+        assert stored_path(second).read_bytes() == CONTENT
+
+        assert service.delete_file(second.file_id)
+        assert blob_rows() == []
+        assert not blob_path.exists()
+
+    def test_dedup_disabled(self, service, monkeypatch):
+        monkeypatch.setattr(storage_module, 'DEDUP_ENABLED', False)
+        first = service.store_file(io.BytesIO(CONTENT), 'a.pdf', 'tender_documents', 'tender')
+        second = service.store_file(io.BytesIO(CONTENT), 'b.pdf', 'tender_documents', 'tender')
+
+        assert stored_path(first).stat().st_ino != stored_path(second).stat().st_ino
+        assert blob_rows() == []
+        assert service.delete_file(first.file_id)
+        assert stored_path(second).read_bytes() == CONTENT
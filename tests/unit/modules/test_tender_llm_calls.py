@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+标书筛选/提取的 LLM 调用测试
+
+测试场景：
+1. 筛选器与提取器经 LLMClient 发送请求，按接口返回的用量计算成本
+2. 提取器对支持的模型使用 JSON Mode，带系统提示词
+3. 命中响应缓存时不再请求接口，成本为 0
+4. 请求失败时返回空响应
+5. 限流器在构造时创建一次，不随每次请求重新解析配额配置
+"""
+
+import sys
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent / 'ai_tender_system'))
+
+from common.llm_cache import LLMResponseCache
+from common.rate_limiter import ModelRateLimiter
+from modules.tender_processing.filter import TenderFilter
+from modules.tender_processing.requirement_extractor import SYSTEM_PROMPT, RequirementExtractor
+
+
+def ok_response(content, prompt_tokens=1000, completion_tokens=100):
+    response = Mock(status_code=200)
+    response.json.return_value = {
+        'choices': [{'message': {'content': content}}],
+        'usage': {'prompt_tokens': prompt_tokens, 'completion_tokens': completion_tokens}
+    }
+    return response
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / 'cache.db'), enabled=True, purposes='*')
+    with patch('common.llm_client.get_llm_response_cache', return_value=cache):
+        yield cache
+
+
+@pytest.mark.unit
+class TestTenderLLMCalls:
+    """测试筛选/提取经 LLMClient 调用"""
+
+    def test_filter_cost_and_cache(self, cache):
+        tender_filter = TenderFilter(model_name='gpt-4o-mini')
+        with patch('common.llm_client.http_post', return_value=ok_response(' YES|资质要求 ')) as post:
+            content, cost = tender_filter.call_ai_api('提示')
+            assert content == 'YES|资质要求'
+            assert cost == pytest.approx((1000 * 0.00015 + 100 * 0.0006) / 1000)
+
+            assert tender_filter.call_ai_api('提示') == ('YES|资质要求', 0.0)
+            assert post.call_count == 1
+
+        payload = post.call_args.kwargs['json']
+        assert payload['messages'] == [{'role': 'user', 'content': '提示'}]
+        assert payload['max_completion_tokens'] == 100
+        assert 'response_format' not in payload
+        assert tender_filter.total_api_calls == 1
+
+    def test_extractor_json_mode(self, cache):
+        extractor = RequirementExtractor(model_name='gpt-4o')
+        with patch('common.llm_client.http_post', return_value=ok_response('[]', 2000, 500)) as post:
+            content, cost = extractor.call_ai_api('提取')
+
+        assert content == '[]'
+        assert cost == pytest.approx((2000 * 0.03 + 500 * 0.06) / 1000)
+        payload = post.call_args.kwargs['json']
+        assert payload['response_format'] == {'type': 'json_object'}
+        assert payload['messages'][0] == {'role': 'system', 'content': SYSTEM_PROMPT}
+
+    def test_failure_returns_empty(self, cache):
+        extractor = RequirementExtractor(model_name='deepseek-v3')
+        error = Mock(status_code=401, text='unauthorized')
+        error.json.return_value = {'error': {'message': 'unauthorized'}}
+        with patch('common.llm_client.http_post', return_value=error), \
+                patch('common.llm_client.time.sleep'):
+            assert extractor.call_ai_api('提取', max_retries=2) == ('', 0.0)
+        assert extractor.total_api_calls == 0
+
+    def test_rate_limiter_built_once(self, cache):
+        cache.enabled = False
+        with patch('common.llm_client.ModelRateLimiter', wraps=ModelRateLimiter) as limiter_cls:
+            tender_filter = TenderFilter(model_name='gpt-4o-mini')
+            extractor = RequirementExtractor(model_name='deepseek-v3')
+            with patch('common.llm_client.http_post', return_value=ok_response('NO|无关')):
+                for _ in range(3):
+                    tender_filter.call_ai_api('提示')
+                    extractor.call_ai_api('提取')
+        assert limiter_cls.call_count == 2
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+标题匹配索引(TitleMatchIndex)测试
+
+测试场景：
+1. 包含/相等/相似度候选生成
+2. 索引实现与线性扫描实现的定位结果一致（覆盖 Level 1-7）
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+from docx import Document
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent / 'ai_tender_system'))
+
+from modules.tender_processing.structure_parser import DocumentStructureParser
+from modules.tender_processing.title_matcher import TitleMatchIndex, get_title_match_index
+from common.paragraph_index import get_paragraph_index
+from tests.unit.modules._title_scan import find_paragraph_by_title_scan
+
+
+@pytest.fixture
+def sample_doc():
+    """创建包含多种标题写法的测试文档"""
+    doc = Document()
+    doc.add_paragraph('招标文件')
+    doc.add_heading('第一章 投标邀请', level=1)
+    doc.add_paragraph('本项目邀请合格投标人参加投标，投标邀请详见公告。')
+    doc.add_heading('第二章：投标人须知', level=1)
+    doc.add_paragraph('投标人须知前附表')
+    doc.add_paragraph('技术规格应答说明')
+    doc.add_heading('2.1 资格审查要求', level=2)
+    doc.add_paragraph('1.商务条款')
+    doc.add_paragraph('附件-报价一览表')
+    doc.add_paragraph('')
+    doc.add_paragraph('正文中提到第三章 技术要求的内容，本段较长不应被当作标题匹配。')
+    return doc
+
+
+@pytest.fixture
+def parser():
+    parser = DocumentStructureParser()
+    # 元数据列表检测与匹配算法无关
+    parser._detect_chapter_title_list_range = lambda *args, **kwargs: None
+    return parser
+
+
+@pytest.mark.unit
+class TestTitleMatchIndex:
+    """测试候选生成"""
+
+    def test_find_containing_and_equal(self, sample_doc):
+        index = TitleMatchIndex(get_paragraph_index(sample_doc))
+
+        assert index.find_containing('clean', '投标人须知') == [3, 4]
+        assert index.find_containing('clean', '投标人须知', start_idx=4) == [4]
+        assert index.find_equal('without_number', '投标邀请') == [1]
+        assert index.find_containing('clean', '不存在的标题') == []
+
+    def test_find_similar_keywords_bound(self, sample_doc):
+        index = TitleMatchIndex(get_paragraph_index(sample_doc))
+
+        similar = index.find_similar_keywords('技术规格响应说明')
+        assert 5 in similar
+        assert 0 not in similar
+
+    def test_shared_index(self, sample_doc):
+        assert get_title_match_index(sample_doc) is get_title_match_index(sample_doc)
+
+
+@pytest.mark.unit
+class TestFindParagraphByTitle:
+    """测试索引实现与线性扫描实现一致"""
+
+    @pytest.mark.parametrize('title', [
+        '第一章 投标邀请',          # Level 1 完全匹配
+        '第二章 投标人须知',        # Level 2 规范化匹配
+        '第三章 投标邀请',          # Level 3 去编号匹配
+        '报价一览表',               # 附件前缀
+        '技术规格响应说明',         # Level 5 相似度匹配
+        '第一部分 商务条款',        # Level 7 转换编号
+        '第三章 技术要求',          # 正文中提到标题
+        '完全无关的标题内容',
+    ])
+    def test_matches_scan(self, sample_doc, parser, title):
+        for start_idx in (0, 2, 6):
+            expected = find_paragraph_by_title_scan(parser, sample_doc, title, start_idx)
+            actual = parser._find_paragraph_by_title(sample_doc, title, start_idx)
+            assert actual == expected
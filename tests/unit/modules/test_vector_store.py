@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+FAISS 向量存储测试
+
+测试场景：
+1. 检索结果与逐条计算的内积一致
+2. 删除只标记墓碑，检索时排除；压缩后从索引和文档记录中清除
+3. 元数据过滤下推到 SQLite，HNSW 下候选较少时精确打分
+4. 重新加载：删除无需检查点即可生效，未写入检查点的新增文档被丢弃
+5. auto 模式按文档数在后台从 Flat 升级到 IVF、HNSW
+6. 旧版 documents.pkl 首次加载时迁移
+"""
+
+import asyncio
+import pickle
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent / 'ai_tender_system'))
+
+pytest.importorskip('faiss')
+
+from modules.vector_engine import vector_store as vector_store_module
+from modules.vector_engine.vector_store import VectorDocument, VectorStore
+
+DIM = 8
+
+
+def make_docs(count, start=0, seed=0):
+    rng = np.random.default_rng(seed)
+    return [
+        VectorDocument(
+            id=f'doc{i}',
+            content=f'内容{i}',
+            vector=rng.normal(size=DIM).astype(np.float32),
+            metadata={'group': 'a' if i % 2 == 0 else 'b', 'mod': i % 3}
+        )
+        for i in range(start, start + count)
+    ]
+
+
+def brute_force(docs, query, top_k):
+    scored = sorted(((doc.id, float(np.dot(doc.vector, query))) for doc in docs), key=lambda item: -item[1])
+    return [doc_id for doc_id, _ in scored[:top_k]]
+
+
+def open_store(path, **kwargs):
+    kwargs.setdefault('checkpoint_interval', 0)
+    store = VectorStore(str(path), dimension=DIM, **kwargs)
+    assert asyncio.run(store.initialize())
+    return store
+
+
+def close_store(store):
+    asyncio.run(store.cleanup())
+
+
+@pytest.mark.unit
+class TestVectorStore:
+    """测试检索、墓碑删除、过滤与持久化"""
+
+    def test_search_matches_brute_force(self, tmp_path):
+        store = open_store(tmp_path, index_type='flat')
+        docs = make_docs(40)
+        assert asyncio.run(store.add_documents(docs))
+        assert asyncio.run(store.add_documents(docs[:2])) and len(store.documents) == 40
+        query = np.random.default_rng(1).normal(size=DIM).astype(np.float32)
+
+        results = asyncio.run(store.search(query, top_k=5, threshold=-100))
+        assert [r.document.id for r in results] == brute_force(docs, query, 5)
+        assert [r.rank for r in results] == [0, 1, 2, 3, 4]
+        assert np.allclose(results[0].document.vector, store.documents[results[0].document.id].vector)
+        assert asyncio.run(store.search(np.ones(DIM + 1), top_k=5)) == []
+        close_store(store)
+
+    def test_tombstone_delete_and_compact(self, tmp_path):
+        store = open_store(tmp_path, index_type='flat')
+        docs = make_docs(20)
+        asyncio.run(store.add_documents(docs))
+        for doc in docs[:5]:
+            assert asyncio.run(store.delete_document(doc.id))
+        assert not asyncio.run(store.delete_document('doc0'))
+
+        # 删除不改动索引
+        assert store.index.ntotal == 20
+        assert store.get_stats()['tombstones'] == 5
+        assert 'doc0' not in store.documents and len(store.documents) == 15
+
+        query = docs[0].vector
+        results = asyncio.run(store.search(query, top_k=20, threshold=-100))
+        assert [r.document.id for r in results] == brute_force(docs[5:], query, 20)
+
+        asyncio.run(store.compact())
+        assert store.index.ntotal == 15 and store.get_stats()['tombstones'] == 0
+        with sqlite3.connect(str(tmp_path / 'documents.db')) as conn:
+            assert conn.execute("SELECT COUNT(*) FROM vector_documents").fetchone()[0] == 15
+        results = asyncio.run(store.search(query, top_k=3, threshold=-100))
+        assert [r.document.id for r in results] == brute_force(docs[5:], query, 3)
+
+        # 已删除的ID可以重新添加
+        assert asyncio.run(store.add_documents([docs[0]]))
+        assert store.documents['doc0'].content == '内容0'
+        close_store(store)
+
+    @pytest.mark.parametrize('index_type', ['flat', 'hnsw'])
+    def test_metadata_filter(self, tmp_path, index_type):
+        store = open_store(tmp_path, index_type=index_type)
+        docs = make_docs(30)
+        asyncio.run(store.add_documents(docs))
+        asyncio.run(store.delete_document('doc1'))
+        query = np.random.default_rng(2).normal(size=DIM).astype(np.float32)
+
+        results = asyncio.run(store.search(query, top_k=4, threshold=-100, filter_metadata={'group': 'b'}))
+        alive_b = [d for d in docs if d.metadata['group'] == 'b' and d.id != 'doc1']
+        assert [r.document.id for r in results] == brute_force(alive_b, query, 4)
+
+        results = asyncio.run(store.search(query, top_k=30, threshold=-100,
+                                           filter_metadata={'group': 'a', 'mod': [0, 2]}))
+        assert {r.document.id for r in results} == {
+            d.id for d in docs if d.metadata['group'] == 'a' and d.metadata['mod'] != 1}
+        assert asyncio.run(store.search(query, filter_metadata={'group': 'c'})) == []
+        close_store(store)
+
+    def test_reload_after_crash(self, tmp_path):
+        store = open_store(tmp_path, index_type='flat')
+        docs = make_docs(10)
+        asyncio.run(store.add_documents(docs[:6]))
+
+        # 之后不再写检查点：删除记录在 SQLite 中，新增的向量只在内存中
+        store.checkpoint_interval = 3600
+        asyncio.run(store.delete_document('doc2'))
+        asyncio.run(store.add_documents(docs[6:]))
+
+        reloaded = open_store(tmp_path, index_type='flat')
+        assert set(reloaded.documents) == {'doc0', 'doc1', 'doc3', 'doc4', 'doc5'}
+        assert reloaded.get_stats()['tombstones'] == 1
+        results = asyncio.run(reloaded.search(docs[4].vector, top_k=3, threshold=-100))
+        alive = [d for d in docs[:6] if d.id != 'doc2']
+        assert [r.document.id for r in results] == brute_force(alive, docs[4].vector, 3)
+
+        # 重新导入丢失的文档，ID不与已有向量冲突
+        assert asyncio.run(reloaded.add_documents(docs[6:]))
+        assert len(reloaded.documents) == 9 and reloaded.index.ntotal == 10
+        close_store(reloaded)
+        close_store(store)
+
+    def test_auto_promotion(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(vector_store_module, 'IVF_TRAIN_MIN', 100)
+        monkeypatch.setattr(vector_store_module, 'IVF_MIN', 100)
+        monkeypatch.setattr(vector_store_module, 'HNSW_MIN', 300)
+        store = open_store(tmp_path)
+        docs = make_docs(400, seed=3)
+
+        asyncio.run(store.add_documents(docs[:50]))
+        assert store.active_index_type == 'flat'
+
+        asyncio.run(store.add_documents(docs[50:200]))
+        _wait_for(lambda: store.active_index_type == 'ivf')
+        assert store.index.ntotal == 200
+
+        asyncio.run(store.add_documents(docs[200:]))
+        _wait_for(lambda: store.active_index_type == 'hnsw')
+        assert len(store.documents) == 400
+
+        query = docs[123].vector
+        results = asyncio.run(store.search(query, top_k=3, threshold=-100))
+        assert [r.document.id for r in results] == brute_force(docs, query, 3)
+        close_store(store)
+
+        reloaded = open_store(tmp_path)
+        assert reloaded.active_index_type == 'hnsw' and len(reloaded.documents) == 400
+        close_store(reloaded)
+
+    def test_legacy_pickle_migration(self, tmp_path):
+        docs = make_docs(5)
+        with open(tmp_path / 'documents.pkl', 'wb') as f:
+            pickle.dump({'documents': {d.id: d for d in docs}, 'id_mapping': {}, 'next_index': 5}, f)
+
+        store = open_store(tmp_path)
+        assert set(store.documents) == {d.id for d in docs}
+        assert not (tmp_path / 'documents.pkl').exists()
+        assert (tmp_path / 'vector.index').exists()
+        assert np.allclose(store.documents['doc3'].vector, docs[3].vector)
+        close_store(store)
+
+
+def _wait_for(condition, timeout=10.0):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, "等待后台维护超时"
+        time.sleep(0.02)